@@ -4,7 +4,6 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
 from typing import Optional
-import pandas as pd
 import tempfile
 import os
 import unicodedata
@@ -17,46 +16,6 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-# Importiere neue Routen
-from backend.routes.tourplan_match import router as tourplan_match_router
-from backend.routes.tourplan_geofill import router as tourplan_geofill_router
-from backend.routes.tourplaene_list import router as tourplaene_list_router
-from backend.routes.tourplan_status import router as tourplan_status_router
-from backend.routes.tourplan_suggest import router as tourplan_suggest_router
-from backend.routes.tourplan_accept import router as tourplan_accept_router
-from backend.routes.audit_geo import router as audit_geo_router
-from backend.routes.failcache_api import router as failcache_api_router
-from backend.routes.failcache_clear import router as failcache_clear_router
-from backend.routes.failcache_improved import router as failcache_improved_router
-from backend.routes.tourplan_manual_geo import router as tourplan_manual_geo_router
-from backend.routes.debug_geo import router as debug_geo_router
-from backend.routes.manual_api import router as manual_api_router
-from backend.routes.tourplan_bulk_analysis import router as tourplan_bulk_analysis_router
-from backend.routes.tourplan_bulk_process import router as tourplan_bulk_process_router
-from backend.routes.tourplan_triage import router as tourplan_triage_router
-from backend.routes.upload_csv import router as upload_csv_router
-from backend.routes.audit_geocoding import router as audit_geocoding_router
-from backend.routes.workflow_api import router as workflow_api_router
-from backend.routes.audit_status import router as audit_status_router
-from backend.routes.health_check import router as health_check_router # Importiere neuen Health Check Router
-from backend.routes.summary_api import router as summary_api_router
-from backend.routes.test_dashboard_api import router as test_dashboard_router
-from backend.routes.address_recognition_api import router as address_recognition_router
-from backend.routes.endpoint_flow_api import router as endpoint_flow_router
-from backend.routes.ai_test_api import router as ai_test_router
-from backend.routes.backup_api import router as backup_api_router
-from backend.routes.engine_api import router as engine_api_router
-from backend.routes.coordinate_verify_api import router as coordinate_verify_router
-from backend.routes.stats_api import router as stats_api_router
-from backend.routes.live_traffic_api import router as live_traffic_api_router
-from backend.routes.ki_improvements_api import router as ki_improvements_api_router
-from backend.routes.code_checker_api import router as code_checker_api_router
-from backend.routes.code_improvement_job_api import router as code_improvement_job_api_router
-from backend.routes.cost_tracker_api import router as cost_tracker_api_router
-from backend.routes.osrm_metrics_api import router as osrm_metrics_api_router
-from backend.routes.health import router as health_routes # Korrekter Import für Health Routes
-from backend.routes.debug_health import router as debug_health_router  # Korrekter Import für Debug Health Router
-from backend.routes.auth_api import router as auth_router
 
 def create_app() -> FastAPI:
     """
@@ -607,6 +566,7 @@ def create_app() -> FastAPI:
     async def tourplan_visual_test(file: UploadFile = File(...)) -> JSONResponse:
         """Lädt eine CSV-Datei hoch und testet die Mojibake-Reparatur visuell."""
         import logging
+        import pandas as pd
         logging.basicConfig(level=logging.INFO)
 
         try:
@@ -851,6 +811,7 @@ def create_app() -> FastAPI:
         """Lädt Kunde aus DB nach ID"""
         try:
             import sqlite3
+            from db.connections import get_connection
             import os
 
             # Prüfe beide Datenbanken
@@ -858,7 +819,7 @@ def create_app() -> FastAPI:
 
             for db_path in db_paths:
                 if os.path.exists(db_path):
-                    conn = sqlite3.connect(db_path)
+                    conn = get_connection(db_path)
                     cursor = conn.cursor()
 
                     # Prüfe Tabellen
@@ -878,13 +839,10 @@ def create_app() -> FastAPI:
 
                                     # Erstelle Dictionary
                                     kunde = dict(zip(columns, result))
-                                    conn.close()
                                     return kunde
                             except sqlite3.OperationalError:
                                 continue
 
-                    conn.close()
-
             return None
 
         except Exception as e:
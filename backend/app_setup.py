@@ -65,28 +65,18 @@ def setup_database_schema() -> None:
 
 def setup_middleware(app: FastAPI) -> None:
     """Konfiguriert Middleware."""
-    from backend.core.error_handlers import http_exception_handler, RequestIdMiddleware
-    from backend.middlewares.trace_id import TraceIDMiddleware
-    from backend.middlewares.error_tally import error_tally
+    from backend.core.error_handlers import http_exception_handler
+    from backend.middlewares.pipeline import RequestPipelineMiddleware
     from fastapi.middleware.cors import CORSMiddleware
     from fastapi.exceptions import HTTPException
     
     # Exception Handler
     app.add_exception_handler(HTTPException, http_exception_handler)
     
-    # Middleware (Reihenfolge wichtig!)
-    # Error-Tally muss VOR anderen Middlewares sein, um alle Responses zu erfassen
-    app.middleware("http")(error_tally)
-    app.add_middleware(RequestIdMiddleware)
-    app.add_middleware(TraceIDMiddleware)
-    
-    # Rate-Limiting für Login (SC-04)
-    from backend.middlewares.rate_limit import RateLimitMiddleware
-    app.add_middleware(RateLimitMiddleware)
-    
-    # Security-Header (SC-11)
-    from backend.middlewares.security_headers import SecurityHeadersMiddleware
-    app.add_middleware(SecurityHeadersMiddleware)
+    # Request-Pipeline als EINE reine ASGI-Middleware (statt BaseHTTPMiddleware-Kette):
+    # Request-/Trace-ID, Tracing, Login-Rate-Limit (SC-04), Security-Header (SC-11),
+    # Error-Tally, Success-Stats, Access-Log. Streaming-Antworten bleiben ungepuffert.
+    app.add_middleware(RequestPipelineMiddleware)
     
     # CORS Middleware (SC-06: Kein "*" mit Credentials in Prod)
     # In Development: Erlaube alle Origins für lokale Entwicklung
@@ -140,132 +130,15 @@ def setup_static_files(app: FastAPI) -> None:
 
 
 def setup_routers(app: FastAPI) -> None:
-    """Registriert alle Router."""
-    # Importiere alle Router
-    from backend.routes.tourplan_match import router as tourplan_match_router
-    from backend.routes.tourplan_geofill import router as tourplan_geofill_router
-    from backend.routes.tourplaene_list import router as tourplaene_list_router
-    from backend.routes.tourplan_status import router as tourplan_status_router
-    from backend.routes.tourplan_suggest import router as tourplan_suggest_router
-    from backend.routes.tourplan_accept import router as tourplan_accept_router
-    from backend.routes.audit_geo import router as audit_geo_router
-    from backend.routes.failcache_api import router as failcache_api_router
-    from backend.routes.failcache_clear import router as failcache_clear_router
-    from backend.routes.failcache_improved import router as failcache_improved_router
-    from backend.routes.tourplan_manual_geo import router as tourplan_manual_geo_router
-    from backend.routes.debug_geo import router as debug_geo_router
-    from backend.routes.manual_api import router as manual_api_router
-    from backend.routes.tourplan_bulk_analysis import router as tourplan_bulk_analysis_router
-    from backend.routes.tourplan_triage import router as tourplan_triage_router
-    from backend.routes.tourplan_bulk_process import router as tourplan_bulk_process_router
-    from backend.routes.multi_tour_generator_api import router as multi_tour_generator_router
-    from backend.routes.upload_csv import router as upload_csv_router
-    from backend.routes.audit_geocoding import router as audit_geocoding_router
-    from backend.routes.workflow_api import router as workflow_api_router
-    from backend.routes.audit_status import router as audit_status_router
-    from backend.routes.health_check import router as health_check_router
-    from backend.routes.summary_api import router as summary_api_router
-    from backend.routes.test_dashboard_api import router as test_dashboard_router
-    from backend.routes.address_recognition_api import router as address_recognition_router
-    from backend.routes.endpoint_flow_api import router as endpoint_flow_router
-    from backend.routes.ai_test_api import router as ai_test_router
-    from backend.routes.backup_api import router as backup_api_router
-    from backend.routes.engine_api import router as engine_api_router
-    from backend.routes.coordinate_verify_api import router as coordinate_verify_router
-    from backend.routes.stats_api import router as stats_api_router
-    from backend.routes.tour_import_api import router as tour_import_router
-    from backend.routes.live_traffic_api import router as live_traffic_api_router
-    from backend.routes.ki_improvements_api import router as ki_improvements_api_router
-    from backend.routes.code_checker_api import router as code_checker_api_router
-    from backend.routes.code_improvement_job_api import router as code_improvement_job_api_router
-    from backend.routes.cost_tracker_api import router as cost_tracker_api_router
-    from backend.routes.osrm_metrics_api import router as osrm_metrics_api_router
-    from backend.routes.health import router as health_routes
-    from backend.routes.debug_health import router as debug_health_router
-    from backend.routes.auth_api import router as auth_router
-    from backend.routes.system_rules_api import router as system_rules_api_router
-    from backend.routes.db_management_api import router as db_management_api_router
-    from backend.routes.db_schema_api import router as db_schema_api_router
-    from backend.routes.error_logger_api import router as error_logger_api_router
-    from backend.routes.error_learning_api import router as error_learning_api_router
-    from backend.routes.ki_learning_api import router as ki_learning_api_router
-    from backend.routes.ki_activity_api import router as ki_activity_api_router
-    from backend.routes.ki_effectiveness_api import router as ki_effectiveness_api_router
-    from backend.routes.tour_filter_api import router as tour_filter_api_router
-    from backend.routes.tourplan_api import router as tourplan_api_router
-    from backend.routes.fuel_price_api import router as fuel_price_api_router
-    
-    # Registriere alle Router
-    routers = [
-        tourplan_match_router,
-        tourplan_geofill_router,
-        tourplaene_list_router,
-        tourplan_status_router,
-        tourplan_suggest_router,
-        tourplan_accept_router,
-        audit_geo_router,
-        failcache_api_router,
-        failcache_clear_router,
-        failcache_improved_router,
-        tourplan_manual_geo_router,
-        debug_geo_router,
-        manual_api_router,
-        tourplan_bulk_analysis_router,
-        tourplan_triage_router,
-        tourplan_bulk_process_router,
-        multi_tour_generator_router,
-        upload_csv_router,
-        audit_geocoding_router,
-        workflow_api_router,
-        audit_status_router,
-        health_check_router,
-        summary_api_router,
-        address_recognition_router,
-        endpoint_flow_router,
-        ai_test_router,
-        backup_api_router,
-        engine_api_router,
-        auth_router,
-        coordinate_verify_router,
-        stats_api_router,
-        live_traffic_api_router,
-        ki_improvements_api_router,
-        code_improvement_job_api_router,
-        cost_tracker_api_router,
-        osrm_metrics_api_router,
-        health_routes,
-        debug_health_router,
-        system_rules_api_router,
-        tourplan_api_router,  # Muss VOR db_management_api_router sein (gleicher Pfad)
-        fuel_price_api_router,
-        # db_management_api_router,  # AR-02: Jetzt in admin_router gebündelt
-        # db_schema_api_router,  # AR-02: Jetzt in admin_router gebündelt
-        error_logger_api_router,
-        error_learning_api_router,
-        ki_learning_api_router,
-        ki_activity_api_router,
-        ki_effectiveness_api_router,
-        # tour_filter_api_router,  # AR-02: Jetzt in admin_router gebündelt
-        # tour_import_router  # AR-02: Jetzt in admin_router gebündelt
-    ]
-    
-    for router in routers:
-        app.include_router(router)
+    """
+    Registriert alle Router aus dem Manifest (backend/core/router_registry.py).
+
+    Profil über APP_PROFILE (z.B. "routing-only"), Lazy Loading über LAZY_ROUTERS=1.
+    """
+    from backend.core.router_registry import register_routers
     
-        # AR-02: Admin-APIs unter /api/admin/* bündeln (Backward Compatibility)
-        # WICHTIG: Router-Endpoints haben bereits /api/... Prefixes in ihren Pfaden
-        # Daher werden sie zusätzlich unter /api/admin registriert, aber die Endpoints
-        # werden dann /api/admin/api/... sein (doppelte Prefixes).
-        # Das ist OK für jetzt - Frontend verwendet weiterhin alte URLs.
-        # Später: Endpoints auf relative Pfade umstellen (z.B. /tourplan/batch-geocode statt /api/tourplan/batch-geocode)
-        from backend.routes.admin_api import admin_router
-        app.include_router(admin_router)
-        logger.info("Admin-APIs unter /api/admin/* gebündelt (alte URLs bleiben funktional)")
-        
-        # AR-05: Geocoding-Retry API
-        from backend.routes.geocode_retry_api import router as geocode_retry_router
-        app.include_router(geocode_retry_router)
-        logger.info("Geocoding-Retry API registriert")
+    register_routers(app)
+    logger.info("Admin-APIs unter /api/admin/* gebündelt (alte URLs bleiben funktional)")
     
     # Optionale Debug-Routen (SC-09: Nur mit Flag + Admin)
     ENABLE_DEBUG_ROUTES = os.getenv("ENABLE_DEBUG_ROUTES", "0") == "1"
@@ -282,18 +155,6 @@ def setup_routers(app: FastAPI) -> None:
             logger.info("Debug-Router aktiviert (nur mit Admin-Auth)")
         except Exception as e:
             logger.warning("Debug-Router nicht verfügbar: %s", e)
-    
-    # Test-Dashboard und Code-Checker nur mit Flag + Admin (SC-09)
-    if ENABLE_DEBUG_ROUTES:
-        from backend.routes.auth_api import require_admin
-        app.include_router(
-            test_dashboard_router,
-            dependencies=[Depends(require_admin)]
-        )
-        app.include_router(
-            code_checker_api_router,
-            dependencies=[Depends(require_admin)]
-        )
         logger.info("Test-Dashboard und Code-Checker aktiviert (nur mit Admin-Auth)")
     else:
         logger.info("Test-Dashboard und Code-Checker deaktiviert (ENABLE_DEBUG_ROUTES=0)")
@@ -352,6 +213,7 @@ def setup_health_routes(app: FastAPI) -> None:
             "osrm_timeout": osrm_settings.OSRM_TIMEOUT_S,
             "env": os.getenv("APP_ENV", "dev"),
             "debug_routes_enabled": os.getenv("ENABLE_DEBUG_ROUTES", "0") == "1",
+            "router_import_report": getattr(app.state, "router_import_report", None) and app.state.router_import_report.as_dict(),
         }
 
 
@@ -413,6 +275,55 @@ def setup_startup_handlers(app: FastAPI) -> None:
         except Exception as e:
             log.warning(f"[STARTUP] ⚠️ Error-Pattern-Aggregator konnte nicht gestartet werden: {e}")
         
+        # Trace-Spans periodisch gebündelt speichern (Hintergrund-Job)
+        try:
+            from backend.services.request_tracing import run_trace_flush_loop
+            asyncio.create_task(run_trace_flush_loop())
+            log.info("[STARTUP] ✅ Trace-Flush gestartet")
+        except Exception as e:
+            log.warning(f"[STARTUP] ⚠️ Trace-Flush konnte nicht gestartet werden: {e}")
+        
+        # Erfolgs-Statistiken gebündelt speichern (Hintergrund-Job, letzter Flush beim Shutdown)
+        try:
+            from backend.services.success_stats import run_success_stats_flush_loop
+            asyncio.create_task(run_success_stats_flush_loop())
+            log.info("[STARTUP] ✅ Success-Stats-Flush gestartet")
+        except Exception as e:
+            log.warning(f"[STARTUP] ⚠️ Success-Stats-Flush konnte nicht gestartet werden: {e}")
+
+        # Synonym-Treffer gebündelt schreiben (Hintergrund-Job, letzter Flush beim Shutdown)
+        try:
+            from backend.services.synonyms import run_synonym_hits_flush_loop
+            asyncio.create_task(run_synonym_hits_flush_loop())
+            log.info("[STARTUP] ✅ Synonym-Hit-Flush gestartet")
+        except Exception as e:
+            log.warning(f"[STARTUP] ⚠️ Synonym-Hit-Flush konnte nicht gestartet werden: {e}")
+        
+        # Read-only-Snapshot für Admin-/Statistik-Abfragen aktuell halten (Hintergrund-Job)
+        try:
+            from db.snapshot import run_snapshot_refresh_loop
+            asyncio.create_task(run_snapshot_refresh_loop())
+            log.info("[STARTUP] ✅ DB-Snapshot-Refresh gestartet")
+        except Exception as e:
+            log.warning(f"[STARTUP] ⚠️ DB-Snapshot-Refresh konnte nicht gestartet werden: {e}")
+        
+        # Tägliches DB-Backup (opt-in über DB_BACKUP_TIME, ersetzt dann den Task-Scheduler-Job)
+        try:
+            from scripts.db_backup import BACKUP_TIME, run_backup_loop
+            if BACKUP_TIME:
+                asyncio.create_task(run_backup_loop())
+                log.info(f"[STARTUP] ✅ DB-Backup geplant (täglich um {BACKUP_TIME} Uhr)")
+        except Exception as e:
+            log.warning(f"[STARTUP] ⚠️ DB-Backup-Zeitplan konnte nicht gestartet werden: {e}")
+        
+        # Job-Queue: unterbrochene Jobs neu einplanen, alte Jobs aufräumen
+        try:
+            from backend.services.job_runner import get_job_runner
+            recovered = await asyncio.to_thread(get_job_runner().start)
+            log.info(f"[STARTUP] ✅ Job-Runner gestartet ({recovered} Jobs wieder aufgenommen)")
+        except Exception as e:
+            log.warning(f"[STARTUP] ⚠️ Job-Runner konnte nicht gestartet werden: {e}")
+        
         # Tour-Vectorizer starten (Hintergrund-Job)
         try:
             from backend.services.tour_vectorizer import run_vectorizer_loop
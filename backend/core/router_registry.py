@@ -0,0 +1,249 @@
+"""
+Router-Registry: Deklaratives Manifest aller API-Router.
+
+- Feature-Profile (APP_PROFILE): z.B. "routing-only" für reine Karten-/Routing-Worker
+- Lazy Loading (LAZY_ROUTERS=1): schwere Router (KI, Statistik, Kosten, ...) werden
+  erst beim ersten Request auf ihren Pfad-Präfix importiert
+- Import-Zeit-Report pro Modul beim Boot (app.state.router_import_report)
+"""
+import asyncio
+import importlib
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from fastapi import APIRouter, Depends, FastAPI
+from starlette.routing import BaseRoute, Match
+from starlette.types import Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RouterSpec:
+    """Ein Eintrag im Router-Manifest."""
+    module: str
+    tag: str
+    attr: str = "router"
+    # Pfad-Präfixe, unter denen der Router lazy geladen werden darf (leer = immer eager)
+    lazy_prefixes: Tuple[str, ...] = ()
+    # Nur mit ENABLE_DEBUG_ROUTES=1 und Admin-Auth registrieren (SC-09)
+    debug_only: bool = False
+
+
+# Reihenfolge ist wichtig (erste passende Route gewinnt)!
+ROUTER_MANIFEST: List[RouterSpec] = [
+    RouterSpec("backend.routes.tourplan_match", "tourplan"),
+    RouterSpec("backend.routes.tourplan_geofill", "tourplan"),
+    RouterSpec("backend.routes.tourplaene_list", "tourplan"),
+    RouterSpec("backend.routes.tourplan_status", "tourplan"),
+    RouterSpec("backend.routes.tourplan_suggest", "tourplan"),
+    RouterSpec("backend.routes.tourplan_accept", "tourplan"),
+    RouterSpec("backend.routes.audit_geo", "geo"),
+    RouterSpec("backend.routes.failcache_api", "geo"),
+    RouterSpec("backend.routes.failcache_clear", "geo"),
+    RouterSpec("backend.routes.failcache_improved", "geo"),
+    RouterSpec("backend.routes.tourplan_manual_geo", "tourplan"),
+    RouterSpec("backend.routes.debug_geo", "geo"),
+    RouterSpec("backend.routes.manual_api", "tourplan"),
+    RouterSpec("backend.routes.tourplan_bulk_analysis", "tourplan"),
+    RouterSpec("backend.routes.tourplan_triage", "tourplan"),
+    RouterSpec("backend.routes.tourplan_bulk_process", "tourplan"),
+    RouterSpec("backend.routes.multi_tour_generator_api", "routing"),
+    RouterSpec("backend.routes.upload_csv", "tourplan"),
+    RouterSpec("backend.routes.audit_geocoding", "geo"),
+    RouterSpec("backend.routes.workflow_api", "routing"),
+    RouterSpec("backend.routes.audit_status", "geo"),
+    RouterSpec("backend.routes.health_check", "core"),
+    RouterSpec("backend.routes.summary_api", "stats"),
+    RouterSpec("backend.routes.address_recognition_api", "geo",
+               lazy_prefixes=("/api/address-recognition",)),
+    RouterSpec("backend.routes.endpoint_flow_api", "admin",
+               lazy_prefixes=("/api/endpoint-flow",)),
+    RouterSpec("backend.routes.ai_test_api", "ki", lazy_prefixes=("/api/ai-test",)),
+    RouterSpec("backend.routes.backup_api", "admin"),
+    RouterSpec("backend.routes.engine_api", "routing"),
+    RouterSpec("backend.routes.auth_api", "core"),
+    RouterSpec("backend.routes.coordinate_verify_api", "routing"),
+    RouterSpec("backend.routes.stats_api", "stats", lazy_prefixes=("/api/stats",)),
+    RouterSpec("backend.routes.live_traffic_api", "routing", lazy_prefixes=("/api/traffic",)),
+    RouterSpec("backend.routes.ki_improvements_api", "ki",
+               lazy_prefixes=("/api/ki-improvements",)),
+    RouterSpec("backend.routes.code_improvement_job_api", "ki",
+               lazy_prefixes=("/api/code-improvement-job",)),
+    RouterSpec("backend.routes.cost_tracker_api", "stats", lazy_prefixes=("/api/cost-tracker",)),
+    RouterSpec("backend.routes.osrm_metrics_api", "core"),
+    RouterSpec("backend.routes.tracing_api", "core"),
+    RouterSpec("backend.routes.telemetry_api", "core"),
+    RouterSpec("backend.routes.progress_api", "core"),
+    RouterSpec("backend.routes.jobs_api", "core"),
+    RouterSpec("backend.routes.health", "core"),
+    RouterSpec("backend.routes.debug_health", "core"),
+    RouterSpec("backend.routes.system_rules_api", "admin"),
+    RouterSpec("backend.routes.tourplan_api", "tourplan"),  # Muss VOR db_management_api sein (gleicher Pfad)
+    RouterSpec("backend.routes.fuel_price_api", "stats",
+               lazy_prefixes=("/api/fuel-prices", "/api/electricity-prices")),
+    # db_management_api, db_schema_api, tour_filter_api, tour_import_api: AR-02, in admin_router gebündelt
+    RouterSpec("backend.routes.error_logger_api", "ki", lazy_prefixes=("/api/errors",)),
+    RouterSpec("backend.routes.error_learning_api", "ki"),
+    RouterSpec("backend.routes.ki_learning_api", "ki", lazy_prefixes=("/api/ki-learning",)),
+    RouterSpec("backend.routes.ki_activity_api", "ki", lazy_prefixes=("/api/ki",)),
+    RouterSpec("backend.routes.ki_effectiveness_api", "ki", lazy_prefixes=("/api/ki",)),
+    # AR-02: Admin-APIs unter /api/admin/* bündeln (alte URLs bleiben funktional)
+    RouterSpec("backend.routes.admin_api", "admin", attr="admin_router"),
+    # AR-05: Geocoding-Retry API
+    RouterSpec("backend.routes.geocode_retry_api", "geo"),
+    # SC-09: Test-Dashboard und Code-Checker nur mit Flag + Admin
+    RouterSpec("backend.routes.test_dashboard_api", "debug", debug_only=True),
+    RouterSpec("backend.routes.code_checker_api", "debug", debug_only=True),
+]
+
+_ALL_TAGS = frozenset(spec.tag for spec in ROUTER_MANIFEST)
+
+# Feature-Profile: welche Manifest-Tags ein Worker registriert
+PROFILES: Dict[str, FrozenSet[str]] = {
+    "full": _ALL_TAGS,
+    "routing-only": frozenset({"core", "routing"}),
+    "tourplan": frozenset({"core", "routing", "tourplan", "geo"}),
+    "admin": frozenset({"core", "admin", "stats", "ki", "debug"}),
+}
+
+
+def resolve_profile(name: Optional[str] = None) -> FrozenSet[str]:
+    """Löst ein Profil (oder eine Komma-Liste von Tags) in Manifest-Tags auf."""
+    name = (name or os.getenv("APP_PROFILE", "full")).strip()
+    if name in PROFILES:
+        return PROFILES[name]
+    tags = frozenset(t.strip() for t in name.split(",") if t.strip())
+    unknown = tags - _ALL_TAGS
+    if unknown or not tags:
+        logger.warning(f"Unbekanntes APP_PROFILE '{name}', verwende 'full'")
+        return PROFILES["full"]
+    # "core" wird immer benötigt (Health, Auth)
+    return tags | {"core"}
+
+
+def _load_router(spec: RouterSpec) -> Tuple[APIRouter, float]:
+    """Importiert das Router-Modul und misst die Import-Zeit (inkl. Abhängigkeiten)."""
+    start = time.perf_counter()
+    module = importlib.import_module(spec.module)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return getattr(module, spec.attr), elapsed_ms
+
+
+class LazyRouterRoute(BaseRoute):
+    """
+    Platzhalter-Route: matcht die Pfad-Präfixe eines noch nicht importierten Routers.
+    Beim ersten Treffer wird das Modul importiert, der Platzhalter durch die echten
+    Routen ersetzt und der Request erneut durch den App-Router geschickt.
+    """
+
+    def __init__(self, app: FastAPI, spec: RouterSpec, include_kwargs: dict, report: "ImportReport"):
+        self.app = app
+        self.spec = spec
+        self.include_kwargs = include_kwargs
+        self.report = report
+        self._lock = asyncio.Lock()
+
+    def matches(self, scope: Scope) -> Tuple[Match, Scope]:
+        if scope["type"] not in ("http", "websocket"):
+            return Match.NONE, {}
+        path = scope["path"]
+        for prefix in self.spec.lazy_prefixes:
+            if path == prefix or path.startswith(prefix + "/"):
+                return Match.FULL, {}
+        return Match.NONE, {}
+
+    def url_path_for(self, name: str, /, **path_params):
+        from starlette.routing import NoMatchFound
+        raise NoMatchFound(name, path_params)
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        async with self._lock:
+            if self in self.app.router.routes:
+                self.materialize()
+        await self.app.router(scope, receive, send)
+
+    def materialize(self) -> None:
+        """Importiert den Router und ersetzt den Platzhalter an gleicher Position."""
+        router, elapsed_ms = _load_router(self.spec)
+        self.report.record(self.spec.module, elapsed_ms, lazy=True)
+        holder = APIRouter()
+        holder.include_router(router, **self.include_kwargs)
+        routes = self.app.router.routes
+        idx = routes.index(self)
+        routes[idx:idx + 1] = holder.routes
+        self.app.openapi_schema = None  # OpenAPI beim nächsten Abruf neu bauen
+        logger.info(f"Lazy-Router geladen: {self.spec.module} ({elapsed_ms:.1f}ms)")
+
+
+@dataclass
+class ImportReport:
+    """Import-Zeiten pro Router-Modul (erstes Modul zahlt für geteilte Abhängigkeiten)."""
+    profile: str
+    entries: List[dict] = field(default_factory=list)
+
+    def record(self, module: str, elapsed_ms: float, lazy: bool = False) -> None:
+        self.entries.append({"module": module, "import_ms": round(elapsed_ms, 1), "lazy": lazy})
+
+    @property
+    def total_ms(self) -> float:
+        return round(sum(e["import_ms"] for e in self.entries if not e["lazy"]), 1)
+
+    def log(self, top: int = 10) -> None:
+        eager = [e for e in self.entries if not e["lazy"]]
+        logger.info(f"Router-Import-Report (Profil '{self.profile}'): "
+                    f"{len(eager)} Module, {self.total_ms:.1f}ms gesamt")
+        for entry in sorted(eager, key=lambda e: e["import_ms"], reverse=True)[:top]:
+            logger.info(f"  {entry['import_ms']:8.1f}ms  {entry['module']}")
+
+    def as_dict(self) -> dict:
+        return {"profile": self.profile, "total_ms": self.total_ms, "modules": list(self.entries)}
+
+
+def register_routers(
+    app: FastAPI,
+    profile: Optional[str] = None,
+    lazy: Optional[bool] = None,
+    debug_routes: Optional[bool] = None,
+    manifest: Sequence[RouterSpec] = ROUTER_MANIFEST,
+) -> ImportReport:
+    """
+    Registriert alle Router aus dem Manifest, die zum Profil passen.
+
+    Args:
+        profile: Profilname oder Tag-Liste (Standard: APP_PROFILE, sonst "full")
+        lazy: Lazy Loading aktivieren (Standard: LAZY_ROUTERS=1)
+        debug_routes: Debug-Router registrieren (Standard: ENABLE_DEBUG_ROUTES=1)
+    """
+    profile_name = profile or os.getenv("APP_PROFILE", "full")
+    tags = resolve_profile(profile_name)
+    if lazy is None:
+        lazy = os.getenv("LAZY_ROUTERS", "0") == "1"
+    if debug_routes is None:
+        debug_routes = os.getenv("ENABLE_DEBUG_ROUTES", "0") == "1"
+
+    report = ImportReport(profile=profile_name)
+    for spec in manifest:
+        if spec.tag not in tags:
+            continue
+        include_kwargs: dict = {}
+        if spec.debug_only:
+            if not debug_routes:
+                continue
+            from backend.routes.auth_api import require_admin
+            include_kwargs["dependencies"] = [Depends(require_admin)]
+
+        if lazy and spec.lazy_prefixes:
+            app.router.routes.append(LazyRouterRoute(app, spec, include_kwargs, report))
+            continue
+
+        router, elapsed_ms = _load_router(spec)
+        report.record(spec.module, elapsed_ms)
+        app.include_router(router, **include_kwargs)
+
+    app.state.router_import_report = report
+    report.log()
+    return report
@@ -2,10 +2,19 @@ from __future__ import annotations
 
 import json
 import sqlite3
-from dataclasses import dataclass
-from typing import Iterable, List, Optional
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from db.connections import connection, get_connection
 
 from .config import get_database_path
+from .tour_stops import (
+    RollupDeltas,
+    add_rollup_delta,
+    apply_rollup_deltas,
+    classify_tour,
+    ensure_tour_stops_schema,
+)
 
 
 @dataclass
@@ -17,8 +26,32 @@ class Kunde:
     lon: Optional[float] = None
 
 
+@dataclass
+class TourRecord:
+    """Eine zu speichernde Tour (Batch-Schreibpfad insert_tours)."""
+    tour_id: str
+    datum: str
+    kunden_ids: List[int] = field(default_factory=list)
+    dauer_min: Optional[int] = None
+    distanz_km: Optional[float] = None
+    fahrer: Optional[str] = None
+
+
+# Zeilen pro Multi-Row-INSERT (4-6 Parameter je Zeile, deutlich unter dem Variablen-Limit)
+_BULK_ROWS = 200
+
+
 def _connect() -> sqlite3.Connection:
-    return sqlite3.connect(get_database_path())
+    """Gepoolte Connection (pro Thread) auf die Traffic-DB, Pragmas über db.connections."""
+    return get_connection(get_database_path())
+
+
+def transaction():
+    """
+    Eine Transaktion auf der gepoolten Connection: commit bei Erfolg, rollback bei Fehler.
+    Verschachtelte Aufrufe laufen in der äußeren Transaktion mit.
+    """
+    return connection(get_database_path())
 
 
 def _ensure_geocache_columns(conn: sqlite3.Connection) -> None:
@@ -28,7 +61,6 @@ def _ensure_geocache_columns(conn: sqlite3.Connection) -> None:
         conn.execute("ALTER TABLE geocache ADD COLUMN provider TEXT")
     if "updated_at" not in columns:
         conn.execute("ALTER TABLE geocache ADD COLUMN updated_at TEXT DEFAULT (datetime('now'))")
-    conn.commit()
 
 
 def get_db_session():
@@ -46,32 +78,92 @@ def _normalize_string(s: str) -> str:
     s = ' '.join(s.split())
     return s
 
+def _chunks(rows: Sequence, size: int = _BULK_ROWS) -> Iterator[Sequence]:
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
 def upsert_kunden(kunden: Iterable[Kunde]) -> List[int]:
-    ids: List[int] = []
-    with _connect() as conn:
-        for k in kunden:
-            k.name = _normalize_string(k.name)
-            k.adresse = _normalize_string(k.adresse)
-            # Versuche insert, bei Duplikat (unique name+adresse) vorhandene ID suchen
-            try:
-                cur = conn.execute(
-                    "INSERT INTO kunden (name, adresse, lat, lon) VALUES (?, ?, ?, ?) ON CONFLICT(name, adresse) DO UPDATE SET lat=excluded.lat, lon=excluded.lon",
-                    (k.name, k.adresse, k.lat, k.lon),
-                )
-                ids.append(int(cur.lastrowid))
-            except sqlite3.IntegrityError:
-                cur = conn.execute(
-                    "SELECT id FROM kunden WHERE name = ? AND adresse = ?",
-                    (k.name, k.adresse),
+    """
+    Legt Kunden an bzw. aktualisiert lat/lon (Schlüssel: name + adresse, normalisiert).
+
+    Alle Zeilen werden in EINER Transaktion per Multi-Row-INSERT ... ON CONFLICT
+    ... RETURNING geschrieben; die IDs kommen direkt aus RETURNING (auch für
+    bereits vorhandene Kunden, kein lastrowid/SELECT pro Zeile).
+
+    Returns:
+        Kunden-IDs in Eingabe-Reihenfolge (Duplikate erhalten dieselbe ID)
+    """
+    keys: List[Tuple[str, str]] = []
+    latest: Dict[Tuple[str, str], Kunde] = {}
+    for k in kunden:
+        k.name = _normalize_string(k.name)
+        k.adresse = _normalize_string(k.adresse)
+        key = (k.name, k.adresse)
+        keys.append(key)
+        latest[key] = k  # letzte Angabe gewinnt (wie beim zeilenweisen Upsert)
+    if not keys:
+        return []
+
+    ids: Dict[Tuple[str, str], int] = {}
+    rows = list(latest.values())
+    with transaction() as conn:
+        for chunk in _chunks(rows):
+            values = ", ".join(["(?, ?, ?, ?)"] * len(chunk))
+            params = [v for k in chunk for v in (k.name, k.adresse, k.lat, k.lon)]
+            cur = conn.execute(
+                f"INSERT INTO kunden (name, adresse, lat, lon) VALUES {values} "
+                "ON CONFLICT(name COLLATE NOCASE, adresse COLLATE NOCASE) "
+                "DO UPDATE SET lat=excluded.lat, lon=excluded.lon "
+                "RETURNING id, name, adresse",
+                params,
+            )
+            for row_id, name, adresse in cur.fetchall():
+                ids[(name.lower(), adresse.lower())] = int(row_id)
+    return [ids[(name.lower(), adresse.lower())] for name, adresse in keys]
+
+
+def upsert_kunden_by_name(kunden: Iterable[Kunde]) -> int:
+    """
+    Pflegt Kunden-Stammdaten nach Namen (case-insensitiv): vorhandene Kunden
+    erhalten Adresse und Koordinaten, unbekannte werden angelegt.
+
+    Ein Lookup, ein UPDATE- und ein INSERT-Batch in einer Transaktion.
+
+    Returns:
+        Anzahl geschriebener (aktualisierter + neuer) Kunden
+    """
+    latest: Dict[str, Kunde] = {}
+    for k in kunden:
+        name = (k.name or "").strip()
+        if name and k.adresse:
+            latest[name.lower()] = Kunde(id=None, name=name, adresse=k.adresse, lat=k.lat, lon=k.lon)
+    if not latest:
+        return 0
+
+    lowered = list(latest)
+    with transaction() as conn:
+        existing: Set[str] = set()
+        for chunk in _chunks(lowered, 500):
+            placeholders = ",".join(["?"] * len(chunk))
+            existing.update(
+                row[0] for row in conn.execute(
+                    f"SELECT DISTINCT LOWER(name) FROM kunden WHERE LOWER(name) IN ({placeholders})", chunk
                 )
-                row = cur.fetchone()
-                if row is not None:
-                    ids.append(int(row[0]))
-        conn.commit()
-    return ids
+            )
+        conn.executemany(
+            "UPDATE kunden SET adresse=?, lat=?, lon=? WHERE LOWER(name)=?",
+            [(latest[n].adresse, latest[n].lat, latest[n].lon, n) for n in lowered if n in existing],
+        )
+        conn.executemany(
+            "INSERT INTO kunden (name, adresse, lat, lon) VALUES (?, ?, ?, ?)",
+            [(latest[n].name, latest[n].adresse, latest[n].lat, latest[n].lon) for n in lowered if n not in existing],
+        )
+    return len(latest)
+
 
 def get_kunde_id_by_name_adresse(name: str, adresse: str) -> Optional[int]:
-    with _connect() as conn:
+    with transaction() as conn:
         cur = conn.execute(
             "SELECT id FROM kunden WHERE name = ? COLLATE NOCASE AND adresse = ? COLLATE NOCASE",
             (_normalize_string(name), _normalize_string(adresse))
@@ -80,7 +172,7 @@ def get_kunde_id_by_name_adresse(name: str, adresse: str) -> Optional[int]:
         return row[0] if row else None
 
 def get_kunde_by_id(kunde_id: int) -> Optional[Kunde]:
-    with _connect() as conn:
+    with transaction() as conn:
         cur = conn.execute("SELECT id, name, adresse, lat, lon FROM kunden WHERE id = ?", (kunde_id,))
         row = cur.fetchone()
         if row:
@@ -91,13 +183,73 @@ def get_customers_by_ids(customer_ids: List[int]) -> List[Kunde]:
     if not customer_ids:
         return []
     placeholders = ",".join(["?"] * len(customer_ids))
-    with _connect() as conn:
+    with transaction() as conn:
         cur = conn.execute(
             f"SELECT id, name, adresse, lat, lon FROM kunden WHERE id IN ({placeholders})",
             tuple(customer_ids)
         )
         return [Kunde(id=row[0], name=row[1], adresse=row[2], lat=row[3], lon=row[4]) for row in cur.fetchall()]
 
+def insert_tours(tours: Iterable[TourRecord], skip_existing: bool = False) -> List[Optional[int]]:
+    """
+    Speichert mehrere Touren inkl. normalisierter Stopps (tour_stops) und
+    Rollup-Deltas in EINER Transaktion.
+
+    Args:
+        tours: Zu speichernde Touren
+        skip_existing: True = bereits vorhandene (tour_id, datum) überspringen,
+            False = IntegrityError wie beim Einzel-Insert
+
+    Returns:
+        touren.id je Eingabe-Tour (None für übersprungene)
+    """
+    records = list(tours)
+    if not records:
+        return []
+
+    conflict = " ON CONFLICT(tour_id, datum) DO NOTHING" if skip_existing else ""
+    row_ids: Dict[Tuple[str, str], int] = {}
+    with transaction() as conn:
+        ensure_tour_stops_schema(conn)
+        for chunk in _chunks(records, 100):
+            values = ", ".join(["(?, ?, ?, ?, ?, ?, ?, ?, ?)"] * len(chunk))
+            params: List = []
+            for t in chunk:
+                ids = list(t.kunden_ids)
+                tour_type, sector = classify_tour(t.tour_id)
+                params += [t.tour_id, t.datum, json.dumps(ids), t.dauer_min, t.distanz_km, t.fahrer,
+                           len(ids), tour_type, sector]
+            cur = conn.execute(
+                "INSERT INTO touren (tour_id, datum, kunden_ids, dauer_min, distanz_km, fahrer, stops_count, tour_type, sector) "
+                f"VALUES {values}{conflict} RETURNING id, tour_id, datum",
+                params,
+            )
+            for row_id, tour_id, datum in cur.fetchall():
+                row_ids[(tour_id, datum)] = int(row_id)
+
+        deltas: RollupDeltas = {}
+        stops = []
+        written: Set[int] = set()
+        for t in records:
+            row_id = row_ids.get((t.tour_id, t.datum))
+            if row_id is None or row_id in written:
+                continue
+            written.add(row_id)
+            ids = list(t.kunden_ids)
+            tour_type, sector = classify_tour(t.tour_id)
+            stops += [(row_id, t.tour_id, t.datum, pos, kunde_id) for pos, kunde_id in enumerate(ids, 1)]
+            add_rollup_delta(deltas, t.datum, tour_type, sector, 1, len(ids), t.distanz_km, t.dauer_min)
+        conn.executemany(
+            "INSERT INTO tour_stops (tour_row_id, tour_id, datum, position, kunde_id) VALUES (?, ?, ?, ?, ?)",
+            stops,
+        )
+        apply_rollup_deltas(conn, deltas)
+    result: List[Optional[int]] = []
+    for t in records:  # Duplikate innerhalb des Batches: nur das erste Vorkommen erhält die ID
+        result.append(row_ids.pop((t.tour_id, t.datum), None))
+    return result
+
+
 def insert_tour(
     tour_id: str,
     datum: str,
@@ -106,14 +258,39 @@ def insert_tour(
     distanz_km: Optional[float] = None,
     fahrer: Optional[str] = None,
 ) -> int:
-    kunden_ids_json = json.dumps(list(kunden_ids))
-    with _connect() as conn:
-        cur = conn.execute(
-            "INSERT INTO touren (tour_id, datum, kunden_ids, dauer_min, distanz_km, fahrer) VALUES (?, ?, ?, ?, ?, ?)",
-            (tour_id, datum, kunden_ids_json, dauer_min, distanz_km, fahrer),
-        )
-        conn.commit()
-        return int(cur.lastrowid)
+    """
+    Speichert eine Tour inkl. normalisierter Stopps (tour_stops) und Rollup-Deltas
+    in einer Transaktion.
+    """
+    record = TourRecord(tour_id, datum, list(kunden_ids), dauer_min, distanz_km, fahrer)
+    return insert_tours([record])[0]
+
+
+def delete_tours_by_prefix(conn: sqlite3.Connection, prefix: str, datum: str) -> int:
+    """
+    Löscht Touren (tour_id LIKE prefix%) eines Datums inkl. Stopps und zieht sie aus den Rollups ab.
+    Committet nicht (Transaktion des Aufrufers).
+
+    Returns:
+        Anzahl gelöschter Touren
+    """
+    ensure_tour_stops_schema(conn)
+    rows = conn.execute(
+        "SELECT id, datum, tour_type, sector, stops_count, distanz_km, COALESCE(gesamtzeit_min, dauer_min) "
+        "FROM touren WHERE tour_id LIKE ? AND datum = ?",
+        (f"{prefix}%", datum),
+    ).fetchall()
+    if not rows:
+        return 0
+    deltas: RollupDeltas = {}
+    for _, day, tour_type, sector, stops_count, km, minutes in rows:
+        if stops_count is not None:  # nur bereits in den Rollups gezählte Touren abziehen
+            add_rollup_delta(deltas, day, tour_type, sector, -1, -stops_count, -(km or 0.0), -(minutes or 0.0))
+    row_ids = [(row[0],) for row in rows]
+    conn.executemany("DELETE FROM tour_stops WHERE tour_row_id = ?", row_ids)
+    conn.executemany("DELETE FROM touren WHERE id = ?", row_ids)
+    apply_rollup_deltas(conn, deltas)
+    return len(rows)
 
 
 def update_tour_route_data(
@@ -134,24 +311,19 @@ def update_tour_route_data(
     Returns:
         True wenn Tour aktualisiert wurde, False wenn Tour nicht gefunden wurde
     """
-    with _connect() as conn:
-        # Stelle sicher, dass gesamtzeit_min Spalte existiert
-        cur = conn.execute("PRAGMA table_info(touren)")
-        columns = {row[1] for row in cur.fetchall()}
-        if "gesamtzeit_min" not in columns:
-            try:
-                conn.execute("ALTER TABLE touren ADD COLUMN gesamtzeit_min INTEGER")
-                conn.commit()
-            except sqlite3.OperationalError:
-                pass  # Spalte existiert bereits oder Fehler
+    with transaction() as conn:
+        # Stellt u.a. sicher, dass gesamtzeit_min existiert
+        ensure_tour_stops_schema(conn)
         
-        # Prüfe ob Tour existiert
-        cur = conn.execute(
-            "SELECT id FROM touren WHERE tour_id = ? AND datum = ?",
+        # Prüfe ob Tour existiert (alte Werte für die Rollup-Deltas)
+        row = conn.execute(
+            "SELECT tour_type, sector, stops_count, distanz_km, COALESCE(gesamtzeit_min, dauer_min) "
+            "FROM touren WHERE tour_id = ? AND datum = ?",
             (tour_id, datum)
-        )
-        if not cur.fetchone():
+        ).fetchone()
+        if not row:
             return False
+        tour_type, sector, stops_count, old_km, old_minutes = row
         
         # Erstelle UPDATE-Statement nur mit vorhandenen Werten
         updates = []
@@ -174,12 +346,18 @@ def update_tour_route_data(
             f"UPDATE touren SET {', '.join(updates)} WHERE tour_id = ? AND datum = ?",
             params
         )
-        conn.commit()
+        if stops_count is not None:  # Tour ist bereits in den Rollups gezählt
+            new_km = distanz_km if distanz_km is not None else old_km
+            new_minutes = gesamtzeit_min if gesamtzeit_min is not None else old_minutes
+            deltas: RollupDeltas = {}
+            add_rollup_delta(deltas, datum, tour_type, sector, 0, 0,
+                             (new_km or 0.0) - (old_km or 0.0), (new_minutes or 0.0) - (old_minutes or 0.0))
+            apply_rollup_deltas(conn, deltas)
         return True
 
 
 def geocache_get(adresse: str) -> Optional[tuple[float, float, Optional[str]]]:
-    with _connect() as conn:
+    with transaction() as conn:
         _ensure_geocache_columns(conn)
         cur = conn.execute(
             "SELECT lat, lon, provider FROM geocache WHERE adresse = ?", (adresse,)
@@ -191,7 +369,7 @@ def geocache_get(adresse: str) -> Optional[tuple[float, float, Optional[str]]]:
 
 
 def geocache_set(adresse: str, lat: float, lon: float, provider: Optional[str]) -> None:
-    with _connect() as conn:
+    with transaction() as conn:
         _ensure_geocache_columns(conn)
         conn.execute(
             """
@@ -205,11 +383,30 @@ def geocache_set(adresse: str, lat: float, lon: float, provider: Optional[str])
             """,
             (adresse, lat, lon, provider),
         )
-        conn.commit()
+
+
+def geocache_get_many(adressen: Iterable[str]) -> Dict[str, Tuple[float, float, Optional[str]]]:
+    """Batch-Variante von geocache_get (gechunkte IN-Abfragen, nur Einträge mit Koordinaten)."""
+    keys = list(dict.fromkeys(a for a in adressen if a))
+    found: Dict[str, Tuple[float, float, Optional[str]]] = {}
+    if not keys:
+        return found
+    with transaction() as conn:
+        _ensure_geocache_columns(conn)
+        for chunk in _chunks(keys, 500):
+            placeholders = ",".join("?" * len(chunk))
+            cur = conn.execute(
+                f"SELECT adresse, lat, lon, provider FROM geocache WHERE adresse IN ({placeholders})",
+                tuple(chunk),
+            )
+            for adresse, lat, lon, provider in cur.fetchall():
+                if lat is not None and lon is not None:
+                    found[adresse] = (float(lat), float(lon), provider)
+    return found
 
 
 def postal_cache_get(postal_code: str) -> Optional[str]:
-    with _connect() as conn:
+    with transaction() as conn:
         cur = conn.execute(
             "SELECT city FROM postal_code_cache WHERE postal_code = ?", (postal_code,)
         )
@@ -219,9 +416,8 @@ def postal_cache_get(postal_code: str) -> Optional[str]:
         return None
 
 def postal_cache_set(postal_code: str, city: str) -> None:
-    with _connect() as conn:
+    with transaction() as conn:
         conn.execute(
             "INSERT INTO postal_code_cache (postal_code, city) VALUES (?, ?) ON CONFLICT(postal_code) DO UPDATE SET city=excluded.city, updated_at=datetime('now')",
             (postal_code, city),
         )
-        conn.commit()
\ No newline at end of file
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-import sqlite3
 from typing import Iterable
 
+from db.connections import connection
+
 from .config import get_database_path
+from .tour_stops import ensure_tour_stops_schema, sync_tour_stops
 
 from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Date
 from sqlalchemy.ext.declarative import declarative_base
@@ -189,7 +191,11 @@ DDL_STATEMENTS: Iterable[str] = (
 
 def init_db() -> None:
     db_path = get_database_path()
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         for ddl in DDL_STATEMENTS:
             conn.execute(ddl)
-        conn.commit()
+        # tour_stops + Rollups; Backfill aller noch nicht normalisierten Touren
+        ensure_tour_stops_schema(conn)
+        synced = sync_tour_stops(conn)
+    if synced:
+        print(f"[DB] tour_stops/Rollups für {synced} Touren nachgezogen")
@@ -0,0 +1,265 @@
+"""
+Normalisierte Tour-Stopps und inkrementelle Tour-Rollups.
+
+touren.kunden_ids bleibt als JSON-Spalte erhalten (Kompatibilität). Zusätzlich
+schreibt der DAO-Write-Pfad pro Tour:
+- eine Zeile je Stopp in tour_stops (tour_row_id -> touren.id, Position, kunde_id)
+- stops_count, tour_type und sector direkt in touren
+- Deltas in tour_rollup_daily / tour_rollup_monthly (pro Tour-Typ und Sektor)
+
+Invariante: Die Rollups enthalten genau die touren-Zeilen mit stops_count IS NOT NULL.
+Zeilen, die an der DAO vorbei geschrieben wurden (stops_count IS NULL), holt
+sync_tour_stops() inkrementell nach (Backfill-Migration, nach Importen).
+
+Alle Funktionen arbeiten auf einer sqlite3-Connection und committen NICHT selbst.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+TOUR_STOPS_DDL: Sequence[str] = (
+    """
+    CREATE TABLE IF NOT EXISTS tour_stops (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tour_row_id INTEGER NOT NULL REFERENCES touren(id) ON DELETE CASCADE,
+        tour_id TEXT NOT NULL,
+        datum TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        kunde_id INTEGER
+    );
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_tour_stops_row_position ON tour_stops(tour_row_id, position);",
+    # Covering-Index für Datums-/Tour-Abfragen inkl. Join auf kunden
+    "CREATE INDEX IF NOT EXISTS idx_tour_stops_datum_tour ON tour_stops(datum, tour_id, kunde_id);",
+    "CREATE INDEX IF NOT EXISTS idx_tour_stops_kunde ON tour_stops(kunde_id);",
+    """
+    CREATE TABLE IF NOT EXISTS tour_rollup_daily (
+        datum TEXT NOT NULL,
+        tour_type TEXT NOT NULL DEFAULT '',
+        sector TEXT NOT NULL DEFAULT '',
+        tours INTEGER NOT NULL DEFAULT 0,
+        stops INTEGER NOT NULL DEFAULT 0,
+        distanz_km REAL NOT NULL DEFAULT 0,
+        zeit_min REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (datum, tour_type, sector)
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS tour_rollup_monthly (
+        monat TEXT NOT NULL,
+        tour_type TEXT NOT NULL DEFAULT '',
+        sector TEXT NOT NULL DEFAULT '',
+        tours INTEGER NOT NULL DEFAULT 0,
+        stops INTEGER NOT NULL DEFAULT 0,
+        distanz_km REAL NOT NULL DEFAULT 0,
+        zeit_min REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (monat, tour_type, sector)
+    );
+    """,
+)
+
+# Spalten, die touren für den normalisierten Write-Pfad braucht
+_TOUREN_COLUMNS = {
+    "gesamtzeit_min": "INTEGER",
+    "stops_count": "INTEGER",
+    "tour_type": "TEXT",
+    "sector": "TEXT",
+}
+
+_TOUREN_INDEXES: Sequence[str] = (
+    # Covering-Index für KPI-Aggregate pro Datum (Anzahl, Stopps, km)
+    "CREATE INDEX IF NOT EXISTS idx_touren_datum_tour ON touren(datum, tour_id, stops_count, distanz_km);",
+    # Noch nicht normalisierte Zeilen (Backfill/Sync)
+    "CREATE INDEX IF NOT EXISTS idx_touren_stops_pending ON touren(id) WHERE stops_count IS NULL;",
+)
+
+_ROLLUP_SQL = {
+    table: f"""
+        INSERT INTO {table} ({key}, tour_type, sector, tours, stops, distanz_km, zeit_min)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT({key}, tour_type, sector) DO UPDATE SET
+            tours = tours + excluded.tours,
+            stops = stops + excluded.stops,
+            distanz_km = distanz_km + excluded.distanz_km,
+            zeit_min = zeit_min + excluded.zeit_min
+    """
+    for table, key in (("tour_rollup_daily", "datum"), ("tour_rollup_monthly", "monat"))
+}
+
+# Rollup-Schlüssel: (datum, tour_type, sector) -> [tours, stops, km, minuten]
+RollupDeltas = Dict[Tuple[str, str, str], List[float]]
+
+_ready_dbs: Set[str] = set()
+
+
+def classify_tour(tour_id: str) -> Tuple[str, str]:
+    """
+    Leitet Tour-Typ und Sektor aus der Tour-ID ab.
+
+    Returns:
+        (tour_type, sector) – leere Strings, wenn nicht erkennbar
+    """
+    tour_id = tour_id or ""
+
+    sector = ""
+    if "Nord" in tour_id or "N-" in tour_id:
+        sector = "N"
+    elif "Ost" in tour_id or "O-" in tour_id:
+        sector = "O"
+    elif "Süd" in tour_id or "S-" in tour_id:
+        sector = "S"
+    elif "West" in tour_id or "W-" in tour_id:
+        sector = "W"
+
+    tour_type = ""
+    if tour_id.startswith("W-") or "W-" in tour_id:
+        tour_type = "W"
+    elif "PIR" in tour_id.upper():
+        tour_type = "PIR"
+    elif tour_id.startswith("T-") or "T-" in tour_id:
+        tour_type = "T"
+
+    return tour_type, sector
+
+
+def parse_kunden_ids(raw: Optional[str]) -> List:
+    """kunden_ids aus JSON (Standard) oder Komma-Liste (Altbestand)."""
+    if not raw:
+        return []
+    try:
+        ids = json.loads(raw)
+        return ids if isinstance(ids, list) else []
+    except (json.JSONDecodeError, TypeError):
+        return [part.strip() for part in str(raw).split(",")]
+
+
+def stops_count_expr(columns: Iterable[str], prefix: str = "") -> str:
+    """
+    SQL-Ausdruck für die Stopp-Anzahl einer touren-Zeile.
+
+    Nutzt stops_count (DAO-Write-Pfad) und fällt für noch nicht normalisierte
+    Zeilen in SQL auf kunden_ids zurück (JSON-Array bzw. Komma-Liste).
+    """
+    k = f"{prefix}kunden_ids"
+    from_json = (
+        f"CASE WHEN {k} IS NULL OR {k} = '' THEN 0 "
+        f"WHEN json_valid({k}) THEN json_array_length({k}) "
+        f"ELSE length({k}) - length(replace({k}, ',', '')) + 1 END"
+    )
+    if "stops_count" in set(columns):
+        return f"COALESCE({prefix}stops_count, {from_json})"
+    return from_json
+
+
+def ensure_tour_stops_schema(conn: sqlite3.Connection) -> bool:
+    """
+    Legt tour_stops, Rollup-Tabellen, touren-Zusatzspalten und Indizes an (einmal pro DB-Datei).
+
+    Returns:
+        True, wenn die touren-Tabelle existiert (Sync/Write-Pfad möglich)
+    """
+    db_file = conn.execute("PRAGMA database_list").fetchone()[2]
+    if db_file and db_file in _ready_dbs:
+        return True
+
+    for ddl in TOUR_STOPS_DDL:
+        conn.execute(ddl)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(touren)").fetchall()}
+    if columns:
+        for column, col_type in _TOUREN_COLUMNS.items():
+            if column not in columns:
+                conn.execute(f"ALTER TABLE touren ADD COLUMN {column} {col_type}")
+        for ddl in _TOUREN_INDEXES:
+            conn.execute(ddl)
+
+    if db_file and columns:
+        _ready_dbs.add(db_file)
+    return bool(columns)
+
+
+def add_rollup_delta(deltas: RollupDeltas, datum: str, tour_type: str, sector: str,
+                     tours: int, stops: int, km: Optional[float], minutes: Optional[float]) -> None:
+    """Sammelt ein Rollup-Delta (mehrere Touren desselben Tages/Typs werden zusammengefasst)."""
+    acc = deltas.setdefault((datum or "", tour_type or "", sector or ""), [0, 0, 0.0, 0.0])
+    acc[0] += tours
+    acc[1] += stops
+    acc[2] += km or 0.0
+    acc[3] += minutes or 0.0
+
+
+def apply_rollup_deltas(conn: sqlite3.Connection, deltas: RollupDeltas) -> None:
+    """Schreibt gesammelte Deltas per executemany in die Tages- und Monats-Rollups."""
+    if not deltas:
+        return
+    daily = [(d, t, s, *values) for (d, t, s), values in deltas.items()]
+    monthly_deltas: RollupDeltas = {}
+    for (d, t, s), values in deltas.items():
+        acc = monthly_deltas.setdefault((d[:7], t, s), [0, 0, 0.0, 0.0])
+        for i, value in enumerate(values):
+            acc[i] += value
+    monthly = [(m, t, s, *values) for (m, t, s), values in monthly_deltas.items()]
+    conn.executemany(_ROLLUP_SQL["tour_rollup_daily"], daily)
+    conn.executemany(_ROLLUP_SQL["tour_rollup_monthly"], monthly)
+
+
+def write_tour_stops(conn: sqlite3.Connection, tour_row_id: int, tour_id: str, datum: str,
+                     kunden_ids: Sequence) -> None:
+    """Schreibt die Stopps einer Tour (ersetzt vorhandene Stopps dieser touren-Zeile)."""
+    conn.execute("DELETE FROM tour_stops WHERE tour_row_id = ?", (tour_row_id,))
+    conn.executemany(
+        "INSERT INTO tour_stops (tour_row_id, tour_id, datum, position, kunde_id) VALUES (?, ?, ?, ?, ?)",
+        [(tour_row_id, tour_id, datum, pos, kunde_id) for pos, kunde_id in enumerate(kunden_ids, 1)],
+    )
+
+
+def sync_tour_stops(conn: sqlite3.Connection, batch_size: int = 1000) -> int:
+    """
+    Normalisiert alle touren-Zeilen ohne stops_count (Backfill, inkrementell).
+
+    Args:
+        conn: sqlite3-Connection (Schema muss existieren)
+        batch_size: Zeilen pro Durchlauf
+
+    Returns:
+        Anzahl nachgezogener Touren
+    """
+    total = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, tour_id, datum, kunden_ids, distanz_km, COALESCE(gesamtzeit_min, dauer_min) "
+            "FROM touren WHERE stops_count IS NULL LIMIT ?",
+            (batch_size,),
+        ).fetchall()
+        if not rows:
+            return total
+
+        deltas: RollupDeltas = {}
+        updates = []
+        for row_id, tour_id, datum, kunden_ids, distanz_km, minutes in rows:
+            ids = parse_kunden_ids(kunden_ids)
+            tour_type, sector = classify_tour(tour_id)
+            write_tour_stops(conn, row_id, tour_id, datum, ids)
+            updates.append((len(ids), tour_type, sector, row_id))
+            add_rollup_delta(deltas, datum, tour_type, sector, 1, len(ids), distanz_km, minutes)
+
+        conn.executemany("UPDATE touren SET stops_count = ?, tour_type = ?, sector = ? WHERE id = ?", updates)
+        apply_rollup_deltas(conn, deltas)
+        total += len(rows)
+
+
+def sync_tour_stops_engine(engine) -> int:
+    """
+    sync_tour_stops() über eine SQLAlchemy-Engine (für Schreiber außerhalb der DAO).
+
+    Returns:
+        Anzahl nachgezogener Touren (0 bei Nicht-SQLite-Engines)
+    """
+    if engine.dialect.name != "sqlite":
+        return 0
+    with engine.begin() as conn:
+        raw = conn.connection.driver_connection
+        if not ensure_tour_stops_schema(raw):
+            return 0
+        return sync_tour_stops(raw)
@@ -1,15 +1,33 @@
 """
 Error-Tally-Middleware: Zählt 4xx und 5xx HTTP-Status-Codes.
+
+Die Zähler liegen in der Telemetrie-Registry (http.4xx/http.5xx) plus einem
+5-Minuten-Fenster für die aktuelle Fehlerrate.
 """
 from starlette.requests import Request
 from starlette.responses import Response, JSONResponse
 from typing import Dict
 import logging
 
+from backend.services.telemetry import get_registry
+
 logger = logging.getLogger(__name__)
 
-# Globale Metriken (Thread-safe für FastAPI)
-METRICS: Dict[str, int] = {"http_4xx": 0, "http_5xx": 0}
+# Globale Metriken (Thread-safe, begrenzt)
+_registry = get_registry()
+METRICS = {
+    "http_4xx": _registry.counter("http.4xx"),
+    "http_5xx": _registry.counter("http.5xx"),
+}
+_ERRORS_5M = {
+    "http_4xx": _registry.window("http.4xx.5m", window_s=300, slots=60),
+    "http_5xx": _registry.window("http.5xx.5m", window_s=300, slots=60),
+}
+
+
+def _tally(key: str) -> None:
+    METRICS[key].inc()
+    _ERRORS_5M[key].observe()
 
 
 async def error_tally(request: Request, call_next):
@@ -28,16 +46,16 @@ async def error_tally(request: Request, call_next):
         
         # Zähle Status-Codes
         if 400 <= resp.status_code < 500:
-            METRICS["http_4xx"] += 1
+            _tally("http_4xx")
             logger.debug(f"4xx Error: {resp.status_code} for {request.url.path}")
         elif 500 <= resp.status_code < 600:
-            METRICS["http_5xx"] += 1
+            _tally("http_5xx")
             logger.warning(f"5xx Error: {resp.status_code} for {request.url.path}")
         
         return resp
     except Exception as e:
         # Uncaught Exception -> 500
-        METRICS["http_5xx"] += 1
+        _tally("http_5xx")
         logger.error(f"Uncaught exception in error_tally: {e}", exc_info=True)
         return JSONResponse({"detail": "internal", "error": "internal_server_error"}, status_code=500)
 
@@ -49,11 +67,12 @@ def get_metrics() -> Dict[str, int]:
     Returns:
         Dict mit http_4xx und http_5xx Zählern
     """
-    return METRICS.copy()
+    return {key: counter.value for key, counter in METRICS.items()}
 
 
 def reset_metrics() -> None:
     """Setzt Metriken zurück (für Tests)."""
-    METRICS["http_4xx"] = 0
-    METRICS["http_5xx"] = 0
+    for key in METRICS:
+        METRICS[key].reset()
+        _ERRORS_5M[key].reset()
 
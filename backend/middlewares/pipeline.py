@@ -0,0 +1,196 @@
+"""
+Request-Pipeline als eine reine ASGI-Middleware.
+
+Ersetzt die Kette aus BaseHTTPMiddleware-Schichten (RequestIdMiddleware,
+TraceIDMiddleware, RateLimitMiddleware, SecurityHeadersMiddleware, error_tally).
+Jede dieser Schichten kostete pro Request einen eigenen Task plus Stream-Kopie
+der Antwort und brach StreamingResponses (SSE/NDJSON). Die Pipeline arbeitet
+direkt auf den ASGI-Nachrichten: Header werden beim "http.response.start"
+ergänzt, der Body wird unverändert durchgereicht.
+
+Stufen (einzeln abschaltbar, Reihenfolge fest):
+- request_id:       X-Request-ID (vom Client oder neu), request.state.trace_id
+- tracing:          Request-Trace mit Stufen-Spans, Server-Timing auf Wunsch
+- rate_limit:       Login-Rate-Limit (SC-04), 429 ohne Handler-Aufruf
+- security_headers: CSP, X-Frame-Options, ... (SC-11)
+- error_tally:      4xx/5xx-Zähler; unbehandelte Exceptions -> strukturierte 500
+- success_stats:    2xx pro Route-Template (gebündelter Flush)
+- access_log:       strukturierte Log-Zeile pro Request
+"""
+from __future__ import annotations
+
+import logging
+import os
+import time
+import uuid
+from typing import Iterable, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.services.request_tracing import REQUEST_STAGE, get_tracer, server_timing_header
+from backend.services.success_stats import get_success_aggregator, should_record
+from backend.utils.log_pipeline import log_route
+
+logger = logging.getLogger(__name__)
+
+# Server-Timing-Header für alle Requests (sonst nur mit "X-Server-Timing: 1")
+SERVER_TIMING_ALWAYS = os.getenv("TRACE_SERVER_TIMING", "0") == "1"
+
+LOGIN_PATH = "/api/auth/login"
+
+ALL_STAGES: Tuple[str, ...] = (
+    "request_id", "tracing", "rate_limit", "security_headers", "error_tally", "success_stats", "access_log",
+)
+
+
+def route_template(scope: Scope) -> str:
+    """Route-Template (z.B. "/api/tour/{tour_id}") statt konkretem Pfad – begrenzt die Label-Anzahl."""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path or "unmatched"
+
+
+class RequestPipelineMiddleware:
+    """
+    Reine ASGI-Middleware mit allen Querschnitts-Stufen in einem Durchlauf.
+
+    Args:
+        app: Nächste ASGI-App
+        stages: Aktive Stufen (Standard: alle, siehe ALL_STAGES)
+    """
+
+    def __init__(self, app: ASGIApp, stages: Iterable[str] = ALL_STAGES) -> None:
+        self.app = app
+        self.stages = frozenset(stages)
+        unknown = self.stages - set(ALL_STAGES)
+        if unknown:
+            raise ValueError(f"Unbekannte Pipeline-Stufen: {sorted(unknown)}")
+        # Stufen-Implementierungen erst hier importieren (Legacy-Module importieren diese Klasse)
+        from backend.middlewares import error_tally, rate_limit, security_headers
+        self._rate_limit = rate_limit
+        self._tally = error_tally._tally
+        self._security_headers: List[Tuple[str, str]] = (
+            security_headers.security_header_items() if "security_headers" in self.stages else []
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stages = self.stages
+        path = scope["path"]
+        method = scope["method"]
+        start_time = time.time()
+        start = time.perf_counter()
+        request_headers = Headers(scope=scope)
+
+        trace_id = request_headers.get("x-request-id") or str(uuid.uuid4())[:8]
+        state = scope.setdefault("state", {})
+        state["trace_id"] = trace_id
+        state["request_start_time"] = start_time
+
+        tracer = get_tracer() if "tracing" in stages else None
+        trace_token = tracer.start_trace(trace_id, path) if tracer else None
+        want_timing = SERVER_TIMING_ALWAYS or request_headers.get("x-server-timing") == "1"
+
+        # Login-Rate-Limit (SC-04)
+        login_remaining: Optional[int] = None
+        client_ip = scope["client"][0] if scope.get("client") else "unknown"
+        limits = self._rate_limit.LOGIN_RATE_LIMIT
+        if "rate_limit" in stages and path == LOGIN_PATH and method == "POST":
+            allowed, login_remaining = self._rate_limit.check_rate_limit(
+                client_ip, limits["max_attempts"], limits["window_minutes"]
+            )
+            if not allowed:
+                logger.warning(f"Rate-Limit überschritten für IP {client_ip}")
+                detail = (f"Zu viele Login-Versuche. Bitte versuchen Sie es in "
+                          f"{limits['window_minutes']} Minuten erneut.")
+                app: ASGIApp = JSONResponse(
+                    {"error": "HTTPException", "detail": detail, "request_id": trace_id, "trace_id": trace_id},
+                    status_code=429,
+                )
+            else:
+                app = self.app
+        else:
+            app = self.app
+
+        status_code = 500
+        duration_ms = 0.0
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, duration_ms, response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                status_code = message["status"]
+                duration_ms = (time.perf_counter() - start) * 1000
+                message.setdefault("headers", [])
+                headers = MutableHeaders(scope=message)
+
+                if tracer is not None:
+                    tracer.record(REQUEST_STAGE, duration_ms, started_at=start_time)
+                    trace = tracer.current_trace()
+                    if trace is not None and want_timing:
+                        headers["Server-Timing"] = server_timing_header(trace, total_ms=duration_ms)
+
+                if login_remaining is not None:
+                    if status_code == 401:
+                        # Nur fehlgeschlagene Logins zählen
+                        self._rate_limit.record_attempt(client_ip)
+                        headers["X-RateLimit-Remaining"] = str(max(0, login_remaining - 1))
+                        headers["X-RateLimit-Reset"] = str(limits["window_minutes"] * 60)
+                    else:
+                        headers["X-RateLimit-Remaining"] = str(login_remaining)
+                    headers["X-RateLimit-Limit"] = str(limits["max_attempts"])
+
+                if "request_id" in stages:
+                    headers["X-Request-ID"] = trace_id
+                for key, value in self._security_headers:
+                    headers[key] = value
+
+                if "error_tally" in stages:
+                    if 400 <= status_code < 500:
+                        self._tally("http_4xx")
+                    elif status_code >= 500:
+                        self._tally("http_5xx")
+                        logger.warning(f"5xx Error: {status_code} for {path}")
+
+                if "success_stats" in stages and 200 <= status_code < 300 and should_record(path):
+                    try:
+                        get_success_aggregator().record(route_template(scope), duration_ms)
+                    except Exception as e:
+                        # Fehler beim Success-Logging darf nicht den Request killen
+                        logger.debug(f"Fehler beim Success-Logging: {e}")
+            await send(message)
+
+        try:
+            with log_route(path):
+                await app(scope, receive, send_wrapper)
+        except Exception as e:
+            if "error_tally" not in stages or response_started:
+                if tracer is not None:
+                    tracer.finish_trace(trace_token, route_template(scope), status=500)
+                raise
+            # Unbehandelte Exception -> strukturierte 500 (Header/Zähler wie jede Antwort)
+            logger.error(f"Uncaught exception in {method} {path}: {e}", exc_info=True)
+            await JSONResponse(
+                {"detail": "internal", "error": "internal_server_error", "trace_id": trace_id}, status_code=500
+            )(scope, receive, send_wrapper)
+
+        if tracer is not None:
+            tracer.finish_trace(trace_token, route_template(scope), status=status_code)
+
+        if "access_log" in stages:
+            logger.info(
+                f"{method} {path}",
+                extra={
+                    "trace_id": trace_id,
+                    "route": path,
+                    "method": method,
+                    "duration_ms": round(duration_ms, 2),
+                    "status_code": status_code,
+                },
+            )
@@ -1,12 +1,50 @@
 """
 Security-Header Middleware (SC-11).
 Setzt Security-Header für alle Responses.
+
+Die App nutzt die Header über RequestPipelineMiddleware (Stufe "security_headers");
+SecurityHeadersMiddleware bleibt für einzelne Einbindung erhalten.
 """
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
+from typing import List, Tuple
 import os
 
+
+def security_header_items() -> List[Tuple[str, str]]:
+    """Security-Header als (Name, Wert)-Paare (HSTS nur in Production)."""
+    items = [
+        # X-Frame-Options: Verhindert Clickjacking
+        ("X-Frame-Options", "DENY"),
+        # X-Content-Type-Options: Verhindert MIME-Sniffing
+        ("X-Content-Type-Options", "nosniff"),
+        # Referrer-Policy: Begrenzt Referrer-Informationen
+        ("Referrer-Policy", "no-referrer"),
+        # X-XSS-Protection: Legacy, aber für ältere Browser
+        ("X-XSS-Protection", "1; mode=block"),
+    ]
+    
+    # Content-Security-Policy: Für Admin-UI
+    # Erlaubt: Self, Inline-Scripts/Styles (für Bootstrap/jQuery), Maps/CDNs
+    csp = (
+        "default-src 'self'; "
+        "script-src 'self' 'unsafe-inline' 'unsafe-eval' https://cdn.jsdelivr.net https://unpkg.com; "
+        "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://fonts.googleapis.com; "
+        "img-src 'self' data: https: blob:; "
+        "font-src 'self' data: https://fonts.gstatic.com; "
+        "connect-src 'self' http://127.0.0.1:* https://api.openrouteservice.org https://*.tile.openstreetmap.org; "
+        "frame-src 'self' https://www.openstreetmap.org;"
+    )
+    items.append(("Content-Security-Policy", csp))
+    
+    # Strict-Transport-Security: Nur in Production mit HTTPS
+    is_production = os.getenv("APP_ENV", "development") == "production"
+    if is_production:
+        items.append(("Strict-Transport-Security", "max-age=31536000; includeSubDomains"))
+    return items
+
+
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     """
     Setzt Security-Header für alle HTTP-Responses.
@@ -15,36 +53,6 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     
     async def dispatch(self, request: Request, call_next):
         response = await call_next(request)
-        
-        # X-Frame-Options: Verhindert Clickjacking
-        response.headers["X-Frame-Options"] = "DENY"
-        
-        # X-Content-Type-Options: Verhindert MIME-Sniffing
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        
-        # Referrer-Policy: Begrenzt Referrer-Informationen
-        response.headers["Referrer-Policy"] = "no-referrer"
-        
-        # X-XSS-Protection: Legacy, aber für ältere Browser
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        
-        # Content-Security-Policy: Für Admin-UI
-        # Erlaubt: Self, Inline-Scripts/Styles (für Bootstrap/jQuery), Maps/CDNs
-        csp = (
-            "default-src 'self'; "
-            "script-src 'self' 'unsafe-inline' 'unsafe-eval' https://cdn.jsdelivr.net https://unpkg.com; "
-            "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://fonts.googleapis.com; "
-            "img-src 'self' data: https: blob:; "
-            "font-src 'self' data: https://fonts.gstatic.com; "
-            "connect-src 'self' http://127.0.0.1:* https://api.openrouteservice.org https://*.tile.openstreetmap.org; "
-            "frame-src 'self' https://www.openstreetmap.org;"
-        )
-        response.headers["Content-Security-Policy"] = csp
-        
-        # Strict-Transport-Security: Nur in Production mit HTTPS
-        is_production = os.getenv("APP_ENV", "development") == "production"
-        if is_production:
-            response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        
+        for key, value in security_header_items():
+            response.headers[key] = value
         return response
-
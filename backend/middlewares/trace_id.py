@@ -2,7 +2,12 @@
 Trace-ID Middleware
 Setzt X-Request-ID Header für Request-Tracing.
 Erweitert: Latenz-Messung und strukturiertes Logging.
+
+Die App nutzt RequestPipelineMiddleware (backend/middlewares/pipeline.py), die
+diese Stufen ohne BaseHTTPMiddleware-Overhead enthält; TraceIDMiddleware bleibt
+für einzelne Einbindung (Tests, Vergleichs-Benchmark) erhalten.
 """
+import os
 import uuid
 import time
 import logging
@@ -10,11 +15,20 @@ from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
 
+from backend.services.request_tracing import REQUEST_STAGE, get_tracer, server_timing_header
+from backend.services.success_stats import get_success_aggregator, should_record
+from backend.middlewares.pipeline import route_template
+from backend.utils.log_pipeline import log_route
+
+# Server-Timing-Header für alle Requests (sonst nur mit "X-Server-Timing: 1")
+SERVER_TIMING_ALWAYS = os.getenv("TRACE_SERVER_TIMING", "0") == "1"
+
 
 class TraceIDMiddleware(BaseHTTPMiddleware):
     """
     Middleware die eine Trace-ID für jeden Request generiert und im Request-State speichert.
     Erweitert: Misst Request-Dauer und loggt strukturiert.
+    Startet den Request-Trace, an den Stufen-Spans (parse, geocode, matrix, ...) hängen.
     """
     
     async def dispatch(self, request: Request, call_next):
@@ -29,23 +43,35 @@ class TraceIDMiddleware(BaseHTTPMiddleware):
         start_time = time.time()
         request.state.request_start_time = start_time
         
-        # Rufe nächste Middleware/Handler auf
-        response = await call_next(request)
+        # Trace starten (Spans der Stufen hängen sich per ContextVar an)
+        tracer = get_tracer()
+        trace_token = tracer.start_trace(trace_id, str(request.url.path))
+        
+        # Rufe nächste Middleware/Handler auf (Route für Datei-Log-Sampling setzen)
+        try:
+            with log_route(str(request.url.path)):
+                response = await call_next(request)
+        except Exception:
+            tracer.finish_trace(trace_token, _route_template(request), status=500)
+            raise
         
         # Berechne Dauer
         duration_ms = (time.time() - start_time) * 1000
         
-        # Error-Learning: Logge erfolgreiche Requests (nur bei 2xx)
-        if 200 <= response.status_code < 300:
+        # Trace abschließen: Aggregation unter dem Route-Template (nicht dem konkreten Pfad)
+        tracer.record(REQUEST_STAGE, duration_ms, started_at=start_time)
+        trace = tracer.finish_trace(trace_token, _route_template(request), status=response.status_code)
+        if trace is not None and (SERVER_TIMING_ALWAYS or request.headers.get("X-Server-Timing") == "1"):
+            try:
+                response.headers["Server-Timing"] = server_timing_header(trace, total_ms=duration_ms)
+            except (AttributeError, TypeError):
+                pass
+        
+        # Error-Learning: Erfolgreiche Requests (nur 2xx) im Speicher aggregieren –
+        # pro Route-Template, gebündelt geschrieben von run_success_stats_flush_loop
+        if 200 <= response.status_code < 300 and should_record(request.url.path):
             try:
-                from backend.services.error_learning_service import log_success_event
-                log_success_event(
-                    endpoint=str(request.url.path),
-                    http_method=request.method,
-                    status_code=response.status_code,
-                    request_duration_ms=int(duration_ms),
-                    environment=_get_environment(),
-                )
+                get_success_aggregator().record(_route_template(request), duration_ms)
             except Exception as e:
                 # Fehler beim Success-Logging darf nicht den Request killen
                 logging.getLogger(__name__).debug(f"Fehler beim Success-Logging: {e}")
@@ -78,13 +104,6 @@ class TraceIDMiddleware(BaseHTTPMiddleware):
         return response
 
 
-def _get_environment() -> str:
-    """Bestimmt die aktuelle Umgebung (dev, prod, test)."""
-    import os
-    env = os.getenv("ENVIRONMENT", "dev")
-    if env.lower() in ["production", "prod"]:
-        return "prod"
-    elif env.lower() in ["test", "testing"]:
-        return "test"
-    return "dev"
-
+def _route_template(request: Request) -> str:
+    """Route-Template (z.B. "/api/tour/{tour_id}") statt konkretem Pfad – begrenzt die Label-Anzahl."""
+    return route_template(request.scope)
@@ -1,10 +1,11 @@
-from .excel_parser import parse_teha_excel, parse_teha_excel_all_sheets, parse_teha_excel_sections
+from .excel_parser import parse_teha_excel, parse_teha_excel_all_sheets, parse_teha_excel_sections, parse_teha_workbook
 from .tour_plan_parser import (
     TourInfo,
     TourPlan,
     TourStop,
     export_tour_plan_markdown,
     parse_tour_plan,
+    parse_tour_plan_cached,
     parse_tour_plan_to_dict,
     tour_plan_to_dict,
 )
@@ -14,7 +15,9 @@ __all__ = [
     "parse_teha_excel",
     "parse_teha_excel_all_sheets",
     "parse_teha_excel_sections",
+    "parse_teha_workbook",
     "parse_tour_plan",
+    "parse_tour_plan_cached",
     "parse_tour_plan_to_dict",
     "tour_plan_to_dict",
     "export_tour_plan_markdown",
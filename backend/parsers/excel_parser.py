@@ -1,10 +1,35 @@
 from __future__ import annotations
 
-from pathlib import Path
-from typing import Dict, List, Optional, TypedDict
+import csv
 import re
+from datetime import datetime, time as time_of_day
+from itertools import chain, islice
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, TypedDict
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Excel-Dateien, die openpyxl im Read-only-Modus streamen kann (alles andere, z.B. .xls, über pandas)
+_OPENPYXL_SUFFIXES = (".xlsx", ".xlsm", ".xltx", ".xltm")
+
+# Zellinhalte, die pandas als fehlend liest (STR_NA_VALUES) – gleiche Semantik wie bisher
+_NA_STRINGS = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+})
 
-import pandas as pd
+# Zeilen, die für die Layout-Erkennung angesehen werden
+_SNIFF_ROWS = 20
+
+STANDARD, BRETFELD, SECTIONS = "standard", "bretfeld", "sections"
+
+_STANDARD_COLUMNS = (
+    ("datum", "date"),
+    ("tour", "tour-id", "tourid"),
+    ("name", "firma", "kunde", "kundenname"),
+    ("adresse", "anschrift", "address"),
+)
 
 
 class CustomerRow(TypedDict):
@@ -16,32 +41,149 @@ class CustomerRow(TypedDict):
     isBarCash: bool # NEU: Für BAR-Zahler
 
 
-def _parse_standard_layout(df: pd.DataFrame) -> Dict[str, object]:
+class SheetRow(NamedTuple):
+    """Spalten A–E einer Zeile als bereinigter Text ("" = leere Zelle)."""
+    a: str  # Kundennummer
+    b: str  # Name bzw. Tourkopf
+    c: str  # Straße
+    d: str  # PLZ
+    e: str  # Ort
+
+
+def _text(value: object) -> str:
+    """Zellwert als String wie pandas mit dtype=str (fehlende Werte → "")."""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        if value != value:  # NaN
+            return ""
+        if value.is_integer():
+            return str(int(value))
+    if isinstance(value, str):
+        return "" if value in _NA_STRINGS else value
+    return str(value)
+
+
+def _sheet_row(raw: Tuple[object, ...]) -> SheetRow:
+    cells = [_text(v).strip() for v in raw[:5]]
+    cells += [""] * (5 - len(cells))
+    return SheetRow(*cells)
+
+
+def _iter_csv_rows(file_path: Path, encoding: str) -> Iterator[Tuple[object, ...]]:
+    with open(file_path, encoding=encoding, newline="") as f:
+        for row in csv.reader(f, delimiter=";"):
+            if row:  # Leerzeilen überspringt auch pandas
+                yield tuple(row)
+
+
+def _trim(row: Tuple[object, ...]) -> Tuple[object, ...]:
+    """Leere Zellen am Zeilenende entfernen (wie pandas beim Einlesen von Excel)."""
+    end = len(row)
+    while end and row[end - 1] is None:
+        end -= 1
+    return row[:end]
+
+
+def _iter_sheets(file_path: Path, encoding: str) -> Iterator[Tuple[str, Iterator[Tuple[object, ...]]]]:
+    """
+    Liest die Datei genau einmal und liefert (Blattname, Zeilen-Iterator) je Blatt.
+
+    - CSV (Semikolon): ein Blatt, zeilenweise über das csv-Modul
+    - xlsx: openpyxl im Read-only-Modus (Zeilen werden gestreamt, nicht geladen)
+    - sonstige Excel-Formate (.xls): Fallback über pandas
+    """
+    suffix = file_path.suffix.lower()
+    if suffix == ".csv":
+        yield file_path.stem, _iter_csv_rows(file_path, encoding)
+        return
+
+    if suffix in _OPENPYXL_SUFFIXES:
+        from openpyxl import load_workbook
+
+        wb = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            for ws in wb.worksheets:
+                yield ws.title, (_trim(row) for row in ws.iter_rows(values_only=True))
+        finally:
+            wb.close()
+        return
+
+    import pandas as pd
+
+    xl = pd.ExcelFile(file_path)
+    for sheet in xl.sheet_names:
+        df = xl.parse(sheet, header=None)
+        yield str(sheet), (
+            _trim(tuple(None if pd.isna(v) else v for v in row))
+            for row in df.itertuples(index=False, name=None)
+        )
+
+
+def _standard_columns(header: Tuple[object, ...]) -> Optional[Tuple[int, int, int, int]]:
+    """Spaltenindizes (Datum, Tour, Name, Adresse) einer Standardlayout-Kopfzeile, sonst None."""
+    names = [_text(c).strip().lower() for c in header]
+    found = []
+    for candidates in _STANDARD_COLUMNS:
+        idx = next((i for i, n in enumerate(names) if n in candidates), None)
+        if idx is None:
+            return None
+        found.append(idx)
+    return tuple(found)
+
+
+def _is_section_header(row: SheetRow) -> bool:
+    """Tourkopf: A leer, B sieht wie Tourkopf aus, C–E leer."""
+    return not row.a and _is_tour_header(row.b) and not (row.c or row.d or row.e)
+
+
+def detect_layout(rows: Iterable[Tuple[object, ...]]) -> str:
+    """
+    Erkennt das Layout anhand der ersten Zeilen eines Blatts.
+
+    Returns:
+        STANDARD (Kopfzeile Datum/Tour/Name/Adresse), SECTIONS (mehrere Touren mit
+        Tourköpfen in Spalte B, TEHA-Export) oder BRETFELD (feste Zellpositionen)
+    """
+    head = list(islice(rows, _SNIFF_ROWS))
+    if head and _standard_columns(head[0]) is not None:
+        return STANDARD
+    if any(_is_section_header(_sheet_row(r)) for r in head):
+        return SECTIONS
+    return BRETFELD
+
+
+def _date_text(values: List[object]) -> str:
+    """Erster Datumswert als Text; reine Datums-Spalten ohne Uhrzeit wie bei pandas nur als Datum."""
+    first = values[0]
+    if isinstance(first, datetime) and all(
+        isinstance(v, datetime) and v.time() == time_of_day.min for v in values
+    ):
+        return first.date().isoformat()
+    return _text(first)
+
+
+def _parse_standard_layout(rows: List[Tuple[object, ...]]) -> Dict[str, object]:
     """Standardlayout mit Überschriften: datum/tour/name/adresse o.ä."""
-    # Spalten normalisieren
-    df = df.copy()
-    df.columns = [str(c).strip().lower() for c in df.columns]
-
-    # Versuche, passende Spalten zu finden
-    col_date = next((c for c in df.columns if c in ("datum", "date")), None)
-    col_tour = next((c for c in df.columns if c in ("tour", "tour-id", "tourid")), None)
-    col_name = next(
-        (c for c in df.columns if c in ("name", "firma", "kunde", "kundenname")), None
-    )
-    col_addr = next(
-        (c for c in df.columns if c in ("adresse", "anschrift", "address")), None
-    )
-
-    if not all([col_date, col_tour, col_name, col_addr]):
+    columns = _standard_columns(rows[0]) if rows else None
+    if columns is None:
         raise ValueError("Spalten im Standardlayout nicht gefunden")
+    col_date, col_tour, col_name, col_addr = columns
 
-    first_valid_date = df[col_date].dropna().astype(str).iloc[0]
-    first_valid_tour = df[col_tour].dropna().astype(str).iloc[0]
+    def values(idx: int) -> List[object]:
+        return [r[idx] for r in rows[1:] if idx < len(r) and _text(r[idx])]
+
+    dates = values(col_date)
+    tours = values(col_tour)
+    first_valid_date = _date_text(dates) if dates else None
+    first_valid_tour = _text(tours[0]) if tours else None
+    if first_valid_date is None or first_valid_tour is None:
+        raise ValueError("Keine Werte für Datum/Tour im Standardlayout")
 
     kunden: List[CustomerRow] = []
-    for _, row in df.iterrows():
-        name = str(row.get(col_name, "")).strip()
-        adresse = str(row.get(col_addr, "")).strip()
+    for r in rows[1:]:
+        name = _text(r[col_name]).strip() if col_name < len(r) else ""
+        adresse = _text(r[col_addr]).strip() if col_addr < len(r) else ""
         if name and adresse:
             kunden.append({"name": name, "adresse": adresse})
 
@@ -49,60 +191,70 @@ def _parse_standard_layout(df: pd.DataFrame) -> Dict[str, object]:
 
 
 def _parse_bretfeld_layout(
-    df_raw: pd.DataFrame, fallback_date: Optional[str]
+    rows: Iterable[Tuple[object, ...]], fallback_date: Optional[str]
 ) -> Dict[str, object]:
     """
     Layout laut Nutzer:
     - A = Kunden nummer; B = Name; C = Strasse; D = PLZ; E = Ort-M; F = gedruckt Ja/Nein
     - B5 enthält den Tour-Namen
     - Ab Zeile 6 beginnen die Datenzeilen
-    Hinweis: Header sind ggf. nicht vorhanden → wir nutzen header=None.
+    Hinweis: Header sind ggf. nicht vorhanden → Zeilen werden positionsbasiert gelesen.
     """
-    df = df_raw.copy()
-    # Sicherstellen, dass wir genug Zeilen/Spalten haben
-    if df.shape[0] < 6 or df.shape[1] < 5:
-        raise ValueError("Excel hat zu wenig Zeilen/Spalten für das erwartete Layout")
-
-    # Tourname in B5 (0-basierter Index: Zeile 4, Spalte 1)
-    tour_cell = df.iloc[4, 1]
-    tour = str(tour_cell).strip() if pd.notna(tour_cell) else "Unbenannte Tour"
-
+    tour = "Unbenannte Tour"
     kunden: List[CustomerRow] = []
-    for _, row in df.iloc[5:].iterrows():  # ab Zeile 6
-        name = (
-            str(row.iloc[1]).strip()
-            if row.shape[0] > 1 and pd.notna(row.iloc[1])
-            else ""
-        )
-        strasse = (
-            str(row.iloc[2]).strip()
-            if row.shape[0] > 2 and pd.notna(row.iloc[2])
-            else ""
-        )
-        plz = (
-            str(row.iloc[3]).strip()
-            if row.shape[0] > 3 and pd.notna(row.iloc[3])
-            else ""
-        )
-        ort = (
-            str(row.iloc[4]).strip()
-            if row.shape[0] > 4 and pd.notna(row.iloc[4])
-            else ""
-        )
-
-        if not name:
+    n_rows = width = 0
+
+    for i, raw in enumerate(rows):
+        width = max(width, len(raw))
+        if raw:
+            n_rows = i + 1
+        row = _sheet_row(raw)
+        if i == 4:
+            # Tourname in B5 (0-basierter Index: Zeile 4, Spalte 1)
+            b5 = _text(raw[1]) if len(raw) > 1 else ""
+            tour = b5.strip() if b5 else tour
+        if i < 5 or not row.b:
             # Heuristik: leere Name-Zeile beendet Liste
             continue
 
-        adresse_parts = [part for part in [strasse, f"{plz} {ort}".strip()] if part]
+        adresse_parts = [part for part in [row.c, f"{row.d} {row.e}".strip()] if part]
         adresse = ", ".join(adresse_parts)
-        if name and adresse:
-            kunden.append({"name": name, "adresse": adresse})
+        if adresse:
+            kunden.append({"name": row.b, "adresse": adresse})
+
+    # Sicherstellen, dass wir genug Zeilen/Spalten haben
+    if n_rows < 6 or width < 5:
+        raise ValueError("Excel hat zu wenig Zeilen/Spalten für das erwartete Layout")
 
     datum = fallback_date or ""
     return {"tour": tour, "datum": datum, "kunden": kunden}
 
 
+def _parse_single_tour(
+    rows: Iterator[Tuple[object, ...]], fallback_date: Optional[str]
+) -> Dict[str, object]:
+    """Standardlayout, falls die Kopfzeile passt, sonst Bretfeld-Layout (ein Lesedurchgang)."""
+    first = next(rows, None)
+    if first is None:
+        return _parse_bretfeld_layout([], fallback_date=fallback_date)
+    if _standard_columns(first) is None:
+        return _parse_bretfeld_layout(chain([first], rows), fallback_date=fallback_date)
+
+    buffered = [first, *rows]
+    try:
+        return _parse_standard_layout(buffered)
+    except ValueError as e:
+        print(f"[DEBUG] Standardlayout-Parsing fehlgeschlagen: {e}")
+        return _parse_bretfeld_layout(buffered, fallback_date=fallback_date)
+
+
+def _check_exists(path: str | Path) -> Path:
+    file_path = Path(path)
+    if not file_path.exists():
+        raise FileNotFoundError(f"Datei nicht gefunden: {file_path}")
+    return file_path
+
+
 def parse_teha_excel(
     path: str | Path, *, fallback_date: Optional[str] = None, encoding: Optional[str] = None
 ) -> Dict[str, object]:
@@ -110,67 +262,27 @@ def parse_teha_excel(
     Erwartetes Excel-Layout (minimal):
     - Blatt 1 enthält Spalten: Datum, Tour, Name, Adresse
     - Überschriften können variieren, werden aber per Lower/strip normalisiert
+    - ohne passende Überschriften: Bretfeld-Layout (Tour in B5, Daten ab Zeile 6)
     """
-
-    file_path = Path(path)
-    if not file_path.exists():
-        raise FileNotFoundError(f"Datei nicht gefunden: {file_path}")
-
-    # Bestimme, ob es eine CSV-Datei ist
-    is_csv = file_path.suffix.lower() == ".csv"
+    file_path = _check_exists(path)
     # Verwende die übergebene Kodierung oder einen Standardwert
     actual_encoding = encoding if encoding is not None else "cp850"
 
-    # Zuerst versuchen wir das Standardlayout
-    try:
-        if is_csv:
-            df_std = pd.read_csv(file_path, sep=';', encoding=actual_encoding)
-        else:
-            df_std = pd.read_excel(file_path)
-        return _parse_standard_layout(df_std)
-    except Exception as e:
-        print(f"[DEBUG] Standardlayout-Parsing fehlgeschlagen: {e}")
-        # Fallback: Bretfeld-Layout (headerlos, feste Zellpositionen)
-        if is_csv:
-            df_bret = pd.read_csv(file_path, header=None, dtype=str, sep=';', encoding=actual_encoding)
-        else:
-            df_bret = pd.read_excel(file_path, header=None, dtype=str)
-        return _parse_bretfeld_layout(df_bret, fallback_date=fallback_date)
+    for _sheet, rows in _iter_sheets(file_path, actual_encoding):
+        return _parse_single_tour(rows, fallback_date)
+    raise ValueError(f"Keine Tabellenblätter gefunden: {file_path}")
 
 
 def parse_teha_excel_all_sheets(
     path: str | Path, *, fallback_date: Optional[str] = None, encoding: Optional[str] = None
 ) -> List[Dict[str, object]]:
     """Liest alle Tabellenblätter und gibt pro Blatt eine Tour zurück (sofern Daten vorhanden)."""
-    file_path = Path(path)
-    if not file_path.exists():
-        raise FileNotFoundError(f"Datei nicht gefunden: {file_path}")
-
-    is_csv = file_path.suffix.lower() == ".csv"
+    file_path = _check_exists(path)
     actual_encoding = encoding if encoding is not None else "cp850"
 
-    if is_csv:
-        # CSV hat keine Blätter, also nur das eine Blatt lesen
-        try:
-            df_std = pd.read_csv(file_path, sep=';', encoding=actual_encoding)
-            tour = _parse_standard_layout(df_std)
-        except Exception:
-            df_bret = pd.read_csv(file_path, header=None, dtype=str, sep=';', encoding=actual_encoding)
-            tour = _parse_bretfeld_layout(df_bret, fallback_date=fallback_date)
-        if tour.get("kunden"):
-            return [tour]
-        return []
-
-    xl = pd.ExcelFile(file_path)
     tours: List[Dict[str, object]] = []
-    for sheet in xl.sheet_names:
-        try:
-            df_std = xl.parse(sheet)
-            tour = _parse_standard_layout(df_std)
-        except Exception:
-            df_bret = xl.parse(sheet, header=None, dtype=str)
-            tour = _parse_bretfeld_layout(df_bret, fallback_date=fallback_date)
-
+    for _sheet, rows in _iter_sheets(file_path, actual_encoding):
+        tour = _parse_single_tour(rows, fallback_date)
         if tour.get("kunden"):
             tours.append(tour)
     return tours
@@ -200,31 +312,8 @@ def _is_tour_header(cell: Optional[str]) -> bool:
     return any(rx.search(text) for rx in _HEADER_REGEXES)
 
 
-def parse_teha_excel_sections(
-    path: str | Path,
-    *,
-    fallback_date: Optional[str] = None,
-    headerless: bool = True,
-    encoding: Optional[str] = None  # Neuer Parameter
-) -> List[Dict[str, object]]:
-    """
-    Eine Tabelle enthält mehrere Touren hintereinander:
-    - Tourkopf steht in Spalte B (Beispiel: "PIR.Anlief. 7:45 Uhr")
-    - Zwischen den Touren kann mindestens eine Leerzeile stehen
-    - Datenzeilen: B=Name, C=Straße, D=PLZ, E=Ort
-    """
-    file_path = Path(path)
-    if not file_path.exists():
-        raise FileNotFoundError(f"Datei nicht gefunden: {file_path}")
-
-    is_csv = file_path.suffix.lower() == ".csv"
-    actual_encoding = encoding if encoding is not None else "cp850"
-
-    if is_csv:
-        df = pd.read_csv(file_path, header=None if headerless else 0, dtype=str, sep=';', encoding=actual_encoding)
-    else:
-        df = pd.read_excel(file_path, header=None if headerless else 0, dtype=str)
-
+def _section_tours(rows: Iterable[Tuple[object, ...]], fallback_date: Optional[str]) -> List[Dict[str, object]]:
+    """Touren eines Blatts mit Tourköpfen in Spalte B (Zeilen werden gestreamt)."""
     tours: List[Dict[str, object]] = []
     current_tour_name: Optional[str] = None
     current_customers: List[CustomerRow] = []
@@ -242,36 +331,12 @@ def parse_teha_excel_sections(
         current_tour_name = None
         current_customers = []
 
-    for _, row in df.iterrows():
+    for raw in rows:
         # Spalte A = Kundennummer, B = Name/Tourkopf, C = Straße, D = PLZ, E = Ort
-        a = (
-            str(row.iloc[0]).strip()
-            if row.shape[0] > 0 and pd.notna(row.iloc[0])
-            else ""
-        )
-        b = (
-            str(row.iloc[1]).strip()
-            if row.shape[0] > 1 and pd.notna(row.iloc[1])
-            else ""
-        )
-        c = (
-            str(row.iloc[2]).strip()
-            if row.shape[0] > 2 and pd.notna(row.iloc[2])
-            else ""
-        )
-        d = (
-            str(row.iloc[3]).strip()
-            if row.shape[0] > 3 and pd.notna(row.iloc[3])
-            else ""
-        )
-        e = (
-            str(row.iloc[4]).strip()
-            if row.shape[0] > 4 and pd.notna(row.iloc[4])
-            else ""
-        )
+        a, b, c, d, e = row = _sheet_row(raw)
 
         # Debug-Ausgabe für PIR-Zeilen
-        if "PIR" in str(b):
+        if "PIR" in b:
             print(f"[DEBUG] PIR-Zeile gefunden: A='{a}', B='{b}', C='{c}', D='{d}', E='{e}'")
             print(f"[DEBUG] _is_tour_header(b) = {_is_tour_header(b)}")
             print(f"[DEBUG] not a = {not a}, not any([c,d,e]) = {not any([c, d, e])}")
@@ -281,7 +346,7 @@ def parse_teha_excel_sections(
             continue
 
         # Header nur wenn: A leer, B sieht wie Tourkopf aus, C–E leer
-        if not a and _is_tour_header(b) and not any([c, d, e]):
+        if _is_section_header(row):
             print(f"[DEBUG] Tour-Header erkannt: '{b}'")
             flush_current()
             current_tour_name = b
@@ -320,7 +385,11 @@ def parse_teha_excel_sections(
 
     # Rest flushen
     flush_current()
+    return tours
+
 
+def _merge_section_tours(tours: List[Dict[str, object]]) -> List[Dict[str, object]]:
+    """Führt "BAR"-Touren mit ihren regulären Touren zusammen und sortiert nach Uhrzeit."""
     # NEUE LOGIK: "BAR"-Touren in reguläre Touren zusammenführen und Kunden flaggen
     final_tours: List[Dict[str, object]] = []
     tours_by_base_name = {}
@@ -393,6 +462,64 @@ def parse_teha_excel_sections(
     return final_tours
 
 
+def parse_teha_excel_sections(
+    path: str | Path,
+    *,
+    fallback_date: Optional[str] = None,
+    headerless: bool = True,
+    encoding: Optional[str] = None  # Neuer Parameter
+) -> List[Dict[str, object]]:
+    """
+    Eine Tabelle enthält mehrere Touren hintereinander:
+    - Tourkopf steht in Spalte B (Beispiel: "PIR.Anlief. 7:45 Uhr")
+    - Zwischen den Touren kann mindestens eine Leerzeile stehen
+    - Datenzeilen: B=Name, C=Straße, D=PLZ, E=Ort
+    """
+    file_path = _check_exists(path)
+    actual_encoding = encoding if encoding is not None else "cp850"
+
+    for _sheet, rows in _iter_sheets(file_path, actual_encoding):
+        if not headerless:
+            next(rows, None)  # erste Zeile ist Überschrift
+        return _merge_section_tours(_section_tours(rows, fallback_date))
+    return []
+
+
+def parse_teha_workbook(
+    path: str | Path, *, fallback_date: Optional[str] = None, encoding: Optional[str] = None
+) -> List[Dict[str, object]]:
+    """
+    Liest eine Datei (CSV oder Excel, alle Blätter) genau einmal und erkennt das
+    Layout pro Blatt an den ersten Zeilen (detect_layout):
+    - SECTIONS: Touren mit Tourköpfen (TEHA-Export), BAR-Touren werden über
+      alle Blätter hinweg mit ihren Haupttouren zusammengeführt
+    - STANDARD / BRETFELD: eine Tour pro Blatt
+    """
+    file_path = _check_exists(path)
+    actual_encoding = encoding if encoding is not None else "cp850"
+
+    tours: List[Dict[str, object]] = []
+    section_tours: List[Dict[str, object]] = []
+    for sheet, rows in _iter_sheets(file_path, actual_encoding):
+        head = list(islice(rows, _SNIFF_ROWS))
+        layout = detect_layout(head)
+        rows = chain(head, rows)
+        if layout == SECTIONS:
+            section_tours.extend(_section_tours(rows, fallback_date))
+            continue
+        try:
+            tour = _parse_single_tour(rows, fallback_date)
+        except ValueError as e:
+            print(f"[DEBUG] Blatt '{sheet}' übersprungen: {e}")
+            continue
+        if tour.get("kunden"):
+            tours.append(tour)
+
+    if section_tours:
+        tours.extend(_merge_section_tours(section_tours))
+    return tours
+
+
 def parse_universal_routes(df: pd.DataFrame) -> Dict[str, object]:
     """
     Universeller Parser für alle Routen-Typen:
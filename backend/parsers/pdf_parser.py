@@ -17,12 +17,24 @@ Robustheit:
 - Ignoriert leere/rauschartige Zeilen
 - Normalisiert Whitespaces und Sonderstriche
 - Akzeptiert auch Kundenzeilen mit mehrfachen Bindestrichen im Namen
+
+Performance:
+- Seitentext mehrseitiger PDFs wird im Prozess-Pool extrahiert (PDF_EXTRACT_WORKERS),
+  das Zeilen-Parsing läuft danach seriell über alle Seiten (Tour-Zustand seitenübergreifend)
+- Extrahierte Seiten werden pro Datei-Hash gecacht (erneute Vorschau ohne Extraktion)
 """
 
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
+import hashlib
+import multiprocessing
+import os
 import re
+import threading
 
 from backend.services.geocode import get_city_from_postal_code
 
@@ -195,16 +207,170 @@ def _is_addr_only(line: str) -> Optional[str]:
     return None
 
 
-def parse_pdf_tours(pdf_path: Path) -> List[Dict[str, object]]:
+# Parallele Seiten-Extraktion: ab PDF_PARALLEL_MIN_PAGES Seiten im Prozess-Pool
+# (höchstens PDF_EXTRACT_WORKERS Prozesse, zusammenhängende Seitenblöcke pro Prozess)
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "4"))
+# Extrahierter Seitentext pro Datei-Hash (LRU, Anzahl Dateien)
+PDF_TEXT_CACHE_SIZE = int(os.getenv("PDF_TEXT_CACHE_SIZE", "32"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_cache: "OrderedDict[str, _PdfPages]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+# Zeile der Wortkoordinaten-Auswertung: (links, mitte, rechts)
+WordRow = Tuple[str, str, str]
+
+
+def _open_pdf(pdf_path: Path):
     try:
         import pdfplumber  # import hier, damit Modul optional bleibt
     except Exception as exc:  # pragma: no cover
         raise RuntimeError(f"pdfplumber nicht verfügbar: {exc}")
+    return pdfplumber.open(str(pdf_path))
+
+
+def _extract_page_texts(pdf_path: str, start: int, stop: int) -> List[str]:
+    """Text der Seiten [start, stop) – läuft im Worker-Prozess (picklebar, Top-Level)."""
+    with _open_pdf(Path(pdf_path)) as pdf:
+        return [pdf.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _extract_word_rows(page) -> List[WordRow]:
+    """Wortkoordinaten einer Seite als Zeilen mit drei Spalten (Name | Straße/Hausnr | PLZ/Ort)."""
+    words = page.extract_words(x_tolerance=2, y_tolerance=3)
+    if not words:
+        return []
+    # Gruppiere nach Zeilen (y Mitte runden)
+    rows: Dict[int, List[dict]] = {}
+    for w in words:
+        ymid = int(round((w.get("top", 0) + w.get("bottom", 0)) / 2))
+        rows.setdefault(ymid, []).append(w)
+    # Heuristik: drei Spalten (Name | Straße/Hausnr | PLZ/Ort)
+    x0_page = page.bbox[0]; x1_page = page.bbox[2]
+    width = (x1_page - x0_page)
+    c1 = x0_page + width * 0.33
+    c2 = x0_page + width * 0.66
+    out: List[WordRow] = []
+    for y in sorted(rows.keys()):
+        items = sorted(rows[y], key=lambda z: z.get("x0", 0))
+        left = " ".join([it["text"] for it in items if it.get("x0", 0) < c1]).strip()
+        middle = " ".join([it["text"] for it in items if c1 <= it.get("x0", 0) < c2]).strip()
+        right = " ".join([it["text"] for it in items if it.get("x0", 0) >= c2]).strip()
+        out.append((left, middle, right))
+    return out
+
+
+def _process_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if PDF_EXTRACT_WORKERS <= 1:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn: kein fork eines Prozesses mit laufenden Threads (uvicorn, Log-Writer)
+            _pool = ProcessPoolExecutor(max_workers=PDF_EXTRACT_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Defekten Pool verwerfen; der nächste Aufruf legt einen neuen an."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _page_count(pdf_path: Path) -> int:
+    with _open_pdf(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def extract_page_texts(pdf_path: Path) -> List[str]:
+    """
+    Text aller Seiten in Seitenreihenfolge.
 
+    Ab PDF_PARALLEL_MIN_PAGES Seiten werden zusammenhängende Seitenblöcke im
+    Prozess-Pool extrahiert; die Ergebnisse werden nach Seitennummer
+    zusammengesetzt, das Ergebnis ist also unabhängig von der Worker-Anzahl.
+    """
+    pdf_path = Path(pdf_path)
+    n_pages = _page_count(pdf_path)
+    pool = _process_pool() if n_pages >= PDF_PARALLEL_MIN_PAGES else None
+    if pool is None:
+        return _extract_page_texts(str(pdf_path), 0, n_pages)
+
+    step = -(-n_pages // PDF_EXTRACT_WORKERS)
+    bounds = [(start, min(start + step, n_pages)) for start in range(0, n_pages, step)]
+    try:
+        futures = [pool.submit(_extract_page_texts, str(pdf_path), start, stop) for start, stop in bounds]
+        return [text for future in futures for text in future.result()]
+    except Exception as e:
+        print(f"[PDF] Parallele Extraktion fehlgeschlagen, extrahiere seriell: {e}")
+        if isinstance(e, BrokenProcessPool):
+            _discard_pool(pool)
+        return _extract_page_texts(str(pdf_path), 0, n_pages)
+
+
+class _PdfPages:
+    """Extrahierte Seiten einer Datei (Text sofort, Wortkoordinaten bei Bedarf)."""
+
+    def __init__(self, pdf_path: Path, texts: List[str]):
+        self.pdf_path = pdf_path
+        self.texts = texts
+        self._word_rows: Dict[int, List[WordRow]] = {}
+        self._lock = threading.Lock()
+
+    def word_rows(self, index: int) -> List[WordRow]:
+        with self._lock:
+            if index not in self._word_rows:
+                with _open_pdf(self.pdf_path) as pdf:
+                    self._word_rows[index] = _extract_word_rows(pdf.pages[index])
+            return self._word_rows[index]
+
+
+def _file_hash(pdf_path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _pdf_pages(pdf_path: Path) -> _PdfPages:
+    """Seiten aus dem Cache (Schlüssel: SHA-256 des Dateiinhalts) oder frisch extrahiert."""
+    key = _file_hash(pdf_path)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            cached.pdf_path = pdf_path
+            return cached
+    pages = _PdfPages(pdf_path, extract_page_texts(pdf_path))
+    with _cache_lock:
+        _cache[key] = pages
+        while len(_cache) > PDF_TEXT_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return pages
+
+
+def clear_pdf_cache() -> None:
+    """Leert den Seitentext-Cache (z.B. für Tests)."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def parse_pdf_tours(pdf_path: Path) -> List[Dict[str, object]]:
     pdf_path = Path(pdf_path)
     if not pdf_path.exists():
         raise FileNotFoundError(str(pdf_path))
 
+    # Seitentext parallel bzw. aus dem Cache; das Zeilen-Parsing läuft danach
+    # seriell über alle Seiten, damit der Tour-Zustand seitenübergreifend gleich bleibt
+    pages = _pdf_pages(pdf_path)
+
     tours: List[Dict[str, object]] = []
     current_name: Optional[str] = None
     current_kunden: List[Dict[str, str]] = []
@@ -226,113 +392,95 @@ def parse_pdf_tours(pdf_path: Path) -> List[Dict[str, object]]:
         current_payment_tour = None
         current_payment_for_customers = None
 
-    with pdfplumber.open(str(pdf_path)) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text() or ""
-            pending_name: Optional[str] = None
-            for raw in text.splitlines():
-                line = _clean_line(raw)
-                print(f"[DEBUG] Verarbeite Zeile: '" + line + "', pending_name: " + str(pending_name)) # Debug-Print
-                if not line:
+    for page_index, text in enumerate(pages.texts):
+        pending_name: Optional[str] = None
+        for raw in text.splitlines():
+            line = _clean_line(raw)
+            print(f"[DEBUG] Verarbeite Zeile: '" + line + "', pending_name: " + str(pending_name)) # Debug-Print
+            if not line:
+                continue
+            if _is_tour_header(line):
+                # Prüfe auf doppelte Kopfzeile (z. B. "W-07:00 Uhr BAR" gefolgt von "W-07:00 Uhr Tour")
+                new_norm = _normalize_tour_name(line)
+                if current_name and _normalize_tour_name(current_name) == new_norm:
+                    # Gleiche Tour – BAR soll nur für davorstehende Kunden gelten
+                    pay = _extract_payment_flag(line)
+                    current_payment_for_customers = "bar" if pay else None
+                    # Tour-weite Info beibehalten, falls gesetzt
+                    if pay:
+                        current_payment_tour = pay
                     continue
-                if _is_tour_header(line):
-                    # Prüfe auf doppelte Kopfzeile (z. B. "W-07:00 Uhr BAR" gefolgt von "W-07:00 Uhr Tour")
-                    new_norm = _normalize_tour_name(line)
-                    if current_name and _normalize_tour_name(current_name) == new_norm:
-                        # Gleiche Tour – BAR soll nur für davorstehende Kunden gelten
-                        pay = _extract_payment_flag(line)
-                        current_payment_for_customers = "bar" if pay else None
-                        # Tour-weite Info beibehalten, falls gesetzt
-                        if pay:
-                            current_payment_tour = pay
-                        continue
-                    # Neue Tour beginnen
-                    flush()
-                    current_name = line
-                    current_payment_tour = _extract_payment_flag(line)
-                    current_payment_for_customers = "bar" if current_payment_tour else None
+                # Neue Tour beginnen
+                flush()
+                current_name = line
+                current_payment_tour = _extract_payment_flag(line)
+                current_payment_for_customers = "bar" if current_payment_tour else None
+                continue
+            parsed = _parse_customer_line(line)
+            if parsed:
+                name, addr = parsed
+                row: Dict[str, str] = {"name": name, "adresse": addr}
+                if current_payment_for_customers:
+                    row["payment"] = current_payment_for_customers
+                current_kunden.append(row)
+                pending_name = None
+                continue
+
+            # Zweizeilige Zeilen erkennen (Name in Zeile A, Adresse in Zeile B)
+            if pending_name is None:
+                maybe_name = _is_name_only(line)
+                if maybe_name:
+                    pending_name = maybe_name
                     continue
-                parsed = _parse_customer_line(line)
-                if parsed:
-                    name, addr = parsed
-                    row: Dict[str, str] = {"name": name, "adresse": addr}
+            else:
+                maybe_addr = _is_addr_only(line)
+                if maybe_addr:
+                    row2: Dict[str, str] = {"name": pending_name, "adresse": maybe_addr}
                     if current_payment_for_customers:
-                        row["payment"] = current_payment_for_customers
-                    current_kunden.append(row)
+                        row2["payment"] = current_payment_for_customers
+                    current_kunden.append(row2)
                     pending_name = None
                     continue
 
-                # Zweizeilige Zeilen erkennen (Name in Zeile A, Adresse in Zeile B)
-                if pending_name is None:
-                    maybe_name = _is_name_only(line)
-                    if maybe_name:
-                        pending_name = maybe_name
+            # Debug-Ausgabe für nicht erkannte Zeilen
+            print(f"[DEBUG] Unbekannte Zeile übersprungen: '" + line + "'")
+
+        # Fallback: Spaltenweise Zuordnung per Wortkoordinaten, wenn bisher keine Kunden erkannt wurden
+        if not current_kunden:
+            try:
+                for left, middle, right in pages.word_rows(page_index):
+                    if not left and not right:
                         continue
-                else:
-                    maybe_addr = _is_addr_only(line)
-                    if maybe_addr:
-                        row2: Dict[str, str] = {"name": pending_name, "adresse": maybe_addr}
+                    # Header-Zeilen überspringen
+                    if _is_tour_header(left) or _is_tour_header(right):
+                        # flush aktuelle Gruppe
+                        flush()
+                        current_name = left if _is_tour_header(left) else right
+                        current_payment_tour = _extract_payment_flag(current_name)
+                        current_payment_for_customers = "bar" if current_payment_tour else None
+                        continue
+                    # Kundennummer vorne (z. B. 5023) abtrennen
+                    import re as _re
+                    kundennr = None
+                    if left:
+                        mnum = _re.match(r"^(\d{3,})\s+(.*)$", left)
+                        if mnum:
+                            kundennr = mnum.group(1)
+                            left = mnum.group(2).strip()
+                    # Adresse zusammensetzen: Mitte + (optionale) rechte Spalte (PLZ/Ort)
+                    addr_parts = [s for s in [middle, right] if s]
+                    addr = ", ".join(addr_parts).strip(", ")
+                    addr = _re.sub(r"\s+", " ", addr)
+                    # Nur Zeilen mit Name und Adresse als Kunden interpretieren
+                    if left and addr and len(left) > 2 and len(addr) > 4:
+                        row2: Dict[str, str] = {"name": left, "adresse": addr}
+                        if kundennr:
+                            row2["kundennr"] = kundennr
                         if current_payment_for_customers:
                             row2["payment"] = current_payment_for_customers
                         current_kunden.append(row2)
-                        pending_name = None
-                        continue
-
-                # Debug-Ausgabe für nicht erkannte Zeilen
-                print(f"[DEBUG] Unbekannte Zeile übersprungen: '" + line + "'")
-
-            # Fallback: Spaltenweise Zuordnung per Wortkoordinaten, wenn bisher keine Kunden erkannt wurden
-            if not current_kunden:
-                try:
-                    words = page.extract_words(x_tolerance=2, y_tolerance=3)
-                    if words:
-                        # Gruppiere nach Zeilen (y Mitte runden)
-                        rows: Dict[int, List[dict]] = {}
-                        for w in words:
-                            ymid = int(round((w.get("top", 0) + w.get("bottom", 0)) / 2))
-                            rows.setdefault(ymid, []).append(w)
-                        # Heuristik: drei Spalten (Name | Straße/Hausnr | PLZ/Ort)
-                        x0_page = page.bbox[0]; x1_page = page.bbox[2]
-                        width = (x1_page - x0_page)
-                        c1 = x0_page + width * 0.33
-                        c2 = x0_page + width * 0.66
-                        for y in sorted(rows.keys()):
-                            items = sorted(rows[y], key=lambda z: z.get("x0", 0))
-                            left = " ".join([it["text"] for it in items if it.get("x0", 0) < c1]).strip()
-                            middle = " ".join([it["text"] for it in items if c1 <= it.get("x0", 0) < c2]).strip()
-                            right = " ".join([it["text"] for it in items if it.get("x0", 0) >= c2]).strip()
-                            if not left and not right:
-                                continue
-                            # Header-Zeilen überspringen
-                            if _is_tour_header(left) or _is_tour_header(right):
-                                # flush aktuelle Gruppe
-                                flush()
-                                current_name = left if _is_tour_header(left) else right
-                                current_payment_tour = _extract_payment_flag(current_name)
-                                current_payment_for_customers = "bar" if current_payment_tour else None
-                                continue
-                            # Kundennummer vorne (z. B. 5023) abtrennen
-                            import re as _re
-                            kundennr = None
-                            if left:
-                                mnum = _re.match(r"^(\d{3,})\s+(.*)$", left)
-                                if mnum:
-                                    kundennr = mnum.group(1)
-                                    left = mnum.group(2).strip()
-                            # Adresse zusammensetzen: Mitte + (optionale) rechte Spalte (PLZ/Ort)
-                            addr_parts = [s for s in [middle, right] if s]
-                            addr = ", ".join(addr_parts).strip(", ")
-                            addr = _re.sub(r"\s+", " ", addr)
-                            # Nur Zeilen mit Name und Adresse als Kunden interpretieren
-                            if left and addr and len(left) > 2 and len(addr) > 4:
-                                row2: Dict[str, str] = {"name": left, "adresse": addr}
-                                if kundennr:
-                                    row2["kundennr"] = kundennr
-                                if current_payment_for_customers:
-                                    row2["payment"] = current_payment_for_customers
-                                current_kunden.append(row2)
-                except Exception:
-                    pass
+            except Exception:
+                pass
 
     # Letzte Gruppe flushen
     flush()
@@ -0,0 +1,201 @@
+"""
+Parse-Cache für Tourenpläne (Festplatte, LRU).
+
+Derselbe Tourenplan wird oft mehrmals am Tag hochgeladen. Das geparste
+TourPlan-Objekt wird deshalb unter dem SHA-256 der Roh-Bytes abgelegt; der
+Schlüssel enthält zusätzlich die Parser-Version, den Lese-Modus (Staging /
+Original) und den Stand der Synonym-Tabelle (Synonyme fließen beim Parsen in
+Adressen und Koordinaten ein). Identische Uploads überspringen so Dekodierung,
+Staging-Datei und Parsing und gehen direkt zu Geocoding/Optimierung.
+
+Format: eine gzip-komprimierte, kompakte JSON-Datei pro Eintrag (Touren und
+Stopps als Listen statt Objekte). LRU über die mtime: Treffer frischen sie auf,
+beim Schreiben werden die ältesten Einträge verdrängt, sobald
+TOURPLAN_PARSE_CACHE_MAX_ENTRIES oder TOURPLAN_PARSE_CACHE_MAX_MB überschritten sind.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from common.tour_data_models import TourInfo, TourPlan, TourStop
+
+logger = logging.getLogger(__name__)
+
+PARSE_CACHE_ENABLED = os.getenv("TOURPLAN_PARSE_CACHE", "1") != "0"
+PARSE_CACHE_DIR = os.getenv("TOURPLAN_PARSE_CACHE_DIR", "./data/parse_cache")
+PARSE_CACHE_MAX_ENTRIES = int(os.getenv("TOURPLAN_PARSE_CACHE_MAX_ENTRIES", "200"))
+PARSE_CACHE_MAX_MB = float(os.getenv("TOURPLAN_PARSE_CACHE_MAX_MB", "50"))
+
+_SUFFIX = ".json.gz"
+_FORMAT = 1  # Version des Serialisierungsformats (nicht des Parsers)
+
+
+def cache_key(content: bytes, parser_version: str, mode: str, synonyms: str = "") -> str:
+    """Schlüssel aus Roh-Bytes, Parser-Version, Lese-Modus und Synonym-Stand."""
+    digest = hashlib.sha256(content).hexdigest()
+    meta = f"{_FORMAT}|{parser_version}|{mode}|{synonyms}".encode("utf-8")
+    return hashlib.sha256(digest.encode("ascii") + b"|" + meta).hexdigest()
+
+
+def _stop_row(stop: TourStop) -> list:
+    row = [
+        stop.customer_number, stop.name, stop.street, stop.postal_code, stop.city, int(stop.is_bar_stop),
+        getattr(stop, "_resolved_customer_id", None),
+    ]
+    if hasattr(stop, "_synonym_lat"):
+        row += [stop._synonym_lat, stop._synonym_lon]
+    return row
+
+
+def _stop_from_row(row: list) -> TourStop:
+    stop = TourStop(
+        customer_number=row[0], name=row[1], street=row[2], postal_code=row[3], city=row[4],
+        is_bar_stop=bool(row[5]),
+    )
+    stop._resolved_customer_id = row[6]
+    if len(row) > 7:
+        stop._synonym_lat, stop._synonym_lon = row[7], row[8]
+    return stop
+
+
+def dump_tour_plan(plan: TourPlan) -> bytes:
+    """Serialisiert einen TourPlan kompakt (gzip-JSON, ohne source_file)."""
+    payload = {
+        "f": _FORMAT,
+        "d": plan.delivery_date,
+        "t": [
+            [tour.name, tour.base_name, tour.category, tour.time_label, tour.tour_code, int(tour.is_bar_tour),
+             [_stop_row(stop) for stop in tour.customers]]
+            for tour in plan.tours
+        ],
+    }
+    text = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return gzip.compress(text.encode("utf-8"), compresslevel=6)
+
+
+def load_tour_plan(data: bytes, source_file: str) -> TourPlan:
+    """Gegenstück zu dump_tour_plan; source_file kommt vom aktuellen Upload."""
+    payload = json.loads(gzip.decompress(data).decode("utf-8"))
+    if payload.get("f") != _FORMAT:
+        raise ValueError(f"Unbekanntes Cache-Format: {payload.get('f')}")
+    tours = [
+        TourInfo(
+            name=name, base_name=base_name, category=category, time_label=time_label,
+            tour_code=tour_code, is_bar_tour=bool(is_bar), customers=[_stop_from_row(r) for r in stops],
+        )
+        for name, base_name, category, time_label, tour_code, is_bar, stops in payload["t"]
+    ]
+    return TourPlan(source_file=source_file, delivery_date=payload["d"], tours=tours)
+
+
+class TourPlanCache:
+    """LRU-Cache geparster Tourenpläne auf der Festplatte (ein File pro Eintrag)."""
+
+    def __init__(
+        self,
+        directory: Path | str = PARSE_CACHE_DIR,
+        max_entries: int = PARSE_CACHE_MAX_ENTRIES,
+        max_bytes: int = int(PARSE_CACHE_MAX_MB * 1024 * 1024),
+    ):
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{_SUFFIX}"
+
+    def get(self, key: str, source_file: str) -> Optional[TourPlan]:
+        """Gecachter TourPlan oder None; ein Treffer frischt den LRU-Zeitstempel auf."""
+        path = self._path(key)
+        try:
+            plan = load_tour_plan(path.read_bytes(), source_file)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            # Defekter Eintrag (z.B. abgebrochener Schreibvorgang eines alten Formats) → neu parsen
+            logger.warning(f"[PARSE-CACHE] Eintrag {path.name} unlesbar, verwerfe: {e}")
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return plan
+
+    def put(self, key: str, plan: TourPlan) -> None:
+        """Legt einen TourPlan ab (atomar über Temp-Datei) und verdrängt alte Einträge."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(dump_tour_plan(plan))
+        os.replace(tmp, path)
+        self.prune()
+
+    def entries(self) -> List[os.DirEntry]:
+        if not self.directory.exists():
+            return []
+        with os.scandir(self.directory) as it:
+            return [e for e in it if e.name.endswith(_SUFFIX) and e.is_file()]
+
+    def prune(self) -> int:
+        """Verdrängt die am längsten nicht genutzten Einträge; liefert die Anzahl."""
+        with self._lock:
+            entries = sorted(self.entries(), key=lambda e: e.stat().st_mtime, reverse=True)
+            total, removed = 0, 0
+            for i, entry in enumerate(entries):
+                total += entry.stat().st_size
+                if i >= self.max_entries or total > self.max_bytes:
+                    try:
+                        os.unlink(entry.path)
+                        removed += 1
+                    except OSError:
+                        pass
+            return removed
+
+    def clear(self) -> int:
+        with self._lock:
+            removed = 0
+            for entry in self.entries():
+                os.unlink(entry.path)
+                removed += 1
+            return removed
+
+    def stats(self) -> Dict[str, object]:
+        entries = self.entries()
+        return {
+            "enabled": PARSE_CACHE_ENABLED,
+            "directory": str(self.directory),
+            "entries": len(entries),
+            "bytes": sum(e.stat().st_size for e in entries),
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+_cache: Optional[TourPlanCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_tour_plan_cache() -> TourPlanCache:
+    """Lazy Singleton."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TourPlanCache()
+    return _cache
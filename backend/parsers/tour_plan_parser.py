@@ -17,6 +17,7 @@ from pathlib import Path
 from common.normalize import normalize_address
 import logging # Added for error logging
 from typing import Dict, Iterable, List, Optional, Tuple, Union
+from backend.services.request_tracing import traced
 from backend.routes.upload_csv import _heuristic_decode # Importiere _heuristic_decode
 from common.tour_data_models import TourInfo, TourStop, TourPlan, _parse_delivery_date, _parse_tour_header, _fix_broken_chars # Importiere Datenstrukturen und Hilfsfunktionen
 
@@ -107,6 +108,50 @@ def _normalize(text: str) -> str:
 # ---------------------------------------------------------------------------
 
 
+def _cell(row: List[str], idx: int) -> str:
+    value = row[idx] if len(row) > idx else None
+    return str(value).strip() if value is not None and str(value) != 'nan' else ""
+
+
+def _synonym_db_path() -> Path:
+    db_path = Path(__file__).resolve().parents[2] / "data" / "traffic.db"
+    if not db_path.exists():
+        # Fallback
+        for path in (Path("data/traffic.db"), Path("./data/traffic.db")):
+            if path.exists():
+                return path
+    return db_path
+
+
+def _resolve_synonyms(rows: List[List[str]]) -> Dict[str, object]:
+    """
+    Löst alle Synonym-Aliase eines Tourenplans gebündelt auf ("KdNr:<nr>" und
+    Kundenname jeder Kunden-Zeile). Ein Store pro Datei, ein resolve_many-Aufruf.
+
+    Returns:
+        Dict Alias → Synonym oder None (leer bei Fehlern – Parsing läuft dann ohne Synonyme)
+    """
+    aliases: List[str] = []
+    in_tour = False
+    for row in rows:
+        first_cell = _cell(row, 0)
+        if not first_cell and _cell(row, 1):
+            in_tour = True  # Header-Zeile
+        elif in_tour and first_cell.isdigit():
+            aliases.append(f"KdNr:{first_cell}")
+            name = str(row[1]).strip() if len(row) > 1 and row[1] is not None else ""
+            if name:
+                aliases.append(name)
+    if not aliases:
+        return {}
+    try:
+        from backend.services.synonyms import SynonymStore
+        return SynonymStore(_synonym_db_path()).resolve_many(aliases)
+    except Exception as e:
+        logging.warning(f"[SYNONYM] Fehler bei Synonym-Auflösung (überspringe): {e}")
+        return {}
+
+
 def _extract_tours(file_path: Union[str, Path]) -> Tuple[List[str], Dict[str, List[TourStop]]]:
     """
     Extrahiert Touren aus CSV mit bewährter Logik aus parse_w7.py:
@@ -132,9 +177,10 @@ def _extract_tours(file_path: Union[str, Path]) -> Tuple[List[str], Dict[str, Li
     current_header: Optional[str] = None  # AKTUELLER Header (für normale Kunden-Zuordnung)
     bar_mode: bool = False
     
-    for row in _read_csv_lines(file_path):
-        if not any(row):
-            continue
+    rows = [row for row in _read_csv_lines(file_path) if any(row)]
+    synonyms = _resolve_synonyms(rows)
+    
+    for row in rows:
         
         first_cell = str(row[0]).strip() if len(row) > 0 and row[0] is not None and str(row[0]) != 'nan' else ""
         header_cell = str(row[1]).strip() if len(row) > 1 and row[1] is not None and str(row[1]) != 'nan' else ""
@@ -212,104 +258,46 @@ def _extract_tours(file_path: Union[str, Path]) -> Tuple[List[str], Dict[str, Li
         synonym_city = city
         resolved_customer_id = None
         
-        # IMMER Synonym-Auflösung versuchen wenn KdNr vorhanden
-        # WICHTIG: Mit Timeout und Fehlerbehandlung, damit Synonym-Auflösung nicht blockiert
-        if first_cell:
-            try:
-                from backend.services.synonyms import SynonymStore
-                from pathlib import Path
-                import signal
-                
-                # Datenbank-Pfad finden
-                db_path = Path(__file__).resolve().parents[2] / "data" / "traffic.db"
-                if not db_path.exists():
-                    # Fallback
-                    possible_paths = [
-                        Path("data/traffic.db"),
-                        Path("./data/traffic.db"),
-                    ]
-                    for path in possible_paths:
-                        if path.exists():
-                            db_path = path
-                            break
-                
-                # Synonym-Store mit Timeout-Schutz (verhindert Blockierung)
-                try:
-                    synonym_store = SynonymStore(db_path)
-                except Exception as store_error:
-                    logging.warning(f"[SYNONYM] Fehler beim Initialisieren des Synonym-Stores: {store_error}")
-                    synonym_store = None
-                
-                # 1. Suche nach KdNr: "KdNr:{customer_number}" (ALWAYS suchen wenn KdNr vorhanden)
-                synonym_lat = None
-                synonym_lon = None
-                resolved_customer_id = None
-                
-                if first_cell and synonym_store:
-                    try:
-                        kdnr_synonym = synonym_store.resolve(f"KdNr:{first_cell}")
-                        if kdnr_synonym:
-                            # Übernehme Adresse aus Synonym (auch wenn sie leer ist, damit sie später gesetzt wird)
-                            synonym_street = kdnr_synonym.street or street or ""
-                            synonym_postal_code = kdnr_synonym.postal_code or postal_code or ""
-                            synonym_city = kdnr_synonym.city or city or ""
-                            synonym_lat = kdnr_synonym.lat
-                            synonym_lon = kdnr_synonym.lon
-                            resolved_customer_id = kdnr_synonym.customer_id
-                            # Logging entfernt - verursacht Terminal-Spam
-                            # logging.debug(f"[SYNONYM] KdNr:{first_cell} → Synonym gefunden: street='{synonym_street}', city='{synonym_city}', lat={synonym_lat}, lon={synonym_lon}")
-                        else:
-                            kdnr_synonym = None
-                    except Exception as resolve_error:
-                        logging.warning(f"[SYNONYM] Fehler bei KdNr-Auflösung für '{first_cell}': {resolve_error}")
-                        kdnr_synonym = None
-                else:
-                    kdnr_synonym = None
-                
-                # 2. IMMER nach Name suchen (auch wenn Adresse vorhanden), um falsche Adressen zu korrigieren
-                # Beispiel: "Büttner" mit falscher Adresse "Fröbelstraße 20" → sollte zu "Steigerstraße 1" korrigiert werden
-                if name and synonym_store:
-                    try:
-                        name_synonym = synonym_store.resolve(name)
-                        if name_synonym:
-                            # WICHTIG: Wenn Name-Synonym eine vollständige Adresse hat, verwende diese (korrigiert falsche Adressen)
-                            if name_synonym.street and name_synonym.postal_code and name_synonym.city:
-                                # Name-Synonym hat vollständige Adresse → verwende diese (höhere Priorität als CSV)
-                                synonym_street = name_synonym.street
-                                synonym_postal_code = name_synonym.postal_code
-                                synonym_city = name_synonym.city
-                                if name_synonym.lat:
-                                    synonym_lat = name_synonym.lat
-                                if name_synonym.lon:
-                                    synonym_lon = name_synonym.lon
-                                resolved_customer_id = name_synonym.customer_id or resolved_customer_id
-                                # Logging entfernt - verursacht Terminal-Spam
-                                # logging.debug(f"[SYNONYM] Name '{name}' → Synonym KORRIGIERT Adresse: street='{synonym_street}', city='{synonym_city}', real_customer_id={resolved_customer_id}")
-                            elif not (synonym_street.strip() and synonym_postal_code.strip() and synonym_city.strip()):
-                                # Fallback: Nur wenn noch keine vollständige Adresse vorhanden
-                                synonym_street = name_synonym.street or synonym_street or ""
-                                synonym_postal_code = name_synonym.postal_code or synonym_postal_code or ""
-                                synonym_city = name_synonym.city or synonym_city or ""
-                                if not synonym_lat:
-                                    synonym_lat = name_synonym.lat
-                                if not synonym_lon:
-                                    synonym_lon = name_synonym.lon
-                                resolved_customer_id = name_synonym.customer_id or resolved_customer_id
-                                # Logging entfernt - verursacht Terminal-Spam
-                                # logging.debug(f"[SYNONYM] Name '{name}' → Synonym gefunden: street='{synonym_street}', city='{synonym_city}'")
-                    except Exception as resolve_error:
-                        logging.warning(f"[SYNONYM] Fehler bei Name-Auflösung für '{name}': {resolve_error}")
-                        name_synonym = None
-                else:
-                    name_synonym = None
-                
-                # 3. Logging entfernt - verursacht zu viel Terminal-Spam
-                # Falls Debugging nötig: Temporär wieder aktivieren mit logging.debug()
-                # if first_cell and (synonym_street or synonym_postal_code or synonym_city):
-                #     logging.debug(f"[SYNONYM] Final für KdNr:{first_cell}: street='{synonym_street}', postal='{synonym_postal_code}', city='{synonym_city}', lat={synonym_lat}, lon={synonym_lon}")
-            except Exception as e:
-                logging.warning(f"[SYNONYM] Fehler bei Synonym-Auflösung (überspringe): {e}")
-                # Bei Fehlern: Verwende originale Werte (nicht blockieren!)
+        # IMMER Synonym-Auflösung wenn KdNr vorhanden (gebündelt vorab aufgelöst, siehe _resolve_synonyms)
+        synonym_lat = None
+        synonym_lon = None
+        
+        # 1. Suche nach KdNr: "KdNr:{customer_number}"
+        kdnr_synonym = synonyms.get(f"KdNr:{first_cell}")
+        if kdnr_synonym:
+            # Übernehme Adresse aus Synonym (auch wenn sie leer ist, damit sie später gesetzt wird)
+            synonym_street = kdnr_synonym.street or street or ""
+            synonym_postal_code = kdnr_synonym.postal_code or postal_code or ""
+            synonym_city = kdnr_synonym.city or city or ""
+            synonym_lat = kdnr_synonym.lat
+            synonym_lon = kdnr_synonym.lon
+            resolved_customer_id = kdnr_synonym.customer_id
+        
+        # 2. IMMER nach Name suchen (auch wenn Adresse vorhanden), um falsche Adressen zu korrigieren
+        # Beispiel: "Büttner" mit falscher Adresse "Fröbelstraße 20" → sollte zu "Steigerstraße 1" korrigiert werden
+        name_synonym = synonyms.get(name) if name else None
+        if name_synonym:
+            # WICHTIG: Wenn Name-Synonym eine vollständige Adresse hat, verwende diese (korrigiert falsche Adressen)
+            if name_synonym.street and name_synonym.postal_code and name_synonym.city:
+                # Name-Synonym hat vollständige Adresse → verwende diese (höhere Priorität als CSV)
+                synonym_street = name_synonym.street
+                synonym_postal_code = name_synonym.postal_code
+                synonym_city = name_synonym.city
+                if name_synonym.lat:
+                    synonym_lat = name_synonym.lat
+                if name_synonym.lon:
+                    synonym_lon = name_synonym.lon
+                resolved_customer_id = name_synonym.customer_id or resolved_customer_id
+            elif not (synonym_street.strip() and synonym_postal_code.strip() and synonym_city.strip()):
+                # Fallback: Nur wenn noch keine vollständige Adresse vorhanden
+                synonym_street = name_synonym.street or synonym_street or ""
+                synonym_postal_code = name_synonym.postal_code or synonym_postal_code or ""
+                synonym_city = name_synonym.city or synonym_city or ""
+                if not synonym_lat:
+                    synonym_lat = name_synonym.lat
+                if not synonym_lon:
+                    synonym_lon = name_synonym.lon
+                resolved_customer_id = name_synonym.customer_id or resolved_customer_id
         
         customer = TourStop(
             customer_number=first_cell,
@@ -408,12 +396,20 @@ def _extract_tours(file_path: Union[str, Path]) -> Tuple[List[str], Dict[str, Li
 # ---------------------------------------------------------------------------
 
 
+# Bei jeder Änderung an der Parse-Logik erhöhen: invalidiert den Parse-Cache
+PARSER_VERSION = "1"
+
+
+def _is_staging(path: Path) -> bool:
+    return "staging" in str(path).lower() or path.suffix == ".repaired"
+
+
 def parse_tour_plan(file_path: Union[str, Path]) -> TourPlan:
     path = Path(file_path)
     
     # WICHTIG: Für Staging-Dateien (bereits repariert und als UTF-8 gespeichert)
     # direkt als Text lesen statt erneut zu dekodieren
-    is_staging = "staging" in str(path).lower() or path.suffix == ".repaired"
+    is_staging = _is_staging(path)
     
     if is_staging:
         # Staging-Dateien sind bereits UTF-8 - direkt lesen
@@ -553,8 +549,66 @@ def tour_plan_to_dict(plan: TourPlan) -> Dict[str, object]:
     }
 
 
+def _parse_cache_key(content: bytes, staging: bool) -> str:
+    from backend.parsers.tour_plan_cache import cache_key
+    from backend.services.synonyms import synonym_fingerprint
+
+    return cache_key(content, PARSER_VERSION, "staging" if staging else "original",
+                     synonym_fingerprint(_synonym_db_path()))
+
+
+def cached_tour_plan(content: bytes, source_file: str, staging: bool = True) -> Optional[TourPlan]:
+    """
+    TourPlan aus dem Parse-Cache für diese Roh-Bytes (ohne Datei, ohne Parsing) oder None.
+
+    Args:
+        content: Roh-Bytes des Uploads
+        source_file: Dateiname für TourPlan.source_file
+        staging: Lese-Modus, mit dem die Bytes geparst würden (Staging-Datei vs. Original)
+    """
+    from backend.parsers.tour_plan_cache import PARSE_CACHE_ENABLED, get_tour_plan_cache
+
+    if not PARSE_CACHE_ENABLED:
+        return None
+    try:
+        return get_tour_plan_cache().get(_parse_cache_key(content, staging), source_file)
+    except Exception as e:
+        logging.warning(f"[PARSE-CACHE] Lookup fehlgeschlagen (parse neu): {e}")
+        return None
+
+
+def parse_tour_plan_cached(file_path: Union[str, Path]) -> TourPlan:
+    """
+    Wie parse_tour_plan, aber mit Parse-Cache (Schlüssel: SHA-256 der Datei-Bytes,
+    Parser-Version, Lese-Modus, Synonym-Stand). Identische Dateien werden nur einmal geparst.
+    """
+    from backend.parsers.tour_plan_cache import PARSE_CACHE_ENABLED, get_tour_plan_cache
+
+    path = Path(file_path)
+    if not PARSE_CACHE_ENABLED:
+        return parse_tour_plan(path)
+    content = path.read_bytes()
+    cache = get_tour_plan_cache()
+    try:
+        key = _parse_cache_key(content, _is_staging(path))
+        plan = cache.get(key, path.name)
+    except Exception as e:
+        logging.warning(f"[PARSE-CACHE] Lookup fehlgeschlagen (parse neu): {e}")
+        key, plan = None, None
+    if plan is not None:
+        return plan
+    plan = parse_tour_plan(path)
+    if key is not None:
+        try:
+            cache.put(key, plan)
+        except Exception as e:
+            logging.warning(f"[PARSE-CACHE] Speichern fehlgeschlagen: {e}")
+    return plan
+
+
+@traced("parse")
 def parse_tour_plan_to_dict(file_path: Union[str, Path]) -> Dict[str, object]:
-    return tour_plan_to_dict(parse_tour_plan(file_path))
+    return tour_plan_to_dict(parse_tour_plan_cached(file_path))
 
 
 def export_tour_plan_markdown(plan: TourPlan, output_path: Union[str, Path]) -> None:
@@ -585,6 +639,8 @@ __all__ = [
     "TourPlan",
     "tour_plan_to_dict",
     "parse_tour_plan",
+    "parse_tour_plan_cached",
+    "cached_tour_plan",
     "parse_tour_plan_to_dict",
     "export_tour_plan_markdown",
 ]
@@ -83,15 +83,37 @@ def parse_csv(path: Path, synonyms: SynonymStore) -> List[Dict[str, Any]]:
     rows: List[Dict[str, Any]] = []
     quarantine: List[Dict[str, Any]] = []
     
+    # 1. Durchlauf: Felder normalisieren
+    parsed: List[Dict[str, Any]] = []
     for row_no, raw in enumerate(reader, start=2):  # 1 = Header
         try:
-            cust = normalize_token(raw.get("customer", ""))
-            street = normalize_token(raw.get("street", ""))
-            plz = normalize_token(raw.get("postal_code", ""))
-            city = normalize_token(raw.get("city", ""))
-            
-            # Synonyme zuerst (höchste Priorität!)
-            syn = synonyms.resolve(cust) or synonyms.resolve(street)
+            parsed.append({
+                "row_no": row_no,
+                "raw": raw,
+                "customer": normalize_token(raw.get("customer", "")),
+                "street": normalize_token(raw.get("street", "")),
+                "postal_code": normalize_token(raw.get("postal_code", "")),
+                "city": normalize_token(raw.get("city", "")),
+            })
+        except Exception as ex:
+            # Fehlerhafte Zeile → Quarantäne
+            quarantine.append({
+                "row_no": row_no,
+                "error": str(ex),
+                **(raw or {})
+            })
+    
+    # Synonyme zuerst (höchste Priorität!): gebündelt auflösen,
+    # Straße nur für Zeilen ohne Kunden-Treffer (wie "resolve(cust) or resolve(street)")
+    by_customer = synonyms.resolve_many(p["customer"] for p in parsed)
+    by_street = synonyms.resolve_many(p["street"] for p in parsed if by_customer[p["customer"]] is None)
+    
+    # 2. Durchlauf: Synonym-Override und Schlüssel
+    for p in parsed:
+        row_no = p["row_no"]
+        try:
+            cust, street, plz, city = p["customer"], p["street"], p["postal_code"], p["city"]
+            syn = by_customer[cust] or by_street[street]
             
             if syn:
                 # Synonym-Override: Verwende Daten aus Synonym
@@ -125,7 +147,7 @@ def parse_csv(path: Path, synonyms: SynonymStore) -> List[Dict[str, Any]]:
             quarantine.append({
                 "row_no": row_no,
                 "error": str(ex),
-                **(raw or {})
+                **(p["raw"] or {})
             })
     
     # Deterministische Reihenfolge (Input-Order)
@@ -2,6 +2,8 @@
 API-Endpunkte für Datenbank-Backup
 """
 
+import asyncio
+
 from fastapi import APIRouter, HTTPException, Query, Depends
 from fastapi.responses import JSONResponse
 from pathlib import Path
@@ -19,28 +21,55 @@ router = APIRouter(dependencies=[Depends(require_admin)])
 async def api_create_backup():
     """
     Erstellt manuell ein Backup der Datenbank.
+    
+    Das seitenweise Backup läuft in einem Worker-Thread (blockiert die Event-Loop nicht).
     """
     try:
         # Rufe Backup-Script auf
         import sys
         sys.path.insert(0, str(PROJECT_ROOT))
-        from scripts.db_backup import create_backup
+        from scripts.db_backup import create_backup, last_backup_stats
         
-        success, message = create_backup()
+        success, message = await asyncio.to_thread(create_backup)
         
         if success:
             return JSONResponse({
                 "success": True,
                 "message": message,
+                "stats": last_backup_stats(),
                 "timestamp": datetime.now().isoformat()
             }, media_type="application/json; charset=utf-8")
         else:
             raise HTTPException(500, detail=message)
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(500, detail=f"Backup-Fehler: {str(e)}")
 
 
+@router.get("/api/backup/status")
+async def api_backup_status():
+    """
+    Kennzahlen des letzten Backups (Größe, Dauer, Durchsatz, Dedup) und Zeitplan.
+    """
+    try:
+        import sys
+        sys.path.insert(0, str(PROJECT_ROOT))
+        from scripts.db_backup import BACKUP_COMPRESS, BACKUP_DEDUP, BACKUP_TIME, last_backup_stats
+        
+        return JSONResponse({
+            "success": True,
+            "last_backup": last_backup_stats() or None,
+            "schedule": BACKUP_TIME or None,
+            "compress": BACKUP_COMPRESS,
+            "dedup": BACKUP_DEDUP
+        }, media_type="application/json; charset=utf-8")
+    
+    except Exception as e:
+        raise HTTPException(500, detail=f"Fehler beim Lesen des Backup-Status: {str(e)}")
+
+
 @router.get("/api/backup/list")
 async def api_list_backups():
     """
@@ -76,7 +105,7 @@ async def api_restore_backup(backup_filename: str = Query(..., description="Name
         sys.path.insert(0, str(PROJECT_ROOT))
         from scripts.db_backup import restore_backup
         
-        success, message = restore_backup(backup_filename)
+        success, message = await asyncio.to_thread(restore_backup, backup_filename)
         
         if success:
             return JSONResponse({
@@ -104,7 +133,7 @@ async def api_cleanup_backups():
         sys.path.insert(0, str(PROJECT_ROOT))
         from scripts.db_backup import cleanup_old_backups
         
-        cleanup_old_backups()
+        await asyncio.to_thread(cleanup_old_backups)
         
         return JSONResponse({
             "success": True,
@@ -4,6 +4,7 @@ API-Endpoints für Cost-Tracker (KI-Kosten-Überwachung).
 from fastapi import APIRouter
 from fastapi.responses import JSONResponse
 from backend.services.cost_tracker import get_cost_tracker
+from db.connections import connection
 from datetime import datetime, timedelta
 
 router = APIRouter()
@@ -48,9 +49,6 @@ async def get_cost_stats():
     total_calls = sum(day.get("api_calls", 0) for day in trend)
     
     # Detaillierte API-Call-Statistiken (pro Modell, pro Operation)
-    import sqlite3
-    from datetime import datetime, timedelta
-    
     detailed_stats = {
         "by_model": {},
         "by_operation": {},
@@ -69,7 +67,7 @@ async def get_cost_stats():
     }
     
     try:
-        with sqlite3.connect(tracker.db_path) as conn:
+        with connection(tracker.db_path) as conn:
             # Heute
             today = datetime.now().strftime("%Y-%m-%d")
             today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
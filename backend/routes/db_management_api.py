@@ -4,10 +4,11 @@ DB-Verwaltungs-API für den Admin-Bereich
 Ermöglicht Batch-Geocoding und DB-Statistiken
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Request
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query, Request
 from fastapi.responses import JSONResponse
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import asyncio
 import pandas as pd
 import sqlite3
 import logging
@@ -19,6 +20,7 @@ from sqlalchemy import text
 from repositories.geo_repo import upsert as geo_upsert
 from backend.utils.safe_print import safe_print
 from backend.routes.auth_api import require_admin
+from backend.services.job_runner import JobCancelled, JobContext, get_job_runner, job_response, register_job, response_mode
 
 # AR-02: Router ohne Prefix (wird von admin_api.py unter /api/admin gebündelt)
 router = APIRouter()
@@ -38,56 +40,76 @@ class GeocodeFileRequest(BaseModel):
 
 
 @router.post("/api/tourplan/batch-geocode")
-async def batch_geocode_tourplan(file: UploadFile = File(...), session: dict = Depends(require_admin)):
+async def batch_geocode_tourplan(
+    request: Request,
+    file: UploadFile = File(...),
+    stream: Optional[str] = Query(None, description="ndjson oder sse: Fortschritt und Ergebnis als Stream"),
+    priority: int = Query(0, description="Job-Priorität (höher = früher)"),
+    force: bool = Query(False, description="Gecachtes Ergebnis für identische Datei ignorieren"),
+    session: dict = Depends(require_admin),
+):
     """
     Lädt einen Tourplan hoch, geocodiert alle Adressen und speichert sie in die DB.
     Trackt Cache-Hit-Rate (wie viele waren bereits im Cache vs. neu geocodiert).
     
     WICHTIG: Verwendet den korrekten Tourplan-Parser (parse_tour_plan_to_dict),
     nicht pd.read_csv, da Tourplan-CSVs eine spezielle Struktur mit Tour-Headern haben.
+    
+    Läuft als Hintergrund-Job: derselbe Tourplan erneut hochgeladen liefert den
+    laufenden Job bzw. das gecachte Ergebnis (Prefer: respond-async -> 202 mit Job-ID).
     """
     safe_print(f"[DB-API] Batch-Geocode Upload: {file.filename}")
+    mode = response_mode(request, stream)
+    
+    # SC-07: Filename-Whitelist (Path Traversal verhindern)
+    if not file.filename or not SAFE_FILENAME.match(file.filename):
+        raise HTTPException(400, detail="Ungültiger Dateiname. Nur A-Z, a-z, 0-9, _, ., - erlaubt")
+    
+    # SC-07: Größen-Limit
+    content = await file.read(MAX_UPLOAD_BYTES + 1)
+    if len(content) > MAX_UPLOAD_BYTES:
+        raise HTTPException(413, detail=f"Datei zu groß (max {MAX_UPLOAD_BYTES} Bytes)")
+    
+    # SC-07: Pfad-Check mit resolve() (Path Traversal verhindern)
+    # Nur wenn Datei im Tourplaene-Verzeichnis existiert
+    params = {"filename": file.filename}
+    file_path = (TOURPLAENE_DIR / file.filename).resolve()
+    if file_path.exists():
+        # Prüfe ob Pfad innerhalb des erlaubten Verzeichnisses ist
+        if not str(file_path).startswith(str(TOURPLAENE_DIR.resolve())):
+            raise HTTPException(400, detail="Pfad außerhalb des erlaubten Verzeichnisses")
+        # Datei existiert bereits - verwende sie direkt (kein Schreibzugriff nötig)
+        safe_print(f"[DB-API] Datei bereits vorhanden, verwende: {file_path}")
+        params["path"] = str(file_path)
+        content = await asyncio.to_thread(file_path.read_bytes)
     
+    job = get_job_runner().submit("batch_geocode", payload=content, params=params, priority=priority, force=force)
+    return await job_response(job, mode)
+
+
+async def _batch_geocode_job(ctx: JobContext):
+    """Job-Handler: Batch-Geocoding eines hochgeladenen Tourplans."""
+    from repositories.geo_repo import get as geo_repo_get
+    from backend.parsers.tour_plan_parser import parse_tour_plan_to_dict
+    from common.normalize import normalize_address
+    import tempfile
+    import os
+    
+    filename = ctx.params["filename"]
     try:
-        # SC-07: Filename-Whitelist (Path Traversal verhindern)
-        if not file.filename or not SAFE_FILENAME.match(file.filename):
-            raise HTTPException(400, detail="Ungültiger Dateiname. Nur A-Z, a-z, 0-9, _, ., - erlaubt")
-        
-        # SC-07: Größen-Limit
-        content_preview = await file.read(MAX_UPLOAD_BYTES + 1)
-        if len(content_preview) > MAX_UPLOAD_BYTES:
-            raise HTTPException(413, detail=f"Datei zu groß (max {MAX_UPLOAD_BYTES} Bytes)")
-        await file.seek(0)  # Zurück zum Anfang für weitere Verarbeitung
-        
-        from backend.db.dao import geocache_get
-        from repositories.geo_repo import get as geo_repo_get
-        from backend.parsers.tour_plan_parser import parse_tour_plan_to_dict
-        from common.normalize import normalize_address
-        import tempfile
-        import os
-        
-        # SC-07: Pfad-Check mit resolve() (Path Traversal verhindern)
-        # Nur wenn Datei im Tourplaene-Verzeichnis existiert
-        file_path = (TOURPLAENE_DIR / file.filename).resolve()
-        if file_path.exists():
-            # Prüfe ob Pfad innerhalb des erlaubten Verzeichnisses ist
-            if not str(file_path).startswith(str(TOURPLAENE_DIR.resolve())):
-                raise HTTPException(400, detail="Pfad außerhalb des erlaubten Verzeichnisses")
-            # Datei existiert bereits - verwende sie direkt (kein Schreibzugriff nötig)
-            safe_print(f"[DB-API] Datei bereits vorhanden, verwende: {file_path}")
-            tmp_path = str(file_path.resolve())
+        if ctx.params.get("path"):
+            tmp_path = ctx.params["path"]
         else:
             # Datei existiert nicht - speichere temporär (Parser benötigt Dateipfad)
-            content = await file.read()
             with tempfile.NamedTemporaryFile(delete=False, suffix='.csv', mode='wb') as tmp_file:
-                tmp_file.write(content)
+                tmp_file.write(ctx.payload)
                 tmp_path = tmp_file.name
             safe_print(f"[DB-API] Datei temporär gespeichert: {tmp_path}")
         
         try:
             # Verwende den korrekten Tourplan-Parser (wie im Workflow)
-            safe_print(f"[DB-API] Parse Tourplan mit parse_tour_plan_to_dict: {file.filename}")
-            tour_data = parse_tour_plan_to_dict(tmp_path)
+            safe_print(f"[DB-API] Parse Tourplan mit parse_tour_plan_to_dict: {filename}")
+            tour_data = ctx.run_cpu(parse_tour_plan_to_dict, tmp_path)
             
             # Extrahiere alle Kunden aus allen Touren
             all_customers = []
@@ -98,7 +120,7 @@ async def batch_geocode_tourplan(file: UploadFile = File(...), session: dict = D
             safe_print(f"[DB-API] {len(all_customers)} Kunden aus {len(tour_data.get('tours', []))} Touren extrahiert")
             
         except Exception as parse_error:
-            safe_print(f"[DB-API] Parser-Fehler für {file.filename}: {parse_error}")
+            safe_print(f"[DB-API] Parser-Fehler für {filename}: {parse_error}")
             import traceback
             safe_print(f"[DB-API] Traceback: {traceback.format_exc()}")
             return JSONResponse({
@@ -113,7 +135,7 @@ async def batch_geocode_tourplan(file: UploadFile = File(...), session: dict = D
             }, status_code=400)
         finally:
             # Temporäre Datei löschen (nur wenn es eine temporäre Datei war, nicht die Original-Datei)
-            if not file_path.exists() or str(tmp_path) != str(file_path.resolve()):
+            if not ctx.params.get("path"):
                 try:
                     if os.path.exists(tmp_path):
                         os.unlink(tmp_path)
@@ -122,7 +144,7 @@ async def batch_geocode_tourplan(file: UploadFile = File(...), session: dict = D
         
         # Prüfe ob Kunden gefunden wurden
         if not all_customers:
-            safe_print(f"[DB-API] Warnung: Keine Kunden in {file.filename} gefunden")
+            safe_print(f"[DB-API] Warnung: Keine Kunden in {filename} gefunden")
             return JSONResponse({
                 "success": True,
                 "total_customers": 0,
@@ -148,8 +170,11 @@ async def batch_geocode_tourplan(file: UploadFile = File(...), session: dict = D
         import httpx
         from services.geocode_fill import _geocode_one
         
+        ctx.progress.update(status="geocoding", total=len(all_customers), processed=0)
         async with httpx.AsyncClient(timeout=20.0) as geocode_client:
             for customer in all_customers:
+                ctx.raise_if_cancelled()
+                ctx.progress.incr("processed")
                 try:
                     name = customer.get('name', '').strip()
                     street = customer.get('street', '').strip()
@@ -249,6 +274,8 @@ async def batch_geocode_tourplan(file: UploadFile = File(...), session: dict = D
             "failed_addresses": stats["failed_addresses"][:50]  # Max. 50 für Response (Rest für manuelle Bearbeitung)
         })
         
+    except JobCancelled:
+        raise
     except Exception as e:
         logger.error(f"Fehler bei Batch-Geocoding: {e}", exc_info=True)
         return JSONResponse({
@@ -263,6 +290,9 @@ async def batch_geocode_tourplan(file: UploadFile = File(...), session: dict = D
         }, status_code=500)
 
 
+register_job("batch_geocode", _batch_geocode_job, executor="thread")
+
+
 @router.get("/api/tourplan/list-legacy")
 async def list_tourplans_legacy(session: dict = Depends(require_admin)):
     """
@@ -483,7 +513,10 @@ async def get_db_tables(session: dict = Depends(require_admin)):
     Gibt eine Liste aller Tabellen mit Beschreibungen und Row-Counts zurück.
     """
     try:
-        from db.core import ENGINE
+        from db.snapshot import read_engine
+        
+        # Lesen aus dem Read-only-Snapshot (COUNT(*) pro Tabelle belastet die Live-DB nicht)
+        engine, freshness = read_engine()
         
         # Tabellen-Beschreibungen (aus Dokumentation)
         table_descriptions = {
@@ -503,7 +536,7 @@ async def get_db_tables(session: dict = Depends(require_admin)):
         tables = []
         
         try:
-            with ENGINE.connect() as conn:
+            with engine.connect() as conn:
                 # Hole alle Tabellen
                 result = conn.execute(text("""
                     SELECT name FROM sqlite_master 
@@ -549,7 +582,7 @@ async def get_db_tables(session: dict = Depends(require_admin)):
         return JSONResponse({
             "success": True,
             "tables": tables
-        })
+        }, headers=freshness)
         
     except Exception as e:
         logger.error(f"Fehler beim Abrufen der Tabellenliste: {e}", exc_info=True)
@@ -566,10 +599,12 @@ async def get_table_details(table_name: str, session: dict = Depends(require_adm
     Gibt Details zu einer Tabelle zurück (Spalten, Indizes, Vorschau).
     """
     try:
-        from db.core import ENGINE
+        from db.snapshot import read_engine
+        
+        engine, freshness = read_engine()
         
         # Prüfe ob Tabelle existiert
-        with ENGINE.connect() as conn:
+        with engine.connect() as conn:
             result = conn.execute(text("""
                 SELECT name FROM sqlite_master 
                 WHERE type='table' AND name = :table_name
@@ -622,7 +657,7 @@ async def get_table_details(table_name: str, session: dict = Depends(require_adm
             "columns": columns,
             "indexes": indexes,
             "preview": preview
-        })
+        }, headers=freshness)
         
     except HTTPException:
         raise
@@ -638,7 +673,9 @@ async def get_db_stats(session: dict = Depends(require_admin)):
     """
     try:
         from sqlalchemy import text
-        from db.core import ENGINE
+        from db.snapshot import read_engine
+        
+        engine, freshness = read_engine()
         
         stats = {
             "total_customers": 0,
@@ -652,7 +689,7 @@ async def get_db_stats(session: dict = Depends(require_admin)):
         }
         
         try:
-            with ENGINE.connect() as conn:
+            with engine.connect() as conn:
                 # Zähle Einträge in geo_cache (gecachte Geocodes)
                 result = conn.execute(text("SELECT COUNT(*) FROM geo_cache"))
                 stats["geocoded_customers"] = result.scalar() or 0
@@ -748,7 +785,7 @@ async def get_db_stats(session: dict = Depends(require_admin)):
         return JSONResponse({
             "success": True,
             **stats
-        })
+        }, headers=freshness)
         
     except Exception as e:
         logger.error(f"Fehler beim Abrufen der DB-Statistiken: {e}", exc_info=True)
@@ -2,6 +2,7 @@ from fastapi import APIRouter
 from fastapi.responses import JSONResponse
 from sqlalchemy import text
 from db.core import ENGINE
+from db.connections import get_connection, pool_stats
 from pathlib import Path
 import logging
 
@@ -101,11 +102,8 @@ async def health_db():
             
             # Status (online/offline)
             try:
-                import sqlite3
-                conn = sqlite3.connect(str(db_path))
-                cursor = conn.execute("SELECT 1")
+                cursor = get_connection(db_path).execute("SELECT 1")
                 cursor.fetchone()
-                conn.close()
                 db_status["status"] = "online"
             except Exception as e:
                 db_status["status"] = "offline"
@@ -131,6 +129,20 @@ async def health_db():
         "total_databases": len(databases)
     }, status_code=200 if main_db_ok else 503)
 
+@router.get("/health/db/pool")
+async def health_db_pool():
+    """
+    Pool- und Contention-Metriken des zentralen SQLite-Connection-Managers
+    (pro DB-Datei), Status des SQLAlchemy-Pools und des Read-only-Snapshots.
+    """
+    from db.snapshot import get_snapshot
+    return JSONResponse({
+        "databases": pool_stats(),
+        "engine_pool": ENGINE.pool.status(),
+        "read_snapshot": get_snapshot().stats(),
+    })
+
+
 @router.get("/health/osrm")
 async def health_osrm():
     """
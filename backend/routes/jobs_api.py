@@ -0,0 +1,62 @@
+"""
+API-Endpoints für Hintergrund-Jobs (Status, Ergebnis, Abbruch).
+
+Jobs werden von den jeweiligen Endpoints eingereicht (z.B. /api/workflow/upload
+mit `Prefer: respond-async`); Fortschritt über /api/progress/{job_id}/events.
+Jobs enthalten Parameter und Ergebnisse admin-geschützter Endpoints
+(z.B. /api/tourplan/batch-geocode) - alle Endpoints erfordern daher Admin-Auth.
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
+
+from backend.routes.auth_api import require_admin
+from backend.services.job_runner import FINISHED, get_job_runner, job_summary
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+def _job_or_404(job_id: str) -> dict:
+    job = get_job_runner().get(job_id)
+    if job is None:
+        raise HTTPException(404, detail=f"Job '{job_id}' nicht gefunden")
+    return job
+
+
+@router.get("/api/jobs")
+async def list_jobs(
+    status: Optional[str] = Query(None, description="queued, running, succeeded, failed, cancelled"),
+    kind: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+):
+    """Letzte Jobs (neueste zuerst) plus Queue-Statistik."""
+    runner = get_job_runner()
+    jobs = runner.list(limit=limit, status=status, kind=kind)
+    return JSONResponse({"jobs": [job_summary(j) for j in jobs], "stats": runner.stats()})
+
+
+@router.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status eines Jobs."""
+    job = _job_or_404(job_id)
+    return JSONResponse({**job_summary(job), "params": job["params"], "error": job["error"],
+                         "attempts": job["attempts"]})
+
+
+@router.get("/api/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Ergebnis eines abgeschlossenen Jobs (Status-Code und Body wie beim synchronen Aufruf)."""
+    job = _job_or_404(job_id)
+    if job["status"] not in FINISHED:
+        return JSONResponse(job_summary(job), status_code=202, headers={"Retry-After": "2"})
+    result = job["result"] or {"status_code": 500, "body": {"detail": "Kein Ergebnis"}}
+    return JSONResponse(result["body"], status_code=result["status_code"], headers={"X-Job-Id": job_id})
+
+
+@router.post("/api/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Bricht einen wartenden Job sofort, einen laufenden kooperativ ab."""
+    _job_or_404(job_id)
+    job = get_job_runner().cancel(job_id)
+    return JSONResponse(job_summary(job))
@@ -9,6 +9,7 @@ from typing import Optional, List, Dict
 import sqlite3
 import logging
 from backend.services.cost_tracker import get_cost_tracker
+from db.connections import connection
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -82,7 +83,7 @@ async def get_ki_activity_log(
     where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
     
     try:
-        with sqlite3.connect(tracker.db_path) as conn:
+        with connection(tracker.db_path) as conn:
             conn.row_factory = sqlite3.Row
             
             # Gesamtanzahl für Pagination
@@ -193,7 +194,7 @@ async def get_ki_activity_summary(
     start_date = (datetime.now() - timedelta(days=days)).isoformat()
     
     try:
-        with sqlite3.connect(tracker.db_path) as conn:
+        with connection(tracker.db_path) as conn:
             conn.row_factory = sqlite3.Row
             
             # Tägliche Zusammenfassung
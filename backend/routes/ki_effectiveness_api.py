@@ -9,6 +9,7 @@ from typing import Optional, Dict, List
 import sqlite3
 import logging
 from backend.services.cost_tracker import get_cost_tracker
+from db.connections import connection
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -38,7 +39,7 @@ async def get_ki_effectiveness(
     start_date = (datetime.now() - timedelta(days=days)).isoformat()
     
     try:
-        with sqlite3.connect(tracker.db_path) as conn:
+        with connection(tracker.db_path) as conn:
             conn.row_factory = sqlite3.Row
             
             # Basis-Statistiken
@@ -11,7 +11,7 @@ import sqlite3
 import json
 from datetime import datetime
 
-from backend.db.dao import insert_tour, _connect, get_database_path
+from backend.db.dao import insert_tour, delete_tours_by_prefix, _connect, get_database_path
 from backend.services.geocode import geocode_address
 from backend.services.ai_optimizer import AIOptimizer, Stop
 from backend.services.optimization_rules import default_rules
@@ -95,7 +95,7 @@ def _next_suffix(base: str, con: sqlite3.Connection) -> str:
 
 def _purge_generated_tours(con: sqlite3.Connection, base: str, current_date: str) -> None:
     """Löscht alle zuvor generierten Touren für einen bestimmten Basisnamen und das aktuelle Datum."""
-    con.execute("DELETE FROM touren WHERE tour_id LIKE ? AND datum = ?", (f"{base}%", current_date))
+    delete_tours_by_prefix(con, base, current_date)
     con.commit()
 
 
@@ -112,7 +112,7 @@ async def generate_multi_ai(tour_id: int) -> Dict[str, Any]:
         if not db.exists():
             raise HTTPException(status_code=400, detail=f"DB fehlt: {db}")
         
-        con = sqlite3.connect(str(db))
+        con = _connect()
         row = con.execute("select tour_id, datum, kunden_ids from touren where id=?", (tour_id,)).fetchone()
         if not row:
             raise HTTPException(status_code=404, detail="Tour nicht gefunden")
@@ -0,0 +1,49 @@
+"""
+API-Endpoints für Progress-Events (SSE/NDJSON) von Uploads und Bulk-Läufen.
+
+Wie /api/jobs nur für Admins: Die Events enthalten Teil- und Endergebnisse
+admin-geschützter Läufe.
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import JSONResponse
+
+from backend.routes.auth_api import require_admin
+from backend.services.progress_events import get_progress_hub, stream_session
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+def _session_or_404(session_id: str):
+    session = get_progress_hub().get(session_id)
+    if session is None:
+        raise HTTPException(404, detail=f"Progress-Session '{session_id}' nicht gefunden oder abgelaufen")
+    return session
+
+
+@router.get("/api/progress/{session_id}")
+async def get_progress_state(session_id: str):
+    """Aktueller Zustand einer Progress-Session (Snapshot, kein Stream)."""
+    session = _session_or_404(session_id)
+    return JSONResponse({**session.state, "kind": session.kind, "done": session.done})
+
+
+@router.get("/api/progress/{session_id}/events")
+async def stream_progress_events(
+    session_id: str,
+    format: str = Query("sse", description="sse oder ndjson"),
+    last_seq: int = Query(0, ge=0),
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Abonniert die Events einer Session bis zum Abschluss.
+    
+    Events: progress (Zustand), partial (Teilergebnis, z.B. geocodierte Tour),
+    result (Endergebnis bei ?stream=ndjson-Uploads), done (Abschluss).
+    Wiederaufnahme über Last-Event-ID (EventSource) oder ?last_seq=.
+    """
+    session = _session_or_404(session_id)
+    if last_event_id and last_event_id.isdigit():
+        last_seq = max(last_seq, int(last_event_id))
+    return stream_session(session, format, last_seq)
@@ -5,6 +5,7 @@ from fastapi import APIRouter
 from fastapi.responses import JSONResponse
 from backend.config import cfg
 from backend.services.stats_aggregator import get_overview_stats, get_monthly_stats, get_daily_stats
+from db.snapshot import read_engine
 from fastapi.responses import Response
 import csv
 import json
@@ -27,8 +28,9 @@ async def overview():
         return JSONResponse({"error": "Stats-Box deaktiviert"}, status_code=503)
     
     try:
-        stats = get_overview_stats()
-        return JSONResponse(stats)
+        engine, freshness = read_engine()
+        stats = get_overview_stats(engine=engine)
+        return JSONResponse(stats, headers=freshness)
     except ValueError as e:
         # DB-Tabellen fehlen oder Daten nicht verfügbar
         return JSONResponse({
@@ -56,8 +58,9 @@ async def monthly(months: int = 12):
         return JSONResponse({"error": "Stats-Box deaktiviert"}, status_code=503)
     
     try:
-        stats = get_monthly_stats(months)
-        return JSONResponse({"months": stats})
+        engine, freshness = read_engine()
+        stats = get_monthly_stats(months, engine=engine)
+        return JSONResponse({"months": stats}, headers=freshness)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
@@ -75,8 +78,9 @@ async def daily(days: int = 30):
         return JSONResponse({"error": "Stats-Box deaktiviert"}, status_code=503)
     
     try:
-        stats = get_daily_stats(days)
-        return JSONResponse({"days": stats})
+        engine, freshness = read_engine()
+        stats = get_daily_stats(days, engine=engine)
+        return JSONResponse({"days": stats}, headers=freshness)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
@@ -95,12 +99,13 @@ async def export_csv(period: str = "monthly", count: int = 12):
         return JSONResponse({"error": "Stats-Box deaktiviert"}, status_code=503)
     
     try:
+        engine, freshness = read_engine()
         if period == "daily":
-            data = get_daily_stats(count)
+            data = get_daily_stats(count, engine=engine)
             filename = f"stats_daily_{count}days.csv"
             headers = ["date", "tours", "stops", "km"]
         else:
-            data = get_monthly_stats(count)
+            data = get_monthly_stats(count, engine=engine)
             filename = f"stats_monthly_{count}months.csv"
             headers = ["month", "tours", "stops", "km"]
         
@@ -111,7 +116,7 @@ async def export_csv(period: str = "monthly", count: int = 12):
         return Response(
             content=csv_bytes,
             media_type="text/csv; charset=utf-8",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
+            headers={"Content-Disposition": f"attachment; filename={filename}", **freshness}
         )
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
@@ -131,19 +136,20 @@ async def export_json(period: str = "monthly", count: int = 12):
         return JSONResponse({"error": "Stats-Box deaktiviert"}, status_code=503)
     
     try:
+        engine, freshness = read_engine()
         if period == "daily":
-            data = get_daily_stats(count)
+            data = get_daily_stats(count, engine=engine)
             filename = f"stats_daily_{count}days.json"
             key = "days"
         else:
-            data = get_monthly_stats(count)
+            data = get_monthly_stats(count, engine=engine)
             filename = f"stats_monthly_{count}months.json"
             key = "months"
         
         return Response(
             content=json.dumps({key: data}, indent=2),
             media_type="application/json",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
+            headers={"Content-Disposition": f"attachment; filename={filename}", **freshness}
         )
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
@@ -177,6 +183,7 @@ async def costs_stats(from_date: str = None, to_date: str = None, group: str = "
         # Parse dates
         from_dt = datetime.strptime(from_date, "%Y-%m-%d")
         to_dt = datetime.strptime(to_date, "%Y-%m-%d")
+        engine, freshness = read_engine()
         
         if group == "week":
             # Wochenweise Aggregation
@@ -187,7 +194,7 @@ async def costs_stats(from_date: str = None, to_date: str = None, group: str = "
                 week_end = min(current + timedelta(days=6), to_dt)
                 
                 # Aggregiere Daten für diese Woche
-                week_days = get_daily_stats((week_end - week_start).days + 1)
+                week_days = get_daily_stats((week_end - week_start).days + 1, engine=engine)
                 week_days = [d for d in week_days if week_start.strftime("%Y-%m-%d") <= d["date"] <= week_end.strftime("%Y-%m-%d")]
                 
                 if week_days:
@@ -214,11 +221,11 @@ async def costs_stats(from_date: str = None, to_date: str = None, group: str = "
                 
                 current = week_end + timedelta(days=1)
             
-            return JSONResponse(stats)
+            return JSONResponse(stats, headers=freshness)
         else:
             # Tagesweise Aggregation
             days = (to_dt - from_dt).days + 1
-            stats = get_daily_stats(days)
+            stats = get_daily_stats(days, engine=engine)
             
             # Filtere nach Datumsbereich
             filtered_stats = [
@@ -243,6 +250,6 @@ async def costs_stats(from_date: str = None, to_date: str = None, group: str = "
                     "avg_cost_per_km": s.get("avg_cost_per_km", 0.0)
                 })
             
-            return JSONResponse(result)
+            return JSONResponse(result, headers=freshness)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
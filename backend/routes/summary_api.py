@@ -4,7 +4,7 @@ from fastapi import APIRouter
 from fastapi.responses import JSONResponse
 from sqlalchemy import text
 
-from db.core import ENGINE
+from db.snapshot import read_engine
 
 
 router = APIRouter()
@@ -17,8 +17,10 @@ async def summary() -> JSONResponse:
     kunden = 0
     touren = 0
 
+    # Zählungen aus dem Read-only-Snapshot (Staleness-Budget, siehe db.snapshot)
+    engine, freshness = read_engine()
     try:
-        with ENGINE.begin() as conn:
+        with engine.connect() as conn:
             kunden = conn.execute(text("SELECT COUNT(*) FROM geo_cache")).scalar() or 0
             touren = conn.execute(text("SELECT COUNT(*) FROM manual_queue")).scalar() or 0
     except Exception:
@@ -26,5 +28,5 @@ async def summary() -> JSONResponse:
         kunden = kunden or 0
         touren = touren or 0
 
-    return JSONResponse({"kunden": kunden, "touren": touren}, status_code=200)
+    return JSONResponse({"kunden": kunden, "touren": touren}, status_code=200, headers=freshness)
 
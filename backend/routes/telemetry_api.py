@@ -0,0 +1,34 @@
+"""
+API-Endpoint für die Prozess-Telemetrie (Zähler, Histogramme, Zeitfenster).
+"""
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from backend.services.osrm_metrics import get_osrm_metrics
+from backend.services.telemetry import get_registry
+
+router = APIRouter()
+
+
+@router.get("/api/metrics")
+async def get_metrics_snapshot(prefix: str = ""):
+    """
+    Gibt alle begrenzten Telemetrie-Metriken des Prozesses zurück.
+    
+    Args:
+        prefix: Optional – nur Metriken mit diesem Namenspräfix (z.B. "workflow.")
+    
+    Response:
+    {
+        "metrics": {
+            "http.5xx": 3,
+            "http.5xx.5m": {"window_s": 300.0, "count": 1, "rate_per_s": 0.0033, ...},
+            "osrm.latency_ms": {"count": 120, "avg": 84.2, "p95": 240.0, "buckets": {...}},
+            "sector_planner.llm_decision_usage": {"llm": 4, "heuristic": 9},
+            "workflow.timebox_violation_total": 2,
+            ...
+        }
+    }
+    """
+    get_osrm_metrics()  # registriert die OSRM-Latenzmetriken auch ohne bisherige Requests
+    return JSONResponse({"metrics": get_registry().snapshot(prefix)})
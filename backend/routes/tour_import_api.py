@@ -2,7 +2,7 @@
 API-Endpunkte für Tour-Import & Vorladen
 Batch-Import von Tourplänen mit automatischem Geocoding
 """
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form
 from fastapi.responses import JSONResponse
 from typing import List, Optional
 from pydantic import BaseModel
@@ -16,6 +16,7 @@ import json
 
 from db.core import ENGINE
 from sqlalchemy import text
+from backend.services.job_runner import JobContext, get_job_runner, register_job
 
 logger = logging.getLogger(__name__)
 
@@ -521,16 +522,24 @@ async def _process_csv_file(csv_path: Path, batch_id: int) -> tuple[int, int]:
                 except Exception as e:
                     logger.warning(f"[IMPORT] Fehler beim Speichern des Kunden {name}: {e}")
     
+    # Importierte Touren in tour_stops/Rollups übernehmen (Insert lief an der DAO vorbei)
+    if tours_count:
+        try:
+            from backend.db.tour_stops import sync_tour_stops_engine
+            sync_tour_stops_engine(ENGINE)
+        except Exception as e:
+            logger.warning(f"[IMPORT] tour_stops-Sync fehlgeschlagen: {e}")
+    
     return tours_count, customers_count
 
 
 @router.post("/batch/{batch_id}/start")
-async def start_import_batch(batch_id: int, background_tasks: BackgroundTasks):
-    """
-    Startet die Verarbeitung eines Import-Batches (Geocoding im Hintergrund)
+async def start_import_batch(batch_id: int, priority: int = 0):
     """
-    from backend.services.geocoding_worker import process_batch_geocoding
+    Startet die Verarbeitung eines Import-Batches (Geocoding als Hintergrund-Job)
     
+    Ein erneuter Start während der Batch noch läuft liefert denselben Job.
+    """
     try:
         # Prüfe ob Batch existiert
         with ENGINE.begin() as conn:
@@ -543,21 +552,25 @@ async def start_import_batch(batch_id: int, background_tasks: BackgroundTasks):
             if not batch:
                 raise HTTPException(status_code=404, detail=f"Batch {batch_id} nicht gefunden")
             
-            # Starte Geocoding im Hintergrund
-            background_tasks.add_task(process_batch_geocoding, batch_id, limit=100)
-            
             # Aktualisiere Status
             conn.execute(
                 text("UPDATE import_batches SET status = 'running' WHERE id = :batch_id"),
                 {"batch_id": batch_id}
             )
         
-        logger.info(f"[IMPORT] Geocoding für Batch {batch_id} gestartet")
+        # Starte Geocoding im Hintergrund (Job-Queue, überlebt Neustarts)
+        job = get_job_runner().submit(
+            "import_batch_geocoding", params={"batch_id": batch_id, "limit": 100}, priority=priority
+        )
+        
+        logger.info(f"[IMPORT] Geocoding für Batch {batch_id} gestartet (Job {job['id']})")
         
         return JSONResponse({
             "success": True,
             "message": "Geocoding-Worker gestartet",
-            "batch_id": batch_id
+            "batch_id": batch_id,
+            "job_id": job["id"],
+            "job_status": job["status"],
         })
         
     except HTTPException:
@@ -567,6 +580,16 @@ async def start_import_batch(batch_id: int, background_tasks: BackgroundTasks):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _import_batch_geocoding_job(ctx: JobContext):
+    """Job-Handler: Geocoding eines Import-Batches."""
+    from backend.services.geocoding_worker import process_batch_geocoding
+    return process_batch_geocoding(ctx.params["batch_id"], limit=ctx.params["limit"])
+
+
+# Kein Ergebnis-Cache: nur laufende Starts desselben Batches werden zusammengefasst
+register_job("import_batch_geocoding", _import_batch_geocoding_job, executor="thread", cache_ttl_s=0)
+
+
 @router.post("/geocoding/process")
 async def process_geocoding(limit: int = 10, batch_id: Optional[int] = None):
     """
@@ -1,47 +1,47 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
 from fastapi.responses import JSONResponse
 from pathlib import Path
 import asyncio
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from backend.parsers.tour_plan_parser import parse_tour_plan_to_dict
 from repositories.geo_repo import bulk_get
 from services.geocode_fill import fill_missing
 from ingest.reader import read_tourplan
 from common.normalize import normalize_address
+from backend.db.dao import Kunde, upsert_kunden_by_name
+from backend.services.job_runner import JobCancelled, JobContext, get_job_runner, job_response, register_job, response_mode
 
 # Best-effort Upsert in Stammdaten-Tabelle 'kunden'
-def _upsert_kunde(name: str, address: str, lat: float, lon: float) -> None:
+def _collect_kunde(pending: List[Kunde], name: str, address: str, lat: float, lon: float) -> None:
+    """Merkt einen Kunden für die Stammdatenpflege vor (geschrieben wird gesammelt in _flush_kunden)."""
     if not name or not address or lat is None or lon is None:
         return
     try:
-        from settings import SETTINGS
-        import sqlite3
-        db_path = SETTINGS.database_url.replace("sqlite:///", "")
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM kunden WHERE LOWER(name)=LOWER(?)", (name.strip(),))
-        exists = (cursor.fetchone() or [0])[0] > 0
-        if exists:
-            cursor.execute(
-                "UPDATE kunden SET adresse=?, lat=?, lon=? WHERE LOWER(name)=LOWER(?)",
-                (address, float(lat), float(lon), name.strip()),
-            )
-        else:
-            cursor.execute(
-                "INSERT INTO kunden (name, adresse, lat, lon) VALUES (?,?,?,?)",
-                (name.strip(), address, float(lat), float(lon)),
-            )
-        conn.commit()
-        conn.close()
-    except Exception:
-        # darf UI nie blockieren
+        pending.append(Kunde(id=None, name=name.strip(), adresse=address, lat=float(lat), lon=float(lon)))
+    except (TypeError, ValueError):
         pass
 
+
+def _flush_kunden(pending: List[Kunde]) -> None:
+    """Schreibt alle vorgemerkten Kunden in einer Transaktion (Upsert nach Namen)."""
+    if not pending:
+        return
+    try:
+        upsert_kunden_by_name(pending)
+    except Exception as e:
+        # darf UI nie blockieren
+        print(f"[BULK ANALYSIS] Kunden-Stammdaten konnten nicht gespeichert werden: {e}")
+
 router = APIRouter()
 
 @router.post("/api/tourplan-analysis")
-async def api_tourplan_analysis():
+async def api_tourplan_analysis(
+    request: Request,
+    stream: Optional[str] = Query(None, description="ndjson oder sse: Fortschritt und Ergebnis als Stream"),
+    priority: int = Query(0, description="Job-Priorität (höher = früher)"),
+    force: bool = Query(False, description="Gecachtes Ergebnis für unveränderte Datei ignorieren"),
+):
     """
     Analysiert alle CSV-Dateien im tourplaene Ordner und geocodiert fehlende Adressen.
     
@@ -49,19 +49,38 @@ async def api_tourplan_analysis():
     - Parst jede Datei und extrahiert Kunden
     - Geocodiert fehlende Adressen automatisch
     - Gibt Zusammenfassung mit Erkennungsquoten zurück
+    
+    Läuft als Hintergrund-Job (Parsing im Prozess-Pool); für unveränderten
+    Dateiinhalt wird das gecachte Ergebnis geliefert.
     """
+    mode = response_mode(request, stream)
+    # Tourplaene Ordner finden
+    tourplaene_dir = Path("./tourplaene")
+    if not tourplaene_dir.exists():
+        raise HTTPException(404, detail="Tourplaene Ordner nicht gefunden")
+    
+    # DEBUG: Nur eine spezifische Datei verarbeiten
+    test_file = tourplaene_dir / "Tourenplan 04.09.2025.csv"
+    if not test_file.exists():
+        raise HTTPException(404, detail=f"Test-Datei nicht gefunden: {test_file}")
+    
+    job = get_job_runner().submit(
+        "tourplan_analysis", payload=await asyncio.to_thread(test_file.read_bytes),
+        params={"file": str(test_file)}, priority=priority, force=force,
+    )
+    return await job_response(job, mode)
+
+
+async def _tourplan_analysis_job(ctx: JobContext):
+    """Job-Handler: Analyse und Geocoding einer Tourplan-Datei."""
+    return await _run_tourplan_analysis(Path(ctx.params["file"]), ctx)
+
+
+async def _run_tourplan_analysis(test_file: Path, ctx: JobContext):
+    """Analyse einer Tourplan-Datei (CPU-lastiges Parsing über ctx.run_cpu)."""
     try:
-        # Tourplaene Ordner finden
-        tourplaene_dir = Path("./tourplaene")
-        if not tourplaene_dir.exists():
-            raise HTTPException(404, detail="Tourplaene Ordner nicht gefunden")
-        
-        # DEBUG: Nur eine spezifische Datei verarbeiten
-        test_file = tourplaene_dir / "Tourenplan 04.09.2025.csv"
-        if not test_file.exists():
-            raise HTTPException(404, detail=f"Test-Datei nicht gefunden: {test_file}")
-        
         print(f"[BULK ANALYSIS] DEBUG: Verarbeite nur {test_file.name}")
+        ctx.progress.update(status="parsing", current_file=test_file.name)
         
         all_tours = []
         all_customers = []
@@ -72,7 +91,7 @@ async def api_tourplan_analysis():
         try:
             # CSV parsen
             print(f"[BULK ANALYSIS] Parse {test_file.name}")
-            tour_data = parse_tour_plan_to_dict(test_file)
+            tour_data = ctx.run_cpu(parse_tour_plan_to_dict, str(test_file))
             print(f"[BULK ANALYSIS] {test_file.name}: tour_data keys = {list(tour_data.keys()) if tour_data else 'None'}")
             
             if not tour_data:
@@ -140,6 +159,8 @@ async def api_tourplan_analysis():
             
             # Fehlende Adressen geocodieren (Batch-Limit beachten)
             batch_limit = int(os.getenv("GEOCODE_BATCH_LIMIT", "50"))
+            ctx.raise_if_cancelled()
+            ctx.progress.update(status="geocoding", missing=len(missing_addresses))
             if missing_addresses:
                 print(f"[BULK ANALYSIS] Geocodiere {min(len(missing_addresses), batch_limit)} Adressen")
                 geocoded_results = await fill_missing(
@@ -162,6 +183,7 @@ async def api_tourplan_analysis():
             
             # Touren mit Geocodes anreichern
             enriched_tours = []
+            pending_kunden: List[Kunde] = []
             for tour in tour_data['tours']:
                 if tour.get('customers'):
                     enriched_customers = []
@@ -176,7 +198,7 @@ async def api_tourplan_analysis():
                             hit = None
                         if hit:
                             # Stammdaten pflegen
-                            _upsert_kunde(enriched_customer.get('name',''), hit.resolved_address, hit.lat, hit.lon)
+                            _collect_kunde(pending_kunden, enriched_customer.get('name',''), hit.resolved_address, hit.lat, hit.lon)
                             enriched_customer.update({
                                 'resolved_address': hit.resolved_address,
                                 'lat': hit.lat,
@@ -204,7 +226,8 @@ async def api_tourplan_analysis():
                             
                         if address and address in updated_geo:
                             geo_data = updated_geo[address]
-                            _upsert_kunde(
+                            _collect_kunde(
+                                pending_kunden,
                                 enriched_customer.get('name',''),
                                 normalize_address(address),
                                 geo_data['lat'],
@@ -232,9 +255,12 @@ async def api_tourplan_analysis():
                     tour['customers'] = enriched_customers
                     enriched_tours.append(tour)
             
+            _flush_kunden(pending_kunden)
             all_tours.extend(enriched_tours)
             print(f"[BULK ANALYSIS] {test_file.name}: {len(enriched_tours)} Touren verarbeitet")
             
+        except JobCancelled:
+            raise
         except Exception as e:
             print(f"[BULK ANALYSIS] Fehler bei {test_file.name}: {e}")
             raise HTTPException(500, detail=f"Fehler bei {test_file.name}: {str(e)}")
@@ -268,6 +294,11 @@ async def api_tourplan_analysis():
         
         return JSONResponse(result, media_type="application/json; charset=utf-8")
         
+    except JobCancelled:
+        raise
     except Exception as e:
         print(f"[BULK ANALYSIS] Fehler: {e}")
-        raise HTTPException(500, detail=f"Fehler bei Bulk-Analyse: {str(e)}")
\ No newline at end of file
+        raise HTTPException(500, detail=f"Fehler bei Bulk-Analyse: {str(e)}")
+
+
+register_job("tourplan_analysis", _tourplan_analysis_job, executor="thread")
@@ -2,44 +2,53 @@
 Bulk Processing aller CSV-Tourpläne mit DB-First Strategie
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
 from fastapi.responses import JSONResponse
 from pathlib import Path
 import asyncio
-import uuid
-from typing import Dict, Any, List
+from typing import Optional
 from repositories.geo_repo import get as geo_get, upsert as geo_upsert, bulk_get
 from backend.services.geocode import geocode_address
+from backend.services.geo_validator import refresh_geo_cache_region_ok
 from backend.parsers.tour_plan_parser import parse_tour_plan_to_dict
 from common.normalize import normalize_address
+from backend.services.progress_events import ProgressSession, get_progress_hub
+from backend.services.job_runner import JobContext, get_job_runner, job_response, register_job, response_mode
 
 router = APIRouter()
 
-# Progress-Tracker für Bulk-Processing (Session-basiert, wie bei workflow_upload)
-_bulk_progress: Dict[str, Dict[str, Any]] = {}
-
-
 @router.get("/api/tourplan/bulk-progress/{session_id}")
 async def get_bulk_progress(session_id: str):
-    """Liefert den aktuellen Bulk-Processing-Progress für eine Session."""
-    progress = _bulk_progress.get(session_id, {
-        "total_files": 0,
-        "processed_files": 0,
-        "current_file": "",
-        "total_customers": 0,
-        "processed_customers": 0,
-        "db_hits": 0,
-        "geoapify_calls": 0,
-        "errors": 0,
-        "status": "idle"
-    })
-    return JSONResponse(progress)
+    """
+    Liefert den aktuellen Bulk-Processing-Progress für eine Session.
+    
+    Kompatibilitäts-Endpoint für Polling; Live-Updates über /api/progress/{session_id}/events.
+    """
+    session = get_progress_hub().get(session_id)
+    if session is None:
+        return JSONResponse({
+            "total_files": 0,
+            "processed_files": 0,
+            "current_file": "",
+            "total_customers": 0,
+            "processed_customers": 0,
+            "db_hits": 0,
+            "geoapify_calls": 0,
+            "errors": 0,
+            "status": "idle"
+        })
+    return JSONResponse(session.state)
 
 
 @router.post("/api/tourplan/bulk-process-all")
-async def bulk_process_all_csv():
+async def bulk_process_all_csv(
+    request: Request,
+    stream: Optional[str] = Query(None, description="ndjson oder sse: Fortschritt und Ergebnis als Stream"),
+    priority: int = Query(0, description="Job-Priorität (höher = früher)"),
+    force: bool = Query(False, description="Gecachtes Ergebnis für unveränderte Dateien ignorieren"),
+):
     """
-    Verarbeitet ALLE CSV-Dateien aus dem tourplaene Verzeichnis.
+    Verarbeitet ALLE CSV-Dateien aus dem tourplaene Verzeichnis (als Hintergrund-Job).
     
     DB-First Strategie:
     1. Lädt alle CSV-Dateien
@@ -48,37 +57,63 @@ async def bulk_process_all_csv():
        - Prüfe DB (geo_get) → Wenn vorhanden: Überspringen
        - Wenn nicht in DB: Geocode mit Geoapify
        - Speichere in DB (geo_upsert)
-    4. Live-Progress-Tracking
+    4. Live-Progress-Tracking (Job-ID = Progress-Session)
+    
+    Solange sich die Dateien (Name, Größe, Änderungszeit) nicht ändern, liefert ein
+    erneuter Aufruf den laufenden Job bzw. das gecachte Ergebnis.
     
     Returns:
-        JSON mit Statistiken (Dateien, Kunden, DB-Hits, Geoapify-Calls, etc.)
+        JSON mit Statistiken (Dateien, Kunden, DB-Hits, Geoapify-Calls, etc.);
+        mit ?stream=ndjson|sse ein Event-Stream (progress, partial=Datei-Statistik, result, done);
+        mit Prefer: respond-async bzw. ?async=1 sofort 202 mit Job-ID
     """
-    session_id = str(uuid.uuid4())
-    _bulk_progress[session_id] = {
-        "total_files": 0,
-        "processed_files": 0,
-        "current_file": "",
-        "total_customers": 0,
-        "processed_customers": 0,
-        "current_customer": "",
-        "db_hits": 0,
-        "geoapify_calls": 0,
-        "errors": 0,
-        "status": "starting"
-    }
-    
+    mode = response_mode(request, stream)
+    job = get_job_runner().submit(
+        "bulk_process", payload=_listing_fingerprint(_find_tourplaene_dir()),
+        priority=priority, force=force,
+    )
+    return await job_response(job, mode)
+
+
+def _find_tourplaene_dir() -> Optional[Path]:
+    """Sucht das tourplaene Verzeichnis (inkl. Fallbacks)."""
+    for dir_path in (Path("./tourplaene"), Path("./Tourplaene"), Path("./data/tourplaene")):
+        if dir_path.exists():
+            return dir_path
+    return None
+
+
+def _listing_fingerprint(directory: Optional[Path]) -> bytes:
+    """Idempotenz-Schlüssel eines Bulk-Laufs: Name, Größe und Änderungszeit aller CSV-Dateien."""
+    if directory is None:
+        return b""
+    entries = []
+    for csv_file in sorted(directory.glob("*.csv")):
+        st = csv_file.stat()
+        entries.append(f"{csv_file.name}|{st.st_size}|{st.st_mtime_ns}")
+    return "\n".join(entries).encode("utf-8")
+
+
+async def _bulk_process_job(ctx: JobContext):
+    """Job-Handler: Bulk-Lauf über alle CSV-Dateien."""
+    ctx.progress.update(
+        total_files=0, processed_files=0, current_file="", total_customers=0, processed_customers=0,
+        current_customer="", db_hits=0, geoapify_calls=0, errors=0, status="starting",
+    )
+    return await _run_bulk_process(ctx.progress)
+
+
+register_job("bulk_process", _bulk_process_job, executor="thread", cache_ttl_s=600)
+
+
+async def _run_bulk_process(progress: ProgressSession):
+    """Bulk-Lauf über alle CSV-Dateien (meldet Fortschritt an `progress`)."""
+    session_id = progress.session_id
     try:
         # 1. Finde tourplaene Verzeichnis
-        tourplaene_dir = Path("./tourplaene")
-        if not tourplaene_dir.exists():
-            # Fallback: Versuche verschiedene Verzeichnisse
-            possible_dirs = [Path("./Tourplaene"), Path("./data/tourplaene"), Path("tourplaene")]
-            for dir_path in possible_dirs:
-                if dir_path.exists():
-                    tourplaene_dir = dir_path
-                    break
-            else:
-                raise HTTPException(404, detail="Tourplaene-Verzeichnis nicht gefunden")
+        tourplaene_dir = _find_tourplaene_dir()
+        if tourplaene_dir is None:
+            raise HTTPException(404, detail="Tourplaene-Verzeichnis nicht gefunden")
         
         # 2. Finde alle CSV-Dateien
         csv_files = list(tourplaene_dir.glob("*.csv"))
@@ -88,8 +123,7 @@ async def bulk_process_all_csv():
         # Sortiere nach Name
         csv_files.sort(key=lambda x: x.name)
         
-        _bulk_progress[session_id]["total_files"] = len(csv_files)
-        _bulk_progress[session_id]["status"] = "processing"
+        progress.update(total_files=len(csv_files), status="processing")
         
         # 3. Statistiken
         stats = {
@@ -112,8 +146,7 @@ async def bulk_process_all_csv():
                 "errors": 0
             }
             
-            _bulk_progress[session_id]["processed_files"] = file_idx
-            _bulk_progress[session_id]["current_file"] = csv_file.name
+            progress.update(processed_files=file_idx, current_file=csv_file.name)
             
             try:
                 # Parse CSV-Datei
@@ -132,13 +165,15 @@ async def bulk_process_all_csv():
                 
                 # Zähle Kunden für Progress
                 total_customers_in_file = len(customers)
-                _bulk_progress[session_id]["total_customers"] += total_customers_in_file
+                progress.incr("total_customers", total_customers_in_file)
                 
                 # 5. Verarbeite jeden Kunden (DB-First)
                 for customer_idx, customer in enumerate(customers):
-                    processed_count = _bulk_progress[session_id]["processed_customers"]
-                    _bulk_progress[session_id]["processed_customers"] = processed_count + 1
-                    _bulk_progress[session_id]["current_customer"] = f"{customer.get('name', 'Unbekannt')} ({processed_count + 1}/{_bulk_progress[session_id]['total_customers']})"
+                    processed_count = progress.state["processed_customers"]
+                    progress.update(
+                        processed_customers=processed_count + 1,
+                        current_customer=f"{customer.get('name', 'Unbekannt')} ({processed_count + 1}/{progress.state['total_customers']})",
+                    )
                     
                     # Baue Adresse
                     address = customer.get('address') or ", ".join(filter(None, [
@@ -162,16 +197,16 @@ async def bulk_process_all_csv():
                         # Bereits in DB → Überspringen
                         stats["initially_cached"] += 1
                         file_stats["db_hits"] += 1
-                        _bulk_progress[session_id]["db_hits"] += 1
+                        progress.incr("db_hits")
                         print(f"[BULK] DB-Hit: {address[:50]}...")
                     else:
                         # Nicht in DB → Geocode mit Geoapify
-                        _bulk_progress[session_id]["current_customer"] = f"Geoapify: {customer.get('name', 'Unbekannt')} ({processed_count + 1}/{_bulk_progress[session_id]['total_customers']})"
+                        progress.update(current_customer=f"Geoapify: {customer.get('name', 'Unbekannt')} ({processed_count + 1}/{progress.state['total_customers']})")
                         print(f"[BULK] DB-Miss: {address[:50]}..., rufe Geoapify auf...")
                         
                         try:
                             geo_result = geocode_address(address)
-                            _bulk_progress[session_id]["geoapify_calls"] += 1
+                            progress.incr("geoapify_calls")
                             file_stats["geoapify_calls"] += 1
                             
                             if geo_result and geo_result.get('lat') and geo_result.get('lon'):
@@ -196,16 +231,17 @@ async def bulk_process_all_csv():
                                 # Geoapify fehlgeschlagen
                                 file_stats["errors"] += 1
                                 stats["errors"].append(f"{csv_file.name}: Geocoding fehlgeschlagen für {address[:50]}...")
-                                _bulk_progress[session_id]["errors"] += 1
+                                progress.incr("errors")
                         except Exception as geo_error:
                             file_stats["errors"] += 1
                             stats["errors"].append(f"{csv_file.name}: Geocoding-Fehler für {address[:50]}...: {str(geo_error)}")
-                            _bulk_progress[session_id]["errors"] += 1
+                            progress.incr("errors")
                             print(f"[BULK] ERROR Geocoding: {geo_error}")
                 
                 # Datei-Statistik speichern
                 stats["file_stats"].append(file_stats)
                 stats["files_processed"] += 1
+                progress.partial("file", file_stats)
                 
             except Exception as file_error:
                 print(f"[BULK] ERROR bei {csv_file.name}: {file_error}")
@@ -219,9 +255,20 @@ async def bulk_process_all_csv():
         if stats["total_customers"] > 0:
             success_rate = ((stats["initially_cached"] + stats["newly_geocoded"]) / stats["total_customers"]) * 100
         
-        _bulk_progress[session_id]["status"] = "completed"
-        _bulk_progress[session_id]["current_file"] = "Abgeschlossen"
-        _bulk_progress[session_id]["current_customer"] = f"Fertig! {stats['initially_cached']} DB, {stats['newly_geocoded']} neu geocodiert"
+        # 7. region_ok für neue Einträge ohne Wert nachtragen (vektorisiert); eine komplette
+        #    Neubewertung des geo_cache läuft über scripts/validate_geo_regions.py
+        region_check = None
+        try:
+            region_check = await asyncio.to_thread(refresh_geo_cache_region_ok, only_missing=True)
+        except Exception as region_error:
+            print(f"[BULK] Regionsprüfung des geo_cache fehlgeschlagen: {region_error}")
+        
+        progress.update(
+            status="completed",
+            processed_files=len(csv_files),
+            current_file="Abgeschlossen",
+            current_customer=f"Fertig! {stats['initially_cached']} DB, {stats['newly_geocoded']} neu geocodiert",
+        )
         
         return JSONResponse({
             "success": True,
@@ -231,12 +278,13 @@ async def bulk_process_all_csv():
             "unique_addresses": unique_addresses_count,
             "initially_cached": stats["initially_cached"],
             "newly_geocoded": stats["newly_geocoded"],
-            "db_hits": _bulk_progress[session_id]["db_hits"],
-            "geoapify_calls": _bulk_progress[session_id]["geoapify_calls"],
+            "db_hits": progress.state["db_hits"],
+            "geoapify_calls": progress.state["geoapify_calls"],
             "errors_count": len(stats["errors"]),
             "errors": stats["errors"][:50],  # Max. 50 Fehler
             "success_rate": round(success_rate, 2),
-            "file_stats": stats["file_stats"]
+            "file_stats": stats["file_stats"],
+            "region_check": region_check,
         }, media_type="application/json; charset=utf-8")
     
     except HTTPException:
@@ -246,8 +294,7 @@ async def bulk_process_all_csv():
         import traceback
         error_trace = traceback.format_exc()
         print(f"[BULK ERROR TRACE] {error_trace}")
-        _bulk_progress[session_id]["status"] = "error"
-        _bulk_progress[session_id]["current_file"] = f"Fehler: {str(e)}"
+        progress.update(status="error", current_file=f"Fehler: {str(e)}")
         # Return error details instead of raising (für besseres Frontend-Feedback)
         return JSONResponse({
             "success": False,
@@ -9,8 +9,7 @@ import unicodedata
 import os
 import asyncio
 from ingest.reader import read_tourplan
-from repositories.geo_repo import bulk_get
-from repositories.geo_alias_repo import resolve_aliases
+from repositories.geo_batch_repo import resolve_batch
 import unicodedata
 import re
 from common.normalize import normalize_address
@@ -54,7 +53,7 @@ async def api_tourplan_match(file: str = Query(..., min_length=3, description="P
     
     - Verwendet modernen Tourplan-Parser für vollständige Adressen
     - Normalisiert Adressen mit PLZ und Stadt
-    - Führt bulk_get gegen geo_cache aus
+    - Löst Cache, Alias, Fail-Cache und Manual-Queue per resolve_batch auf (ein Roundtrip)
     - Gibt Status je Zeile zurück (ok/warn/bad)
     
     Unterstützt:
@@ -300,9 +299,11 @@ async def do_match(file_path: str):
             # Normale Normalisierung
             addrs.append(normalize_address(full_address, customer.get('name', ''), customer.get('postal_code', '')))
 
-    # 3) Alias-Auflösung und DB-Lookup (bulk)
-    aliases = resolve_aliases(addrs)  # map: query_norm -> canonical_norm
-    geo = bulk_get(addrs + list(aliases.values()))  # beide Mengen laden
+    # 3) Alias-Auflösung und DB-Lookup (ein Roundtrip pro Plan)
+    facts = resolve_batch(addrs)
+    aliases = {k: f.alias_of for k, f in facts.items() if f.alias_of}  # map: query_norm -> canonical_norm
+    geo = {k: f.geo for k, f in facts.items() if f.geo}
+    geo.update({f.alias_of: f.canonical_geo for f in facts.values() if f.canonical_geo})
     
     # 4) Geocoding-Erzwingung (wenn aktiviert)
     if ENFORCE:
@@ -5,10 +5,7 @@ import pandas as pd
 from ingest.reader import read_tourplan
 from .tourplan_match import _addr_col
 from common.normalize import normalize_address
-from repositories.geo_alias_repo import resolve_aliases
-from repositories.manual_repo import is_open as manual_is_open
-from sqlalchemy import text
-from db.core import ENGINE
+from repositories.geo_batch_repo import resolve_batch
 
 router = APIRouter()
 
@@ -28,32 +25,26 @@ def triage(file: str = Query(...), limit: int = Query(30, ge=1, le=200)):
     data = df.iloc[offset:].reset_index(drop=True)
     addrs_raw = data.iloc[:, col].fillna("").astype(str).tolist()[:limit]
 
-    # Normierung + Aliasse
-    addrs_norm = [normalize_addr(a) for a in addrs_raw]
-    aliases = resolve_aliases(addrs_norm)
-
-    # Cache-Lookup (inkl. Canonicals)
-    geo = bulk_get(addrs_norm + list(aliases.values()))
-
-    # Fail-Cache Treffer (Info) - vereinfacht für Tests
-    fail = {}
+    # Normierung + Cache/Alias/Fail/Manual in einem Roundtrip
+    addrs_norm = [normalize_address(a) for a in addrs_raw]
+    facts = resolve_batch(addrs_norm)
 
     items = []
     for raw, norm in zip(addrs_raw, addrs_norm):
-        canon = aliases.get(norm)
-        rec = geo.get(norm) or (geo.get(canon) if canon else None)
-        has_geo = rec is not None
+        f = facts.get(norm)
+        canon = f.alias_of if f else None
+        rec = f.resolved if f else None
         
         items.append({
             "raw": raw,
             "norm": norm,
             "alias_of": canon,
-            "in_cache": norm in geo,
-            "via_alias": (not norm in geo) and bool(canon and geo.get(canon)),
-            "has_geo": has_geo,
+            "in_cache": bool(f and f.geo),
+            "via_alias": bool(f and not f.geo and f.canonical_geo),
+            "has_geo": rec is not None,
             "geo": rec,
-            "in_fail": fail.get(norm),
-            "manual_needed": manual_is_open(norm),
+            "in_fail": f.fail if f else None,
+            "manual_needed": bool(f and f.manual_open),
         })
 
     return JSONResponse({
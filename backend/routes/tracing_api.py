@@ -0,0 +1,45 @@
+"""
+API-Endpoints für Request-Tracing (Stufen-Histogramme pro Route).
+"""
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse, PlainTextResponse
+from backend.services.request_tracing import get_tracer
+
+router = APIRouter()
+
+
+@router.get("/metrics/prometheus")
+async def get_prometheus_metrics():
+    """
+    Stufen-Dauern (parse, geocode, matrix, solve, llm, route_geometry, db, request)
+    pro Route-Template im Prometheus-Textformat.
+    """
+    return PlainTextResponse(
+        get_tracer().render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@router.get("/api/tracing/stats")
+async def get_tracing_stats():
+    """
+    Gibt p50/p95/p99 pro Route und Stufe zurück.
+    
+    Response:
+    {
+        "routes": {
+            "/api/tour/optimize": {
+                "matrix": {"count": 12, "avg_ms": 210.4, "p50_ms": 180.0, "p95_ms": 450.0, ...},
+                "request": {...}
+            }
+        },
+        "pending_spans": 42,
+        "flushed_spans": 1200
+    }
+    """
+    tracer = get_tracer()
+    return JSONResponse({
+        "routes": tracer.snapshot(),
+        "pending_spans": tracer.pending,
+        "flushed_spans": tracer.flushed,
+    })
@@ -3,15 +3,18 @@ from fastapi.responses import JSONResponse
 from pathlib import Path
 import os
 import json
+import logging
 import re
 import asyncio
 import time
 import uuid
 import unicodedata
 import sqlite3
-from typing import Optional, List, Dict, Any
-from backend.parsers.tour_plan_parser import parse_tour_plan_to_dict
+from typing import Optional, List, Dict
+from backend.parsers.tour_plan_parser import cached_tour_plan, parse_tour_plan_to_dict, tour_plan_to_dict
 from repositories.geo_repo import get as geo_get, upsert as geo_upsert
+from repositories.geo_batch_repo import resolve_batch
+from common.normalize import normalize_address
 # from backend.services.geocode import geocode_address  # Nicht mehr verwendet - verwende _geocode_one() stattdessen
 from services.llm_optimizer import LLMOptimizer
 from services.llm_monitoring import LLMMonitoringService
@@ -25,21 +28,23 @@ from services.pirna_clusterer import PirnaClusterer, PirnaClusterParams
 # from backend.services.routing_optimizer import optimize_route as routing_optimize_route  # Nicht mehr verwendet - verwende optimize_tour_stops() stattdessen
 from .schemas import OptimizeTourRequest
 from backend.services.real_routing import build_route_details, RouteDetailsReq
+from backend.services.timebox_evaluator import TimeboxEvaluator
 from backend.utils.safe_print import safe_print
 from backend.utils.file_logger import log_to_file
+from backend.services.progress_events import ProgressSession, get_progress_hub
+from backend.services.job_runner import JobContext, get_job_runner, job_response, register_job, response_mode
+from backend.services.request_tracing import traced
+from backend.services.telemetry import MINUTE_BUCKETS, get_registry
 
 router = APIRouter()  # Kein Prefix, da Endpoints bereits /api/ enthalten
 
-# Progress-Tracker für Live-Geocoding-Status
-_geocoding_progress: Dict[str, Dict[str, Any]] = {}
-
-# Telemetrie für Timebox-Validierung
-_timebox_metrics = {
-    "timebox_violation_total": 0,
-    "osrm_unavailable": 0,
-    "route_after_validation_minutes": [],  # Histogram-Daten
-    "splits_performed": 0
-}
+# Telemetrie für Timebox-Validierung (begrenzt, Export über /api/metrics)
+_telemetry = get_registry()
+_timebox_violations = _telemetry.counter("workflow.timebox_violation_total")
+_timebox_osrm_unavailable = _telemetry.counter("workflow.osrm_unavailable")
+_timebox_splits = _telemetry.counter("workflow.splits_performed")
+_route_minutes = _telemetry.histogram("workflow.route_after_validation_minutes", MINUTE_BUCKETS)
+_route_minutes_recent = _telemetry.window("workflow.route_after_validation_minutes.1h", window_s=3600, slots=60)
 
 # Globale Services initialisieren
 llm_optimizer = LLMOptimizer()
@@ -141,6 +146,18 @@ def should_process_tour_workflow(tour_name: str) -> bool:
     return is_w_tour_or_pir_anlief(tour_name)
 
 
+def _customer_address(customer: Dict) -> str:
+    """Adresse eines geparsten Kunden (Fallback: Straße, PLZ Ort)."""
+    address = customer.get('address', '')
+    if not address:
+        street = customer.get('street', '').strip()
+        postal_code = customer.get('postal_code', '').strip()
+        city = customer.get('city', '').strip()
+        if street or postal_code or city:
+            address = ", ".join(filter(None, [street, f"{postal_code} {city}".strip()]))
+    return address
+
+
 def should_process_tour_admin(tour_name: str, ignore_list: list, allow_list: list) -> bool:
     """
     Filter-Logik für ADMIN-Bereich.
@@ -174,7 +191,7 @@ def should_process_tour_admin(tour_name: str, ignore_list: list, allow_list: lis
                 f' {pattern_upper} ' in f' {tour_name_upper} ' or
                 f'-{pattern_upper}' in tour_name_upper or
                 f'.{pattern_upper}' in tour_name_upper):
-                log_to_file(f"[FILTER] Tour '{tour_name}' ignoriert (Pattern: '{ignore_pattern}')")
+                log_to_file("[FILTER] Tour '%s' ignoriert (Pattern: '%s')", tour_name, ignore_pattern, level=logging.DEBUG)
                 return False  # Tour wird ignoriert
         else:
             # Längere Patterns: Flexibleres Matching, aber präziser
@@ -214,7 +231,7 @@ def should_process_tour_admin(tour_name: str, ignore_list: list, allow_list: lis
                     matches = True
             
             if matches:
-                log_to_file(f"[FILTER] Tour '{tour_name}' ignoriert (Pattern: '{ignore_pattern}')")
+                log_to_file("[FILTER] Tour '%s' ignoriert (Pattern: '%s')", tour_name, ignore_pattern, level=logging.DEBUG)
                 return False  # Tour wird ignoriert
     
     # 2. Wenn Allow-Liste vorhanden und nicht leer: Nur diese Touren erlauben
@@ -308,85 +325,27 @@ class CachedGeocoder(Geocoder):
             log_to_file(f"[CachedGeocoder] WARNUNG: Fehler bei {address}: {e}")
             return None, None, f"Geocoding-Fehler: {e}"
 
-def _estimate_tour_time_without_return(stops: List[Dict], use_osrm: bool = True) -> float:
-    """Schätzt Fahrzeit + Servicezeit für eine Tour (OHNE Rückfahrt) - verwendet OSRM wenn verfügbar"""
+def _timebox_evaluator(stops: List[Dict], use_osrm: bool = True) -> TimeboxEvaluator:
+    """Baut den Evaluator für eine Tour (EIN OSRM-Table-Request für Depot + alle Stopps)."""
+    evaluator = TimeboxEvaluator(stops, use_osrm=use_osrm, client=get_osrm_client() if use_osrm else None)
+    if use_osrm and evaluator.source != "osrm":
+        _timebox_osrm_unavailable.inc()
+    return evaluator
+
+
+def _estimate_tour_time_without_return(stops: List[Dict], use_osrm: bool = True,
+                                       evaluator: Optional[TimeboxEvaluator] = None) -> float:
+    """
+    Schätzt Fahrzeit + Servicezeit für eine Tour (OHNE Rückfahrt).
+    
+    Mit `evaluator` wird nur die bereits geholte Dauer-Matrix verwendet (kein Request);
+    sonst wird einmalig eine Matrix für diese Stopps geholt (Fallback Haversine × 1.3).
+    """
     if len(stops) == 0:
         return 0.0
-    
-    SERVICE_TIME_PER_STOP = 2.0  # Minuten
-    
-    # Versuche OSRM wenn verfügbar
-    if use_osrm:
-        client = get_osrm_client()
-        if client.available:
-            try:
-                # Depot-Koordinaten (FAMO Dresden)
-                DEPOT_LAT = 51.0111988
-                DEPOT_LON = 13.7016485
-                
-                # Erstelle Koordinaten-Liste: Depot + alle Stopps (OHNE Rückfahrt!)
-                coords = [(DEPOT_LAT, DEPOT_LON)]
-                for stop in stops:
-                    if stop.get('lat') and stop.get('lon'):
-                        coords.append((stop.get('lat'), stop.get('lon')))
-                
-                if len(coords) >= 2:
-                    # Hole Route vom Depot über alle Stopps (OHNE Rückfahrt!)
-                    # WICHTIG: Timeout hinzufügen um Blockierung zu verhindern
-                    route = client.get_route(coords, timeout=5.0)
-                    if route and route.get("source") == "osrm":
-                        # OSRM-Route erfolgreich
-                        driving_time_minutes = route.get("duration_min", 0.0)
-                        service_time_minutes = len(stops) * SERVICE_TIME_PER_STOP
-                        return driving_time_minutes + service_time_minutes
-            except Exception as e:
-                import logging
-                log_to_file(f"[TOUR-TIME] WARNUNG: OSRM-Berechnung fehlgeschlagen: {e}, verwende Fallback")
-    
-    # Fallback: Haversine
-    DEPOT_LAT = 51.0111988
-    DEPOT_LON = 13.7016485
-    SPEED_KMH = 50.0  # Durchschnittsgeschwindigkeit
-    SAFETY_FACTOR = 1.3  # Haversine × 1.3 für Stadtverkehr
-    
-    import math
-    
-    def haversine_distance(lat1, lon1, lat2, lon2):
-        R = 6371.0  # Erdradius in km
-        lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-        c = 2 * math.asin(math.sqrt(a))
-        return R * c
-    
-    # Berechne Fahrzeit (OHNE Rückfahrt!)
-    total_distance_km = 0.0
-    
-    # Depot → erster Kunde
-    if stops[0].get('lat') and stops[0].get('lon'):
-        distance = haversine_distance(
-            DEPOT_LAT, DEPOT_LON,
-            stops[0]['lat'], stops[0]['lon']
-        )
-        total_distance_km += distance
-    
-    # Zwischen Kunden
-    for i in range(len(stops) - 1):
-        if stops[i].get('lat') and stops[i].get('lon') and stops[i+1].get('lat') and stops[i+1].get('lon'):
-            distance = haversine_distance(
-                stops[i]['lat'], stops[i]['lon'],
-                stops[i+1]['lat'], stops[i+1]['lon']
-            )
-            total_distance_km += distance
-    
-    # WICHTIG: Rückfahrt wird NICHT mitgezählt!
-    
-    # Konvertiere zu Zeit (mit Sicherheitsfaktor)
-    driving_time_minutes = (total_distance_km * SAFETY_FACTOR / SPEED_KMH) * 60
-    service_time_minutes = len(stops) * SERVICE_TIME_PER_STOP
-    
-    return driving_time_minutes + service_time_minutes
+    if evaluator is None:
+        evaluator = _timebox_evaluator(stops, use_osrm=use_osrm)
+    return evaluator.time_without_return(stops)
 
 
 # Timebox-Konstanten (DoD: 65/90 Minuten)
@@ -394,43 +353,13 @@ TIME_BUDGET_WITHOUT_RETURN = int(os.getenv("TIME_BUDGET_WITHOUT_RETURN", "65"))
 TIME_BUDGET_WITH_RETURN = int(os.getenv("TIME_BUDGET_WITH_RETURN", "90"))
 
 
-def _estimate_back_to_depot_minutes(last_stop: Dict) -> float:
-    """Schätzt Rückfahrtzeit vom letzten Stop zum Depot - verwendet OSRM wenn verfügbar"""
+def _estimate_back_to_depot_minutes(last_stop: Dict, evaluator: Optional[TimeboxEvaluator] = None) -> float:
+    """Schätzt Rückfahrtzeit vom letzten Stop zum Depot (aus der Dauer-Matrix der Tour)."""
     if not last_stop or not last_stop.get('lat') or not last_stop.get('lon'):
         return 0.0
-    
-    DEPOT_LAT = 51.0111988
-    DEPOT_LON = 13.7016485
-    
-    # Versuche OSRM wenn verfügbar
-    client = get_osrm_client()
-    if client.available:
-        try:
-            coords = [(last_stop['lat'], last_stop['lon']), (DEPOT_LAT, DEPOT_LON)]
-            # WICHTIG: Timeout hinzufügen um Blockierung zu verhindern
-            route = client.get_route(coords, timeout=5.0)
-            if route and route.get("source") == "osrm":
-                return route.get("duration_min", 0.0)
-        except Exception as e:
-            import logging
-            log_to_file(f"[RETURN-TIME] DEBUG: OSRM-Berechnung fehlgeschlagen: {e}, verwende Fallback")
-            _timebox_metrics["osrm_unavailable"] += 1
-    else:
-        _timebox_metrics["osrm_unavailable"] += 1
-    
-    # Fallback: Haversine × 1.3
-    import math
-    R = 6371.0  # Erdradius in km
-    lat1, lon1, lat2, lon2 = map(math.radians, [
-        last_stop['lat'], last_stop['lon'],
-        DEPOT_LAT, DEPOT_LON
-    ])
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-    distance_km = R * 2 * math.asin(math.sqrt(a)) * 1.3  # × 1.3 für Stadtverkehr
-    SPEED_KMH = 50.0
-    return (distance_km / SPEED_KMH) * 60
+    if evaluator is None:
+        evaluator = _timebox_evaluator([last_stop])
+    return evaluator.back_to_depot_minutes(last_stop)
 
 
 def materialize_tour(tour_name: str, stops: List[Dict], est_no_return: float, back_minutes: float) -> Dict:
@@ -448,7 +377,8 @@ def materialize_tour(tour_name: str, stops: List[Dict], est_no_return: float, ba
 def enforce_timebox(tour_name: str, stops: List[Dict], max_depth: int = 3) -> List[Dict]:
     """
     Validiert hart gegen 65/90 und splittet ggf. automatisch.
-    Nutzt OSRM Table (Fallback Haversine×1.3) + Servicezeiten.
+    Nutzt EINE OSRM-Table-Matrix pro Tour (Fallback Haversine×1.3) + Servicezeiten;
+    alle Split-Kandidaten werden im Speicher aus dieser Matrix bewertet.
     Rückgabe: Liste materialisierter Sub‑Touren.
     
     Args:
@@ -460,24 +390,27 @@ def enforce_timebox(tour_name: str, stops: List[Dict], max_depth: int = 3) -> Li
     if not stops:
         return []
     
+    # Einmalig: Dauer-Matrix Depot + alle Stopps
+    evaluator = _timebox_evaluator(stops)
+    
     if max_depth <= 0:
         # Rekursionstiefe erreicht → Tour trotzdem materialisieren (besser als Endlosschleife)
         log_to_file(f"[TIMEOBOX] WARNUNG: Max. Rekursionstiefe erreicht für '{tour_name}', materialisiere trotzdem")
-        est_no_return = _estimate_tour_time_without_return(stops, use_osrm=True)
+        est_no_return = _estimate_tour_time_without_return(stops, evaluator=evaluator)
         try:
             last_stop = stops[-1] if stops else None
-            back_minutes = _estimate_back_to_depot_minutes(last_stop) if last_stop else 0.0
+            back_minutes = _estimate_back_to_depot_minutes(last_stop, evaluator) if last_stop else 0.0
         except Exception:
             back_minutes = 0.0
         return [materialize_tour(tour_name, stops, est_no_return, back_minutes)]
     
     # Berechne Zeit OHNE Rückfahrt
-    est_no_return = _estimate_tour_time_without_return(stops, use_osrm=True)
+    est_no_return = _estimate_tour_time_without_return(stops, evaluator=evaluator)
     
     # Berechne Rückfahrt
     try:
         last_stop = stops[-1] if stops else None
-        back_minutes = _estimate_back_to_depot_minutes(last_stop) if last_stop else 0.0
+        back_minutes = _estimate_back_to_depot_minutes(last_stop, evaluator) if last_stop else 0.0
     except Exception as e:
         log_to_file(f"[TIMEOBOX] WARNUNG: Fehler bei Rückfahrtberechnung: {e}")
         back_minutes = 0.0
@@ -485,8 +418,8 @@ def enforce_timebox(tour_name: str, stops: List[Dict], max_depth: int = 3) -> Li
     # Prüfe gegen Limits
     if est_no_return > TIME_BUDGET_WITHOUT_RETURN or (est_no_return + back_minutes) > TIME_BUDGET_WITH_RETURN:
         # Telemetrie: Verletzung zählen
-        _timebox_metrics["timebox_violation_total"] += 1
-        _timebox_metrics["splits_performed"] += 1
+        _timebox_violations.inc()
+        _timebox_splits.inc()
         
         log_to_file(
             f"[TIMEOBOX] Timebox verletzt {est_no_return:.1f}/{est_no_return+back_minutes:.1f} → splitte '{tour_name}'"
@@ -494,7 +427,7 @@ def enforce_timebox(tour_name: str, stops: List[Dict], max_depth: int = 3) -> Li
         # Splitte automatisch
         # WICHTIG: _split_large_tour_in_workflow() validiert bereits intern rekursiv
         # Daher hier NICHT nochmal rekursiv validieren, um Rekursionstiefe zu vermeiden
-        split_tours = _split_large_tour_in_workflow(tour_name, stops, TIME_BUDGET_WITHOUT_RETURN)
+        split_tours = _split_large_tour_in_workflow(tour_name, stops, TIME_BUDGET_WITHOUT_RETURN, evaluator=evaluator)
         
         # Nur Materialisierung der bereits validierten Split-Touren
         validated_subs = []
@@ -503,10 +436,10 @@ def enforce_timebox(tour_name: str, stops: List[Dict], max_depth: int = 3) -> Li
             if sub_stops:
                 # Berechne Zeiten für Materialisierung (aber keine weitere Validierung/Splitting)
                 est_no_return = sub_tour.get("estimated_time_minutes", 
-                    _estimate_tour_time_without_return(sub_stops, use_osrm=True))
+                    _estimate_tour_time_without_return(sub_stops, evaluator=evaluator))
                 try:
                     last_stop = sub_stops[-1] if sub_stops else None
-                    back_minutes = _estimate_back_to_depot_minutes(last_stop) if last_stop else 0.0
+                    back_minutes = _estimate_back_to_depot_minutes(last_stop, evaluator) if last_stop else 0.0
                 except Exception:
                     back_minutes = 0.0
                 # Materialisiere ohne weitere Rekursion
@@ -517,12 +450,14 @@ def enforce_timebox(tour_name: str, stops: List[Dict], max_depth: int = 3) -> Li
     
     # Route ist OK → materialisiere
     tour_dict = materialize_tour(tour_name, stops, est_no_return, back_minutes)
-    # Telemetrie: Route-Zeit speichern (für Histogram)
-    _timebox_metrics["route_after_validation_minutes"].append(est_no_return)
+    # Telemetrie: Route-Zeit ins Histogramm (feste Buckets) und ins 1h-Fenster
+    _route_minutes.observe(est_no_return)
+    _route_minutes_recent.observe(est_no_return)
     return [tour_dict]
 
 
-def _split_large_tour_in_workflow(tour_name: str, stops: List[Dict], max_time_without_return: float, recursion_depth: int = 0) -> List[Dict]:
+def _split_large_tour_in_workflow(tour_name: str, stops: List[Dict], max_time_without_return: float, recursion_depth: int = 0,
+                                  evaluator: Optional[TimeboxEvaluator] = None) -> List[Dict]:
     """
     Splittet eine große Tour in mehrere separate Touren (A, B, C, D, E) basierend auf Zeit-Constraint.
     
@@ -530,20 +465,23 @@ def _split_large_tour_in_workflow(tour_name: str, stops: List[Dict], max_time_wi
     
     Args:
         recursion_depth: Aktuelle Rekursionstiefe (max. 10, verhindert Endlosschleifen)
+        evaluator: Dauer-Matrix der Gesamttour (wird an Rekursionen weitergereicht;
+                   ohne Angabe wird einmalig eine Matrix für `stops` geholt)
     """
     MAX_RECURSION_DEPTH = 10
     
     if len(stops) == 0:
         return []
     
+    if evaluator is None:
+        evaluator = _timebox_evaluator(stops)
+    
     # Schutz gegen Endlosschleifen
     if recursion_depth >= MAX_RECURSION_DEPTH:
         import logging
         log_to_file(f"[SPLIT] WARNUNG: Max. Rekursionstiefe erreicht für '{tour_name}', gebe Tour trotzdem zurück")
         # Berechne Zeit und gebe Tour zurück (auch wenn zu lang)
-        client = get_osrm_client()
-        use_osrm = client.available
-        final_time = _estimate_tour_time_without_return(stops, use_osrm=use_osrm)
+        final_time = _estimate_tour_time_without_return(stops, evaluator=evaluator)
         return [{
             "tour_id": tour_name,
             "stops": stops,
@@ -554,9 +492,7 @@ def _split_large_tour_in_workflow(tour_name: str, stops: List[Dict], max_time_wi
     
     # Wenn nur ein Stop übrig ist und dieser zu lang ist, gebe ihn trotzdem zurück
     if len(stops) == 1:
-        client = get_osrm_client()
-        use_osrm = client.available
-        single_stop_time = _estimate_tour_time_without_return(stops, use_osrm=use_osrm)
+        single_stop_time = _estimate_tour_time_without_return(stops, evaluator=evaluator)
         if single_stop_time > max_time_without_return:
             import logging
             log_to_file(f"[SPLIT] WARNUNG: Einzelner Stop '{tour_name}' überschreitet Limit ({single_stop_time:.1f} Min > {max_time_without_return:.1f} Min), gebe trotzdem zurück")
@@ -579,10 +515,6 @@ def _split_large_tour_in_workflow(tour_name: str, stops: List[Dict], max_time_wi
         # Keine Koordinaten → kann nicht splitten
         return [{"tour_id": tour_name, "stops": stops, "stop_count": len(stops)}]
     
-    # Verwende OSRM wenn verfügbar für bessere Genauigkeit
-    client = get_osrm_client()
-    use_osrm = client.available
-    
     split_tours = []
     current_route = []
     # Keine Buchstaben mehr nötig - jede Route ist automatisch eine separate Tour
@@ -590,7 +522,7 @@ def _split_large_tour_in_workflow(tour_name: str, stops: List[Dict], max_time_wi
     for stop in stops_with_coords:
         # Berechne geschätzte Zeit für Route MIT neuem Stop
         test_route = current_route + [stop]
-        estimated_time = _estimate_tour_time_without_return(test_route, use_osrm=use_osrm)
+        estimated_time = _estimate_tour_time_without_return(test_route, evaluator=evaluator)
         
         # Prüfe ob Stop in aktuelle Route passt (OHNE Rückfahrt!)
         if estimated_time <= max_time_without_return:
@@ -600,17 +532,18 @@ def _split_large_tour_in_workflow(tour_name: str, stops: List[Dict], max_time_wi
             # Zu groß → neue Route starten
             if current_route:
                 # Validiere aktuelle Route: Berechne exakte Zeit
-                final_time = _estimate_tour_time_without_return(current_route, use_osrm=use_osrm)
+                final_time = _estimate_tour_time_without_return(current_route, evaluator=evaluator)
                 
                 # Prüfe ob Route zu lang ist (OHNE Toleranz - muss exakt sein!)
                 if final_time > max_time_without_return:
-                    log_to_file(f"[WORKFLOW] Route {base_name} ist zu lang ({final_time:.1f} Min > {max_time_without_return:.1f} Min), teile weiter auf")
+                    log_to_file("[WORKFLOW] Route %s ist zu lang (%.1f Min > %.1f Min), teile weiter auf", base_name, final_time, max_time_without_return)
                     # Rekursiv weiter aufteilen (mit erhöhter Tiefe)
                     sub_tours = _split_large_tour_in_workflow(
                         base_name,
                         current_route,
                         max_time_without_return,
-                        recursion_depth=recursion_depth + 1
+                        recursion_depth=recursion_depth + 1,
+                        evaluator=evaluator
                     )
                     # Verwende Sub-Touren mit korrekten Namen
                     for idx, sub_tour in enumerate(sub_tours):
@@ -627,7 +560,7 @@ def _split_large_tour_in_workflow(tour_name: str, stops: List[Dict], max_time_wi
                         "stop_count": len(current_route),
                         "estimated_time_minutes": round(final_time, 1)
                     })
-                    log_to_file(f"[WORKFLOW] Route {new_tour_name} erstellt: {len(current_route)} Stopps, {final_time:.1f} Min")
+                    log_to_file("[WORKFLOW] Route %s erstellt: %s Stopps, %.1f Min", new_tour_name, len(current_route), final_time)
                 # Buchstaben nicht mehr nötig - jede Route ist automatisch eine separate Tour
             
             # Neue Route mit diesem Stop starten
@@ -637,18 +570,19 @@ def _split_large_tour_in_workflow(tour_name: str, stops: List[Dict], max_time_wi
     # WICHTIG: Die letzte Route kann sehr lang werden, wenn viele Stopps übrig bleiben!
     # Daher: IMMER prüfen und bei Bedarf weiter aufteilen
     if current_route:
-        final_time = _estimate_tour_time_without_return(current_route, use_osrm=use_osrm)
+        final_time = _estimate_tour_time_without_return(current_route, evaluator=evaluator)
         
-        log_to_file(f"[WORKFLOW] Letzte Route prüfen: {len(current_route)} Stopps, {final_time:.1f} Min (Limit: {max_time_without_return:.1f} Min)")
+        log_to_file("[WORKFLOW] Letzte Route prüfen: %s Stopps, %.1f Min (Limit: %.1f Min)", len(current_route), final_time, max_time_without_return)
         
         # Falls letzte Route zu lang ist, teile sie IMMER weiter auf (keine Toleranz!)
         if final_time > max_time_without_return:
-            log_to_file(f"[WORKFLOW] Letzte Route {base_name} ist zu lang ({final_time:.1f} Min > {max_time_without_return:.1f} Min), teile weiter auf")
+            log_to_file("[WORKFLOW] Letzte Route %s ist zu lang (%.1f Min > %.1f Min), teile weiter auf", base_name, final_time, max_time_without_return)
             sub_tours = _split_large_tour_in_workflow(
                 base_name,
                 current_route,
                 max_time_without_return,
-                recursion_depth=recursion_depth + 1
+                recursion_depth=recursion_depth + 1,
+                evaluator=evaluator
             )
             # Verwende Sub-Touren mit korrekten Namen
             for idx, sub_tour in enumerate(sub_tours):
@@ -665,7 +599,7 @@ def _split_large_tour_in_workflow(tour_name: str, stops: List[Dict], max_time_wi
                 "stop_count": len(current_route),
                 "estimated_time_minutes": round(final_time, 1)
             })
-            log_to_file(f"[WORKFLOW] Letzte Route {new_tour_name} OK: {final_time:.1f} Min")
+            log_to_file("[WORKFLOW] Letzte Route %s OK: %.1f Min", new_tour_name, final_time)
     
     # WICHTIG: Stopps OHNE Koordinaten müssen auch verteilt werden
     # Füge sie der ersten Route hinzu (als Warnung)
@@ -679,7 +613,7 @@ def _split_large_tour_in_workflow(tour_name: str, stops: List[Dict], max_time_wi
     validated_tours = []
     for tour in split_tours:
         # Berechne exakte Zeit für diese Route
-        final_time = _estimate_tour_time_without_return(tour["stops"], use_osrm=use_osrm)
+        final_time = _estimate_tour_time_without_return(tour["stops"], evaluator=evaluator)
         
         # Falls Route immer noch zu lang ist (sollte nicht passieren, aber Sicherheit)
         if final_time > max_time_without_return:
@@ -689,7 +623,8 @@ def _split_large_tour_in_workflow(tour_name: str, stops: List[Dict], max_time_wi
                 tour["tour_id"],
                 tour["stops"],
                 max_time_without_return,
-                recursion_depth=recursion_depth + 1
+                recursion_depth=recursion_depth + 1,
+                evaluator=evaluator
             )
             # Verwende Sub-Touren (OHNE Buchstaben, da Aufteilung automatisch ist)
             for idx, sub_tour in enumerate(sub_tours):
@@ -705,7 +640,7 @@ def _split_large_tour_in_workflow(tour_name: str, stops: List[Dict], max_time_wi
     if len(validated_tours) > 0:
         log_to_file(f"[WORKFLOW] Tour {tour_name} in {len(validated_tours)} Routen aufgeteilt:")
         for tour in validated_tours:
-            log_to_file(f"  - {tour['tour_id']}: {tour.get('stop_count', 0)} Stopps, {tour.get('estimated_time_minutes', 0):.1f} Min")
+            log_to_file("  - %s: %s Stopps, %.1f Min", tour['tour_id'], tour.get('stop_count', 0), tour.get('estimated_time_minutes', 0))
     
     return validated_tours if validated_tours else [{"tour_id": tour_name, "stops": stops, "stop_count": len(stops)}]
 
@@ -783,7 +718,7 @@ def _apply_sector_planning_to_w_tour(tour_name: str, stops_with_coords: List[Dic
         sector = stop_ws.sector.value
         stops_by_sector[sector].append(stop_ws)
     
-    log_to_file(f"[WORKFLOW] Sektorisierung abgeschlossen: N={len(stops_by_sector['N'])}, O={len(stops_by_sector['O'])}, S={len(stops_by_sector['S'])}, W={len(stops_by_sector['W'])}")
+    log_to_file("[WORKFLOW] Sektorisierung abgeschlossen: N=%s, O=%s, S=%s, W=%s", len(stops_by_sector['N']), len(stops_by_sector['O']), len(stops_by_sector['S']), len(stops_by_sector['W']))
     
     # Schritt 4: Planung pro Sektor (mit Zeitbox 07:00 → 09:00)
     from services.sector_planner import SectorPlanParams
@@ -885,7 +820,7 @@ def _apply_sector_planning_to_w_tour(tour_name: str, stops_with_coords: List[Dic
                 })
                 
                 status_icon = "✅" if is_validated else "⚠️"
-                log_to_file(f"{status_icon} [WORKFLOW] Sektor-Route erstellt: {tour_name_final} ({sector_names[sector]}, {len(tour_stops)} Stopps, {route.total_time_minutes:.1f} Min OHNE Rückfahrt, {total_with_return:.1f} Min INKL. Rückfahrt)")
+                log_to_file("%s [WORKFLOW] Sektor-Route erstellt: %s (%s, %s Stopps, %.1f Min OHNE Rückfahrt, %.1f Min INKL. Rückfahrt)", status_icon, tour_name_final, sector_names[sector], len(tour_stops), route.total_time_minutes, total_with_return)
         
         except Exception as e:
             log_to_file(f"[WORKFLOW] Fehler bei Planung für Sektor {sector}: {e}")
@@ -977,7 +912,7 @@ def _apply_pirna_clustering_to_tour(tour_name: str, stops_with_coords: List[Dict
     if not clusters:
         return []
     
-    log_to_file(f"[WORKFLOW] PIRNA-Clustering abgeschlossen: {len(stops_for_clusterer)} Stopps → {len(clusters)} Cluster")
+    log_to_file("[WORKFLOW] PIRNA-Clustering abgeschlossen: %s Stopps → %s Cluster", len(stops_for_clusterer), len(clusters))
     
     # Schritt 3: Konvertiere Cluster zu Tour-Format
     clustered_tours = []
@@ -1009,11 +944,12 @@ def _apply_pirna_clustering_to_tour(tour_name: str, stops_with_coords: List[Dict
             "is_clustered_route": True  # Flag für Frontend
         })
         
-        log_to_file(f"[WORKFLOW] PIRNA-Cluster-Route erstellt: {cluster_tour_name} ({len(tour_stops)} Stopps, {cluster.estimated_time_minutes:.1f} Min)")
+        log_to_file("[WORKFLOW] PIRNA-Cluster-Route erstellt: %s (%s Stopps, %.1f Min)", cluster_tour_name, len(tour_stops), cluster.estimated_time_minutes)
     
     return clustered_tours
 
 
+@traced("solve")
 def optimize_tour_stops(stops, use_llm: bool = True):
     """Optimiert die Reihenfolge der Stops in einer Tour"""
     if not stops or len(stops) <= 1:
@@ -1225,45 +1161,62 @@ async def complete_workflow(
 async def get_geocoding_progress(session_id: str):
     """
     Liefert den aktuellen Geocoding-Progress für eine Session.
+    
+    Kompatibilitäts-Endpoint für Polling; Live-Updates über
+    /api/progress/{session_id}/events (SSE/NDJSON) oder /api/workflow/upload?stream=ndjson.
     """
-    progress = _geocoding_progress.get(session_id, {
-        "total": 0,
-        "processed": 0,
-        "current": "",
-        "status": "idle"
-    })
-    return JSONResponse(progress)
+    session = get_progress_hub().get(session_id)
+    if session is None:
+        return JSONResponse({"total": 0, "processed": 0, "current": "", "status": "idle"})
+    return JSONResponse(session.state)
 
 @router.post("/api/workflow/upload")
-async def workflow_upload(file: UploadFile = File(...)):
+async def workflow_upload(
+    request: Request,
+    file: UploadFile = File(...),
+    stream: Optional[str] = Query(None, description="ndjson oder sse: Fortschritt und Ergebnis als Stream"),
+    priority: int = Query(0, description="Job-Priorität (höher = früher)"),
+    force: bool = Query(False, description="Gecachtes Ergebnis für identische Datei ignorieren"),
+):
     """
     Workflow mit Upload-Datei
     
-    Verarbeitet eine hochgeladene CSV-Datei und führt den kompletten Workflow durch.
-    Zeigt Live-Progress beim Geocoding.
+    Verarbeitet eine hochgeladene CSV-Datei und führt den kompletten Workflow als
+    Hintergrund-Job durch (Job-ID = Progress-Session). Dieselbe Datei erneut
+    hochzuladen liefert das gecachte Ergebnis bzw. den laufenden Job.
+    - ?stream=ndjson|sse: Antwort ist ein Event-Stream (progress, partial=fertige Tour,
+      result=bisherige JSON-Antwort, done) – funktioniert auch mit mehreren Workern
+    - Prefer: respond-async bzw. ?async=1: sofort 202 mit Job-ID (/api/jobs/{id})
+    - sonst: klassische JSON-Antwort (Header X-Job-Id, X-Job-Cached)
     """
-    # Session-ID für Progress-Tracking
-    session_id = str(uuid.uuid4())
-    _geocoding_progress[session_id] = {
-        "total": 0,
-        "processed": 0,
-        "current": "",
-        "status": "parsing",
-        "db_hits": 0,
-        "geoapify_calls": 0,
-        "errors": 0
-    }
-    
+    mode = response_mode(request, stream)
+    content = await file.read()
+    job = get_job_runner().submit(
+        "workflow_upload", payload=content, params={"filename": file.filename},
+        priority=priority, force=force,
+    )
+    return await job_response(job, mode)
+
+
+async def _workflow_upload_job(ctx: JobContext):
+    """Job-Handler: Workflow für eine hochgeladene Datei."""
+    ctx.progress.update(total=0, processed=0, current="", status="parsing", db_hits=0, geoapify_calls=0, errors=0)
+    return await _run_workflow_upload(ctx.params.get("filename"), ctx.payload, ctx.progress)
+
+
+register_job("workflow_upload", _workflow_upload_job, executor="thread")
+
+
+async def _run_workflow_upload(filename: Optional[str], content: bytes, progress: ProgressSession):
+    """Workflow für den Inhalt einer hochgeladenen Datei (meldet Fortschritt an `progress`)."""
+    session_id = progress.session_id
     try:
-        if not file.filename:
+        if not filename:
             raise HTTPException(400, detail="Kein Dateiname angegeben")
         
-        if not file.filename.lower().endswith('.csv'):
+        if not filename.lower().endswith('.csv'):
             raise HTTPException(400, detail="Nur CSV-Dateien werden unterstützt")
         
-        # Datei lesen
-        content = await file.read()
-        
         # Prüfe ob TEHA-Format (Tourenübersicht/Lieferdatum Header)
         content_str = content.decode('utf-8-sig', errors='replace')[:2000]
         is_teha_format = (
@@ -1278,138 +1231,144 @@ async def workflow_upload(file: UploadFile = File(...)):
             from pathlib import Path
             import os
             import time
-            import logging
-            log_to_file(f"[WORKFLOW] TEHA-Format erkannt, Datei: {file.filename}")
+            log_to_file(f"[WORKFLOW] TEHA-Format erkannt, Datei: {filename}")
             
             # Temporäre Datei für Parser (auf Windows: robuste Datei-Handhabung)
             tmp_path = None
             try:
-                # Erstelle temporäre Datei im staging-Verzeichnis (absoluter Pfad)
+                # Parse-Cache: identischer Upload (gleiche Bytes) → kein Dekodieren, keine Staging-Datei, kein Parsing
                 staging_dir_env = os.getenv("STAGING_DIR", "./data/staging")
                 staging_dir = Path(staging_dir_env).resolve()
-                staging_dir.mkdir(parents=True, exist_ok=True)
-                
-                # Eindeutiger Dateiname (ohne Sonderzeichen, die Probleme verursachen könnten)
-                timestamp = int(time.time() * 1000)
-                safe_filename = re.sub(r'[<>:"/\\|?*]', '_', file.filename)  # Ersetze gefährliche Zeichen
-                # WICHTIG: Kürze Dateiname falls zu lang (Windows MAX_PATH = 260 Zeichen)
-                # Berücksichtige: staging_dir + "workflow_temp_" + timestamp + "_" + filename
-                max_filename_length = 100  # Max. 100 Zeichen für Dateinamen
-                if len(safe_filename) > max_filename_length:
-                    name_part = safe_filename[:max_filename_length-4]  # Platz für ".csv"
-                    ext = safe_filename[-4:] if safe_filename.endswith('.csv') else '.csv'
-                    safe_filename = name_part + ext
-                    log_to_file(f"[WORKFLOW] WARNUNG: Dateiname gekürzt auf {max_filename_length} Zeichen: {safe_filename}")
-                tmp_filename = f"workflow_temp_{timestamp}_{safe_filename}"
-                tmp_path = staging_dir / tmp_filename
+                cached_plan = cached_tour_plan(content, filename, staging="staging" in str(staging_dir).lower())
+                if cached_plan is not None:
+                    tour_data = tour_plan_to_dict(cached_plan)
+                    log_to_file(f"[WORKFLOW] ✅ Parse-Cache-Treffer: {len(tour_data.get('tours', []))} Touren, "
+                                f"{sum(len(t.get('customers', [])) for t in tour_data.get('tours', []))} Kunden (ohne Parsing)")
+                else:
+                    # Erstelle temporäre Datei im staging-Verzeichnis (absoluter Pfad)
+                    staging_dir.mkdir(parents=True, exist_ok=True)
                 
-                # Prüfe Gesamt-Pfad-Länge (Windows MAX_PATH = 260 Zeichen)
-                tmp_path_str = str(tmp_path.resolve())
-                if len(tmp_path_str) > 260:
-                    log_to_file(f"[WORKFLOW] WARNUNG: Pfad zu lang ({len(tmp_path_str)} Zeichen): {tmp_path_str[:100]}...")
-                    # Kürze Dateinamen noch mehr falls nötig
-                    max_safe_length = 50
-                    if len(safe_filename) > max_safe_length:
-                        name_part = safe_filename[:max_safe_length-4]
+                    # Eindeutiger Dateiname (ohne Sonderzeichen, die Probleme verursachen könnten)
+                    timestamp = int(time.time() * 1000)
+                    safe_filename = re.sub(r'[<>:"/\\|?*]', '_', filename)  # Ersetze gefährliche Zeichen
+                    # WICHTIG: Kürze Dateiname falls zu lang (Windows MAX_PATH = 260 Zeichen)
+                    # Berücksichtige: staging_dir + "workflow_temp_" + timestamp + "_" + filename
+                    max_filename_length = 100  # Max. 100 Zeichen für Dateinamen
+                    if len(safe_filename) > max_filename_length:
+                        name_part = safe_filename[:max_filename_length-4]  # Platz für ".csv"
                         ext = safe_filename[-4:] if safe_filename.endswith('.csv') else '.csv'
                         safe_filename = name_part + ext
-                        tmp_filename = f"workflow_temp_{timestamp}_{safe_filename}"
-                        tmp_path = staging_dir / tmp_filename
-                        log_to_file(f"[WORKFLOW] Dateiname weiter gekürzt auf {max_safe_length} Zeichen")
+                        log_to_file(f"[WORKFLOW] WARNUNG: Dateiname gekürzt auf {max_filename_length} Zeichen: {safe_filename}")
+                    tmp_filename = f"workflow_temp_{timestamp}_{safe_filename}"
+                    tmp_path = staging_dir / tmp_filename
                 
-                # Schreibe Datei mit explizitem Flush und Schließen
-                try:
-                    file_handle = None
+                    # Prüfe Gesamt-Pfad-Länge (Windows MAX_PATH = 260 Zeichen)
+                    tmp_path_str = str(tmp_path.resolve())
+                    if len(tmp_path_str) > 260:
+                        log_to_file(f"[WORKFLOW] WARNUNG: Pfad zu lang ({len(tmp_path_str)} Zeichen): {tmp_path_str[:100]}...")
+                        # Kürze Dateinamen noch mehr falls nötig
+                        max_safe_length = 50
+                        if len(safe_filename) > max_safe_length:
+                            name_part = safe_filename[:max_safe_length-4]
+                            ext = safe_filename[-4:] if safe_filename.endswith('.csv') else '.csv'
+                            safe_filename = name_part + ext
+                            tmp_filename = f"workflow_temp_{timestamp}_{safe_filename}"
+                            tmp_path = staging_dir / tmp_filename
+                            log_to_file(f"[WORKFLOW] Dateiname weiter gekürzt auf {max_safe_length} Zeichen")
+                
+                    # Schreibe Datei mit explizitem Flush und Schließen
                     try:
-                        file_handle = open(tmp_path, 'wb')
-                        file_handle.write(content)
-                        file_handle.flush()  # Zwinge Write zum Disk
-                        # os.fsync() kann Errno 22 werfen bei ungültigen Pfaden/Dateinamen → optional
+                        file_handle = None
                         try:
-                            os.fsync(file_handle.fileno())  # Synchronisiere mit Filesystem
-                        except OSError as fsync_error:
-                            # Errno 22: Invalid argument (z.B. zu langer Pfad, ungültige Zeichen)
-                            log_to_file(f"[WORKFLOW] WARNUNG: os.fsync() fehlgeschlagen (nicht kritisch): {fsync_error}")
-                            # Datei wurde trotzdem geschrieben (flush() reicht)
-                    finally:
-                        if file_handle:
-                            file_handle.close()
-                            file_handle = None  # Explizit auf None setzen
+                            file_handle = open(tmp_path, 'wb')
+                            file_handle.write(content)
+                            file_handle.flush()  # Zwinge Write zum Disk
+                            # os.fsync() kann Errno 22 werfen bei ungültigen Pfaden/Dateinamen → optional
+                            try:
+                                os.fsync(file_handle.fileno())  # Synchronisiere mit Filesystem
+                            except OSError as fsync_error:
+                                # Errno 22: Invalid argument (z.B. zu langer Pfad, ungültige Zeichen)
+                                log_to_file(f"[WORKFLOW] WARNUNG: os.fsync() fehlgeschlagen (nicht kritisch): {fsync_error}")
+                                # Datei wurde trotzdem geschrieben (flush() reicht)
+                        finally:
+                            if file_handle:
+                                file_handle.close()
+                                file_handle = None  # Explizit auf None setzen
                     
-                    # WICHTIG: Warte, damit Windows das File-Handle sicher freigibt
-                    time.sleep(0.2)
-                except Exception as write_error:
-                    # Fallback: Verwende System-Temp-Verzeichnis
-                    import tempfile as tf
-                    temp_dir = Path(tf.gettempdir())
-                    tmp_path = temp_dir / tmp_filename
-                    log_to_file(f"[WORKFLOW] WARNUNG: Staging-Verzeichnis Fehler, verwende Temp: {write_error}")
+                        # WICHTIG: Warte, damit Windows das File-Handle sicher freigibt
+                        time.sleep(0.2)
+                    except Exception as write_error:
+                        # Fallback: Verwende System-Temp-Verzeichnis
+                        import tempfile as tf
+                        temp_dir = Path(tf.gettempdir())
+                        tmp_path = temp_dir / tmp_filename
+                        log_to_file(f"[WORKFLOW] WARNUNG: Staging-Verzeichnis Fehler, verwende Temp: {write_error}")
                     
-                    file_handle = None
-                    try:
-                        file_handle = open(tmp_path, 'wb')
-                        file_handle.write(content)
-                        file_handle.flush()
-                        # os.fsync() kann Errno 22 werfen bei ungültigen Pfaden/Dateinamen → optional
+                        file_handle = None
                         try:
-                            os.fsync(file_handle.fileno())
-                        except OSError as fsync_error:
-                            # Errno 22: Invalid argument (z.B. zu langer Pfad, ungültige Zeichen)
-                            log_to_file(f"[WORKFLOW] WARNUNG: os.fsync() fehlgeschlagen (nicht kritisch): {fsync_error}")
-                            # Datei wurde trotzdem geschrieben (flush() reicht)
-                    finally:
-                        if file_handle:
-                            file_handle.close()
-                            file_handle = None
-                    time.sleep(0.2)
+                            file_handle = open(tmp_path, 'wb')
+                            file_handle.write(content)
+                            file_handle.flush()
+                            # os.fsync() kann Errno 22 werfen bei ungültigen Pfaden/Dateinamen → optional
+                            try:
+                                os.fsync(file_handle.fileno())
+                            except OSError as fsync_error:
+                                # Errno 22: Invalid argument (z.B. zu langer Pfad, ungültige Zeichen)
+                                log_to_file(f"[WORKFLOW] WARNUNG: os.fsync() fehlgeschlagen (nicht kritisch): {fsync_error}")
+                                # Datei wurde trotzdem geschrieben (flush() reicht)
+                        finally:
+                            if file_handle:
+                                file_handle.close()
+                                file_handle = None
+                        time.sleep(0.2)
                 
-                # Prüfe ob Datei existiert und lesbar ist
-                if not tmp_path.exists():
-                    raise Exception(f"Temporäre Datei konnte nicht erstellt werden: {tmp_path}")
+                    # Prüfe ob Datei existiert und lesbar ist
+                    if not tmp_path.exists():
+                        raise Exception(f"Temporäre Datei konnte nicht erstellt werden: {tmp_path}")
                 
-                # Versuche Datei mehrmals zu öffnen (Test ob sie nicht gesperrt ist)
-                max_attempts = 5
-                for attempt in range(max_attempts):
-                    try:
-                        test_handle = open(tmp_path, 'rb')
-                        test_handle.read(1)  # Lese ein Byte
-                        test_handle.close()
-                        break  # Erfolgreich geöffnet
-                    except (PermissionError, OSError) as e:
-                        if attempt < max_attempts - 1:
-                            time.sleep(0.3)  # Warte länger bei jedem Versuch
-                        else:
-                            # Beim letzten Versuch: Fehler werfen
-                            raise Exception(f"Datei konnte nach {max_attempts} Versuchen nicht geöffnet werden: {tmp_path}. Fehler: {e}")
+                    # Versuche Datei mehrmals zu öffnen (Test ob sie nicht gesperrt ist)
+                    max_attempts = 5
+                    for attempt in range(max_attempts):
+                        try:
+                            test_handle = open(tmp_path, 'rb')
+                            test_handle.read(1)  # Lese ein Byte
+                            test_handle.close()
+                            break  # Erfolgreich geöffnet
+                        except (PermissionError, OSError) as e:
+                            if attempt < max_attempts - 1:
+                                time.sleep(0.3)  # Warte länger bei jedem Versuch
+                            else:
+                                # Beim letzten Versuch: Fehler werfen
+                                raise Exception(f"Datei konnte nach {max_attempts} Versuchen nicht geöffnet werden: {tmp_path}. Fehler: {e}")
                 
-                # Pfad als String normalisieren (absolute Pfad für Windows, aber ohne Long-Path-Präfix)
-                tmp_path_absolute = tmp_path.resolve()
-                tmp_path_str = str(tmp_path_absolute)
-                # Falls Long-Path-Präfix vorhanden, entferne es
-                if tmp_path_str.startswith('\\\\?\\'):
-                    tmp_path_str = tmp_path_str[4:]
+                    # Pfad als String normalisieren (absolute Pfad für Windows, aber ohne Long-Path-Präfix)
+                    tmp_path_absolute = tmp_path.resolve()
+                    tmp_path_str = str(tmp_path_absolute)
+                    # Falls Long-Path-Präfix vorhanden, entferne es
+                    if tmp_path_str.startswith('\\\\?\\'):
+                        tmp_path_str = tmp_path_str[4:]
                 
-                # Verwende bestehenden TEHA-Parser
-                try:
-                    tour_data = parse_tour_plan_to_dict(tmp_path_str)
-                    total_tours_parsed = len(tour_data.get('tours', []))
-                    total_customers_parsed = sum(len(tour.get('customers', [])) for tour in tour_data.get('tours', []))
-                    log_to_file(f"[WORKFLOW] ✅ Parser erfolgreich: {total_tours_parsed} Touren, {total_customers_parsed} Kunden gefunden")
+                    # Verwende bestehenden TEHA-Parser
+                    try:
+                        tour_data = parse_tour_plan_to_dict(tmp_path_str)
+                        total_tours_parsed = len(tour_data.get('tours', []))
+                        total_customers_parsed = sum(len(tour.get('customers', [])) for tour in tour_data.get('tours', []))
+                        log_to_file(f"[WORKFLOW] ✅ Parser erfolgreich: {total_tours_parsed} Touren, {total_customers_parsed} Kunden gefunden")
                     
-                    # Zeige Tour-Namen für Debugging
-                    tour_names = [tour.get('name', 'Unbekannt') for tour in tour_data.get('tours', [])]
-                    if tour_names:
-                        log_to_file(f"[WORKFLOW] Gefundene Touren: {', '.join(tour_names[:10])}{'...' if len(tour_names) > 10 else ''}")
-                    else:
-                        log_to_file(f"[WORKFLOW] ⚠️ WARNUNG: Parser hat keine Touren gefunden in {file.filename}")
-                        errors.append(f"Parser hat keine Touren in der CSV-Datei gefunden. Bitte Datei prüfen.")
-                except Exception as parse_error:
-                    import traceback
-                    error_trace = traceback.format_exc()
-                    log_to_file(f"[WORKFLOW] ❌ FEHLER: Parser-Fehler für {tmp_path_str}: {parse_error}")
-                    log_to_file(f"[WORKFLOW] Traceback: {error_trace}")
-                    errors.append(f"Parser-Fehler: {str(parse_error)}")
-                    raise Exception(f"Parser-Fehler: {str(parse_error)}. Datei: {tmp_path_str}")
+                        # Zeige Tour-Namen für Debugging
+                        tour_names = [tour.get('name', 'Unbekannt') for tour in tour_data.get('tours', [])]
+                        if tour_names:
+                            log_to_file(f"[WORKFLOW] Gefundene Touren: {', '.join(tour_names[:10])}{'...' if len(tour_names) > 10 else ''}")
+                        else:
+                            log_to_file(f"[WORKFLOW] ⚠️ WARNUNG: Parser hat keine Touren gefunden in {filename}")
+                            errors.append(f"Parser hat keine Touren in der CSV-Datei gefunden. Bitte Datei prüfen.")
+                    except Exception as parse_error:
+                        import traceback
+                        error_trace = traceback.format_exc()
+                        log_to_file(f"[WORKFLOW] ❌ FEHLER: Parser-Fehler für {tmp_path_str}: {parse_error}")
+                        log_to_file(f"[WORKFLOW] Traceback: {error_trace}")
+                        errors.append(f"Parser-Fehler: {str(parse_error)}")
+                        raise Exception(f"Parser-Fehler: {str(parse_error)}. Datei: {tmp_path_str}")
                 
                 # Geocode fehlende Adressen
                 ok_count = 0
@@ -1422,8 +1381,17 @@ async def workflow_upload(file: UploadFile = File(...)):
                 
                 # Berechne Gesamtanzahl für Progress-Tracking
                 total_customers = sum(len(tour.get('customers', [])) for tour in tour_data.get('tours', []))
-                _geocoding_progress[session_id]["total"] = total_customers
-                _geocoding_progress[session_id]["status"] = "geocoding"
+                progress.update(total=total_customers, status="geocoding")
+                
+                # geo_cache für alle Kunden in einem Roundtrip laden statt geo_get() pro Kunde
+                upload_keys = [
+                    normalize_address(_customer_address(customer))
+                    for tour in tour_data.get('tours', [])
+                    if should_process_tour_workflow(tour.get('name', 'Unbekannt'))
+                    for customer in tour.get('customers', [])
+                    if _customer_address(customer)
+                ]
+                cached_geo = {k: f.geo for k, f in resolve_batch(upload_keys).items() if f.geo}
                 
                 processed_count = 0
                 
@@ -1437,7 +1405,7 @@ async def workflow_upload(file: UploadFile = File(...)):
                         # Prüfe BEVOR wir die Tour verarbeiten (früh aussteigen spart Zeit)
                         tour_name = tour.get('name', 'Unbekannt')
                         if not should_process_tour_workflow(tour_name):
-                            log_to_file(f"[WORKFLOW] Tour '{tour_name}' übersprungen (nur W-Touren und Pir-Anlief werden verarbeitet)")
+                            log_to_file("[WORKFLOW] Tour '%s' übersprungen (nur W-Touren und Pir-Anlief werden verarbeitet)", tour_name, level=logging.DEBUG)
                             warnings.append(f"Tour '{tour_name}' wurde durch Workflow-Filter entfernt (nur W-Touren und Pir-Anlief werden verarbeitet)")
                             continue  # Überspringe diese Tour - weiter mit nächster
                         
@@ -1448,8 +1416,7 @@ async def workflow_upload(file: UploadFile = File(...)):
                         for customer in customers:
                             processed_count += 1
                             customer_name = customer.get('name', 'Unbekannt')
-                            _geocoding_progress[session_id]["processed"] = processed_count
-                            _geocoding_progress[session_id]["current"] = f"Verarbeite: {customer_name} ({processed_count}/{total_customers})"
+                            progress.update(processed=processed_count, current=f"Verarbeite: {customer_name} ({processed_count}/{total_customers})")
                             # Prüfe ob Koordinaten bereits vorhanden sind (z.B. aus Synonymen im Parser)
                             # Prüfe auf Koordinaten (aus Synonymen oder bereits vorhanden)
                             has_coords = bool(customer.get('lat') and customer.get('lon'))
@@ -1457,21 +1424,15 @@ async def workflow_upload(file: UploadFile = File(...)):
                             
                             if has_coords:
                                 # Koordinaten bereits vorhanden (z.B. aus Synonymen im Parser)
-                                log_to_file(f"[WORKFLOW] Kunde {customer.get('name', '?')} hat bereits Koordinaten: lat={customer.get('lat')}, lon={customer.get('lon')}")
+                                log_to_file("[WORKFLOW] Kunde %s hat bereits Koordinaten: lat=%s, lon=%s", customer.get('name', '?'), customer.get('lat'), customer.get('lon'), level=logging.DEBUG)
                                 # Koordinaten bereits vorhanden (z.B. aus Synonymen) → direkt verwenden
                                 # Aber: Speichere auch in geo_cache für zukünftige Verwendung
-                                address = customer.get('address', '')
-                                if not address:
-                                    street = customer.get('street', '').strip()
-                                    postal_code = customer.get('postal_code', '').strip()
-                                    city = customer.get('city', '').strip()
-                                    if street or postal_code or city:
-                                        address = ", ".join(filter(None, [street, f"{postal_code} {city}".strip()]))
+                                address = _customer_address(customer)
                                 
                                 if address:
                                     # Prüfe ob bereits in geo_cache, wenn nicht: speichere
-                                    existing = geo_get(address)
-                                    if not existing:
+                                    address_key = normalize_address(address)
+                                    if address_key not in cached_geo:
                                         lat = float(customer.get('lat'))
                                         lon = float(customer.get('lon'))
                                         geo_upsert(
@@ -1481,24 +1442,19 @@ async def workflow_upload(file: UploadFile = File(...)):
                                             source="synonym",  # Markiere als Synonym-basiert
                                             company_name=customer.get('name')
                                         )
-                                        log_to_file(f"[GEOCODE] Synonym-Koordinaten in geo_cache gespeichert: {address} -> ({lat}, {lon})")
+                                        cached_geo[address_key] = {"lat": lat, "lon": lon}
+                                        log_to_file("[GEOCODE] Synonym-Koordinaten in geo_cache gespeichert: %s -> (%s, %s)", address, lat, lon, level=logging.DEBUG)
                                 
                                 ok_count += 1
-                                _geocoding_progress[session_id]["db_hits"] = _geocoding_progress[session_id].get("db_hits", 0) + 1
+                                progress.incr("db_hits")
                             elif not has_coords:
                                 # Versuche Geocoding
-                                address = customer.get('address', '')
-                                if not address:
-                                    # Baue Adresse aus Street/PLZ/City
-                                    street = customer.get('street', '').strip()
-                                    postal_code = customer.get('postal_code', '').strip()
-                                    city = customer.get('city', '').strip()
-                                    if street or postal_code or city:
-                                        address = ", ".join(filter(None, [street, f"{postal_code} {city}".strip()]))
+                                address = _customer_address(customer)
                                 
                                 if address:
-                                    # SCHRITT 1: Zuerst DB prüfen (schnell)
-                                    geo_result = geo_get(address)
+                                    # SCHRITT 1: Zuerst DB prüfen (vorab per resolve_batch geladen)
+                                    address_key = normalize_address(address)
+                                    geo_result = cached_geo.get(address_key)
                                     
                                     if geo_result:
                                         # In DB gefunden → direkt verwenden
@@ -1506,17 +1462,17 @@ async def workflow_upload(file: UploadFile = File(...)):
                                         customer['lon'] = geo_result['lon']
                                         ok_count += 1
                                         has_coords = True
-                                        _geocoding_progress[session_id]["db_hits"] = _geocoding_progress[session_id].get("db_hits", 0) + 1
-                                        log_to_file(f"[GEOCODE] OK DB-Hit: {address} -> ({geo_result['lat']}, {geo_result['lon']})")
+                                        progress.incr("db_hits")
+                                        log_to_file("[GEOCODE] OK DB-Hit: %s -> (%s, %s)", address, geo_result['lat'], geo_result['lon'], level=logging.DEBUG)
                                     else:
                                         # Nicht in DB → Asynchrones Geocoding aufrufen (live während Upload)
-                                        _geocoding_progress[session_id]["current"] = f"Geoapify: {customer_name} ({processed_count}/{total_customers})"
-                                        log_to_file(f"[GEOCODE] DB-Miss: {address}, rufe Geoapify auf...")
+                                        progress.update(current=f"Geoapify: {customer_name} ({processed_count}/{total_customers})")
+                                        log_to_file("[GEOCODE] DB-Miss: %s, rufe Geoapify auf...", address, level=logging.DEBUG)
                                         
                                         try:
                                             # Asynchrones Geocoding (nicht blockierend!)
                                             geo_result = await _geocode_one(address, geocode_client, company_name=customer.get('name'))
-                                            _geocoding_progress[session_id]["geoapify_calls"] = _geocoding_progress[session_id].get("geoapify_calls", 0) + 1
+                                            progress.incr("geoapify_calls")
                                             
                                             if geo_result and geo_result.get('lat') and geo_result.get('lon'):
                                                 # Geocoding erfolgreich → Koordinaten extrahieren
@@ -1525,8 +1481,7 @@ async def workflow_upload(file: UploadFile = File(...)):
                                                 lon = float(geo_result['lon']) if isinstance(geo_result['lon'], str) else geo_result['lon']
                                                 
                                                 # Zusätzlich in geo_cache speichern (falls noch nicht geschehen)
-                                                existing = geo_get(address)
-                                                if not existing:
+                                                if address_key not in cached_geo:
                                                     geo_upsert(
                                                         address=address,
                                                         lat=lat,
@@ -1534,29 +1489,30 @@ async def workflow_upload(file: UploadFile = File(...)):
                                                         source="geoapify",
                                                         company_name=customer.get('name')
                                                     )
+                                                    cached_geo[address_key] = {"lat": lat, "lon": lon}
                                                 
                                                 customer['lat'] = lat
                                                 customer['lon'] = lon
                                                 ok_count += 1
                                                 has_coords = True
-                                                _geocoding_progress[session_id]["current"] = f"Gespeichert: {customer_name} ({processed_count}/{total_customers})"
-                                                log_to_file(f"[GEOCODE] OK Geoapify + DB-Save: {address} -> ({lat}, {lon})")
+                                                progress.update(current=f"Gespeichert: {customer_name} ({processed_count}/{total_customers})")
+                                                log_to_file("[GEOCODE] OK Geoapify + DB-Save: %s -> (%s, %s)", address, lat, lon, level=logging.DEBUG)
                                             else:
                                                 # Geocoding fehlgeschlagen
                                                 warn_count += 1
-                                                _geocoding_progress[session_id]["errors"] = _geocoding_progress[session_id].get("errors", 0) + 1
+                                                progress.incr("errors")
                                                 warning_message = f"Keine Koordinaten für {customer.get('name', 'Unbekannt')} - {address}"
                                                 warnings.append(warning_message)
-                                                _geocoding_progress[session_id]["current"] = f"Fehler: {customer_name} ({processed_count}/{total_customers})"
+                                                progress.update(current=f"Fehler: {customer_name} ({processed_count}/{total_customers})")
                                                 log_to_file(f"[GEOCODE] FEHLER: Fehlgeschlagen für Adresse: '{address}' (Kunde: {customer_name})")
                                                 # WICHTIG: Kunde wird trotzdem hinzugefügt (ohne Koordinaten), damit Tour erstellt wird
                                         except Exception as geocode_error:
                                             # Fehler beim Geocoding
                                             warn_count += 1
-                                            _geocoding_progress[session_id]["errors"] = _geocoding_progress[session_id].get("errors", 0) + 1
+                                            progress.incr("errors")
                                             warning_message = f"Geocoding-Fehler für {customer.get('name', 'Unbekannt')} - {address}: {str(geocode_error)}"
                                             warnings.append(warning_message)
-                                            _geocoding_progress[session_id]["current"] = f"Fehler: {customer_name} ({processed_count}/{total_customers})"
+                                            progress.update(current=f"Fehler: {customer_name} ({processed_count}/{total_customers})")
                                             log_to_file(f"[GEOCODE] EXCEPTION: Fehler beim Geocoding für '{address}' (Kunde: {customer_name}): {geocode_error}")
                                             # WICHTIG: Kunde wird trotzdem hinzugefügt (ohne Koordinaten), damit Tour erstellt wird
                                 else:
@@ -1604,7 +1560,8 @@ async def workflow_upload(file: UploadFile = File(...)):
                                 "_route_index": route_index  # Eindeutiger Index für Farbzuweisung
                             }
                             optimized_tours.append(tour_dict)
-                            log_to_file(f"[WORKFLOW] Tour {tour_name} zusammengefasst: {len(all_customers_for_tour)} Kunden (Aufteilung erfolgt bei Optimierung), Route-Index: {route_index}")
+                            progress.partial("tour", tour_dict)  # Karte kann sofort zeichnen
+                            log_to_file("[WORKFLOW] Tour %s zusammengefasst: %s Kunden (Aufteilung erfolgt bei Optimierung), Route-Index: %s", tour_name, len(all_customers_for_tour), route_index)
                         else:
                             # ANLIEF-Touren können auch mit 0 Kunden existieren (z.B. wenn nur Kommentar)
                             if 'Anlief' in tour_name or 'Anlief.' in tour_name:
@@ -1627,8 +1584,7 @@ async def workflow_upload(file: UploadFile = File(...)):
                     consolidated_info = ""
                 
                 # Progress abschließen
-                _geocoding_progress[session_id]["status"] = "completed"
-                _geocoding_progress[session_id]["current"] = f"Fertig! {ok_count} OK, {warn_count} Warn"
+                progress.update(status="completed", current=f"Fertig! {ok_count} OK, {warn_count} Warn")
                 
                 # ✅ FILTER: Ignorierte Touren aus der Antwort entfernen (werden nicht angezeigt)
                 ignore_list, allow_list = load_tour_filter_lists()
@@ -1639,7 +1595,7 @@ async def workflow_upload(file: UploadFile = File(...)):
                     tour_id = tour.get("tour_id") if isinstance(tour, dict) else getattr(tour, "tour_id", None)
                     if tour_id and not should_process_tour_workflow(tour_id):
                         filtered_out_count += 1
-                        log_to_file(f"[WORKFLOW] Tour '{tour_id}' durch Workflow-Filter entfernt (nur W-Touren und Pir-Anlief)")
+                        log_to_file("[WORKFLOW] Tour '%s' durch Workflow-Filter entfernt (nur W-Touren und Pir-Anlief)", tour_id, level=logging.DEBUG)
                         continue  # Tour überspringen - nicht in Antwort aufnehmen
                     filtered_tours.append(tour)
                 
@@ -1657,7 +1613,7 @@ async def workflow_upload(file: UploadFile = File(...)):
                 total_tours_parsed = len(tour_data.get('tours', []))
                 if total_tours_parsed == 0:
                     errors.append("Parser hat keine Touren in der CSV-Datei gefunden. Bitte Datei prüfen.")
-                    log_to_file(f"[WORKFLOW] ⚠️ KRITISCH: Parser hat keine Touren gefunden in {file.filename}")
+                    log_to_file(f"[WORKFLOW] ⚠️ KRITISCH: Parser hat keine Touren gefunden in {filename}")
                 elif total_tours_parsed > 0 and len(filtered_tours) == 0:
                     # Touren wurden geparst, aber alle gefiltert
                     log_to_file(f"[WORKFLOW] ⚠️ INFO: {total_tours_parsed} Touren geparst, aber alle durch Filter entfernt")
@@ -1665,19 +1621,20 @@ async def workflow_upload(file: UploadFile = File(...)):
                 # ✅ SPEICHERE W-TOUREN UND PIR ANLIEF-TOUREN IN DIE DATENBANK
                 if filtered_tours:
                     try:
-                        from backend.db.dao import insert_tour
+                        from backend.db.dao import TourRecord, insert_tours
                         from datetime import datetime
                         
                         # Extrahiere Datum aus Dateinamen (z.B. "Tourenplan 18.08.2025.csv" -> "2025-08-18")
                         # Oder verwende aktuelles Datum als Fallback
                         datum = datetime.now().strftime("%Y-%m-%d")
-                        date_match = re.search(r'(\d{2})\.(\d{2})\.(\d{4})', file.filename)
+                        date_match = re.search(r'(\d{2})\.(\d{2})\.(\d{4})', filename)
                         if date_match:
                             day, month, year = date_match.groups()
                             datum = f"{year}-{month}-{day}"
                         
                         saved_count = 0
                         skipped_count = 0
+                        records = []
                         
                         for tour in filtered_tours:
                             tour_id = tour.get("tour_id") if isinstance(tour, dict) else getattr(tour, "tour_id", None)
@@ -1711,37 +1668,26 @@ async def workflow_upload(file: UploadFile = File(...)):
                                         # Ignoriere nicht-numerische IDs
                                         pass
                             
-                            # Speichere Tour in DB (nur wenn Kunden vorhanden)
+                            # Tour vormerken (nur wenn Kunden vorhanden)
                             if kunden_ids:
-                                try:
-                                    # Prüfe ob Tour bereits existiert (verhindere Duplikate)
-                                    from db.core import ENGINE
-                                    from sqlalchemy import text
-                                    with ENGINE.connect() as conn:
-                                        existing = conn.execute(
-                                            text("SELECT 1 FROM touren WHERE tour_id = :tour_id AND datum = :datum"),
-                                            {"tour_id": tour_id, "datum": datum}
-                                        ).fetchone()
-                                        
-                                        if not existing:
-                                            insert_tour(
-                                                tour_id=tour_id,
-                                                datum=datum,
-                                                kunden_ids=kunden_ids,
-                                                dauer_min=None,  # Wird später bei Routenberechnung gesetzt
-                                                distanz_km=None,  # Wird später bei Routenberechnung gesetzt
-                                                fahrer=None
-                                            )
-                                            saved_count += 1
-                                            log_to_file(f"[WORKFLOW] Tour '{tour_id}' in DB gespeichert (Datum: {datum}, {len(kunden_ids)} Kunden)")
-                                        else:
-                                            skipped_count += 1
-                                            log_to_file(f"[WORKFLOW] Tour '{tour_id}' bereits in DB vorhanden (übersprungen)")
-                                except Exception as db_error:
-                                    log_to_file(f"[WORKFLOW] Fehler beim Speichern von Tour '{tour_id}' in DB: {db_error}")
-                                    warnings.append(f"Tour '{tour_id}' konnte nicht in Datenbank gespeichert werden: {str(db_error)}")
+                                records.append(TourRecord(tour_id=tour_id, datum=datum, kunden_ids=kunden_ids))
                             else:
-                                log_to_file(f"[WORKFLOW] Tour '{tour_id}' hat keine Kunden-IDs - nicht in DB gespeichert")
+                                log_to_file("[WORKFLOW] Tour '%s' hat keine Kunden-IDs - nicht in DB gespeichert", tour_id)
+                        
+                        # Alle Touren in einer Transaktion speichern (vorhandene werden übersprungen)
+                        if records:
+                            try:
+                                row_ids = insert_tours(records, skip_existing=True)
+                                for record, row_id in zip(records, row_ids):
+                                    if row_id is not None:
+                                        saved_count += 1
+                                        log_to_file("[WORKFLOW] Tour '%s' in DB gespeichert (Datum: %s, %s Kunden)", record.tour_id, datum, len(record.kunden_ids), level=logging.DEBUG)
+                                    else:
+                                        skipped_count += 1
+                                        log_to_file("[WORKFLOW] Tour '%s' bereits in DB vorhanden (übersprungen)", record.tour_id, level=logging.DEBUG)
+                            except Exception as db_error:
+                                log_to_file(f"[WORKFLOW] Fehler beim Speichern von {len(records)} Touren in DB: {db_error}")
+                                warnings.append(f"Touren konnten nicht in Datenbank gespeichert werden: {str(db_error)}")
                         
                         if saved_count > 0:
                             log_to_file(f"[WORKFLOW] ✅ {saved_count} Touren in Datenbank gespeichert (Datum: {datum})")
@@ -1753,7 +1699,7 @@ async def workflow_upload(file: UploadFile = File(...)):
                 
                 return JSONResponse({
                     "success": True,
-                    "filename": file.filename,
+                    "filename": filename,
                     "status": f"Workflow erfolgreich. {ok_count} OK, {warn_count} Warn, {bad_count} Bad{consolidated_info}",
                     "counts": {
                         "ok": ok_count,
@@ -1770,9 +1716,9 @@ async def workflow_upload(file: UploadFile = File(...)):
                     "tours_before_consolidation": tours_before_consolidation,
                     "geocoding_session_id": session_id,  # Session-ID für Progress-Tracking
                     "geocoding_stats": {
-                        "db_hits": _geocoding_progress[session_id].get("db_hits", 0),
-                        "geoapify_calls": _geocoding_progress[session_id].get("geoapify_calls", 0),
-                        "errors": _geocoding_progress[session_id].get("errors", 0)
+                        "db_hits": progress.state.get("db_hits", 0),
+                        "geoapify_calls": progress.state.get("geoapify_calls", 0),
+                        "errors": progress.state.get("errors", 0)
                     }
                 }, media_type="application/json; charset=utf-8")
             finally:
@@ -1885,7 +1831,7 @@ async def workflow_upload(file: UploadFile = File(...)):
         
         return JSONResponse({
             "success": True,
-            "filename": file.filename,
+            "filename": filename,
             "status": f"Workflow erfolgreich. {result.ok} OK, {result.warn} Warn, {result.bad} Bad",
             "counts": {
                 "ok": result.ok,
@@ -1903,7 +1849,6 @@ async def workflow_upload(file: UploadFile = File(...)):
         raise
     except Exception as e:
         import traceback
-        import logging
         error_details = traceback.format_exc()
         
         # Detailliertes Logging
@@ -2290,7 +2235,7 @@ async def optimize_tour_with_ai(request: Request):
                 }
             )
         
-        log_to_file(f"[TOUR-OPTIMIZE] Anfrage für Tour: {tour_id}, {len(stops)} Stopps (Trace-ID: {trace_id})")
+        log_to_file("[TOUR-OPTIMIZE] Anfrage für Tour: %s, %s Stopps (Trace-ID: %s)", tour_id, len(stops), trace_id)
         
         if not stops:
             log_to_file(f"[TOUR-OPTIMIZE] FEHLER: Keine Stopps angegeben")
@@ -2344,7 +2289,7 @@ async def optimize_tour_with_ai(request: Request):
                         "duplicate_of_address": first_stop['address'],
                         "coordinates": (lat, lon)
                     })
-                    log_to_file(f"[TOUR-OPTIMIZE] DUPLIKAT erkannt: Stop {idx} ({stop_copy.get('name')}) hat identische Koordinaten wie Stop {first_stop['index']} ({first_stop['name']})")
+                    log_to_file("[TOUR-OPTIMIZE] DUPLIKAT erkannt: Stop %s (%s) hat identische Koordinaten wie Stop %s (%s)", idx, stop_copy.get('name'), first_stop['index'], first_stop['name'], level=logging.DEBUG)
                     # Füge Warnung zum Stop hinzu
                     if 'warnings' not in stop_copy:
                         stop_copy['warnings'] = []
@@ -2360,15 +2305,15 @@ async def optimize_tour_with_ai(request: Request):
                 valid_stops.append(stop_copy)
         
         # Sichere Print-Ausgabe (verhindert UnicodeEncodeError)
-        log_to_file(f"[TOUR-OPTIMIZE] Tour {tour_id}: {len(valid_stops)}/{len(stops)} Stopps mit Koordinaten (BAR-Tour: {is_bar_tour})")
-        log_to_file(f"[TOUR-OPTIMIZE] LLM-Optimizer Status: enabled={llm_optimizer.enabled}")
+        log_to_file("[TOUR-OPTIMIZE] Tour %s: %s/%s Stopps mit Koordinaten (BAR-Tour: %s)", tour_id, len(valid_stops), len(stops), is_bar_tour)
+        log_to_file("[TOUR-OPTIMIZE] LLM-Optimizer Status: enabled=%s", llm_optimizer.enabled)
         
         # Validierungs-Check: Prüfe ob Koordinaten gültig sind
         invalid_coords = [s for s in valid_stops if not (-90 <= s.get('lat', 0) <= 90) or not (-180 <= s.get('lon', 0) <= 180)]
         if invalid_coords:
             log_to_file(f"[TOUR-OPTIMIZE] WARNUNG: {len(invalid_coords)} Stopps mit ungültigen Koordinaten gefunden")
             valid_stops = [s for s in valid_stops if (-90 <= s.get('lat', 0) <= 90) and (-180 <= s.get('lon', 0) <= 180)]
-            log_to_file(f"[TOUR-OPTIMIZE] Nach Validierung: {len(valid_stops)} gültige Stopps")
+            log_to_file("[TOUR-OPTIMIZE] Nach Validierung: %s gültige Stopps", len(valid_stops))
         
         if not valid_stops:
             log_to_file(f"[TOUR-OPTIMIZE] FEHLER: Keine Stopps mit Koordinaten für Tour {tour_id}")
@@ -2379,51 +2324,51 @@ async def optimize_tour_with_ai(request: Request):
                 "warnings": ["Keine Koordinaten verfügbar für Optimierung"]
             }, status_code=200)
         
-        log_to_file(f"[TOUR-OPTIMIZE] 🔄 Starte Optimierung für Tour {tour_id}...")
-        log_to_file(f"[TOUR-OPTIMIZE] 📊 Verwende {len(valid_stops)} valide Stopps")
+        log_to_file("[TOUR-OPTIMIZE] 🔄 Starte Optimierung für Tour %s...", tour_id, level=logging.DEBUG)
+        log_to_file("[TOUR-OPTIMIZE] 📊 Verwende %s valide Stopps", len(valid_stops), level=logging.DEBUG)
         
         # WICHTIG: Verwende die einfache optimize_tour_stops() Funktion (wie im Backup)
         # Diese ist robuster als routing_optimize_route()
-        log_to_file(f"[TOUR-OPTIMIZE] 🎯 Methode: optimize_tour_stops() (Backup-Version)")
+        log_to_file("[TOUR-OPTIMIZE] 🎯 Methode: optimize_tour_stops() (Backup-Version)", level=logging.DEBUG)
         
         try:
-            log_to_file(f"[TOUR-OPTIMIZE] ⚙️ Versuche Optimierung...")
+            log_to_file("[TOUR-OPTIMIZE] ⚙️ Versuche Optimierung...", level=logging.DEBUG)
             # Versuche LLM-Optimierung wenn verfügbar
             if llm_optimizer.enabled:
-                log_to_file(f"[TOUR-OPTIMIZE] 🤖 LLM ist aktiviert, versuche LLM-Optimizer...")
+                log_to_file("[TOUR-OPTIMIZE] 🤖 LLM ist aktiviert, versuche LLM-Optimizer...", level=logging.DEBUG)
                 try:
-                    log_to_file(f"[TOUR-OPTIMIZE] 🔄 Rufe llm_optimizer.optimize_route() auf...")
+                    log_to_file("[TOUR-OPTIMIZE] 🔄 Rufe llm_optimizer.optimize_route() auf...", level=logging.DEBUG)
                     result = llm_optimizer.optimize_route(valid_stops, region="Dresden")
                     optimized_stops_list = [valid_stops[i] for i in result.optimized_route]
                     reasoning = result.reasoning
                     method = result.model_used if hasattr(result, 'model_used') else "ai"
-                    log_to_file(f"[TOUR-OPTIMIZE] ✅ LLM-Optimierung ERFOLGREICH!")
-                    log_to_file(f"  • Methode: {method}")
-                    log_to_file(f"  • Optimierte Stopps: {len(optimized_stops_list)}")
+                    log_to_file("[TOUR-OPTIMIZE] ✅ LLM-Optimierung ERFOLGREICH!")
+                    log_to_file("  • Methode: %s", method)
+                    log_to_file("  • Optimierte Stopps: %s", len(optimized_stops_list))
                 except Exception as llm_error:
                     # LLM-Fehler → Nearest-Neighbor Fallback
                     log_to_file(f"[TOUR-OPTIMIZE] ⚠️ LLM-FEHLER: {type(llm_error).__name__}: {llm_error}")
-                    log_to_file(f"[TOUR-OPTIMIZE] 🔄 Fallback auf Nearest-Neighbor...")
+                    log_to_file("[TOUR-OPTIMIZE] 🔄 Fallback auf Nearest-Neighbor...", level=logging.DEBUG)
                     optimized_stops_list = optimize_tour_stops(valid_stops, use_llm=False)
                     reasoning = f"Nearest-Neighbor Optimierung (LLM nicht verfügbar: {str(llm_error)[:100]})"
                     method = "nearest_neighbor"
-                    log_to_file(f"[TOUR-OPTIMIZE] ✅ Nearest-Neighbor abgeschlossen: {len(optimized_stops_list)} Stopps")
+                    log_to_file("[TOUR-OPTIMIZE] ✅ Nearest-Neighbor abgeschlossen: %s Stopps", len(optimized_stops_list))
             else:
                 # LLM deaktiviert → Nearest-Neighbor
                 log_to_file(f"[TOUR-OPTIMIZE] ℹ️ LLM ist DEAKTIVIERT")
-                log_to_file(f"[TOUR-OPTIMIZE] 🔄 Verwende Nearest-Neighbor direkt...")
+                log_to_file("[TOUR-OPTIMIZE] 🔄 Verwende Nearest-Neighbor direkt...", level=logging.DEBUG)
                 optimized_stops_list = optimize_tour_stops(valid_stops, use_llm=False)
                 reasoning = "Nearest-Neighbor Optimierung"
                 method = "nearest_neighbor"
-                log_to_file(f"[TOUR-OPTIMIZE] ✅ Nearest-Neighbor abgeschlossen: {len(optimized_stops_list)} Stopps")
+                log_to_file("[TOUR-OPTIMIZE] ✅ Nearest-Neighbor abgeschlossen: %s Stopps", len(optimized_stops_list))
             
             # Erstelle optimierte Stopps-Liste (Kopien erstellen)
-            log_to_file(f"[TOUR-OPTIMIZE] 📋 Erstelle Stopps-Kopien...")
+            log_to_file("[TOUR-OPTIMIZE] 📋 Erstelle Stopps-Kopien...", level=logging.DEBUG)
             optimized_stops = []
             for stop in optimized_stops_list:
                 optimized_stops.append(dict(stop))
             
-            log_to_file(f"[TOUR-OPTIMIZE] 📦 Optimierte Stopps: {len(optimized_stops)}")
+            log_to_file("[TOUR-OPTIMIZE] 📦 Optimierte Stopps: %s", len(optimized_stops), level=logging.DEBUG)
             
             if not optimized_stops:
                 log_to_file(f"[TOUR-OPTIMIZE] ❌ KRITISCH: Optimierung gab KEINE Stopps zurück!")
@@ -2444,19 +2389,19 @@ async def optimize_tour_with_ai(request: Request):
                 }, status_code=200)
             
             # Zeitberechnung mit Haversine (wie im Backup)
-            log_to_file(f"[TOUR-OPTIMIZE] ⏱️ Berechne Zeitbudget...")
+            log_to_file("[TOUR-OPTIMIZE] ⏱️ Berechne Zeitbudget...", level=logging.DEBUG)
             try:
                 estimated_driving_time = _calculate_tour_time(optimized_stops)
-                log_to_file(f"  • Fahrzeit: {estimated_driving_time:.1f} Min")
+                log_to_file("  • Fahrzeit: %.1f Min", estimated_driving_time, level=logging.DEBUG)
             except Exception as time_err:
                 log_to_file(f"[TOUR-OPTIMIZE] ⚠️ Fehler bei _calculate_tour_time: {time_err}")
                 estimated_driving_time = len(optimized_stops) * 3.0  # Fallback
-                log_to_file(f"  • Fahrzeit (Fallback): {estimated_driving_time:.1f} Min")
+                log_to_file("  • Fahrzeit (Fallback): %.1f Min", estimated_driving_time, level=logging.DEBUG)
             
             estimated_service_time = len(valid_stops) * 2  # 2 Minuten pro Kunde
             estimated_total_time = estimated_driving_time + estimated_service_time
-            log_to_file(f"  • Servicezeit: {estimated_service_time} Min")
-            log_to_file(f"  • Gesamtzeit: {estimated_total_time:.1f} Min")
+            log_to_file("  • Servicezeit: %s Min", estimated_service_time, level=logging.DEBUG)
+            log_to_file("  • Gesamtzeit: %.1f Min", estimated_total_time, level=logging.DEBUG)
             
         except Exception as routing_error:
             # Nie 500: Immer success:false mit error (HTTP 200)
@@ -2491,7 +2436,7 @@ async def optimize_tour_with_ai(request: Request):
             if 'bar_flag' not in stop or stop.get('bar_flag') is None:
                 stop['bar_flag'] = is_bar_tour
         
-        log_to_file(f"[TOUR-OPTIMIZE] 🔍 Validiere Variablen...")
+        log_to_file("[TOUR-OPTIMIZE] 🔍 Validiere Variablen...", level=logging.DEBUG)
         
         # Alle Variablen sollten jetzt definiert sein (aus try/except Blöcken)
         # Zusätzliche Sicherheitsprüfungen (sollten nicht nötig sein, aber sicherheitshalber)
@@ -2519,7 +2464,7 @@ async def optimize_tour_with_ai(request: Request):
         if 'warnings' not in locals() or warnings is None:
             warnings = []
         
-        log_to_file(f"[TOUR-OPTIMIZE] ✅ Alle Variablen validiert")
+        log_to_file("[TOUR-OPTIMIZE] ✅ Alle Variablen validiert", level=logging.DEBUG)
         
         # Berechne individuelle Distanzen zwischen Stopps (für Splitting)
         segment_distances = []  # Distanzen zwischen aufeinanderfolgenden Stopps
@@ -2758,19 +2703,19 @@ async def optimize_tour_with_ai(request: Request):
             response_data["sub_tours"] = formatted_sub_tours
             response_data["is_split"] = True
             response_data["split_count"] = len(sub_tours_for_response)
-            log_to_file(f"[TOUR-OPTIMIZE] ✅ Response enthält {len(formatted_sub_tours)} Sub-Touren")
+            log_to_file("[TOUR-OPTIMIZE] ✅ Response enthält %s Sub-Touren", len(formatted_sub_tours))
         else:
             response_data["is_split"] = False
             response_data["sub_tours"] = []
-            log_to_file(f"[TOUR-OPTIMIZE] ℹ️ Keine Aufteilung nötig (is_split=false)")
+            log_to_file("[TOUR-OPTIMIZE] ℹ️ Keine Aufteilung nötig (is_split=false)")
         
         log_to_file("=" * 80)
-        log_to_file(f"[TOUR-OPTIMIZE] ✅ ERFOLGREICH ABGESCHLOSSEN - Trace-ID: {trace_id}")
-        log_to_file(f"  • Tour ID: {tour_id}")
-        log_to_file(f"  • Optimierte Stopps: {len(optimized_stops)}")
-        log_to_file(f"  • Methode: {method}")
-        log_to_file(f"  • Gesamtzeit: {estimated_total_time:.1f} Min")
-        log_to_file(f"  • Aufgeteilt: {response_data.get('is_split', False)}")
+        log_to_file("[TOUR-OPTIMIZE] ✅ ERFOLGREICH ABGESCHLOSSEN - Trace-ID: %s", trace_id)
+        log_to_file("  • Tour ID: %s", tour_id)
+        log_to_file("  • Optimierte Stopps: %s", len(optimized_stops))
+        log_to_file("  • Methode: %s", method)
+        log_to_file("  • Gesamtzeit: %.1f Min", estimated_total_time)
+        log_to_file("  • Aufgeteilt: %s", response_data.get('is_split', False))
         log_to_file("=" * 80)
         
         return JSONResponse(response_data, status_code=200)
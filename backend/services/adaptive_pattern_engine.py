@@ -11,7 +11,7 @@ Speichert erkannte Pattern in DB für Wiederverwendung.
 """
 
 import re
-import sqlite3
+from db.connections import connection
 from pathlib import Path
 from typing import Optional, Dict, List, Tuple
 from dataclasses import dataclass, asdict
@@ -42,95 +42,90 @@ class AdaptivePatternEngine:
     
     def _ensure_schema(self):
         """Erstellt Schema für Pattern-Datenbank"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS learned_patterns (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                input_text TEXT NOT NULL,
-                normalized_output TEXT NOT NULL,
-                pattern_type TEXT NOT NULL,
-                confidence REAL DEFAULT 1.0,
-                usage_count INTEGER DEFAULT 1,
-                created_at TEXT NOT NULL,
-                last_used TEXT NOT NULL,
-                UNIQUE(input_text, pattern_type)
-            )
-        """)
-        
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_input_text 
-            ON learned_patterns(input_text)
-        """)
-        
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_pattern_type 
-            ON learned_patterns(pattern_type)
-        """)
-        
-        conn.commit()
-        conn.close()
+        with connection(self.db_path) as conn:
+            cursor = conn.cursor()
+        
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS learned_patterns (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    input_text TEXT NOT NULL,
+                    normalized_output TEXT NOT NULL,
+                    pattern_type TEXT NOT NULL,
+                    confidence REAL DEFAULT 1.0,
+                    usage_count INTEGER DEFAULT 1,
+                    created_at TEXT NOT NULL,
+                    last_used TEXT NOT NULL,
+                    UNIQUE(input_text, pattern_type)
+                )
+            """)
+        
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_input_text 
+                ON learned_patterns(input_text)
+            """)
+        
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_pattern_type 
+                ON learned_patterns(pattern_type)
+            """)
+        
     
     def learn_pattern(self, input_text: str, normalized: str, pattern_type: str, confidence: float = 1.0):
         """
         Speichert ein neues Pattern oder aktualisiert existierendes
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        now = datetime.now().isoformat()
+        with connection(self.db_path) as conn:
+            cursor = conn.cursor()
         
-        # Prüfe ob Pattern bereits existiert
-        cursor.execute("""
-            SELECT id, usage_count FROM learned_patterns 
-            WHERE input_text = ? AND pattern_type = ?
-        """, (input_text, pattern_type))
+            now = datetime.now().isoformat()
         
-        existing = cursor.fetchone()
-        
-        if existing:
-            # Aktualisiere usage_count
-            cursor.execute("""
-                UPDATE learned_patterns 
-                SET usage_count = usage_count + 1,
-                    last_used = ?,
-                    confidence = ?
-                WHERE id = ?
-            """, (now, confidence, existing[0]))
-        else:
-            # Neues Pattern speichern
+            # Prüfe ob Pattern bereits existiert
             cursor.execute("""
-                INSERT INTO learned_patterns 
-                (input_text, normalized_output, pattern_type, confidence, usage_count, created_at, last_used)
-                VALUES (?, ?, ?, ?, 1, ?, ?)
-            """, (input_text, normalized, pattern_type, confidence, now, now))
+                SELECT id, usage_count FROM learned_patterns 
+                WHERE input_text = ? AND pattern_type = ?
+            """, (input_text, pattern_type))
+        
+            existing = cursor.fetchone()
+        
+            if existing:
+                # Aktualisiere usage_count
+                cursor.execute("""
+                    UPDATE learned_patterns 
+                    SET usage_count = usage_count + 1,
+                        last_used = ?,
+                        confidence = ?
+                    WHERE id = ?
+                """, (now, confidence, existing[0]))
+            else:
+                # Neues Pattern speichern
+                cursor.execute("""
+                    INSERT INTO learned_patterns 
+                    (input_text, normalized_output, pattern_type, confidence, usage_count, created_at, last_used)
+                    VALUES (?, ?, ?, ?, 1, ?, ?)
+                """, (input_text, normalized, pattern_type, confidence, now, now))
         
-        conn.commit()
-        conn.close()
     
     def get_pattern(self, input_text: str, pattern_type: Optional[str] = None) -> Optional[Dict]:
         """
         Sucht Pattern in Datenbank
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        if pattern_type:
-            cursor.execute("""
-                SELECT * FROM learned_patterns 
-                WHERE input_text = ? AND pattern_type = ?
-            """, (input_text, pattern_type))
-        else:
-            cursor.execute("""
-                SELECT * FROM learned_patterns 
-                WHERE input_text = ?
-                ORDER BY usage_count DESC, confidence DESC
-                LIMIT 1
-            """, (input_text,))
-        
-        row = cursor.fetchone()
-        conn.close()
+        with connection(self.db_path) as conn:
+            cursor = conn.cursor()
+        
+            if pattern_type:
+                cursor.execute("""
+                    SELECT * FROM learned_patterns 
+                    WHERE input_text = ? AND pattern_type = ?
+                """, (input_text, pattern_type))
+            else:
+                cursor.execute("""
+                    SELECT * FROM learned_patterns 
+                    WHERE input_text = ?
+                    ORDER BY usage_count DESC, confidence DESC
+                    LIMIT 1
+                """, (input_text,))
+        
+            row = cursor.fetchone()
         
         if row:
             return {
@@ -194,23 +189,22 @@ class AdaptivePatternEngine:
     
     def get_statistics(self) -> Dict:
         """Gibt Statistiken über gelernte Pattern zurück"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with connection(self.db_path) as conn:
+            cursor = conn.cursor()
         
-        cursor.execute("SELECT COUNT(*) FROM learned_patterns")
-        total = cursor.fetchone()[0]
+            cursor.execute("SELECT COUNT(*) FROM learned_patterns")
+            total = cursor.fetchone()[0]
         
-        cursor.execute("SELECT SUM(usage_count) FROM learned_patterns")
-        total_usage = cursor.fetchone()[0] or 0
+            cursor.execute("SELECT SUM(usage_count) FROM learned_patterns")
+            total_usage = cursor.fetchone()[0] or 0
         
-        cursor.execute("""
-            SELECT pattern_type, COUNT(*) 
-            FROM learned_patterns 
-            GROUP BY pattern_type
-        """)
-        by_type = dict(cursor.fetchall())
+            cursor.execute("""
+                SELECT pattern_type, COUNT(*) 
+                FROM learned_patterns 
+                GROUP BY pattern_type
+            """)
+            by_type = dict(cursor.fetchall())
         
-        conn.close()
         
         return {
             "total_patterns": total,
@@ -43,6 +43,14 @@ class AddressAnalyzer:
             "mapping_suggestions": []
         }
         
+        # Address-Mapper für alle Kundennamen vorab in einem Batch
+        names = [
+            customer.get("name", "").strip()
+            for tour in tour_plan_data.get('tours', [])
+            for customer in tour.get('customers', [])
+        ]
+        mapping_results = dict(zip(names, address_mapper.map_addresses(names)))
+        
         for tour in tour_plan_data.get('tours', []):
             tour_name = tour.get('name', 'Unbekannt')
             customers = tour.get('customers', [])
@@ -75,7 +83,7 @@ class AddressAnalyzer:
                 full_address = f"{street}, {postal_code} {city}"
                 
                 # 1. Prüfe Address-Mapper (BAR-Sondernamen, etc.)
-                mapping_result = address_mapper.map_address(name)
+                mapping_result = mapping_results[name]
                 if mapping_result['confidence'] > 0:
                     analysis["recognized_addresses"] += 1
                     continue
@@ -13,6 +13,8 @@ import sqlite3
 from pathlib import Path
 from typing import List, Optional, Dict
 
+from db.connections import connection
+
 
 def normalize_street(street: Optional[str]) -> Optional[str]:
     """Normalisiert einen Straßennamen für konsistente Speicherung."""
@@ -40,7 +42,7 @@ class AddressCorrectionStore:
     
     def _ensure_schema(self) -> None:
         """Stellt sicher, dass die Tabellen existieren."""
-        with sqlite3.connect(self.db_path) as con:
+        with connection(self.db_path) as con:
             # address_corrections Tabelle
             con.execute("""
                 CREATE TABLE IF NOT EXISTS address_corrections (
@@ -96,7 +98,7 @@ class AddressCorrectionStore:
     
     def list_pending(self, limit: int = 100) -> List[Dict]:
         """Listet ausstehende Adressen aus der Exception-Queue."""
-        with sqlite3.connect(self.db_path) as con:
+        with connection(self.db_path) as con:
             con.row_factory = sqlite3.Row
             cur = con.execute("""
                 SELECT key, street, postal_code, city, country, last_seen, times_seen, note
@@ -124,7 +126,7 @@ class AddressCorrectionStore:
         
         street_canonical = street_canonical or normalize_street(street) or street
         
-        with sqlite3.connect(self.db_path) as con:
+        with connection(self.db_path) as con:
             # In Korrekturen speichern
             con.execute("""
                 INSERT OR REPLACE INTO address_corrections 
@@ -144,7 +146,7 @@ class AddressCorrectionStore:
     def export_csv(self, output_path: Path | str) -> None:
         """Exportiert alle Korrekturen als CSV."""
         output_path = Path(output_path)
-        with sqlite3.connect(self.db_path) as con:
+        with connection(self.db_path) as con:
             con.row_factory = sqlite3.Row
             cur = con.execute("""
                 SELECT key, street_canonical, postal_code, city, country, 
@@ -173,7 +175,7 @@ class AddressCorrectionStore:
         count = 0
         with open(csv_path, "r", newline="", encoding="utf-8") as f:
             reader = csv.DictReader(f)
-            with sqlite3.connect(self.db_path) as con:
+            with connection(self.db_path) as con:
                 for row in reader:
                     key = row.get("key", "")
                     if not key:
@@ -7,6 +7,9 @@ from __future__ import annotations
 import re
 from typing import Optional, Tuple, Dict, List
 from dataclasses import dataclass
+
+from backend.services.address_rules import AddressRuleEngine
+
 try:
     from .geocode import geocode_address
     from ..db.dao import geocache_get, geocache_set
@@ -99,6 +102,31 @@ class AddressCorrector:
             'Straae des Friedens 37, 01723 Kesselsdorf, Deutschland': 'Straße des Friedens 37, 01723 Kesselsdorf, Deutschland',
             'Nikolaus-Otto-Straae 3, 55129 Mainz, Deutschland': 'Nikolaus-Otto-Straße 3, 55129 Mainz, Deutschland',
         }
+        self._engine_cache: Optional[Tuple[tuple, AddressRuleEngine]] = None
+    
+    def engine(self) -> AddressRuleEngine:
+        """Kompilierte Korrektur-Regeln (neu gebaut, sobald sich eine Tabelle ändert)."""
+        tables = (self.company_moves, self.database_address_mappings, self.special_corrections, self.correction_patterns)
+        signature = tuple((id(t), len(t)) for t in tables)
+        cached = self._engine_cache
+        if cached is None or cached[0] != signature:
+            engine = AddressRuleEngine(
+                company_moves=self.company_moves,
+                special_corrections=self.special_corrections,
+                database_mappings=self.database_address_mappings,
+                correction_patterns=self.correction_patterns,
+            )
+            self._engine_cache = cached = (signature, engine)
+        return cached[1]
+    
+    def plan_corrections(self, addresses: List[str]) -> Dict[str, List[Tuple[str, str]]]:
+        """
+        Korrektur-Kandidaten ohne Geocoding (Batch): pro Adresse die Liste
+        (Korrektur-Typ, korrigierte Adresse) in der Reihenfolge, in der
+        correct_address sie durchprobiert.
+        """
+        engine = self.engine()
+        return {address: engine.correction_plan(address) for address in dict.fromkeys(addresses)}
     
     def correct_address(self, address: str) -> AddressCorrection:
         """Korrigiert eine problematische Adresse und versucht Geocoding"""
@@ -111,12 +139,10 @@ class AddressCorrector:
             print(f"   -> Datenbank-Mapping: {corrected_address}")
             
             # Prüfe ob die korrigierte Adresse bereits in der Datenbank existiert
-            from ..db.dao import get_kunde_id_by_name_adresse, get_kunde_by_id
-            import sqlite3
-            from ..db.config import get_database_path
+            from ..db.dao import get_kunde_id_by_name_adresse, get_kunde_by_id, transaction
             
             # Suche direkt nach der korrigierten Adresse in der Datenbank
-            with sqlite3.connect(get_database_path()) as conn:
+            with transaction() as conn:
                 cur = conn.execute('SELECT id, name, adresse, lat, lon FROM kunden WHERE adresse = ?', (corrected_address,))
                 kunde_row = cur.fetchone()
             
@@ -134,30 +160,30 @@ class AddressCorrector:
                     success=True
                 )
         
-        # 1. Firmenumzüge prüfen
-        for company, moves in self.company_moves.items():
-            for old_addr, new_addr in moves.items():
-                if old_addr in address:
-                    # Ersetze nur die Adresse, behalte Firmenname
-                    corrected = address.replace(old_addr, new_addr)
-                    print(f"   -> Firmenumzug: {old_addr} -> {new_addr}")
-                    # Geocode nur die neue Adresse (ohne Firmenname)
-                    geo_info = geocode_address(new_addr)
-                    if geo_info:
-                        lat = geo_info.get('lat')
-                        lon = geo_info.get('lon')
-                        provider = geo_info.get('provider')
-                        geocache_set(address, lat, lon, "company_move")
-                        return AddressCorrection(
-                            original_address=address,
-                            corrected_address=corrected,
-                            lat=lat,
-                            lon=lon,
-                            postal_code=geo_info.get("postal_code"),
-                            city=geo_info.get("city"),
-                            correction_type="company_move",
-                            success=True
-                        )
+        engine = self.engine()
+        
+        # 1. Firmenumzüge prüfen (eine kombinierte Teilstring-Suche über alle Umzüge)
+        for old_addr, new_addr in engine.company_moves(address):
+            # Ersetze nur die Adresse, behalte Firmenname
+            corrected = address.replace(old_addr, new_addr)
+            print(f"   -> Firmenumzug: {old_addr} -> {new_addr}")
+            # Geocode nur die neue Adresse (ohne Firmenname)
+            geo_info = geocode_address(new_addr)
+            if geo_info:
+                lat = geo_info.get('lat')
+                lon = geo_info.get('lon')
+                provider = geo_info.get('provider')
+                geocache_set(address, lat, lon, "company_move")
+                return AddressCorrection(
+                    original_address=address,
+                    corrected_address=corrected,
+                    lat=lat,
+                    lon=lon,
+                    postal_code=geo_info.get("postal_code"),
+                    city=geo_info.get("city"),
+                    correction_type="company_move",
+                    success=True
+                )
         
         # 2. Spezielle Korrektur probieren
         if address in self.special_corrections:
@@ -180,29 +206,27 @@ class AddressCorrector:
                     success=True
                 )
         
-        # 2. Pattern-basierte Korrekturen probieren
-        for pattern, replacement in self.correction_patterns:
-            corrected = re.sub(pattern, replacement, address)
-            if corrected != address:
-                print(f"   -> Pattern-Korrektur: {corrected}")
-                result = geocode_address(corrected)
-                if result:
-                    lat = result.get('lat')
-                    lon = result.get('lon')
-                    provider = result.get('provider')
-                    geocache_set(address, lat, lon, "address_corrector")
-                    postal_code = result.get("postal_code")
-                    city = result.get("city")
-                    return AddressCorrection(
-                        original_address=address,
-                        corrected_address=corrected,
-                        lat=lat,
-                        lon=lon,
-                        postal_code=postal_code,
-                        city=city,
-                        correction_type="pattern_correction",
-                        success=True
-                    )
+        # 2. Pattern-basierte Korrekturen probieren (vorkompiliert, doppelte Ergebnisse nur einmal)
+        for corrected in engine.pattern_corrections(address):
+            print(f"   -> Pattern-Korrektur: {corrected}")
+            result = geocode_address(corrected)
+            if result:
+                lat = result.get('lat')
+                lon = result.get('lon')
+                provider = result.get('provider')
+                geocache_set(address, lat, lon, "address_corrector")
+                postal_code = result.get("postal_code")
+                city = result.get("city")
+                return AddressCorrection(
+                    original_address=address,
+                    corrected_address=corrected,
+                    lat=lat,
+                    lon=lon,
+                    postal_code=postal_code,
+                    city=city,
+                    correction_type="pattern_correction",
+                    success=True
+                )
         
         # 3. Vereinfachte Adresse probieren (nur Straße + Hausnummer + PLZ + Stadt)
         simplified = self._simplify_address(address)
@@ -5,10 +5,10 @@ Verwendet Konfigurationsdatei für spezielle Adress-Mappings und Korrekturen
 """
 
 import json
-import re
 import os
-from typing import Dict, List, Optional, Tuple, Any
-from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Tuple, Any
+
+from backend.services.address_rules import AddressRuleEngine
 
 class AddressMapper:
     def __init__(self, config_file: str = "address_mappings.json"):
@@ -17,6 +17,7 @@ class AddressMapper:
         self.mappings = []
         self.rules = []
         self.fallback_strategies = []
+        self._engine_cache: Optional[Tuple[tuple, AddressRuleEngine]] = None
         self.load_config()
     
     def load_config(self):
@@ -26,6 +27,7 @@ class AddressMapper:
         self.rules = []
         self.fallback_strategies = []
         self.bar_sondernamen = []
+        self._engine_cache = None
         
         try:
             if os.path.exists(self.config_file):
@@ -41,77 +43,39 @@ class AddressMapper:
         except Exception as e:
             print(f"[AddressMapper] FEHLER beim Laden der Konfiguration: {e} - verwende Standardwerte")
     
+    def engine(self) -> AddressRuleEngine:
+        """
+        Kompilierte Regeln (Hash-Lookups, Bigramm-Index, vorkompilierte Regex).
+        
+        Wird neu gebaut, sobald sich die Listen ändern (auch bei direktem append
+        von außen); nach Änderungen an einzelnen Einträgen invalidate_rules() aufrufen.
+        """
+        signature = tuple((id(t), len(t)) for t in (self.mappings, self.bar_sondernamen, self.rules))
+        cached = self._engine_cache
+        if cached is None or cached[0] != signature:
+            engine = AddressRuleEngine(mappings=self.mappings, bar_entries=self.bar_sondernamen, rules=self.rules)
+            self._engine_cache = cached = (signature, engine)
+        return cached[1]
+    
+    def invalidate_rules(self) -> None:
+        """Verwirft die kompilierten Regeln (nächster Zugriff baut sie neu)."""
+        self._engine_cache = None
+    
     def find_exact_mapping(self, address: str) -> Optional[Dict]:
         """Suche exakte Adress-Übereinstimmung in Mappings"""
-        for mapping in self.mappings:
-            if mapping['pattern'] == address:
-                return mapping
-        return None
+        return self.engine().exact_mapping(address)
     
     def find_fuzzy_mapping(self, address: str, threshold: float = 0.8) -> Optional[Dict]:
         """Suche ähnliche Adressen in Mappings"""
-        best_match = None
-        best_similarity = 0.0
-        
-        for mapping in self.mappings:
-            similarity = SequenceMatcher(None, address.lower(), mapping['pattern'].lower()).ratio()
-            if similarity >= threshold and similarity > best_similarity:
-                best_match = mapping
-                best_similarity = similarity
-        
-        return best_match
+        return self.engine().fuzzy_mapping(address, threshold)
     
     def find_bar_sondername(self, address: str) -> Optional[Dict]:
-        """Suche BAR-Sondername zu echter Adresse"""
-        # Exakte Übereinstimmung
-        for bar_entry in self.bar_sondernamen:
-            if bar_entry['sondername'].lower() == address.lower():
-                return bar_entry
-        
-        # Fuzzy-Matching für ähnliche Namen
-        best_match = None
-        best_similarity = 0.0
-        
-        for bar_entry in self.bar_sondernamen:
-            similarity = SequenceMatcher(None, address.lower(), bar_entry['sondername'].lower()).ratio()
-            if similarity >= 0.7 and similarity > best_similarity:  # Niedrigere Schwelle für BAR-Namen
-                best_match = bar_entry
-                best_similarity = similarity
-        
-        return best_match
+        """Suche BAR-Sondername zu echter Adresse (exakt, sonst fuzzy mit Schwelle 0.7)"""
+        return self.engine().bar_entry(address)
     
     def apply_rules(self, address: str) -> str:
-        """Wende Regeln auf Adresse an"""
-        corrected_address = address
-        
-        # Sortiere Regeln nach Priorität (niedrigere Zahl = höhere Priorität)
-        sorted_rules = sorted(self.rules, key=lambda x: x.get('priority', 999))
-        
-        for rule in sorted_rules:
-            try:
-                pattern = rule['pattern']
-                replacement = rule['replacement']
-                
-                # Verwende Regex für Pattern-Matching
-                if re.search(pattern, corrected_address):
-                    if replacement == ".*":
-                        # Spezielle Behandlung für OT-Entfernung
-                        if "OT " in corrected_address:
-                            corrected_address = re.sub(r'\s*\([^)]*OT[^)]*\)', '', corrected_address)
-                            corrected_address = re.sub(r'\s*OT\s+[^,]+', '', corrected_address)
-                        elif "| Halle" in corrected_address:
-                            corrected_address = re.sub(r'\s*\|\s*Halle\s+\d+', '', corrected_address)
-                        elif "(" in corrected_address and ")" in corrected_address:
-                            corrected_address = re.sub(r'\s*\([^)]+\)', '', corrected_address)
-                    else:
-                        corrected_address = re.sub(pattern, replacement, corrected_address)
-                    
-                    print(f"[AddressMapper] Regel '{rule['name']}' angewendet: '{address}' -> '{corrected_address}'")
-                    
-            except Exception as e:
-                print(f"[AddressMapper] FEHLER bei Regel '{rule['name']}': {e}")
-        
-        return corrected_address.strip()
+        """Wende Regeln auf Adresse an (nach Priorität, niedrigere Zahl = höhere Priorität)"""
+        return self.engine().apply_rules(address, log=True)
     
     def map_address(self, address: str) -> Dict[str, Any]:
         """
@@ -121,70 +85,16 @@ class AddressMapper:
             Dict mit 'corrected_address', 'lat', 'lon', 'provider', 'method'
         """
         print(f"[AddressMapper] Mappe Adresse: '{address}'")
+        return self.engine().map_address(address, log=True)
+    
+    def map_addresses(self, addresses: Iterable[str]) -> List[Dict[str, Any]]:
+        """
+        Batch-Variante von map_address (gleiche Ergebnisse, ohne Log-Ausgabe pro Adresse).
         
-        # 1. BAR-Sondername-Suche (höchste Priorität)
-        bar_match = self.find_bar_sondername(address)
-        if bar_match:
-            print(f"[AddressMapper] BAR-Sondername gefunden: {bar_match['beschreibung']}")
-            return {
-                'corrected_address': bar_match['echte_adresse'],
-                'lat': bar_match['lat'],
-                'lon': bar_match['lon'],
-                'provider': 'address_mapper_bar',
-                'method': 'bar_sondername',
-                'confidence': 1.0,
-                'kategorie': bar_match.get('kategorie', 'unknown')
-            }
-        
-        # 2. Exakte Mapping-Suche
-        exact_mapping = self.find_exact_mapping(address)
-        if exact_mapping:
-            print(f"[AddressMapper] Exakte Übereinstimmung gefunden: {exact_mapping['reason']}")
-            return {
-                'corrected_address': exact_mapping['corrected_address'],
-                'lat': exact_mapping['lat'],
-                'lon': exact_mapping['lon'],
-                'provider': 'address_mapper_exact',
-                'method': 'exact_mapping',
-                'confidence': 1.0
-            }
-        
-        # 3. Fuzzy Mapping-Suche
-        fuzzy_mapping = self.find_fuzzy_mapping(address)
-        if fuzzy_mapping:
-            print(f"[AddressMapper] Ähnliche Übereinstimmung gefunden: {fuzzy_mapping['reason']}")
-            return {
-                'corrected_address': fuzzy_mapping['corrected_address'],
-                'lat': fuzzy_mapping['lat'],
-                'lon': fuzzy_mapping['lon'],
-                'provider': 'address_mapper_fuzzy',
-                'method': 'fuzzy_mapping',
-                'confidence': 0.8
-            }
-        
-        # 4. Regel-basierte Korrektur
-        corrected_address = self.apply_rules(address)
-        if corrected_address != address:
-            print(f"[AddressMapper] Adresse korrigiert: '{address}' -> '{corrected_address}'")
-            return {
-                'corrected_address': corrected_address,
-                'lat': None,
-                'lon': None,
-                'provider': 'address_mapper_rules',
-                'method': 'rule_correction',
-                'confidence': 0.6
-            }
-        
-        # 5. Keine Korrektur möglich
-        print(f"[AddressMapper] Keine Korrektur für Adresse gefunden: '{address}'")
-        return {
-            'corrected_address': address,
-            'lat': None,
-            'lon': None,
-            'provider': None,
-            'method': 'no_correction',
-            'confidence': 0.0
-        }
+        Returns:
+            Liste der Mapping-Ergebnisse in Eingabe-Reihenfolge
+        """
+        return self.engine().map_many(addresses)
     
     def add_mapping(self, pattern: str, corrected_address: str, lat: float = None, lon: float = None, reason: str = "", priority: int = 1):
         """Füge neues Mapping zur Konfiguration hinzu"""
@@ -204,6 +114,7 @@ class AddressMapper:
             return False
         
         self.mappings.append(new_mapping)
+        self._engine_cache = None
         print(f"[AddressMapper] Neues Mapping hinzugefügt: {pattern} -> {corrected_address}")
         return True
     
@@ -218,6 +129,7 @@ class AddressMapper:
             "kategorie": kategorie
         }
         self.bar_sondernamen.append(new_bar_entry)
+        self._engine_cache = None
         print(f"[AddressMapper] Neuer BAR-Sondername hinzugefügt: {sondername} -> {echte_adresse}")
         return True
     
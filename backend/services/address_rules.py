@@ -0,0 +1,459 @@
+"""
+Kompilierte Adress-Regeln (AddressMapper, AddressCorrector, StreetNameValidator).
+
+Alle Regel-Tabellen werden einmal in eine AddressRuleEngine übersetzt:
+- Exakte Treffer (Mappings, BAR-Sondernamen, Spezial-Korrekturen,
+  Datenbank-Varianten) über Hash-Lookups statt linearer Suche.
+- Teilstring-Regeln (Firmenumzüge) und Regex-Regeln: vorkompiliert, davor ein
+  einziger kombinierter Ausdruck als Vorfilter. Trifft er nicht, greift keine
+  Regel der Gruppe und die Einzelregeln werden gar nicht erst geprüft.
+- Fuzzy-Suche über einen Bigramm-Index: SequenceMatcher läuft nur noch gegen
+  Kandidaten mit gemeinsamem Bigramm und passender Länge. Bei Schwellen über
+  2/3 ist das verlustfrei (siehe FuzzyIndex), Ergebnisse bleiben identisch.
+"""
+from __future__ import annotations
+
+import copy
+import re
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Sequence, Tuple
+
+import numpy as np
+
+# Rand-Markierungen für die Bigramme (kommen in Adressen nicht vor)
+_START, _END = "\x02", "\x03"
+
+# Obergrenze der Zwischenmatrix (Abfragen × Einträge × Spalten) pro Block
+_CHUNK_BUDGET = 4_000_000
+
+# Unterhalb dieser Schwelle ist der Bigramm-Filter nicht mehr verlustfrei
+LOSSLESS_MIN_THRESHOLD = 2 / 3
+
+# Sonderbehandlung für Mapper-Regeln mit replacement ".*" (Ortsteil/Halle/Klammern)
+_OT_PARENS = re.compile(r'\s*\([^)]*OT[^)]*\)')
+_OT_SUFFIX = re.compile(r'\s*OT\s+[^,]+')
+_HALLE = re.compile(r'\s*\|\s*Halle\s+\d+')
+_PARENS = re.compile(r'\s*\([^)]+\)')
+
+# Numerische Gruppen-Referenzen (\1, (?(1)...)) – in der kombinierten Alternation
+# verschieben sich die Gruppennummern, solche Muster dürfen nicht in den Vorfilter
+_NUMERIC_GROUP_REF = re.compile(r'(?<!\\)(?:\\\\)*(?:\\[1-9]|\(\?\(\d)')
+
+
+def _bigrams(text: str) -> Counter:
+    padded = f"{_START}{text}{_END}"
+    return Counter(padded[i:i + 2] for i in range(len(padded) - 1))
+
+
+class FuzzyIndex:
+    """
+    Bigramm-Index für die SequenceMatcher-Suche (Vergleich in Kleinschreibung).
+
+    Die Einträge liegen als Zählmatrizen (Bigramme bzw. Zeichen × Eintrag) vor;
+    pro Abfrage werden die oberen Schranken für alle Einträge auf einmal
+    berechnet und nur die verbleibenden Kandidaten mit SequenceMatcher geprüft.
+
+    Verlustfrei für threshold > 2/3: Haben zwei Strings kein gemeinsames
+    Bigramm (inkl. Rand-Markierungen), muss zwischen je zwei übereinstimmenden
+    Zeichen und an beiden Rändern mindestens ein nicht übereinstimmendes Zeichen
+    liegen; damit gilt ratio = 2M/(la+lb) <= 2M/(3M+1) < 2/3. Außerdem brauchen
+    M Treffer-Zeichen in B Blöcken B-1 Lücken, daher teilen Strings mit
+    ratio >= t mindestens (la+lb)*(3t-2)/2 - 1 Bigramme (als Multimenge gezählt).
+    """
+
+    def __init__(self, keys: Sequence[str]) -> None:
+        self.keys = [k.lower() for k in keys]
+        self._lengths = np.array([len(k) for k in self.keys], dtype=np.float64)
+        self._gram_ids, self._gram_counts = self._count_matrix([_bigrams(k) for k in self.keys])
+        self._char_ids, self._char_counts = self._count_matrix([Counter(k) for k in self.keys])
+        # Matcher mit fertig analysiertem Eintrag als seq2; pro Abfrage wird eine
+        # flache Kopie genutzt (thread-safe)
+        self._matchers = [SequenceMatcher(None, "", key) for key in self.keys]
+
+    @staticmethod
+    def _count_matrix(counters: List[Counter]) -> Tuple[Dict[str, int], np.ndarray]:
+        ids: Dict[str, int] = {}
+        for counter in counters:
+            for token in counter:
+                ids.setdefault(token, len(ids))
+        matrix = np.zeros((len(counters), len(ids)), dtype=np.int32)
+        for row, counter in enumerate(counters):
+            for token, count in counter.items():
+                matrix[row, ids[token]] = count
+        return ids, matrix
+
+    def _shared(self, query_counts: List[Counter], ids: Dict[str, int], matrix: np.ndarray) -> np.ndarray:
+        """Multimengen-Schnitt aller Abfragen mit allen Einträgen (Abfragen × Einträge)."""
+        n_keys = matrix.shape[0]
+        out = np.zeros((len(query_counts), n_keys), dtype=np.int32)
+        chunk = max(1, _CHUNK_BUDGET // max(1, n_keys * matrix.shape[1]))
+        for start in range(0, len(query_counts), chunk):
+            block = query_counts[start:start + chunk]
+            rows, cols, counts = [], [], []
+            for row, counter in enumerate(block):
+                for token, count in counter.items():
+                    col = ids.get(token)
+                    if col is not None:
+                        rows.append(row)
+                        cols.append(col)
+                        counts.append(count)
+            if not cols:
+                continue
+            # Nur Spalten, die in diesem Block vorkommen
+            used, local = np.unique(np.array(cols), return_inverse=True)
+            query_matrix = np.zeros((len(block), len(used)), dtype=np.int32)
+            query_matrix[rows, local] = counts
+            key_matrix = matrix[:, used]
+            out[start:start + len(block)] = np.minimum(query_matrix[:, None, :], key_matrix[None, :, :]).sum(axis=2)
+        return out
+
+    def best(self, query: str, threshold: float) -> Optional[Tuple[int, float]]:
+        """Bester Eintrag mit ratio >= threshold als (Index, Ähnlichkeit) oder None."""
+        return self.best_many([query], threshold)[0]
+
+    def best_many(self, queries: Sequence[str], threshold: float) -> List[Optional[Tuple[int, float]]]:
+        """
+        best() für viele Abfragen; die Schranken werden für alle Abfragen und
+        Einträge gemeinsam berechnet.
+        """
+        if not self.keys or not queries:
+            return [None] * len(queries)
+        lowered = [q.lower() for q in queries]
+        la = np.array([len(q) for q in lowered], dtype=np.float64)[:, None]
+        total = la + self._lengths[None, :]
+        safe_total = np.where(total > 0, total, 1.0)
+        # Obere Schranken: Länge (real_quick_ratio) und Zeichen-Multimenge (quick_ratio)
+        chars = self._shared([Counter(q) for q in lowered], self._char_ids, self._char_counts)
+        upper = np.minimum(2.0 * np.minimum(la, self._lengths[None, :]), 2.0 * chars) / safe_total
+        upper = np.where(total > 0, upper, 1.0)  # zwei leere Strings: ratio 1.0
+        mask = upper >= threshold
+        if threshold > LOSSLESS_MIN_THRESHOLD:
+            grams = self._shared([_bigrams(q) for q in lowered], self._gram_ids, self._gram_counts)
+            mask &= (grams >= 1) & (grams >= total * (3 * threshold - 2) / 2 - 1)
+
+        results: List[Optional[Tuple[int, float]]] = []
+        for row, query in enumerate(lowered):
+            best: Optional[Tuple[int, float]] = None
+            row_upper = upper[row]
+            # Index-Reihenfolge: bei gleicher Ähnlichkeit gewinnt der frühere Eintrag
+            for idx in np.flatnonzero(mask[row]).tolist():
+                if best is not None and row_upper[idx] <= best[1]:
+                    continue  # kann den bisherigen Treffer nicht mehr echt übertreffen
+                matcher = copy.copy(self._matchers[idx])
+                matcher.set_seq1(query)
+                similarity = matcher.ratio()
+                if similarity >= threshold and (best is None or similarity > best[1]):
+                    best = (idx, similarity)
+            results.append(best)
+        return results
+
+
+class RegexRuleSet:
+    """
+    Vorkompilierte Regex-Regeln plus kombinierter Vorfilter.
+
+    Muster mit numerischen Gruppen-Referenzen werden einzeln geprüft, da sich
+    ihre Gruppennummern in der kombinierten Alternation verschieben würden.
+    """
+
+    def __init__(self, patterns: Sequence[str]) -> None:
+        # Ungültige Muster werden None (passen nie – wie vorher der abgefangene re.error)
+        self.patterns: List[Optional[Pattern[str]]] = []
+        for p in patterns:
+            try:
+                self.patterns.append(re.compile(p))
+            except (re.error, TypeError) as e:
+                print(f"[ADDRESS-RULES] Ungültiges Muster {p!r}: {e}")
+                self.patterns.append(None)
+        valid = [p for p in self.patterns if p is not None]
+        self._has_rules = bool(valid)
+        self._ungated = [p for p in valid if _NUMERIC_GROUP_REF.search(p.pattern)]
+        gated = [p.pattern for p in valid if not _NUMERIC_GROUP_REF.search(p.pattern)]
+        self._gate: Optional[Pattern[str]] = None
+        self._gate_ok = True
+        if gated:
+            try:
+                self._gate = re.compile("|".join(f"(?:{p})" for p in gated))
+            except re.error:
+                self._gate_ok = False  # z.B. doppelte Gruppennamen → ohne Vorfilter
+
+    def any_match(self, text: str) -> bool:
+        """False nur, wenn garantiert keine Regel auf `text` passt."""
+        if not self._has_rules:
+            return False
+        if not self._gate_ok or (self._gate is not None and self._gate.search(text) is not None):
+            return True
+        return any(p.search(text) is not None for p in self._ungated)
+
+
+class SubstringRuleSet:
+    """Teilstring-Regeln (old → new) mit einer kombinierten Alternation als Vorfilter."""
+
+    def __init__(self, entries: Sequence[Tuple[str, str]]) -> None:
+        self.entries = [(old, new) for old, new in entries if old]
+        self._gate = re.compile("|".join(re.escape(old) for old, _ in self.entries)) if self.entries else None
+
+    def matches(self, text: str) -> List[Tuple[str, str]]:
+        """Alle Regeln (in Tabellen-Reihenfolge), deren Teilstring in `text` vorkommt."""
+        if self._gate is None or self._gate.search(text) is None:
+            return []
+        return [(old, new) for old, new in self.entries if old in text]
+
+
+class AddressRuleEngine:
+    """
+    Kompilierte Form aller Adress-Regel-Tabellen eines Dienstes.
+
+    Jeder Dienst übergibt nur die Tabellen, die er hat; fehlende bleiben leer.
+    Die Engine ist unveränderlich – bei geänderten Tabellen neu bauen.
+    """
+
+    def __init__(
+        self,
+        mappings: Sequence[Dict[str, Any]] = (),
+        bar_entries: Sequence[Dict[str, Any]] = (),
+        rules: Sequence[Dict[str, Any]] = (),
+        company_moves: Optional[Dict[str, Dict[str, str]]] = None,
+        special_corrections: Optional[Dict[str, str]] = None,
+        database_mappings: Optional[Dict[str, str]] = None,
+        correction_patterns: Sequence[Tuple[str, str]] = (),
+        street_rules: Sequence[Tuple[str, str, float]] = (),
+    ) -> None:
+        # Exakte Lookups (erster Eintrag gewinnt, wie bei der linearen Suche)
+        self._mappings = list(mappings)
+        self._exact_mappings: Dict[str, Dict[str, Any]] = {}
+        for mapping in self._mappings:
+            self._exact_mappings.setdefault(mapping['pattern'], mapping)
+        self._bar_entries = list(bar_entries)
+        self._exact_bar: Dict[str, Dict[str, Any]] = {}
+        for entry in self._bar_entries:
+            self._exact_bar.setdefault(entry['sondername'].lower(), entry)
+        self.special_corrections = dict(special_corrections or {})
+        self.database_mappings = dict(database_mappings or {})
+
+        # Fuzzy-Indizes
+        self._mapping_index = FuzzyIndex([m['pattern'] for m in self._mappings])
+        self._bar_index = FuzzyIndex([e['sondername'] for e in self._bar_entries])
+
+        # Mapper-Regeln nach Priorität (niedrigere Zahl = höhere Priorität)
+        self._rules = sorted(rules, key=lambda x: x.get('priority', 999))
+        self._rule_set = RegexRuleSet([r.get('pattern') for r in self._rules])
+
+        # Firmenumzüge: {Firma: {alte Adresse: neue Adresse}} → eine Alternation
+        self._moves = SubstringRuleSet(
+            [(old, new) for moves in (company_moves or {}).values() for old, new in moves.items()]
+        )
+
+        self._correction_patterns = list(correction_patterns)
+        self._correction_set = RegexRuleSet([p for p, _ in self._correction_patterns])
+
+        self._street_rules = list(street_rules)
+        self._street_set = RegexRuleSet([p for p, _, _ in self._street_rules])
+
+    # ------------------------------------------------------------------ Mapper
+
+    def exact_mapping(self, address: str) -> Optional[Dict[str, Any]]:
+        return self._exact_mappings.get(address)
+
+    def fuzzy_mapping(self, address: str, threshold: float = 0.8) -> Optional[Dict[str, Any]]:
+        hit = self._mapping_index.best(address, threshold)
+        return self._mappings[hit[0]] if hit else None
+
+    def bar_entry(self, address: str, threshold: float = 0.7) -> Optional[Dict[str, Any]]:
+        entry = self._exact_bar.get(address.lower())
+        if entry is not None:
+            return entry
+        hit = self._bar_index.best(address, threshold)
+        return self._bar_entries[hit[0]] if hit else None
+
+    def apply_rules(self, address: str, log: bool = False) -> str:
+        """Mapper-Regeln nacheinander anwenden (Semantik wie AddressMapper.apply_rules)."""
+        corrected_address = address
+        if not self._rule_set.any_match(address):
+            return corrected_address.strip()
+        for rule, pattern in zip(self._rules, self._rule_set.patterns):
+            try:
+                if pattern is not None and pattern.search(corrected_address):
+                    if rule['replacement'] == ".*":
+                        # Spezielle Behandlung für OT-Entfernung
+                        if "OT " in corrected_address:
+                            corrected_address = _OT_PARENS.sub('', corrected_address)
+                            corrected_address = _OT_SUFFIX.sub('', corrected_address)
+                        elif "| Halle" in corrected_address:
+                            corrected_address = _HALLE.sub('', corrected_address)
+                        elif "(" in corrected_address and ")" in corrected_address:
+                            corrected_address = _PARENS.sub('', corrected_address)
+                    else:
+                        corrected_address = pattern.sub(rule['replacement'], corrected_address)
+                    if log:
+                        print(f"[AddressMapper] Regel '{rule['name']}' angewendet: '{address}' -> '{corrected_address}'")
+            except Exception as e:
+                print(f"[AddressMapper] FEHLER bei Regel '{rule.get('name')}': {e}")
+        return corrected_address.strip()
+
+    def map_address(self, address: str, log: bool = False) -> Dict[str, Any]:
+        """Mapper-Ergebnis für eine Adresse (BAR-Sondername → exakt → fuzzy → Regeln)."""
+        bar_match = self.bar_entry(address)
+        exact_mapping = fuzzy_mapping = None
+        if not bar_match:
+            exact_mapping = self.exact_mapping(address)
+            if not exact_mapping:
+                fuzzy_mapping = self.fuzzy_mapping(address)
+        return self._mapping_result(address, bar_match, exact_mapping, fuzzy_mapping, log)
+
+    def map_many(self, addresses: Iterable[str]) -> List[Dict[str, Any]]:
+        """
+        Batch-Variante von map_address (ohne Log-Ausgabe): Duplikate werden nur
+        einmal berechnet, die Fuzzy-Stufen laufen für alle offenen Adressen gemeinsam.
+        """
+        addresses = list(addresses)
+        unique = list(dict.fromkeys(addresses))
+        bar: Dict[str, Optional[Dict[str, Any]]] = {a: self._exact_bar.get(a.lower()) for a in unique}
+        pending = [a for a in unique if bar[a] is None]
+        for address, hit in zip(pending, self._bar_index.best_many(pending, 0.7)):
+            bar[address] = self._bar_entries[hit[0]] if hit else None
+
+        exact = {a: self.exact_mapping(a) for a in unique if not bar[a]}
+        pending = [a for a, m in exact.items() if not m]
+        fuzzy = {
+            address: self._mappings[hit[0]] if hit else None
+            for address, hit in zip(pending, self._mapping_index.best_many(pending, 0.8))
+        }
+        memo = {
+            a: self._mapping_result(a, bar[a], exact.get(a), fuzzy.get(a), log=False)
+            for a in unique
+        }
+        return [dict(memo[a]) for a in addresses]
+
+    def _mapping_result(self, address: str, bar_match: Optional[Dict[str, Any]],
+                        exact_mapping: Optional[Dict[str, Any]], fuzzy_mapping: Optional[Dict[str, Any]],
+                        log: bool) -> Dict[str, Any]:
+        if bar_match:
+            if log:
+                print(f"[AddressMapper] BAR-Sondername gefunden: {bar_match['beschreibung']}")
+            return {
+                'corrected_address': bar_match['echte_adresse'],
+                'lat': bar_match['lat'],
+                'lon': bar_match['lon'],
+                'provider': 'address_mapper_bar',
+                'method': 'bar_sondername',
+                'confidence': 1.0,
+                'kategorie': bar_match.get('kategorie', 'unknown')
+            }
+
+        if exact_mapping:
+            if log:
+                print(f"[AddressMapper] Exakte Übereinstimmung gefunden: {exact_mapping['reason']}")
+            return {
+                'corrected_address': exact_mapping['corrected_address'],
+                'lat': exact_mapping['lat'],
+                'lon': exact_mapping['lon'],
+                'provider': 'address_mapper_exact',
+                'method': 'exact_mapping',
+                'confidence': 1.0
+            }
+
+        if fuzzy_mapping:
+            if log:
+                print(f"[AddressMapper] Ähnliche Übereinstimmung gefunden: {fuzzy_mapping['reason']}")
+            return {
+                'corrected_address': fuzzy_mapping['corrected_address'],
+                'lat': fuzzy_mapping['lat'],
+                'lon': fuzzy_mapping['lon'],
+                'provider': 'address_mapper_fuzzy',
+                'method': 'fuzzy_mapping',
+                'confidence': 0.8
+            }
+
+        corrected_address = self.apply_rules(address, log=log)
+        if corrected_address != address:
+            if log:
+                print(f"[AddressMapper] Adresse korrigiert: '{address}' -> '{corrected_address}'")
+            return {
+                'corrected_address': corrected_address,
+                'lat': None,
+                'lon': None,
+                'provider': 'address_mapper_rules',
+                'method': 'rule_correction',
+                'confidence': 0.6
+            }
+
+        if log:
+            print(f"[AddressMapper] Keine Korrektur für Adresse gefunden: '{address}'")
+        return {
+            'corrected_address': address,
+            'lat': None,
+            'lon': None,
+            'provider': None,
+            'method': 'no_correction',
+            'confidence': 0.0
+        }
+
+    # --------------------------------------------------------------- Corrector
+
+    def company_moves(self, address: str) -> List[Tuple[str, str]]:
+        """Firmenumzüge (alte, neue Adresse), deren alte Adresse in `address` vorkommt."""
+        return self._moves.matches(address)
+
+    def pattern_corrections(self, address: str) -> List[str]:
+        """
+        Kandidaten der Pattern-Korrektur: jedes Muster einzeln auf die Original-
+        Adresse, in Tabellen-Reihenfolge, ohne unveränderte und doppelte Ergebnisse.
+        """
+        if not self._correction_set.any_match(address):
+            return []
+        candidates: List[str] = []
+        seen = {address}
+        for (_, replacement), pattern in zip(self._correction_patterns, self._correction_set.patterns):
+            if pattern is None:
+                continue
+            corrected = pattern.sub(replacement, address)
+            if corrected not in seen:
+                seen.add(corrected)
+                candidates.append(corrected)
+        return candidates
+
+    def correction_plan(self, address: str) -> List[Tuple[str, str]]:
+        """
+        Alle Korrektur-Kandidaten einer Adresse als (Typ, korrigierte Adresse) in
+        der Reihenfolge, in der AddressCorrector sie durchprobiert.
+        """
+        plan: List[Tuple[str, str]] = []
+        if address in self.database_mappings:
+            plan.append(("database_mapping", self.database_mappings[address]))
+        plan.extend(("company_move", address.replace(old, new)) for old, new in self.company_moves(address))
+        if address in self.special_corrections:
+            plan.append(("special_correction", self.special_corrections[address]))
+        plan.extend(("pattern_correction", c) for c in self.pattern_corrections(address))
+        return plan
+
+    # --------------------------------------------------------------- Validator
+
+    def correct_street(self, address: str) -> Optional[Tuple[str, float]]:
+        """
+        Straßennamen-Regeln nacheinander anwenden.
+
+        Returns:
+            (korrigierte Adresse, Vertrauen) oder None, wenn keine Regel greift.
+            Spezial-Korrekturen haben Vertrauen 1.0, sonst das kleinste Vertrauen
+            der angewendeten Regeln.
+        """
+        special = self.special_corrections.get(address)
+        if special is not None:
+            return special, 1.0
+        if not self._street_set.any_match(address):
+            return None
+        corrected = address
+        confidence = 1.0
+        for (_, replacement, rule_confidence), pattern in zip(self._street_rules, self._street_set.patterns):
+            if pattern is None:
+                continue
+            updated, count = pattern.subn(replacement, corrected)
+            if count and updated != corrected:
+                corrected = updated
+                confidence = min(confidence, rule_confidence)
+        corrected = corrected.strip()
+        if corrected == address:
+            return None
+        return corrected, confidence
@@ -7,6 +7,10 @@ from __future__ import annotations
 import re
 from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass
+
+from backend.services.address_rules import AddressRuleEngine
+from backend.services.variant_resolver import VariantCheck, VariantResolver
+
 try:
     from .geocode import geocode_address
     from ..db.dao import geocache_get, geocache_set
@@ -39,7 +43,7 @@ class StreetNameCorrection:
 class StreetNameValidator:
     """Systematische Validierung und Korrektur von Straßennamen"""
     
-    def __init__(self):
+    def __init__(self, resolver: Optional[VariantResolver] = None):
         # Bekannte Korrekturen basierend auf deutschen Straßennamen-Regeln
         self.correction_rules = [
             # Bindestriche entfernen (Alt-Serkowitz → Altserkowitz)
@@ -73,34 +77,99 @@ class StreetNameValidator:
             'Naumannstr. 12 / Halle 26F, 01809 Heidenau': 'Naumannstraße 12, 01809 Heidenau',
             'Dresdener Str. 5, 02977 Hoyerswerda': 'Dresdener Straße 5, 02977 Hoyerswerda',
         }
+        self._engine_cache: Optional[Tuple[tuple, AddressRuleEngine]] = None
+        self._resolver = resolver
+    
+    def resolver(self) -> VariantResolver:
+        """Cache-first Varianten-Prüfung (Live-Geocoding nur für den Rest)."""
+        if self._resolver is None:
+            self._resolver = VariantResolver(geocoder=geocode_address)
+        return self._resolver
+    
+    @staticmethod
+    def _split_street(address: str) -> Optional[Tuple[str, str, str]]:
+        """(Straßenname, Hausnummer, PLZ/Ort) oder None ohne Hausnummer."""
+        street_match = re.search(r'^([^,]+?)(\d+[a-z]?)', address)
+        if not street_match:
+            return None
+        plz_city = address.split(',', 1)[1] if ',' in address else ''
+        return street_match.group(1).strip(), street_match.group(2), plz_city
+    
+    def check_variants(self, addresses: List[str], live: bool = True,
+                       live_limit: Optional[int] = None) -> Dict[str, VariantCheck]:
+        """
+        Prüft gebündelt, welche Adressen auflösbar sind: zuerst Prüf-Cache,
+        geo_cache/geo_alias/Fail-Cache, geocache und Synonyme, danach (nur mit
+        live=True) parallel und gedrosselt live für den Rest.
+        """
+        return self.resolver().check_many(addresses, live=live, live_limit=live_limit)
     
-    def analyze_street_name_variants(self, addresses: List[str]) -> Dict[str, List[StreetNameVariant]]:
-        """Analysiert Varianten von Straßennamen"""
-        street_variants = {}
+    def engine(self) -> AddressRuleEngine:
+        """Kompilierte Straßennamen-Regeln (neu gebaut, sobald sich eine Tabelle ändert)."""
+        signature = tuple((id(t), len(t)) for t in (self.correction_rules, self.special_corrections))
+        cached = self._engine_cache
+        if cached is None or cached[0] != signature:
+            engine = AddressRuleEngine(
+                special_corrections=self.special_corrections,
+                street_rules=self.correction_rules,
+            )
+            self._engine_cache = cached = (signature, engine)
+        return cached[1]
+    
+    def correct_street_name(self, address: str) -> Optional[StreetNameCorrection]:
+        """
+        Wendet Spezial-Korrekturen bzw. die correction_rules (nacheinander) auf
+        eine Adresse an.
         
+        Returns:
+            StreetNameCorrection oder None, wenn keine Regel greift
+        """
+        hit = self.engine().correct_street(address)
+        if hit is None:
+            return None
+        corrected, confidence = hit
+        return StreetNameCorrection(
+            original=address,
+            corrected=corrected,
+            confidence=confidence,
+            correction_type="special_correction" if address in self.special_corrections else "rule_correction"
+        )
+    
+    def correct_street_names(self, addresses: List[str]) -> List[StreetNameCorrection]:
+        """Batch-Variante von correct_street_name (nur Adressen mit Korrektur, Duplikate einmal)."""
+        corrections = []
+        for address in dict.fromkeys(addresses):
+            correction = self.correct_street_name(address)
+            if correction is not None:
+                corrections.append(correction)
+        return corrections
+    
+    def analyze_street_name_variants(self, addresses: List[str], live: bool = True,
+                                     live_limit: Optional[int] = None) -> Dict[str, List[StreetNameVariant]]:
+        """
+        Analysiert Varianten von Straßennamen.
+        
+        Die Geocoding-Prüfung läuft gebündelt über check_variants (Caches zuerst);
+        mit live=False werden nur bekannte Ergebnisse verwendet.
+        """
+        parsed = []
         for address in addresses:
             # Extrahiere Straßennamen (alles vor der Hausnummer)
-            street_match = re.search(r'^([^,]+?)(\d+[a-z]?)', address)
-            if not street_match:
+            parts = self._split_street(address)
+            if parts is None:
                 continue
-                
-            street_name = street_match.group(1).strip()
-            house_number = street_match.group(2)
-            plz_city = address.split(',', 1)[1] if ',' in address else ''
-            
-            # Erstelle Schlüssel für den Straßennamen
-            key = f"{street_name}|{plz_city}"
-            
-            if key not in street_variants:
-                street_variants[key] = []
-            
-            # Teste Geocoding für diese Variante
+            street_name, house_number, plz_city = parts
             test_address = f"{street_name}{house_number}, {plz_city}"
-            success = geocode_address(test_address) is not None
-            
-            street_variants[key].append(StreetNameVariant(
+            parsed.append((f"{street_name}|{plz_city}", street_name, test_address))
+        
+        checks = self.check_variants([p[2] for p in parsed], live=live, live_limit=live_limit)
+        
+        street_variants: Dict[str, List[StreetNameVariant]] = {}
+        for key, street_name, test_address in parsed:
+            check = checks.get(test_address)
+            street_variants.setdefault(key, []).append(StreetNameVariant(
                 variant=street_name,
-                success_rate=1.0 if success else 0.0
+                success_rate=1.0 if check is not None and check.resolves else 0.0
             ))
         
         return street_variants
@@ -174,7 +243,7 @@ class StreetNameValidator:
     def get_all_addresses_from_database(self) -> List[str]:
         """Holt alle Adressen aus der Datenbank"""
         try:
-            import sqlite3
+            from db.connections import connection
             import os
             
             # Datenbank-Pfad finden
@@ -183,15 +252,17 @@ class StreetNameValidator:
                 print(f"❌ Datenbank nicht gefunden: {db_path}")
                 return []
             
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
+            with connection(db_path) as conn:
+                cursor = conn.cursor()
             
-            # Alle Adressen aus dem Geocache holen
-            cursor.execute('SELECT DISTINCT adresse FROM geocache ORDER BY adresse')
-            results = cursor.fetchall()
+                # Alle Adressen aus Geocache und Kundenstamm holen
+                tables = {row[0] for row in cursor.execute(
+                    "SELECT name FROM sqlite_master WHERE type='table' AND name IN ('geocache', 'kunden')"
+                )}
+                query = ' UNION '.join(f'SELECT adresse FROM {t}' for t in sorted(tables))
+                results = cursor.execute(f'{query} ORDER BY adresse').fetchall() if query else []
             
-            addresses = [row[0] for row in results]
-            conn.close()
+                addresses = [row[0] for row in results if row[0]]
             
             print(f"📊 {len(addresses)} Adressen aus der Datenbank geladen")
             return addresses
@@ -200,8 +271,14 @@ class StreetNameValidator:
             print(f"❌ Fehler beim Laden der Adressen: {e}")
             return []
     
-    def validate_all_database_addresses(self) -> Dict[str, List[StreetNameCorrection]]:
-        """Validiert alle Adressen in der Datenbank automatisch"""
+    def validate_all_database_addresses(self, live: bool = True,
+                                        live_limit: Optional[int] = None) -> Dict[str, List[StreetNameCorrection]]:
+        """
+        Validiert alle Adressen in der Datenbank automatisch.
+        
+        Auflösbarkeit kommt gebündelt aus check_variants; live geocodet wird nur,
+        was in keinem Cache steht (live=False: gar nicht, live_limit: Budget pro Lauf).
+        """
         print("🚀 Starte automatische Validierung aller Datenbank-Adressen...")
         print("=" * 60)
         
@@ -216,13 +293,10 @@ class StreetNameValidator:
         
         for address in all_addresses:
             # Extrahiere Straßennamen (alles vor der Hausnummer)
-            street_match = re.search(r'^([^,]+?)(\d+[a-z]?)', address)
-            if not street_match:
+            parts = self._split_street(address)
+            if parts is None:
                 continue
-                
-            street_name = street_match.group(1).strip()
-            house_number = street_match.group(2)
-            plz_city = address.split(',', 1)[1] if ',' in address else ''
+            street_name, house_number, plz_city = parts
             
             # Erstelle Schlüssel für den Straßennamen
             key = f"{street_name}|{plz_city}"
@@ -239,41 +313,30 @@ class StreetNameValidator:
         
         print(f"📊 Gefunden: {len(street_groups)} verschiedene Straßennamen-Gruppen")
         
+        checks = self.check_variants(
+            [a['full_address'] for group in street_groups.values() for a in group],
+            live=live, live_limit=live_limit,
+        )
+        sources: Dict[str, int] = {}
+        for check in checks.values():
+            sources[check.source] = sources.get(check.source, 0) + 1
+        print(f"📊 Quellen: {', '.join(f'{k}={v}' for k, v in sorted(sources.items()))}")
+        
         # Validiere jede Gruppe
         validation_results = {}
         
-        for i, (street_key, addresses) in enumerate(street_groups.items(), 1):
-            print(f"\n[{i}/{len(street_groups)}] 🔍 Validiere: {street_key}")
-            
-            # Teste Geocoding für jede Adresse in der Gruppe
+        for street_key, addresses in street_groups.items():
             validation_results[street_key] = []
             
             for addr_info in addresses:
-                full_addr = addr_info['full_address']
-                street_name = addr_info['street_name']
-                
-                print(f"   📍 Teste: {full_addr}")
-                
-                # Teste Geocoding
-                result = geocode_address(full_addr)
-                
-                if result:
-                    lat, lon = result
-                    print(f"      ✅ Erfolgreich: {lat}, {lon}")
-                    validation_results[street_key].append(StreetNameCorrection(
-                        original=street_name,
-                        corrected=street_name,
-                        confidence=1.0,
-                        correction_type="valid"
-                    ))
-                else:
-                    print(f"      ❌ Fehlgeschlagen")
-                    validation_results[street_key].append(StreetNameCorrection(
-                        original=street_name,
-                        corrected=street_name,
-                        confidence=0.0,
-                        correction_type="invalid"
-                    ))
+                check = checks.get(addr_info['full_address'])
+                valid = check is not None and check.resolves
+                validation_results[street_key].append(StreetNameCorrection(
+                    original=addr_info['street_name'],
+                    corrected=addr_info['street_name'],
+                    confidence=1.0 if valid else 0.0,
+                    correction_type="valid" if valid else ("unchecked" if check is None or check.source == "unchecked" else "invalid")
+                ))
         
         return validation_results
     
@@ -2,11 +2,11 @@
 Kosten-Tracker für KI-Code-Verbesserungen.
 Überwacht API-Kosten, Token-Verbrauch und Ressourcenverbrauch.
 """
-import sqlite3
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from backend.config import cfg
+from db.connections import connection
 
 class CostTracker:
     """Trackt Kosten für KI-API-Aufrufe und Ressourcenverbrauch."""
@@ -38,7 +38,7 @@ class CostTracker:
     
     def _init_db(self):
         """Initialisiert Datenbank."""
-        with sqlite3.connect(self.db_path) as conn:
+        with connection(self.db_path) as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS cost_entries (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -75,7 +75,7 @@ class CostTracker:
         
         cost = self._calculate_cost(model, input_tokens, output_tokens)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with connection(self.db_path) as conn:
             conn.execute("""
                 INSERT INTO cost_entries 
                 (timestamp, model, input_tokens, output_tokens, cost_eur, file_path, operation)
@@ -117,7 +117,7 @@ class CostTracker:
         """Aktualisiert Tages-Totals."""
         today = datetime.now().strftime("%Y-%m-%d")
         
-        with sqlite3.connect(self.db_path) as conn:
+        with connection(self.db_path) as conn:
             # Prüfe ob Eintrag existiert
             cursor = conn.execute("SELECT total_cost_eur, total_api_calls, total_improvements FROM daily_totals WHERE date = ?", (today,))
             row = cursor.fetchone()
@@ -144,7 +144,7 @@ class CostTracker:
         if date is None:
             date = datetime.now().strftime("%Y-%m-%d")
         
-        with sqlite3.connect(self.db_path) as conn:
+        with connection(self.db_path) as conn:
             cursor = conn.execute("SELECT total_cost_eur FROM daily_totals WHERE date = ?", (date,))
             row = cursor.fetchone()
             return row[0] if row else 0.0
@@ -154,7 +154,7 @@ class CostTracker:
         if date is None:
             date = datetime.now().strftime("%Y-%m-%d")
         
-        with sqlite3.connect(self.db_path) as conn:
+        with connection(self.db_path) as conn:
             cursor = conn.execute("""
                 SELECT total_cost_eur, total_api_calls, total_improvements 
                 FROM daily_totals 
@@ -202,7 +202,7 @@ class CostTracker:
         """Gibt Kosten pro Datei zurück (letzte N Tage)."""
         since = (datetime.now() - timedelta(days=days)).isoformat()
         
-        with sqlite3.connect(self.db_path) as conn:
+        with connection(self.db_path) as conn:
             cursor = conn.execute("""
                 SELECT file_path, SUM(cost_eur) as total_cost, COUNT(*) as call_count
                 FROM cost_entries
@@ -221,7 +221,7 @@ class CostTracker:
         """Gibt Kosten-Trend zurück (letzte N Tage)."""
         since = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
         
-        with sqlite3.connect(self.db_path) as conn:
+        with connection(self.db_path) as conn:
             cursor = conn.execute("""
                 SELECT date, total_cost_eur, total_api_calls, total_improvements
                 FROM daily_totals
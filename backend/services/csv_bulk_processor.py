@@ -7,7 +7,7 @@ import sys
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 import pandas as pd
-import sqlite3
+from db.connections import connection
 from datetime import datetime
 
 # Backend-Module importieren
@@ -178,95 +178,91 @@ class CSVBulkProcessor:
         """Erstellt die SQLite-Datenbank mit den notwendigen Tabellen."""
         print(f"\n[INFO] Erstelle Datenbank: {self.db_path}")
         
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
+        with connection(str(self.db_path)) as conn:
+            cursor = conn.cursor()
         
-        # Tabelle für Kunden mit Geodaten
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS customers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                customer_number TEXT,
-                name TEXT,
-                street TEXT,
-                postal_code TEXT,
-                city TEXT,
-                latitude REAL,
-                longitude REAL,
-                tour_type TEXT,
-                tour_time TEXT,
-                bar_flag BOOLEAN,
-                source_file TEXT,
-                processed_at TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+            # Tabelle für Kunden mit Geodaten
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS customers (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    customer_number TEXT,
+                    name TEXT,
+                    street TEXT,
+                    postal_code TEXT,
+                    city TEXT,
+                    latitude REAL,
+                    longitude REAL,
+                    tour_type TEXT,
+                    tour_time TEXT,
+                    bar_flag BOOLEAN,
+                    source_file TEXT,
+                    processed_at TEXT,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
         
-        # Tabelle für Verarbeitungsstatistiken
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS processing_stats (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                filename TEXT,
-                total_tours INTEGER,
-                total_customers INTEGER,
-                status TEXT,
-                processed_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+            # Tabelle für Verarbeitungsstatistiken
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS processing_stats (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    filename TEXT,
+                    total_tours INTEGER,
+                    total_customers INTEGER,
+                    status TEXT,
+                    processed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
         
-        conn.commit()
-        conn.close()
         print("   [OK] Datenbank erstellt")
     
     def save_to_database(self, processed_files: List[Dict[str, Any]]):
         """Speichert alle verarbeiteten Daten in der Datenbank."""
         print(f"\n[INFO] Speichere Daten in Datenbank...")
         
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
+        with connection(str(self.db_path)) as conn:
+            cursor = conn.cursor()
         
-        total_customers_saved = 0
+            total_customers_saved = 0
         
-        for file_data in processed_files:
-            if 'error' in file_data:
-                # Fehler-Statistik speichern
+            for file_data in processed_files:
+                if 'error' in file_data:
+                    # Fehler-Statistik speichern
+                    cursor.execute('''
+                        INSERT INTO processing_stats (filename, total_tours, total_customers, status)
+                        VALUES (?, ?, ?, ?)
+                    ''', (file_data['filename'], 0, 0, f"ERROR: {file_data['error']}"))
+                    continue
+            
+                # Kunden in Datenbank speichern
+                for customer in file_data['customers']:
+                    cursor.execute('''
+                        INSERT INTO customers (
+                            customer_number, name, street, postal_code, city,
+                            latitude, longitude, tour_type, tour_time, bar_flag,
+                            source_file, processed_at
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (
+                        customer.get('customer_number', ''),
+                        customer.get('name', ''),
+                        customer.get('street', ''),
+                        customer.get('postal_code', ''),
+                        customer.get('city', ''),
+                        customer.get('latitude', 0.0),
+                        customer.get('longitude', 0.0),
+                        customer.get('tour_type', ''),
+                        customer.get('tour_time', ''),
+                        customer.get('bar_flag', False),
+                        customer.get('source_file', ''),
+                        customer.get('processed_at', '')
+                    ))
+                    total_customers_saved += 1
+            
+                # Verarbeitungsstatistik speichern
                 cursor.execute('''
                     INSERT INTO processing_stats (filename, total_tours, total_customers, status)
                     VALUES (?, ?, ?, ?)
-                ''', (file_data['filename'], 0, 0, f"ERROR: {file_data['error']}"))
-                continue
-            
-            # Kunden in Datenbank speichern
-            for customer in file_data['customers']:
-                cursor.execute('''
-                    INSERT INTO customers (
-                        customer_number, name, street, postal_code, city,
-                        latitude, longitude, tour_type, tour_time, bar_flag,
-                        source_file, processed_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    customer.get('customer_number', ''),
-                    customer.get('name', ''),
-                    customer.get('street', ''),
-                    customer.get('postal_code', ''),
-                    customer.get('city', ''),
-                    customer.get('latitude', 0.0),
-                    customer.get('longitude', 0.0),
-                    customer.get('tour_type', ''),
-                    customer.get('tour_time', ''),
-                    customer.get('bar_flag', False),
-                    customer.get('source_file', ''),
-                    customer.get('processed_at', '')
-                ))
-                total_customers_saved += 1
-            
-            # Verarbeitungsstatistik speichern
-            cursor.execute('''
-                INSERT INTO processing_stats (filename, total_tours, total_customers, status)
-                VALUES (?, ?, ?, ?)
-            ''', (file_data['filename'], file_data['total_tours'], file_data['total_customers'], 'SUCCESS'))
+                ''', (file_data['filename'], file_data['total_tours'], file_data['total_customers'], 'SUCCESS'))
         
-        conn.commit()
-        conn.close()
         print(f"   [OK] {total_customers_saved} Kunden in Datenbank gespeichert")
     
     def process_all_files(self) -> Dict[str, Any]:
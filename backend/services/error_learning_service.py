@@ -227,34 +227,48 @@ def log_success_event(
         environment: Umgebung
     """
     try:
-        # Zeit-Bucket (Tag)
-        time_bucket = datetime.now().strftime("%Y-%m-%d")
-        
-        with ENGINE.begin() as conn:
-            # Upsert: Erstelle oder aktualisiere Statistik
-            conn.execute(
-                text("""
-                    INSERT INTO success_stats (
-                        endpoint, time_bucket, total_calls, success_calls, error_calls, avg_latency_ms
-                    ) VALUES (
-                        :endpoint, :time_bucket, 1, 1, 0, :latency
-                    )
-                    ON CONFLICT(endpoint, time_bucket) DO UPDATE SET
-                        total_calls = total_calls + 1,
-                        success_calls = success_calls + 1,
-                        avg_latency_ms = (avg_latency_ms * (total_calls - 1) + :latency) / total_calls,
-                        updated_at = CURRENT_TIMESTAMP
-                """),
-                {
-                    "endpoint": endpoint,
-                    "time_bucket": time_bucket,
-                    "latency": request_duration_ms or 0,
-                }
-            )
+        log_success_batch([{
+            "endpoint": endpoint,
+            "time_bucket": datetime.now().strftime("%Y-%m-%d"),
+            "calls": 1,
+            "latency_sum": request_duration_ms or 0,
+        }])
     except Exception as e:
         enhanced_logger.warning(f"Fehler beim Loggen des Success-Events: {e}")
 
 
+def log_success_batch(rows: List[Dict[str, Any]]) -> int:
+    """
+    Schreibt aggregierte Erfolgs-Statistiken in einer Transaktion (Upsert pro Endpoint und Tag).
+    
+    Args:
+        rows: Dicts mit endpoint, time_bucket (YYYY-MM-DD), calls, latency_sum (ms)
+        
+    Returns:
+        Anzahl geschriebener Zeilen
+    """
+    if not rows:
+        return 0
+    with ENGINE.begin() as conn:
+        conn.execute(
+            text("""
+                INSERT INTO success_stats (
+                    endpoint, time_bucket, total_calls, success_calls, error_calls, avg_latency_ms
+                ) VALUES (
+                    :endpoint, :time_bucket, :calls, :calls, 0, CAST(:latency_sum AS REAL) / :calls
+                )
+                ON CONFLICT(endpoint, time_bucket) DO UPDATE SET
+                    total_calls = total_calls + excluded.total_calls,
+                    success_calls = success_calls + excluded.success_calls,
+                    avg_latency_ms = (COALESCE(avg_latency_ms, 0) * total_calls + :latency_sum)
+                                     / (total_calls + excluded.total_calls),
+                    updated_at = CURRENT_TIMESTAMP
+            """),
+            rows,
+        )
+    return len(rows)
+
+
 def get_error_patterns(
     status: Optional[str] = None,
     component: Optional[str] = None,
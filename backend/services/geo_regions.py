@@ -0,0 +1,349 @@
+"""
+Regionen-Index für das FAMO-Geschäftsgebiet (vektorisiert, numpy).
+
+Statt Bounding-Boxen werden vereinfachte Umrisse von Sachsen und seinen
+Nachbarländern Brandenburg, Sachsen-Anhalt und Thüringen verwendet
+(Genauigkeit ca. 1–3 km; Berlin liegt ohne Aussparung im Brandenburg-Umriss,
+gehört also wie bisher zum Gebiet). Gemeinsame Grenzen sind nur einmal
+definiert (Grenzketten zwischen Dreiländerecks), die Umrisse schließen daher
+lückenlos aneinander an.
+
+Zuordnung vieler Punkte in einem Durchgang:
+
+1. Vorberechnetes Raster (GEO_REGION_GRID_DEG) über das Gebiet: Zellen, deren
+   vier Ecken im selben Land liegen und die keinen Umriss-Knick enthalten,
+   liefern das Land direkt per Index-Lookup.
+2. Nur Punkte in Grenzzellen werden exakt per Punkt-in-Polygon
+   (Strahl-Methode, Punkte × Kanten als Array) geprüft.
+3. Punkte knapp außerhalb (GEO_REGION_TOLERANCE_KM, gleicht die Vereinfachung
+   der Umrisse aus) werden dem nächsten Land zugeordnet und als Grenzfall markiert.
+   Der Abstand wird nur für Punkte berechnet, deren Zelle höchstens die Toleranz
+   von einer Grenzzelle entfernt ist (zweite, vorberechnete Rastermaske).
+"""
+from __future__ import annotations
+
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+GRID_DEG = float(os.getenv("GEO_REGION_GRID_DEG", "0.02"))
+TOLERANCE_KM = float(os.getenv("GEO_REGION_TOLERANCE_KM", "3"))
+
+_KM_PER_DEG_LAT = 110.57
+_KM_PER_DEG_LON = 111.32
+_CHUNK = 4096  # Punkte pro Block (Speicher: Punkte × Kanten)
+
+LatLon = Tuple[float, float]
+
+# ---------------------------------------------------------------------------
+# Grenzketten (lat, lon) zwischen den Dreiländerecks
+# ---------------------------------------------------------------------------
+
+# Sachsen / Thüringen: Dreiländereck mit Bayern (Vogtland) → mit Sachsen-Anhalt (bei Pegau)
+_SN_TH = [
+    (50.41, 11.91), (50.47, 11.88), (50.55, 11.90), (50.61, 11.99), (50.63, 12.14), (50.66, 12.25),
+    (50.73, 12.28), (50.80, 12.32), (50.85, 12.40), (50.88, 12.48), (50.94, 12.54), (51.01, 12.54),
+    (51.06, 12.48), (51.08, 12.40), (51.12, 12.35), (51.10, 12.26),
+]
+# Sachsen / Sachsen-Anhalt: westlich Leipzig, nördlich Delitzsch/Torgau → Dreiländereck mit Brandenburg
+_SN_ST = [
+    (51.10, 12.26), (51.17, 12.20), (51.25, 12.18), (51.33, 12.16), (51.40, 12.17), (51.46, 12.20),
+    (51.52, 12.23), (51.57, 12.30), (51.60, 12.40), (51.63, 12.52), (51.66, 12.66), (51.68, 12.72),
+    (51.67, 12.83), (51.65, 12.90), (51.64, 13.00), (51.62, 13.12),
+]
+# Sachsen / Brandenburg: Elbe bei Mühlberg, Ortrand, Lausitz → Neiße nördlich Bad Muskau
+_SN_BB = [
+    (51.62, 13.12), (51.55, 13.15), (51.47, 13.17), (51.40, 13.20), (51.38, 13.32), (51.44, 13.42),
+    (51.44, 13.50), (51.42, 13.55), (51.40, 13.62), (51.36, 13.72), (51.35, 13.76), (51.38, 13.85),
+    (51.43, 13.92), (51.47, 14.00), (51.49, 14.12), (51.52, 14.25), (51.54, 14.35), (51.53, 14.45),
+    (51.56, 14.55), (51.58, 14.65), (51.58, 14.74),
+]
+# Sachsen / Polen: Neiße bis zum Dreiländereck bei Zittau
+_SN_PL = [
+    (51.58, 14.74), (51.50, 14.73), (51.42, 14.87), (51.34, 14.97), (51.27, 15.04), (51.20, 15.01),
+    (51.15, 15.00), (51.05, 14.96), (50.98, 14.92), (50.92, 14.86), (50.87, 14.82),
+]
+# Sachsen / Tschechien: Zittauer Gebirge, Schluckenauer Zipfel, Elbsandstein, Erzgebirge, Vogtland
+_SN_CZ = [
+    (50.87, 14.82), (50.82, 14.72), (50.88, 14.65), (50.92, 14.64), (50.925, 14.60), (50.96, 14.58),
+    (50.985, 14.55), (51.00, 14.50), (51.03, 14.45), (51.05, 14.38), (50.99, 14.32), (50.93, 14.38),
+    (50.90, 14.27), (50.86, 14.20), (50.84, 14.05), (50.77, 13.90), (50.73, 13.75), (50.70, 13.55),
+    (50.64, 13.52), (50.59, 13.48), (50.61, 13.44), (50.64, 13.40), (50.65, 13.35), (50.62, 13.30),
+    (50.57, 13.25), (50.55, 13.20), (50.51, 13.10), (50.47, 13.00), (50.43, 12.99), (50.405, 12.95),
+    (50.42, 12.88), (50.42, 12.70), (50.37, 12.55), (50.33, 12.45), (50.25, 12.40), (50.20, 12.33),
+    (50.17, 12.27), (50.21, 12.22), (50.25, 12.19), (50.29, 12.15), (50.322, 12.101),
+]
+# Sachsen / Bayern: Dreiländereck bei Prex → Dreiländereck mit Thüringen
+_SN_BY = [(50.322, 12.101), (50.36, 12.02), (50.38, 11.95), (50.41, 11.91)]
+
+# Thüringen / Bayern: Frankenwald, Sonneberg, Heldburger Land, Grabfeld → Rhön
+_TH_BY = [
+    (50.41, 11.91), (50.45, 11.78), (50.50, 11.60), (50.47, 11.47), (50.52, 11.37), (50.50, 11.25),
+    (50.42, 11.20), (50.36, 11.20), (50.33, 11.14), (50.30, 11.05), (50.33, 10.90), (50.37, 10.80),
+    (50.33, 10.74), (50.25, 10.76), (50.28, 10.60), (50.35, 10.50), (50.40, 10.45), (50.44, 10.37),
+    (50.47, 10.25), (50.54, 10.17), (50.50, 10.06), (50.50, 10.04),
+]
+# Thüringen / Hessen: Rhön, Werra → Eichsfeld
+_TH_HE = [
+    (50.50, 10.04), (50.58, 10.08), (50.66, 10.06), (50.70, 9.98), (50.72, 9.88), (50.78, 9.95),
+    (50.85, 10.02), (50.92, 10.02), (50.94, 10.00), (50.98, 10.05), (51.03, 10.17), (51.08, 10.20),
+    (51.15, 10.22), (51.17, 10.25), (51.22, 10.15), (51.27, 10.02), (51.30, 9.98), (51.37, 9.93),
+]
+# Thüringen / Niedersachsen: Eichsfeld → Südharz
+_TH_NDS = [
+    (51.37, 9.93), (51.40, 10.00), (51.43, 10.10), (51.49, 10.22), (51.49, 10.32), (51.52, 10.40),
+    (51.56, 10.50), (51.58, 10.60), (51.62, 10.69),
+]
+# Thüringen / Sachsen-Anhalt: Südharz, Kyffhäuser, Unstrut, Saale → Dreiländereck mit Sachsen
+_TH_ST = [
+    (51.62, 10.69), (51.60, 10.80), (51.55, 10.93), (51.47, 11.00), (51.42, 11.05), (51.40, 11.15),
+    (51.39, 11.30), (51.36, 11.40), (51.30, 11.48), (51.25, 11.52), (51.18, 11.50), (51.12, 11.50),
+    (51.10, 11.60), (51.09, 11.68), (51.07, 11.75), (51.03, 11.85), (51.00, 11.95), (51.02, 12.05),
+    (51.03, 12.15), (51.06, 12.22), (51.10, 12.26),
+]
+# Sachsen-Anhalt / Niedersachsen: Harz, Helmstedt, Wolfsburg, Altmark → Elbe
+_ST_NDS = [
+    (51.62, 10.69), (51.70, 10.66), (51.75, 10.57), (51.87, 10.58), (51.93, 10.62), (52.00, 10.80),
+    (52.08, 10.95), (52.17, 11.05), (52.25, 11.02), (52.35, 10.98), (52.45, 10.93), (52.55, 10.95),
+    (52.62, 10.85), (52.70, 10.82), (52.80, 10.93), (52.85, 11.08), (52.90, 11.20), (52.98, 11.35),
+    (53.00, 11.48), (53.04, 11.58),
+]
+# Sachsen-Anhalt / Brandenburg: Elbe, Havelland, Fläming → Dreiländereck mit Sachsen
+_ST_BB = [
+    (53.04, 11.58), (53.00, 11.68), (52.93, 11.85), (52.88, 12.05), (52.85, 12.18), (52.75, 12.25),
+    (52.65, 12.23), (52.55, 12.20), (52.45, 12.22), (52.38, 12.25), (52.30, 12.25), (52.22, 12.28),
+    (52.12, 12.35), (52.05, 12.45), (51.98, 12.60), (51.95, 12.80), (51.95, 12.95), (51.90, 13.10),
+    (51.82, 13.15), (51.75, 13.12), (51.68, 13.10), (51.62, 13.12),
+]
+# Brandenburg / Polen: Neiße, Oder → westlich Stettin
+_BB_PL = [
+    (51.58, 14.74), (51.66, 14.68), (51.74, 14.64), (51.85, 14.70), (51.95, 14.72), (52.07, 14.76),
+    (52.15, 14.67), (52.25, 14.59), (52.35, 14.57), (52.45, 14.58), (52.57, 14.63), (52.70, 14.48),
+    (52.83, 14.15), (52.96, 14.20), (53.06, 14.35), (53.16, 14.38), (53.28, 14.41),
+]
+# Brandenburg / Mecklenburg-Vorpommern: Uckermark, Ruppin, Prignitz → Elbe bei Dömitz
+_BB_MV = [
+    (53.28, 14.41), (53.35, 14.30), (53.42, 14.22), (53.45, 14.10), (53.48, 13.95), (53.55, 13.85),
+    (53.45, 13.70), (53.40, 13.55), (53.30, 13.40), (53.25, 13.25), (53.22, 13.10), (53.22, 12.95),
+    (53.20, 12.80), (53.22, 12.60), (53.25, 12.40), (53.33, 12.25), (53.32, 12.10), (53.28, 11.95),
+    (53.22, 11.75), (53.18, 11.55), (53.13, 11.27),
+]
+# Brandenburg / Niedersachsen: Elbe bei Lenzen
+_BB_NDS = [(53.13, 11.27), (53.08, 11.35), (53.06, 11.47), (53.04, 11.58)]
+
+
+def _ring(*chains: Sequence[LatLon]) -> List[LatLon]:
+    """Setzt Grenzketten zu einem geschlossenen Umriss zusammen (Endpunkte sind gemeinsam)."""
+    ring: List[LatLon] = list(chains[0])
+    for chain in chains[1:]:
+        assert ring[-1] == chain[0], f"Grenzketten schließen nicht an: {ring[-1]} → {chain[0]}"
+        ring.extend(chain[1:])
+    assert ring[0] == ring[-1], "Umriss nicht geschlossen"
+    return ring[:-1]
+
+
+def _rev(chain: Sequence[LatLon]) -> List[LatLon]:
+    return list(reversed(chain))
+
+
+SERVICE_OUTLINES: Dict[str, List[LatLon]] = {
+    "Sachsen": _ring(_SN_TH, _SN_ST, _SN_BB, _SN_PL, _SN_CZ, _SN_BY),
+    "Brandenburg": _ring(_ST_BB, _SN_BB, _BB_PL, _BB_MV, _BB_NDS),
+    "Sachsen-Anhalt": _ring(_ST_NDS, _ST_BB, _rev(_SN_ST), _rev(_TH_ST)),
+    "Thüringen": _ring(_TH_BY, _TH_HE, _TH_NDS, _TH_ST, _rev(_SN_TH)),
+}
+
+
+# ---------------------------------------------------------------------------
+# Vektorisierte Geometrie
+# ---------------------------------------------------------------------------
+
+
+class _Polygon:
+    """Ein Umriss als Kanten-Arrays (lat/lon von Start- und Endpunkt jeder Kante)."""
+
+    def __init__(self, ring: Sequence[LatLon]):
+        pts = np.asarray(ring, dtype=float)
+        nxt = np.roll(pts, -1, axis=0)
+        self.vertices = pts
+        self.lat1, self.lon1 = pts[:, 0], pts[:, 1]
+        self.lat2, self.lon2 = nxt[:, 0], nxt[:, 1]
+        self.min_lat, self.min_lon = pts.min(axis=0)
+        self.max_lat, self.max_lon = pts.max(axis=0)
+
+    def in_bbox(self, lat: np.ndarray, lon: np.ndarray, pad: float = 0.0) -> np.ndarray:
+        return (
+            (lat >= self.min_lat - pad) & (lat <= self.max_lat + pad)
+            & (lon >= self.min_lon - pad) & (lon <= self.max_lon + pad)
+        )
+
+    def contains(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        """Punkt-in-Polygon (Strahl nach Osten, gerade/ungerade Kreuzungen) für alle Punkte."""
+        out = np.zeros(len(lat), dtype=bool)
+        for start in range(0, len(lat), _CHUNK):
+            la = lat[start:start + _CHUNK, None]
+            lo = lon[start:start + _CHUNK, None]
+            crosses = (self.lat1 > la) != (self.lat2 > la)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                x = self.lon1 + (la - self.lat1) * (self.lon2 - self.lon1) / (self.lat2 - self.lat1)
+            out[start:start + _CHUNK] = np.count_nonzero(crosses & (lo < x), axis=1) % 2 == 1
+        return out
+
+    def distance_km(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        """Abstand zum Umriss in km (lokal äquirektangulär projiziert)."""
+        out = np.empty(len(lat))
+        for start in range(0, len(lat), _CHUNK):
+            la = lat[start:start + _CHUNK, None]
+            lo = lon[start:start + _CHUNK, None]
+            kx = _KM_PER_DEG_LON * np.cos(np.radians(la))
+            ax, ay = (self.lon1 - lo) * kx, (self.lat1 - la) * _KM_PER_DEG_LAT
+            bx, by = (self.lon2 - lo) * kx, (self.lat2 - la) * _KM_PER_DEG_LAT
+            dx, dy = bx - ax, by - ay
+            with np.errstate(divide="ignore", invalid="ignore"):
+                t = np.clip(-(ax * dx + ay * dy) / (dx * dx + dy * dy), 0.0, 1.0)
+            t = np.nan_to_num(t)
+            out[start:start + _CHUNK] = np.hypot(ax + t * dx, ay + t * dy).min(axis=1)
+        return out
+
+
+class RegionIndex:
+    """Ordnet Koordinaten-Arrays den Umrissen zu (Raster-Lookup + exakte Prüfung an Grenzen)."""
+
+    OUTSIDE = -1
+    _BORDER_CELL = -2
+
+    def __init__(
+        self,
+        outlines: Dict[str, Sequence[LatLon]] = SERVICE_OUTLINES,
+        cell_deg: float = GRID_DEG,
+        tolerance_km: float = TOLERANCE_KM,
+    ):
+        self.names: List[str] = list(outlines)
+        self.polygons = [_Polygon(ring) for ring in outlines.values()]
+        self.cell_deg = cell_deg
+        self.tolerance_km = tolerance_km
+        # Rand um die Umrisse: eine Zelle plus Toleranz (Längengrade bei 55°N ca. halb so lang)
+        pad = cell_deg + tolerance_km / _KM_PER_DEG_LAT * 2
+        self.lat0 = min(p.min_lat for p in self.polygons) - pad
+        self.lon0 = min(p.min_lon for p in self.polygons) - pad
+        self.rows = int(np.ceil((max(p.max_lat for p in self.polygons) + pad - self.lat0) / cell_deg))
+        self.cols = int(np.ceil((max(p.max_lon for p in self.polygons) + pad - self.lon0) / cell_deg))
+        self._grid: Optional[np.ndarray] = None
+        self._near: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------ Raster
+
+    def _exact(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        """Exakte Zuordnung per Punkt-in-Polygon (nur Punkte in der Box des Umrisses)."""
+        out = np.full(len(lat), self.OUTSIDE, dtype=np.int16)
+        for idx, poly in enumerate(self.polygons):
+            cand = np.flatnonzero((out == self.OUTSIDE) & poly.in_bbox(lat, lon))
+            if cand.size:
+                out[cand[poly.contains(lat[cand], lon[cand])]] = idx
+        return out
+
+    def grid(self) -> np.ndarray:
+        """Raster (rows × cols): Landes-Index, OUTSIDE oder Grenzzelle (lazy, einmalig)."""
+        if self._grid is None:
+            with self._lock:
+                if self._grid is None:
+                    grid = self._build_grid()
+                    self._near = self._near_border(grid)
+                    self._grid = grid
+        return self._grid
+
+    def _build_grid(self) -> np.ndarray:
+        lat_c = self.lat0 + np.arange(self.rows + 1) * self.cell_deg
+        lon_c = self.lon0 + np.arange(self.cols + 1) * self.cell_deg
+        la, lo = np.meshgrid(lat_c, lon_c, indexing="ij")
+        corners = self._exact(la.ravel(), lo.ravel()).reshape(la.shape)
+        grid = corners[:-1, :-1].copy()
+        uniform = (
+            (corners[:-1, :-1] == corners[1:, :-1])
+            & (corners[:-1, :-1] == corners[:-1, 1:])
+            & (corners[:-1, :-1] == corners[1:, 1:])
+        )
+        grid[~uniform] = self._BORDER_CELL
+        # Zellen mit Umriss-Knick: Ecken können gleich sein, obwohl eine Spitze hineinragt
+        for poly in self.polygons:
+            i = ((poly.vertices[:, 0] - self.lat0) // self.cell_deg).astype(int)
+            j = ((poly.vertices[:, 1] - self.lon0) // self.cell_deg).astype(int)
+            grid[i, j] = self._BORDER_CELL
+        return grid
+
+    def _near_border(self, grid: np.ndarray) -> np.ndarray:
+        """Maske der Zellen, die höchstens tolerance_km (plus eine Zelle) von einer Grenzzelle entfernt sind."""
+        border = grid == self._BORDER_CELL
+        max_lat = self.lat0 + self.rows * self.cell_deg
+        ki = int(np.ceil(self.tolerance_km / (self.cell_deg * _KM_PER_DEG_LAT))) + 1
+        kj = int(np.ceil(self.tolerance_km / (self.cell_deg * _KM_PER_DEG_LON * np.cos(np.radians(max_lat))))) + 1
+        padded = np.pad(border, ((ki, ki), (kj, kj)))
+        near = np.zeros_like(border)
+        for di in range(2 * ki + 1):
+            for dj in range(2 * kj + 1):
+                near |= padded[di:di + self.rows, dj:dj + self.cols]
+        return near
+
+    # ------------------------------------------------------------------ Abfrage
+
+    def locate(self, lat, lon) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Landes-Index für jeden Punkt.
+
+        Args:
+            lat, lon: gleich lange Folgen/Arrays (NaN erlaubt → OUTSIDE)
+
+        Returns:
+            (index, border): index = Position in `names` oder OUTSIDE; border = True,
+            wenn der Punkt außerhalb der Umrisse, aber innerhalb der Toleranz liegt
+        """
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        out = np.full(lat.shape, self.OUTSIDE, dtype=np.int16)
+        border = np.zeros(lat.shape, dtype=bool)
+
+        i = np.floor((lat - self.lat0) / self.cell_deg)
+        j = np.floor((lon - self.lon0) / self.cell_deg)
+        in_grid = np.flatnonzero((i >= 0) & (i < self.rows) & (j >= 0) & (j < self.cols))
+        gi, gj = i[in_grid].astype(int), j[in_grid].astype(int)
+        cells = self.grid()[gi, gj]
+        out[in_grid] = np.where(cells == self._BORDER_CELL, self.OUTSIDE, cells)
+
+        exact = in_grid[cells == self._BORDER_CELL]
+        if exact.size:
+            out[exact] = self._exact(lat[exact], lon[exact])
+
+        if self.tolerance_km > 0:
+            pad = self.tolerance_km / _KM_PER_DEG_LAT * 2
+            # Außerhalb des Rasters liegt kein Punkt innerhalb der Toleranz (Rand ≥ Toleranz)
+            near = np.zeros(lat.shape, dtype=bool)
+            near[in_grid] = self._near[gi, gj]
+            near &= out == self.OUTSIDE
+            best = np.full(lat.shape, np.inf)
+            for idx, poly in enumerate(self.polygons):
+                cand = np.flatnonzero(near & poly.in_bbox(lat, lon, pad))
+                if not cand.size:
+                    continue
+                dist = poly.distance_km(lat[cand], lon[cand])
+                hit = (dist <= self.tolerance_km) & (dist < best[cand])
+                best[cand[hit]] = dist[hit]
+                out[cand[hit]] = idx
+            border[near & np.isfinite(best)] = True
+        return out, border
+
+
+_index: Optional[RegionIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_region_index() -> RegionIndex:
+    """Lazy Singleton (das Raster wird beim ersten locate() berechnet)."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = RegionIndex()
+    return _index
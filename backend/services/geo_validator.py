@@ -2,13 +2,26 @@
 Geografischer Validator für FAMO TrafficApp
 Validiert Kundenadressen auf das FAMO-Geschäftsgebiet:
 - Sachsen, Brandenburg, Sachsen-Anhalt, Thüringen
+
+Die Zuordnung läuft über die Landes-Umrisse aus geo_regions (Raster-Lookup,
+exakte Punkt-in-Polygon-Prüfung nur an Grenzen) und ist vektorisiert:
+check_coordinates() prüft beliebig viele Punkte in einem Durchgang,
+refresh_geo_cache_region_ok() setzt damit region_ok für den ganzen geo_cache.
 """
 
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Optional, Tuple, List
+import logging
+import time
+from typing import Dict, Optional, Sequence, Tuple, List
 from enum import Enum
 
+import numpy as np
+
+from backend.services.geo_regions import RegionIndex, get_region_index
+
+logger = logging.getLogger(__name__)
+
 
 class ValidationResult(Enum):
     VALID = "valid"
@@ -36,44 +49,50 @@ class BundeslandBounds:
     max_lon: float
 
 
+@dataclass
+class RegionCheck:
+    """Ergebnis von check_coordinates: ein Eintrag pro Punkt."""
+
+    valid_coords: np.ndarray  # bool: Koordinaten plausibel (Deutschland)
+    in_service: np.ndarray  # bool: im FAMO-Geschäftsgebiet
+    border: np.ndarray  # bool: knapp außerhalb der Umrisse, über die Grenz-Toleranz im Gebiet
+    region: List[Optional[str]]  # Bundesland (im Gebiet), erkannte Region (außerhalb), None (ungültig)
+
+    @property
+    def region_ok(self) -> np.ndarray:
+        """1 = im Gebiet, 0 = außerhalb/ungültig (Spalte geo_cache.region_ok)."""
+        return self.in_service.astype(np.int8)
+
+    def result(self, i: int) -> ValidationResult:
+        if not self.valid_coords[i]:
+            return ValidationResult.INVALID_COORDINATES
+        if self.in_service[i]:
+            return ValidationResult.VALID
+        return ValidationResult.OUTSIDE_SERVICE_AREA
+
+    def results(self) -> List[ValidationResult]:
+        """result() für alle Punkte auf einmal."""
+        codes = np.where(self.valid_coords, np.where(self.in_service, 0, 1), 2)
+        lookup = (ValidationResult.VALID, ValidationResult.OUTSIDE_SERVICE_AREA, ValidationResult.INVALID_COORDINATES)
+        return [lookup[c] for c in codes.tolist()]
+
+
 class GeoValidator:
     """Validiert Kundenadressen auf FAMO-Geschäftsgebiet"""
 
-    def __init__(self):
-        # Definiere die geografischen Grenzen der relevanten Bundesländer
+    def __init__(self, regions: Optional[RegionIndex] = None):
+        # Umrisse der relevanten Bundesländer (Sachsen und Nachbarländer)
+        self.regions = regions or get_region_index()
+        # Bounding-Boxen der Umrisse (Übersicht / get_service_area_summary)
         self.service_areas = [
-            # Sachsen (Hauptgeschäftsgebiet)
             BundeslandBounds(
-                name="Sachsen",
-                min_lat=50.171,
-                max_lat=51.685,  # Vogtland bis Lausitz
-                min_lon=11.872,
-                max_lon=15.038,  # Plauen bis Görlitz
-            ),
-            # Brandenburg
-            BundeslandBounds(
-                name="Brandenburg",
-                min_lat=51.359,
-                max_lat=53.558,  # Süd bis Nord-Brandenburg
-                min_lon=11.268,
-                max_lon=14.766,  # West bis Ost-Brandenburg
-            ),
-            # Sachsen-Anhalt
-            BundeslandBounds(
-                name="Sachsen-Anhalt",
-                min_lat=50.937,
-                max_lat=53.042,  # Harz bis Altmark
-                min_lon=10.565,
-                max_lon=13.182,  # Harz bis Elbe
-            ),
-            # Thüringen
-            BundeslandBounds(
-                name="Thüringen",
-                min_lat=50.204,
-                max_lat=51.649,  # Rhön bis Hainich
-                min_lon=9.877,
-                max_lon=12.653,  # Wartburg bis Altenburger Land
-            ),
+                name=name,
+                min_lat=float(poly.min_lat),
+                max_lat=float(poly.max_lat),
+                min_lon=float(poly.min_lon),
+                max_lon=float(poly.max_lon),
+            )
+            for name, poly in zip(self.regions.names, self.regions.polygons)
         ]
 
         # Bekannte problematische Regionen für bessere Fehlermeldungen
@@ -87,47 +106,88 @@ class GeoValidator:
             "Schleswig-Holstein": (53.4, 55.1, 7.9, 11.3),
             "Ostsee-Region": (53.8, 55.0, 10.0, 15.0),
             "Nordsee-Region": (53.3, 55.0, 6.0, 9.0),
+            # Nachbarstaaten an der Grenze von Sachsen/Brandenburg (früher teils in den Sachsen-Boxen)
+            "Polen": (50.85, 54.9, 14.1, 24.2),
+            "Tschechien": (48.5, 51.1, 12.0, 18.9),
         }
 
-    def validate_coordinates(
-        self, lat: float, lon: float, address: str = ""
-    ) -> Tuple[ValidationResult, Optional[GeoValidationError]]:
-        """Validiert Koordinaten gegen FAMO-Geschäftsgebiet"""
-
-        # Basis-Koordinaten-Check
-        if not self._are_valid_coordinates(lat, lon):
-            return ValidationResult.INVALID_COORDINATES, GeoValidationError(
+    def check_coordinates(self, lats: Sequence[float], lons: Sequence[float]) -> RegionCheck:
+        """
+        Prüft beliebig viele Koordinaten in einem Durchgang (numpy).
+
+        Args:
+            lats, lons: gleich lange Folgen (None/NaN = ungültig)
+
+        Returns:
+            RegionCheck mit Flags und Region pro Punkt
+        """
+        lat = np.asarray(lats, dtype=float)
+        lon = np.asarray(lons, dtype=float)
+        valid = self._are_valid_coordinates_many(lat, lon)
+
+        index, border = self.regions.locate(np.where(valid, lat, np.nan), np.where(valid, lon, np.nan))
+        in_service = valid & (index >= 0)
+
+        names = np.array(self.regions.names + [None], dtype=object)
+        region = names[np.where(index >= 0, index, len(self.regions.names))]
+        outside = np.flatnonzero(valid & ~in_service)
+        if outside.size:
+            region[outside] = self._detect_regions(lat[outside], lon[outside])
+        return RegionCheck(valid_coords=valid, in_service=in_service, border=border & in_service,
+                           region=region.tolist())
+
+    def _error_for(
+        self,
+        result: ValidationResult,
+        detected_region: Optional[str],
+        lat: float,
+        lon: float,
+        suggestions: Optional[Dict[Optional[str], str]] = None,
+    ) -> Optional[GeoValidationError]:
+        """Fehlerobjekt zu einem Prüfergebnis; `suggestions` merkt sich Vorschläge pro Region (Batch)."""
+        if result is ValidationResult.INVALID_COORDINATES:
+            return GeoValidationError(
                 result=ValidationResult.INVALID_COORDINATES,
                 message=f"Ungültige Koordinaten: {lat}, {lon}",
                 suggested_action="Adresse erneut geocodieren oder manuell korrigieren",
             )
+        if result is ValidationResult.OUTSIDE_SERVICE_AREA:
+            if suggestions is None:
+                suggestion = self._get_suggestion_for_region(detected_region)
+            elif detected_region in suggestions:
+                suggestion = suggestions[detected_region]
+            else:
+                suggestion = suggestions[detected_region] = self._get_suggestion_for_region(detected_region)
+            return GeoValidationError(
+                result=ValidationResult.OUTSIDE_SERVICE_AREA,
+                message="Adresse liegt außerhalb des FAMO-Geschäftsgebiets",
+                suggested_action=suggestion,
+                detected_region=detected_region,
+            )
+        return None
 
-        # Prüfe ob in einem der Service-Gebiete
-        for area in self.service_areas:
-            if self._is_in_bounds(lat, lon, area):
-                return ValidationResult.VALID, None
-
-        # Außerhalb des Service-Gebiets - ermittle wo
-        detected_region = self._detect_region(lat, lon)
-
-        return ValidationResult.OUTSIDE_SERVICE_AREA, GeoValidationError(
-            result=ValidationResult.OUTSIDE_SERVICE_AREA,
-            message="Adresse liegt außerhalb des FAMO-Geschäftsgebiets",
-            suggested_action=self._get_suggestion_for_region(detected_region),
-            detected_region=detected_region,
-        )
+    def validate_coordinates(
+        self, lat: float, lon: float, address: str = ""
+    ) -> Tuple[ValidationResult, Optional[GeoValidationError]]:
+        """Validiert Koordinaten gegen FAMO-Geschäftsgebiet"""
+        check = self.check_coordinates([lat], [lon])
+        result = check.result(0)
+        return result, self._error_for(result, check.region[0], lat, lon)
 
     def validate_address_batch(
         self, addresses_with_coords: List[Tuple[str, float, float]]
     ) -> List[Tuple[str, ValidationResult, Optional[GeoValidationError]]]:
-        """Validiert mehrere Adressen auf einmal"""
-        results = []
-
-        for address, lat, lon in addresses_with_coords:
-            result, error = self.validate_coordinates(lat, lon, address)
-            results.append((address, result, error))
-
-        return results
+        """Validiert mehrere Adressen auf einmal (ein vektorisierter Durchgang)"""
+        if not addresses_with_coords:
+            return []
+        _, lats, lons = zip(*addresses_with_coords)
+        check = self.check_coordinates(lats, lons)
+        valid = ValidationResult.VALID
+        suggestions: Dict[Optional[str], str] = {}
+        return [
+            (address, result, None if result is valid else self._error_for(result, region, lat, lon, suggestions))
+            for (address, lat, lon), result, region in zip(addresses_with_coords, check.results(), check.region)
+        ]
 
     def get_service_area_summary(self) -> dict:
         """Gibt Übersicht über das Service-Gebiet zurück"""
@@ -158,6 +218,11 @@ class GeoValidator:
             and 5 <= lon <= 16
         )
 
+    def _are_valid_coordinates_many(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        """Vektorisierte Variante von _are_valid_coordinates (NaN → ungültig)"""
+        with np.errstate(invalid="ignore"):
+            return (lat >= 47) & (lat <= 55) & (lon >= 5) & (lon <= 16)
+
     def _is_in_bounds(self, lat: float, lon: float, bounds: BundeslandBounds) -> bool:
         """Prüft ob Koordinaten in einem Bundesland liegen"""
         return (
@@ -186,6 +251,19 @@ class GeoValidator:
         else:
             return "Unbekannte Region"
 
+    def _detect_regions(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        """Vektorisierte Variante von _detect_region (erste passende Region gewinnt)"""
+        region = np.full(len(lat), None, dtype=object)
+        region[lat < 50] = "Süddeutschland"
+        region[lat > 52.5] = "Norddeutschland"
+        middle = (lat >= 50) & (lat <= 52.5)
+        region[middle & (lon < 10)] = "Westdeutschland"
+        region[middle & (lon >= 10)] = "Unbekannte Region"
+        # Rückwärts zuweisen, damit wie in _detect_region die erste Box Vorrang hat
+        for region_name, (min_lat, max_lat, min_lon, max_lon) in reversed(list(self.known_outside_regions.items())):
+            region[(lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)] = region_name
+        return region
+
     def _get_suggestion_for_region(self, detected_region: Optional[str]) -> str:
         """Gibt regionsspezifische Korrekturvorschläge"""
         if not detected_region:
@@ -254,6 +332,54 @@ def get_validation_stats_for_batch(
     return stats
 
 
+def refresh_geo_cache_region_ok(only_missing: bool = False, dry_run: bool = False) -> dict:
+    """
+    Prüft alle Koordinaten im geo_cache in einem vektorisierten Durchgang und
+    schreibt region_ok (1/0) zurück - nur für Einträge, deren Wert sich ändert.
+
+    Args:
+        only_missing: nur Einträge ohne region_ok prüfen
+        dry_run: nichts schreiben, nur zählen
+
+    Returns:
+        Statistik (total, ok, outside, invalid, border, changed, regions, elapsed_s)
+    """
+    from repositories import geo_repo
+
+    start = time.perf_counter()
+    rows = geo_repo.coordinates_for_region_check(only_missing=only_missing)
+    stats = {"total": len(rows), "ok": 0, "outside": 0, "invalid": 0, "border": 0, "changed": 0, "regions": {}}
+    if rows:
+        keys, lats, lons, current = zip(*rows)
+        check = geo_validator.check_coordinates(
+            [np.nan if v is None else v for v in lats], [np.nan if v is None else v for v in lons]
+        )
+        region_ok = check.region_ok
+        stats["ok"] = int(check.in_service.sum())
+        stats["invalid"] = int((~check.valid_coords).sum())
+        stats["outside"] = stats["total"] - stats["ok"] - stats["invalid"]
+        stats["border"] = int(check.border.sum())
+        names, counts = np.unique(np.array([r or "-" for r in check.region], dtype=object), return_counts=True)
+        stats["regions"] = {str(n): int(c) for n, c in zip(names, counts) if n != "-"}
+
+        updates = [
+            (key, int(region_ok[i]))
+            for i, (key, old) in enumerate(zip(keys, current))
+            if old is None or int(old) != region_ok[i]
+        ]
+        stats["changed"] = len(updates)
+        if updates and not dry_run:
+            geo_repo.set_region_ok(updates)
+
+    stats["elapsed_s"] = round(time.perf_counter() - start, 3)
+    logger.info(
+        f"[GEO-REGION] geo_cache geprüft: {stats['total']} Einträge, {stats['ok']} im Gebiet, "
+        f"{stats['outside']} außerhalb, {stats['invalid']} ungültig, {stats['changed']} geändert "
+        f"({stats['elapsed_s']}s)"
+    )
+    return stats
+
+
 if __name__ == "__main__":
     # Test-Beispiele
     validator = GeoValidator()
@@ -10,11 +10,13 @@ from fastapi import HTTPException
 
 from backend.db.dao import geocache_get, geocache_set, postal_cache_get, postal_cache_set
 from backend.services.address_mapper import address_mapper
+from backend.services.request_tracing import traced
 
 MAPBOX_TOKEN = os.getenv("MAPBOX_ACCESS_TOKEN")
 GEOAPIFY_API_KEY = os.getenv("GEOAPIFY_API_KEY", "32abbda2bed24f58846db0c5685e8b49")
 
 
+@traced("geocode")
 def geocode_address(address: str) -> Optional[Dict[str, Any]]:
     # 1. Address-Mapper prüfen (höchste Priorität)
     mapping_result = address_mapper.map_address(address)
@@ -0,0 +1,637 @@
+"""
+Hintergrund-Jobs für lange Workflow-Operationen (Upload, Bulk-Geocoding, Analyse).
+
+- Persistente Job-Tabelle `jobs` in der Haupt-DB: Status, Priorität, Eingabe,
+  Ergebnis; nach einem Neustart werden offene Jobs wieder eingeplant.
+- Mehrere Prozesse (uvicorn-Worker): laufende Jobs tragen Besitzer (Boot-ID des
+  Prozesses) und Heartbeat. Neu eingeplant werden nur Jobs, deren Lease
+  (JOB_LEASE_S) abgelaufen ist - Jobs anderer, lebender Worker laufen weiter.
+- Worker-Pool: Threads für I/O-lastige Jobs (async Handler laufen in einer
+  eigenen Event-Loop im Worker-Thread), Prozesse für CPU-lastige Arbeit
+  (Jobs mit executor="process" oder ctx.run_cpu() für einzelne Schritte).
+- Prioritäten (höher = früher) und Abbruch (wartend: sofort, laufend: kooperativ
+  über ctx.cancelled()). Das Abbruch-Flag steht in der DB; der Heartbeat übernimmt
+  Abbrüche, die über einen anderen Worker angefordert wurden.
+- Idempotenz: Jobs sind über einen Hash aus Art, Eingabe-Inhalt und Parametern
+  verschlüsselt. Dieselbe CSV erneut einzureichen liefert den laufenden Job
+  bzw. das gecachte Ergebnis (innerhalb von cache_ttl_s der Job-Art).
+- Fortschritt: Job-ID = Progress-Session (/api/progress/{job_id}/events).
+
+Verwendung:
+    register_job("workflow_upload", handler, executor="thread", cache_ttl_s=3600)
+    job = get_job_runner().submit("workflow_upload", payload=content, params={...})
+    return await job_response(job, mode)
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import heapq
+import inspect
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse
+from starlette.responses import Response
+
+from backend.services.progress_events import (
+    MEDIA_TYPES,
+    ProgressSession,
+    get_progress_hub,
+    stream_session,
+)
+from db.connections import DbRef, connection
+
+logger = logging.getLogger(__name__)
+
+THREAD_WORKERS = int(os.getenv("JOB_THREAD_WORKERS", "4"))
+PROCESS_WORKERS = int(os.getenv("JOB_PROCESS_WORKERS", str(min(2, os.cpu_count() or 1))))
+RETENTION_DAYS = float(os.getenv("JOB_RETENTION_DAYS", "7"))
+LEASE_S = float(os.getenv("JOB_LEASE_S", "60"))
+WAIT_POLL_S = 0.5  # wait(): Polling der DB, wenn der Job in einem anderen Prozess läuft
+
+# Eindeutig pro Prozess-Start (PIDs werden wiederverwendet)
+BOOT_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    input_hash TEXT NOT NULL,
+    status TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    params TEXT,
+    payload BLOB,
+    result TEXT,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    owner TEXT,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_hash ON jobs(kind, input_hash, status);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, priority);
+"""
+
+_COLUMNS = ("id", "kind", "input_hash", "status", "priority", "params", "result", "error",
+            "cancel_requested", "attempts", "created_at", "started_at", "finished_at")
+
+
+class JobCancelled(Exception):
+    """Wird von ctx.raise_if_cancelled() geworfen, wenn der Job abgebrochen wurde."""
+
+
+@dataclass(frozen=True)
+class JobSpec:
+    """Registrierte Job-Art."""
+    kind: str
+    handler: Callable[..., Any]
+    executor: str = "thread"      # "thread" (I/O) oder "process" (CPU)
+    cache_ttl_s: float = 3600.0   # 0 = nur laufende Jobs deduplizieren, kein Ergebnis-Cache
+
+
+class JobContext:
+    """Kontext eines Thread-Jobs: Eingabe, Fortschritt, Abbruch, CPU-Offloading."""
+
+    def __init__(self, runner: "JobRunner", job_id: str, kind: str, params: Dict[str, Any],
+                 payload: bytes, progress: ProgressSession) -> None:
+        self.runner = runner
+        self.job_id = job_id
+        self.kind = kind
+        self.params = params
+        self.payload = payload
+        self.progress = progress
+
+    def cancelled(self) -> bool:
+        return self.runner._is_cancel_requested(self.job_id)
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled():
+            raise JobCancelled(self.job_id)
+
+    def run_cpu(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Führt einen CPU-lastigen Schritt (picklebare Top-Level-Funktion) im Prozess-Pool aus."""
+        return self.runner.run_cpu(fn, *args)
+
+
+def content_hash(kind: str, payload: bytes = b"", params: Optional[Dict[str, Any]] = None) -> str:
+    """Idempotenz-Schlüssel aus Job-Art, Eingabe-Inhalt und (kanonischen) Parametern."""
+    h = hashlib.sha256()
+    h.update(kind.encode("utf-8"))
+    h.update(b"\0")
+    h.update(payload or b"")
+    h.update(b"\0")
+    h.update(json.dumps(params or {}, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+def response_result(response: Response) -> Dict[str, Any]:
+    """JSON-Response eines Handlers -> speicherbares Ergebnis {status_code, body}.
+
+    Handler dürfen auch JSON-fähige Werte zurückgeben (Ergebnis mit Status 200).
+    """
+    body = json.loads(bytes(response.body).decode("utf-8")) if response.body else None
+    return {"status_code": response.status_code, "body": body}
+
+
+def _process_entry(handler: Callable[..., Any], params: Dict[str, Any], payload: bytes) -> Any:
+    """Einstieg im Prozess-Pool (Top-Level, damit picklebar)."""
+    return handler(params, payload)
+
+
+class JobRunner:
+    """Persistente Job-Queue mit Thread- und Prozess-Pool."""
+
+    def __init__(self, db: DbRef = "traffic", thread_workers: int = THREAD_WORKERS,
+                 process_workers: int = PROCESS_WORKERS) -> None:
+        self.db = db
+        self._specs: Dict[str, JobSpec] = {}
+        self._slots = {"thread": max(1, thread_workers), "process": max(0, process_workers)}
+        self._running = {"thread": 0, "process": 0}
+        self._queues: Dict[str, List[Tuple[int, int, str]]] = {"thread": [], "process": []}
+        self._seq = itertools.count()
+        self._sessions: Dict[str, ProgressSession] = {}
+        self._cancel: set = set()
+        self._lock = threading.RLock()
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._schema_ready = False
+        self._heartbeat: Optional[threading.Thread] = None
+        self.started = False
+
+    # ------------------------------------------------------------------ Setup
+
+    def _ensure_schema(self) -> None:
+        if self._schema_ready:
+            return
+        with connection(self.db) as conn:
+            conn.executescript(_SCHEMA)
+            columns = {r[1] for r in conn.execute("PRAGMA table_info(jobs)").fetchall()}
+            for column, ddl in (("owner", "TEXT"), ("heartbeat_at", "REAL")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {ddl}")
+        self._schema_ready = True
+
+    def register(self, kind: str, handler: Callable[..., Any], executor: str = "thread",
+                 cache_ttl_s: float = 3600.0) -> None:
+        """Registriert eine Job-Art (Thread-Handler: handler(ctx); Prozess-Handler: handler(params, payload))."""
+        if executor not in self._slots:
+            raise ValueError(f"Unbekannter Executor '{executor}' (thread/process)")
+        self._specs[kind] = JobSpec(kind, handler, executor, cache_ttl_s)
+        if self.started:
+            self._load_queued(kind)
+
+    def start(self) -> int:
+        """Plant nach einem Neustart verwaiste Jobs wieder ein und räumt alte Jobs auf."""
+        self._ensure_schema()
+        cutoff = time.time() - RETENTION_DAYS * 86400
+        with connection(self.db) as conn:
+            conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({','.join('?' * len(FINISHED))}) AND finished_at < ?",
+                (*FINISHED, cutoff),
+            )
+        recovered = self._requeue_expired()
+        self.started = True
+        for kind in list(self._specs):
+            self._load_queued(kind)
+        self._start_heartbeat()
+        return recovered
+
+    def _requeue_expired(self) -> int:
+        """Setzt laufende Jobs ohne gültige Lease (Besitzer-Prozess tot) zurück auf queued."""
+        with connection(self.db) as conn:
+            recovered = conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL, owner = NULL, heartbeat_at = NULL "
+                "WHERE status = ? AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+                (QUEUED, RUNNING, time.time() - LEASE_S),
+            ).rowcount
+        if recovered:
+            logger.info(f"[JOBS] {recovered} verwaiste Jobs neu eingeplant (Lease abgelaufen)")
+        return recovered
+
+    def _start_heartbeat(self) -> None:
+        with self._lock:
+            if self._heartbeat is None:
+                self._heartbeat = threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True)
+                self._heartbeat.start()
+
+    def _heartbeat_loop(self) -> None:
+        """Verlängert die Lease eigener Jobs, übernimmt Abbrüche aus der DB und Jobs abgestürzter Worker."""
+        while True:
+            time.sleep(LEASE_S / 3)
+            try:
+                with connection(self.db) as conn:
+                    conn.execute(
+                        "UPDATE jobs SET heartbeat_at = ? WHERE status = ? AND owner = ?",
+                        (time.time(), RUNNING, BOOT_ID),
+                    )
+                    cancelled = conn.execute(
+                        "SELECT id FROM jobs WHERE status = ? AND owner = ? AND cancel_requested = 1",
+                        (RUNNING, BOOT_ID),
+                    ).fetchall()
+                if cancelled:
+                    with self._lock:
+                        self._cancel.update(r[0] for r in cancelled)
+                if self._requeue_expired():
+                    for kind in list(self._specs):
+                        self._load_queued(kind)
+            except Exception as e:
+                logger.warning(f"[JOBS] Heartbeat fehlgeschlagen: {e}")
+
+    def _load_queued(self, kind: str) -> None:
+        with connection(self.db) as conn:
+            rows = conn.execute(
+                "SELECT id, priority FROM jobs WHERE kind = ? AND status = ? ORDER BY created_at",
+                (kind, QUEUED),
+            ).fetchall()
+        for job_id, priority in rows:
+            self._enqueue(job_id, kind, priority)
+        self._pump()
+
+    # ------------------------------------------------------------------ Submit / Query
+
+    def submit(self, kind: str, payload: bytes = b"", params: Optional[Dict[str, Any]] = None,
+               priority: int = 0, force: bool = False) -> Dict[str, Any]:
+        """
+        Reicht einen Job ein (idempotent über den Inhalts-Hash).
+
+        Args:
+            kind: Registrierte Job-Art
+            payload: Eingabe-Inhalt (z.B. CSV-Bytes)
+            params: JSON-fähige Parameter
+            priority: Höher = früher
+            force: Ergebnis-Cache ignorieren (laufende Jobs werden trotzdem wiederverwendet)
+
+        Returns:
+            Job-Dict mit zusätzlichem Feld "cached" (True = vorhandener Job/Ergebnis)
+        """
+        spec = self._specs.get(kind)
+        if spec is None:
+            raise ValueError(f"Unbekannte Job-Art '{kind}'")
+        self._ensure_schema()
+        params = params or {}
+        input_hash = content_hash(kind, payload, params)
+        now = time.time()
+
+        with self._lock:
+            with connection(self.db) as conn:
+                row = conn.execute(
+                    f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE kind = ? AND input_hash = ? AND status IN (?, ?, ?) "
+                    "ORDER BY created_at DESC LIMIT 1",
+                    (kind, input_hash, QUEUED, RUNNING, SUCCEEDED),
+                ).fetchone()
+                if row is not None:
+                    existing = self._row_to_job(row)
+                    fresh = existing["status"] != SUCCEEDED or (
+                        not force and spec.cache_ttl_s > 0
+                        and now - (existing["finished_at"] or 0) <= spec.cache_ttl_s
+                    )
+                    if fresh:
+                        existing["cached"] = True
+                        return existing
+
+                job_id = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO jobs (id, kind, input_hash, status, priority, params, payload, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, kind, input_hash, QUEUED, priority, json.dumps(params, default=str), payload, now),
+                )
+            self._session(job_id, kind)
+            self._enqueue(job_id, kind, priority)
+        self._pump()
+        job = self.get(job_id)
+        job["cached"] = False
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        self._ensure_schema()
+        with connection(self.db) as conn:
+            row = conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list(self, limit: int = 50, status: Optional[str] = None, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        self._ensure_schema()
+        where, args = [], []
+        if status:
+            where.append("status = ?")
+            args.append(status)
+        if kind:
+            where.append("kind = ?")
+            args.append(kind)
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM jobs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at DESC LIMIT ?"
+        with connection(self.db) as conn:
+            rows = conn.execute(sql, (*args, limit)).fetchall()
+        return [self._row_to_job(r, with_result=False) for r in rows]
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Bricht einen Job ab: wartend sofort, laufend kooperativ (ctx.cancelled())."""
+        job = self.get(job_id)
+        if job is None or job["status"] in FINISHED:
+            return job
+        with self._lock:
+            self._cancel.add(job_id)
+            with connection(self.db) as conn:
+                conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+        # Nur wenn der Job noch wartet; ein inzwischen gestarteter Job bricht kooperativ ab
+        self._complete(job_id, CANCELLED, {"status_code": 409, "body": {"detail": "Job abgebrochen"}},
+                       from_status=(QUEUED,))
+        return self.get(job_id)
+
+    def session(self, job_id: str) -> Optional[ProgressSession]:
+        """Progress-Session eines Jobs dieses Prozesses (None, wenn nicht mehr aktiv)."""
+        return self._sessions.get(job_id) or get_progress_hub().get(job_id)
+
+    async def wait(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Wartet (ohne Thread zu blockieren) bis der Job abgeschlossen ist.
+
+        Maßgeblich ist der Job-Status in der DB: der Job kann in einem anderen
+        Worker-Prozess laufen (die lokale Progress-Session endet dann nie). Eine
+        lokale Session dient nur dazu, ohne Polling-Verzögerung aufzuwachen.
+        """
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] in FINISHED:
+                return job
+            session = self.session(job_id)
+            if session is None or session.done:
+                await asyncio.sleep(WAIT_POLL_S)
+                continue
+            try:
+                await asyncio.wait_for(self._session_finished(session), timeout=WAIT_POLL_S * 4)
+            except asyncio.TimeoutError:
+                pass
+
+    @staticmethod
+    async def _session_finished(session: ProgressSession) -> None:
+        async for _ in session.subscribe():
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        self._ensure_schema()
+        with connection(self.db) as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {
+            "counts": counts,
+            "running": dict(self._running),
+            "queued_in_memory": {k: len(q) for k, q in self._queues.items()},
+            "workers": dict(self._slots),
+            "kinds": sorted(self._specs),
+        }
+
+    # ------------------------------------------------------------------ Ausführung
+
+    def run_cpu(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """CPU-lastiger Schritt im Prozess-Pool (ohne Prozess-Worker: direkt im aufrufenden Thread)."""
+        pool = self._process_pool()
+        if pool is None:
+            return fn(*args)
+        return pool.submit(fn, *args).result()
+
+    def _process_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self._slots["process"] <= 0:
+            return None
+        with self._lock:
+            if self._processes is None:
+                # spawn statt fork: der Server ist multi-threaded (fork kopiert gehaltene Locks)
+                self._processes = ProcessPoolExecutor(
+                    max_workers=self._slots["process"], mp_context=multiprocessing.get_context("spawn")
+                )
+        return self._processes
+
+    def _thread_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(
+                    max_workers=self._slots["thread"] + self._slots["process"], thread_name_prefix="job"
+                )
+        return self._threads
+
+    def _session(self, job_id: str, kind: str) -> ProgressSession:
+        session = self._sessions.get(job_id)
+        if session is None:
+            session = get_progress_hub().open(job_id, kind=kind, status=QUEUED)
+            self._sessions[job_id] = session
+        return session
+
+    def _enqueue(self, job_id: str, kind: str, priority: int) -> None:
+        spec = self._specs[kind]
+        executor = spec.executor if spec.executor == "thread" or self._slots["process"] > 0 else "thread"
+        with self._lock:
+            self._session(job_id, kind)
+            heapq.heappush(self._queues[executor], (-priority, next(self._seq), job_id))
+
+    def _pump(self) -> None:
+        """Startet wartende Jobs, solange Worker frei sind."""
+        with self._lock:
+            for executor, queue in self._queues.items():
+                while queue and self._running[executor] < max(self._slots[executor], 1):
+                    _, _, job_id = heapq.heappop(queue)
+                    if job_id in self._cancel:
+                        continue
+                    self._running[executor] += 1
+                    future = self._thread_pool().submit(self._execute, job_id, executor)
+                    future.add_done_callback(lambda _f, ex=executor: self._release(ex))
+
+    def _release(self, executor: str) -> None:
+        with self._lock:
+            self._running[executor] -= 1
+        self._pump()
+
+    def _execute(self, job_id: str, executor: str) -> None:
+        with connection(self.db) as conn:
+            row = conn.execute(
+                "SELECT kind, params, payload, status FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if row is None or row[3] != QUEUED:
+                return
+            now = time.time()
+            claimed = conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, owner = ?, heartbeat_at = ?, attempts = attempts + 1 "
+                "WHERE id = ? AND status = ?",
+                (RUNNING, now, BOOT_ID, now, job_id, QUEUED),
+            ).rowcount
+            if not claimed:
+                return
+        kind, params_json, payload = row[0], row[1], row[2] or b""
+        spec = self._specs[kind]
+        params = json.loads(params_json or "{}")
+        session = self._session(job_id, kind)
+        session.update(status=RUNNING)
+        started = time.perf_counter()
+        try:
+            if executor == "process":
+                pool = self._process_pool()
+                result = pool.submit(_process_entry, spec.handler, params, bytes(payload)).result()
+            else:
+                ctx = JobContext(self, job_id, kind, params, bytes(payload), session)
+                result = spec.handler(ctx)
+                if inspect.isawaitable(result):
+                    result = asyncio.run(result)
+            if self._is_cancel_requested(job_id, refresh=True):
+                raise JobCancelled(job_id)
+            result = response_result(result) if isinstance(result, Response) else {"status_code": 200, "body": result}
+            failed = result["status_code"] >= 400
+            self._complete(job_id, FAILED if failed else SUCCEEDED, result)
+        except JobCancelled:
+            self._complete(job_id, CANCELLED, {"status_code": 409, "body": {"detail": "Job abgebrochen"}})
+        except HTTPException as e:
+            self._complete(job_id, FAILED, {"status_code": e.status_code, "body": {"detail": e.detail}}, str(e.detail))
+        except Exception as e:
+            logger.error(f"[JOBS] {kind} {job_id} fehlgeschlagen: {e}", exc_info=True)
+            self._complete(job_id, FAILED, {"status_code": 500, "body": {"success": False, "detail": str(e)}}, str(e))
+        finally:
+            logger.info(f"[JOBS] {kind} {job_id} beendet ({time.perf_counter() - started:.2f}s)")
+
+    def _complete(self, job_id: str, status: str, result: Any, error: Optional[str] = None,
+                  from_status: Tuple[str, ...] = (QUEUED, RUNNING)) -> bool:
+        """
+        Speichert das Ergebnis, verwirft die Eingabe und schließt die Progress-Session ab.
+
+        Returns:
+            False, wenn der Job nicht (mehr) in einem der Status `from_status` war
+        """
+        with connection(self.db) as conn:
+            updated = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, payload = NULL, finished_at = ? "
+                f"WHERE id = ? AND status IN ({','.join('?' * len(from_status))})",
+                (status, json.dumps(result, default=str), error, time.time(), job_id, *from_status),
+            ).rowcount
+        if not updated:
+            return False
+        with self._lock:
+            self._cancel.discard(job_id)
+            session = self._sessions.pop(job_id, None)
+        if session is not None:
+            session.emit("result", result)
+            session.finish(status)
+        return True
+
+    def _is_cancel_requested(self, job_id: str, refresh: bool = False) -> bool:
+        """Abbruch angefordert? refresh=True liest das Flag aus der DB (Abbruch über anderen Worker)."""
+        if job_id in self._cancel:
+            return True
+        if not refresh:
+            return False
+        with connection(self.db) as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row and row[0]:
+            with self._lock:
+                self._cancel.add(job_id)
+            return True
+        return False
+
+    @staticmethod
+    def _row_to_job(row, with_result: bool = True) -> Dict[str, Any]:
+        job = dict(zip(_COLUMNS, row))
+        job["params"] = json.loads(job["params"] or "{}")
+        job["result"] = json.loads(job["result"]) if with_result and job["result"] else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+
+_runner: Optional[JobRunner] = None
+
+
+def get_job_runner() -> JobRunner:
+    """Singleton-Runner für alle Hintergrund-Jobs."""
+    global _runner
+    if _runner is None:
+        _runner = JobRunner()
+    return _runner
+
+
+def register_job(kind: str, handler: Callable[..., Any], executor: str = "thread",
+                 cache_ttl_s: float = 3600.0) -> None:
+    """Registriert eine Job-Art beim zentralen Runner."""
+    get_job_runner().register(kind, handler, executor, cache_ttl_s)
+
+
+# ---------------------------------------------------------------------- HTTP-Helfer
+
+def response_mode(request: Request, stream: Optional[str] = None) -> str:
+    """
+    Antwortmodus eines Job-Endpoints:
+    - "async": Header `Prefer: respond-async` oder ?async=1 -> 202 mit Job-ID
+    - "ndjson"/"sse": ?stream=... -> Fortschritt + Ergebnis als Stream
+    - "wait": wartet (nicht blockierend) auf das Ergebnis, Antwort wie bisher
+    """
+    if "respond-async" in request.headers.get("prefer", "").lower() or \
+            request.query_params.get("async", "").lower() in ("1", "true", "yes"):
+        return "async"
+    if stream:
+        if stream not in MEDIA_TYPES:
+            raise HTTPException(400, detail=f"Unbekanntes Stream-Format '{stream}' (erlaubt: sse, ndjson)")
+        return stream
+    return "wait"
+
+
+def job_summary(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Öffentliche Job-Darstellung (ohne Eingabe/Ergebnis)."""
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "priority": job["priority"],
+        "cached": job.get("cached", False),
+        "cancel_requested": job.get("cancel_requested", False),
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "links": {
+            "self": f"/api/jobs/{job['id']}",
+            "result": f"/api/jobs/{job['id']}/result",
+            "events": f"/api/progress/{job['id']}/events",
+        },
+    }
+
+
+def _result_response(job: Dict[str, Any]) -> Response:
+    result = job.get("result") or {"status_code": 500, "body": {"detail": "Kein Ergebnis"}}
+    return JSONResponse(
+        result.get("body"),
+        status_code=result.get("status_code", 200),
+        headers={"X-Job-Id": job["id"], "X-Job-Cached": "1" if job.get("cached") else "0"},
+        media_type="application/json; charset=utf-8",
+    )
+
+
+async def job_response(job: Dict[str, Any], mode: str) -> Response:
+    """HTTP-Antwort für einen eingereichten Job je nach Antwortmodus (siehe response_mode)."""
+    runner = get_job_runner()
+    if mode == "async":
+        return JSONResponse(job_summary(job), status_code=202, headers={"Location": f"/api/jobs/{job['id']}"})
+
+    if mode in MEDIA_TYPES:
+        session = runner.session(job["id"])
+        if session is None:
+            # Job bereits abgeschlossen (Cache-Treffer): Ergebnis als kurzer Stream
+            job = runner.get(job["id"])
+            session = get_progress_hub().open(job["id"], kind=job["kind"], status=job["status"], cached=True)
+            session.emit("result", job["result"])
+            session.finish(job["status"])
+        return stream_session(session, mode)
+
+    cached = job.get("cached", False)
+    if job["status"] not in FINISHED:
+        job = await runner.wait(job["id"])
+    job["cached"] = cached
+    return _result_response(job)
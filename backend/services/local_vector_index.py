@@ -0,0 +1,469 @@
+"""
+Lokaler Vektor-Index für Tour-Embeddings (Fallback ohne ChromaDB).
+
+- Vektoren liegen normalisiert als float32 zusammen mit ihrer ID in einer
+  Binärdatei und werden per np.memmap gelesen (kein Laden in den Heap, kein
+  separater Dienst)
+- Append-only: neue/aktualisierte Touren werden angehängt, alte Zeilen per
+  Tombstone ausgeblendet (compact() schreibt eine neue Generation)
+- Wartung nach jedem Upsert über den Store (maintain()): Kompaktierung ab
+  COMPACT_TOMBSTONE_RATIO Tombstones, IVF-Neuaufbau ab IVF_TAIL_RATIO
+  nicht indexierter Zeilen
+- Mehrere Prozesse (uvicorn-Worker, Skripte): Schreiber über eine Lock-Datei
+  serialisiert, Leser laden fremde Änderungen vor jedem Zugriff nach
+- Metadaten-Filter (z.B. tour_type, sector) werden VOR dem Scoring angewendet
+- Exakte Cosine-Suche für kleine Collections, ab IVF_THRESHOLD Vektoren
+  IVF (k-means-Listen) + int8-quantisierte Kandidaten mit exaktem Re-Ranking
+
+Pro Embedding-Dimension gibt es einen eigenen Index (OpenAI: 1536, Fallback: 10).
+"""
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.utils.file_lock import FileLock
+
+logger = logging.getLogger(__name__)
+
+# Ab dieser Größe wird ein IVF-Index aufgebaut
+IVF_THRESHOLD = 20_000
+# Anzahl durchsuchter IVF-Listen pro Query
+IVF_NPROBE = 8
+# Kandidaten pro Ergebnis für exaktes Re-Ranking (IVF-Modus)
+RERANK_FACTOR = 10
+# Kompaktieren, sobald dieser Anteil der Zeilen Tombstones sind (und mindestens COMPACT_MIN_TOMBSTONES)
+COMPACT_TOMBSTONE_RATIO = 0.25
+COMPACT_MIN_TOMBSTONES = 1_000
+# IVF neu aufbauen, sobald die nach dem Aufbau angehängten Zeilen diesen Anteil erreichen
+IVF_TAIL_RATIO = 0.1
+# Feste Breite der ID im Datensatz (UTF-8, mit Nullbytes aufgefüllt)
+ID_BYTES = 64
+
+_MAGIC = b"FAMOVEC2"
+_HEADER = struct.Struct("<8sIIQQ")  # Magic, Dimension, ID-Bytes, bestätigte Zeilen, Metadaten-Bytes
+_COUNTS = struct.Struct("<QQ")
+_COUNTS_OFFSET = 16
+_HEADER_SIZE = 64
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    """L2-Normalisierung pro Zeile (Nullvektoren bleiben 0)."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def _kmeans(data: np.ndarray, k: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Einfaches (sphärisches) k-means für IVF-Zentroiden."""
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(data @ centroids.T, axis=1)
+        for c in range(k):
+            members = data[assign == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+        centroids = _normalize(centroids)
+    return centroids
+
+
+class LocalVectorIndex:
+    """
+    Memory-mapped Vektor-Index einer Dimension, sicher bei mehreren Prozessen.
+
+    Dateien im Index-Verzeichnis (<gen> = Generation, siehe CURRENT):
+    - data.<gen>.bin:    Header (Dimension, bestätigte Zeilen, Metadaten-Bytes),
+                         danach Datensätze aus ID (ID_BYTES) und normalisiertem Vektor
+    - meta.<gen>.jsonl:  eine JSON-Zeile pro Datensatz ({"id": ..., "metadata": {...}})
+    - CURRENT:           aktuelle Generation (fehlt = 0), wird von compact() umgeschaltet
+    - ivf.npz:           IVF-Zentroiden, Listen-Zuordnung und int8-Codes (optional)
+    - .lock:             Schreibsperre (prozessübergreifend)
+
+    Gültig ist nur, was der Header als bestätigt ausweist: Schreiber hängen
+    Datensätze und Metadaten an und erhöhen danach die Zähler. Reste eines
+    abgebrochenen Schreibvorgangs werden vom nächsten Schreiber überschrieben.
+    Die ID→Zeile-Zuordnung wird aus derselben Datei gelesen wie die Vektoren und
+    vor jedem Zugriff nachgeladen, wenn ein anderer Prozess geschrieben hat.
+    """
+
+    def __init__(self, path: Path, dim: int):
+        self.path = Path(path)
+        self.dim = dim
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._current_file = self.path / "CURRENT"
+        self._ivf_file = self.path / "ivf.npz"
+        self._lock_file = self.path / ".lock"
+        self._record = np.dtype([("id", f"S{ID_BYTES}"), ("vec", "<f4", (dim,))])
+        self._lock = threading.RLock()
+        self._generation = -1
+        self._rows = 0
+        self._meta_bytes = 0
+        self._ids: List[str] = []
+        self._metadata: List[Dict[str, Any]] = []
+        self._alive: List[bool] = []
+        self._alive_np: Optional[np.ndarray] = None
+        self._columns: Dict[str, np.ndarray] = {}
+        self._row_by_id: Dict[str, int] = {}
+        self._matrix: Optional[np.memmap] = None
+        self._ivf: Optional[Dict[str, np.ndarray]] = None
+        self._ivf_mtime: Optional[int] = None
+        self._sync()
+
+    # ------------------------------------------------------------------ Laden
+
+    def _data_file(self, generation: int) -> Path:
+        return self.path / f"data.{generation}.bin"
+
+    def _meta_file(self, generation: int) -> Path:
+        return self.path / f"meta.{generation}.jsonl"
+
+    def _read_generation(self) -> int:
+        try:
+            return int(self._current_file.read_text(encoding="ascii").strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _read_counts(self, generation: int) -> Tuple[int, int]:
+        """Bestätigte Zeilen und Metadaten-Bytes laut Header (0, 0 wenn die Datei fehlt)."""
+        try:
+            with open(self._data_file(generation), "rb") as f:
+                header = f.read(_HEADER.size)
+        except FileNotFoundError:
+            return 0, 0
+        if len(header) < _HEADER.size:
+            return 0, 0
+        magic, dim, id_bytes, rows, meta_bytes = _HEADER.unpack(header)
+        if magic != _MAGIC or dim != self.dim or id_bytes != ID_BYTES:
+            raise ValueError(f"{self._data_file(generation)}: unbekanntes Format oder Dimension {dim} != {self.dim}")
+        return rows, meta_bytes
+
+    def _sync(self) -> None:
+        """Lädt neue Zeilen bzw. eine neue Generation nach (auch von anderen Prozessen geschrieben)."""
+        with self._lock:
+            generation = self._read_generation()
+            if generation != self._generation:
+                self._generation = generation
+                self._rows = self._meta_bytes = 0
+                self._reset_meta()
+                self._matrix = None
+                self._ivf, self._ivf_mtime = None, None
+            rows, meta_bytes = self._read_counts(generation)
+            if rows > self._rows:
+                self._load_rows(rows, meta_bytes)
+            self._sync_ivf()
+
+    def _load_rows(self, rows: int, meta_bytes: int) -> None:
+        with open(self._meta_file(self._generation), "rb") as f:
+            f.seek(self._meta_bytes)
+            chunk = f.read(meta_bytes - self._meta_bytes)
+        lines = chunk.splitlines()
+        if len(chunk) != meta_bytes - self._meta_bytes or len(lines) != rows - self._rows:
+            return  # Header wird gerade geschrieben - beim nächsten Zugriff erneut
+        matrix = np.memmap(self._data_file(self._generation), dtype=self._record, mode="r",
+                           offset=_HEADER_SIZE, shape=(rows,))
+        for raw_id, line in zip(matrix["id"][self._rows:rows], lines):
+            self._append_meta(raw_id.decode("utf-8"), json.loads(line).get("metadata") or {})
+        self._matrix = matrix
+        self._rows, self._meta_bytes = rows, meta_bytes
+
+    def _sync_ivf(self) -> None:
+        try:
+            mtime = self._ivf_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._ivf, self._ivf_mtime = None, None
+            return
+        if mtime == self._ivf_mtime:
+            return
+        try:
+            with np.load(self._ivf_file) as data:
+                ivf = {key: data[key] for key in data.files}
+        except Exception as e:
+            logger.warning(f"IVF-Index {self._ivf_file} unlesbar, wird neu aufgebaut: {e}")
+            self._ivf = None
+            return
+        current = int(ivf.get("generation", [-1])[0]) == self._generation and int(ivf["rows"][0]) <= self._rows
+        self._ivf = ivf if current else None
+        self._ivf_mtime = mtime if current else None
+
+    def _append_meta(self, doc_id: str, metadata: Dict[str, Any]) -> None:
+        row = len(self._ids)
+        previous = self._row_by_id.get(doc_id)
+        self._ids.append(doc_id)
+        self._metadata.append(metadata)
+        self._alive.append(True)
+        if previous is not None:
+            self._alive[previous] = False
+        self._row_by_id[doc_id] = row
+        self._alive_np = None
+        self._columns = {}
+
+    def _reset_meta(self) -> None:
+        self._ids, self._metadata, self._alive, self._row_by_id = [], [], [], {}
+        self._alive_np = None
+        self._columns = {}
+
+    # --------------------------------------------------------------- Schreiben
+
+    def __len__(self) -> int:
+        self._sync()
+        return len(self._row_by_id)
+
+    def _write_locked(self, ids: List[str], vectors: np.ndarray, metadatas: List[Dict[str, Any]]) -> None:
+        """Hängt Datensätze an die aktuelle Generation an (Aufrufer hält die Schreibsperre, Stand synchron)."""
+        data_file, meta_file = self._data_file(self._generation), self._meta_file(self._generation)
+        if not data_file.exists():
+            with open(data_file, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, self.dim, ID_BYTES, 0, 0).ljust(_HEADER_SIZE, b"\0"))
+            meta_file.write_bytes(b"")
+        records = np.zeros(len(ids), dtype=self._record)
+        encoded = [doc_id.encode("utf-8") for doc_id in ids]
+        too_long = [doc_id for doc_id, raw in zip(ids, encoded) if len(raw) > ID_BYTES]
+        if too_long:
+            raise ValueError(f"ID länger als {ID_BYTES} Bytes: {too_long[0]!r}")
+        records["id"] = encoded
+        records["vec"] = vectors
+        meta = b"".join(
+            json.dumps({"id": doc_id, "metadata": metadata}, ensure_ascii=False).encode("utf-8") + b"\n"
+            for doc_id, metadata in zip(ids, metadatas)
+        )
+        # An den bestätigten Stand schreiben (überschreibt Reste abgebrochener Schreibvorgänge)
+        with open(meta_file, "r+b") as f:
+            f.seek(self._meta_bytes)
+            f.write(meta)
+            f.flush()
+            os.fsync(f.fileno())
+        with open(data_file, "r+b") as f:
+            f.seek(_HEADER_SIZE + self._rows * self._record.itemsize)
+            f.write(records.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+            # Erst jetzt bestätigen: Leser sehen nur vollständige Datensätze
+            f.seek(_COUNTS_OFFSET)
+            f.write(_COUNTS.pack(self._rows + len(ids), self._meta_bytes + len(meta)))
+            f.flush()
+
+    def upsert(self, ids: List[str], embeddings: List[List[float]], metadatas: List[Dict[str, Any]]) -> None:
+        """Hängt Vektoren an; bestehende IDs werden ersetzt (alte Zeile → Tombstone)."""
+        if not ids:
+            return
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding-Dimension {vectors.shape} passt nicht zu Index-Dimension {self.dim}")
+        vectors = _normalize(vectors)
+        with self._lock, FileLock(self._lock_file):
+            self._sync()
+            self._write_locked(ids, vectors, metadatas)
+            self._sync()
+            self._remove_old_generations()
+
+    def compact(self) -> None:
+        """Schreibt den Index ohne Tombstones als neue Generation und baut ggf. IVF neu."""
+        with self._lock, FileLock(self._lock_file):
+            self._sync()
+            rows = np.flatnonzero(self._alive_mask())
+            vectors = np.array(self._matrix["vec"][rows]) if self._matrix is not None else np.zeros((0, self.dim), np.float32)
+            ids = [self._ids[r] for r in rows]
+            metadatas = [self._metadata[r] for r in rows]
+
+            # Neue Generation statt os.replace: eine gemappte Datei lässt sich unter Windows nicht ersetzen
+            generation = self._generation + 1
+            for path in (self._data_file(generation), self._meta_file(generation)):
+                path.unlink(missing_ok=True)
+            self._generation, self._rows, self._meta_bytes = generation, 0, 0
+            self._reset_meta()
+            self._matrix = None
+            self._write_locked(ids, vectors, metadatas)
+            self._write_current(generation)
+            self._ivf, self._ivf_mtime = None, None
+            try:
+                self._ivf_file.unlink(missing_ok=True)
+            except OSError:
+                pass  # veraltet, wird über die Generation ignoriert
+            self._sync()
+            self._remove_old_generations()
+            if len(ids) >= IVF_THRESHOLD:
+                self._build_ivf_locked()  # FileLock ist nicht reentrant
+
+    def maintain(self) -> str:
+        """
+        Kompaktiert bei vielen Tombstones bzw. baut IVF neu, wenn der exakt
+        durchsuchte Rest (nach dem letzten IVF-Aufbau angehängt) zu groß wird.
+
+        Returns:
+            "compact", "ivf" oder "" (nichts zu tun)
+        """
+        self._sync()
+        with self._lock:
+            rows, live = len(self._ids), len(self._row_by_id)
+            indexed = int(self._ivf["rows"][0]) if self._ivf is not None else 0
+        dead = rows - live
+        if dead >= COMPACT_MIN_TOMBSTONES and dead >= rows * COMPACT_TOMBSTONE_RATIO:
+            self.compact()  # baut IVF ab IVF_THRESHOLD mit neu auf
+            return "compact"
+        if live >= IVF_THRESHOLD and (indexed == 0 or rows - indexed >= indexed * IVF_TAIL_RATIO):
+            self.build_ivf()
+            return "ivf"
+        return ""
+
+    def _write_current(self, generation: int) -> None:
+        tmp = self.path / f"CURRENT.{os.getpid()}.tmp"
+        tmp.write_text(str(generation), encoding="ascii")
+        for attempt in range(10):
+            try:
+                os.replace(tmp, self._current_file)
+                return
+            except PermissionError:  # Windows: ein Leser hat CURRENT gerade geöffnet
+                time.sleep(0.05 * (attempt + 1))
+        os.replace(tmp, self._current_file)
+
+    def _remove_old_generations(self) -> None:
+        """Löscht ältere Generationen; unter Windows noch gemappte Dateien beim nächsten Mal."""
+        for path in list(self.path.glob("data.*.bin")) + list(self.path.glob("meta.*.jsonl")):
+            try:
+                if int(path.name.split(".")[1]) < self._generation:
+                    path.unlink()
+            except (ValueError, OSError):
+                pass
+
+    def build_ivf(self, nlist: Optional[int] = None) -> None:
+        """Baut IVF-Listen + int8-Codes über alle aktuellen Zeilen."""
+        with self._lock, FileLock(self._lock_file):
+            self._sync()
+            self._build_ivf_locked(nlist)
+
+    def _build_ivf_locked(self, nlist: Optional[int] = None) -> None:
+        """build_ivf() ohne Sperren (Aufrufer hält die Schreibsperre, Stand synchron)."""
+        if self._matrix is None:
+            return
+        data = np.ascontiguousarray(self._matrix["vec"])
+        nlist = nlist or max(1, int(np.sqrt(len(data))))
+        sample = data[np.random.default_rng(0).choice(len(data), size=min(len(data), nlist * 50), replace=False)]
+        centroids = _kmeans(sample, min(nlist, len(sample)))
+        assign = np.argmax(data @ centroids.T, axis=1).astype(np.int32)
+        # Normalisierte Vektoren liegen in [-1, 1] → symmetrische int8-Quantisierung
+        codes = np.clip(np.round(data * 127.0), -127, 127).astype(np.int8)
+        self._ivf = {"centroids": centroids, "assign": assign, "codes": codes,
+                     "rows": np.array([len(data)], dtype=np.int64),
+                     "generation": np.array([self._generation], dtype=np.int64)}
+        tmp = self.path / f"ivf.{os.getpid()}.tmp.npz"
+        np.savez(tmp, **self._ivf)
+        os.replace(tmp, self._ivf_file)
+        self._ivf_mtime = self._ivf_file.stat().st_mtime_ns
+        logger.info(f"IVF-Index aufgebaut: {len(data)} Vektoren, {len(centroids)} Listen ({self.path})")
+
+    # ------------------------------------------------------------------ Suche
+
+    def _alive_mask(self) -> np.ndarray:
+        if self._alive_np is None:
+            self._alive_np = np.array(self._alive, dtype=bool)
+        return self._alive_np
+
+    def _column(self, key: str) -> np.ndarray:
+        """Spaltenweise Sicht auf ein Metadaten-Feld (gecacht bis zum nächsten Upsert)."""
+        if key not in self._columns:
+            column = np.empty(len(self._metadata), dtype=object)
+            column[:] = [metadata.get(key) for metadata in self._metadata]
+            self._columns[key] = column
+        return self._columns[key]
+
+    def _filter_mask(self, where: Optional[Dict[str, Any]]) -> np.ndarray:
+        mask = self._alive_mask().copy()
+        for key, value in (where or {}).items():
+            mask &= self._column(key) == value
+        return mask
+
+    def search(self, query: List[float], k: int = 5,
+               where: Optional[Dict[str, Any]] = None) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """
+        Liefert die k ähnlichsten Einträge als (id, cosine_distance, metadata).
+        """
+        self._sync()
+        with self._lock:
+            if self._matrix is None or k <= 0:
+                return []
+            q = _normalize(np.asarray([query], dtype=np.float32))[0]
+            if q.shape[0] != self.dim:
+                raise ValueError(f"Query-Dimension {q.shape[0]} passt nicht zu Index-Dimension {self.dim}")
+            mask = self._filter_mask(where)
+            if self._ivf is not None and int(self._ivf["rows"][0]) >= IVF_THRESHOLD:
+                candidates = self._ivf_candidates(q, mask, k * RERANK_FACTOR)
+            else:
+                candidates = np.flatnonzero(mask)
+            if len(candidates) == 0:
+                return []
+            scores = np.asarray(self._matrix["vec"][candidates]) @ q
+            top = min(k, len(candidates))
+            best = np.argpartition(-scores, top - 1)[:top]
+            best = best[np.argsort(-scores[best])]
+            return [
+                (self._ids[candidates[i]], float(1.0 - scores[i]), self._metadata[candidates[i]])
+                for i in best
+            ]
+
+    def _ivf_candidates(self, q: np.ndarray, mask: np.ndarray, limit: int) -> np.ndarray:
+        """IVF-Probe: nächste Listen wählen, Kandidaten über int8-Codes vorsortieren."""
+        ivf = self._ivf
+        indexed_rows = int(ivf["rows"][0])
+        probes = np.argsort(-(ivf["centroids"] @ q))[:IVF_NPROBE]
+        in_lists = np.flatnonzero(np.isin(ivf["assign"], probes) & mask[:indexed_rows])
+        if len(in_lists) > limit:
+            approx = ivf["codes"][in_lists].astype(np.float32) @ q
+            in_lists = in_lists[np.argpartition(-approx, limit - 1)[:limit]]
+        # Nach dem IVF-Aufbau angehängte Zeilen werden exakt durchsucht
+        tail = np.flatnonzero(mask[indexed_rows:]) + indexed_rows
+        return np.concatenate([in_lists, tail])
+
+
+class LocalVectorStore:
+    """Verwaltet je einen LocalVectorIndex pro Embedding-Dimension."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._indexes: Dict[int, LocalVectorIndex] = {}
+        self._lock = threading.Lock()
+
+    def index_for(self, dim: int) -> LocalVectorIndex:
+        with self._lock:
+            if dim not in self._indexes:
+                self._indexes[dim] = LocalVectorIndex(self.root / f"dim_{dim}", dim)
+            return self._indexes[dim]
+
+    def upsert(self, ids: List[str], embeddings: List[List[float]], metadatas: List[Dict[str, Any]]) -> None:
+        by_dim: Dict[int, List[int]] = {}
+        for i, embedding in enumerate(embeddings):
+            by_dim.setdefault(len(embedding), []).append(i)
+        for dim, rows in by_dim.items():
+            index = self.index_for(dim)
+            index.upsert([ids[i] for i in rows], [embeddings[i] for i in rows], [metadatas[i] for i in rows])
+            index.maintain()
+
+    def search(self, query: List[float], k: int = 5,
+               where: Optional[Dict[str, Any]] = None) -> List[Tuple[str, float, Dict[str, Any]]]:
+        return self.index_for(len(query)).search(query, k=k, where=where)
+
+    def count(self) -> int:
+        if self.root.exists():
+            for sub in self.root.glob("dim_*"):
+                try:
+                    self.index_for(int(sub.name[4:]))
+                except ValueError:
+                    continue
+        return sum(len(index) for index in self._indexes.values())
+
+
+_store: Optional[LocalVectorStore] = None
+
+
+def get_local_vector_store() -> LocalVectorStore:
+    """Gibt den prozessweiten lokalen Vektor-Store zurück (lazy)."""
+    global _store
+    if _store is None:
+        _store = LocalVectorStore(Path(os.getenv("VECTOR_INDEX_PATH", "./data/vector_index")))
+    return _store
@@ -161,14 +161,18 @@ class MultiTourGenerator:
         valid = []
         invalid = []
 
+        # Ein vektorisierter Durchgang für alle Kunden mit Koordinaten
+        located = [c for c in customers if c.lat is not None and c.lon is not None]
+        checked = iter(
+            geo_validator.validate_address_batch([(c.address, c.lat, c.lon) for c in located])
+        )
+
         for customer in customers:
             if customer.lat is None or customer.lon is None:
                 invalid.append((customer, "Keine Koordinaten verfügbar"))
                 continue
 
-            result, error = geo_validator.validate_coordinates(
-                customer.lat, customer.lon, customer.address
-            )
+            _, result, error = next(checked)
 
             if result == ValidationResult.VALID:
                 valid.append(customer)
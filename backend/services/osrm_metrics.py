@@ -1,6 +1,9 @@
 """
 Metriken-Service für OSRM-Performance-Tracking.
 Trackt Latenz, Fehlerrate, Circuit-Breaker-Status.
+
+Latenz-Quantile kommen aus einem Histogramm mit festen Buckets (kein Sortieren
+der Samples pro Abfrage), die Latenz der letzten 5 Minuten aus einem Ringpuffer.
 """
 import time
 from typing import Dict, List, Optional
@@ -9,19 +12,30 @@ from pathlib import Path
 import json
 from datetime import datetime
 
+from backend.services.telemetry import Histogram, MetricsRegistry, WindowedRing, get_registry
+
 
 class OSRMMetrics:
     """Trackt OSRM-Performance-Metriken."""
     
-    def __init__(self, max_samples: int = 1000):
+    def __init__(self, max_samples: int = 1000, registry: Optional[MetricsRegistry] = None):
         """
         Initialisiert Metriken-Service.
         
         Args:
             max_samples: Maximale Anzahl gespeicherter Samples
+            registry: Optional – Latenz-Histogramm/-Fenster in dieser Registry führen
         """
         self.max_samples = max_samples
         
+        # Latenz-Verteilung (feste Buckets) und gleitendes 5-Minuten-Fenster
+        if registry is not None:
+            self.latency_histogram = registry.histogram("osrm.latency_ms")
+            self.latency_window = registry.window("osrm.latency_ms.5m", window_s=300, slots=60)
+        else:
+            self.latency_histogram = Histogram()
+            self.latency_window = WindowedRing(window_s=300, slots=60)
+        
         # Latenz-Historie (in ms)
         self.latency_history: deque = deque(maxlen=max_samples)
         
@@ -68,6 +82,8 @@ class OSRMMetrics:
             self.successful_requests += 1
             self.last_success_time = time.time()
             self.latency_history.append(latency_ms)
+            self.latency_histogram.observe(latency_ms)
+            self.latency_window.observe(latency_ms)
         else:
             self.failed_requests += 1
             self.last_error_time = time.time()
@@ -99,20 +115,10 @@ class OSRMMetrics:
         Returns:
             Dict mit Metriken
         """
-        # Berechne Durchschnitts-Latenz
-        avg_latency_ms = 0.0
-        if self.latency_history:
-            avg_latency_ms = sum(self.latency_history) / len(self.latency_history)
-        
-        # Berechne P95/P99 Latenz
-        p95_latency_ms = 0.0
-        p99_latency_ms = 0.0
-        if self.latency_history:
-            sorted_latencies = sorted(self.latency_history)
-            p95_idx = int(len(sorted_latencies) * 0.95)
-            p99_idx = int(len(sorted_latencies) * 0.99)
-            p95_latency_ms = sorted_latencies[min(p95_idx, len(sorted_latencies) - 1)]
-            p99_latency_ms = sorted_latencies[min(p99_idx, len(sorted_latencies) - 1)]
+        # Durchschnitt und P95/P99 aus dem Histogramm (O(Buckets), unabhängig von der Laufzeit)
+        avg_latency_ms = self.latency_histogram.mean
+        p95_latency_ms = self.latency_histogram.quantile(0.95)
+        p99_latency_ms = self.latency_histogram.quantile(0.99)
         
         # Fehlerrate berechnen
         error_rate = 0.0
@@ -141,7 +147,8 @@ class OSRMMetrics:
             "last_request_time": self.last_request_time,
             "last_success_time": self.last_success_time,
             "last_error_time": self.last_error_time,
-            "samples_count": len(self.latency_history)
+            "samples_count": len(self.latency_history),
+            "latency_5m": self.latency_window.summary(),
         }
     
     def get_recent_errors(self, limit: int = 10) -> List[Dict]:
@@ -159,6 +166,8 @@ class OSRMMetrics:
     def reset(self) -> None:
         """Setzt alle Metriken zurück."""
         self.latency_history.clear()
+        self.latency_histogram.reset()
+        self.latency_window.reset()
         self.error_history.clear()
         self.total_requests = 0
         self.successful_requests = 0
@@ -181,6 +190,6 @@ def get_osrm_metrics() -> OSRMMetrics:
     """Gibt globale OSRM-Metriken-Instanz zurück."""
     global _osrm_metrics_instance
     if _osrm_metrics_instance is None:
-        _osrm_metrics_instance = OSRMMetrics()
+        _osrm_metrics_instance = OSRMMetrics(registry=get_registry())
     return _osrm_metrics_instance
 
@@ -1,23 +1,40 @@
 """
 Performance-Tracker für KI-Code-Verbesserungen.
 Überwacht Analyse-Zeit, API-Latenz und Ressourcenverbrauch.
+
+Einträge werden gepuffert und gebündelt geschrieben (statt einer Transaktion
+pro Sample); zusätzlich landet jede Operation als Span im Request-Tracing.
 """
+import atexit
+import json
 import sqlite3
+import threading
 import time
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from contextlib import contextmanager
 from backend.config import cfg
+from db.connections import connection
+from backend.services.request_tracing import get_tracer
 
 class PerformanceTracker:
     """Trackt Performance-Metriken für Code-Analyse und Verbesserungen."""
     
+    # Puffer wird spätestens bei dieser Größe bzw. nach diesem Alter geschrieben
+    FLUSH_BATCH_SIZE = 50
+    FLUSH_INTERVAL_SECONDS = 5.0
+    
     def __init__(self):
         self.db_path = Path("data/code_fixes_performance.db")
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self._init_db()
         
+        self._pending: List[tuple] = []
+        self._pending_lock = threading.Lock()
+        self._last_flush = time.time()
+        atexit.register(self.flush)
+        
         # Konfiguration
         self.track_performance = cfg("ki_codechecker:performance:track_performance", True)
         self.log_slow_operations = cfg("ki_codechecker:performance:log_slow_operations", True)
@@ -25,7 +42,7 @@ class PerformanceTracker:
     
     def _init_db(self):
         """Initialisiert Datenbank."""
-        with sqlite3.connect(self.db_path) as conn:
+        with connection(self.db_path) as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS performance_entries (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -67,6 +84,7 @@ class PerformanceTracker:
             yield
         finally:
             duration = time.time() - start_time
+            get_tracer().record(operation_name, duration * 1000, started_at=start_time)
             self._save_performance_entry(operation_name, file_path, duration, metadata)
             
             # Log langsame Operationen
@@ -74,96 +92,101 @@ class PerformanceTracker:
                 print(f"[PERFORMANCE] Langsame Operation: {operation_name} ({duration:.2f}s) - {file_path or 'N/A'}")
     
     def _save_performance_entry(self, operation: str, file_path: Optional[str], duration: float, metadata: Optional[Dict]):
-        """Speichert Performance-Eintrag."""
-        metadata_json = None
-        if metadata:
-            import json
-            metadata_json = json.dumps(metadata)
-        
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                INSERT INTO performance_entries 
-                (timestamp, operation, file_path, duration_seconds, metadata)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
+        """Puffert Performance-Eintrag; geschrieben wird gebündelt in flush()."""
+        metadata_json = json.dumps(metadata) if metadata else None
+        with self._pending_lock:
+            self._pending.append((
                 datetime.now().isoformat(),
                 operation,
                 file_path,
                 duration,
                 metadata_json
             ))
-            conn.commit()
+            due = (len(self._pending) >= self.FLUSH_BATCH_SIZE
+                   or time.time() - self._last_flush >= self.FLUSH_INTERVAL_SECONDS)
+        if due:
+            self.flush()
+    
+    def flush(self) -> int:
+        """Schreibt alle gepufferten Einträge in einer Transaktion. Gibt die Anzahl zurück."""
+        with self._pending_lock:
+            entries, self._pending = self._pending, []
+            self._last_flush = time.time()
+        if not entries:
+            return 0
         
-        # Update daily averages
-        self._update_daily_averages(operation, duration)
+        with connection(self.db_path) as conn:
+            conn.executemany("""
+                INSERT INTO performance_entries 
+                (timestamp, operation, file_path, duration_seconds, metadata)
+                VALUES (?, ?, ?, ?, ?)
+            """, entries)
+            
+            # Update daily averages
+            for timestamp, operation, _, duration, _ in entries:
+                self._update_daily_averages(conn, timestamp[:10], operation, duration)
+            conn.commit()
+        return len(entries)
     
-    def _update_daily_averages(self, operation: str, duration: float):
-        """Aktualisiert Tages-Durchschnitte."""
-        today = datetime.now().strftime("%Y-%m-%d")
+    def _update_daily_averages(self, conn: sqlite3.Connection, day: str, operation: str, duration: float):
+        """Aktualisiert Tages-Durchschnitte (innerhalb der Flush-Transaktion)."""
+        cursor = conn.execute("""
+            SELECT avg_analysis_time, avg_api_call_time, avg_test_time, total_operations
+            FROM daily_averages WHERE date = ?
+        """, (day,))
+        current = cursor.fetchone()
         
-        with sqlite3.connect(self.db_path) as conn:
-            # Prüfe ob Eintrag existiert
-            cursor = conn.execute("SELECT * FROM daily_averages WHERE date = ?", (today,))
-            row = cursor.fetchone()
+        if current:
+            # Update (gleitender Durchschnitt)
+            total_ops = current[3] + 1
             
-            if row:
-                # Update (gleitender Durchschnitt)
-                # Hole aktuelle Werte
-                cursor = conn.execute("""
-                    SELECT avg_analysis_time, avg_api_call_time, avg_test_time, total_operations
-                    FROM daily_averages WHERE date = ?
-                """, (today,))
-                current = cursor.fetchone()
-                
-                total_ops = current[3] + 1
-                
-                # Update basierend auf Operation-Typ
-                if operation == "code_analysis":
-                    new_avg = ((current[0] * current[3]) + duration) / total_ops if current[0] else duration
-                    conn.execute("""
-                        UPDATE daily_averages 
-                        SET avg_analysis_time = ?, total_operations = ?
-                        WHERE date = ?
-                    """, (new_avg, total_ops, today))
-                elif operation == "api_call":
-                    new_avg = ((current[1] * current[3]) + duration) / total_ops if current[1] else duration
-                    conn.execute("""
-                        UPDATE daily_averages 
-                        SET avg_api_call_time = ?, total_operations = ?
-                        WHERE date = ?
-                    """, (new_avg, total_ops, today))
-                elif operation == "test_execution":
-                    new_avg = ((current[2] * current[3]) + duration) / total_ops if current[2] else duration
-                    conn.execute("""
-                        UPDATE daily_averages 
-                        SET avg_test_time = ?, total_operations = ?
-                        WHERE date = ?
-                    """, (new_avg, total_ops, today))
-                else:
-                    conn.execute("""
-                        UPDATE daily_averages 
-                        SET total_operations = ?
-                        WHERE date = ?
-                    """, (total_ops, today))
+            # Update basierend auf Operation-Typ
+            if operation == "code_analysis":
+                new_avg = ((current[0] * current[3]) + duration) / total_ops if current[0] else duration
+                conn.execute("""
+                    UPDATE daily_averages 
+                    SET avg_analysis_time = ?, total_operations = ?
+                    WHERE date = ?
+                """, (new_avg, total_ops, day))
+            elif operation == "api_call":
+                new_avg = ((current[1] * current[3]) + duration) / total_ops if current[1] else duration
+                conn.execute("""
+                    UPDATE daily_averages 
+                    SET avg_api_call_time = ?, total_operations = ?
+                    WHERE date = ?
+                """, (new_avg, total_ops, day))
+            elif operation == "test_execution":
+                new_avg = ((current[2] * current[3]) + duration) / total_ops if current[2] else duration
+                conn.execute("""
+                    UPDATE daily_averages 
+                    SET avg_test_time = ?, total_operations = ?
+                    WHERE date = ?
+                """, (new_avg, total_ops, day))
             else:
-                # Insert
-                avg_analysis = duration if operation == "code_analysis" else None
-                avg_api = duration if operation == "api_call" else None
-                avg_test = duration if operation == "test_execution" else None
-                
                 conn.execute("""
-                    INSERT INTO daily_averages 
-                    (date, avg_analysis_time, avg_api_call_time, avg_test_time, total_operations)
-                    VALUES (?, ?, ?, ?, 1)
-                """, (today, avg_analysis, avg_api, avg_test))
-            conn.commit()
+                    UPDATE daily_averages 
+                    SET total_operations = ?
+                    WHERE date = ?
+                """, (total_ops, day))
+        else:
+            # Insert
+            avg_analysis = duration if operation == "code_analysis" else None
+            avg_api = duration if operation == "api_call" else None
+            avg_test = duration if operation == "test_execution" else None
+            
+            conn.execute("""
+                INSERT INTO daily_averages 
+                (date, avg_analysis_time, avg_api_call_time, avg_test_time, total_operations)
+                VALUES (?, ?, ?, ?, 1)
+            """, (day, avg_analysis, avg_api, avg_test))
     
     def get_daily_averages(self, date: Optional[str] = None) -> Dict:
         """Gibt Tages-Durchschnitte zurück."""
         if date is None:
             date = datetime.now().strftime("%Y-%m-%d")
+        self.flush()
         
-        with sqlite3.connect(self.db_path) as conn:
+        with connection(self.db_path) as conn:
             cursor = conn.execute("""
                 SELECT avg_analysis_time, avg_api_call_time, avg_test_time, total_operations
                 FROM daily_averages
@@ -191,8 +214,9 @@ class PerformanceTracker:
     def get_slowest_files(self, days: int = 7, limit: int = 10) -> List[Dict]:
         """Gibt langsamste Dateien zurück."""
         since = (datetime.now() - timedelta(days=days)).isoformat()
+        self.flush()
         
-        with sqlite3.connect(self.db_path) as conn:
+        with connection(self.db_path) as conn:
             cursor = conn.execute("""
                 SELECT file_path, AVG(duration_seconds) as avg_duration, COUNT(*) as operation_count
                 FROM performance_entries
@@ -214,8 +238,9 @@ class PerformanceTracker:
     def get_performance_trend(self, days: int = 7) -> List[Dict]:
         """Gibt Performance-Trend zurück."""
         since = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        self.flush()
         
-        with sqlite3.connect(self.db_path) as conn:
+        with connection(self.db_path) as conn:
             cursor = conn.execute("""
                 SELECT date, avg_analysis_time, avg_api_call_time, avg_test_time, total_operations
                 FROM daily_averages
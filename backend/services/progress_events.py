@@ -0,0 +1,246 @@
+"""
+Progress-Events für lang laufende Uploads/Bulk-Läufe (ersetzt Polling-Dicts).
+
+- Pro Session ein begrenzter Kanal: Fortschritt wird zu einem Zustand
+  zusammengefasst (nur der letzte "progress"-Event wird gehalten), Teilergebnisse
+  ("partial", z.B. fertig geocodierte Touren) und Abschluss ("result"/"done")
+  liegen in einem Ringpuffer fester Größe.
+- Abonnenten erhalten die Events als SSE (text/event-stream) oder NDJSON,
+  inkl. Wiederaufnahme über Last-Event-ID bzw. ?last_seq=.
+- Abgeschlossene Sessions verfallen nach PROGRESS_SESSION_TTL_S, verwaiste
+  (keine Events mehr) nach PROGRESS_IDLE_TTL_S.
+
+Die Subscribe-Endpoints funktionieren nur im Worker-Prozess der Session. Für
+Multi-Worker-Deployments liefert der Upload selbst den Stream (?stream=ndjson,
+siehe job_runner.job_response), dann laufen Fortschritt und Ergebnis über
+dieselbe Verbindung.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+SESSION_TTL_S = float(os.getenv("PROGRESS_SESSION_TTL_S", "300"))
+IDLE_TTL_S = float(os.getenv("PROGRESS_IDLE_TTL_S", "3600"))
+MAX_SESSIONS = int(os.getenv("PROGRESS_MAX_SESSIONS", "200"))
+MAX_EVENTS = int(os.getenv("PROGRESS_MAX_EVENTS", "500"))
+KEEPALIVE_S = 15.0
+
+MEDIA_TYPES = {"sse": "text/event-stream", "ndjson": "application/x-ndjson"}
+TERMINAL_EVENT = "done"
+_SESSION_ID_RE = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+
+
+class ProgressSession:
+    """Event-Kanal einer Session (thread-safe; Emit auch aus Worker-Threads)."""
+
+    def __init__(self, session_id: str, kind: str = "", state: Optional[Dict[str, Any]] = None,
+                 max_events: int = MAX_EVENTS) -> None:
+        self.session_id = session_id
+        self.kind = kind
+        self.state: Dict[str, Any] = dict(state or {})
+        self.created_at = self.updated_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._seq = 0
+        self._events: Deque[dict] = deque(maxlen=max_events)
+        self._last_progress: Optional[dict] = None
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    # ------------------------------------------------------------------ Emit
+
+    def emit(self, event: str, data: Any) -> dict:
+        """Hängt einen Event an und weckt alle Abonnenten."""
+        with self._lock:
+            self._seq += 1
+            record = {
+                "seq": self._seq,
+                "event": event,
+                "session_id": self.session_id,
+                "ts": round(time.time(), 3),
+                "data": data,
+            }
+            if event == "progress":
+                self._last_progress = record  # Fortschritt wird zusammengefasst
+            else:
+                self._events.append(record)
+            self.updated_at = time.time()
+            waiters = list(self._waiters)
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(waiter.set)
+            except RuntimeError:
+                pass  # Loop bereits geschlossen
+        return record
+
+    def update(self, **fields: Any) -> None:
+        """Aktualisiert den Zustand und sendet ihn als "progress"-Event."""
+        self.state.update(fields)
+        self.emit("progress", dict(self.state))
+
+    def incr(self, key: str, n: int = 1, **fields: Any) -> None:
+        """Erhöht einen Zähler im Zustand (plus optionale weitere Felder)."""
+        self.state[key] = self.state.get(key, 0) + n
+        self.update(**fields)
+
+    def partial(self, kind: str, item: Any) -> None:
+        """Teilergebnis, sobald es fertig ist (z.B. eine geocodierte Tour)."""
+        self.emit("partial", {"kind": kind, "item": item})
+
+    def finish(self, status: str = "completed", **fields: Any) -> None:
+        """Schließt die Session ab (idempotent); Abonnenten erhalten "done"."""
+        if self.done:
+            return
+        self.state.update(fields)
+        self.state["status"] = status
+        self.emit("progress", dict(self.state))
+        self.finished_at = time.time()
+        self.emit(TERMINAL_EVENT, dict(self.state))
+
+    # ------------------------------------------------------------------ Subscribe
+
+    def events_since(self, seq: int) -> List[dict]:
+        with self._lock:
+            pending = [e for e in self._events if e["seq"] > seq]
+            if self._last_progress is not None and self._last_progress["seq"] > seq:
+                pending.append(self._last_progress)
+        pending.sort(key=lambda e: e["seq"])
+        return pending
+
+    async def subscribe(self, last_seq: int = 0, keepalive_s: float = KEEPALIVE_S) -> AsyncIterator[Optional[dict]]:
+        """
+        Liefert alle Events nach last_seq, bis "done" gesendet wurde.
+        None signalisiert einen Keepalive (keine Events innerhalb keepalive_s).
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            waiter = asyncio.Event()
+            entry = (loop, waiter)
+            with self._lock:
+                self._waiters.append(entry)
+            try:
+                pending = self.events_since(last_seq)
+                for record in pending:
+                    last_seq = record["seq"]
+                    yield record
+                    if record["event"] == TERMINAL_EVENT:
+                        return
+                if not pending:
+                    try:
+                        await asyncio.wait_for(waiter.wait(), timeout=keepalive_s)
+                    except asyncio.TimeoutError:
+                        yield None
+            finally:
+                with self._lock:
+                    self._waiters.remove(entry)
+
+
+class ProgressHub:
+    """Registry aller Progress-Sessions eines Prozesses mit automatischem Verfall."""
+
+    def __init__(self, ttl_s: float = SESSION_TTL_S, idle_ttl_s: float = IDLE_TTL_S,
+                 max_sessions: int = MAX_SESSIONS, max_events: int = MAX_EVENTS) -> None:
+        self.ttl_s = ttl_s
+        self.idle_ttl_s = idle_ttl_s
+        self.max_sessions = max_sessions
+        self.max_events = max_events
+        self._sessions: Dict[str, ProgressSession] = {}
+        self._lock = threading.Lock()
+
+    def open(self, session_id: Optional[str] = None, kind: str = "", **state: Any) -> ProgressSession:
+        """Legt eine Session an (ID vom Client oder neu) und sendet den Startzustand."""
+        if session_id is not None and not _SESSION_ID_RE.match(session_id):
+            raise HTTPException(400, detail="Ungültige Session-ID (8-64 Zeichen, A-Z, 0-9, '-', '_')")
+        session = ProgressSession(session_id or str(uuid.uuid4()), kind, state, self.max_events)
+        with self._lock:
+            self._sessions[session.session_id] = session
+        self.expire()
+        session.emit("progress", dict(session.state))
+        return session
+
+    def get(self, session_id: str) -> Optional[ProgressSession]:
+        self.expire()
+        return self._sessions.get(session_id)
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Entfernt abgelaufene Sessions; hält die Gesamtzahl unter max_sessions."""
+        now = now or time.time()
+        with self._lock:
+            expired = [
+                sid for sid, s in self._sessions.items()
+                if (s.done and now - s.finished_at > self.ttl_s)
+                or (not s.done and now - s.updated_at > self.idle_ttl_s)
+            ]
+            for sid in expired:
+                del self._sessions[sid]
+            overflow = len(self._sessions) - self.max_sessions
+            if overflow > 0:
+                # Zuerst abgeschlossene, dann die am längsten inaktiven Sessions verwerfen
+                oldest = sorted(self._sessions.values(), key=lambda s: (not s.done, s.updated_at))
+                for s in oldest[:overflow]:
+                    del self._sessions[s.session_id]
+                    expired.append(s.session_id)
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+_hub: Optional[ProgressHub] = None
+
+
+def get_progress_hub() -> ProgressHub:
+    """Singleton-Hub für alle Progress-Sessions."""
+    global _hub
+    if _hub is None:
+        _hub = ProgressHub()
+    return _hub
+
+
+# ---------------------------------------------------------------------- Encoding
+
+def encode_event(record: Optional[dict], fmt: str) -> str:
+    """Kodiert einen Event (None = Keepalive) als SSE-Block oder NDJSON-Zeile."""
+    if fmt == "sse":
+        if record is None:
+            return ": keepalive\n\n"
+        payload = json.dumps(record["data"], ensure_ascii=False, default=str)
+        return f"id: {record['seq']}\nevent: {record['event']}\ndata: {payload}\n\n"
+    if record is None:
+        record = {"event": "keepalive", "ts": round(time.time(), 3)}
+    return json.dumps(record, ensure_ascii=False, default=str) + "\n"
+
+
+def _check_format(fmt: str) -> str:
+    if fmt not in MEDIA_TYPES:
+        raise HTTPException(400, detail=f"Unbekanntes Stream-Format '{fmt}' (erlaubt: sse, ndjson)")
+    return fmt
+
+
+def stream_session(session: ProgressSession, fmt: str = "sse", last_seq: int = 0) -> StreamingResponse:
+    """StreamingResponse, die die Events einer Session an den Client ausliefert."""
+    fmt = _check_format(fmt)
+
+    async def body():
+        async for record in session.subscribe(last_seq):
+            yield encode_event(record, fmt)
+
+    return StreamingResponse(
+        body(),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Progress-Session": session.session_id},
+    )
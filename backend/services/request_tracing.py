@@ -0,0 +1,350 @@
+"""
+Request-Tracing mit Spans pro Verarbeitungsstufe.
+
+Jeder Request bekommt (über TraceIDMiddleware) einen Trace; Stufen wie parse,
+geocode, matrix, solve, llm, route_geometry und db hängen Spans an die
+Trace-ID. Die Dauern werden im Speicher als Histogramme mit festen Buckets
+pro (Route-Template, Stufe) aggregiert (p50/p95/p99 ohne Sample-Historie) und
+gebündelt per executemany in SQLite (data/traces.db) geschrieben.
+
+Export:
+- Prometheus-Textformat (render_prometheus)
+- Optionaler Server-Timing-Header pro Request (server_timing_header)
+
+Konfiguration (Umgebungsvariablen):
+- TRACE_DB_PATH:         SQLite-Datei für Spans (Standard: data/traces.db, leer = aus)
+- TRACE_SERVER_TIMING:   Server-Timing-Header immer setzen (Standard: 0;
+                         per Request mit Header "X-Server-Timing: 1" aktivierbar)
+- TRACE_FLUSH_INTERVAL:  Sekunden zwischen zwei Flushes (Standard: 10)
+"""
+import asyncio
+import atexit
+import contextvars
+import functools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from backend.services.telemetry import Histogram
+from db.connections import connection
+
+logger = logging.getLogger(__name__)
+
+# Obere Bucket-Grenzen in ms (letzter Bucket = +Inf)
+BUCKETS_MS: Tuple[float, ...] = (
+    1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000,
+)
+
+# Stufe für die Gesamtdauer eines Requests (setzt TraceIDMiddleware)
+REQUEST_STAGE = "request"
+
+# Route für Spans außerhalb eines Requests (Background-Jobs, Skripte)
+BACKGROUND_ROUTE = "background"
+
+TRACE_SPANS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trace_spans (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    trace_id TEXT,
+    route TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    duration_ms REAL NOT NULL,
+    status INTEGER,
+    attrs TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_trace_spans_trace ON trace_spans(trace_id);
+CREATE INDEX IF NOT EXISTS idx_trace_spans_route_stage ON trace_spans(route, stage, started_at);
+"""
+
+
+@dataclass
+class Span:
+    """Eine gemessene Stufe innerhalb eines Traces."""
+    stage: str
+    started_at: float
+    duration_ms: float
+    attrs: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class Trace:
+    """Alle Spans eines Requests."""
+    trace_id: str
+    route: str
+    started_at: float = field(default_factory=time.time)
+    spans: List[Span] = field(default_factory=list)
+
+    def stage_totals(self) -> Dict[str, Tuple[float, int]]:
+        """Summierte Dauer und Anzahl pro Stufe (Reihenfolge des ersten Auftretens)."""
+        totals: Dict[str, Tuple[float, int]] = {}
+        for s in self.spans:
+            dur, cnt = totals.get(s.stage, (0.0, 0))
+            totals[s.stage] = (dur + s.duration_ms, cnt + 1)
+        return totals
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar(
+    "request_trace", default=None
+)
+
+
+def _stage_stats(hist: Histogram) -> Dict[str, float]:
+    """Kennzahlen eines Stufen-Histogramms (Schlüssel mit Einheit, wie im Tracing-API)."""
+    return {
+        "count": hist.count,
+        "avg_ms": round(hist.mean, 2),
+        "p50_ms": hist.quantile(0.50),
+        "p95_ms": hist.quantile(0.95),
+        "p99_ms": hist.quantile(0.99),
+        "max_ms": round(hist.max, 2),
+    }
+
+
+class RequestTracer:
+    """
+    Sammelt Spans, aggregiert Histogramme und puffert Spans für die Persistenz.
+    Thread-safe (Spans können aus Worker-Threads kommen, z.B. asyncio.to_thread).
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, max_buffer: int = 20_000):
+        self.db_path = Path(db_path) if db_path else None
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        # Begrenzter Puffer: bei Storage-Ausfall fallen die ältesten Spans weg
+        self._buffer: Deque[tuple] = deque(maxlen=max_buffer)
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        self.flushed = 0
+
+    # --- Traces ---
+
+    def start_trace(self, trace_id: str, route: str) -> contextvars.Token:
+        """Startet einen Trace im aktuellen Kontext."""
+        return _current_trace.set(Trace(trace_id=trace_id, route=route))
+
+    def finish_trace(
+        self,
+        token: contextvars.Token,
+        route: Optional[str] = None,
+        status: Optional[int] = None,
+    ) -> Optional[Trace]:
+        """
+        Beendet den Trace: Spans werden unter dem (nun bekannten) Route-Template
+        aggregiert und für den nächsten Flush gepuffert.
+        """
+        trace = _current_trace.get()
+        _current_trace.reset(token)
+        if trace is None:
+            return None
+        if route:
+            trace.route = route
+        self._commit(trace.trace_id, trace.route, trace.spans, status)
+        return trace
+
+    def current_trace(self) -> Optional[Trace]:
+        return _current_trace.get()
+
+    # --- Spans ---
+
+    def record(self, stage: str, duration_ms: float, started_at: Optional[float] = None, **attrs) -> None:
+        """Zeichnet einen bereits gemessenen Span auf."""
+        s = Span(
+            stage=stage,
+            started_at=started_at if started_at is not None else time.time() - duration_ms / 1000,
+            duration_ms=duration_ms,
+            attrs=attrs or None,
+        )
+        trace = _current_trace.get()
+        if trace is not None:
+            # list.append ist atomar; aggregiert wird erst beim Trace-Ende
+            trace.spans.append(s)
+        else:
+            self._commit(None, BACKGROUND_ROUTE, [s], None)
+
+    @contextmanager
+    def span(self, stage: str, **attrs) -> Iterator[None]:
+        """Misst den umschlossenen Block als Span der Stufe `stage`."""
+        started_at = time.time()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - start) * 1000, started_at, **attrs)
+
+    def _commit(self, trace_id: Optional[str], route: str, spans: List[Span], status: Optional[int]) -> None:
+        if not spans:
+            return
+        rows = []
+        with self._lock:
+            for s in spans:
+                key = (route, s.stage)
+                hist = self._histograms.get(key)
+                if hist is None:
+                    hist = self._histograms[key] = Histogram(BUCKETS_MS)
+                hist.observe(s.duration_ms)
+                rows.append((
+                    trace_id, route, s.stage, s.started_at, round(s.duration_ms, 3), status,
+                    json.dumps(s.attrs, default=str) if s.attrs else None,
+                ))
+            if self.db_path is not None:
+                self._buffer.extend(rows)
+
+    # --- Auswertung ---
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Histogramm-Statistiken: {route: {stage: {count, p50_ms, ...}}}."""
+        with self._lock:
+            items = [(k, _stage_stats(h)) for k, h in self._histograms.items()]
+        result: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (route, stage), stats in sorted(items):
+            result.setdefault(route, {})[stage] = stats
+        return result
+
+    def render_prometheus(self) -> str:
+        """Exportiert alle Histogramme im Prometheus-Textformat (Version 0.0.4)."""
+        name = "famo_stage_duration_ms"
+        lines = [
+            f"# HELP {name} Dauer der Verarbeitungsstufen pro Route in Millisekunden.",
+            f"# TYPE {name} histogram",
+        ]
+        with self._lock:
+            items = [(k, list(h.counts), h.count, h.sum) for k, h in self._histograms.items()]
+        for (route, stage), counts, count, sum_ms in sorted(items):
+            labels = f'route="{_escape_label(route)}",stage="{_escape_label(stage)}"'
+            cumulative = 0
+            for bound, n in zip(BUCKETS_MS, counts):
+                cumulative += n
+                lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{name}_sum{{{labels}}} {sum_ms:.3f}")
+            lines.append(f"{name}_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Verwirft Histogramme und Puffer (für Tests)."""
+        with self._lock:
+            self._histograms.clear()
+            self._buffer.clear()
+
+    # --- Persistenz ---
+
+    @property
+    def pending(self) -> int:
+        """Anzahl noch nicht gespeicherter Spans."""
+        return len(self._buffer)
+
+    def _ensure_schema(self, conn: sqlite3.Connection) -> None:
+        if not self._schema_ready:
+            conn.executescript(TRACE_SPANS_SCHEMA)
+            self._schema_ready = True
+
+    def flush(self) -> int:
+        """Schreibt alle gepufferten Spans in einem Batch. Gibt die Anzahl zurück."""
+        if self.db_path is None:
+            return 0
+        with self._lock:
+            if not self._buffer:
+                return 0
+            rows = list(self._buffer)
+            self._buffer.clear()
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            with connection(self.db_path) as conn:
+                self._ensure_schema(conn)
+                conn.executemany(
+                    "INSERT INTO trace_spans (trace_id, route, stage, started_at, duration_ms, status, attrs) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+            self.flushed += len(rows)
+            return len(rows)
+        except Exception as e:
+            # Spans zurücklegen (der Puffer ist begrenzt, älteste fallen ggf. weg)
+            with self._lock:
+                self._buffer.extendleft(reversed(rows))
+            logger.warning(f"Trace-Spans konnten nicht gespeichert werden: {e}")
+            return 0
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def server_timing_header(trace: Trace, total_ms: Optional[float] = None) -> str:
+    """Baut den Server-Timing-Header (eine Metrik pro Stufe, Dauern summiert)."""
+    parts = []
+    for stage, (dur, cnt) in trace.stage_totals().items():
+        if stage == REQUEST_STAGE:
+            continue
+        metric = f"{stage};dur={dur:.1f}"
+        if cnt > 1:
+            metric += f';desc="{cnt}x"'
+        parts.append(metric)
+    if total_ms is not None:
+        parts.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(parts)
+
+
+# Singleton-Instanz
+_tracer: Optional[RequestTracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> RequestTracer:
+    """Gibt Singleton-Instanz zurück."""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                db_path = os.getenv("TRACE_DB_PATH", "data/traces.db")
+                _tracer = RequestTracer(Path(db_path) if db_path else None)
+                atexit.register(_tracer.flush)
+    return _tracer
+
+
+def span(stage: str, **attrs):
+    """Kurzform: `with span("matrix", n=12): ...`"""
+    return get_tracer().span(stage, **attrs)
+
+
+def traced(stage: str):
+    """
+    Decorator: misst jeden Aufruf der (sync oder async) Funktion als Span.
+
+    Usage:
+        @traced("geocode")
+        async def _geocode_one(...): ...
+    """
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with get_tracer().span(stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_tracer().span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+async def run_trace_flush_loop(interval_seconds: Optional[float] = None) -> None:
+    """Background-Job: schreibt gepufferte Spans periodisch (außerhalb des Event-Loops)."""
+    interval = interval_seconds or float(os.getenv("TRACE_FLUSH_INTERVAL", "10"))
+    tracer = get_tracer()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(tracer.flush)
+        except Exception as e:
+            logger.warning(f"Trace-Flush fehlgeschlagen: {e}")
@@ -19,6 +19,8 @@ from typing import List, Dict, Tuple, Optional, Any
 from dataclasses import dataclass
 import logging
 
+from backend.services.request_tracing import traced
+
 logger = logging.getLogger(__name__)
 
 # Import Backend-Manager für Circuit Breaker
@@ -474,6 +476,7 @@ def calculate_route_duration(
     return total_seconds / 60.0  # Konvertiere zu Minuten
 
 
+@traced("solve")
 def optimize_route(
     stops: List[Dict[str, Any]],
     backend_priority: List[str] = None,
@@ -9,6 +9,7 @@ from typing import Dict, List, Optional
 from sqlalchemy import text
 from db.core import ENGINE
 from backend.config import cfg
+from backend.db.tour_stops import stops_count_expr
 
 logger = logging.getLogger(__name__)
 
@@ -158,12 +159,99 @@ def calculate_tour_cost(
     return result
 
 
-def get_monthly_stats(months: int = 12) -> List[Dict]:
+def _time_expr(columns) -> str:
+    """Tourdauer in Minuten (gesamtzeit_min, sonst dauer_min – je nach Schema-Stand)."""
+    present = [col for col in ("gesamtzeit_min", "dauer_min") if col in columns]
+    if not present:
+        return "NULL"
+    return present[0] if len(present) == 1 else f"COALESCE({', '.join(present)})"
+
+
+def _tour_totals(conn, monthly: bool, start: str, end: str) -> Dict[str, List[float]]:
+    """
+    Touren, Stopps, km und Minuten pro Tag bzw. Monat.
+
+    Liest die Rollups (tour_rollup_daily / tour_rollup_monthly, siehe
+    backend/db/tour_stops.py). Touren, die an der DAO vorbei geschrieben und
+    noch nicht nachgezogen wurden (stops_count IS NULL), kommen über den
+    partiellen Index direkt aus touren dazu. Ohne Rollups (altes Schema)
+    wird touren komplett aggregiert.
+
+    Returns:
+        Dict Tag/Monat -> [tours, stops, km, minuten]
+    """
+    tables = {row[0] for row in conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name IN ('tour_rollup_daily', 'tour_rollup_monthly')"
+    )).fetchall()}
+    columns = {col[1] for col in conn.execute(text("PRAGMA table_info(touren)")).fetchall()}
+    use_rollups = "stops_count" in columns and {"tour_rollup_daily", "tour_rollup_monthly"} <= tables
+
+    totals: Dict[str, List[float]] = {}
+
+    def add(rows):
+        for key, tours, stops, km, minutes in rows:
+            acc = totals.setdefault(key, [0, 0, 0.0, 0.0])
+            acc[0] += int(tours or 0)
+            acc[1] += int(stops or 0)
+            acc[2] += float(km or 0.0)
+            acc[3] += float(minutes or 0.0)
+
+    if use_rollups:
+        table, key = ("tour_rollup_monthly", "monat") if monthly else ("tour_rollup_daily", "datum")
+        bounds = {"start": start[:7], "end": end[:7]} if monthly else {"start": start, "end": end}
+        add(conn.execute(text(f"""
+            SELECT {key}, SUM(tours), SUM(stops), SUM(distanz_km), SUM(zeit_min)
+            FROM {table}
+            WHERE {key} >= :start AND {key} <= :end
+            GROUP BY {key}
+        """), bounds).fetchall())
+
+    pending = "stops_count IS NULL AND " if use_rollups else ""
+    add(conn.execute(text(f"""
+        SELECT {"substr(datum, 1, 7)" if monthly else "datum"}, COUNT(*), SUM({stops_count_expr(columns)}),
+               SUM(distanz_km), SUM({_time_expr(columns)})
+        FROM touren
+        WHERE {pending}datum >= :start AND datum <= :end
+        GROUP BY 1
+    """), {"start": start, "end": end}).fetchall())
+    return totals
+
+
+def _period_stats(totals: List[float], cost_config: Dict[str, float]) -> Dict:
+    """
+    KPI-Felder eines Zeitraums aus den Summen.
+
+    calculate_tour_cost ist linear in km und Zeit – die Kosten der Summe
+    entsprechen der Summe der Tourkosten. Fehlt die Zeit, wird sie über
+    50 km/h aus den km geschätzt.
     """
-    Aggregiert monatliche Statistiken aus der DB.
+    tour_count, stop_count, km, minutes = totals
+    total_cost = 0.0
+    total_time_min = 0.0
+    if km > 0:
+        total_time_min = minutes if minutes > 0 else (km / 50.0) * 60
+        total_cost = calculate_tour_cost(km, total_time_min, max(stop_count, 1), cost_config)["tour_cost_total"]
+    return {
+        "tours": tour_count,
+        "stops": stop_count,
+        "km": round(km, 2),
+        "total_time_min": round(total_time_min, 1),
+        "total_cost": round(total_cost, 2),
+        "avg_cost_per_tour": round(total_cost / tour_count, 2) if tour_count > 0 else 0.0,
+        "avg_cost_per_stop": round(total_cost / stop_count, 2) if stop_count > 0 else 0.0,
+        "avg_cost_per_km": round(total_cost / km, 2) if km > 0 else 0.0,
+        "avg_stops_per_tour": round(stop_count / tour_count, 2) if tour_count > 0 else 0.0,
+        "avg_distance_per_tour_km": round(km / tour_count, 2) if tour_count > 0 else 0.0
+    }
+
+
+def get_monthly_stats(months: int = 12, engine=None) -> List[Dict]:
+    """
+    Aggregiert monatliche Statistiken aus der DB (Monats-Rollups).
     
     Args:
         months: Anzahl der letzten Monate (Standard: 12)
+        engine: Lese-Engine (z.B. Read-only-Snapshot), Standard: ENGINE
     
     Returns:
         Liste von Dicts mit {month, tours, stops, km}
@@ -171,7 +259,7 @@ def get_monthly_stats(months: int = 12) -> List[Dict]:
     Raises:
         ValueError: Wenn Tabellen nicht existieren oder DB-Fehler auftritt
     """
-    with ENGINE.connect() as conn:
+    with (engine or ENGINE).connect() as conn:
         # Prüfe ob Tabellen existieren
         result = conn.execute(text("""
             SELECT name FROM sqlite_master 
@@ -185,118 +273,32 @@ def get_monthly_stats(months: int = 12) -> List[Dict]:
         if 'kunden' not in tables:
             raise ValueError(f"Tabelle 'kunden' nicht gefunden. Verfügbare Tabellen: {tables}")
         
-        # Aggregiere aus bestehenden Tabellen - ECHTE DATEN
+        month_dates = [datetime.now() - timedelta(days=30 * i) for i in range(months)]
+        if not month_dates:
+            return []
+        # Alle Monate in EINER Abfrage (vom ersten Tag des ältesten Monats bis heute)
+        totals = _tour_totals(
+            conn, monthly=True,
+            start=month_dates[-1].replace(day=1).strftime("%Y-%m-%d"),
+            end=month_dates[0].strftime("%Y-%m-31"),
+        )
+        cost_config = get_cost_config()
+        
         stats = []
-        for i in range(months):
-            month_date = datetime.now() - timedelta(days=30 * i)
+        for month_date in month_dates:
             month_str = month_date.strftime("%Y-%m")
-            month_start = month_date.replace(day=1).strftime("%Y-%m-%d")
-            # Monatsende berechnen
-            if month_date.month == 12:
-                month_end_date = month_date.replace(year=month_date.year + 1, month=1, day=1) - timedelta(days=1)
-            else:
-                month_end_date = month_date.replace(month=month_date.month + 1, day=1) - timedelta(days=1)
-            month_end = month_end_date.strftime("%Y-%m-%d")
-            
-            # Zähle Touren für diesen Monat (nach Datum gefiltert)
-            tour_count = conn.execute(text("""
-                SELECT COUNT(*) FROM touren 
-                WHERE datum >= :start AND datum <= :end
-            """), {"start": month_start, "end": month_end}).scalar() or 0
-            
-            # Zähle Stops für Touren in diesem Monat
-            # kunden_ids ist JSON-Array (z.B. ["5329", "40620"]), wir parsen es
-            import json
-            stop_count = 0
-            tour_rows = conn.execute(text("""
-                SELECT kunden_ids FROM touren 
-                WHERE datum >= :start AND datum <= :end AND kunden_ids IS NOT NULL AND kunden_ids != ''
-            """), {"start": month_start, "end": month_end}).fetchall()
-            
-            for row in tour_rows:
-                try:
-                    # Versuche JSON zu parsen
-                    ids = json.loads(row[0])
-                    if isinstance(ids, list):
-                        stop_count += len(ids)
-                except (json.JSONDecodeError, TypeError):
-                    # Fallback: Zähle Kommas (wenn nicht JSON)
-                    ids_str = str(row[0])
-                    if ids_str:
-                        stop_count += ids_str.count(',') + 1
-            
-            # Summiere Distanz für diesen Monat (aus touren.distanz_km)
-            km_result = conn.execute(text("""
-                SELECT COALESCE(SUM(distanz_km), 0.0) FROM touren 
-                WHERE datum >= :start AND datum <= :end AND distanz_km IS NOT NULL
-            """), {"start": month_start, "end": month_end}).scalar()
-            km = float(km_result) if km_result else 0.0
-            
-            # Berechne Kosten-KPIs (analog zu get_daily_stats)
-            cost_config = get_cost_config()
-            total_cost = 0.0
-            total_time_min = 0.0
-            
-            try:
-                # Prüfe ob gesamtzeit_min Spalte existiert (dynamische Spaltenprüfung)
-                column_check = conn.execute(text("PRAGMA table_info(touren)")).fetchall()
-                has_gesamtzeit_min = any(col[1] == 'gesamtzeit_min' for col in column_check)
-                has_dauer_min = any(col[1] == 'dauer_min' for col in column_check)
-                time_column = "gesamtzeit_min" if has_gesamtzeit_min else ("dauer_min" if has_dauer_min else "NULL")
-                
-                tour_rows_with_data = conn.execute(text(f"""
-                    SELECT 
-                        COALESCE(distanz_km, 0) as distanz,
-                        COALESCE({time_column}, 0) as zeit,
-                        COALESCE(stops_count, 0) as stops
-                    FROM touren 
-                    WHERE datum >= :start AND datum <= :end
-                """), {"start": month_start, "end": month_end}).fetchall()
-                
-                for row in tour_rows_with_data:
-                    dist, time_min, stops = row[0] or 0, row[1] or 0, row[2] or 0
-                    if dist > 0 and time_min > 0 and stops > 0:
-                        tour_cost = calculate_tour_cost(dist, time_min, stops, cost_config)
-                        total_cost += tour_cost["tour_cost_total"]
-                        total_time_min += time_min
-                    elif dist > 0:
-                        estimated_time = (dist / 50.0) * 60
-                        estimated_stops = max(stops, 1) if stops > 0 else 1
-                        tour_cost = calculate_tour_cost(dist, estimated_time, estimated_stops, cost_config)
-                        total_cost += tour_cost["tour_cost_total"]
-                        total_time_min += estimated_time
-            except Exception as e:
-                logger.debug(f"Kostenberechnung für {month_str} fehlgeschlagen: {e}")
-                if km > 0:
-                    estimated_time = (km / 50.0) * 60
-                    estimated_stops = max(stop_count, 1) if stop_count > 0 else 1
-                    tour_cost = calculate_tour_cost(km, estimated_time, estimated_stops, cost_config)
-                    total_cost = tour_cost["tour_cost_total"] * tour_count if tour_count > 0 else 0.0
-                    total_time_min = estimated_time * tour_count if tour_count > 0 else 0.0
-            
-            stats.append({
-                "month": month_str,
-                "tours": tour_count,
-                "stops": stop_count,
-                "km": round(km, 2),
-                "total_time_min": round(total_time_min, 1),
-                "total_cost": round(total_cost, 2),
-                "avg_cost_per_tour": round(total_cost / tour_count, 2) if tour_count > 0 else 0.0,
-                "avg_cost_per_stop": round(total_cost / stop_count, 2) if stop_count > 0 else 0.0,
-                "avg_cost_per_km": round(total_cost / km, 2) if km > 0 else 0.0,
-                "avg_stops_per_tour": round(stop_count / tour_count, 2) if tour_count > 0 else 0.0,
-                "avg_distance_per_tour_km": round(km / tour_count, 2) if tour_count > 0 else 0.0
-            })
+            stats.append({"month": month_str, **_period_stats(totals.get(month_str, [0, 0, 0.0, 0.0]), cost_config)})
         
         return stats
 
 
-def get_daily_stats(days: int = 30) -> List[Dict]:
+def get_daily_stats(days: int = 30, engine=None) -> List[Dict]:
     """
-    Aggregiert tägliche Statistiken aus der DB.
+    Aggregiert tägliche Statistiken aus der DB (Tages-Rollups).
     
     Args:
         days: Anzahl der letzten Tage (Standard: 30)
+        engine: Lese-Engine (z.B. Read-only-Snapshot), Standard: ENGINE
     
     Returns:
         Liste von Dicts mit {date, tours, stops, km}
@@ -304,7 +306,7 @@ def get_daily_stats(days: int = 30) -> List[Dict]:
     Raises:
         ValueError: Wenn Tabellen nicht existieren oder DB-Fehler auftritt
     """
-    with ENGINE.connect() as conn:
+    with (engine or ENGINE).connect() as conn:
         # Prüfe ob Tabellen existieren
         result = conn.execute(text("""
             SELECT name FROM sqlite_master 
@@ -315,117 +317,33 @@ def get_daily_stats(days: int = 30) -> List[Dict]:
         if 'touren' not in tables:
             raise ValueError(f"Tabelle 'touren' nicht gefunden. Verfügbare Tabellen: {tables}")
         
-        # Aggregiere aus bestehenden Tabellen - ECHTE DATEN
-        stats = []
-        for i in range(days):
-            day_date = datetime.now() - timedelta(days=i)
-            day_str = day_date.strftime("%Y-%m-%d")
-            
-            # Zähle Touren für diesen Tag
-            tour_count = conn.execute(text("""
-                SELECT COUNT(*) FROM touren 
-                WHERE datum = :date
-            """), {"date": day_str}).scalar() or 0
-            
-            # Zähle Stops für Touren an diesem Tag
-            import json
-            stop_count = 0
-            tour_rows = conn.execute(text("""
-                SELECT kunden_ids FROM touren 
-                WHERE datum = :date AND kunden_ids IS NOT NULL AND kunden_ids != ''
-            """), {"date": day_str}).fetchall()
-            
-            for row in tour_rows:
-                try:
-                    ids = json.loads(row[0])
-                    if isinstance(ids, list):
-                        stop_count += len(ids)
-                except (json.JSONDecodeError, TypeError):
-                    ids_str = str(row[0])
-                    if ids_str:
-                        stop_count += ids_str.count(',') + 1
-            
-            # Summiere Distanz für diesen Tag
-            km_result = conn.execute(text("""
-                SELECT COALESCE(SUM(distanz_km), 0.0) FROM touren 
-                WHERE datum = :date AND distanz_km IS NOT NULL
-            """), {"date": day_str}).scalar()
-            km = float(km_result) if km_result else 0.0
-            
-            # Berechne Kosten-KPIs (falls distanz_km vorhanden)
-            cost_config = get_cost_config()
-            total_cost = 0.0
-            total_time_min = 0.0
-            
-            # Versuche Zeit- und Kosten-Daten aus touren zu holen
-            # Falls Felder nicht existieren, verwende Schätzungen
-            try:
-                # Prüfe ob Zeit-Felder existieren (dynamische Spaltenprüfung)
-                column_check = conn.execute(text("PRAGMA table_info(touren)")).fetchall()
-                has_gesamtzeit_min = any(col[1] == 'gesamtzeit_min' for col in column_check)
-                has_dauer_min = any(col[1] == 'dauer_min' for col in column_check)
-                time_column = "gesamtzeit_min" if has_gesamtzeit_min else ("dauer_min" if has_dauer_min else "NULL")
-                
-                tour_rows_with_data = conn.execute(text(f"""
-                    SELECT 
-                        COALESCE(distanz_km, 0) as distanz,
-                        COALESCE({time_column}, 0) as zeit,
-                        COALESCE(stops_count, 0) as stops
-                    FROM touren 
-                    WHERE datum = :date
-                """), {"date": day_str}).fetchall()
-                
-                for row in tour_rows_with_data:
-                    dist, time_min, stops = row[0] or 0, row[1] or 0, row[2] or 0
-                    if dist > 0 and time_min > 0 and stops > 0:
-                        tour_cost = calculate_tour_cost(dist, time_min, stops, cost_config)
-                        total_cost += tour_cost["tour_cost_total"]
-                        total_time_min += time_min
-                    elif dist > 0:
-                        # Fallback: Schätze Zeit basierend auf Distanz (50 km/h Durchschnitt)
-                        estimated_time = (dist / 50.0) * 60  # Minuten
-                        estimated_stops = max(stops, 1) if stops > 0 else 1
-                        tour_cost = calculate_tour_cost(dist, estimated_time, estimated_stops, cost_config)
-                        total_cost += tour_cost["tour_cost_total"]
-                        total_time_min += estimated_time
-            except Exception as e:
-                logger.debug(f"Kostenberechnung für {day_str} fehlgeschlagen (Felder fehlen?): {e}")
-                # Fallback: Schätze basierend auf km
-                if km > 0:
-                    estimated_time = (km / 50.0) * 60  # Minuten bei 50 km/h
-                    estimated_stops = max(stop_count, 1) if stop_count > 0 else 1
-                    tour_cost = calculate_tour_cost(km, estimated_time, estimated_stops, cost_config)
-                    total_cost = tour_cost["tour_cost_total"] * tour_count if tour_count > 0 else 0.0
-                    total_time_min = estimated_time * tour_count if tour_count > 0 else 0.0
-            
-            stats.append({
-                "date": day_str,
-                "tours": tour_count,
-                "stops": stop_count,
-                "km": round(km, 2),
-                "total_time_min": round(total_time_min, 1),
-                "total_cost": round(total_cost, 2),
-                "avg_cost_per_tour": round(total_cost / tour_count, 2) if tour_count > 0 else 0.0,
-                "avg_cost_per_stop": round(total_cost / stop_count, 2) if stop_count > 0 else 0.0,
-                "avg_cost_per_km": round(total_cost / km, 2) if km > 0 else 0.0,
-                "avg_stops_per_tour": round(stop_count / tour_count, 2) if tour_count > 0 else 0.0,
-                "avg_distance_per_tour_km": round(km / tour_count, 2) if tour_count > 0 else 0.0
-            })
+        day_strs = [(datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+        if not day_strs:
+            return []
+        # Alle Tage in EINER Abfrage
+        totals = _tour_totals(conn, monthly=False, start=day_strs[-1], end=day_strs[0])
+        cost_config = get_cost_config()
         
-        return stats
+        return [
+            {"date": day_str, **_period_stats(totals.get(day_str, [0, 0, 0.0, 0.0]), cost_config)}
+            for day_str in day_strs
+        ]
 
 
-def get_overview_stats() -> Dict:
+def get_overview_stats(engine=None) -> Dict:
     """
     Liefert Übersichts-Statistiken für die Stats-Box.
     
+    Args:
+        engine: Lese-Engine (z.B. Read-only-Snapshot), Standard: ENGINE
+    
     Returns:
         Dict mit monthly_tours, avg_stops, km_osrm_month
     
     Raises:
         ValueError: Wenn DB-Fehler auftritt oder Tabellen fehlen
     """
-    monthly = get_monthly_stats(1)  # Letzter Monat
+    monthly = get_monthly_stats(1, engine=engine)  # Letzter Monat
     if not monthly:
         raise ValueError("Keine monatlichen Statistiken verfügbar")
     
@@ -7,6 +7,7 @@ from datetime import datetime, timedelta
 from typing import Optional
 from sqlalchemy import text
 from db.core import ENGINE
+from backend.db.tour_stops import ensure_tour_stops_schema, sync_tour_stops
 
 logger = logging.getLogger(__name__)
 
@@ -36,43 +37,43 @@ def aggregate_daily_stats(date: Optional[str] = None) -> dict:
             logger.warning("Tabelle stats_daily existiert nicht. Migration ausführen?")
             return {"error": "stats_daily table not found"}
         
-        # Aggregiere aus tours/tour_stops
-        # Hinweis: Nutzt bestehende Tabellen (touren, kunden)
+        # Aggregiere aus dem Tages-Rollup (vom DAO-Write-Pfad gepflegt, siehe backend/db/tour_stops.py).
+        # completed_tours/aborted_tours bleiben beim Schema-Default: touren kennt keinen Status.
+        raw = conn.connection.driver_connection
+        if ensure_tour_stops_schema(raw):
+            sync_tour_stops(raw)  # an der DAO vorbei geschriebene Touren nachziehen
         stats = conn.execute(text("""
             SELECT 
-                COUNT(DISTINCT t.id) as total_tours,
-                COUNT(DISTINCT CASE WHEN t.status = 'completed' THEN t.id END) as completed_tours,
-                COUNT(DISTINCT CASE WHEN t.status = 'aborted' THEN t.id END) as aborted_tours,
-                COALESCE(SUM(t.stops_count), 0) as total_stops,
-                COALESCE(SUM(t.distanz_km), 0.0) as total_km_planned,
-                COALESCE(SUM(t.distanz_km), 0.0) as total_km_real,  -- TODO: Unterscheidung planned/real
-                COALESCE(SUM(t.gesamtzeit_min), 0.0) as total_time_min,
+                COALESCE(SUM(tours), 0) as total_tours,
+                COALESCE(SUM(stops), 0) as total_stops,
+                COALESCE(SUM(distanz_km), 0.0) as total_km_planned,
+                COALESCE(SUM(distanz_km), 0.0) as total_km_real,  -- TODO: Unterscheidung planned/real
+                COALESCE(SUM(zeit_min), 0.0) as total_time_min,
                 0.0 as total_cost,  -- TODO: Kostenberechnung
                 0.0 as avg_delay_minutes,  -- TODO: Delay-Berechnung
                 0.0 as avg_success_score  -- TODO: Success-Score
-            FROM touren t
-            WHERE t.datum = :date
+            FROM tour_rollup_daily
+            WHERE datum = :date
         """), {"date": date}).fetchone()
         
         if not stats:
             logger.warning(f"Keine Daten für {date} gefunden")
             return {"error": "No data found"}
         
-        # Upsert in stats_daily
+        # Upsert in stats_daily (region NULL = global; NULL greift nicht im Unique-Index)
+        conn.execute(text("DELETE FROM stats_daily WHERE date = :date AND region IS NULL"), {"date": date})
         conn.execute(text("""
             INSERT INTO stats_daily (
-                date, region, total_tours, completed_tours, aborted_tours,
+                date, region, total_tours,
                 total_stops, total_km_planned, total_km_real, total_time_min,
                 total_cost, avg_delay_minutes, avg_success_score, updated_at
             ) VALUES (
-                :date, NULL, :total_tours, :completed_tours, :aborted_tours,
+                :date, NULL, :total_tours,
                 :total_stops, :total_km_planned, :total_km_real, :total_time_min,
                 :total_cost, :avg_delay_minutes, :avg_success_score, CURRENT_TIMESTAMP
             )
             ON CONFLICT(date, region) DO UPDATE SET
                 total_tours = excluded.total_tours,
-                completed_tours = excluded.completed_tours,
-                aborted_tours = excluded.aborted_tours,
                 total_stops = excluded.total_stops,
                 total_km_planned = excluded.total_km_planned,
                 total_km_real = excluded.total_km_real,
@@ -84,24 +85,22 @@ def aggregate_daily_stats(date: Optional[str] = None) -> dict:
         """), {
             "date": date,
             "total_tours": stats[0] or 0,
-            "completed_tours": stats[1] or 0,
-            "aborted_tours": stats[2] or 0,
-            "total_stops": stats[3] or 0,
-            "total_km_planned": stats[4] or 0.0,
-            "total_km_real": stats[5] or 0.0,
-            "total_time_min": stats[6] or 0.0,
-            "total_cost": stats[7] or 0.0,
-            "avg_delay_minutes": stats[8] or 0.0,
-            "avg_success_score": stats[9] or 0.0
+            "total_stops": stats[1] or 0,
+            "total_km_planned": stats[2] or 0.0,
+            "total_km_real": stats[3] or 0.0,
+            "total_time_min": stats[4] or 0.0,
+            "total_cost": stats[5] or 0.0,
+            "avg_delay_minutes": stats[6] or 0.0,
+            "avg_success_score": stats[7] or 0.0
         })
         
-        logger.info(f"Stats für {date} aggregiert: {stats[0]} Touren, {stats[3]} Stops")
+        logger.info(f"Stats für {date} aggregiert: {stats[0]} Touren, {stats[1]} Stops")
         
         return {
             "date": date,
             "total_tours": stats[0] or 0,
-            "total_stops": stats[3] or 0,
-            "total_km": stats[4] or 0.0
+            "total_stops": stats[1] or 0,
+            "total_km": stats[2] or 0.0
         }
 
 
@@ -0,0 +1,164 @@
+"""
+In-Process-Aggregation der Erfolgs-Statistiken (success_stats).
+
+Statt pro 2xx-Request einen Upsert auf dem Event-Loop auszuführen, sammelt der
+Aggregator Aufrufzahl und Latenz pro Route-Template (z.B. "/api/tour/{tour_id}",
+nicht der konkrete Pfad) und Tag im Speicher. Ein Hintergrund-Job schreibt alle
+Zähler gebündelt in einer Transaktion (alle SUCCESS_STATS_FLUSH_INTERVAL Sekunden
+und beim Shutdown).
+
+- Statische Pfade (Assets, Health-Checks, Doku) werden per Regel übersprungen:
+  Präfixe aus SUCCESS_STATS_SKIP_PREFIXES und Datei-Endungen (.js, .css, .png, ...).
+- Latenz-Histogramme pro Route-Template liegen in der Telemetrie-Registry
+  ("http.route_latency_ms.<template>", Export über /api/metrics).
+"""
+from __future__ import annotations
+
+import asyncio
+import atexit
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from backend.services.telemetry import get_registry
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL_S = float(os.getenv("SUCCESS_STATS_FLUSH_INTERVAL", "5"))
+SKIP_PREFIXES: Tuple[str, ...] = tuple(
+    p.strip() for p in os.getenv(
+        "SUCCESS_STATS_SKIP_PREFIXES",
+        "/static,/health,/favicon.ico,/docs,/redoc,/openapi.json,/api/metrics,/api/progress",
+    ).split(",") if p.strip()
+)
+SKIP_SUFFIXES: Tuple[str, ...] = (
+    ".js", ".css", ".map", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".ico", ".woff", ".woff2", ".ttf", ".html",
+)
+# Obergrenze für verschiedene Schlüssel zwischen zwei Flushes (Schutz vor Template-Explosion)
+MAX_KEYS = 2000
+
+
+@dataclass
+class _Bucket:
+    """Zähler eines Route-Templates an einem Tag."""
+    calls: int = 0
+    latency_sum_ms: float = 0.0
+
+
+def should_record(path: str) -> bool:
+    """Regel: statische Assets, Health-Checks und Doku nicht erfassen."""
+    if path.startswith(SKIP_PREFIXES):
+        return False
+    return not path.lower().endswith(SKIP_SUFFIXES)
+
+
+class SuccessStatsAggregator:
+    """Sammelt Erfolgs-Statistiken im Speicher und schreibt sie gebündelt."""
+
+    def __init__(self, max_keys: int = MAX_KEYS) -> None:
+        self.max_keys = max_keys
+        self._pending: Dict[Tuple[str, str], _Bucket] = {}
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.rows_written = 0
+
+    def record(self, template: str, duration_ms: float, day: Optional[str] = None) -> None:
+        """Erfasst einen erfolgreichen Request (O(1), kein DB-Zugriff)."""
+        key = (template, day or datetime.now().strftime("%Y-%m-%d"))
+        with self._lock:
+            bucket = self._pending.get(key)
+            if bucket is None:
+                if len(self._pending) >= self.max_keys:
+                    self.dropped += 1
+                    return
+                bucket = self._pending[key] = _Bucket()
+            bucket.calls += 1
+            bucket.latency_sum_ms += duration_ms
+            self.recorded += 1
+        get_registry().histogram(f"http.route_latency_ms.{template}").observe(duration_ms)
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def flush(self) -> int:
+        """
+        Schreibt alle gesammelten Zähler in einer Transaktion nach success_stats.
+
+        Returns:
+            Anzahl geschriebener Zeilen (bei Fehler 0; die Zähler werden wieder eingereiht)
+        """
+        with self._lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+        rows = [
+            {"endpoint": endpoint, "time_bucket": day, "calls": b.calls, "latency_sum": b.latency_sum_ms}
+            for (endpoint, day), b in batch.items()
+        ]
+        try:
+            from backend.services.error_learning_service import log_success_batch
+            log_success_batch(rows)
+        except Exception as e:
+            logger.warning(f"[SUCCESS-STATS] Flush fehlgeschlagen ({len(rows)} Zeilen): {e}")
+            self._requeue(batch)
+            return 0
+        self.flushes += 1
+        self.rows_written += len(rows)
+        return len(rows)
+
+    def _requeue(self, batch: Dict[Tuple[str, str], _Bucket]) -> None:
+        with self._lock:
+            for key, b in batch.items():
+                current = self._pending.get(key)
+                if current is None:
+                    if len(self._pending) >= self.max_keys:
+                        self.dropped += b.calls
+                        continue
+                    current = self._pending[key] = _Bucket()
+                current.calls += b.calls
+                current.latency_sum_ms += b.latency_sum_ms
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending_keys": self.pending(),
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+        }
+
+
+_aggregator: Optional[SuccessStatsAggregator] = None
+_aggregator_lock = threading.Lock()
+
+
+def get_success_aggregator() -> SuccessStatsAggregator:
+    """Singleton-Aggregator (Flush beim Prozessende via atexit)."""
+    global _aggregator
+    if _aggregator is None:
+        with _aggregator_lock:
+            if _aggregator is None:
+                _aggregator = SuccessStatsAggregator()
+                atexit.register(_aggregator.flush)
+    return _aggregator
+
+
+async def run_success_stats_flush_loop(interval_seconds: Optional[float] = None) -> None:
+    """Background-Job: schreibt die Erfolgs-Statistiken periodisch (außerhalb des Event-Loops)."""
+    interval = interval_seconds or FLUSH_INTERVAL_S
+    aggregator = get_success_aggregator()
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(aggregator.flush)
+            except Exception as e:
+                logger.warning(f"[SUCCESS-STATS] Hintergrund-Flush fehlgeschlagen: {e}")
+    finally:
+        # Shutdown (Task wird abgebrochen): letzte Zähler noch schreiben
+        aggregator.flush()
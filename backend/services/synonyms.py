@@ -1,13 +1,39 @@
-"""Synonym-Store: Persistente Alias-Auflösung (vor Geocoding)"""
+"""
+Synonym-Store: Persistente Alias-Auflösung (vor Geocoding)
+
+Die aktiven Synonyme einer Datenbank liegen als Index (alias_norm → Synonym) im
+Speicher; alle SynonymStore-Instanzen auf dieselbe Datei teilen ihn. upsert()
+und delete() verwerfen den Index, nach SYNONYM_CACHE_TTL_S wird er ohnehin neu
+geladen (Änderungen aus anderen Prozessen).
+
+Die Nutzungsstatistik (synonym_hits) wird nicht mehr pro Treffer geschrieben:
+Treffer werden im Speicher gezählt und gebündelt in einer Transaktion
+eingetragen (ab SYNONYM_HITS_BATCH Treffern, periodisch per Hintergrund-Job und
+beim Prozessende).
+"""
 
 from __future__ import annotations
-from dataclasses import dataclass
+import asyncio
+import atexit
+from collections import Counter
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+import logging
+import os
 from pathlib import Path
 import sqlite3
-from typing import Optional
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
 
 from backend.services.text_normalize import normalize_token
 
+logger = logging.getLogger(__name__)
+
+CACHE_TTL_S = float(os.getenv("SYNONYM_CACHE_TTL_S", "300"))
+HITS_BATCH = int(os.getenv("SYNONYM_HITS_BATCH", "500"))
+HITS_FLUSH_INTERVAL_S = float(os.getenv("SYNONYM_HITS_FLUSH_INTERVAL", "10"))
+
 
 @dataclass
 class Synonym:
@@ -26,6 +52,187 @@ class Synonym:
     note: Optional[str] = None
 
 
+def _row_to_synonym(row: sqlite3.Row) -> Synonym:
+    return Synonym(
+        alias=row["alias"],
+        customer_id=row["customer_id"],
+        customer_name=row["customer_name"],
+        street=row["street"],
+        postal_code=row["postal_code"],
+        city=row["city"],
+        country=row["country"] or "DE",
+        lat=row["lat"],
+        lon=row["lon"],
+        priority=row["priority"],
+        active=row["active"],
+        note=row["note"]
+    )
+
+
+class _SynonymIndex:
+    """Aktive Synonyme einer Datenbank im Speicher (alias_norm → Synonym)."""
+
+    def __init__(self, ttl_s: float = CACHE_TTL_S) -> None:
+        self.ttl_s = ttl_s
+        self._entries: Optional[Dict[str, Synonym]] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def entries(self, db: sqlite3.Connection) -> Dict[str, Synonym]:
+        entries = self._entries
+        if entries is not None and time.monotonic() - self._loaded_at < self.ttl_s:
+            return entries
+        with self._lock:
+            if self._entries is None or time.monotonic() - self._loaded_at >= self.ttl_s:
+                loaded: Dict[str, Synonym] = {}
+                # Aufsteigend nach Priorität: bei gleichem alias_norm gewinnt die höchste
+                for row in db.execute(
+                    "SELECT * FROM address_synonyms WHERE active=1 ORDER BY priority ASC"
+                ):
+                    loaded[row["alias_norm"]] = _row_to_synonym(row)
+                self._entries = loaded
+                self._loaded_at = time.monotonic()
+                self.loads += 1
+            return self._entries
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries = None
+
+
+class SynonymHitBuffer:
+    """Zählt Synonym-Treffer im Speicher und schreibt sie gebündelt nach synonym_hits."""
+
+    def __init__(self, db_path: Path, batch_size: int = HITS_BATCH) -> None:
+        self.db_path = db_path
+        self.batch_size = batch_size
+        # (alias_norm, used_at) → Anzahl; used_at sekundengenau wie datetime('now')
+        self._pending: Counter = Counter()
+        self._pending_hits = 0
+        self._lock = threading.Lock()
+        self.flushes = 0
+        self.rows_written = 0
+
+    def record(self, alias_norms: Iterable[str]) -> None:
+        used_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            for an in alias_norms:
+                self._pending[(an, used_at)] += 1
+                self._pending_hits += 1
+            full = self._pending_hits >= self.batch_size
+        if full:
+            self.flush()
+
+    def pending(self) -> int:
+        return self._pending_hits
+
+    def flush(self) -> int:
+        """
+        Schreibt alle gezählten Treffer in einer Transaktion (eigene Verbindung,
+        daher aus jedem Thread aufrufbar).
+
+        Returns:
+            Anzahl geschriebener Zeilen (bei Fehler 0; die Treffer werden wieder eingereiht)
+        """
+        with self._lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, Counter()
+            self._pending_hits = 0
+        rows = [key for key, count in batch.items() for _ in range(count)]
+        try:
+            conn = sqlite3.connect(str(self.db_path), timeout=10)
+            try:
+                with conn:
+                    conn.executemany("INSERT INTO synonym_hits(alias_norm, used_at) VALUES (?, ?)", rows)
+            finally:
+                conn.close()
+        except sqlite3.OperationalError as e:
+            if "no such table" in str(e).lower():
+                return 0  # Hit-Tabelle existiert (noch) nicht → Statistik verwerfen
+            logger.warning(f"[SYNONYM] Hit-Flush fehlgeschlagen ({len(rows)} Treffer): {e}")
+            self._requeue(batch)
+            return 0
+        except Exception as e:
+            logger.warning(f"[SYNONYM] Hit-Flush fehlgeschlagen ({len(rows)} Treffer): {e}")
+            self._requeue(batch)
+            return 0
+        self.flushes += 1
+        self.rows_written += len(rows)
+        return len(rows)
+
+    def _requeue(self, batch: Counter) -> None:
+        with self._lock:
+            self._pending.update(batch)
+            self._pending_hits += sum(batch.values())
+
+
+# Geteilter Zustand pro Datenbank-Datei (alle Store-Instanzen auf dieselbe DB)
+_indexes: Dict[str, _SynonymIndex] = {}
+_hit_buffers: Dict[str, SynonymHitBuffer] = {}
+_shared_lock = threading.Lock()
+
+
+def _shared_for(db_path: Path) -> Tuple[_SynonymIndex, SynonymHitBuffer]:
+    key = str(db_path.resolve())
+    with _shared_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = _SynonymIndex()
+            _hit_buffers[key] = SynonymHitBuffer(db_path)
+        return index, _hit_buffers[key]
+
+
+def flush_synonym_hits() -> int:
+    """Schreibt die gezählten Treffer aller Synonym-Datenbanken; liefert die Zeilenanzahl."""
+    with _shared_lock:
+        buffers = list(_hit_buffers.values())
+    return sum(buffer.flush() for buffer in buffers)
+
+
+atexit.register(flush_synonym_hits)
+
+
+async def run_synonym_hits_flush_loop(interval_seconds: Optional[float] = None) -> None:
+    """Background-Job: schreibt die Synonym-Treffer periodisch (außerhalb des Event-Loops)."""
+    interval = interval_seconds or HITS_FLUSH_INTERVAL_S
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(flush_synonym_hits)
+            except Exception as e:
+                logger.warning(f"[SYNONYM] Hintergrund-Flush fehlgeschlagen: {e}")
+    finally:
+        # Shutdown (Task wird abgebrochen): letzte Treffer noch schreiben
+        flush_synonym_hits()
+
+
+def synonym_fingerprint(db_path: Path | str) -> str:
+    """
+    Günstiger Stand-Stempel der Synonym-Tabelle (Anzahl, aktive, letzte Änderung).
+
+    Ändert sich bei upsert/delete/(De-)Aktivierung – damit lassen sich Ergebnisse,
+    in die Synonyme eingeflossen sind (z.B. geparste Tourenpläne), invalidieren.
+    Leer, wenn Datenbank oder Tabelle (noch) nicht existieren oder keine Synonyme enthalten.
+    """
+    path = Path(db_path)
+    if not path.exists():
+        return ""
+    try:
+        db = sqlite3.connect(str(path))
+        try:
+            row = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(active), 0), COALESCE(MAX(updated_at), '') FROM address_synonyms"
+            ).fetchone()
+        finally:
+            db.close()
+    except sqlite3.Error:
+        return ""
+    return "{}:{}:{}".format(*row) if row[0] else ""
+
+
 class SynonymStore:
     """Persistenter Store für Adress-Synonyme (Alias → Customer/Address/Coordinates)"""
     
@@ -41,6 +248,7 @@ class SynonymStore:
         self.db = sqlite3.connect(str(db_path))
         self.db.row_factory = sqlite3.Row
         self._ensure_schema()
+        self._index, self._hits = _shared_for(self.db_path)
     
     def _ensure_schema(self):
         """Stellt sicher, dass das Schema existiert"""
@@ -68,37 +276,38 @@ class SynonymStore:
         Returns:
             Synonym-Objekt oder None wenn nicht gefunden
         """
-        an = self._norm(alias)
-        row = self.db.execute(
-            "SELECT * FROM address_synonyms WHERE alias_norm=? AND active=1 ORDER BY priority DESC LIMIT 1",
-            (an,)
-        ).fetchone()
-        
-        if not row:
-            return None
-        
-        # Nutzungsstatistik tracken
-        try:
-            self.db.execute("INSERT INTO synonym_hits(alias_norm) VALUES (?)", (an,))
-            self.db.commit()
-        except Exception:
-            # Ignorieren wenn Hit-Tabelle noch nicht existiert
-            pass
+        return self.resolve_many([alias])[alias]
+    
+    def resolve_many(self, aliases: Iterable[str]) -> Dict[str, Optional[Synonym]]:
+        """
+        Löst viele Aliase auf einmal auf (ein Index-Zugriff, Treffer gebündelt gezählt).
         
-        return Synonym(
-            alias=row["alias"],
-            customer_id=row["customer_id"],
-            customer_name=row["customer_name"],
-            street=row["street"],
-            postal_code=row["postal_code"],
-            city=row["city"],
-            country=row["country"] or "DE",
-            lat=row["lat"],
-            lon=row["lon"],
-            priority=row["priority"],
-            active=row["active"],
-            note=row["note"]
-        )
+        Args:
+            aliases: Zu suchende Aliase (Duplikate erlaubt, jeder Treffer zählt)
+            
+        Returns:
+            Dict Alias → Synonym-Objekt (Kopie) oder None
+        """
+        entries = self._index.entries(self.db)
+        resolved: Dict[str, Optional[Synonym]] = {}
+        hits = []
+        norms: Dict[str, str] = {}
+        for alias in aliases:
+            an = norms.get(alias)
+            if an is None:
+                an = norms[alias] = self._norm(alias)
+                syn = entries.get(an)
+                resolved[alias] = replace(syn) if syn is not None else None
+            if resolved[alias] is not None:
+                hits.append(an)
+        if hits:
+            # Nutzungsstatistik: nur im Speicher zählen, Flush gebündelt
+            self._hits.record(hits)
+        return resolved
+    
+    def flush_hits(self) -> int:
+        """Schreibt die gezählten Treffer dieser Datenbank sofort (z.B. am Ende eines Skripts)."""
+        return self._hits.flush()
     
     def upsert(self, s: Synonym) -> None:
         """
@@ -134,6 +343,7 @@ class SynonymStore:
             )
         )
         self.db.commit()
+        self._index.invalidate()
     
     def list_all(self, limit: int = 200, active_only: bool = True) -> list[dict]:
         """
@@ -171,5 +381,6 @@ class SynonymStore:
             "UPDATE address_synonyms SET active=0 WHERE alias_norm=?", (an,)
         )
         self.db.commit()
+        self._index.invalidate()
         return result.rowcount > 0
 
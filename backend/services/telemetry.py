@@ -0,0 +1,274 @@
+"""
+Begrenzte In-Process-Telemetrie: Zähler, Histogramme mit festen Buckets und
+zeitfensterbasierte Ringpuffer.
+
+Alle Metriken haben konstanten Speicherbedarf – unabhängig von Laufzeit und
+Request-Volumen – und O(1)-Updates (Histogramm: O(log Buckets)).
+
+Verwendung:
+    from backend.services.telemetry import get_registry
+    reg = get_registry()
+    reg.counter("workflow.timebox_violation_total").inc()
+    reg.histogram("workflow.route_minutes", MINUTE_BUCKETS).observe(87.5)
+    reg.window("osrm.latency_ms").observe(120.0)
+
+Export: get_registry().snapshot() (GET /api/metrics)
+"""
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Optional, Sequence, Tuple
+
+# Standard-Buckets (Millisekunden) für Latenzen
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (
+    5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000,
+)
+
+# Standard-Buckets (Minuten) für Tourdauern
+MINUTE_BUCKETS: Tuple[float, ...] = (
+    15, 30, 45, 60, 75, 90, 105, 120, 150, 180, 240,
+)
+
+
+class Counter:
+    """Monoton steigender Zähler."""
+
+    __slots__ = ("value", "_lock")
+
+    def __init__(self) -> None:
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, n: int = 1) -> None:
+        with self._lock:
+            self.value += n
+
+    def reset(self) -> None:
+        with self._lock:
+            self.value = 0
+
+    def as_dict(self) -> int:
+        return self.value
+
+
+class LabeledCounter:
+    """
+    Zähler pro Label (z.B. Sektor, Status-Klasse).
+    Die Anzahl der Labels ist begrenzt; weitere Labels landen unter "other".
+    """
+
+    __slots__ = ("max_labels", "values", "_lock")
+
+    def __init__(self, max_labels: int = 32) -> None:
+        self.max_labels = max_labels
+        self.values: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label: str, n: int = 1) -> None:
+        with self._lock:
+            if label not in self.values and len(self.values) >= self.max_labels:
+                label = "other"
+            self.values[label] = self.values.get(label, 0) + n
+
+    def get(self, label: str) -> int:
+        return self.values.get(label, 0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.values.clear()
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(self.values)
+
+
+class Histogram:
+    """Histogramm mit festen Buckets; Quantile werden innerhalb des Buckets interpoliert."""
+
+    __slots__ = ("buckets", "counts", "count", "sum", "max", "_lock")
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS_MS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Schätzt das q-Quantil (0..1)."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for idx, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[idx - 1] if idx > 0 else 0.0
+                upper = self.buckets[idx] if idx < len(self.buckets) else self.max
+                upper = min(upper, self.max)
+                if upper <= lower:
+                    return round(upper, 2)
+                return round(lower + (upper - lower) * (rank - seen) / n, 2)
+            seen += n
+        return round(self.max, 2)
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts = [0] * (len(self.buckets) + 1)
+            self.count = 0
+            self.sum = 0.0
+            self.max = 0.0
+
+    def as_dict(self) -> Dict[str, object]:
+        buckets = {f"le_{b:g}": n for b, n in zip(self.buckets, self.counts)}
+        buckets["le_inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "avg": round(self.mean, 2),
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": round(self.max, 2),
+            "buckets": buckets,
+        }
+
+
+class WindowedRing:
+    """
+    Gleitendes Zeitfenster als Ringpuffer fester Größe.
+
+    Das Fenster (window_s) ist in `slots` Zeitscheiben geteilt; jede Scheibe hält
+    count/sum/min/max. Ein Update schreibt nur die aktuelle Scheibe (veraltete
+    Scheiben werden beim Zugriff über ihre Epoche erkannt und neu begonnen).
+    """
+
+    __slots__ = ("window_s", "slots", "slot_s", "_epochs", "_count", "_sum", "_min", "_max", "_lock", "_clock")
+
+    def __init__(self, window_s: float = 300.0, slots: int = 60, clock=time.monotonic) -> None:
+        self.window_s = float(window_s)
+        self.slots = int(slots)
+        self.slot_s = self.window_s / self.slots
+        self._epochs = [-1] * self.slots
+        self._count = [0] * self.slots
+        self._sum = [0.0] * self.slots
+        self._min = [0.0] * self.slots
+        self._max = [0.0] * self.slots
+        self._lock = threading.Lock()
+        self._clock = clock
+
+    def observe(self, value: float = 1.0) -> None:
+        epoch = int(self._clock() // self.slot_s)
+        idx = epoch % self.slots
+        with self._lock:
+            if self._epochs[idx] != epoch:
+                self._epochs[idx] = epoch
+                self._count[idx] = 0
+                self._sum[idx] = 0.0
+                self._min[idx] = value
+                self._max[idx] = value
+            self._count[idx] += 1
+            self._sum[idx] += value
+            if value < self._min[idx]:
+                self._min[idx] = value
+            if value > self._max[idx]:
+                self._max[idx] = value
+
+    def summary(self) -> Dict[str, float]:
+        """Aggregat über alle Scheiben im aktuellen Fenster."""
+        current = int(self._clock() // self.slot_s)
+        oldest = current - self.slots + 1
+        count, total = 0, 0.0
+        lo: Optional[float] = None
+        hi: Optional[float] = None
+        with self._lock:
+            for idx in range(self.slots):
+                if self._epochs[idx] < oldest or not self._count[idx]:
+                    continue
+                count += self._count[idx]
+                total += self._sum[idx]
+                lo = self._min[idx] if lo is None else min(lo, self._min[idx])
+                hi = self._max[idx] if hi is None else max(hi, self._max[idx])
+        return {
+            "window_s": self.window_s,
+            "count": count,
+            "rate_per_s": round(count / self.window_s, 4),
+            "avg": round(total / count, 2) if count else 0.0,
+            "min": round(lo, 2) if lo is not None else 0.0,
+            "max": round(hi, 2) if hi is not None else 0.0,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._epochs = [-1] * self.slots
+
+    def as_dict(self) -> Dict[str, float]:
+        return self.summary()
+
+
+class MetricsRegistry:
+    """Benannte Metriken eines Prozesses (get-or-create, thread-safe)."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name: str, factory, kind: type):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = self._metrics[name] = factory()
+        if not isinstance(metric, kind):
+            raise TypeError(f"Metrik '{name}' ist bereits als {type(metric).__name__} registriert")
+        return metric
+
+    def counter(self, name: str) -> Counter:
+        return self._get(name, Counter, Counter)
+
+    def labeled(self, name: str, max_labels: int = 32) -> LabeledCounter:
+        return self._get(name, lambda: LabeledCounter(max_labels), LabeledCounter)
+
+    def histogram(self, name: str, buckets: Sequence[float] = LATENCY_BUCKETS_MS) -> Histogram:
+        return self._get(name, lambda: Histogram(buckets), Histogram)
+
+    def window(self, name: str, window_s: float = 300.0, slots: int = 60) -> WindowedRing:
+        return self._get(name, lambda: WindowedRing(window_s, slots), WindowedRing)
+
+    def snapshot(self, prefix: str = "") -> Dict[str, object]:
+        """Alle Metriken (optional gefiltert nach Präfix) als JSON-fähiges Dict."""
+        return {
+            name: metric.as_dict()
+            for name, metric in sorted(self._metrics.items())
+            if name.startswith(prefix)
+        }
+
+    def reset(self, prefix: str = "") -> None:
+        """Setzt Metriken zurück (für Tests), die Registrierung bleibt erhalten."""
+        for name, metric in list(self._metrics.items()):
+            if name.startswith(prefix):
+                metric.reset()
+
+
+_registry: Optional[MetricsRegistry] = None
+
+
+def get_registry() -> MetricsRegistry:
+    """Singleton-Registry für alle Prozess-Metriken."""
+    global _registry
+    if _registry is None:
+        _registry = MetricsRegistry()
+    return _registry
@@ -0,0 +1,133 @@
+"""
+Timebox-Evaluator: Zeitschätzung für Touren aus EINER Dauer-Matrix.
+
+Pro Tour wird einmalig eine Depot+Stopps-Matrix geholt (OSRM Table API,
+Fallback Haversine × 1.3 bei 50 km/h). Zeit ohne Rückfahrt, Rückfahrt und
+Split-Machbarkeit werden danach nur noch im Speicher aus der Matrix berechnet.
+Geometrie (overview=full) wird erst im finalen Route-Details-Schritt geholt.
+"""
+import logging
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from backend.services.routing_optimizer import haversine_distance_km
+
+logger = logging.getLogger(__name__)
+
+# Depot FAMO Dresden
+DEPOT_LAT = 51.0111988
+DEPOT_LON = 13.7016485
+
+SERVICE_TIME_PER_STOP = 2.0  # Minuten
+FALLBACK_SPEED_KMH = 50.0  # Durchschnittsgeschwindigkeit
+FALLBACK_SAFETY_FACTOR = 1.3  # Haversine × 1.3 für Stadtverkehr
+
+# OSRM-Standard für --max-table-size ist 100 Koordinaten
+OSRM_TABLE_MAX_COORDS = int(os.getenv("OSRM_TABLE_MAX_COORDS", "100"))
+
+Coord = Tuple[float, float]
+
+
+def _coord_key(stop: Optional[Dict]) -> Optional[Coord]:
+    """(lat, lon) eines Stopps oder None, wenn keine Koordinaten vorhanden sind."""
+    if not stop or not stop.get('lat') or not stop.get('lon'):
+        return None
+    return (float(stop['lat']), float(stop['lon']))
+
+
+def _fallback_minutes(a: Coord, b: Coord) -> float:
+    """Fahrzeit-Schätzung per Haversine × Sicherheitsfaktor."""
+    distance_km = haversine_distance_km(a[0], a[1], b[0], b[1]) * FALLBACK_SAFETY_FACTOR
+    return (distance_km / FALLBACK_SPEED_KMH) * 60
+
+
+class TimeboxEvaluator:
+    """
+    Dauer-Matrix über Depot + alle Stopps einer Tour.
+
+    Stopps werden über ihre Koordinaten zugeordnet, daher funktionieren auch
+    Teilmengen und Umsortierungen (Split-Kandidaten) ohne neue Requests.
+    """
+
+    def __init__(
+        self,
+        stops: Sequence[Dict],
+        use_osrm: bool = True,
+        client=None,
+        depot: Coord = (DEPOT_LAT, DEPOT_LON),
+    ):
+        """
+        Args:
+            stops: Alle Stopps der Tour (inkl. aller späteren Split-Kandidaten)
+            use_osrm: OSRM Table API verwenden (sonst direkt Haversine)
+            client: OSRM-Client (muss get_distance_matrix() und available bieten)
+            depot: Depot-Koordinaten (lat, lon)
+        """
+        self.depot = depot
+        self._index: Dict[Coord, int] = {depot: 0}
+        coords: List[Coord] = [depot]
+        for stop in stops:
+            key = _coord_key(stop)
+            if key is not None and key not in self._index:
+                self._index[key] = len(coords)
+                coords.append(key)
+        self._coords = coords
+        self._durations: Optional[List[List[float]]] = None
+        self.source = "haversine"
+
+        if use_osrm and client is not None and len(coords) >= 2:
+            self._durations = self._fetch_matrix(client, coords)
+            if self._durations is not None:
+                self.source = "osrm"
+
+    @staticmethod
+    def _fetch_matrix(client, coords: List[Coord]) -> Optional[List[List[float]]]:
+        """Holt die Dauer-Matrix (Minuten) mit einem einzigen Table-Request."""
+        if len(coords) > OSRM_TABLE_MAX_COORDS:
+            logger.info(f"[TIMEBOX] {len(coords)} Koordinaten > {OSRM_TABLE_MAX_COORDS} (Table-Limit), verwende Haversine")
+            return None
+        try:
+            if not client.available:
+                return None
+            table = client.get_distance_matrix(coords)
+        except Exception as e:
+            logger.debug(f"[TIMEBOX] OSRM Table fehlgeschlagen, verwende Haversine: {e}")
+            return None
+        if not table:
+            return None
+
+        n = len(coords)
+        durations = [[0.0] * n for _ in range(n)]
+        for (i, j), cell in table.items():
+            durations[i][j] = float(cell["minutes"])
+        return durations
+
+    def leg_minutes(self, a: Coord, b: Coord) -> float:
+        """Fahrzeit zwischen zwei Koordinaten (Matrix, sonst Haversine)."""
+        if self._durations is not None:
+            i = self._index.get(a)
+            j = self._index.get(b)
+            if i is not None and j is not None:
+                return self._durations[i][j]
+        return _fallback_minutes(a, b)
+
+    def time_without_return(self, stops: Sequence[Dict]) -> float:
+        """Fahrzeit Depot → alle Stopps (OHNE Rückfahrt) + Servicezeiten."""
+        if not stops:
+            return 0.0
+        driving = 0.0
+        prev = self.depot
+        for stop in stops:
+            key = _coord_key(stop)
+            if key is None:
+                continue
+            driving += self.leg_minutes(prev, key)
+            prev = key
+        return driving + len(stops) * SERVICE_TIME_PER_STOP
+
+    def back_to_depot_minutes(self, last_stop: Optional[Dict]) -> float:
+        """Rückfahrt vom letzten Stopp zum Depot."""
+        key = _coord_key(last_stop)
+        if key is None:
+            return 0.0
+        return self.leg_minutes(key, self.depot)
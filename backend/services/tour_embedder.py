@@ -3,7 +3,7 @@ Tour-Embedder: Erstellt Embeddings aus Tour-Metadaten.
 Verwendet OpenAI-Embeddings oder lokales Modell.
 """
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -86,37 +86,14 @@ def create_tour_text(tour_metadata: Dict[str, Any]) -> str:
     return ", ".join(parts)
 
 
-def create_tour_embedding(tour_metadata: Dict[str, Any]) -> Optional[List[float]]:
+# Maximale Anzahl Texte pro Embedding-Request (OpenAI erlaubt bis zu 2048 Inputs)
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+
+
+def _fallback_embedding(tour_metadata: Dict[str, Any]) -> Optional[List[float]]:
     """
-    Erstellt ein Embedding aus Tour-Metadaten.
-    
-    Args:
-        tour_metadata: Dict mit tour_id, datum, stops_count, distance_km, etc.
-    
-    Returns:
-        Embedding-Vektor (Liste von Floats) oder None bei Fehler
+    Einfaches Feature-Vector-Embedding (normalisiert), falls OpenAI nicht verfügbar ist.
     """
-    # Erstelle Text aus Metadaten
-    text = create_tour_text(tour_metadata)
-    
-    # Versuche OpenAI-Embeddings
-    client = get_openai_client()
-    if client is not None:
-        try:
-            response = client.embeddings.create(
-                model="text-embedding-3-small",  # Günstiges Modell
-                input=text
-            )
-            
-            embedding = response.data[0].embedding
-            logger.debug(f"OpenAI-Embedding erstellt für Tour {tour_metadata.get('tour_id')}")
-            return embedding
-            
-        except Exception as e:
-            logger.warning(f"Fehler bei OpenAI-Embedding: {e}, verwende Fallback")
-    
-    # Fallback: Einfaches Feature-Vector (normalisiert)
-    # Konvertiere Metadaten zu numerischem Vektor
     try:
         # Normalisierte Features (für einfache Similarity)
         features = [
@@ -153,6 +130,56 @@ def create_tour_embedding(tour_metadata: Dict[str, Any]) -> Optional[List[float]
         return None
 
 
+def create_tour_embedding(tour_metadata: Dict[str, Any]) -> Optional[List[float]]:
+    """
+    Erstellt ein Embedding aus Tour-Metadaten.
+    
+    Args:
+        tour_metadata: Dict mit tour_id, datum, stops_count, distance_km, etc.
+    
+    Returns:
+        Embedding-Vektor (Liste von Floats) oder None bei Fehler
+    """
+    return create_tour_embeddings([tour_metadata])[0]
+
+
+def create_tour_embeddings(metadata_list: List[Dict[str, Any]]) -> List[Optional[List[float]]]:
+    """
+    Erstellt Embeddings für mehrere Touren (ein OpenAI-Request pro Batch).
+    
+    Args:
+        metadata_list: Liste von Tour-Metadaten
+    
+    Returns:
+        Liste von Embeddings (gleiche Reihenfolge, None bei Fehler)
+    """
+    embeddings: List[Optional[List[float]]] = [None] * len(metadata_list)
+    
+    # Versuche OpenAI-Embeddings (batchweise)
+    client = get_openai_client()
+    if client is not None:
+        for start in range(0, len(metadata_list), EMBEDDING_BATCH_SIZE):
+            batch = metadata_list[start:start + EMBEDDING_BATCH_SIZE]
+            try:
+                response = client.embeddings.create(
+                    model="text-embedding-3-small",  # Günstiges Modell
+                    input=[create_tour_text(m) for m in batch]
+                )
+                # OpenAI liefert index pro Eintrag (Reihenfolge nicht garantiert)
+                for item in response.data:
+                    embeddings[start + item.index] = item.embedding
+                logger.debug(f"OpenAI-Embeddings erstellt für {len(batch)} Touren")
+            except Exception as e:
+                logger.warning(f"Fehler bei OpenAI-Embedding (Batch mit {len(batch)} Touren): {e}, verwende Fallback")
+    
+    # Fallback für alle Touren ohne Embedding
+    for i, tour_metadata in enumerate(metadata_list):
+        if embeddings[i] is None:
+            embeddings[i] = _fallback_embedding(tour_metadata)
+    
+    return embeddings
+
+
 def embed_and_store_tour(
     tour_id: str,
     datum: str,
@@ -195,3 +222,39 @@ def embed_and_store_tour(
     
     return success
 
+
+
+def embed_and_store_tours(metadata_list: List[Dict[str, Any]]) -> Dict[Tuple[str, str], bool]:
+    """
+    Bulk-Variante von embed_and_store_tour: Embeddings batchweise erstellen und
+    in einem Upsert pro Batch und Embedding-Dimension in ChromaDB speichern.
+    Fallback-Embeddings (10 Features) landen damit nie im selben Upsert wie
+    OpenAI-Embeddings und können den Batch nicht mehr komplett scheitern lassen.
+    
+    Args:
+        metadata_list: Liste von Tour-Metadaten (mit tour_id und datum)
+    
+    Returns:
+        Dict (tour_id, datum) -> True wenn gespeichert
+    """
+    from backend.services.vector_db import add_tour_embeddings
+    
+    results: Dict[Tuple[str, str], bool] = {}
+    items_by_dim: Dict[int, List[Dict[str, Any]]] = {}
+    for tour_metadata, embedding in zip(metadata_list, create_tour_embeddings(metadata_list)):
+        key = (str(tour_metadata["tour_id"]), str(tour_metadata["datum"]))
+        if embedding is None:
+            logger.warning(f"Konnte kein Embedding für Tour {key[0]} erstellen")
+            results[key] = False
+            continue
+        tour_metadata["text"] = create_tour_text(tour_metadata)
+        items_by_dim.setdefault(len(embedding), []).append(
+            {"tour_id": key[0], "datum": key[1], "embedding": embedding, "metadata": tour_metadata}
+        )
+    
+    for dim, items in items_by_dim.items():
+        success = add_tour_embeddings(items)
+        for item in items:
+            results[(item["tour_id"], item["datum"])] = success
+        logger.info(f"{len(items)} Tour-Embeddings (dim={dim}) {'gespeichert' if success else 'NICHT gespeichert'}")
+    return results
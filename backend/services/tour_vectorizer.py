@@ -1,249 +1,347 @@
 """
 Tour-Vectorizer: Background-Job für Tour-Vektorisierung.
 Läuft 5 Minuten nach Tour-Erstellung und speichert Embeddings in ChromaDB.
+
+Die Queue ist persistent (Tabelle vectorization_queue, dedupliziert auf
+(tour_id, datum)) und überlebt Neustarts. Fällige Touren werden mit einer
+Query geladen, batchweise eingebettet und gebündelt in die Vektor-DB geschrieben.
+
+Mehrere Worker (uvicorn-Prozesse) teilen sich die Queue: Vor der Verarbeitung
+beansprucht ein Durchlauf seine Zeilen per UPDATE (claimed_by/claimed_at).
+Claims abgestürzter Worker verfallen nach CLAIM_TIMEOUT_MIN.
 """
 import asyncio
+import os
+import uuid
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Sequence
 from sqlalchemy import text
 from db.core import ENGINE
 import logging
-import json
 
-from backend.services.tour_embedder import embed_and_store_tour
+from backend.db.tour_stops import classify_tour, stops_count_expr
+from backend.services.tour_embedder import embed_and_store_tours
 from backend.utils.enhanced_logging import get_enhanced_logger
 
 logger = logging.getLogger(__name__)
 enhanced_logger = get_enhanced_logger(__name__)
 
-# Queue für Touren, die vektorisiert werden sollen
-_vectorization_queue: List[Dict[str, Any]] = []
+# Touren pro Verarbeitungsdurchlauf (eine DB-Query, ein Embedding-Batch, ein Upsert)
+BATCH_SIZE = 256
+
+# Maximale Versuche, bevor ein Queue-Eintrag als 'failed' markiert wird
+MAX_ATTEMPTS = 5
+
+# Nach dieser Zeit gilt ein Claim als verwaist (Worker abgestürzt) und wird neu vergeben
+CLAIM_TIMEOUT_MIN = 15
+
+# Prozess-Kennung für claimed_by (pro Durchlauf um ein Token ergänzt)
+WORKER_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+QUEUE_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS vectorization_queue (
+    tour_id TEXT NOT NULL,
+    datum TEXT NOT NULL,
+    vectorize_at TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',  -- pending|done|failed
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    claimed_by TEXT,
+    claimed_at TEXT,
+    updated_at TEXT DEFAULT (datetime('now')),
+    PRIMARY KEY (tour_id, datum)
+);
+
+CREATE INDEX IF NOT EXISTS idx_vectorization_queue_due ON vectorization_queue(status, vectorize_at);
+"""
+
+_schema_ready = False
+
+
+def _ensure_queue_schema() -> None:
+    """Erstellt die Queue-Tabelle (einmal pro Prozess)."""
+    global _schema_ready
+    if _schema_ready:
+        return
+    with ENGINE.begin() as conn:
+        for stmt in QUEUE_SCHEMA_SQL.split(';'):
+            if stmt.strip():
+                conn.exec_driver_sql(stmt)
+        # Bestehende Tabellen (vor Einführung der Claims) nachrüsten
+        columns = {col[1] for col in conn.exec_driver_sql("PRAGMA table_info(vectorization_queue)").fetchall()}
+        for column in ("claimed_by", "claimed_at"):
+            if column not in columns:
+                conn.exec_driver_sql(f"ALTER TABLE vectorization_queue ADD COLUMN {column} TEXT")
+    _schema_ready = True
+
+
+def _ts(dt: datetime) -> str:
+    """Zeitstempel im sortierbaren Text-Format der Queue-Tabelle."""
+    return dt.strftime("%Y-%m-%d %H:%M:%S")
 
 
 def queue_tour_for_vectorization(tour_id: str, datum: str, delay_minutes: int = 5):
     """
     Fügt eine Tour zur Vektorisierungs-Queue hinzu.
-    
+    Bereits geplante Touren werden nicht doppelt eingetragen, sondern neu terminiert.
+
     Args:
         tour_id: Tour-Identifikator
         datum: Tour-Datum (YYYY-MM-DD)
         delay_minutes: Verzögerung in Minuten (Standard: 5)
     """
-    vectorize_at = datetime.now() + timedelta(minutes=delay_minutes)
-    
-    _vectorization_queue.append({
+    _ensure_queue_schema()
+    vectorize_at = _ts(datetime.now() + timedelta(minutes=delay_minutes))
+
+    with ENGINE.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO vectorization_queue (tour_id, datum, vectorize_at, status, attempts)
+            VALUES (:tour_id, :datum, :vectorize_at, 'pending', 0)
+            ON CONFLICT(tour_id, datum) DO UPDATE SET
+                vectorize_at = excluded.vectorize_at,
+                status = 'pending',
+                attempts = 0,
+                last_error = NULL,
+                claimed_by = NULL,
+                claimed_at = NULL,
+                updated_at = datetime('now')
+        """), {"tour_id": tour_id, "datum": datum, "vectorize_at": vectorize_at})
+
+    logger.info(f"Tour {tour_id} ({datum}) zur Vektorisierung geplant (in {delay_minutes} Min)")
+
+
+def get_queue_stats() -> Dict[str, int]:
+    """Anzahl Queue-Einträge pro Status."""
+    _ensure_queue_schema()
+    with ENGINE.begin() as conn:
+        rows = conn.execute(text(
+            "SELECT status, COUNT(*) FROM vectorization_queue GROUP BY status"
+        )).fetchall()
+    return {status: int(count) for status, count in rows}
+
+
+def _touren_columns(conn) -> set:
+    """Spalten der touren-Tabelle (Schema-Stand variiert)."""
+    return {col[1] for col in conn.execute(text("PRAGMA table_info(touren)")).fetchall()}
+
+
+def _time_column(columns: set, prefix: str = "") -> str:
+    """touren hat je nach Schema-Stand gesamtzeit_min oder nur dauer_min."""
+    if "gesamtzeit_min" in columns:
+        return f"{prefix}gesamtzeit_min"
+    return f"{prefix}dauer_min" if "dauer_min" in columns else "NULL"
+
+
+def _build_tour_metadata(tour_id: str, datum: str, stops_count: Optional[int],
+                         distanz_km, gesamtzeit_min, fahrer: Optional[str] = None) -> Dict[str, Any]:
+    """Bereitet die Metadaten einer Tour-Zeile für das Embedding vor."""
+    tour_type, sector = classify_tour(tour_id)
+    return {
         "tour_id": tour_id,
         "datum": datum,
-        "vectorize_at": vectorize_at,
-        "processed": False
-    })
-    
-    logger.info(f"Tour {tour_id} ({datum}) zur Vektorisierung geplant (in {delay_minutes} Min)")
+        "stops_count": int(stops_count or 0),
+        "distance_km": float(distanz_km) if distanz_km else 0.0,
+        "total_time_min": int(gesamtzeit_min) if gesamtzeit_min else 0,
+        "sector": sector,
+        "tour_type": tour_type,
+        "fahrer": fahrer or ""
+    }
+
 
+def _embed_batch(metadata_list: List[Dict[str, Any]]) -> Dict[tuple, bool]:
+    """Embedding + Bulk-Upsert für einen Batch (blockierend, läuft im Worker-Thread)."""
+    return embed_and_store_tours(metadata_list)
 
-async def process_vectorization_queue():
+
+async def process_vectorization_queue(batch_size: int = BATCH_SIZE) -> int:
     """
     Verarbeitet die Vektorisierungs-Queue.
     Wird periodisch aufgerufen (z.B. alle 30 Sekunden).
+
+    Returns:
+        Anzahl verarbeiteter Queue-Einträge
     """
-    now = datetime.now()
-    to_process = []
-    
-    # Finde Touren, die jetzt vektorisiert werden sollen
-    for item in _vectorization_queue:
-        if not item["processed"] and item["vectorize_at"] <= now:
-            to_process.append(item)
-    
-    # Verarbeite jede Tour
-    for item in to_process:
+    _ensure_queue_schema()
+    now_dt = datetime.now()
+    now = _ts(now_dt)
+    claim = {
+        "worker": f"{WORKER_ID}:{uuid.uuid4().hex[:8]}",
+        "now": now,
+        "stale": _ts(now_dt - timedelta(minutes=CLAIM_TIMEOUT_MIN)),
+        "limit": batch_size,
+    }
+
+    # Fällige Einträge beanspruchen (atomar, andere Worker überspringen sie)
+    with ENGINE.begin() as conn:
+        claimed = conn.execute(text("""
+            UPDATE vectorization_queue SET claimed_by = :worker, claimed_at = :now
+            WHERE rowid IN (
+                SELECT rowid FROM vectorization_queue
+                WHERE status = 'pending' AND vectorize_at <= :now
+                  AND (claimed_by IS NULL OR claimed_at < :stale)
+                ORDER BY vectorize_at
+                LIMIT :limit
+            )
+            AND (claimed_by IS NULL OR claimed_at < :stale)
+        """), claim).rowcount
+
+    if not claimed:
+        return 0
+
+    # Beanspruchte Touren in einer Query laden
+    with ENGINE.begin() as conn:
+        columns = _touren_columns(conn)
+        time_column = _time_column(columns, prefix="t.")
+        rows = conn.execute(text(f"""
+            SELECT
+                q.tour_id,
+                q.datum,
+                q.attempts,
+                t.tour_id IS NOT NULL AS found,
+                {stops_count_expr(columns, prefix="t.")} AS stops_count,
+                t.distanz_km,
+                {time_column} AS gesamtzeit_min,
+                t.fahrer
+            FROM vectorization_queue q
+            LEFT JOIN touren t ON t.tour_id = q.tour_id AND t.datum = q.datum
+            WHERE q.claimed_by = :worker AND q.status = 'pending'
+            ORDER BY q.vectorize_at
+        """), {"worker": claim["worker"]}).fetchall()
+
+    if not rows:
+        return 0
+
+    missing = []
+    metadata_list = []
+    attempts_by_key = {}
+    for tour_id, datum, attempts, found, stops_count, distanz_km, gesamtzeit_min, fahrer in rows:
+        if not found:
+            logger.warning(f"Tour {tour_id} ({datum}) nicht in DB gefunden - überspringe Vektorisierung")
+            missing.append({"tour_id": tour_id, "datum": datum, "worker": claim["worker"]})
+            continue
+        attempts_by_key[(tour_id, datum)] = attempts
+        metadata_list.append(_build_tour_metadata(tour_id, datum, stops_count, distanz_km, gesamtzeit_min, fahrer))
+
+    results: Dict[tuple, bool] = {}
+    error_text = None
+    if metadata_list:
         try:
-            tour_id = item["tour_id"]
-            datum = item["datum"]
-            
-            # Lade Tour-Daten aus DB
-            with ENGINE.begin() as conn:
-                tour_row = conn.execute(text("""
-                    SELECT 
-                        tour_id,
-                        datum,
-                        kunden_ids,
-                        distanz_km,
-                        gesamtzeit_min,
-                        fahrer
-                    FROM touren
-                    WHERE tour_id = :tour_id AND datum = :datum
-                """), {
-                    "tour_id": tour_id,
-                    "datum": datum
-                }).fetchone()
-                
-                if not tour_row:
-                    logger.warning(f"Tour {tour_id} ({datum}) nicht in DB gefunden - überspringe Vektorisierung")
-                    item["processed"] = True
-                    continue
-                
-                # Bereite Metadaten vor
-                tour_id_db, datum_db, kunden_ids, distanz_km, gesamtzeit_min, fahrer = tour_row
-                
-                # Berechne Anzahl Stops aus kunden_ids
-                stops_count = 0
-                if kunden_ids:
-                    try:
-                        ids = json.loads(kunden_ids)
-                        if isinstance(ids, list):
-                            stops_count = len(ids)
-                    except (json.JSONDecodeError, TypeError):
-                        stops_count = kunden_ids.count(',') + 1 if kunden_ids else 0
-                
-                # Extrahiere Sektor aus tour_id (falls vorhanden)
-                sector = ""
-                if "Nord" in tour_id or "N-" in tour_id:
-                    sector = "N"
-                elif "Ost" in tour_id or "O-" in tour_id:
-                    sector = "O"
-                elif "Süd" in tour_id or "S-" in tour_id:
-                    sector = "S"
-                elif "West" in tour_id or "W-" in tour_id:
-                    sector = "W"
-                
-                # Extrahiere Tour-Typ
-                tour_type = ""
-                if tour_id.startswith("W-") or "W-" in tour_id:
-                    tour_type = "W"
-                elif "PIR" in tour_id.upper():
-                    tour_type = "PIR"
-                elif tour_id.startswith("T-") or "T-" in tour_id:
-                    tour_type = "T"
-                
-                tour_metadata = {
-                    "tour_id": tour_id_db,
-                    "datum": datum_db,
-                    "stops_count": stops_count,
-                    "distance_km": float(distanz_km) if distanz_km else 0.0,
-                    "total_time_min": int(gesamtzeit_min) if gesamtzeit_min else 0,
-                    "sector": sector,
-                    "tour_type": tour_type,
-                    "fahrer": fahrer or ""
-                }
-                
-                # Erstelle Embedding und speichere
-                success = embed_and_store_tour(
-                    tour_id=tour_id_db,
-                    datum=datum_db,
-                    tour_metadata=tour_metadata
-                )
-                
-                if success:
-                    enhanced_logger.success(f"Tour vektorisiert: {tour_id_db} ({datum_db})")
-                else:
-                    enhanced_logger.warning(f"Tour-Vektorisierung fehlgeschlagen: {tour_id_db} ({datum_db})")
-                
-                item["processed"] = True
-                
+            results = await asyncio.to_thread(_embed_batch, metadata_list)
         except Exception as e:
-            logger.error(f"Fehler bei Vektorisierung von Tour {item.get('tour_id')}: {e}", exc_info=True)
-            item["processed"] = True
-    
-    # Entferne verarbeitete Items (älter als 1 Stunde)
-    cutoff_time = datetime.now() - timedelta(hours=1)
-    _vectorization_queue[:] = [
-        item for item in _vectorization_queue
-        if not item["processed"] or item["vectorize_at"] > cutoff_time
-    ]
-
-
-async def vectorize_existing_tours(days: int = 7):
+            logger.error(f"Fehler bei Batch-Vektorisierung ({len(metadata_list)} Touren): {e}", exc_info=True)
+            error_text = str(e)[:500]
+
+    done = list(missing)
+    retry = []
+    failed = []
+    retry_at = _ts(datetime.now() + timedelta(minutes=5))
+    for key, attempts in attempts_by_key.items():
+        params = {"tour_id": key[0], "datum": key[1], "worker": claim["worker"]}
+        if results.get(key):
+            done.append(params)
+        elif attempts + 1 >= MAX_ATTEMPTS:
+            failed.append({**params, "error": error_text or "embedding/upsert fehlgeschlagen"})
+        else:
+            retry.append({**params, "vectorize_at": retry_at, "error": error_text or "embedding/upsert fehlgeschlagen"})
+
+    # Status in einer Transaktion zurückschreiben und Claims freigeben
+    # (neu eingereihte Touren haben keinen Claim mehr und bleiben pending)
+    with ENGINE.begin() as conn:
+        if done:
+            conn.execute(text("""
+                UPDATE vectorization_queue
+                SET status = 'done', claimed_by = NULL, claimed_at = NULL, updated_at = datetime('now')
+                WHERE tour_id = :tour_id AND datum = :datum AND claimed_by = :worker
+            """), done)
+        if retry:
+            conn.execute(text("""
+                UPDATE vectorization_queue
+                SET attempts = attempts + 1, vectorize_at = :vectorize_at, last_error = :error,
+                    claimed_by = NULL, claimed_at = NULL, updated_at = datetime('now')
+                WHERE tour_id = :tour_id AND datum = :datum AND claimed_by = :worker
+            """), retry)
+        if failed:
+            conn.execute(text("""
+                UPDATE vectorization_queue
+                SET status = 'failed', attempts = attempts + 1, last_error = :error,
+                    claimed_by = NULL, claimed_at = NULL, updated_at = datetime('now')
+                WHERE tour_id = :tour_id AND datum = :datum AND claimed_by = :worker
+            """), failed)
+        # Erledigte Einträge nach einem Tag entfernen
+        conn.execute(text("""
+            DELETE FROM vectorization_queue
+            WHERE status = 'done' AND updated_at < datetime('now', '-1 day')
+        """))
+
+    stored = len(done) - len(missing)
+    if stored:
+        enhanced_logger.success(f"{stored} Touren vektorisiert")
+    if retry or failed:
+        enhanced_logger.warning(f"Tour-Vektorisierung fehlgeschlagen: {len(retry)} erneut geplant, {len(failed)} aufgegeben")
+
+    return len(rows)
+
+
+async def vectorize_existing_tours(days: int = 7, batch_size: int = BATCH_SIZE):
     """
     Vektorisiert bestehende Touren aus der letzten Woche.
     Nützlich für initiale Befüllung der Vektordatenbank.
-    
+
     Args:
         days: Anzahl der Tage zurück (Standard: 7)
+        batch_size: Touren pro Embedding-Request/Upsert
     """
     try:
         cutoff_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
-        
+
         with ENGINE.begin() as conn:
-            tours = conn.execute(text("""
-                SELECT 
+            columns = _touren_columns(conn)
+            time_column = _time_column(columns)
+            tours = conn.execute(text(f"""
+                SELECT
                     tour_id,
                     datum,
-                    kunden_ids,
+                    {stops_count_expr(columns)} AS stops_count,
                     distanz_km,
-                    gesamtzeit_min
+                    {time_column} AS gesamtzeit_min
                 FROM touren
                 WHERE datum >= :cutoff_date
-                AND (distanz_km IS NOT NULL OR gesamtzeit_min IS NOT NULL)
+                AND (distanz_km IS NOT NULL OR {time_column} IS NOT NULL)
                 ORDER BY datum DESC, tour_id
             """), {"cutoff_date": cutoff_date}).fetchall()
-            
-            enhanced_logger.info(f"Vektorisierung von {len(tours)} bestehenden Touren gestartet...")
-            
-            for tour_row in tours:
-                tour_id, datum, kunden_ids, distanz_km, gesamtzeit_min = tour_row
-                
-                # Bereite Metadaten vor (analog zu process_vectorization_queue)
-                stops_count = 0
-                if kunden_ids:
-                    try:
-                        ids = json.loads(kunden_ids)
-                        if isinstance(ids, list):
-                            stops_count = len(ids)
-                    except (json.JSONDecodeError, TypeError):
-                        stops_count = kunden_ids.count(',') + 1 if kunden_ids else 0
-                
-                sector = ""
-                if "Nord" in tour_id or "N-" in tour_id:
-                    sector = "N"
-                elif "Ost" in tour_id or "O-" in tour_id:
-                    sector = "O"
-                elif "Süd" in tour_id or "S-" in tour_id:
-                    sector = "S"
-                elif "West" in tour_id or "W-" in tour_id:
-                    sector = "W"
-                
-                tour_type = ""
-                if tour_id.startswith("W-") or "W-" in tour_id:
-                    tour_type = "W"
-                elif "PIR" in tour_id.upper():
-                    tour_type = "PIR"
-                elif tour_id.startswith("T-") or "T-" in tour_id:
-                    tour_type = "T"
-                
-                tour_metadata = {
-                    "tour_id": tour_id,
-                    "datum": datum,
-                    "stops_count": stops_count,
-                    "distance_km": float(distanz_km) if distanz_km else 0.0,
-                    "total_time_min": int(gesamtzeit_min) if gesamtzeit_min else 0,
-                    "sector": sector,
-                    "tour_type": tour_type
-                }
-                
-                embed_and_store_tour(tour_id, datum, tour_metadata)
-                
-                # Kleine Verzögerung um DB nicht zu überlasten
-                await asyncio.sleep(0.1)
-            
-            enhanced_logger.success(f"Vektorisierung abgeschlossen: {len(tours)} Touren verarbeitet")
-            
+
+        enhanced_logger.info(f"Vektorisierung von {len(tours)} bestehenden Touren gestartet...")
+
+        stored = 0
+        for start in range(0, len(tours), batch_size):
+            batch: Sequence = tours[start:start + batch_size]
+            metadata_list = [
+                _build_tour_metadata(tour_id, datum, stops_count, distanz_km, gesamtzeit_min)
+                for tour_id, datum, stops_count, distanz_km, gesamtzeit_min in batch
+            ]
+            results = await asyncio.to_thread(_embed_batch, metadata_list)
+            stored += sum(1 for ok in results.values() if ok)
+
+        enhanced_logger.success(f"Vektorisierung abgeschlossen: {stored}/{len(tours)} Touren gespeichert")
+
     except Exception as e:
-        enhanced_logger.error(f"Fehler bei Vektorisierung bestehender Touren: {e}", exc_info=True)
+        enhanced_logger.error("Fehler bei Vektorisierung bestehender Touren", error=e)
 
 
 async def run_vectorizer_loop(interval_seconds: int = 30):
     """
     Läuft als Hintergrund-Loop und verarbeitet die Vektorisierungs-Queue periodisch.
-    
+
     Args:
         interval_seconds: Intervall in Sekunden zwischen Verarbeitungen (Standard: 30)
     """
     while True:
         try:
-            await process_vectorization_queue()
+            # Volle Batches direkt nacheinander abarbeiten (Backlog nach Neustart)
+            while await process_vectorization_queue() >= BATCH_SIZE:
+                pass
         except Exception as e:
             logger.error(f"Fehler im Vectorizer-Loop: {e}", exc_info=True)
-        
+
         # Warte bis zur nächsten Ausführung
         await asyncio.sleep(interval_seconds)
-
@@ -0,0 +1,275 @@
+"""
+Cache-first Prüfung "löst diese Adress-Variante auf?" (StreetNameValidator).
+
+Statt pro Variante live zu geocoden, wird für alle Adressen eines Laufs
+gebündelt nachgeschlagen:
+
+1. Prüf-Cache `address_variant_checks` (frühere Live-Ergebnisse, mit TTL)
+2. geo_cache / geo_alias / Fail-Cache / Manual-Queue (resolve_batch, ein Roundtrip)
+3. Legacy-`geocache` (dort speichert geocode_address seine Treffer)
+4. Synonym-Tabelle (Aliase mit Koordinaten)
+
+Nur der Rest geht live über geocode_address: parallel (Semaphore), per
+Token-Bucket gedrosselt und optional auf ein Budget pro Lauf begrenzt. Die
+Ergebnisse landen im Prüf-Cache; negative Ergebnisse laufen nach
+VARIANT_NEGATIVE_TTL_H ab, damit sie beim nächsten (nächtlichen) Lauf erneut
+geprüft werden.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from backend.utils.rate_limit import TokenBucket
+from db.connections import connection
+
+logger = logging.getLogger(__name__)
+
+LIVE_CONCURRENCY = int(os.getenv("VARIANT_LIVE_CONCURRENCY", "4"))
+LIVE_RPS = float(os.getenv("VARIANT_LIVE_RPS", "5"))
+LIVE_LIMIT = int(os.getenv("VARIANT_LIVE_LIMIT", "0"))  # 0 = kein Budget
+POSITIVE_TTL_H = float(os.getenv("VARIANT_CHECK_TTL_H", "720"))
+NEGATIVE_TTL_H = float(os.getenv("VARIANT_NEGATIVE_TTL_H", "20"))
+
+_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS address_variant_checks (
+    address TEXT PRIMARY KEY,
+    resolves INTEGER NOT NULL,
+    source TEXT,
+    lat REAL,
+    lon REAL,
+    checked_at REAL NOT NULL
+)
+"""
+
+# Quellen, deren Ergebnis ohne Live-Abfrage feststeht
+OFFLINE_SOURCES = ("check_cache", "geo_cache", "alias", "geocache", "synonym", "fail_cache", "manual")
+
+
+@dataclass
+class VariantCheck:
+    """Ergebnis einer Varianten-Prüfung."""
+    address: str
+    resolves: bool
+    source: str  # OFFLINE_SOURCES, "live", "live_error" oder "unchecked"
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+
+
+def _default_db_path() -> Path:
+    from backend.db.config import get_database_path
+    return get_database_path()
+
+
+def _default_geocoder(address: str):
+    from backend.services.geocode import geocode_address
+    return geocode_address(address)
+
+
+async def _acquire(bucket: TokenBucket) -> None:
+    """Wartet, bis der Token-Bucket eine Anfrage erlaubt."""
+    while not bucket.allow():
+        await asyncio.sleep(max(bucket.wait_time(), 0.01))
+
+
+class VariantResolver:
+    """Beantwortet "löst diese Adresse auf?" für viele Adressen auf einmal."""
+
+    def __init__(
+        self,
+        db_path: Union[str, Path, None] = None,
+        geocoder: Optional[Callable[[str], Optional[dict]]] = None,
+        concurrency: int = LIVE_CONCURRENCY,
+        rate_per_sec: float = LIVE_RPS,
+    ):
+        self.db_path = Path(db_path) if db_path is not None else _default_db_path()
+        self.geocoder = geocoder or _default_geocoder
+        self.concurrency = max(1, concurrency)
+        self.rate_per_sec = rate_per_sec
+        self._schema_ready = False
+
+    # ------------------------------------------------------------------ Prüf-Cache
+
+    def _ensure_schema(self) -> None:
+        if self._schema_ready:
+            return
+        with connection(self.db_path) as conn:
+            conn.execute(_SCHEMA)
+        self._schema_ready = True
+
+    def _cached(self, addresses: List[str]) -> Dict[str, VariantCheck]:
+        self._ensure_schema()
+        now = time.time()
+        out: Dict[str, VariantCheck] = {}
+        with connection(self.db_path) as conn:
+            for i in range(0, len(addresses), _CHUNK):
+                chunk = addresses[i:i + _CHUNK]
+                rows = conn.execute(
+                    "SELECT address, resolves, lat, lon, checked_at FROM address_variant_checks "
+                    f"WHERE address IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for address, resolves, lat, lon, checked_at in rows:
+                    ttl_h = POSITIVE_TTL_H if resolves else NEGATIVE_TTL_H
+                    if now - checked_at < ttl_h * 3600:
+                        out[address] = VariantCheck(address, bool(resolves), "check_cache", lat, lon)
+        return out
+
+    def _store(self, checks: Iterable[VariantCheck]) -> None:
+        rows = [(c.address, int(c.resolves), c.source, c.lat, c.lon, time.time())
+                for c in checks if c.source == "live"]
+        if not rows:
+            return
+        self._ensure_schema()
+        with connection(self.db_path) as conn:
+            conn.executemany(
+                "INSERT INTO address_variant_checks(address, resolves, source, lat, lon, checked_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(address) DO UPDATE SET "
+                "resolves=excluded.resolves, source=excluded.source, lat=excluded.lat, "
+                "lon=excluded.lon, checked_at=excluded.checked_at",
+                rows,
+            )
+
+    # ------------------------------------------------------------------ Offline-Quellen
+
+    def _from_geo_tables(self, addresses: List[str]) -> Dict[str, VariantCheck]:
+        """geo_cache, geo_alias, Fail-Cache und Manual-Queue in einem Roundtrip."""
+        from common.normalize import normalize_address
+        from repositories.geo_batch_repo import resolve_batch
+
+        keys = {a: normalize_address(a) for a in addresses}
+        facts = resolve_batch(keys.values())
+        out: Dict[str, VariantCheck] = {}
+        for address, key in keys.items():
+            f = facts.get(key)
+            if f is None:
+                continue
+            if f.resolved:
+                geo = f.resolved
+                out[address] = VariantCheck(address, True, "geo_cache" if f.geo else "alias", geo["lat"], geo["lon"])
+            elif f.fail:
+                out[address] = VariantCheck(address, False, "fail_cache")
+            elif f.manual_open:
+                out[address] = VariantCheck(address, False, "manual")
+        return out
+
+    def _from_geocache(self, addresses: List[str]) -> Dict[str, VariantCheck]:
+        from backend.db.dao import geocache_get_many
+
+        return {
+            address: VariantCheck(address, True, "geocache", lat, lon)
+            for address, (lat, lon, _provider) in geocache_get_many(addresses).items()
+        }
+
+    def _from_synonyms(self, addresses: List[str]) -> Dict[str, VariantCheck]:
+        from backend.services.synonyms import SynonymStore
+
+        out: Dict[str, VariantCheck] = {}
+        for address, syn in SynonymStore(self.db_path).resolve_many(addresses).items():
+            if syn is not None and syn.lat is not None and syn.lon is not None:
+                out[address] = VariantCheck(address, True, "synonym", syn.lat, syn.lon)
+        return out
+
+    def resolve_offline(self, addresses: Iterable[str]) -> Dict[str, VariantCheck]:
+        """Alle Adressen, die sich ohne Live-Abfrage beantworten lassen."""
+        pending = list(dict.fromkeys(a for a in addresses if a))
+        found: Dict[str, VariantCheck] = {}
+        stages = (
+            ("check_cache", self._cached),
+            ("geo_tables", self._from_geo_tables),
+            ("geocache", self._from_geocache),
+            ("synonyms", self._from_synonyms),
+        )
+        for name, stage in stages:
+            if not pending:
+                break
+            try:
+                hits = stage(pending)
+            except Exception as e:
+                logger.warning(f"[VARIANT-CHECK] Quelle {name} übersprungen: {e}")
+                continue
+            found.update(hits)
+            pending = [a for a in pending if a not in hits]
+        return found
+
+    # ------------------------------------------------------------------ Live-Prüfung
+
+    async def _check_live(self, addresses: List[str]) -> Dict[str, VariantCheck]:
+        """Live-Geocoding parallel (Semaphore) und per Token-Bucket gedrosselt."""
+        sem = asyncio.Semaphore(self.concurrency)
+        bucket = TokenBucket(rate_per_sec=self.rate_per_sec, burst=self.concurrency)
+
+        async def one(address: str) -> VariantCheck:
+            async with sem:
+                await _acquire(bucket)
+                try:
+                    result = await asyncio.to_thread(self.geocoder, address)
+                except Exception as e:
+                    logger.warning(f"[VARIANT-CHECK] Live-Geocoding fehlgeschlagen für '{address}': {e}")
+                    return VariantCheck(address, False, "live_error")
+            if result:
+                return VariantCheck(address, True, "live", result.get("lat"), result.get("lon"))
+            return VariantCheck(address, False, "live")
+
+        checks = await asyncio.gather(*(one(a) for a in addresses))
+        return {c.address: c for c in checks}
+
+    async def check_many_async(
+        self, addresses: Iterable[str], live: bool = True, live_limit: Optional[int] = None
+    ) -> Dict[str, VariantCheck]:
+        """
+        Prüft alle Adressen: erst offline, dann (optional) live für den Rest.
+
+        Args:
+            addresses: Adressen/Varianten (Duplikate werden einmal geprüft)
+            live: False = nur Offline-Quellen; der Rest bleibt "unchecked"
+            live_limit: Höchstzahl Live-Abfragen in diesem Lauf (None = VARIANT_LIVE_LIMIT, 0 = unbegrenzt)
+
+        Returns:
+            Dict mapping: Adresse -> VariantCheck (für jede nicht-leere Adresse)
+        """
+        unique = list(dict.fromkeys(a for a in addresses if a))
+        # Offline-Quellen sind synchrones SQLite – nicht im Event-Loop blockieren
+        results = await asyncio.to_thread(self.resolve_offline, unique)
+        pending = [a for a in unique if a not in results]
+
+        limit = LIVE_LIMIT if live_limit is None else live_limit
+        to_check = (pending[:limit] if limit else pending) if live else []
+        if to_check:
+            live_results = await self._check_live(to_check)
+            try:
+                await asyncio.to_thread(self._store, live_results.values())
+            except Exception as e:
+                logger.warning(f"[VARIANT-CHECK] Prüf-Cache konnte nicht geschrieben werden: {e}")
+            results.update(live_results)
+
+        for address in pending:
+            if address not in results:
+                results[address] = VariantCheck(address, False, "unchecked")
+
+        live_count = sum(1 for c in results.values() if c.source in ("live", "live_error"))
+        logger.info(
+            f"[VARIANT-CHECK] {len(unique)} Adressen: {len(unique) - len(pending)} offline, "
+            f"{live_count} live, {len(pending) - live_count} ungeprüft"
+        )
+        return results
+
+    def check_many(
+        self, addresses: Iterable[str], live: bool = True, live_limit: Optional[int] = None
+    ) -> Dict[str, VariantCheck]:
+        """Synchrone Variante von check_many_async (auch aus laufendem Event-Loop aufrufbar)."""
+        coro = self.check_many_async(addresses, live=live, live_limit=live_limit)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(asyncio.run, coro).result()
@@ -74,10 +74,17 @@ def get_tours_collection():
     try:
         # Collection erstellen oder abrufen
         collection_name = "tours"
+        # Cosine-Space: Distanzen auf derselben Skala (1 - cos) wie der lokale Vektor-Index
         _chroma_collection = client.get_or_create_collection(
             name=collection_name,
-            metadata={"description": "Tour-Embeddings für KI-Learning"}
+            metadata={"description": "Tour-Embeddings für KI-Learning", "hnsw:space": "cosine"}
         )
+        space = (_chroma_collection.metadata or {}).get("hnsw:space", "l2")
+        if space != "cosine":
+            logger.warning(
+                f"ChromaDB-Collection '{collection_name}' nutzt Distanz '{space}' statt 'cosine' - "
+                "Distanzen weichen vom lokalen Index ab (Collection neu anlegen)"
+            )
         
         logger.info(f"ChromaDB-Collection '{collection_name}' bereit")
         return _chroma_collection
@@ -87,6 +94,19 @@ def get_tours_collection():
         return None
 
 
+def _clean_metadata(tour_id: str, datum: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Metadaten für ChromaDB vorbereiten (nur skalare Werte, keine Listen)."""
+    return {
+        "tour_id": str(tour_id),
+        "datum": str(datum),
+        "stops_count": int(metadata.get("stops_count", 0)),
+        "distance_km": float(metadata.get("distance_km", 0.0)),
+        "total_time_min": int(metadata.get("total_time_min", 0)),
+        "sector": str(metadata.get("sector", "")) if metadata.get("sector") else "",
+        "tour_type": str(metadata.get("tour_type", "")) if metadata.get("tour_type") else "",
+    }
+
+
 def add_tour_embedding(
     tour_id: str,
     datum: str,
@@ -105,42 +125,62 @@ def add_tour_embedding(
     Returns:
         True wenn erfolgreich, False bei Fehler
     """
+    return add_tour_embeddings([{
+        "tour_id": tour_id,
+        "datum": datum,
+        "embedding": embedding,
+        "metadata": metadata,
+    }])
+
+
+def add_tour_embeddings(items: List[Dict[str, Any]]) -> bool:
+    """
+    Fügt mehrere Tour-Embeddings in einem Upsert zur ChromaDB hinzu.
+    
+    Args:
+        items: Liste von Dicts mit tour_id, datum, embedding, metadata
+    
+    Returns:
+        True wenn erfolgreich, False bei Fehler
+    """
+    if not items:
+        return True
+    
+    # Eindeutige ID: tour_id + datum
+    ids = [f"{item['tour_id']}_{item['datum']}" for item in items]
+    metadatas = [_clean_metadata(item["tour_id"], item["datum"], item["metadata"]) for item in items]
+    
+    # Lokaler Index wird immer mitgeschrieben (Offline-Fallback für die Suche)
+    local_ok = _local_upsert(ids, [item["embedding"] for item in items], metadatas)
+    
     collection = get_tours_collection()
     if collection is None:
-        logger.warning("ChromaDB-Collection nicht verfügbar - Embedding nicht gespeichert")
-        return False
+        if local_ok:
+            logger.debug("ChromaDB-Collection nicht verfügbar - Embeddings nur im lokalen Index")
+        else:
+            logger.warning("ChromaDB-Collection nicht verfügbar - Embedding nicht gespeichert")
+        return local_ok
     
     try:
-        # Eindeutige ID: tour_id + datum
-        doc_id = f"{tour_id}_{datum}"
-        
         # Text für Embedding (wird für Similarity-Search verwendet)
-        text = metadata.get("text", f"Tour {tour_id} am {datum}")
-        
-        # Metadaten vorbereiten (nur skalare Werte, keine Listen)
-        clean_metadata = {
-            "tour_id": str(tour_id),
-            "datum": str(datum),
-            "stops_count": int(metadata.get("stops_count", 0)),
-            "distance_km": float(metadata.get("distance_km", 0.0)),
-            "total_time_min": int(metadata.get("total_time_min", 0)),
-            "sector": str(metadata.get("sector", "")) if metadata.get("sector") else "",
-            "tour_type": str(metadata.get("tour_type", "")) if metadata.get("tour_type") else "",
-        }
+        documents = [
+            item["metadata"].get("text", f"Tour {item['tour_id']} am {item['datum']}")
+            for item in items
+        ]
         
-        # Embedding hinzufügen (upsert: aktualisiert falls bereits vorhanden)
+        # Embeddings hinzufügen (upsert: aktualisiert falls bereits vorhanden)
         collection.upsert(
-            ids=[doc_id],
-            embeddings=[embedding],
-            documents=[text],
-            metadatas=[clean_metadata]
+            ids=ids,
+            embeddings=[item["embedding"] for item in items],
+            documents=documents,
+            metadatas=metadatas
         )
         
-        logger.debug(f"Tour-Embedding gespeichert: {doc_id}")
+        logger.debug(f"{len(ids)} Tour-Embeddings gespeichert")
         return True
         
     except Exception as e:
-        logger.error(f"Fehler beim Speichern des Tour-Embeddings: {e}", exc_info=True)
+        logger.error(f"Fehler beim Speichern der Tour-Embeddings: {e}", exc_info=True)
         return False
 
 
@@ -158,12 +198,12 @@ def search_similar_tours(
         filter_metadata: Optional: Filter-Metadaten (z.B. {"tour_type": "W"})
     
     Returns:
-        Liste von ähnlichen Touren mit Metadaten
+        Liste von ähnlichen Touren mit Metadaten ("distance" = Cosine-Distanz 1 - cos)
     """
     collection = get_tours_collection()
     if collection is None:
-        logger.warning("ChromaDB-Collection nicht verfügbar - Suche nicht möglich")
-        return []
+        logger.debug("ChromaDB-Collection nicht verfügbar - verwende lokalen Vektor-Index")
+        return _local_search(query_embedding, n_results, filter_metadata)
     
     try:
         # ChromaDB where-Filter vorbereiten
@@ -194,8 +234,42 @@ def search_similar_tours(
         return similar_tours
         
     except Exception as e:
-        logger.error(f"Fehler bei der Similarity-Suche: {e}", exc_info=True)
+        logger.error(f"Fehler bei der Similarity-Suche: {e}, verwende lokalen Vektor-Index", exc_info=True)
+        return _local_search(query_embedding, n_results, filter_metadata)
+
+
+def _local_upsert(ids: List[str], embeddings: List[List[float]], metadatas: List[Dict[str, Any]]) -> bool:
+    """Schreibt Embeddings in den lokalen Vektor-Index (Fehler werden nur geloggt)."""
+    try:
+        from backend.services.local_vector_index import get_local_vector_store
+        get_local_vector_store().upsert(ids, embeddings, metadatas)
+        return True
+    except Exception as e:
+        logger.warning(f"Lokaler Vektor-Index konnte nicht geschrieben werden: {e}")
+        return False
+
+
+def _local_search(
+    query_embedding: List[float],
+    n_results: int,
+    filter_metadata: Optional[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Similarity-Suche im lokalen Vektor-Index (gleiches Ergebnisformat wie ChromaDB)."""
+    try:
+        from backend.services.local_vector_index import get_local_vector_store
+        hits = get_local_vector_store().search(query_embedding, k=n_results, where=filter_metadata)
+    except Exception as e:
+        logger.error(f"Fehler bei der lokalen Similarity-Suche: {e}", exc_info=True)
         return []
+    return [
+        {
+            "tour_id": metadata.get("tour_id", ""),
+            "datum": metadata.get("datum", ""),
+            "distance": distance,
+            "metadata": metadata
+        }
+        for _doc_id, distance, metadata in hits
+    ]
 
 
 def get_collection_stats() -> Dict[str, Any]:
@@ -207,9 +281,15 @@ def get_collection_stats() -> Dict[str, Any]:
     """
     collection = get_tours_collection()
     if collection is None:
+        try:
+            from backend.services.local_vector_index import get_local_vector_store
+            local_count = get_local_vector_store().count()
+        except Exception:
+            local_count = 0
         return {
             "available": False,
             "count": 0,
+            "local_index_count": local_count,
             "error": "ChromaDB nicht verfügbar"
         }
     
@@ -10,7 +10,8 @@ from pathlib import Path
 from io import BytesIO
 import tempfile
 
-from backend.parsers import parse_tour_plan, parse_tour_plan_to_dict, TourPlan, TourInfo
+from backend.parsers import TourPlan, TourInfo
+from backend.parsers.tour_plan_parser import cached_tour_plan, parse_tour_plan_cached, tour_plan_to_dict
 
 from .file_parser import FileParserService
 from .ai_optimizer import AIOptimizer, Stop
@@ -103,19 +104,20 @@ class WorkflowOrchestrator:
 
     def _parse_input_to_plan(self, file_input: Union[str, Path, BytesIO], filename: Optional[str]) -> tuple[TourPlan, Dict[str, Any]]:
         if isinstance(file_input, BytesIO):
-            with tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix='.csv') as tmp:
-                file_input.seek(0)
-                tmp.write(file_input.read())
-                tmp_path = Path(tmp.name)
-            try:
-                plan = parse_tour_plan(tmp_path)
-                plan_dict = parse_tour_plan_to_dict(tmp_path)
-            finally:
-                tmp_path.unlink(missing_ok=True)
+            content = file_input.getvalue()
+            # Parse-Cache: identische Bytes ohne Temp-Datei und ohne Parsing
+            plan = cached_tour_plan(content, filename or "upload.csv", staging=False)
+            if plan is None:
+                with tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix='.csv') as tmp:
+                    tmp.write(content)
+                    tmp_path = Path(tmp.name)
+                try:
+                    plan = parse_tour_plan_cached(tmp_path)
+                finally:
+                    tmp_path.unlink(missing_ok=True)
         else:
-            plan = parse_tour_plan(file_input)
-            plan_dict = parse_tour_plan_to_dict(file_input)
-        return plan, plan_dict
+            plan = parse_tour_plan_cached(file_input)
+        return plan, tour_plan_to_dict(plan)
 
     async def _optimize_plan(self, plan: TourPlan) -> Dict[str, Any]:
         subtours = {}
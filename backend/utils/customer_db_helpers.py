@@ -6,6 +6,8 @@ import sqlite3
 import os
 from typing import Optional
 
+from db.connections import get_connection
+
 
 def _normalize_string(s: str) -> str:
     """Normalisiert String für Datenbank-Suche."""
@@ -30,7 +32,7 @@ def _search_in_customers_db(name: str, street: str, city: str) -> Optional[int]:
         return None
     
     try:
-        conn = sqlite3.connect('data/customers.db')
+        conn = get_connection('data/customers.db')
         cursor = conn.cursor()
         
         normalized_name = _normalize_string(name)
@@ -53,13 +55,11 @@ def _search_in_customers_db(name: str, street: str, city: str) -> Optional[int]:
                 cursor.execute(query, params)
                 result = cursor.fetchone()
                 if result:
-                    conn.close()
                     print(f"[DB-SUCCESS] Kunde gefunden in customers.db: ID {result[0]}")
                     return result[0]
             except sqlite3.OperationalError:
                 continue
         
-        conn.close()
         return None
     except Exception as e:
         print(f"[DB-ERROR] Fehler bei customers.db-Suche: {e}")
@@ -82,7 +82,7 @@ def _search_in_traffic_db(name: str, street: str, city: str) -> Optional[int]:
         return None
     
     try:
-        conn = sqlite3.connect('data/traffic.db')
+        conn = get_connection('data/traffic.db')
         cursor = conn.cursor()
         
         normalized_name = _normalize_string(name)
@@ -95,8 +95,6 @@ def _search_in_traffic_db(name: str, street: str, city: str) -> Optional[int]:
         )
         result = cursor.fetchone()
         
-        conn.close()
-        
         if result:
             print(f"[DB-SUCCESS] Kunde gefunden in traffic.db: ID {result[0]}")
             return result[0]
@@ -0,0 +1,99 @@
+"""
+Prozessübergreifende Sperre über eine Lock-Datei (Windows: msvcrt, sonst fcntl).
+
+Schützt Dateien, die mehrere Prozesse gleichzeitig schreiben könnten
+(mehrere uvicorn-Worker, App plus Skript/Task Scheduler). Threads desselben
+Prozesses werden zusätzlich über einen threading.Lock pro Lock-Datei serialisiert.
+
+Verwendung:
+    with FileLock(BACKUP_DIR / ".backup.lock", blocking=False):
+        ...
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+class FileLockTimeout(RuntimeError):
+    """Die Sperre hält ein anderer Prozess (oder Thread)."""
+
+
+_thread_locks: Dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+
+def _thread_lock(path: Path) -> threading.Lock:
+    key = str(path.resolve())
+    with _thread_locks_guard:
+        return _thread_locks.setdefault(key, threading.Lock())
+
+
+class FileLock:
+    """Exklusive Sperre auf `path` (Datei wird bei Bedarf angelegt, aber nie gelöscht)."""
+
+    def __init__(self, path: Path | str, blocking: bool = True, timeout: float = 30.0,
+                 poll_s: float = 0.05) -> None:
+        self.path = Path(path)
+        self.blocking = blocking
+        self.timeout = timeout
+        self.poll_s = poll_s
+        self._fd: int | None = None
+        self._local: threading.Lock | None = None
+
+    def acquire(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        local = _thread_lock(self.path)
+        acquired = local.acquire(timeout=self.timeout) if self.blocking else local.acquire(blocking=False)
+        if not acquired:
+            raise FileLockTimeout(f"Sperre belegt: {self.path}")
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.monotonic() + (self.timeout if self.blocking else 0)
+        try:
+            while True:
+                try:
+                    if os.name == "nt":
+                        os.lseek(fd, 0, os.SEEK_SET)
+                        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                    else:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except OSError:
+                    if time.monotonic() >= deadline:
+                        raise FileLockTimeout(f"Sperre belegt: {self.path}")
+                    time.sleep(self.poll_s)
+        except BaseException:
+            os.close(fd)
+            local.release()
+            raise
+        self._fd, self._local = fd, local
+
+    def release(self) -> None:
+        fd, local = self._fd, self._local
+        self._fd = self._local = None
+        if fd is None:
+            return
+        try:
+            if os.name == "nt":
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+            local.release()
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
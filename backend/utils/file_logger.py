@@ -1,59 +1,58 @@
 """
 Datei-Logger für Debug-Ausgaben
 Schreibt alle Logs in eine Datei: logs/debug.log
+
+Dünne Fassade über backend.utils.log_pipeline: log_to_file() blockiert nicht
+mehr (Queue + gebündelter Writer-Thread mit Rotation).
 """
-import os
-from datetime import datetime
+import logging
 from pathlib import Path
 
+from backend.utils.log_pipeline import create_pipeline_from_env, log_route  # noqa: F401
+
 # Log-Verzeichnis erstellen
 LOG_DIR = Path("logs")
 LOG_DIR.mkdir(exist_ok=True)
 
 LOG_FILE = LOG_DIR / "debug.log"
 
-def log_to_file(*args, **kwargs):
+_pipeline = create_pipeline_from_env(LOG_FILE)
+
+
+def log_to_file(*args, level=logging.INFO, route=None, **kwargs):
     """
-    Schreibt Log-Nachricht in Datei UND auf Console.
+    Schreibt Log-Nachricht in Datei UND auf Console (asynchron).
     ULTRA-ROBUST: Behandelt ALLE Unicode-Fehler.
+
+    Args:
+        *args: Meldung und Argumente, z.B. ("Tour %s: %s Stopps", tour_id, n) –
+            formatiert wird erst nach dem Level-/Sampling-Check
+        level: logging-Level oder Name ("DEBUG", "INFO", ...)
+        route: Route für Sampling (Standard: aus log_route()-Kontext)
     """
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-    
-    # Formatiere Nachricht (mit Unicode-Schutz)
-    try:
-        message = " ".join(str(arg) for arg in args)
-    except Exception as e:
-        message = f"[LOG-FORMAT-ERROR] {e}"
-    
-    # Schreibe in Datei (UTF-8, append mode) - IMMER erfolgreich
-    try:
-        with open(LOG_FILE, "a", encoding="utf-8", errors="replace") as f:
-            # Entferne problematische Unicode-Zeichen
-            safe_message = message.encode('utf-8', errors='replace').decode('utf-8', errors='replace')
-            f.write(f"[{timestamp}] {safe_message}\n")
-            f.flush()  # Sofort schreiben
-    except Exception as e:
-        # Letzte Rettung: Schreibe Fehler in Datei
-        try:
-            with open(LOG_FILE, "a", encoding="utf-8", errors="ignore") as f:
-                f.write(f"[{timestamp}] [LOG-ERROR] {str(e)[:200]}\n")
-                f.flush()
-        except Exception:
-            pass  # Absolut ignorieren
-    
-    # Auch auf Console ausgeben (OPTIONAL - wenn es fehlschlägt, egal)
-    try:
-        # ASCII-Only für Console (sicher)
-        safe_message_ascii = message.encode('ascii', errors='replace').decode('ascii')
-        print(f"[{timestamp}] {safe_message_ascii}")
-    except Exception:
-        pass  # Console-Fehler ignorieren
+    _pipeline.log(args, level=level, route=route)
+
+
+def is_enabled(level=logging.DEBUG, route=None) -> bool:
+    """Prüft vorab, ob teure Debug-Meldungen überhaupt gebaut werden müssen."""
+    return _pipeline.is_enabled(level, route)
+
+
+def flush_log(timeout: float = 5.0):
+    """Wartet, bis alle bisherigen Meldungen in der Datei stehen."""
+    _pipeline.writer.flush(timeout)
+
+
+def get_log_stats():
+    """Zähler der Log-Pipeline (queued/written/dropped/sampled_out)."""
+    return _pipeline.stats()
+
 
 def clear_log():
     """Löscht die Log-Datei (für neuen Test-Start)"""
     try:
+        flush_log()
         if LOG_FILE.exists():
             LOG_FILE.unlink()
     except Exception:
         pass
-
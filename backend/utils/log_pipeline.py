@@ -0,0 +1,303 @@
+"""
+Asynchrone Log-Pipeline für Datei-Logs (logs/debug.log).
+
+Aufrufer legen nur einen fertigen Eintrag in eine Queue; ein einzelner
+Writer-Thread schreibt die Einträge gebündelt in die Datei, rotiert nach
+Größe und gibt optional auf der Console aus. Level-Gating und Sampling pro
+Route passieren VOR dem Formatieren – deaktivierte Meldungen kosten praktisch
+nichts. Wie bei logging werden Argumente erst danach eingesetzt:
+
+    log_to_file("[GEOCODE] DB-Hit: %s -> (%s, %s)", address, lat, lon, level=logging.DEBUG)
+
+Konfiguration (Umgebungsvariablen):
+- FILE_LOG_LEVEL:      Minimales Level (Standard: INFO)
+- FILE_LOG_MAX_BYTES:  Rotationsgröße in Bytes (Standard: 10 MB, 0 = aus)
+- FILE_LOG_BACKUPS:    Anzahl rotierter Dateien (Standard: 5)
+- FILE_LOG_CONSOLE:    Console-Ausgabe an/aus (Standard: true)
+- FILE_LOG_SAMPLING:   Sampling pro Route, z.B. "/api/workflow/upload=0.1,/health=0"
+"""
+import atexit
+import contextvars
+import logging
+import os
+import queue
+import random
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+# Aktuelle Route (z.B. "/api/workflow/upload") für Sampling
+_current_route: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "file_log_route", default=None
+)
+
+_LEVELS = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+    "CRITICAL": logging.CRITICAL,
+}
+
+# Sentinel zum Beenden des Writer-Threads
+_STOP = object()
+
+
+def _parse_level(value) -> int:
+    """Wandelt Level-Namen oder Zahl in logging-Level um (unbekannt → INFO)."""
+    if isinstance(value, int):
+        return value
+    return _LEVELS.get(str(value).upper(), logging.INFO)
+
+
+def _format_message(args: tuple) -> str:
+    """%-Formatierung (logging-Stil) oder print-artige Verkettung."""
+    if len(args) > 1 and isinstance(args[0], str) and "%" in args[0]:
+        try:
+            return args[0] % args[1:]
+        except (TypeError, ValueError):
+            pass
+    return " ".join(str(arg) for arg in args)
+
+
+def _parse_sampling(spec: str) -> Dict[str, float]:
+    """Parst "key=rate,key=rate" in ein Dict (ungültige Einträge werden ignoriert)."""
+    rates: Dict[str, float] = {}
+    for part in (spec or "").split(","):
+        if "=" not in part:
+            continue
+        key, _, rate = part.rpartition("=")
+        try:
+            rates[key.strip()] = max(0.0, min(1.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+class BatchedFileWriter:
+    """
+    Writer-Thread: leert die Queue in Batches und schreibt mit einem einzigen
+    write()/flush() pro Batch. Rotiert die Datei, sobald max_bytes erreicht ist.
+    """
+
+    def __init__(
+        self,
+        log_file: Path,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+        console: bool = True,
+        batch_size: int = 512,
+        queue_size: int = 50_000,
+    ):
+        self.log_file = Path(log_file)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.console = console
+        self.batch_size = batch_size
+        self.queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.written = 0
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Startet den Writer-Thread (idempotent)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="file-log-writer", daemon=True
+            )
+            self._thread.start()
+
+    def submit(self, line: str) -> None:
+        """Legt eine fertige Zeile in die Queue. Blockiert nie."""
+        if self._thread is None:
+            self.start()
+        try:
+            self.queue.put_nowait(line)
+        except queue.Full:
+            # Lieber Logzeilen verlieren als den Request blockieren
+            self.dropped += 1
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Wartet, bis alle bisher eingereichten Zeilen geschrieben sind."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        try:
+            self.queue.put(done, timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(timeout)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Schreibt ausstehende Zeilen und beendet den Thread."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self.queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            item = self.queue.get()
+            batch: List[str] = []
+            events: List[threading.Event] = []
+            stop = False
+            # Batch sammeln, ohne zu warten
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    events.append(item)
+                else:
+                    batch.append(item)
+                if stop or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write_batch(batch)
+            for event in events:
+                event.set()
+            if stop:
+                return
+
+    def _write_batch(self, batch: List[str]) -> None:
+        payload = "\n".join(batch) + "\n"
+        try:
+            self.log_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.log_file, "a", encoding="utf-8", errors="replace") as f:
+                f.write(payload)
+                f.flush()
+                size = f.tell()
+            self.written += len(batch)
+            if self.max_bytes and size >= self.max_bytes:
+                self._rotate()
+        except Exception:
+            pass  # Logging darf niemals die App stören
+
+        if self.console:
+            try:
+                # ASCII-Only für Console (sicher)
+                print(payload.encode("ascii", errors="replace").decode("ascii"), end="")
+            except Exception:
+                pass
+
+    def _rotate(self) -> None:
+        """debug.log → debug.log.1 → ... → debug.log.N (älteste fällt weg)."""
+        if self.backup_count <= 0:
+            self.log_file.unlink(missing_ok=True)
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            src = self.log_file.with_name(f"{self.log_file.name}.{i}")
+            if src.exists():
+                os.replace(src, self.log_file.with_name(f"{self.log_file.name}.{i + 1}"))
+        os.replace(self.log_file, self.log_file.with_name(f"{self.log_file.name}.1"))
+
+
+class LogPipeline:
+    """
+    Front-End der Pipeline: Level-Gating, Sampling pro Route und Formatierung.
+    """
+
+    def __init__(
+        self,
+        writer: BatchedFileWriter,
+        level: int = logging.INFO,
+        sampling: Optional[Dict[str, float]] = None,
+    ):
+        self.writer = writer
+        self.level = level
+        self.sampling: Dict[str, float] = dict(sampling or {})
+        self.sampled_out = 0
+
+    def is_enabled(self, level: int = logging.INFO, route: Optional[str] = None) -> bool:
+        """Günstiger Vorab-Check: Wird eine Meldung dieses Levels geschrieben?"""
+        if _parse_level(level) < self.level:
+            return False
+        return self._sample_rate(route) > 0.0
+
+    def _sample_rate(self, route: Optional[str]) -> float:
+        if not self.sampling:
+            return 1.0
+        route = route or _current_route.get()
+        if not route:
+            return 1.0
+        # Längster passender Präfix gewinnt
+        best_key = None
+        for key in self.sampling:
+            if route.startswith(key) and (best_key is None or len(key) > len(best_key)):
+                best_key = key
+        return self.sampling[best_key] if best_key is not None else 1.0
+
+    def log(self, args: tuple, level: int = logging.INFO, route: Optional[str] = None) -> None:
+        """
+        Gating → Sampling → Formatierung → Queue.
+
+        Enthält das erste Argument %-Platzhalter und folgen weitere Argumente,
+        wird wie bei logging `msg % args` formatiert, sonst wie print() verkettet.
+        """
+        level = _parse_level(level)
+        if level < self.level:
+            return
+        # Fehler und Warnungen werden nie weggesampelt
+        if level < logging.WARNING:
+            rate = self._sample_rate(route)
+            if rate < 1.0 and random.random() >= rate:
+                self.sampled_out += 1
+                return
+
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        try:
+            message = _format_message(args)
+        except Exception as e:
+            message = f"[LOG-FORMAT-ERROR] {e}"
+        # Problematische Unicode-Zeichen (z.B. Surrogates) entfernen
+        message = message.encode("utf-8", errors="replace").decode("utf-8", errors="replace")
+        self.writer.submit(f"[{timestamp}] {message}")
+
+    def stats(self) -> Dict[str, int]:
+        """Zähler für Monitoring."""
+        return {
+            "queued": self.writer.queue.qsize(),
+            "written": self.writer.written,
+            "dropped": self.writer.dropped,
+            "sampled_out": self.sampled_out,
+        }
+
+
+@contextmanager
+def log_route(route: str) -> Iterator[None]:
+    """Setzt die aktuelle Route für Sampling (z.B. im Request-Handler)."""
+    token = _current_route.set(route)
+    try:
+        yield
+    finally:
+        _current_route.reset(token)
+
+
+def create_pipeline_from_env(log_file: Path) -> LogPipeline:
+    """Baut die Pipeline anhand der FILE_LOG_* Umgebungsvariablen."""
+    writer = BatchedFileWriter(
+        log_file=log_file,
+        max_bytes=int(os.getenv("FILE_LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+        backup_count=int(os.getenv("FILE_LOG_BACKUPS", "5")),
+        console=os.getenv("FILE_LOG_CONSOLE", "true").lower() == "true",
+    )
+    pipeline = LogPipeline(
+        writer,
+        level=_parse_level(os.getenv("FILE_LOG_LEVEL", "INFO")),
+        sampling=_parse_sampling(os.getenv("FILE_LOG_SAMPLING", "")),
+    )
+    atexit.register(writer.stop)
+    return pipeline
@@ -1,10 +1,22 @@
 # common/normalize.py
+"""
+Zentrale Adress-Normalisierung.
+
+Alle Regex-Regeln sind vorkompiliert; Mojibake- und ??-Korrekturen laufen in
+einem Durchlauf (MultiReplacer). Ergebnisse werden in einem begrenzten LRU-Memo
+(Schlüssel: Roh-Eingabe) gehalten – dieselbe Adresse wird pro Request oft
+mehrfach normalisiert (Parser, geo_repo, Aliase, Fail-Cache).
+
+Konfiguration:
+- NORMALIZE_CACHE_SIZE: Einträge im LRU-Memo (Standard: 65536)
+"""
 from __future__ import annotations
+import os
 import re
-from pathlib import Path
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Dict, Iterable, List
 from repositories.address_lookup import _find_complete_address_by_plz_name, _find_complete_address_by_name_only, clear_address_cache
-from common.text_cleaner import _fix_question_marks, repair_cp_mojibake
+from common.text_cleaner import MultiReplacer, _fix_question_marks, repair_cp_mojibake
 
 _PIPE_SEP = re.compile(r"\s*\|\s*")
 _MULTI_SEP = re.compile(r"\s*[;,]+\s*")
@@ -15,79 +27,98 @@ _SAFE_FIXES = {
     "Ã¤":"ä","Ã¶":"ö","Ã¼":"ü","ÃŸ":"ß",
     "Ã„":"Ä","Ã–":"Ö","Ãœ":"Ü",
 }
+_SAFE_FIXES_REPLACER = MultiReplacer(_SAFE_FIXES)
+
+
+class _RuleGroup:
+    """
+    Regeln eines Pipeline-Schritts mit gemeinsamem Vorab-Check: eine kompilierte
+    Alternation aller Pattern. Trifft sie nicht, wird die ganze Gruppe übersprungen
+    (der Normalfall – die meisten Regeln betreffen nur wenige Adressen).
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.guard = re.compile("|".join(
+            f"(?i:{p.pattern})" if p.flags & re.IGNORECASE else f"(?:{p.pattern})"
+            for p, _ in rules
+        ))
+
+    def apply(self, s: str) -> str:
+        if not self.guard.search(s):
+            return s
+        for pattern, repl in self.rules:
+            s = pattern.sub(repl, s)
+        return s
+
+
+# Vorkompilierte Regeln (Pattern, Ersetzung), gruppiert nach Pipeline-Schritt.
+# Die Pattern sind 1:1 aus der bisherigen re.sub-Kette übernommen.
+
+_HALLE_RULES = _RuleGroup([
+    (re.compile(r',\\s*Halle\\s+\\d+\\w*', re.IGNORECASE), ''),
+    (re.compile(r'/\\s*Halle\\s+\\d+\\w*', re.IGNORECASE), ''),
+])
+
+_OT_RULES = _RuleGroup([
+    (re.compile(r'\s*\(\s*(?:OT|Ortsteil)\s+[\\w\\s.-]+\s*\)', re.IGNORECASE), ''),
+    (re.compile(r',\\s*(?:OT|Ortsteil)\\s+[\\w\\s.-]+', re.IGNORECASE), ''),
+    (re.compile(r'/\\s*(?:OT|Ortsteil)\\s+[\\w\\s.-]+', re.IGNORECASE), ''),
+])
+
+_PLZ_COMMA_RULES = _RuleGroup([
+    (re.compile(r',\\s*(\\d{5})\\s*,\\s*([A-Za-zäöüßÄÖÜ]+)\\s*$'), r', \\1 \\2'),
+    (re.compile(r',\\s*(\\d{5})\\s*,\\s*([A-Za-zäöüßÄÖÜ]+)\\s+OT\\s+'), r', \\1 \\2 OT '),
+    (re.compile(r',\\s*(\\d{5})\\s*,\\s*([A-Za-zäöüßÄÖÜ]+)\\s+/'), r', \\1 \\2 /'),
+])
+
+_TYPO_RULES = _RuleGroup([
+    (re.compile(r'\bHauptstr\\.?(?=\s|$)', re.IGNORECASE), 'Hauptstr.'),  # Haupstr. -> Hauptstr.
+    (re.compile(r'\bHauptstrasse', re.IGNORECASE), 'Hauptstr.'),  # Hauptstrasse -> Hauptstr.
+    (re.compile(r'\bHauptstraße', re.IGNORECASE), 'Hauptstr.'),  # Hauptstraße -> Hauptstr.
+    (re.compile(r'\bHaupstr', re.IGNORECASE), 'Hauptstr.'),  # Haupstr ohne Punkt -> Hauptstr.
+    (re.compile(r'\bStrae', re.IGNORECASE), 'Straße'),  # Strae -> Straße
+    (re.compile(r'\.\\.'), '.'),  # Doppelte Punkte entfernen
+])
+
+_STREET_RULES = _RuleGroup([
+    (re.compile(r'\bStrasse\b', re.IGNORECASE), 'Str.'),  # Strasse -> Str.
+    (re.compile(r'\bStraße\b', re.IGNORECASE), 'Str.'),  # Straße -> Str.
+    (re.compile(r'\bStr\b(?=\s)', re.IGNORECASE), 'Str.'),  # Str (ohne Punkt) -> Str.
+])
+
+_KNOWN_ADDRESS_RULES = _RuleGroup([
+    (re.compile(r'\bHauptstr\\. 1, 01809 Heidenau'), 'Hauptstr. 1, 01809 Heidenau'),
+    (re.compile(r'\bHauptstr\\. 9a, 01728 Bannewitz'), 'Hauptstr. 9a, 01728 Bannewitz/OT Possendorf'),
+    (re.compile(r'\bHauptstr\\. 70, 01705 Freital'), 'Hauptstr. 70, 01705 Freital'),
+    (re.compile(r'\bHauptstr\\. 122, 01816 Bad Gottleuba-Berggießhübel'), 'Hauptstr. 122, 01816 Bad Gottleuba-Berggießhübel'),
+    (re.compile(r'\bHauptstr\\. 16, 01816 Bad Gottleuba-Berggießhübel'), 'Hauptstr. 16, 01816 Bad Gottleuba-Berggießhübel'),
+    (re.compile(r'\bJohnsbacher Hauptstr\\. 55, 01768 Glashütte'), 'Johnsbacher Hauptstr. 55, 01768 Glashütte'),
+    (re.compile(r'\bAn der Triebe\\s+25, 01468 Moritzburg'), 'An der Triebe 25, 01468 Moritzburg'),
+])
+
+_OT_SUFFIX_RULES = _RuleGroup([
+    (re.compile(r'\bGersdorf 43, 01819 Bahretal(?!\s*OT\s*Gersdorf)'), 'Gersdorf 43, 01819 Bahretal OT Gersdorf'),
+    (re.compile(r'\bAlte Str\\. 33, 01768 Glashütte(?!\s*OT\s*Hirschbach)'), 'Alte Str. 33, 01768 Glashütte OT Hirschbach'),
+    (re.compile(r'\bHohensteiner Str\\. 101, 09212 Limbach-O\\.?(?!\s*/OT\s*Pleißa)'), 'Hohensteiner Str. 101, 09212 Limbach-O./OT Pleißa'),
+    (re.compile(r'\bReinberger Dorfstraße 6a, 01744 Dippoldiswalde(?!\s*/OT\s*Reinberg)'), 'Reinberger Dorfstraße 6a, 01744 Dippoldiswalde/OT Reinberg'),
+])
+
+# Mit Rückverweis (\1) – nicht als Alternation kombinierbar, Vorab-Check über "OT"
+_OT_DUPLICATE_RULES = [
+    (re.compile(r'\bOT\s+(\w+)\s+OT\s+\1\b'), r'OT \1'),
+    (re.compile(r'\b/OT\s+(\w+)\s+/OT\s+\1\b'), r'/OT \1'),
+]
+
+
 
-# Intelligente ?? Zeichen-Korrektur basierend auf Kontext
-def _fix_question_marks(text: str) -> str:
-    """Korrigiert ?? Zeichen basierend auf Kontext."""
-    if not text or "??" not in text:
-        return text
-    
-    # Kontext-basierte Korrekturen für häufige Fälle
-    context_fixes = {
-        # Straße/Straße-Korrekturen
-        "Stra??e": "Straße",
-        "stra??e": "straße", 
-        "Stra??": "Straße",
-        "stra??": "straße",
-        
-        # Häufige Straßennamen mit ?? 
-        "Burgker Stra??e": "Burgker Straße",
-        "Cosch??tzer": "Coschützer",
-        "Cosch??tzer Stra??e": "Coschützer Straße",
-        "Wilsdruffer Stra??e": "Wilsdruffer Straße",
-        "Dresdner Stra??e": "Dresdner Straße",
-        "Tharandter Stra??e": "Tharandter Straße",
-        "L??btauer": "Löbtauer",
-        "L??btauer Stra??e": "Löbtauer Straße",
-        "Fr??belstra??e": "Fröbelstraße",
-        "Morgenr??the": "Morgenröthe",
-        "Nieder m??hle": "Niedermühle",
-        "B??renstein": "Bärenstein",
-        "Gro??opitz": "Großopitz",
-        "Berggie??h??bel": "Berggießhübel",
-        "Gottleuba-Berggie??h??bel": "Gottleuba-Berggießhübel",
-        "Bad Gottleuba-Berggie??h??bel": "Bad Gottleuba-Berggießhübel",
-        
-        # Allgemeine ?? Zeichen-Korrekturen (nach spezifischen Fällen)
-        
-        # Weitere häufige Fälle
-        "H??se": "Häse",  # Häufig in Namen
-        "H??hnel": "Höhnel",
-        "M??ller": "Müller",
-        "M??glitztalstra??e": "Müglitztalstraße",
-        "Pratzschwitzer Stra??e": "Pratzschwitzer Straße",
-        "Herbert-Liebsch- Str.": "Herbert-Liebsch-Straße",
-        "Stra??e des Friedens": "Straße des Friedens",
-        "Stra??e der MTS": "Straße der MTS",
-        "Dresdner Landstrasse": "Dresdner Landstraße",
-        "Kleine Basch??tzer": "Kleine Baschützer",
-        "Kleine Basch??tzer Str.": "Kleine Baschützer Straße",
-        
-        # Zusätzliche Mojibake-Fälle aus den verbleibenden Warnungen
-        "S??gewerk": "Sägewerk",
-        "Sch??nfeld": "Schönfeld",
-        "Glash??tte": "Glashütte",
-        "haftungsbeschr??nkt": "haftungsbeschränkt",
-        "Altnossener Stra??e": "Altnossener Straße",
-        "Dorfstra??e": "Dorfstraße",
-        "Stolpener Strasse": "Stolpener Straße",
-        
-        # Weitere spezifische Fälle
-        "Am S??gewerk": "Am Sägewerk",
-        "OT Sch??nfeld": "OT Schönfeld",
-        "OT Luchau": "OT Luchau",  # Bereits korrekt
-        "OT Sehma": "OT Sehma",    # Bereits korrekt
-    }
-    
-    # Wende Kontext-Fixes an
-    for corrupt, correct in context_fixes.items():
-        text = text.replace(corrupt, correct)
-    
-    return text
 
 # Cache für vollständige Adressen (PLZ + Name -> vollständige Adresse)
 _address_cache: Dict[str, str] = {}
 
+_CACHE_SIZE = int(os.getenv("NORMALIZE_CACHE_SIZE", "65536"))
+
+
 def normalize_address(addr: str | None, customer_name: str | None = None, postal_code: str | None = None) -> str:
     """
     Zentrale Adress-Normalisierung.
@@ -120,7 +151,39 @@ def normalize_address(addr: str | None, customer_name: str | None = None, postal
             return normalize_address(full_address)
     if not addr:
         return ""
-    s = str(addr).strip()
+    # Reine Textfunktion (keine DB) → memoisierbar
+    return _normalize_text(str(addr))
+
+
+def normalize_many(addrs: Iterable[str | None]) -> List[str]:
+    """
+    Batch-Variante von normalize_address (ohne PLZ+Name-Regel).
+    
+    Duplikate im Batch werden nur einmal normalisiert; Reihenfolge bleibt erhalten.
+    """
+    seen: Dict[str, str] = {}
+    out: List[str] = []
+    for addr in addrs:
+        if not addr:
+            out.append("")
+            continue
+        raw = str(addr)
+        norm = seen.get(raw)
+        if norm is None:
+            norm = seen[raw] = _normalize_text(raw)
+        out.append(norm)
+    return out
+
+
+def clear_normalize_cache() -> None:
+    """Leert das LRU-Memo (für Tests oder nach Regeländerungen)."""
+    _normalize_text.cache_clear()
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _normalize_text(raw: str) -> str:
+    """Regel-Pipeline auf einer nicht-leeren Roh-Adresse."""
+    s = raw.strip()
 
     s = repair_cp_mojibake(s)
 
@@ -129,15 +192,11 @@ def normalize_address(addr: str | None, customer_name: str | None = None, postal
         s = _PIPE_SEP.sub(', ', s)
 
     # 2) Halle-Erwähnungen entfernen (für bessere Geocoding-Erfolgsrate)
-    # Verbesserter Regex, um ", Halle 14" oder "/ Halle 14" zu entfernen
-    s = re.sub(r',\\s*Halle\\s+\\d+\\w*', '', s, flags=re.IGNORECASE)
-    s = re.sub(r'/\\s*Halle\\s+\\d+\\w*', '', s, flags=re.IGNORECASE)
+    s = _HALLE_RULES.apply(s)
     
     # 3) OT-Erwähnungen entfernen (präziser, um Duplikate zu vermeiden)
     # Entfernt: "(OT Ortsteil)", "/ OT Ortsteil", ", OT Ortsteil"
-    s = re.sub(r'\s*\(\s*(?:OT|Ortsteil)\s+[\\w\\s.-]+\s*\)', '', s, flags=re.IGNORECASE)
-    s = re.sub(r',\\s*(?:OT|Ortsteil)\\s+[\\w\\s.-]+', '', s, flags=re.IGNORECASE)
-    s = re.sub(r'/\\s*(?:OT|Ortsteil)\\s+[\\w\\s.-]+', '', s, flags=re.IGNORECASE)
+    s = _OT_RULES.apply(s)
     
     # 4) Sekundäre Trenner vereinheitlichen und trimmen
     parts = [p.strip(" ,;/") for p in _MULTI_SEP.split(s) if p.strip(" ,;/")]
@@ -147,55 +206,35 @@ def normalize_address(addr: str | None, customer_name: str | None = None, postal
     s = _fix_question_marks(s)
     
     # 4.2) Komma-Normalisierung für bessere Cache-Treffer
-    s = re.sub(r',\\s*(\\d{5})\\s*,\\s*([A-Za-zäöüßÄÖÜ]+)\\s*$', r', \\1 \\2', s)
-    s = re.sub(r',\\s*(\\d{5})\\s*,\\s*([A-Za-zäöüßÄÖÜ]+)\\s+OT\\s+', r', \\1 \\2 OT ', s)
-    s = re.sub(r',\\s*(\\d{5})\\s*,\\s*([A-Za-zäöüßÄÖÜ]+)\\s+/', r', \\1 \\2 /', s)
+    s = _PLZ_COMMA_RULES.apply(s)
 
     # 5) Whitespace normalisieren (doppelte Leerzeichen entfernen)
     s = _SPACES.sub(" ", s).strip(' ,')
     
     # 6) Schreibfehler- und Konsistenz-Korrekturen
     # KRITISCH: Konsequente Normalisierung auf Hauptstr.
-    s = re.sub(r'\bHauptstr\\.?(?=\s|$)', 'Hauptstr.', s, flags=re.IGNORECASE) # Haupstr. -> Hauptstr.
-    s = re.sub(r'\bHauptstrasse', 'Hauptstr.', s, flags=re.IGNORECASE) # Hauptstrasse -> Hauptstr.
-    s = re.sub(r'\bHauptstraße', 'Hauptstr.', s, flags=re.IGNORECASE) # Hauptstraße -> Hauptstr.
-    s = re.sub(r'\bHaupstr', 'Hauptstr.', s, flags=re.IGNORECASE) # Haupstr ohne Punkt -> Hauptstr.
-    s = re.sub(r'\bStrae', 'Straße', s, flags=re.IGNORECASE)  # Strae -> Straße
-    s = re.sub(r'\.\\.', '.', s)  # Doppelte Punkte entfernen
+    s = _TYPO_RULES.apply(s)
     
     # 6.1) Straße/Strasse/Str. Normalisierung (wichtig für Duplikats-Erkennung)
     # Normalisiere alle Varianten zu "Str." für bessere Duplikats-Erkennung
-    s = re.sub(r'\bStrasse\b', 'Str.', s, flags=re.IGNORECASE)  # Strasse -> Str.
-    s = re.sub(r'\bStraße\b', 'Str.', s, flags=re.IGNORECASE)  # Straße -> Str.
-    s = re.sub(r'\bStr\b(?=\s)', 'Str.', s, flags=re.IGNORECASE)  # Str (ohne Punkt) -> Str.
+    s = _STREET_RULES.apply(s)
     
     # 7) Spezifische Adress-Korrekturen für bekannte Problemfälle (mit Hauptstr. Konsistenz)
-    s = re.sub(r'\bHauptstr\\. 1, 01809 Heidenau', 'Hauptstr. 1, 01809 Heidenau', s)
-    s = re.sub(r'\bHauptstr\\. 9a, 01728 Bannewitz', 'Hauptstr. 9a, 01728 Bannewitz/OT Possendorf', s)
-    s = re.sub(r'\bHauptstr\\. 70, 01705 Freital', 'Hauptstr. 70, 01705 Freital', s)
-    s = re.sub(r'\bHauptstr\\. 122, 01816 Bad Gottleuba-Berggießhübel', 'Hauptstr. 122, 01816 Bad Gottleuba-Berggießhübel', s)
-    s = re.sub(r'\bHauptstr\\. 16, 01816 Bad Gottleuba-Berggießhübel', 'Hauptstr. 16, 01816 Bad Gottleuba-Berggießhübel', s)
-    s = re.sub(r'\bJohnsbacher Hauptstr\\. 55, 01768 Glashütte', 'Johnsbacher Hauptstr. 55, 01768 Glashütte', s)
-    s = re.sub(r'\bAn der Triebe\\s+25, 01468 Moritzburg', 'An der Triebe 25, 01468 Moritzburg', s)
+    s = _KNOWN_ADDRESS_RULES.apply(s)
 
     # 8) OT-Suffixe nur hinzufügen wenn nötig und nicht dupliziert (mit negativen Lookaheads)
     # Beispiel: Alte Str. 33, 01768 Glashütte (OT Hirschbach) -> Glashütte OT Hirschbach
-    
-    # Sicherstellen, dass der Ortsteil noch nicht am Ende der Adresse steht
-    s = re.sub(r'\bGersdorf 43, 01819 Bahretal(?!\s*OT\s*Gersdorf)', 'Gersdorf 43, 01819 Bahretal OT Gersdorf', s)
-    s = re.sub(r'\bAlte Str\\. 33, 01768 Glashütte(?!\s*OT\s*Hirschbach)', 'Alte Str. 33, 01768 Glashütte OT Hirschbach', s)
-    s = re.sub(r'\bHohensteiner Str\\. 101, 09212 Limbach-O\\.?(?!\s*/OT\s*Pleißa)', 'Hohensteiner Str. 101, 09212 Limbach-O./OT Pleißa', s)
-    s = re.sub(r'\bReinberger Dorfstraße 6a, 01744 Dippoldiswalde(?!\s*/OT\s*Reinberg)', 'Reinberger Dorfstraße 6a, 01744 Dippoldiswalde/OT Reinberg', s)
+    s = _OT_SUFFIX_RULES.apply(s)
     
     # 9) Bereinigung von Duplikaten und trailing dots
-    s = re.sub(r'\bOT\s+(\w+)\s+OT\s+\1\b', r'OT \1', s)  
-    s = re.sub(r'\b/OT\s+(\w+)\s+/OT\s+\1\b', r'/OT \1', s)  
-    s = re.sub(r'\.+$', '', s)  
+    if "OT" in s:
+        for pattern, repl in _OT_DUPLICATE_RULES:
+            s = pattern.sub(repl, s)
+    s = s.rstrip('.')  # entspricht re.sub(r'\.+$', '', s) – s enthält keine Zeilenumbrüche mehr
     
     # 10) sichere Mojibake-Fixes (keine Fantasie-Mappings)
-    for bad, good in _SAFE_FIXES.items():
-        if bad in s:
-            s = s.replace(bad, good)
+    if "Ã" in s:
+        s = _SAFE_FIXES_REPLACER.replace(s)
 
     return s.strip() # Finaler Trim für den Fall, dass die End-Regex Leerzeichen hinterlässt
 
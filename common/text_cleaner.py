@@ -1,5 +1,6 @@
 from __future__ import annotations
 import re
+from typing import Dict
 
 
 _MOJIBAKE_MARKERS = {
@@ -30,6 +31,30 @@ _MOJIBAKE_MARKERS = {
     "├",
 }
 
+# Ein Zeichenklassen-Regex statt ~25 einzelner `in`-Scans
+_MOJIBAKE_RE = re.compile("[" + re.escape("".join(sorted(_MOJIBAKE_MARKERS))) + "]")
+
+
+class MultiReplacer:
+    """
+    Ersetzt viele feste Teilstrings in EINEM Durchlauf (leftmost-longest).
+
+    Alle Schlüssel werden zu einer Alternation kompiliert (längste zuerst), der
+    Regex-Automat läuft einmal über den Text. An jeder Position gewinnt der
+    längste passende Schlüssel; Ersetzungen werden nicht erneut gescannt.
+    """
+
+    def __init__(self, mapping: Dict[str, str]):
+        self.mapping = {k: v for k, v in mapping.items() if k != v}
+        keys = sorted(self.mapping, key=len, reverse=True)
+        self._pattern = re.compile("|".join(map(re.escape, keys))) if keys else None
+
+    def replace(self, text: str) -> str:
+        if self._pattern is None or not text:
+            return text
+        mapping = self.mapping
+        return self._pattern.sub(lambda m: mapping[m.group(0)], text)
+
 
 def repair_cp_mojibake(text: str | None) -> str | None:
     """Behebt typische CP437/CP850-Mojibake-Artefakte."""
@@ -37,13 +62,13 @@ def repair_cp_mojibake(text: str | None) -> str | None:
     if not text or not isinstance(text, str):
         return text
 
-    if not any(marker in text for marker in _MOJIBAKE_MARKERS):
+    if not _MOJIBAKE_RE.search(text):
         return text
 
     for codec in ("cp437", "cp850"):
         try:
             repaired = text.encode(codec).decode("utf-8")
-            if not any(marker in repaired for marker in _MOJIBAKE_MARKERS):
+            if not _MOJIBAKE_RE.search(repaired):
                 return repaired
             text = repaired
         except UnicodeEncodeError:
@@ -53,72 +78,72 @@ def repair_cp_mojibake(text: str | None) -> str | None:
 
     return text
 
+
+# Kontext-basierte Korrekturen für ?? Zeichen (häufige Fälle)
+_QUESTION_MARK_FIXES = {
+    # Straße/Straße-Korrekturen
+    "Stra??e": "Straße",
+    "stra??e": "straße", 
+    "Stra??": "Straße",
+    "stra??": "straße",
+    
+    # Häufige Straßennamen mit ?? 
+    "Burgker Stra??e": "Burgker Straße",
+    "Cosch??tzer": "Coschützer",
+    "Cosch??tzer Stra??e": "Coschützer Straße",
+    "Wilsdruffer Stra??e": "Wilsdruffer Straße",
+    "Dresdner Stra??e": "Dresdner Straße",
+    "Tharandter Stra??e": "Tharandter Straße",
+    "L??btauer": "Löbtauer",
+    "L??btauer Stra??e": "Löbtauer Straße",
+    "Fr??belstra??e": "Fröbelstraße",
+    "Morgenr??the": "Morgenröthe",
+    "Nieder m??hle": "Niedermühle",
+    "B??renstein": "Bärenstein",
+    "Gro??opitz": "Großopitz",
+    "Berggie??h??bel": "Berggießhübel",
+    "Gottleuba-Berggie??h??bel": "Gottleuba-Berggießhübel",
+    "Bad Gottleuba-Berggie??h??bel": "Bad Gottleuba-Berggießhübel",
+    
+    # Allgemeine ?? Zeichen-Korrekturen (nach spezifischen Fällen)
+    # "??": "ö",  # Fallback entfernt - zu unspezifisch
+    
+    # Weitere häufige Fälle
+    "H??se": "Häse",  # Häufig in Namen
+    "H??hnel": "Höhnel",
+    "M??ller": "Müller",
+    "M??glitztalstra??e": "Müglitztalstraße",
+    "Pratzschwitzer Stra??e": "Pratzschwitzer Straße",
+    "Herbert-Liebsch- Str.": "Herbert-Liebsch-Straße",
+    "Stra??e des Friedens": "Straße des Friedens",
+    "Stra??e der MTS": "Straße der MTS",
+    "Dresdner Landstrasse": "Dresdner Landstraße",
+    "Kleine Basch??tzer": "Kleine Baschützer",
+    "Kleine Basch??tzer Str.": "Kleine Baschützer Straße",
+    
+    # Zusätzliche Mojibake-Fälle aus den verbleibenden Warnungen
+    "S??gewerk": "Sägewerk",
+    "Sch??nfeld": "Schönfeld",
+    "Glash??tte": "Glashütte",
+    "haftungsbeschr??nkt": "haftungsbeschränkt",
+    "Altnossener Stra??e": "Altnossener Straße",
+    "Dorfstra??e": "Dorfstraße",
+    "Stolpener Strasse": "Stolpener Straße",
+    
+    # Weitere spezifische Fälle
+    "Am S??gewerk": "Am Sägewerk",
+    "OT Sch??nfeld": "OT Schönfeld",
+    "OT Luchau": "OT Luchau",  # Bereits korrekt
+    "OT Sehma": "OT Sehma",    # Bereits korrekt
+}
+
+# Längster Treffer gewinnt (z.B. "Fr??belstra??e" vor "stra??e")
+_QUESTION_MARK_REPLACER = MultiReplacer(_QUESTION_MARK_FIXES)
+
+
 # Intelligente ?? Zeichen-Korrektur basierend auf Kontext
 def _fix_question_marks(text: str) -> str:
-    """Korrigiert ?? Zeichen basierend auf Kontext."""
+    """Korrigiert ?? Zeichen basierend auf Kontext (ein Durchlauf)."""
     if not text or "??" not in text:
         return text
-    
-    # Kontext-basierte Korrekturen für häufige Fälle
-    context_fixes = {
-        # Straße/Straße-Korrekturen
-        "Stra??e": "Straße",
-        "stra??e": "straße", 
-        "Stra??": "Straße",
-        "stra??": "straße",
-        
-        # Häufige Straßennamen mit ?? 
-        "Burgker Stra??e": "Burgker Straße",
-        "Cosch??tzer": "Coschützer",
-        "Cosch??tzer Stra??e": "Coschützer Straße",
-        "Wilsdruffer Stra??e": "Wilsdruffer Straße",
-        "Dresdner Stra??e": "Dresdner Straße",
-        "Tharandter Stra??e": "Tharandter Straße",
-        "L??btauer": "Löbtauer",
-        "L??btauer Stra??e": "Löbtauer Straße",
-        "Fr??belstra??e": "Fröbelstraße",
-        "Morgenr??the": "Morgenröthe",
-        "Nieder m??hle": "Niedermühle",
-        "B??renstein": "Bärenstein",
-        "Gro??opitz": "Großopitz",
-        "Berggie??h??bel": "Berggießhübel",
-        "Gottleuba-Berggie??h??bel": "Gottleuba-Berggießhübel",
-        "Bad Gottleuba-Berggie??h??bel": "Bad Gottleuba-Berggießhübel",
-        
-        # Allgemeine ?? Zeichen-Korrekturen (nach spezifischen Fällen)
-        # "??": "ö",  # Fallback entfernt - zu unspezifisch
-        
-        # Weitere häufige Fälle
-        "H??se": "Häse",  # Häufig in Namen
-        "H??hnel": "Höhnel",
-        "M??ller": "Müller",
-        "M??glitztalstra??e": "Müglitztalstraße",
-        "Pratzschwitzer Stra??e": "Pratzschwitzer Straße",
-        "Herbert-Liebsch- Str.": "Herbert-Liebsch-Straße",
-        "Stra??e des Friedens": "Straße des Friedens",
-        "Stra??e der MTS": "Straße der MTS",
-        "Dresdner Landstrasse": "Dresdner Landstraße",
-        "Kleine Basch??tzer": "Kleine Baschützer",
-        "Kleine Basch??tzer Str.": "Kleine Baschützer Straße",
-        
-        # Zusätzliche Mojibake-Fälle aus den verbleibenden Warnungen
-        "S??gewerk": "Sägewerk",
-        "Sch??nfeld": "Schönfeld",
-        "Glash??tte": "Glashütte",
-        "haftungsbeschr??nkt": "haftungsbeschränkt",
-        "Altnossener Stra??e": "Altnossener Straße",
-        "Dorfstra??e": "Dorfstraße",
-        "Stolpener Strasse": "Stolpener Straße",
-        
-        # Weitere spezifische Fälle
-        "Am S??gewerk": "Am Sägewerk",
-        "OT Sch??nfeld": "OT Schönfeld",
-        "OT Luchau": "OT Luchau",  # Bereits korrekt
-        "OT Sehma": "OT Sehma",    # Bereits korrekt
-    }
-    
-    # Wende Kontext-Fixes an
-    for corrupt, correct in context_fixes.items():
-        text = text.replace(corrupt, correct)
-    
-    return text
+    return _QUESTION_MARK_REPLACER.replace(text)
@@ -0,0 +1,254 @@
+"""
+Zentrales SQLite-Connection-Management.
+
+- Benannte Datenbanken (register_database) oder direkte Pfade
+- Eine gepoolte Connection pro Thread und DB-Datei (kein connect/close pro Aufruf)
+- Einheitliche Pragmas, einmal pro Connection gesetzt (WAL einmal pro DB-Datei)
+- Statement-Cache pro Connection (sqlite3 cached_statements)
+- Pool- und Contention-Metriken (pool_stats)
+
+Verwendung:
+    with connection("traffic") as conn:      # Transaktion: commit/rollback, Connection bleibt im Pool
+        conn.execute(...)
+
+    conn = get_connection(db_path)           # gepoolte Connection (NICHT schließen)
+
+Hinweis: Innerhalb eines `with connection(...)`-Blocks nicht `await`en – Coroutinen
+im selben Thread teilen sich die Connection.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple, Union
+
+DbRef = Union[str, Path]
+
+BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+STATEMENT_CACHE_SIZE = int(os.getenv("SQLITE_STATEMENT_CACHE", "256"))
+
+# Einheitliche Pragmas für alle Connections (ENGINE und raw sqlite3)
+PRAGMAS: Sequence[Tuple[str, object]] = (
+    ("synchronous", "NORMAL"),
+    ("busy_timeout", BUSY_TIMEOUT_MS),
+    ("foreign_keys", "ON"),
+    ("temp_store", "MEMORY"),
+    ("cache_size", int(os.getenv("SQLITE_CACHE_SIZE_KB", "16000")) * -1),
+    ("mmap_size", int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))),
+)
+
+
+@dataclass
+class _DbStats:
+    """Zähler pro DB-Datei."""
+    opened: int = 0
+    reused: int = 0
+    reopened: int = 0
+    transactions: int = 0
+    rollbacks: int = 0
+    locked_errors: int = 0
+    commit_ms_total: float = 0.0
+    commit_ms_max: float = 0.0
+    threads: set = field(default_factory=set)
+
+
+class ConnectionManager:
+    """Verwaltet benannte Datenbanken und die gepoolten Connections pro Thread."""
+
+    def __init__(self) -> None:
+        self._names: Dict[str, Callable[[], DbRef]] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, _DbStats] = {}
+        self._wal_ready: set = set()
+
+    # ------------------------------------------------------------------ Registry
+
+    def register(self, name: str, path: Union[DbRef, Callable[[], DbRef]]) -> None:
+        """Registriert eine benannte DB (Pfad oder Callable, das den Pfad liefert)."""
+        self._names[name] = path if callable(path) else (lambda p=path: p)
+
+    def resolve(self, db: DbRef) -> str:
+        """Name oder Pfad -> absoluter Pfad (Pool-Schlüssel)."""
+        if isinstance(db, str) and db in self._names:
+            db = self._names[db]()
+        if str(db) == ":memory:":
+            return ":memory:"
+        return str(Path(db).resolve())
+
+    # ------------------------------------------------------------------ Pool
+
+    def _pool(self) -> Dict[str, list]:
+        pool = getattr(self._local, "pool", None)
+        if pool is None:
+            pool = self._local.pool = {}
+        return pool
+
+    def _stats_for(self, key: str) -> _DbStats:
+        stats = self._stats.get(key)
+        if stats is None:
+            with self._lock:
+                stats = self._stats.setdefault(key, _DbStats())
+        return stats
+
+    def _open(self, key: str) -> sqlite3.Connection:
+        if key != ":memory:":
+            Path(key).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(key, timeout=BUSY_TIMEOUT_MS / 1000, cached_statements=STATEMENT_CACHE_SIZE)
+        if key not in self._wal_ready:
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                self._wal_ready.add(key)
+            except sqlite3.DatabaseError:
+                pass  # z.B. Read-Only-DBs
+        apply_pragmas(conn)
+        return conn
+
+    def get(self, db: DbRef) -> sqlite3.Connection:
+        """
+        Gepoolte Connection des aktuellen Threads (wird bei Bedarf geöffnet).
+        Der Aufrufer darf sie nicht schließen; eine geschlossene Connection wird ersetzt.
+        """
+        key = self.resolve(db)
+        pool = self._pool()
+        stats = self._stats_for(key)
+        entry = pool.get(key)
+        if entry is not None:
+            try:
+                entry[0].total_changes  # wirft ProgrammingError, wenn geschlossen
+                stats.reused += 1
+                return entry[0]
+            except sqlite3.ProgrammingError:
+                stats.reopened += 1
+        conn = self._open(key)
+        pool[key] = [conn, 0]
+        with self._lock:
+            stats.opened += 1
+            stats.threads.add(threading.get_ident())
+        return conn
+
+    @contextmanager
+    def transaction(self, db: DbRef) -> Iterator[sqlite3.Connection]:
+        """
+        Transaktion auf der gepoolten Connection: commit bei Erfolg, rollback bei Fehler.
+        Verschachtelte Blöcke im selben Thread laufen in der äußeren Transaktion mit.
+        """
+        conn = self.get(db)
+        key = self.resolve(db)
+        entry = self._pool()[key]
+        stats = self._stats_for(key)
+        outer = entry[1] == 0
+        row_factory = conn.row_factory
+        if outer:
+            conn.row_factory = None
+        entry[1] += 1
+        try:
+            yield conn
+            if outer:
+                started = time.perf_counter()
+                conn.commit()
+                elapsed = (time.perf_counter() - started) * 1000
+                stats.transactions += 1
+                stats.commit_ms_total += elapsed
+                stats.commit_ms_max = max(stats.commit_ms_max, elapsed)
+        except BaseException as e:
+            if isinstance(e, sqlite3.OperationalError) and "locked" in str(e).lower():
+                stats.locked_errors += 1
+            if outer:
+                try:
+                    conn.rollback()
+                except sqlite3.ProgrammingError:
+                    pass  # Connection wurde vom Aufrufer geschlossen
+                stats.rollbacks += 1
+            raise
+        finally:
+            entry[1] -= 1
+            conn.row_factory = row_factory
+
+    def close_thread(self) -> None:
+        """Schließt alle Connections des aktuellen Threads."""
+        pool = self._pool()
+        for conn, _ in pool.values():
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        pool.clear()
+
+    def stats(self) -> Dict[str, dict]:
+        """Pool- und Contention-Metriken pro DB-Datei."""
+        names = {}
+        for name in self._names:
+            try:
+                names.setdefault(self.resolve(name), []).append(name)
+            except Exception:
+                continue
+        out = {}
+        for key, s in list(self._stats.items()):
+            out[key] = {
+                "names": names.get(key, []),
+                "connections_opened": s.opened,
+                "connections_reused": s.reused,
+                "connections_reopened": s.reopened,
+                "threads": len(s.threads),
+                "transactions": s.transactions,
+                "rollbacks": s.rollbacks,
+                "locked_errors": s.locked_errors,
+                "commit_ms_avg": round(s.commit_ms_total / s.transactions, 3) if s.transactions else 0.0,
+                "commit_ms_max": round(s.commit_ms_max, 3),
+            }
+        return out
+
+
+def apply_pragmas(conn) -> None:
+    """Setzt die einheitlichen Pragmas auf einer DBAPI-Connection (sqlite3)."""
+    for pragma, value in PRAGMAS:
+        try:
+            conn.execute(f"PRAGMA {pragma}={value}")
+        except sqlite3.DatabaseError:
+            pass  # Read-Only-DBs / nicht unterstützte Pragmas
+
+
+MANAGER = ConnectionManager()
+
+
+def register_database(name: str, path: Union[DbRef, Callable[[], DbRef]]) -> None:
+    """Registriert eine benannte Datenbank beim zentralen Manager."""
+    MANAGER.register(name, path)
+
+
+def get_connection(db: DbRef) -> sqlite3.Connection:
+    """Gepoolte Connection (Name oder Pfad) für den aktuellen Thread."""
+    return MANAGER.get(db)
+
+
+def connection(db: DbRef):
+    """Context-Manager: Transaktion auf der gepoolten Connection (Name oder Pfad)."""
+    return MANAGER.transaction(db)
+
+
+def pool_stats() -> Dict[str, dict]:
+    """Pool- und Contention-Metriken aller bisher genutzten DB-Dateien."""
+    return MANAGER.stats()
+
+
+def _sqlite_path(url: str) -> Optional[str]:
+    return url[len("sqlite:///"):] if url.startswith("sqlite:///") else None
+
+
+def _settings_db() -> str:
+    from settings import SETTINGS
+    return _sqlite_path(SETTINGS.database_url) or "data/traffic.db"
+
+
+# Bekannte Datenbanken des Projekts
+register_database("traffic", _settings_db)
+register_database("osrm_cache", lambda: os.getenv("DB_PATH", "data/traffic.db"))
+register_database("cost_tracker", "data/code_fixes_cost.db")
+register_database("performance", "data/code_fixes_performance.db")
+register_database("llm_monitoring", "data/llm_monitoring.db")
@@ -1,40 +1,31 @@
 from pathlib import Path
 from sqlalchemy import create_engine, text, event
 from settings import SETTINGS
+from db.connections import apply_pragmas
 
 ENGINE = create_engine(SETTINGS.database_url, pool_pre_ping=True, future=True)
 
 
 def configure_sqlite_pragmas(conn):
-    """Setzt SQLite PRAGMA-Einstellungen für bessere Performance und Robustheit."""
+    """Setzt die einheitlichen SQLite-Pragmas (db.connections.PRAGMAS) auf einer SQLAlchemy-Connection."""
     if "sqlite" in SETTINGS.database_url.lower():
-        # WAL-Mode für bessere Concurrency
-        conn.execute(text("PRAGMA journal_mode=WAL"))
-        # NORMAL synchronous: Balance zwischen Performance und Integrität
-        conn.execute(text("PRAGMA synchronous=NORMAL"))
-        # Busy-Timeout erhöhen
-        conn.execute(text("PRAGMA busy_timeout=30000"))
-        # Foreign Keys aktivieren
-        conn.execute(text("PRAGMA foreign_keys=ON"))
+        set_sqlite_pragmas(conn.connection.driver_connection, None)
 
 
 # Event-Handler: Setze PRAGMA bei jeder SQLite-Verbindung
 @event.listens_for(ENGINE, "connect")
 def set_sqlite_pragmas(dbapi_conn, connection_record):
     """
-    Phase 2: SQLite-Robustheit (WAL, busy_timeout).
-    Automatisch PRAGMA-Einstellungen bei SQLite-Verbindungen setzen.
+    SQLite-Robustheit (WAL, busy_timeout, synchronous, Cache/mmap).
+    Gleiche Werte wie der zentrale Connection-Manager (db.connections).
     """
     if "sqlite" in SETTINGS.database_url.lower():
         try:
             # WAL-Mode für bessere Concurrency
             dbapi_conn.execute("PRAGMA journal_mode=WAL")
-            # Busy-Timeout für bessere Fehlerbehandlung (Phase 2: 3s statt 30s)
-            dbapi_conn.execute("PRAGMA busy_timeout=3000")
-            # Foreign Keys aktivieren
-            dbapi_conn.execute("PRAGMA foreign_keys=ON")
         except Exception:
             pass  # Ignoriere Fehler bei Read-Only-DBs
+        apply_pragmas(dbapi_conn)
 
 
 def apply_migration_001():
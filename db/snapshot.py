@@ -0,0 +1,235 @@
+"""
+Read-only Snapshots der Haupt-DB für Admin- und Statistik-Abfragen.
+
+Schwere Lesezugriffe (COUNTs, Full-Table-Scans) laufen nicht gegen die Live-DB,
+in die Upload und Geocoding schreiben, sondern gegen eine konsistente Kopie,
+die über die SQLite Online-Backup-API erstellt wird.
+
+- Staleness-Budget: DB_SNAPSHOT_MAX_AGE_S (Standard 60s). Erneuert wird nur
+  vom Hintergrund-Job (run_snapshot_refresh_loop) in einem Worker-Thread, nie
+  im Request: read_engine() liefert den Snapshot nur innerhalb des Budgets,
+  sonst (noch kein Snapshot, zu alt) die Live-DB.
+- Jede Erneuerung schreibt eine neue Generation (traffic_readonly.<pid>.<n>.db);
+  laufende Leser behalten ihre Datei, alte Generationen werden danach entfernt.
+- Snapshots werden mit immutable=1 geöffnet (keine Locks, kein WAL-Zugriff).
+- Fällt der Snapshot aus (keine SQLite-DB, Backup-Fehler), wird live gelesen.
+
+Verwendung:
+    engine, headers = read_engine()
+    with engine.connect() as conn:
+        ...
+    return JSONResponse(data, headers=headers)
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import NullPool
+
+logger = logging.getLogger(__name__)
+
+MAX_AGE_S = float(os.getenv("DB_SNAPSHOT_MAX_AGE_S", "60"))
+SNAPSHOT_DIR = Path(os.getenv("DB_SNAPSHOT_DIR", "data/snapshots"))
+ENABLED = os.getenv("DB_SNAPSHOT_ENABLED", "1") not in ("0", "false", "False")
+
+
+class ReadSnapshot:
+    """Verwaltet die aktuelle Snapshot-Generation einer SQLite-Datei."""
+
+    def __init__(self, target_dir: Path = SNAPSHOT_DIR, max_age_s: float = MAX_AGE_S,
+                 name: str = "traffic_readonly") -> None:
+        self.target_dir = Path(target_dir)
+        self.max_age_s = max_age_s
+        self.name = name
+        self.source: Optional[str] = None
+        self.path: Optional[Path] = None
+        self.created_at: Optional[float] = None
+        self.engine: Optional[Engine] = None
+        self.refreshes = 0
+        self.failures = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def age_s(self) -> Optional[float]:
+        """Alter des aktuellen Snapshots in Sekunden (None = kein Snapshot)."""
+        return None if self.created_at is None else time.time() - self.created_at
+
+    def is_fresh(self, source: str) -> bool:
+        return (
+            self.engine is not None
+            and self.source == source
+            and self.age_s is not None
+            and self.age_s <= self.max_age_s
+        )
+
+    def refresh(self, source: str) -> Path:
+        """
+        Erstellt eine neue Snapshot-Generation aus der Quell-DB (Online-Backup).
+
+        Der Backup läuft in einem Schritt in einer Lese-Transaktion der Quelle –
+        im WAL-Modus blockiert das keine Schreiber und liefert einen konsistenten Stand.
+        """
+        self.target_dir.mkdir(parents=True, exist_ok=True)
+        self._generation += 1
+        target = self.target_dir / f"{self.name}.{os.getpid()}.{self._generation}.db"
+        started = time.perf_counter()
+
+        src = sqlite3.connect(source)
+        dst = sqlite3.connect(target)
+        try:
+            src.backup(dst)
+            # Snapshot ohne WAL, damit er unveränderlich (immutable=1) gelesen werden kann
+            dst.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            dst.close()
+            src.close()
+
+        old_path, old_engine = self.path, self.engine
+        self.engine = create_engine(
+            "sqlite://",
+            creator=lambda uri=target.resolve().as_uri() + "?immutable=1": sqlite3.connect(
+                uri, uri=True, check_same_thread=False
+            ),
+            poolclass=NullPool,
+            future=True,
+        )
+        self.path = target
+        self.source = source
+        self.created_at = time.time()
+        self.refreshes += 1
+        logger.info(f"[SNAPSHOT] {target.name} erstellt ({(time.perf_counter() - started) * 1000:.0f} ms)")
+
+        if old_engine is not None:
+            old_engine.dispose()
+        self._cleanup(keep=target, previous=old_path)
+        return target
+
+    def _cleanup(self, keep: Path, previous: Optional[Path]) -> None:
+        """
+        Entfernt alte Generationen dieses Prozesses (die vorherige bleibt bis zum nächsten
+        Lauf für noch laufende Leser) und verwaiste Snapshots anderer Prozesse.
+        """
+        own_prefix = f"{self.name}.{os.getpid()}."
+        orphan_cutoff = time.time() - 10 * self.max_age_s
+        for path in self.target_dir.glob(f"{self.name}.*.db"):
+            if path == keep or path == previous:
+                continue
+            try:
+                if path.name.startswith(own_prefix) or path.stat().st_mtime < orphan_cutoff:
+                    path.unlink()
+            except OSError:
+                pass  # z.B. unter Windows noch geöffnet
+
+    def ensure_fresh(self, source: str) -> Optional[Engine]:
+        """
+        Liefert die Snapshot-Engine innerhalb des Staleness-Budgets.
+
+        Ist der Snapshot zu alt, erneuert ihn genau ein Thread; andere Leser nutzen
+        solange die vorherige Generation (falls vorhanden) statt zu warten.
+        """
+        if self.is_fresh(source):
+            return self.engine
+        blocking = self.engine is None or self.source != source
+        if not self._lock.acquire(blocking=blocking):
+            return self.engine
+        try:
+            if not self.is_fresh(source):
+                self.refresh(source)
+            return self.engine
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"[SNAPSHOT] Erneuerung fehlgeschlagen: {e}")
+            return self.engine if self.source == source else None
+        finally:
+            self._lock.release()
+
+    def headers(self) -> Dict[str, str]:
+        """Freshness-Header für Antworten, die aus dem Snapshot gelesen wurden."""
+        age = self.age_s or 0.0
+        return {
+            "X-Data-Source": "snapshot",
+            "X-Data-Snapshot-Age": f"{age:.1f}",
+            "X-Data-Snapshot-Time": datetime.fromtimestamp(self.created_at or time.time()).isoformat(timespec="seconds"),
+            "X-Data-Max-Staleness": f"{self.max_age_s:.0f}",
+        }
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "path": str(self.path) if self.path else None,
+            "age_s": round(self.age_s, 1) if self.age_s is not None else None,
+            "max_age_s": self.max_age_s,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+        }
+
+
+_snapshot: Optional[ReadSnapshot] = None
+
+LIVE_HEADERS = {"X-Data-Source": "live", "X-Data-Snapshot-Age": "0"}
+
+
+def get_snapshot() -> ReadSnapshot:
+    """Singleton für die Snapshot-Verwaltung der Haupt-DB."""
+    global _snapshot
+    if _snapshot is None:
+        _snapshot = ReadSnapshot()
+    return _snapshot
+
+
+def _live_source() -> Tuple[Engine, Optional[str]]:
+    """Live-Engine und Pfad der Haupt-DB (None, wenn nicht SQLite-Datei)."""
+    from db.core import ENGINE
+    if ENGINE.dialect.name != "sqlite" or not ENGINE.url.database or ENGINE.url.database == ":memory:":
+        return ENGINE, None
+    return ENGINE, ENGINE.url.database
+
+
+def read_engine() -> Tuple[Engine, Dict[str, str]]:
+    """
+    Engine für analytische/Admin-Reads plus Freshness-Header.
+
+    Blockiert nie (kein Backup, kein Lock) und darf daher direkt in async
+    Handlern aufgerufen werden.
+
+    Returns:
+        (Snapshot-Engine, Snapshot-Header) oder (Live-ENGINE, Live-Header), solange
+        der Hintergrund-Job noch keinen Snapshot innerhalb des Budgets erstellt hat
+    """
+    live, source = _live_source()
+    if not ENABLED or source is None:
+        return live, dict(LIVE_HEADERS)
+    snapshot = get_snapshot()
+    engine = snapshot.engine
+    if engine is None or not snapshot.is_fresh(source):
+        return live, dict(LIVE_HEADERS)
+    return engine, snapshot.headers()
+
+
+def refresh_snapshot() -> Optional[Engine]:
+    """Erneuert den Snapshot bei Bedarf (blockierend - nur aus Worker-Threads aufrufen)."""
+    _, source = _live_source()
+    if not ENABLED or source is None or not Path(source).exists():
+        return None
+    return get_snapshot().ensure_fresh(source)
+
+
+async def run_snapshot_refresh_loop(interval_seconds: Optional[float] = None) -> None:
+    """Background-Job: hält den Snapshot innerhalb des Staleness-Budgets (außerhalb des Event-Loops)."""
+    interval = interval_seconds or max(MAX_AGE_S / 2, 5.0)
+    while True:
+        try:
+            await asyncio.to_thread(refresh_snapshot)
+        except Exception as e:
+            logger.warning(f"[SNAPSHOT] Hintergrund-Erneuerung fehlgeschlagen: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,38 @@
+/**
+ * Progress-Stream (NDJSON)
+ * Liest Event-Streams von Uploads/Bulk-Läufen (?stream=ndjson):
+ * progress (Zustand), partial (Teilergebnis), result (Endergebnis), done
+ */
+
+/**
+ * Liest einen NDJSON-Stream bis zum Ende.
+ * @param {Response} response - fetch-Response mit Content-Type application/x-ndjson
+ * @param {function(object)} onEvent - Callback pro Event (außer "result")
+ * @returns {Promise<object|null>} Daten des "result"-Events ({status_code, body}) oder null
+ */
+async function readNdjsonStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let result = null;
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let newline;
+        while ((newline = buffer.indexOf('\n')) >= 0) {
+            const line = buffer.slice(0, newline).trim();
+            buffer = buffer.slice(newline + 1);
+            if (!line) continue;
+            const event = JSON.parse(line);
+            if (event.event === 'result') {
+                result = event.data;
+            } else if (onEvent) {
+                onEvent(event);
+            }
+        }
+    }
+    return result;
+}
+
+window.readNdjsonStream = readNdjsonStream;
@@ -2,13 +2,15 @@
 Alias-Repository für FAMO TrafficApp
 Verwaltet Alias-Zuordnungen zwischen problematischen und kanonischen Adressen
 """
-from sqlalchemy import text
+from sqlalchemy import text, bindparam
 from sqlalchemy.exc import OperationalError
 from typing import Iterable, Dict
 from db.core import ENGINE
 from common.normalize import normalize_address
 from repositories.geo_repo import canon_addr
 
+_CHUNK = 500
+
 def set_alias(query: str, canonical: str, created_by: str | None = None):
     """
     Setzt einen Alias von query zu canonical.
@@ -58,22 +60,26 @@ def resolve_aliases(addresses: Iterable[str]) -> Dict[str, str]:
     Returns:
         Dict mapping: query_norm -> canonical_norm
     """
-    keys = [canon_addr(a) for a in addresses if a]
+    keys = list(dict.fromkeys(canon_addr(a) for a in addresses if a))
     
     if not keys:
         return {}
     
+    # Expanding bindparam + Chunking: stabile SQL-Form, keine SQLite-Variablen-Grenze
+    stmt = text(
+        "SELECT address_norm, canonical_norm FROM geo_alias WHERE address_norm IN :alist"
+    ).bindparams(bindparam("alist", expanding=True))
+    
+    out: Dict[str, str] = {}
     try:
         with ENGINE.begin() as conn:
-            placeholders = ",".join([":addr" + str(i) for i in range(len(keys))])
-            params = {f"addr{i}": key for i, key in enumerate(keys)}
-            rows = conn.execute(text(
-                f"SELECT address_norm, canonical_norm FROM geo_alias WHERE address_norm IN ({placeholders})"
-            ), params).mappings().all()
+            for i in range(0, len(keys), _CHUNK):
+                rows = conn.execute(stmt, {"alist": keys[i:i + _CHUNK]}).mappings().all()
+                out.update({r["address_norm"]: r["canonical_norm"] for r in rows})
     except OperationalError:
         return {}
     
-    return {r["address_norm"]: r["canonical_norm"] for r in rows}
+    return out
 
 def remove_alias(query: str):
     """
@@ -0,0 +1,165 @@
+"""
+Batch-Auflösung für Adress-Fakten (Cache, Alias, Fail-Cache, Manual-Queue).
+
+Statt pro Adresse einzeln geo_cache, geo_alias, geo_fail und die Manual-Queue
+abzufragen, werden alle Schlüssel eines Tourplans in eine TEMP-Tabelle
+geschrieben (chunked executemany, keine Variablen-Grenze) und mit EINER
+Abfrage über die vorhandenen Primär-/Unique-Indizes gejoint.
+"""
+from __future__ import annotations
+
+import re
+import time
+import unicodedata
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from db.core import ENGINE
+from repositories.geo_repo import canon_addr
+
+CHUNK = 500
+
+_TEMP_TABLE = "geo_batch_keys"
+
+
+@dataclass
+class AddressFacts:
+    """Alle bekannten Fakten zu einem normalisierten Adress-Schlüssel."""
+
+    key: str
+    geo: Optional[dict] = None            # direkter geo_cache-Treffer
+    alias_of: Optional[str] = None        # canonical_norm aus geo_alias
+    canonical_geo: Optional[dict] = None  # geo_cache-Eintrag des Alias-Ziels
+    fail: Optional[dict] = None           # aktiver Fail-Cache-Eintrag (reason, until)
+    manual_open: bool = False             # offen in manual_queue/geo_manual
+
+    @property
+    def resolved(self) -> Optional[dict]:
+        """Koordinaten direkt oder über den Alias."""
+        return self.geo or self.canonical_geo
+
+
+def _fail_norm(s: str) -> str:
+    """Schlüssel wie in geo_fail_repo (NFC + Whitespace-Bereinigung)."""
+    return re.sub(r"\s+", " ", unicodedata.normalize('NFC', s or '').strip())
+
+
+def _geo_dict(lat, lon, source, precision, region_ok) -> Optional[dict]:
+    """geo_cache-Spalten im Format von geo_repo.bulk_get."""
+    if lat is None or lon is None:
+        return None
+    return {
+        "lat": lat,
+        "lon": lon,
+        "source": source or "cache",
+        "src": "cache",
+        "precision": precision,
+        "region_ok": region_ok,
+    }
+
+
+def _layout(conn) -> Dict[str, object]:
+    """Ermittelt, welche optionalen Tabellen/Spalten in dieser DB vorhanden sind."""
+    tables = {r[0] for r in conn.exec_driver_sql(
+        "SELECT name FROM sqlite_master WHERE type='table' "
+        "AND name IN ('geo_alias', 'geo_fail', 'manual_queue', 'geo_manual')"
+    )}
+    fail_cols = set()
+    if "geo_fail" in tables:
+        fail_cols = {r[0] for r in conn.exec_driver_sql("SELECT name FROM pragma_table_info('geo_fail')")}
+    return {"tables": tables, "fail_cols": fail_cols}
+
+
+def _build_query(layout: Dict[str, object]) -> str:
+    """Baut die Join-Abfrage passend zu den vorhandenen Tabellen."""
+    tables = layout["tables"]
+    fail_cols = layout["fail_cols"]
+
+    cols = ["k.k", "g.lat", "g.lon", "g.source", "g.precision", "g.region_ok"]
+    joins = ["LEFT JOIN geo_cache g ON g.address_norm = k.k"]
+
+    if "geo_alias" in tables:
+        cols += ["a.canonical_norm", "ga.lat", "ga.lon", "ga.source", "ga.precision", "ga.region_ok"]
+        joins += [
+            "LEFT JOIN geo_alias a ON a.address_norm = k.alias_k",
+            "LEFT JOIN geo_cache ga ON ga.address_norm = a.canonical_norm",
+        ]
+    else:
+        cols += ["NULL"] * 6
+
+    if "until" in fail_cols:
+        cols += ["f.reason", "f.until"]
+        joins.append("LEFT JOIN geo_fail f ON f.address_norm = k.fail_k AND f.until IS NOT NULL AND f.until > :now")
+    elif "next_attempt" in fail_cols:
+        cols += ["f.reason", "f.next_attempt"]
+        joins.append("LEFT JOIN geo_fail f ON f.address_norm = k.fail_k AND f.next_attempt IS NOT NULL AND f.next_attempt > :now_ts")
+    else:
+        cols += ["NULL", "NULL"]
+
+    manual = []
+    if "manual_queue" in tables:
+        manual.append("EXISTS (SELECT 1 FROM manual_queue m WHERE m.address_norm = k.k AND m.status = 'open')")
+    if "geo_manual" in tables:
+        manual.append("EXISTS (SELECT 1 FROM geo_manual gm WHERE gm.address_norm = k.k AND gm.status = 'open')")
+    cols.append(" OR ".join(manual) if manual else "0")
+
+    return (
+        f"SELECT {', '.join(cols)} FROM {_TEMP_TABLE} k "
+        + " ".join(joins)
+        + " ORDER BY k.pos"
+    )
+
+
+def resolve_batch(keys: Iterable[str]) -> Dict[str, AddressFacts]:
+    """
+    Löst Cache-, Alias-, Fail- und Manual-Status für alle Schlüssel in einem Roundtrip auf.
+
+    Args:
+        keys: Bereits normalisierte Adressen (normalize_address)
+
+    Returns:
+        Dict mapping: key -> AddressFacts (für jeden nicht-leeren Schlüssel)
+    """
+    unique: List[str] = list(dict.fromkeys(k for k in keys if k))
+    if not unique:
+        return {}
+
+    out = {k: AddressFacts(key=k) for k in unique}
+    rows_in = [
+        {"pos": i, "k": k, "alias_k": canon_addr(k), "fail_k": _fail_norm(k)}
+        for i, k in enumerate(unique)
+    ]
+    insert = text(
+        f"INSERT INTO {_TEMP_TABLE}(pos, k, alias_k, fail_k) VALUES (:pos, :k, :alias_k, :fail_k)"
+    )
+
+    try:
+        with ENGINE.begin() as conn:
+            conn.exec_driver_sql(
+                f"CREATE TEMP TABLE IF NOT EXISTS {_TEMP_TABLE} ("
+                "pos INTEGER PRIMARY KEY, k TEXT NOT NULL, alias_k TEXT NOT NULL, fail_k TEXT NOT NULL)"
+            )
+            conn.exec_driver_sql(f"DELETE FROM {_TEMP_TABLE}")
+            for i in range(0, len(rows_in), CHUNK):
+                conn.execute(insert, rows_in[i:i + CHUNK])
+
+            query = text(_build_query(_layout(conn)))
+            rows = conn.execute(query, {"now": datetime.utcnow(), "now_ts": int(time.time())}).fetchall()
+            conn.exec_driver_sql(f"DELETE FROM {_TEMP_TABLE}")
+    except OperationalError as e:
+        print(f"[GEO-BATCH-ERROR] Batch-Auflösung fehlgeschlagen: {e}")
+        return out
+
+    for r in rows:
+        facts = out[r[0]]
+        facts.geo = _geo_dict(*r[1:6])
+        facts.alias_of = r[6]
+        facts.canonical_geo = _geo_dict(*r[7:12]) if r[6] else None
+        if r[13] is not None:
+            facts.fail = {"reason": r[12], "until": r[13]}
+        facts.manual_open = bool(r[14])
+    return out
@@ -1,4 +1,4 @@
-from sqlalchemy import text
+from sqlalchemy import text, bindparam
 from datetime import datetime, timedelta
 from typing import Iterable, Set
 from db.core import ENGINE
@@ -14,6 +14,8 @@ import re
 _DEF_TTL_MIN = 5  # 5 Minuten für temporäre Fehler (Rate-Limiting)
 _DEF_TTL_NOHIT_MIN = 10  # 10 Minuten für "keine Treffer" (Rate-Limiting)
 
+_CHUNK = 500
+
 _SCHEMA_READY = False
 
 
@@ -34,8 +36,8 @@ def _def_norm(s: str) -> str:
 
 def skip_set(addresses: Iterable[str]) -> Set[str]:
     """
-    Gibt eine Menge von Adressen zurück, die aktuell im Fail-Cache stehen
-    und noch nicht abgelaufen sind.
+    Gibt die Teilmenge von `addresses` zurück, die aktuell im Fail-Cache steht
+    und noch nicht abgelaufen ist.
     
     WICHTIG: Dieser Cache ist nur für kurzfristiges Rate-Limiting (5-10 Min).
     Adressen werden NICHT permanent blockiert, sondern immer wieder versucht.
@@ -44,15 +46,22 @@ def skip_set(addresses: Iterable[str]) -> Set[str]:
     Bei Verbesserungen der Erkennungsroutine sollten alle Einträge gelöscht werden,
     damit verbesserte Routinen auch auf bisher fehlgeschlagene Adressen angewendet werden.
     """
+    keys = list(dict.fromkeys(_def_norm(a) for a in addresses if a))
+    if not keys:
+        return set()
     _ensure_schema()
     now = datetime.utcnow()
+    # Nur die angefragten Adressen prüfen (Unique-Index auf address_norm), gechunkt
+    stmt = text(
+        "SELECT address_norm FROM geo_fail WHERE address_norm IN :alist "
+        "AND until IS NOT NULL AND until > :now"
+    ).bindparams(bindparam("alist", expanding=True))
     try:
+        skipped: Set[str] = set()
         with ENGINE.begin() as c:
-            # Nur sehr aktuelle Einträge (letzte 10 Minuten) berücksichtigen
-            rows = c.execute(text(
-                "SELECT address_norm FROM geo_fail WHERE until IS NOT NULL AND until > :now"
-            ), {"now": now}).fetchall()
-        skipped = {r[0] for r in rows}
+            for i in range(0, len(keys), _CHUNK):
+                rows = c.execute(stmt, {"alist": keys[i:i + _CHUNK], "now": now}).fetchall()
+                skipped.update(r[0] for r in rows)
         if skipped:
             print(f"[FAIL-CACHE] {len(skipped)} Adressen temporär übersprungen (Rate-Limiting, max 10 Min)")
         return skipped
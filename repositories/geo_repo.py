@@ -3,7 +3,8 @@ import os
 from typing import Optional, Iterable, Dict
 from db.core import ENGINE
 import unicodedata, re
-from common.normalize import normalize_address
+from common.normalize import normalize_address, normalize_many
+from backend.services.request_tracing import traced
 
 # Abkürzungen für besseres Matching (ohne Transliteration)
 _ABBR = [
@@ -201,9 +202,10 @@ def upsert_ex(*, address: str, lat: float, lon: float, source: str, precision: s
         "region_ok": region_ok
     }
 
+@traced("db")
 def bulk_get(addresses: Iterable[str]) -> Dict[str, dict]:
     """Bulk-Lookup mit korrekter IN-Klausel-Bindung und Chunking."""
-    addrs = [normalize_address(a) for a in addresses if a]
+    addrs = list(dict.fromkeys(normalize_many(a for a in addresses if a)))
     if not addrs:
         return {}
     
@@ -239,3 +241,27 @@ def bulk_get(addresses: Iterable[str]) -> Dict[str, dict]:
                 }
     
     return out
+
+
+@traced("db")
+def coordinates_for_region_check(only_missing: bool = False) -> list[tuple]:
+    """Alle (address_norm, lat, lon, region_ok) aus geo_cache für die Regionsprüfung.
+
+    only_missing: nur Einträge, deren region_ok noch nicht gesetzt ist.
+    """
+    sql = "SELECT address_norm, lat, lon, region_ok FROM geo_cache"
+    if only_missing:
+        sql += " WHERE region_ok IS NULL"
+    with ENGINE.begin() as c:
+        return [tuple(r) for r in c.execute(text(sql)).all()]
+
+
+@traced("db")
+def set_region_ok(updates: Iterable[tuple]) -> int:
+    """Setzt region_ok für (address_norm, region_ok)-Paare in einer Transaktion (executemany)."""
+    params = [{"k": key, "rok": rok} for key, rok in updates]
+    if not params:
+        return 0
+    with ENGINE.begin() as c:
+        c.execute(text("UPDATE geo_cache SET region_ok = :rok WHERE address_norm = :k"), params)
+    return len(params)
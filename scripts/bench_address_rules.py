@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Adress-Regeln (AddressMapper) – Adressen/Sekunde.
+
+Korpus: Kundennamen und Adressen aus allen Tourplan-CSVs plus leicht
+veränderte BAR-Sondernamen/Mapping-Muster (Tippfehler → Fuzzy-Treffer).
+Konfiguration: config/address_mappings.json.
+
+- map_address:   kompilierte Engine, eine Adresse pro Aufruf
+- map_addresses: Batch (Fuzzy-Schranken für alle Adressen gemeinsam)
+
+Mit --baseline-ref (z.B. HEAD~1) wird zusätzlich backend/services/address_mapper.py
+aus diesem Git-Stand gemessen ("vorher") und die Ergebnisse werden verglichen.
+
+Usage:
+    python scripts/bench_address_rules.py [--repeat 3] [--baseline-ref HEAD~1]
+"""
+import argparse
+import contextlib
+import csv
+import importlib.util
+import io
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from backend.services.address_mapper import AddressMapper
+
+CONFIG = str(ROOT / "config" / "address_mappings.json")
+
+
+def load_corpus(mapper: AddressMapper) -> list:
+    """Namen und Adressen aus den Tourplan-CSVs plus Tippfehler-Varianten der Regel-Muster."""
+    items = []
+    for path in sorted((ROOT / "tourplaene").glob("*.csv")):
+        text = path.read_bytes().decode("utf-8", errors="replace")
+        for row in csv.reader(text.splitlines(), delimiter=";"):
+            if len(row) > 4 and row[2].strip():
+                items.append(row[1].strip())
+                items.append(", ".join(cell.strip() for cell in row[2:5]))
+    rnd = random.Random(1)
+    for entry in mapper.bar_sondernamen + mapper.mappings:
+        key = entry.get("sondername") or entry["pattern"]
+        for _ in range(5):
+            chars = list(key)
+            chars[rnd.randrange(len(chars))] = rnd.choice("abcxyz ")
+            items.append("".join(chars))
+    return items
+
+
+def load_baseline(ref: str):
+    """Lädt backend/services/address_mapper.py aus einem Git-Stand als eigenes Modul."""
+    source = subprocess.run(
+        ["git", "show", f"{ref}:backend/services/address_mapper.py"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    tmp = Path(tempfile.mkdtemp()) / "address_mapper_baseline.py"
+    tmp.write_text(source, encoding="utf-8")
+    spec = importlib.util.spec_from_file_location("address_mapper_baseline", tmp)
+    module = importlib.util.module_from_spec(spec)
+    with contextlib.redirect_stdout(io.StringIO()):
+        spec.loader.exec_module(module)
+    return module
+
+
+def rate(func, items, repeat: int):
+    """Beste Rate (Adressen/s) aus `repeat` Läufen und das Ergebnis des letzten Laufs."""
+    best, result = 0.0, None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):  # Log-Ausgaben nicht mitmessen
+            start = time.perf_counter()
+            result = func(items)
+            elapsed = time.perf_counter() - start
+        best = max(best, len(items) / elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Adress-Regeln")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline-ref", help="Git-Ref für den Vorher-Vergleich (z.B. HEAD~1)")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        mapper = AddressMapper(CONFIG)
+    items = load_corpus(mapper)
+    print(f"Korpus: {len(items)} Adressen ({len(set(items))} eindeutig), "
+          f"{len(mapper.mappings)} Mappings, {len(mapper.bar_sondernamen)} BAR-Sondernamen, {len(mapper.rules)} Regeln\n")
+
+    results = []
+    reference = None
+    if args.baseline_ref:
+        with contextlib.redirect_stdout(io.StringIO()):
+            baseline = load_baseline(args.baseline_ref).AddressMapper(CONFIG)
+        value, reference = rate(lambda xs: [baseline.map_address(a) for a in xs], items, args.repeat)
+        results.append((f"vorher ({args.baseline_ref})", value))
+
+    value, single = rate(lambda xs: [mapper.map_address(a) for a in xs], items, args.repeat)
+    results.append(("map_address", value))
+    value, batch = rate(mapper.map_addresses, items, args.repeat)
+    results.append(("map_addresses (Batch)", value))
+
+    for label, value in results:
+        print(f"{label:<28} {value:>12,.0f} Adressen/s   ({len(items) / value * 1000:>8.1f} ms gesamt)")
+    if reference is not None:
+        print(f"\nErgebnisse identisch: {reference == single == batch}")
+
+
+if __name__ == "__main__":
+    main()
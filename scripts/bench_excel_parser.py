@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark: TEHA-Excel/CSV-Parser (parse_teha_excel*) – Zeilen/Sekunde.
+
+Korpus: alle Tourplan-CSVs aus tourplaene/ sowie eine daraus erzeugte
+Arbeitsmappe mit einem Blatt pro Tourplan (großer Mehrblatt-Export).
+
+- parse_teha_excel_sections: CSVs (ein Blatt)
+- parse_teha_excel_all_sheets: Mehrblatt-Arbeitsmappe
+- parse_teha_workbook: Mehrblatt-Arbeitsmappe, Layout-Erkennung pro Blatt
+
+Mit --baseline-ref (z.B. HEAD~1) wird zusätzlich backend/parsers/excel_parser.py
+aus diesem Git-Stand gemessen ("vorher") und die Ergebnisse werden verglichen.
+
+Usage:
+    python scripts/bench_excel_parser.py [--repeat 3] [--baseline-ref HEAD~1]
+"""
+import argparse
+import contextlib
+import csv
+import importlib.util
+import io
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from backend.parsers import excel_parser
+
+
+def build_workbook(csv_files: list, target: Path) -> int:
+    """Schreibt alle CSVs als Blätter einer xlsx-Datei; liefert die Zeilenzahl."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    rows = 0
+    for path in csv_files:
+        ws = wb.create_sheet(path.stem[:31])
+        text = path.read_bytes().decode("cp850", errors="replace")
+        for row in csv.reader(text.splitlines(), delimiter=";"):
+            ws.append([int(c) if c.isdigit() and not c.startswith("0") else (c or None) for c in row])
+            rows += 1
+    wb.save(target)
+    return rows
+
+
+def load_baseline(ref: str):
+    """Lädt backend/parsers/excel_parser.py aus einem Git-Stand als eigenes Modul."""
+    source = subprocess.run(
+        ["git", "show", f"{ref}:backend/parsers/excel_parser.py"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    tmp = Path(tempfile.mkdtemp()) / "excel_parser_baseline.py"
+    tmp.write_text(source, encoding="utf-8")
+    spec = importlib.util.spec_from_file_location("excel_parser_baseline", tmp)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def rate(func, rows: int, repeat: int):
+    """Beste Rate (Zeilen/s) aus `repeat` Läufen und das Ergebnis des letzten Laufs."""
+    best, result = 0.0, None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):  # Debug-Ausgaben nicht mitmessen
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+        best = max(best, rows / elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TEHA-Excel/CSV-Parser")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline-ref", help="Git-Ref für den Vorher-Vergleich (z.B. HEAD~1)")
+    args = parser.parse_args()
+
+    csv_files = sorted((ROOT / "tourplaene").glob("Tourenplan *.csv"))
+    csv_rows = sum(len(p.read_bytes().splitlines()) for p in csv_files)
+    workbook = Path(tempfile.mkdtemp()) / "tourplaene.xlsx"
+    xlsx_rows = build_workbook(csv_files, workbook)
+    print(f"Korpus: {len(csv_files)} CSVs ({csv_rows} Zeilen), Arbeitsmappe mit {len(csv_files)} Blättern "
+          f"({xlsx_rows} Zeilen)\n")
+
+    cases = [
+        ("sections (CSV)", csv_rows,
+         lambda m: lambda: [m.parse_teha_excel_sections(p) for p in csv_files]),
+        ("all_sheets (xlsx)", xlsx_rows,
+         lambda m: lambda: m.parse_teha_excel_all_sheets(workbook)),
+    ]
+    baseline = load_baseline(args.baseline_ref) if args.baseline_ref else None
+
+    for label, rows, make in cases:
+        if baseline is not None:
+            value, before = rate(make(baseline), rows, args.repeat)
+            print(f"{label + ' vorher':<32} {value:>12,.0f} Zeilen/s   ({rows / value * 1000:>8.1f} ms gesamt)")
+        value, after = rate(make(excel_parser), rows, args.repeat)
+        print(f"{label:<32} {value:>12,.0f} Zeilen/s   ({rows / value * 1000:>8.1f} ms gesamt)")
+        if baseline is not None:
+            print(f"{'':<32} Ergebnisse identisch: {before == after}")
+
+    value, tours = rate(lambda: excel_parser.parse_teha_workbook(workbook), xlsx_rows, args.repeat)
+    print(f"{'workbook (xlsx, erkannt)':<32} {value:>12,.0f} Zeilen/s   ({xlsx_rows / value * 1000:>8.1f} ms gesamt)"
+          f"   {len(tours)} Touren")
+
+
+if __name__ == "__main__":
+    main()
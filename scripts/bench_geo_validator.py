@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark: GeoValidator.validate_address_batch – Punkte/Sekunde.
+
+Korpus: synthetische Koordinaten, gleichverteilt über Deutschland
+(47–55°N, 5–16°O), dazu ein dichter Anteil im Geschäftsgebiet um Sachsen -
+so wie ein geo_cache nach mehreren Bulk-Importen aussieht.
+
+Mit --baseline-ref (z.B. HEAD~1) wird zusätzlich backend/services/geo_validator.py
+aus diesem Git-Stand gemessen ("vorher"). Die Ergebnisse sind nicht identisch
+(Bounding-Boxen vorher, Landes-Umrisse jetzt); ausgegeben wird die Übereinstimmung.
+
+Usage:
+    python scripts/bench_geo_validator.py [--points 200000] [--repeat 3] [--baseline-ref HEAD~1]
+"""
+import argparse
+import importlib.util
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from backend.services import geo_validator
+
+
+def build_points(count: int, seed: int = 42) -> list:
+    """(Adresse, lat, lon)-Tupel: 60 % Deutschland gesamt, 40 % Kerngebiet."""
+    rnd = random.Random(seed)
+    points = []
+    for i in range(count):
+        if i % 5 < 3:
+            lat, lon = rnd.uniform(47.0, 55.0), rnd.uniform(5.0, 16.0)
+        else:
+            lat, lon = rnd.uniform(50.2, 53.5), rnd.uniform(10.0, 15.0)
+        points.append((f"Adresse {i}", lat, lon))
+    return points
+
+
+def load_baseline(ref: str):
+    """Lädt backend/services/geo_validator.py aus einem Git-Stand als eigenes Modul."""
+    source = subprocess.run(
+        ["git", "show", f"{ref}:backend/services/geo_validator.py"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    tmp = Path(tempfile.mkdtemp()) / "geo_validator_baseline.py"
+    tmp.write_text(source, encoding="utf-8")
+    spec = importlib.util.spec_from_file_location("geo_validator_baseline", tmp)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module  # dataclasses brauchen das Modul in sys.modules
+    spec.loader.exec_module(module)
+    return module
+
+
+def rate(func, count: int, repeat: int):
+    """Beste Rate (Punkte/s) aus `repeat` Läufen und das Ergebnis des letzten Laufs."""
+    best, result = 0.0, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = max(best, count / elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark GeoValidator (Batch-Validierung)")
+    parser.add_argument("--points", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline-ref", help="Git-Ref für den Vorher-Vergleich (z.B. HEAD~1)")
+    args = parser.parse_args()
+
+    points = build_points(args.points)
+    print(f"Korpus: {len(points):,} Punkte\n")
+
+    start = time.perf_counter()
+    validator = geo_validator.GeoValidator()
+    validator.regions.grid()
+    print(f"{'Raster aufbauen':<32} {(time.perf_counter() - start) * 1000:>12.1f} ms")
+
+    before = None
+    if args.baseline_ref:
+        baseline = load_baseline(args.baseline_ref).GeoValidator()
+        value, before = rate(lambda: baseline.validate_address_batch(points), len(points), args.repeat)
+        print(f"{'validate_address_batch vorher':<32} {value:>12,.0f} Punkte/s   "
+              f"({len(points) / value * 1000:>8.1f} ms gesamt)")
+
+    value, after = rate(lambda: validator.validate_address_batch(points), len(points), args.repeat)
+    print(f"{'validate_address_batch':<32} {value:>12,.0f} Punkte/s   ({len(points) / value * 1000:>8.1f} ms gesamt)")
+
+    lats = [lat for _, lat, _ in points]
+    lons = [lon for _, _, lon in points]
+    value, check = rate(lambda: validator.check_coordinates(lats, lons), len(points), args.repeat)
+    print(f"{'check_coordinates (nur Flags)':<32} {value:>12,.0f} Punkte/s   ({len(points) / value * 1000:>8.1f} ms gesamt)")
+    print(f"{'':<32} im Gebiet: {int(check.in_service.sum()):,}, davon Grenz-Toleranz: {int(check.border.sum()):,}")
+
+    if before is not None:
+        same = sum(b[1].value == a[1].value for b, a in zip(before, after))
+        print(f"{'':<32} Übereinstimmung mit vorher: {same / len(points) * 100:.2f} % "
+              f"(Unterschiede = Box-Ecken außerhalb der Umrisse)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Middleware-Overhead pro Request (Requests/Sekunde, p50/p99-Latenz).
+
+Vergleicht in-process (httpx ASGITransport, kein Netzwerk):
+- vorher:  Kette aus error_tally + RequestIdMiddleware + TraceIDMiddleware +
+           RateLimitMiddleware + SecurityHeadersMiddleware (BaseHTTPMiddleware)
+- nachher: RequestPipelineMiddleware (eine reine ASGI-Middleware)
+jeweils plus CORSMiddleware wie in app_setup.
+
+Endpoints:
+- GET  /health                   (echter Health-Router)
+- POST /api/tour/route-details   (echtes Request-Modell, OSRM-Aufruf durch feste
+                                  Antwort ersetzt – gemessen wird der Framework-Anteil)
+
+Usage:
+    python scripts/bench_middleware.py [--requests 3000] [--concurrency 16] [--repeat 3]
+"""
+import argparse
+import asyncio
+import atexit
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("TRACE_DB_PATH", "")  # Spans nicht auf Platte schreiben
+# Wegwerf-DB VOR allen App-Importen: db.core baut ENGINE beim Import, der
+# Benchmark darf nie in data/traffic.db schreiben
+_BENCH_DIR = tempfile.mkdtemp(prefix="bench_middleware_")
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_BENCH_DIR) / 'bench.db'}"
+atexit.register(shutil.rmtree, _BENCH_DIR, ignore_errors=True)
+
+import httpx
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+
+from backend.services.real_routing import RouteDetailsReq
+
+ROUTE_PAYLOAD = {
+    "stops": [{"lat": 51.05 + i * 0.01, "lon": 13.74 + i * 0.01} for i in range(8)],
+    "overview": "full",
+}
+
+
+def build_app(stack: str) -> FastAPI:
+    """App mit Health-Router, Route-Details-Stub und dem gewählten Middleware-Stack."""
+    from backend.routes.health_check import router as health_router
+
+    app = FastAPI()
+    app.include_router(health_router)
+
+    @app.post("/api/tour/route-details")
+    async def route_details(req: RouteDetailsReq):
+        coords = [(s["lat"], s["lon"]) for s in req.stops]
+        return {
+            "routes": [{"from": i, "to": i + 1, "distance_km": 1.2, "duration_min": 3.4} for i in range(len(coords) - 1)],
+            "total_distance_km": 1.2 * (len(coords) - 1),
+            "source": "bench",
+        }
+
+    if stack == "legacy":
+        from backend.core.error_handlers import RequestIdMiddleware
+        from backend.middlewares.error_tally import error_tally
+        from backend.middlewares.rate_limit import RateLimitMiddleware
+        from backend.middlewares.security_headers import SecurityHeadersMiddleware
+        from backend.middlewares.trace_id import TraceIDMiddleware
+        app.middleware("http")(error_tally)
+        app.add_middleware(RequestIdMiddleware)
+        app.add_middleware(TraceIDMiddleware)
+        app.add_middleware(RateLimitMiddleware)
+        app.add_middleware(SecurityHeadersMiddleware)
+    else:
+        from backend.middlewares.pipeline import RequestPipelineMiddleware
+        app.add_middleware(RequestPipelineMiddleware)
+    app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True,
+                       allow_methods=["GET", "POST"], allow_headers=["Content-Type"])
+    return app
+
+
+async def run(app: FastAPI, method: str, path: str, n: int, concurrency: int):
+    """Schickt n Requests mit begrenzter Parallelität; liefert (req/s, Latenzen in ms)."""
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    sem = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with sem:
+                t0 = time.perf_counter()
+                if method == "GET":
+                    r = await client.get(path)
+                else:
+                    r = await client.post(path, json=ROUTE_PAYLOAD)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                assert r.status_code == 200, r.text
+
+        for _ in range(min(200, n)):  # Warmup
+            await one()
+        latencies.clear()
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(n)))
+        elapsed = time.perf_counter() - start
+    return n / elapsed, latencies
+
+
+def p(values, q):
+    return statistics.quantiles(values, n=100)[q - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Middleware-Stack")
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Erfolgs-Statistiken der Benchmark-Requests verwerfen (kein atexit-Flush)
+    from backend.services.success_stats import get_success_aggregator
+    atexit.unregister(get_success_aggregator().flush)
+
+    endpoints = [("GET", "/health"), ("POST", "/api/tour/route-details")]
+    print(f"{args.requests} Requests, Parallelität {args.concurrency}, bester von {args.repeat} Läufen\n")
+    print(f"{'Endpoint':<32} {'Stack':<9} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for method, path in endpoints:
+        for stack in ("legacy", "pipeline"):
+            app = build_app(stack)
+            best = None
+            for _ in range(args.repeat):
+                rps, lat = asyncio.run(run(app, method, path, args.requests, args.concurrency))
+                if best is None or rps > best[0]:
+                    best = (rps, lat)
+            rps, lat = best
+            label = "vorher" if stack == "legacy" else "nachher"
+            print(f"{method + ' ' + path:<32} {label:<9} {rps:>9,.0f} {p(lat, 50):>8.2f} {p(lat, 99):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Micro-Benchmark: Adress-Normalisierung (Adressen/Sekunde).
+
+Misst normalize_address auf allen Adressen aus den Tourplan-CSVs:
+- kalt:  LRU-Memo geleert, jede Adresse einmal (nur vorkompilierte Pipeline)
+- warm:  gleiche Adressen erneut (Memo-Treffer, typisch für geo_repo/Aliase/Fail-Cache)
+- batch: normalize_many über den gesamten Korpus
+
+Mit --baseline-ref (z.B. HEAD~1) wird zusätzlich die Version von
+common/normalize.py aus diesem Git-Stand gemessen ("vorher").
+
+Usage:
+    python scripts/bench_normalize.py [--repeat 5] [--baseline-ref HEAD~1]
+"""
+import argparse
+import csv
+import importlib.util
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from common.normalize import clear_normalize_cache, normalize_address, normalize_many
+
+
+def load_corpus() -> list:
+    """Adressen (Straße, PLZ, Ort) aus allen Tourplan-CSVs."""
+    addrs = []
+    for path in sorted((ROOT / "tourplaene").glob("*.csv")):
+        raw = path.read_bytes()
+        for enc in ("utf-8", "cp850", "latin-1"):
+            try:
+                text = raw.decode(enc)
+                break
+            except UnicodeDecodeError:
+                continue
+        for row in csv.reader(text.splitlines(), delimiter=";"):
+            if len(row) > 4 and row[2].strip():
+                addrs.append(", ".join(cell.strip() for cell in row[2:5]))
+    return addrs
+
+
+def rate(func, addrs, repeat: int, before=None) -> float:
+    """Beste Rate (Adressen/s) aus `repeat` Läufen."""
+    best = 0.0
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        func(addrs)
+        elapsed = time.perf_counter() - start
+        best = max(best, len(addrs) / elapsed)
+    return best
+
+
+def load_baseline(ref: str):
+    """Lädt common/normalize.py aus einem Git-Stand als eigenes Modul."""
+    source = subprocess.run(
+        ["git", "show", f"{ref}:common/normalize.py"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    tmp = Path(tempfile.mkdtemp()) / "normalize_baseline.py"
+    tmp.write_text(source, encoding="utf-8")
+    spec = importlib.util.spec_from_file_location("normalize_baseline", tmp)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark normalize_address")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline-ref", help="Git-Ref für den Vorher-Vergleich (z.B. HEAD~1)")
+    args = parser.parse_args()
+
+    addrs = load_corpus()
+    unique = list(dict.fromkeys(addrs))
+    print(f"Korpus: {len(addrs)} Adressen ({len(unique)} eindeutig)\n")
+
+    def per_call(items):
+        for a in items:
+            normalize_address(a)
+
+    results = []
+    if args.baseline_ref:
+        baseline = load_baseline(args.baseline_ref)
+
+        def baseline_call(items):
+            for a in items:
+                baseline.normalize_address(a)
+
+        results.append((f"vorher ({args.baseline_ref})", rate(baseline_call, addrs, args.repeat)))
+
+    results.append(("kalt (Memo leer)", rate(per_call, unique, args.repeat, before=clear_normalize_cache)))
+    per_call(addrs)
+    results.append(("warm (Memo)", rate(per_call, addrs, args.repeat)))
+    results.append(("normalize_many", rate(normalize_many, addrs, args.repeat, before=clear_normalize_cache)))
+
+    for label, value in results:
+        print(f"{label:<28} {value:>12,.0f} Adressen/s")
+
+
+if __name__ == "__main__":
+    main()
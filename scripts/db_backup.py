@@ -6,6 +6,18 @@ Automatisches Datenbank-Backup für FAMO TrafficApp
 Erstellt täglich um 16:00 Uhr ein Backup der traffic.db Datenbank.
 Backups werden in data/backups/ gespeichert mit Datum im Dateinamen.
 
+- Online-Backup seitenweise (sqlite3 Backup-API, DB_BACKUP_PAGES Seiten pro
+  Schritt, dazwischen kurze Pause), damit Schreiber nicht blockiert werden
+- Optional gzip-komprimiert (DB_BACKUP_COMPRESS=true → .db.gz)
+- Inhalts-adressierte Deduplizierung (DB_BACKUP_DEDUP): unveränderte Stände
+  werden nur einmal unter backups/objects/<sha256> gespeichert und per Hardlink
+  unter dem datierten Namen abgelegt
+- In der App: run_backup_loop (täglich um DB_BACKUP_TIME, nur wenn gesetzt -
+  ersetzt dann den Task-Scheduler-Job aus schedule_backup_windows.ps1/.bat),
+  API-Aufrufe laufen in einem Worker-Thread; last_backup_stats() liefert den Durchsatz
+- Prozessübergreifende Sperre (data/backups/.backup.lock): App-Worker, Skript und
+  Task Scheduler erstellen nie gleichzeitig ein Backup
+
 Verwendung:
     python scripts/db_backup.py
 
@@ -18,20 +30,40 @@ Windows Task Scheduler:
 import sys
 import os
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
+import gzip
+import hashlib
 import shutil
 import sqlite3
+import tempfile
+import time
 
 # Projekt-Root finden (Script ist in scripts/)
 SCRIPT_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = SCRIPT_DIR.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
+from backend.utils.file_lock import FileLock, FileLockTimeout
+
 # Backup-Konfiguration
-BACKUP_TIME = "16:00"  # 16:00 Uhr (4 PM)
+# Zeitplan in der App (z.B. "16:00"); Standard leer, da der Windows Task Scheduler
+# (schedule_backup_windows.ps1) das Skript bereits täglich um 16:00 Uhr startet
+BACKUP_TIME = os.getenv("DB_BACKUP_TIME", "")
 BACKUP_DIR = PROJECT_ROOT / "data" / "backups"
 BACKUP_RETENTION_DAYS = 30  # Backups älter als 30 Tage werden gelöscht
 
+BACKUP_PAGES_PER_STEP = int(os.getenv("DB_BACKUP_PAGES", "1024"))  # Seiten pro Backup-Schritt
+BACKUP_STEP_PAUSE_S = float(os.getenv("DB_BACKUP_STEP_PAUSE", "0.005"))  # Pause zwischen Schritten
+BACKUP_MAX_RESTARTS = 3  # Neustarts durch parallele Schreiber, danach Ein-Schritt-Kopie
+BACKUP_COMPRESS = os.getenv("DB_BACKUP_COMPRESS", "false").lower() == "true"
+BACKUP_DEDUP = os.getenv("DB_BACKUP_DEDUP", "true").lower() == "true"
+
+_last_stats: dict = {}
+
+
+class _TooManyRestarts(Exception):
+    """Paged Backup wurde zu oft durch Schreibzugriffe neu gestartet."""
+
 def get_database_path() -> Path:
     """Gibt den Pfad zur Haupt-Datenbank zurück."""
     db_path = PROJECT_ROOT / "data" / "traffic.db"
@@ -48,54 +80,222 @@ def get_database_path() -> Path:
         raise FileNotFoundError(f"Datenbank nicht gefunden: {db_path}")
     return db_path
 
-def create_backup() -> tuple[bool, str]:
+def _copy_paged(db_path: Path, target: Path) -> dict:
     """
-    Erstellt ein Backup der Datenbank.
+    Online-Backup in Schritten von BACKUP_PAGES_PER_STEP Seiten.
     
-    Returns:
-        (success: bool, message: str)
+    Zwischen den Schritten gibt SQLite die Lesesperre frei; die Pause lässt
+    Schreiber zum Zug kommen. Ändert ein anderer Prozess die DB, startet SQLite
+    die Kopie neu – nach BACKUP_MAX_RESTARTS Neustarts wird in einem Schritt kopiert.
     """
+    state = {"steps": 0, "restarts": 0, "pages": 0, "remaining": None}
+
+    def progress(status, remaining, total):
+        if state["remaining"] is not None and remaining > state["remaining"]:
+            state["restarts"] += 1
+            if state["restarts"] > BACKUP_MAX_RESTARTS:
+                raise _TooManyRestarts()
+        state["steps"] += 1
+        state["pages"] = total
+        state["remaining"] = remaining
+        if remaining and BACKUP_STEP_PAUSE_S > 0:
+            time.sleep(BACKUP_STEP_PAUSE_S)
+
+    source_conn = sqlite3.connect(str(db_path), timeout=30.0)
     try:
-        # Backup-Verzeichnis erstellen
-        BACKUP_DIR.mkdir(parents=True, exist_ok=True)
-        
-        # Datenbank-Pfad
-        db_path = get_database_path()
-        
-        if not db_path.exists():
-            return False, f"Datenbank nicht gefunden: {db_path}"
-        
+        for pages in (BACKUP_PAGES_PER_STEP, -1):
+            backup_conn = sqlite3.connect(str(target), timeout=30.0)
+            try:
+                source_conn.backup(backup_conn, pages=pages, progress=progress)
+                if pages == -1:
+                    state["steps"] = 1
+                    state["pages"] = source_conn.execute("PRAGMA page_count").fetchone()[0]
+                return state
+            except _TooManyRestarts:
+                print(f"[BACKUP] {state['restarts']} Neustarts durch Schreibzugriffe - kopiere in einem Schritt")
+                state["remaining"] = None
+            finally:
+                backup_conn.close()
+    finally:
+        source_conn.close()
+    return state
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _gzip_to(source: Path, target: Path) -> None:
+    with open(source, "rb") as src, gzip.open(target, "wb", compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+
+
+def _link_or_copy(source: Path, target: Path) -> None:
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def run_backup(compress: bool | None = None, dedup: bool | None = None) -> dict:
+    """
+    Erstellt ein Backup und liefert Kennzahlen (Größe, Dauer, Durchsatz, Dedup).
+    
+    Blockiert den aufrufenden Thread – in der App über asyncio.to_thread aufrufen.
+    
+    Raises:
+        FileNotFoundError: Datenbank fehlt
+        RuntimeError: Es läuft bereits ein Backup
+    """
+    compress = BACKUP_COMPRESS if compress is None else compress
+    dedup = BACKUP_DEDUP if dedup is None else dedup
+
+    db_path = get_database_path()
+    if not db_path.exists():
+        raise FileNotFoundError(f"Datenbank nicht gefunden: {db_path}")
+    BACKUP_DIR.mkdir(parents=True, exist_ok=True)
+    lock = FileLock(BACKUP_DIR / ".backup.lock", blocking=False)
+    try:
+        lock.acquire()
+    except FileLockTimeout:
+        raise RuntimeError("Es läuft bereits ein Backup")
+
+    try:
+        started = time.perf_counter()
+
         # Backup-Dateiname mit Datum/Zeit
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_filename = f"traffic_backup_{timestamp}.db"
-        backup_path = BACKUP_DIR / backup_filename
-        
-        # SQLite Backup mit sqlite3 (sicherer als shutil.copy bei aktiver DB)
-        source_conn = sqlite3.connect(str(db_path), timeout=30.0)
-        backup_conn = sqlite3.connect(str(backup_path), timeout=30.0)
-        
+        suffix = ".db.gz" if compress else ".db"
+        backup_path = BACKUP_DIR / f"traffic_backup_{timestamp}{suffix}"
+        n = 1
+        while backup_path.exists():  # zweites Backup in derselben Sekunde
+            backup_path = BACKUP_DIR / f"traffic_backup_{timestamp}_{n}{suffix}"
+            n += 1
+        fd, tmp_name = tempfile.mkstemp(prefix=".tmp_backup_", suffix=".db", dir=BACKUP_DIR)
+        os.close(fd)
+        tmp_path = Path(tmp_name)
+
         try:
-            # SQLite native backup (erstellt konsistentes Backup, auch bei WAL-Mode)
-            source_conn.backup(backup_conn)
-            backup_conn.commit()
-            backup_conn.close()
-            
-            # Dateigröße
-            backup_size = backup_path.stat().st_size / (1024 * 1024)  # MB
-            
-            # Bereinige alte Backups
-            cleanup_old_backups()
-            
-            return True, f"Backup erfolgreich erstellt: {backup_filename} ({backup_size:.2f} MB)"
-            
+            state = _copy_paged(db_path, tmp_path)
+            db_bytes = tmp_path.stat().st_size
+            copied = time.perf_counter()
+
+            deduped = False
+            if dedup:
+                objects = BACKUP_DIR / "objects"
+                objects.mkdir(exist_ok=True)
+                obj = objects / f"{_sha256(tmp_path)}{suffix}"
+                if obj.exists():
+                    deduped = True
+                elif compress:
+                    _gzip_to(tmp_path, obj)
+                else:
+                    os.replace(tmp_path, obj)
+                _link_or_copy(obj, backup_path)
+            elif compress:
+                _gzip_to(tmp_path, backup_path)
+            else:
+                os.replace(tmp_path, backup_path)
         finally:
-            source_conn.close()
-            if backup_conn:
-                backup_conn.close()
+            tmp_path.unlink(missing_ok=True)
+
+        elapsed = time.perf_counter() - started
+        stats = {
+            "filename": backup_path.name,
+            "path": str(backup_path),
+            "db_mb": round(db_bytes / (1024 * 1024), 2),
+            "size_mb": round(backup_path.stat().st_size / (1024 * 1024), 2),
+            "pages": state["pages"],
+            "steps": state["steps"],
+            "restarts": state["restarts"],
+            "compressed": compress,
+            "deduplicated": deduped,
+            "copy_s": round(copied - started, 3),
+            "duration_s": round(elapsed, 3),
+            "throughput_mb_s": round(db_bytes / (1024 * 1024) / max(elapsed, 1e-6), 2),
+            "finished_at": datetime.now().isoformat(),
+        }
+        _last_stats.clear()
+        _last_stats.update(stats)
+        print(f"[BACKUP] {stats['filename']}: {stats['db_mb']} MB in {stats['steps']} Schritten, "
+              f"{stats['duration_s']}s ({stats['throughput_mb_s']} MB/s)"
+              f"{', dedupliziert' if deduped else ''}")
+        return stats
+    finally:
+        lock.release()
+
+
+def last_backup_stats() -> dict:
+    """Kennzahlen des letzten Backups dieses Prozesses (leer, falls noch keins lief)."""
+    return dict(_last_stats)
+
+
+def create_backup() -> tuple[bool, str]:
+    """
+    Erstellt ein Backup der Datenbank.
     
+    Returns:
+        (success: bool, message: str)
+    """
+    try:
+        stats = run_backup()
+
+        # Bereinige alte Backups
+        cleanup_old_backups()
+
+        details = f"{stats['size_mb']:.2f} MB, {stats['throughput_mb_s']:.1f} MB/s"
+        if stats["deduplicated"]:
+            details += ", unverändert - dedupliziert"
+        return True, f"Backup erfolgreich erstellt: {stats['filename']} ({details})"
+
     except Exception as e:
         return False, f"Backup-Fehler: {str(e)}"
 
+
+def _seconds_until(hhmm: str, now: datetime | None = None) -> float:
+    """Sekunden bis zum nächsten Zeitpunkt HH:MM (heute oder morgen)."""
+    now = now or datetime.now()
+    hour, minute = (int(x) for x in hhmm.split(":"))
+    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(days=1)
+    return (target - now).total_seconds()
+
+
+async def run_backup_loop(at: str | None = None) -> None:
+    """Hintergrund-Loop: tägliches Backup um `at` (Standard BACKUP_TIME) im Worker-Thread."""
+    import asyncio
+
+    at = at or BACKUP_TIME
+    if not at:
+        return
+    while True:
+        await asyncio.sleep(_seconds_until(at))
+        scheduled = time.time()
+        # Mehrere Worker (oder der Task Scheduler) feuern gleichzeitig: nur einer sichert
+        if any(_backup_time(p) >= scheduled - 300 for p in _backup_files()):
+            continue
+        success, message = await asyncio.to_thread(create_backup)
+        if success or "läuft bereits" not in message:
+            print(f"[BACKUP{'' if success else ' ERROR'}] {message}")
+
+
+def _backup_time(backup_file: Path) -> float:
+    """Zeitstempel aus dem Dateinamen (Hardlinks teilen sich die mtime), sonst mtime."""
+    stem = backup_file.name[len("traffic_backup_"):].split(".", 1)[0][:15]  # ohne Zähler "_1"
+    try:
+        return datetime.strptime(stem, "%Y%m%d_%H%M%S").timestamp()
+    except ValueError:
+        return backup_file.stat().st_mtime
+
+
+def _backup_files():
+    return [p for p in BACKUP_DIR.glob("traffic_backup_*.db*") if p.name.endswith((".db", ".db.gz"))]
+
 def cleanup_old_backups():
     """Löscht Backups die älter als BACKUP_RETENTION_DAYS sind."""
     if not BACKUP_DIR.exists():
@@ -104,15 +304,25 @@ def cleanup_old_backups():
     cutoff_date = datetime.now().timestamp() - (BACKUP_RETENTION_DAYS * 24 * 3600)
     deleted_count = 0
     
-    for backup_file in BACKUP_DIR.glob("traffic_backup_*.db"):
+    for backup_file in _backup_files():
         try:
-            file_age = backup_file.stat().st_mtime
+            file_age = _backup_time(backup_file)
             if file_age < cutoff_date:
                 backup_file.unlink()
                 deleted_count += 1
         except Exception as e:
             print(f"[BACKUP CLEANUP] Fehler beim Löschen von {backup_file.name}: {e}")
     
+    # Dedup-Objekte ohne verbleibenden Hardlink entfernen
+    objects = BACKUP_DIR / "objects"
+    if objects.exists():
+        for obj in objects.iterdir():
+            try:
+                if obj.stat().st_nlink <= 1 and obj.stat().st_mtime < cutoff_date:
+                    obj.unlink()
+            except Exception as e:
+                print(f"[BACKUP CLEANUP] Fehler beim Löschen von {obj.name}: {e}")
+    
     if deleted_count > 0:
         print(f"[BACKUP CLEANUP] {deleted_count} alte Backups gelöscht (> {BACKUP_RETENTION_DAYS} Tage)")
 
@@ -122,14 +332,15 @@ def list_backups():
         return []
     
     backups = []
-    for backup_file in sorted(BACKUP_DIR.glob("traffic_backup_*.db"), reverse=True):
+    for backup_file in sorted(_backup_files(), key=lambda p: p.name, reverse=True):
         stat = backup_file.stat()
         size_mb = stat.st_size / (1024 * 1024)
         backups.append({
             "filename": backup_file.name,
             "path": str(backup_file),
             "size_mb": round(size_mb, 2),
-            "created": datetime.fromtimestamp(stat.st_mtime).isoformat()
+            "compressed": backup_file.name.endswith(".gz"),
+            "created": datetime.fromtimestamp(_backup_time(backup_file)).isoformat()
         })
     
     return backups
@@ -157,7 +368,11 @@ def restore_backup(backup_filename: str) -> tuple[bool, str]:
             shutil.copy2(db_path, safety_backup)
         
         # Backup wiederherstellen
-        shutil.copy2(backup_path, db_path)
+        if backup_path.name.endswith(".gz"):
+            with gzip.open(backup_path, "rb") as src, open(db_path, "wb") as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+        else:
+            shutil.copy2(backup_path, db_path)
         
         return True, f"Backup wiederhergestellt: {backup_filename}. Alte DB gesichert als: {safety_backup.name}"
     
@@ -0,0 +1,48 @@
+"""
+Regionsprüfung des geo_cache (region_ok) gegen die Landes-Umrisse.
+
+Prüft alle gecachten Koordinaten in einem vektorisierten Durchgang auf das
+FAMO-Geschäftsgebiet (Sachsen, Brandenburg, Sachsen-Anhalt, Thüringen) und
+schreibt region_ok nur dort, wo sich der Wert ändert. Läuft auch automatisch
+nach jedem Bulk-Import (tourplan_bulk_process).
+
+Usage:
+    python scripts/validate_geo_regions.py [--only-missing] [--dry-run]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.services.geo_validator import refresh_geo_cache_region_ok
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Führt die Regionsprüfung durch."""
+    parser = argparse.ArgumentParser(description="Regionsprüfung des geo_cache (region_ok)")
+    parser.add_argument("--only-missing", action="store_true", help="Nur Einträge ohne region_ok prüfen")
+    parser.add_argument("--dry-run", action="store_true", help="Nichts schreiben, nur zählen")
+    args = parser.parse_args()
+
+    try:
+        stats = refresh_geo_cache_region_ok(only_missing=args.only_missing, dry_run=args.dry_run)
+        regions = ", ".join(f"{k}={v}" for k, v in sorted(stats["regions"].items(), key=lambda kv: -kv[1]))
+        logger.info(f"✅ Regionsprüfung abgeschlossen: {stats['total']} Einträge, {stats['ok']} im Gebiet "
+                    f"({stats['border']} an der Grenze), {stats['outside']} außerhalb, {stats['invalid']} ungültig, "
+                    f"{stats['changed']} {'zu ändern' if args.dry_run else 'geändert'} in {stats['elapsed_s']}s")
+        if regions:
+            logger.info(f"   Regionen: {regions}")
+        return 0
+    except Exception as e:
+        logger.error(f"❌ Fehler bei der Regionsprüfung: {e}", exc_info=True)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""
+Nächtliche Straßennamen-Validierung aller Datenbank-Adressen (Cron-Job).
+
+Auflösbarkeit kommt zuerst aus den Caches (Prüf-Cache, geo_cache, geo_alias,
+Fail-Cache, geocache, Synonyme); nur der Rest wird live, parallel und
+gedrosselt geocodet (VARIANT_LIVE_CONCURRENCY, VARIANT_LIVE_RPS).
+
+Usage:
+    python scripts/validate_street_names_nightly.py [--offline] [--live-limit 500] [--report]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.services.address_validator import StreetNameValidator
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Führt die Validierung durch."""
+    parser = argparse.ArgumentParser(description="Nächtliche Straßennamen-Validierung")
+    parser.add_argument("--offline", action="store_true", help="Nur Caches, kein Live-Geocoding")
+    parser.add_argument("--live-limit", type=int, default=None,
+                        help="Höchstzahl Live-Abfragen pro Lauf (Standard: VARIANT_LIVE_LIMIT, 0 = unbegrenzt)")
+    parser.add_argument("--report", action="store_true", help="Ausführlichen Bericht ausgeben")
+    args = parser.parse_args()
+
+    try:
+        validator = StreetNameValidator()
+        results = validator.validate_all_database_addresses(live=not args.offline, live_limit=args.live_limit)
+        if args.report:
+            validator.generate_validation_report(results)
+
+        checks = [c for corrections in results.values() for c in corrections]
+        counts = {}
+        for c in checks:
+            counts[c.correction_type] = counts.get(c.correction_type, 0) + 1
+        logger.info(f"✅ Validierung abgeschlossen: {len(results)} Straßen, {len(checks)} Adressen, "
+                    f"{', '.join(f'{k}={v}' for k, v in sorted(counts.items()))}")
+        return 0
+    except Exception as e:
+        logger.error(f"❌ Fehler bei der Validierung: {e}", exc_info=True)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
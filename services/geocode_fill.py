@@ -12,6 +12,7 @@ from repositories.geo_fail_repo import skip_set, mark_temp, mark_nohit, clear
 from repositories.manual_repo import add_open as manual_add
 from common.normalize import normalize_address
 from common.synonyms import resolve_synonym
+from backend.services.request_tracing import traced
 
 # Geoapify API-Key
 GEOAPIFY_API_KEY = os.getenv("GEOAPIFY_API_KEY", "32abbda2bed24f58846db0c5685e8b49")
@@ -37,6 +38,7 @@ DELAY = max(1.0 / RPS, 1.0)  # Nominatim: max 1 rps
 # Manual-Queue Konfiguration
 ENFORCE_MANUAL = os.getenv("GEOCODE_NO_RESULT_TO_MANUAL", "1") not in ("0","false","False")
 
+@traced("geocode")
 async def _geocode_one(addr: str, client: httpx.AsyncClient, company_name: str = None) -> Dict | None:
     """
     Geokodiert eine einzelne Adresse über Nominatim mit Retry/Backoff und OT-Fallback.
@@ -14,6 +14,11 @@ SOURCE_MAP = {
     "cache": ("cache", None),
 }
 
+def _region_ok(lat: float, lon: float) -> int:
+    """1 = im Geschäftsgebiet, 0 = außerhalb/ungültig (wie geo_cache.region_ok)."""
+    from backend.services.geo_validator import geo_validator
+    return int(geo_validator.check_coordinates([lat], [lon]).region_ok[0])
+
 def write_result(address_raw: str, result_items: Iterable[Dict[str,Any]]) -> Optional[Dict[str,Any]]:
     """
     Nimmt das Ergebnis des Geocoders (oder Synonym-Treffers),
@@ -54,13 +59,9 @@ def write_result(address_raw: str, result_items: Iterable[Dict[str,Any]]) -> Opt
     note = item.get("_note") or "geocoder"
     source, precision = SOURCE_MAP.get(note, ("geocoder", "full"))
 
-    # region_ok aus Antwort ableiten, wenn vorhanden
-    region_ok = None
-    addr = item.get("address") or {}
-    state = addr.get("state") or addr.get("state_district")
-    if state is not None:
-        # Prüfe ob in Sachsen, Thüringen oder Sachsen-Anhalt
-        region_ok = 1 if state in ("Sachsen", "Thüringen", "Sachsen-Anhalt") else 0
+    # region_ok aus den Koordinaten - dieselbe Regel (Landes-Umrisse Sachsen,
+    # Brandenburg, Sachsen-Anhalt, Thüringen) wie refresh_geo_cache_region_ok()
+    region_ok = _region_ok(lat, lon)
 
     # Upsert mit Zusatzfeldern
     repo.upsert_ex(
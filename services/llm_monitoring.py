@@ -15,6 +15,8 @@ from pathlib import Path
 import sqlite3
 from contextlib import contextmanager
 
+from db.connections import connection
+
 @dataclass
 class LLMInteraction:
     """Dataclass für LLM-Interaktionen"""
@@ -95,13 +97,10 @@ class LLMMonitoringService:
     
     @contextmanager
     def _get_connection(self):
-        """Context Manager für Datenbankverbindung"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        try:
+        """Context Manager für Datenbankverbindung (gepoolt über db.connections)"""
+        with connection(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
             yield conn
-        finally:
-            conn.close()
     
     def log_interaction(self, 
                        model: str,
@@ -15,6 +15,8 @@ import json
 import httpx
 import asyncio
 
+from backend.services.request_tracing import traced
+
 try:
     import openai
     OPENAI_AVAILABLE = True
@@ -84,6 +86,7 @@ class LLMOptimizer:
             self.enabled = False
             self.logger.warning("LLM-Optimizer disabled - OpenAI not available or no API key")
     
+    @traced("llm")
     def optimize_route(self, stops: List[Dict], region: str = "Dresden") -> OptimizationResult:
         """
         Optimiert eine Route mit LLM-basierter Heuristik
@@ -149,6 +152,7 @@ class LLMOptimizer:
             # Fallback zu Nearest-Neighbor
             return self._fallback_optimization(stops)
     
+    @traced("llm")
     def analyze_clustering(self, stops: List[Dict], max_clusters: int = 5) -> ClusteringResult:
         """
         Analysiert optimale Clustering-Parameter mit LLM
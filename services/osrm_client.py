@@ -20,6 +20,7 @@ from backend.utils.circuit_breaker import CircuitBreaker, breaker_osrm
 from backend.utils.rate_limit import TokenBucket, rate_limiter_osrm
 from backend.cache.osrm_cache import OsrmCache
 from backend.services.osrm_metrics import get_osrm_metrics
+from backend.services.request_tracing import traced
 from backend.utils.errors import TransientError, QuotaError
 
 logger = logging.getLogger(__name__)
@@ -208,6 +209,7 @@ class OSRMClient:
             self._last_health_check = time.time()
             raise RuntimeError("OSRM unerwarteter Fehler")
     
+    @traced("matrix")
     def get_distance_matrix(
         self,
         coords: List[Tuple[float, float]],
@@ -281,6 +283,7 @@ class OSRMClient:
             self.logger.error(f"Fehler beim Parsen von OSRM Table API Response: {e}")
             return None
     
+    @traced("route_geometry")
     def get_route(
         self,
         coords: List[Tuple[float, float]],
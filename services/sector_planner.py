@@ -10,6 +10,7 @@ from typing import List, Dict, Optional, Tuple, Set
 from dataclasses import dataclass
 from enum import Enum
 
+from backend.services.telemetry import get_registry
 from services.osrm_client import OSRMClient
 from services.uid_service import generate_stop_uid
 
@@ -172,6 +173,18 @@ class SectorPlanner:
             "routes_by_sector": {}
         }
     
+    def _count(self, key: str, label: Optional[str] = None, n: int = 1) -> None:
+        """
+        Zählt eine Telemetrie-Metrik: pro Lauf (self.metrics, Teil der Antwort)
+        und prozessweit in der begrenzten Registry (/api/metrics).
+        """
+        if label is None:
+            self.metrics[key] += n
+            get_registry().counter(f"sector_planner.{key}").inc(n)
+        else:
+            self.metrics[key][label] = self.metrics[key].get(label, 0) + n
+            get_registry().labeled(f"sector_planner.{key}").inc(label, n)
+    
     def calculate_bearing(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """
         Berechnet Bearing/Azimut vom ersten Punkt zum zweiten Punkt.
@@ -347,10 +360,10 @@ class SectorPlanner:
             )
             
             if not distance_matrix:
-                self.metrics["osrm_unavailable"] += 1
+                self._count("osrm_unavailable")
                 return None
             
-            self.metrics["osrm_calls"] += 1
+            self._count("osrm_calls")
             
             # Konvertiere Matrix-Format zu Dict
             result = {}
@@ -369,7 +382,7 @@ class SectorPlanner:
             
         except Exception as e:
             self.logger.warning(f"OSRM Table API Fehler: {e}")
-            self.metrics["osrm_unavailable"] += 1
+            self._count("osrm_unavailable")
             return None
     
     def _get_distance_fallback(
@@ -432,6 +445,7 @@ class SectorPlanner:
             
             # Telemetrie
             self.metrics["routes_by_sector"][sector.value] = len(sector_routes)
+            get_registry().labeled("sector_planner.routes_by_sector").inc(sector.value, len(sector_routes))
         
         return all_routes
     
@@ -493,7 +507,7 @@ class SectorPlanner:
                             cand.lat, cand.lon
                         )
                         source = "fallback_haversine"
-                        self.metrics["fallback_haversine"] += 1
+                        self._count("fallback_haversine")
                     
                     candidates_with_data.append({
                         "candidate": cand,
@@ -527,30 +541,30 @@ class SectorPlanner:
                     if use_llm:
                         try:
                             # LLM-Entscheidung zwischen ähnlich guten Kandidaten
-                            self.metrics["llm_calls"] += 1
+                            self._count("llm_calls")
                             best_data = self._llm_choose_best_candidate(
                                 current_uid, candidates_with_data[:3], route_uids
                             )
                             if best_data:
-                                self.metrics["llm_decision_usage"]["llm"] += 1
+                                self._count("llm_decision_usage", "llm")
                             else:
                                 # Fallback bei LLM-Fehler
                                 best_data = candidates_with_data[0]
-                                self.metrics["llm_invalid_schema"] += 1
-                                self.metrics["llm_decision_usage"]["heuristic"] += 1
+                                self._count("llm_invalid_schema")
+                                self._count("llm_decision_usage", "heuristic")
                         except Exception as e:
                             self.logger.warning(f"LLM-Entscheidung fehlgeschlagen: {e}, verwende Heuristik")
                             best_data = candidates_with_data[0]
-                            self.metrics["llm_invalid_schema"] += 1
-                            self.metrics["llm_decision_usage"]["heuristic"] += 1
+                            self._count("llm_invalid_schema")
+                            self._count("llm_decision_usage", "heuristic")
                     else:
                         # Heuristik: Wähle kürzesten
                         best_data = candidates_with_data[0]
-                        self.metrics["llm_decision_usage"]["heuristic"] += 1
+                        self._count("llm_decision_usage", "heuristic")
                 else:
                     best_data = candidates_with_data[0] if candidates_with_data else None
                     if best_data:
-                        self.metrics["llm_decision_usage"]["heuristic"] += 1
+                        self._count("llm_decision_usage", "heuristic")
                 
                 if best_data:
                     best_candidate = best_data["candidate"]
@@ -590,7 +604,7 @@ class SectorPlanner:
                 MAX_TIME_WITHOUT_RETURN = 65.0  # Minuten OHNE Rückfahrt (Hard Limit)
                 if time_without_return >= MAX_TIME_WITHOUT_RETURN:  # ✅ >= statt > (strengere Prüfung)
                     # Regel überschritten → Cut (auch bei genau 65.0 Min stoppen)
-                    self.metrics["timebox_violations"] += 1
+                    self._count("timebox_violations")
                     break
                 
                 # Dann prüfe Zeitbox (INKL. Rückfahrt ≤ 90 Min)
@@ -599,7 +613,7 @@ class SectorPlanner:
                 
                 if total_with_return >= MAX_TIME_WITH_RETURN:  # ✅ >= statt > (strengere Prüfung)
                     # Zeitbox überschritten → Cut (auch bei genau 90.0 Min stoppen)
-                    self.metrics["timebox_violations"] += 1
+                    self._count("timebox_violations")
                     break
                 
                 # ⚠️ Warnung wenn Route >80 Min (empfohlenes Maximum)
@@ -648,7 +662,7 @@ class SectorPlanner:
                     driving_time -= best_segment["minutes"]
                     service_time -= cand_service_time
                     remaining.append(best_candidate)  # Stop zurück in Warteschlange
-                    self.metrics["timebox_violations"] += 1
+                    self._count("timebox_violations")
                     break  # Route ist voll - stoppe diese Route
                 
                 if current_total_with_return > MAX_TIME_WITH_RETURN:
@@ -664,7 +678,7 @@ class SectorPlanner:
                     driving_time -= best_segment["minutes"]
                     service_time -= cand_service_time
                     remaining.append(best_candidate)  # Stop zurück in Warteschlange
-                    self.metrics["timebox_violations"] += 1
+                    self._count("timebox_violations")
                     break  # Route ist voll - stoppe diese Route
                 
                 # ⚠️ Warnung wenn Route >80 Min (empfohlenes Maximum für Puffer)
@@ -0,0 +1,112 @@
+"""Tests für die kompilierte Adress-Regel-Engine (AddressMapper/AddressCorrector)"""
+
+import json
+import random
+from difflib import SequenceMatcher
+
+from backend.services.address_mapper import AddressMapper
+from backend.services.address_rules import AddressRuleEngine, FuzzyIndex, RegexRuleSet
+
+
+def _brute_force(query, keys, threshold):
+    best, best_similarity = None, 0.0
+    for idx, key in enumerate(keys):
+        similarity = SequenceMatcher(None, query.lower(), key.lower()).ratio()
+        if similarity >= threshold and similarity > best_similarity:
+            best, best_similarity = idx, similarity
+    return best
+
+
+def test_fuzzy_index_matches_linear_sequence_matcher_scan():
+    rnd = random.Random(7)
+    alphabet = "abcdeäöß -.,0123"
+    keys = ["".join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 14))) for _ in range(60)]
+    queries = list(keys)
+    for key in keys:
+        chars = list(key)
+        for _ in range(rnd.randint(1, 3)):
+            pos = rnd.randint(0, len(chars))
+            op = rnd.choice("dis")
+            if op == "d" and chars:
+                del chars[min(pos, len(chars) - 1)]
+            elif op == "i":
+                chars.insert(pos, rnd.choice(alphabet))
+            elif chars:
+                chars[min(pos, len(chars) - 1)] = rnd.choice(alphabet)
+        queries.append("".join(chars).upper())
+    queries += ["", "a", "ab", "aXb"]
+
+    index = FuzzyIndex(keys)
+    for threshold in (0.6, 0.7, 0.8, 0.95):
+        got = [hit[0] if hit else None for hit in index.best_many(queries, threshold)]
+        assert got == [_brute_force(q, keys, threshold) for q in queries]
+
+
+def test_mapper_uses_compiled_rules_and_rebuilds_after_changes(tmp_path, capsys):
+    config = tmp_path / "address_mappings.json"
+    config.write_text(json.dumps({
+        "mappings": [
+            {"pattern": "Naumannstraße 12 | Halle 14, 01809 Heidenau", "corrected_address": "Naumannstraße 12, 01809 Heidenau",
+             "lat": 50.97, "lon": 13.87, "reason": "Halle", "priority": 1},
+        ],
+        "rules": [
+            {"name": "OT_Removal", "pattern": ".*OT [^,]+", "replacement": ".*", "priority": 3},
+            {"name": "Kaputt", "pattern": "([", "replacement": "", "priority": 1},
+        ],
+        "bar_sondernamen": [
+            {"sondername": "Dreihundert Dresden", "echte_adresse": "Naumannstraße 12, 01809 Heidenau",
+             "lat": 50.97, "lon": 13.87, "beschreibung": "BAR", "kategorie": "autohaus"},
+        ],
+    }), encoding="utf-8")
+    mapper = AddressMapper(str(config))
+
+    addresses = [
+        "Dreihundert Dresden",
+        "dreihundert dresdn",
+        "Naumannstraße 12 | Halle 14, 01809 Heidenau",
+        "Naumannstrasse 12 | Halle 14, 01809 Heidenau",
+        "Am Sägewerk 36, 01328 Dresden OT Schönfeld",
+        "Hauptstraße 1, 01067 Dresden",
+    ]
+    results = mapper.map_addresses(addresses)
+    assert [r["method"] for r in results] == [
+        "bar_sondername", "bar_sondername", "exact_mapping", "fuzzy_mapping", "rule_correction", "no_correction",
+    ]
+    assert results[4]["corrected_address"] == "Am Sägewerk 36, 01328 Dresden"
+    assert results == [mapper.map_address(a) for a in addresses]
+
+    # Direkt angehängte Einträge (wie im Address-Management-Dashboard) werden erkannt
+    mapper.bar_sondernamen.append({"sondername": "Gustavs Autohof", "echte_adresse": "Hof 1, 01234 Ort",
+                                   "lat": 51.0, "lon": 13.0, "beschreibung": "BAR", "kategorie": "autohof"})
+    assert mapper.find_bar_sondername("Gustavs Autohof")["echte_adresse"] == "Hof 1, 01234 Ort"
+    assert mapper.add_mapping("Alte Adresse 1, 01067 Dresden", "Neue Adresse 1, 01067 Dresden") is True
+    assert mapper.find_exact_mapping("Alte Adresse 1, 01067 Dresden")["corrected_address"] == "Neue Adresse 1, 01067 Dresden"
+
+
+def test_correction_plan_orders_moves_specials_and_patterns():
+    engine = AddressRuleEngine(
+        company_moves={"CAR-ART GmbH": {"Bismarkstr. 63": "Dohnaer Str. 1", "Bismarkstr": "Dohnaer Str"}},
+        special_corrections={"Dresdener Str. 5, 02977 Hoyerswerda": "Dresdener Straße 5, 02977 Hoyerswerda"},
+        correction_patterns=[(r'Dresdener Str\.', 'Dresdener Straße'), (r'(\w+)str\.', r'\1straße'), (r'\s+', ' ')],
+    )
+    assert engine.correction_plan("CAR-ART GmbH, Bismarkstr. 63, 01257 Dresden") == [
+        ("company_move", "CAR-ART GmbH, Dohnaer Str. 1, 01257 Dresden"),
+        ("company_move", "CAR-ART GmbH, Dohnaer Str. 63, 01257 Dresden"),
+        ("pattern_correction", "CAR-ART GmbH, Bismarkstraße 63, 01257 Dresden"),
+    ]
+    assert engine.correction_plan("Dresdener Str. 5, 02977 Hoyerswerda") == [
+        ("special_correction", "Dresdener Straße 5, 02977 Hoyerswerda"),
+        ("pattern_correction", "Dresdener Straße 5, 02977 Hoyerswerda"),
+    ]
+    assert engine.correction_plan("Hauptstraße 1, 01067 Dresden") == []
+
+
+def test_regex_gate_keeps_numeric_backreferences_working():
+    """Test: Muster mit \\1 (Gruppennummer verschiebt sich in der Alternation) werden einzeln geprüft."""
+    rules = RegexRuleSet([r"Halle (\d+)", r"(\w)\1straße", r"\\1"])
+    assert rules.any_match("Schillerstraße") is False
+    assert rules.any_match("Allee 5, Sommerrstraße") is True  # nur über das \1-Muster
+    assert rules.any_match("Lager | Halle 3") is True
+    assert rules.any_match("C:\\1") is True  # escapter Backslash, kein Rückverweis → im Vorfilter
+    assert RegexRuleSet([r"(\w)\1"]).any_match("abc") is False
+    assert RegexRuleSet([]).any_match("abc") is False
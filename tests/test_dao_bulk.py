@@ -0,0 +1,80 @@
+"""
+Tests für die Bulk-Schreibpfade der DAO (Kunden-Upsert, Touren-Batches).
+"""
+import sqlite3
+
+import pytest
+
+from backend.db import dao, models
+from backend.db.dao import Kunde, TourRecord
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = tmp_path / "traffic.db"
+    monkeypatch.setattr(dao, "get_database_path", lambda: path)
+    monkeypatch.setattr(models, "get_database_path", lambda: path)
+    models.init_db()
+    return path
+
+
+def test_upsert_kunden_returns_ids_in_input_order(db_path):
+    """Test: IDs aus RETURNING – auch für vorhandene Kunden, Duplikate und über Chunk-Grenzen."""
+    first = dao.upsert_kunden([Kunde(None, "Müller GmbH", "Hauptstr. 1, Dresden", 51.0, 13.7)])
+
+    batch = [Kunde(None, f"Kunde {i}", f"Weg {i}, Dresden") for i in range(450)]
+    batch.insert(7, Kunde(None, "  MÜLLER gmbh ", "hauptstr.  1, dresden", 51.1, 13.8))
+    batch.append(Kunde(None, "Kunde 3", "Weg 3, Dresden"))
+    ids = dao.upsert_kunden(batch)
+
+    assert len(ids) == len(batch)
+    assert ids[7] == first[0]
+    assert ids[-1] == ids[3]
+    assert len(set(ids)) == 451
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM kunden").fetchone()[0] == 451
+        assert conn.execute("SELECT lat FROM kunden WHERE id = ?", (first[0],)).fetchone()[0] == 51.1
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_upsert_kunden_by_name(db_path):
+    """Test: Vorhandene Namen (case-insensitiv) werden aktualisiert, neue angelegt."""
+    dao.upsert_kunden([Kunde(None, "Sven", "Alte Str. 1")])
+    written = dao.upsert_kunden_by_name([
+        Kunde(None, "SVEN ", "Neue Str. 2, Dresden", 51.0, 13.7),
+        Kunde(None, "Jochen", "Weg 5, Dresden", 51.2, 13.9),
+        Kunde(None, "", "ohne Namen"),
+    ])
+    assert written == 2
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT name, adresse, lat FROM kunden ORDER BY id").fetchall()
+    assert rows == [("sven", "Neue Str. 2, Dresden", 51.0), ("Jochen", "Weg 5, Dresden", 51.2)]
+
+
+def test_insert_tours_batch_with_stops_and_rollups(db_path):
+    """Test: Touren, Stopps und Rollups in einer Transaktion; vorhandene Touren optional übersprungen."""
+    existing = dao.insert_tour("W-07.00 Uhr Tour", "2025-01-10", [1, 2], distanz_km=10.0)
+
+    row_ids = dao.insert_tours([
+        TourRecord("W-07.00 Uhr Tour", "2025-01-10", [9]),
+        TourRecord("W-09.00 Uhr Tour", "2025-01-10", [3, 4, 5], distanz_km=20.0),
+        TourRecord("PIR-1", "2025-01-10", [6]),
+        TourRecord("PIR-1", "2025-01-10", [7]),
+    ], skip_existing=True)
+
+    assert row_ids[0] is None and row_ids[3] is None
+    assert existing not in row_ids and None not in row_ids[1:3]
+    with sqlite3.connect(db_path) as conn:
+        stops = conn.execute("SELECT tour_id, position, kunde_id FROM tour_stops ORDER BY tour_id, position").fetchall()
+        rollup = conn.execute(
+            "SELECT tour_type, tours, stops, distanz_km FROM tour_rollup_daily ORDER BY tour_type"
+        ).fetchall()
+    assert stops == [("PIR-1", 1, 6), ("W-07.00 Uhr Tour", 1, 1), ("W-07.00 Uhr Tour", 2, 2),
+                     ("W-09.00 Uhr Tour", 1, 3), ("W-09.00 Uhr Tour", 2, 4), ("W-09.00 Uhr Tour", 3, 5)]
+    assert rollup == [("PIR", 1, 1, 0.0), ("W", 2, 5, 30.0)]
+
+    with pytest.raises(sqlite3.IntegrityError):
+        dao.insert_tours([TourRecord("W-11.00 Uhr Tour", "2025-01-10", [8]),
+                          TourRecord("W-09.00 Uhr Tour", "2025-01-10", [8])])
+    with sqlite3.connect(db_path) as conn:  # Transaktion komplett zurückgerollt
+        assert conn.execute("SELECT COUNT(*) FROM touren").fetchone()[0] == 3
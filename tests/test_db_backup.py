@@ -241,3 +241,79 @@ def test_backup_restore_cycle(mock_backup_dir, monkeypatch, tmp_path):
     assert rows[0][1] == "test1"
     assert rows[1][1] == "test2"
 
+
+
+def test_paged_backup_compresses_and_deduplicates(test_db, mock_backup_dir, monkeypatch):
+    """Test: Seitenweises Backup, gzip und Dedup unveränderter Stände per Hardlink."""
+    import scripts.db_backup as backup_module
+    monkeypatch.setattr(backup_module, "get_database_path", lambda: test_db)
+    monkeypatch.setattr(backup_module, "BACKUP_PAGES_PER_STEP", 1)
+    monkeypatch.setattr(backup_module, "BACKUP_STEP_PAUSE_S", 0)
+
+    conn = sqlite3.connect(str(test_db))
+    conn.executemany("INSERT INTO geo_cache VALUES (?, ?, ?)",
+                     [(f"adresse {i} " + "x" * 200, 51.0, 13.0) for i in range(200)])
+    conn.commit()
+    conn.close()
+
+    first = backup_module.run_backup(compress=True, dedup=True)
+    assert first["filename"].endswith(".db.gz")
+    assert first["steps"] == first["pages"] > 1
+    assert first["deduplicated"] is False
+    assert first["throughput_mb_s"] > 0
+
+    (mock_backup_dir / first["filename"]).rename(mock_backup_dir / "traffic_backup_20250101_120000.db.gz")
+    second = backup_module.run_backup(compress=True, dedup=True)
+    assert second["deduplicated"] is True
+    assert backup_module.last_backup_stats()["filename"] == second["filename"]
+    assert len(list((mock_backup_dir / "objects").iterdir())) == 1
+    assert (mock_backup_dir / second["filename"]).stat().st_nlink >= 2
+
+    backups = list_backups()
+    assert [b["filename"] for b in backups] == [second["filename"], "traffic_backup_20250101_120000.db.gz"]
+    assert backups[1]["created"] == "2025-01-01T12:00:00"
+    assert all(b["compressed"] for b in backups)
+
+    test_db.unlink()
+    success, message = restore_backup(second["filename"])
+    assert success is True
+    conn = sqlite3.connect(str(test_db))
+    assert conn.execute("SELECT COUNT(*) FROM geo_cache").fetchone()[0] == 201
+    conn.close()
+
+
+def test_backup_lock_across_processes_and_unique_names(test_db, mock_backup_dir, monkeypatch):
+    """Test: Hält ein anderer Prozess die Backup-Sperre, wird abgelehnt; gleiche Sekunde → eigener Name."""
+    import subprocess
+    import scripts.db_backup as backup_module
+    monkeypatch.setattr(backup_module, "get_database_path", lambda: test_db)
+
+    holder = subprocess.Popen(
+        [sys.executable, "-c",
+         "import sys, time; sys.path.insert(0, sys.argv[1]);"
+         "from backend.utils.file_lock import FileLock;"
+         "lock = FileLock(sys.argv[2]); lock.acquire(); print('locked', flush=True); time.sleep(30)",
+         str(PROJECT_ROOT), str(mock_backup_dir / ".backup.lock")],
+        stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        assert holder.stdout.readline().strip() == "locked"
+        with pytest.raises(RuntimeError, match="läuft bereits"):
+            backup_module.run_backup(dedup=False)
+    finally:
+        holder.kill()
+        holder.wait()
+
+    from datetime import datetime
+
+    class FixedNow(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return cls(2025, 1, 1, 12, 0, 0)
+
+    monkeypatch.setattr(backup_module, "datetime", FixedNow)
+    first = backup_module.run_backup(dedup=False)
+    second = backup_module.run_backup(dedup=False)
+    assert first["filename"] == "traffic_backup_20250101_120000.db"
+    assert second["filename"] == "traffic_backup_20250101_120000_1.db"
+    assert not list(mock_backup_dir.glob(".tmp_backup_*"))
@@ -0,0 +1,69 @@
+"""
+Tests für den zentralen SQLite-Connection-Manager (Pool pro Thread, Pragmas, Metriken).
+"""
+import sqlite3
+import threading
+
+import pytest
+
+from db.connections import ConnectionManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    mgr = ConnectionManager()
+    mgr.register("test", lambda: tmp_path / "sub" / "t.db")
+    yield mgr
+    mgr.close_thread()
+
+
+def test_pooled_connection_with_pragmas(manager, tmp_path):
+    """Test: Eine Connection pro Thread und DB, Pragmas gesetzt, Name und Pfad teilen den Pool."""
+    conn = manager.get("test")
+    assert manager.get(tmp_path / "sub" / "t.db") is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+
+    other = []
+    t = threading.Thread(target=lambda: other.append(manager.get("test")))
+    t.start()
+    t.join()
+    assert other[0] is not conn
+
+    stats = next(iter(manager.stats().values()))
+    assert stats["names"] == ["test"]
+    assert stats["connections_opened"] == 2
+    assert stats["threads"] == 2
+
+
+def test_transaction_nesting_and_rollback(manager):
+    """Test: Verschachtelte Blöcke committen erst außen; Fehler rollen die ganze Transaktion zurück."""
+    with manager.transaction("test") as conn:
+        conn.execute("CREATE TABLE t (v INTEGER)")
+
+    with pytest.raises(RuntimeError):
+        with manager.transaction("test") as conn:
+            conn.execute("INSERT INTO t VALUES (1)")
+            with manager.transaction("test") as inner:
+                inner.row_factory = sqlite3.Row
+                inner.execute("INSERT INTO t VALUES (2)")
+            raise RuntimeError("boom")
+
+    with manager.transaction("test") as conn:
+        assert conn.row_factory is None
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+    stats = next(iter(manager.stats().values()))
+    assert stats["transactions"] == 2
+    assert stats["rollbacks"] == 1
+
+
+def test_closed_connection_is_replaced(manager):
+    """Test: Vom Aufrufer geschlossene Connections werden beim nächsten Zugriff ersetzt."""
+    conn = manager.get("test")
+    conn.close()
+    fresh = manager.get("test")
+    assert fresh is not conn
+    assert fresh.execute("SELECT 1").fetchone() == (1,)
+    assert next(iter(manager.stats().values()))["connections_reopened"] == 1
@@ -0,0 +1,81 @@
+"""
+Tests für die Read-only-Snapshots (Online-Backup, Staleness-Budget, Freshness-Header).
+"""
+import sqlite3
+
+import pytest
+from sqlalchemy import text
+
+from db import snapshot as snapshot_mod
+from db.snapshot import ReadSnapshot
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "live.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE kunden (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.execute("INSERT INTO kunden (name) VALUES ('a'), ('b')")
+    return str(path)
+
+
+def _count(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT COUNT(*) FROM kunden")).scalar()
+
+
+def test_snapshot_within_staleness_budget(tmp_path, source):
+    """Test: Innerhalb des Budgets wird der Snapshot wiederverwendet, danach erneuert."""
+    snap = ReadSnapshot(target_dir=tmp_path / "snap", max_age_s=60)
+    engine = snap.ensure_fresh(source)
+    assert _count(engine) == 2
+
+    with sqlite3.connect(source) as conn:
+        conn.execute("INSERT INTO kunden (name) VALUES ('c')")
+    assert snap.ensure_fresh(source) is engine
+    assert _count(engine) == 2  # Snapshot-Stand, Live-DB unberührt
+
+    headers = snap.headers()
+    assert headers["X-Data-Source"] == "snapshot"
+    assert float(headers["X-Data-Snapshot-Age"]) < 60
+
+    snap.created_at -= 120  # Budget überschritten
+    fresh = snap.ensure_fresh(source)
+    assert fresh is not engine
+    assert _count(fresh) == 3
+    assert snap.refreshes == 2
+
+
+def test_snapshot_is_read_only_and_generations_are_cleaned(tmp_path, source):
+    """Test: Snapshot ist nicht beschreibbar; alte Generationen werden entfernt."""
+    snap = ReadSnapshot(target_dir=tmp_path / "snap", max_age_s=60)
+    for _ in range(3):
+        snap.refresh(source)
+
+    with pytest.raises(Exception):
+        with snap.engine.begin() as conn:
+            conn.execute(text("INSERT INTO kunden (name) VALUES ('x')"))
+
+    files = sorted(p.name for p in (tmp_path / "snap").glob("*.db"))
+    assert len(files) == 2  # aktuelle + vorherige Generation
+    assert snap.path.name in files
+
+
+def test_read_engine_never_refreshes_inline(tmp_path, source, monkeypatch):
+    """Test: read_engine() liefert live, bis der Hintergrund-Job einen Snapshot erstellt hat."""
+    live = object()
+    snap = ReadSnapshot(target_dir=tmp_path / "snap", max_age_s=60)
+    monkeypatch.setattr(snapshot_mod, "_snapshot", snap)
+    monkeypatch.setattr(snapshot_mod, "_live_source", lambda: (live, source))
+    monkeypatch.setattr(snapshot_mod, "ENABLED", True)
+    engine, headers = snapshot_mod.read_engine()
+    assert engine is live and headers["X-Data-Source"] == "live"
+    assert snap.refreshes == 0
+
+    assert snapshot_mod.refresh_snapshot() is snap.engine
+    engine, headers = snapshot_mod.read_engine()
+    assert engine is snap.engine and headers["X-Data-Source"] == "snapshot"
+
+    snap.created_at -= 120  # Budget überschritten, Hintergrund-Job hängt: lieber live als zu alt
+    assert snapshot_mod.read_engine()[0] is live
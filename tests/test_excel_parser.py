@@ -0,0 +1,74 @@
+"""Tests für die Layout-Erkennung und das einmalige Einlesen (parse_teha_*)"""
+
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from openpyxl import Workbook
+
+from backend.parsers import excel_parser
+from backend.parsers.excel_parser import (
+    BRETFELD, SECTIONS, STANDARD, detect_layout, parse_teha_excel, parse_teha_excel_all_sheets,
+    parse_teha_excel_sections, parse_teha_workbook,
+)
+
+FIXTURE = Path(__file__).parent / "Tourenplanung.xlsx"
+
+
+def _workbook(path: Path) -> Path:
+    wb = Workbook()
+    std = wb.active
+    std.title = "Standard"
+    std.append(["Datum", " Tour ", "Name", "Adresse"])
+    std.append([datetime(2025, 1, 2), "W-07", "Kunde A", "Hauptstr. 1, 01067 Dresden"])
+    std.append([None, None, "Kunde B", "NA"])
+    bret = wb.create_sheet("Bretfeld")
+    for row in [["Tourenübersicht"], [], [], ["Kdnr", "Name"], [None, "Sonderfahrt"],
+                [4711, "Kunde C", "Weg 2", 1067.0, "Dresden"], [None, None], [1, "Ohne Adresse"]]:
+        bret.append(row)
+    sections = wb.create_sheet("TEHA")
+    for row in [["Tourenübersicht"], ["Kdnr", "Name", "Straße", "PLZ", "Ort"], [None, "W-09.00 Uhr BAR"],
+                [1, "Bar Kunde", "Reisstr. 40", "01257", "Dresden"], [], [None, "W-09.00 Uhr Tour"],
+                [2, "Kunde D", "Fröbelstraße 20", "01159", "Dresden"]]:
+        sections.append(row)
+    wb.create_sheet("Leer")
+    wb.save(path)
+    return path
+
+
+def test_layout_is_sniffed_per_sheet_from_one_streaming_read(tmp_path, monkeypatch):
+    path = _workbook(tmp_path / "export.xlsx")
+    sheets = {name: list(rows) for name, rows in excel_parser._iter_sheets(path, "cp850")}
+    assert {name: detect_layout(rows) for name, rows in sheets.items()} == {
+        "Standard": STANDARD, "Bretfeld": BRETFELD, "TEHA": SECTIONS, "Leer": BRETFELD,
+    }
+
+    # pandas wird für xlsx nicht gebraucht
+    monkeypatch.setitem(__import__("sys").modules, "pandas", None)
+    tours = parse_teha_workbook(path, fallback_date="2025-01-03")
+    assert [(t["tour"], t["datum"], [k["name"] for k in t["kunden"]]) for t in tours] == [
+        ("W-07", "2025-01-02", ["Kunde A"]),
+        ("Sonderfahrt", "2025-01-03", ["Kunde C"]),
+        ("W-09.00 Uhr", "2025-01-03", ["Bar Kunde", "Kunde D"]),
+    ]
+    assert [k["isBarCash"] for k in tours[2]["kunden"]] == [True, False]
+    assert parse_teha_excel(path)["kunden"] == [{"name": "Kunde A", "adresse": "Hauptstr. 1, 01067 Dresden"}]
+    # parse_teha_excel_all_sheets bricht (wie bisher) an Blättern ohne Daten ab, parse_teha_workbook überspringt sie
+    with pytest.raises(ValueError):
+        parse_teha_excel_all_sheets(path)
+
+
+@pytest.mark.skipif(not FIXTURE.exists(), reason="Tourenplanung.xlsx fehlt")
+def test_sections_from_xlsx_and_csv_match(tmp_path):
+    from openpyxl import load_workbook
+
+    ws = load_workbook(FIXTURE, read_only=True).worksheets[0]
+    csv_path = tmp_path / "Tourenplanung.csv"
+    with open(csv_path, "w", encoding="cp850", errors="replace") as f:
+        for row in ws.iter_rows(values_only=True):
+            f.write(";".join("" if v is None else str(v) for v in row) + "\n")
+
+    from_xlsx = parse_teha_excel_sections(FIXTURE, fallback_date="2025-08-11")
+    assert len(from_xlsx) > 5
+    assert from_xlsx == parse_teha_excel_sections(csv_path, fallback_date="2025-08-11")
+    assert parse_teha_workbook(FIXTURE, fallback_date="2025-08-11") == from_xlsx
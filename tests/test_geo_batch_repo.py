@@ -0,0 +1,69 @@
+"""
+Tests für die Batch-Auflösung (Cache, Alias, Fail-Cache, Manual-Queue in einem Roundtrip).
+"""
+from importlib import import_module, reload
+
+import pytest
+
+_MODULES = [
+    "db.core", "db.schema_fail", "db.schema", "db.schema_alias",
+    "repositories.geo_repo", "repositories.geo_alias_repo", "repositories.geo_fail_repo",
+    "repositories.manual_repo", "repositories.geo_batch_repo",
+]
+
+
+@pytest.fixture
+def repos(tmp_path, monkeypatch):
+    """Frische Test-DB; danach werden die Module wieder an die Standard-DB gebunden."""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path/'t.db'}")
+    mods = {name: reload(import_module(name)) for name in _MODULES}
+    mods["db.schema_fail"].ensure_fail_schema()
+    mods["db.schema"].ensure_schema()
+    mods["db.schema_alias"].ensure_alias_schema()
+    yield tuple(mods[name] for name in _MODULES[4:])
+    monkeypatch.undo()
+    for name in _MODULES:
+        reload(import_module(name))
+
+
+def test_resolve_batch_returns_all_facts(repos):
+    """Test: Direkter Treffer, Alias, Fail-Eintrag und Manual-Queue pro Schlüssel."""
+    geo_repo, alias_repo, fail_repo, manual_repo, batch_repo = repos
+
+    geo_repo.upsert("Fröbelstraße 1, Dresden", 51.05, 13.74)
+    alias_repo.set_alias("Froebelstr. 1, Dresden", "Fröbelstraße 1, Dresden")
+    fail_repo.mark_nohit("Unbekannt 9, Dresden")
+    manual_repo.add_open("Unbekannt 9, Dresden", "geocode_miss")
+
+    direct = geo_repo.normalize_addr("Fröbelstraße 1, Dresden")
+    facts = batch_repo.resolve_batch([direct, "Froebelstr. 1, Dresden", "Unbekannt 9, Dresden", direct, ""])
+
+    assert list(facts) == [direct, "Froebelstr. 1, Dresden", "Unbekannt 9, Dresden"]
+    assert facts[direct].geo["lat"] == 51.05
+    assert facts[direct].alias_of is None
+
+    via_alias = facts["Froebelstr. 1, Dresden"]
+    assert via_alias.geo is None
+    assert via_alias.alias_of == direct
+    assert via_alias.resolved["lon"] == 13.74
+
+    missing = facts["Unbekannt 9, Dresden"]
+    assert missing.resolved is None
+    assert missing.fail["reason"] == "no_result"
+    assert missing.manual_open is True
+
+
+def test_lookups_beyond_variable_limit(repos):
+    """Test: Große Schlüssellisten werden gechunkt; skip_set filtert nach den übergebenen Adressen."""
+    _, alias_repo, fail_repo, _, batch_repo = repos
+
+    fail_repo.mark_temp("Andere Straße 1, Dresden")
+    fail_repo.mark_temp("Straße 1234, Dresden")
+
+    keys = [f"Straße {i}, Dresden" for i in range(40000)]
+    facts = batch_repo.resolve_batch(keys)
+    assert len(facts) == 40000
+    assert facts["Straße 1234, Dresden"].fail is not None
+
+    assert alias_repo.resolve_aliases(keys) == {}
+    assert fail_repo.skip_set(keys) == {"Straße 1234, Dresden"}
@@ -0,0 +1,71 @@
+"""Tests für die vektorisierte Regionsprüfung (Landes-Umrisse + Raster-Lookup)"""
+
+import numpy as np
+
+from backend.services import geo_validator as gv
+from backend.services.geo_regions import RegionIndex
+from backend.services.geo_validator import GeoValidator, ValidationResult
+from repositories import geo_repo
+
+CITIES = [
+    # Geschäftsgebiet
+    ("FAMO Dresden", 51.0112, 13.7016, "Sachsen"),
+    ("Görlitz", 51.1528, 14.9872, "Sachsen"),
+    ("Plauen", 50.4950, 12.1383, "Sachsen"),
+    ("Potsdam", 52.3906, 13.0645, "Brandenburg"),
+    ("Berlin", 52.5200, 13.4050, "Brandenburg"),
+    ("Magdeburg", 52.1205, 11.6276, "Sachsen-Anhalt"),
+    ("Erfurt", 50.9787, 11.0328, "Thüringen"),
+    # Außerhalb, obwohl in den alten Bounding-Boxen
+    ("Hof", 50.3130, 11.9128, None),
+    ("Coburg", 50.2584, 10.9629, None),
+    ("Göttingen", 51.5413, 9.9158, None),
+    ("Děčín", 50.7821, 14.2148, None),
+    ("Bolesławiec", 51.2646, 15.5694, None),
+]
+
+
+def test_cities_batch_matches_scalar():
+    validator = GeoValidator()
+    batch = validator.validate_address_batch([(name, lat, lon) for name, lat, lon, _ in CITIES])
+    check = validator.check_coordinates([c[1] for c in CITIES], [c[2] for c in CITIES])
+
+    for (name, lat, lon, state), (address, result, error), region in zip(CITIES, batch, check.region):
+        assert address == name
+        expected = ValidationResult.VALID if state else ValidationResult.OUTSIDE_SERVICE_AREA
+        assert result == expected, name
+        if state:
+            assert error is None and region == state, name
+        else:
+            assert error.detected_region == region, name
+        scalar, scalar_error = validator.validate_coordinates(lat, lon, name)
+        assert scalar == result and scalar_error == error, name
+
+    assert validator.validate_coordinates(float("nan"), 13.7)[0] == ValidationResult.INVALID_COORDINATES
+    assert validator.validate_address_batch([]) == []
+
+
+def test_grid_matches_exact_and_refresh_writes_changes(monkeypatch):
+    index = RegionIndex(tolerance_km=0)
+    rng = np.random.default_rng(7)
+    lat = rng.uniform(49.5, 54.0, 50_000)
+    lon = rng.uniform(9.5, 15.5, 50_000)
+    assert (index.locate(lat, lon)[0] == index._exact(lat, lon)).all()
+
+    rows = [
+        ("dresden", 51.0112, 13.7016, None),  # neu → 1
+        ("hof", 50.3130, 11.9128, 1),  # alte Box sagte 1 → 0
+        ("erfurt", 50.9787, 11.0328, 1),  # unverändert
+        ("kaputt", None, None, None),  # ungültig → 0
+    ]
+    written = []
+    monkeypatch.setattr(geo_repo, "coordinates_for_region_check", lambda only_missing=False: rows)
+    monkeypatch.setattr(geo_repo, "set_region_ok", lambda updates: written.extend(updates) or len(updates))
+
+    stats = gv.refresh_geo_cache_region_ok()
+    assert sorted(written) == [("dresden", 1), ("hof", 0), ("kaputt", 0)]
+    assert (stats["total"], stats["ok"], stats["outside"], stats["invalid"], stats["changed"]) == (4, 2, 1, 1, 3)
+    assert stats["regions"]["Sachsen"] == 1 and stats["regions"]["Thüringen"] == 1
+
+    written.clear()
+    assert gv.refresh_geo_cache_region_ok(dry_run=True)["changed"] == 3 and written == []
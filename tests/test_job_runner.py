@@ -0,0 +1,174 @@
+"""
+Tests für den Job-Runner (Idempotenz, Priorität, Abbruch, Prozess-Pool, Wiederanlauf).
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.services.job_runner import JobRunner, content_hash
+
+
+def _square(params, payload):
+    return {"value": params["n"] ** 2, "size": len(payload)}
+
+
+def _wait_for(runner, job_id, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = runner.get(job_id)
+        if job["status"] in ("succeeded", "failed", "cancelled"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} nicht abgeschlossen")
+
+
+@pytest.fixture
+def runner(tmp_path):
+    return JobRunner(db=tmp_path / "jobs.db", thread_workers=1, process_workers=0)
+
+
+def test_resubmit_same_content_returns_cached_result(runner):
+    """Test: Gleicher Inhalt -> gecachtes Ergebnis, anderer Inhalt/force -> neuer Job."""
+    calls = []
+
+    def handler(ctx):
+        calls.append(ctx.payload)
+        ctx.progress.update(processed=1)
+        return {"rows": len(ctx.payload.splitlines()), "file": ctx.params["filename"]}
+
+    runner.register("csv", handler)
+    first = runner.submit("csv", payload=b"a\nb\n", params={"filename": "x.csv"})
+    assert first["cached"] is False
+    done = _wait_for(runner, first["id"])
+    assert done["status"] == "succeeded"
+    assert done["result"] == {"status_code": 200, "body": {"rows": 2, "file": "x.csv"}}
+
+    again = runner.submit("csv", payload=b"a\nb\n", params={"filename": "x.csv"})
+    assert again["cached"] is True and again["id"] == first["id"]
+    assert len(calls) == 1
+
+    other = runner.submit("csv", payload=b"a\n", params={"filename": "x.csv"})
+    forced = runner.submit("csv", payload=b"a\nb\n", params={"filename": "x.csv"}, force=True)
+    assert other["id"] != first["id"] and forced["id"] != first["id"]
+    _wait_for(runner, other["id"])
+    _wait_for(runner, forced["id"])
+    assert len(calls) == 3
+    assert content_hash("csv", b"x", {"a": 1, "b": 2}) == content_hash("csv", b"x", {"b": 2, "a": 1})
+
+
+def test_priority_order_and_cancel(runner):
+    """Test: Höhere Priorität läuft zuerst; wartende Jobs werden sofort, laufende kooperativ abgebrochen."""
+    gate = threading.Event()
+    order = []
+
+    def handler(ctx):
+        if ctx.params["name"] == "blocker":
+            while not gate.is_set():
+                time.sleep(0.01)
+            ctx.raise_if_cancelled()
+        order.append(ctx.params["name"])
+        return ctx.params["name"]
+
+    runner.register("work", handler)
+    blocker = runner.submit("work", params={"name": "blocker"})
+    low = runner.submit("work", params={"name": "low"}, priority=0)
+    high = runner.submit("work", params={"name": "high"}, priority=10)
+    dropped = runner.submit("work", params={"name": "dropped"}, priority=5)
+
+    assert runner.cancel(dropped["id"])["status"] == "cancelled"
+    assert runner.cancel(blocker["id"])["cancel_requested"] is True
+    gate.set()
+
+    assert _wait_for(runner, blocker["id"])["status"] == "cancelled"
+    _wait_for(runner, low["id"])
+    assert _wait_for(runner, high["id"])["status"] == "succeeded"
+    assert order == ["high", "low"]
+
+
+def test_cancel_through_other_runner(tmp_path, monkeypatch):
+    """Test: Abbruch über einen anderen Worker (gleiche DB) erreicht ctx.cancelled() per Heartbeat."""
+    monkeypatch.setattr("backend.services.job_runner.LEASE_S", 0.3)
+    db = tmp_path / "jobs.db"
+    worker = JobRunner(db=db, thread_workers=1, process_workers=0)
+    seen = threading.Event()
+
+    def handler(ctx):
+        deadline = time.time() + 10
+        while not ctx.cancelled() and time.time() < deadline:
+            time.sleep(0.01)
+        seen.set()
+        return "fertig"
+
+    worker.register("work", handler)
+    worker.start()
+    job = worker.submit("work", payload=b"z")
+    deadline = time.time() + 5
+    while worker.get(job["id"])["status"] != "running" and time.time() < deadline:
+        time.sleep(0.01)
+
+    other = JobRunner(db=db, thread_workers=1, process_workers=0)
+    assert other.cancel(job["id"])["cancel_requested"] is True
+    assert seen.wait(5)
+    assert _wait_for(worker, job["id"])["status"] == "cancelled"
+
+
+def test_process_executor_and_async_wait(tmp_path):
+    """Test: CPU-Jobs laufen im Prozess-Pool; wait() wartet ohne zu blockieren."""
+    runner = JobRunner(db=tmp_path / "jobs.db", thread_workers=1, process_workers=1)
+    runner.register("square", _square, executor="process")
+    job = runner.submit("square", payload=b"abc", params={"n": 7})
+
+    done = asyncio.run(asyncio.wait_for(runner.wait(job["id"]), timeout=30))
+    assert done["status"] == "succeeded"
+    assert done["result"]["body"] == {"value": 49, "size": 3}
+    assert runner.run_cpu(_square, {"n": 3}, b"") == {"value": 9, "size": 0}
+
+
+def test_start_requeues_interrupted_jobs(tmp_path):
+    """Test: Nach einem Neustart werden laufende/wartende Jobs erneut ausgeführt."""
+    db = tmp_path / "jobs.db"
+    crashed = JobRunner(db=db, thread_workers=1, process_workers=0)
+    crashed.register("work", lambda ctx: time.sleep(60))
+    crashed._pump = lambda: None  # Worker "stürzt ab", bevor der Job läuft
+    job = crashed.submit("work", payload=b"x")
+    from db.connections import connection
+    with connection(db) as conn:
+        conn.execute("UPDATE jobs SET status = 'running' WHERE id = ?", (job["id"],))
+
+    restarted = JobRunner(db=db, thread_workers=1, process_workers=0)
+    restarted.register("work", lambda ctx: {"payload": ctx.payload.decode()})
+    assert restarted.start() == 1
+    done = _wait_for(restarted, job["id"])
+    assert done["status"] == "succeeded"
+    assert done["result"]["body"] == {"payload": "x"}
+    assert done["attempts"] == 1
+
+
+def test_start_keeps_jobs_of_live_workers_and_wait_polls_db(tmp_path):
+    """Test: Jobs mit gültiger Lease (anderer Worker lebt) bleiben laufen; wait() pollt die DB."""
+    db = tmp_path / "jobs.db"
+    other = JobRunner(db=db, thread_workers=1, process_workers=0)
+    other.register("work", lambda ctx: {"ok": True})
+    other._pump = lambda: None
+    job = other.submit("work", payload=b"y")
+    from db.connections import connection
+    with connection(db) as conn:
+        conn.execute("UPDATE jobs SET status = 'running', owner = 'anderer-worker', heartbeat_at = ? WHERE id = ?",
+                     (time.time(), job["id"]))
+
+    worker = JobRunner(db=db, thread_workers=1, process_workers=0)
+    worker.register("work", lambda ctx: {"ok": True})
+    assert worker.start() == 0
+    assert worker.get(job["id"])["status"] == "running"
+
+    def finish_elsewhere():
+        time.sleep(0.3)
+        with connection(db) as conn:
+            conn.execute("UPDATE jobs SET status = 'succeeded', result = '{\"status_code\": 200, \"body\": 1}' "
+                         "WHERE id = ?", (job["id"],))
+
+    threading.Thread(target=finish_elsewhere).start()
+    done = asyncio.run(asyncio.wait_for(worker.wait(job["id"]), timeout=10))
+    assert done["status"] == "succeeded" and done["result"]["body"] == 1
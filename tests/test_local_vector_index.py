@@ -0,0 +1,158 @@
+"""
+Tests für den lokalen Vektor-Index (exakt, IVF, Persistenz, Filter).
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from backend.services import local_vector_index
+from backend.services.local_vector_index import LocalVectorIndex, LocalVectorStore
+
+
+def _meta(i, tour_type="W"):
+    return {"tour_id": f"T{i}", "datum": "2025-01-10", "tour_type": tour_type}
+
+
+def test_exact_search_returns_nearest(tmp_path):
+    """Test: Exakte Cosine-Suche liefert den nächsten Vektor zuerst."""
+    index = LocalVectorIndex(tmp_path, dim=3)
+    index.upsert(["a", "b", "c"], [[1, 0, 0], [0, 1, 0], [0.9, 0.1, 0]], [_meta(1), _meta(2), _meta(3)])
+    hits = index.search([1, 0, 0], k=2)
+    assert [h[0] for h in hits] == ["a", "c"]
+    assert hits[0][1] < 1e-6
+
+
+def test_metadata_filter_applied_before_scoring(tmp_path):
+    """Test: Filter schließt Treffer aus, bevor gescored wird."""
+    index = LocalVectorIndex(tmp_path, dim=2)
+    index.upsert(["w", "pir"], [[1, 0], [1, 0.01]], [_meta(1, "W"), _meta(2, "PIR")])
+    hits = index.search([1, 0], k=5, where={"tour_type": "PIR"})
+    assert [h[0] for h in hits] == ["pir"]
+
+
+def test_upsert_replaces_and_persists(tmp_path):
+    """Test: Upsert ersetzt bestehende IDs; Index ist nach Neuladen (memmap) gleich."""
+    index = LocalVectorIndex(tmp_path, dim=2)
+    index.upsert(["a"], [[1, 0]], [_meta(1)])
+    index.upsert(["a", "b"], [[0, 1], [1, 0]], [_meta(1), _meta(2)])
+    assert len(index) == 2
+
+    reloaded = LocalVectorIndex(tmp_path, dim=2)
+    assert len(reloaded) == 2
+    assert reloaded.search([0, 1], k=1)[0][0] == "a"
+
+    reloaded.compact()
+    record_size = local_vector_index.ID_BYTES + 2 * 4
+    assert (tmp_path / "data.1.bin").stat().st_size == local_vector_index._HEADER_SIZE + 2 * record_size
+    assert not (tmp_path / "data.0.bin").exists()
+    assert [h[0] for h in LocalVectorIndex(tmp_path, dim=2).search([0, 1], k=2)] == ["a", "b"]
+
+
+def test_partial_vector_write_is_truncated(tmp_path):
+    """Test: Halb geschriebene Vektoren (Absturz) werden beim Laden verworfen."""
+    index = LocalVectorIndex(tmp_path, dim=2)
+    index.upsert(["a"], [[1, 0]], [_meta(1)])
+    with open(tmp_path / "data.0.bin", "ab") as f:  # nicht bestätigter Rest (Zähler im Header unverändert)
+        f.write(b"\xff" * 100)
+    reloaded = LocalVectorIndex(tmp_path, dim=2)
+    reloaded.upsert(["b"], [[0, 1]], [_meta(2)])
+    assert reloaded.search([0, 1], k=1)[0][0] == "b"
+
+
+def test_ivf_mode_finds_exact_neighbour(tmp_path, monkeypatch):
+    """Test: IVF + int8-Kandidaten finden den exakten Nachbarn (Re-Ranking)."""
+    monkeypatch.setattr(local_vector_index, "IVF_THRESHOLD", 500)
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(2000, 16)).astype(np.float32)
+    store = LocalVectorStore(tmp_path)
+    ids = [f"id{i}" for i in range(len(vectors))]
+    store.upsert(ids, vectors.tolist(), [_meta(i) for i in range(len(vectors))])
+    index = store.index_for(16)
+    assert index._ivf is not None
+
+    hits = store.search(vectors[123].tolist(), k=3)
+    assert hits[0][0] == "id123"
+
+    # Nach dem IVF-Aufbau angehängte Vektoren werden ebenfalls gefunden
+    store.upsert(["neu"], [(-vectors[0]).tolist()], [_meta(9999)])
+    assert store.search((-vectors[0]).tolist(), k=1)[0][0] == "neu"
+
+
+def test_store_upsert_compacts_and_rebuilds_ivf(tmp_path, monkeypatch):
+    """Test: Store-Upsert kompaktiert ab Tombstone-Anteil und baut IVF bei großem Rest neu auf."""
+    monkeypatch.setattr(local_vector_index, "IVF_THRESHOLD", 200)
+    monkeypatch.setattr(local_vector_index, "COMPACT_MIN_TOMBSTONES", 50)
+    rng = np.random.default_rng(2)
+    store = LocalVectorStore(tmp_path)
+    vectors = rng.normal(size=(300, 8)).astype(np.float32)
+    store.upsert([f"id{i}" for i in range(300)], vectors.tolist(), [_meta(i) for i in range(300)])
+    index = store.index_for(8)
+    assert int(index._ivf["rows"][0]) == 300
+
+    # 10 % neue Zeilen → IVF wird über alle Zeilen neu aufgebaut
+    extra = rng.normal(size=(30, 8)).astype(np.float32)
+    store.upsert([f"neu{i}" for i in range(30)], extra.tolist(), [_meta(i) for i in range(30)])
+    assert int(index._ivf["rows"][0]) == 330
+
+    # 150 ersetzte IDs → Tombstones > 25 % → neue Generation ohne Tombstones
+    store.upsert([f"id{i}" for i in range(150)], vectors[:150].tolist(), [_meta(i) for i in range(150)])
+    assert index._generation == 1 and len(index._ids) == len(index) == 330
+    assert int(index._ivf["rows"][0]) == 330
+    assert store.search(vectors[5].tolist(), k=1)[0][0] == "id5"
+
+
+def test_vector_db_falls_back_to_local_index(tmp_path, monkeypatch):
+    """Test: Ohne ChromaDB speichert und sucht vector_db im lokalen Index."""
+    from backend.services import vector_db
+
+    monkeypatch.setattr(vector_db, "get_tours_collection", lambda: None)
+    monkeypatch.setattr(local_vector_index, "_store", LocalVectorStore(tmp_path))
+    assert vector_db.add_tour_embedding("W-07", "2025-01-10", [1.0, 0.0, 0.0], {"tour_type": "W"})
+    assert vector_db.add_tour_embedding("T-1", "2025-01-10", [0.0, 1.0, 0.0], {"tour_type": "T"})
+
+    results = vector_db.search_similar_tours([1.0, 0.1, 0.0], n_results=1)
+    assert results[0]["tour_id"] == "W-07"
+    assert vector_db.search_similar_tours([1.0, 0.1, 0.0], filter_metadata={"tour_type": "T"})[0]["tour_id"] == "T-1"
+
+
+def test_chroma_collection_uses_cosine_space(monkeypatch):
+    """Test: ChromaDB-Collection wird im Cosine-Space angelegt (gleiche Skala wie der lokale Index)."""
+    from backend.services import vector_db
+
+    class FakeClient:
+        def get_or_create_collection(self, name, metadata):
+            self.metadata = metadata
+            return type("Collection", (), {"name": name, "metadata": metadata})()
+
+    client = FakeClient()
+    monkeypatch.setattr(vector_db, "get_chroma_client", lambda: client)
+    monkeypatch.setattr(vector_db, "_chroma_collection", None)
+    assert vector_db.get_tours_collection().metadata["hnsw:space"] == "cosine"
+
+
+def test_concurrent_writers_in_two_processes_keep_ids_and_rows_aligned(tmp_path):
+    """Test: Zwei Prozesse hängen gleichzeitig an; jede ID zeigt danach auf ihren eigenen Vektor."""
+    script = (
+        "import sys; sys.path.insert(0, sys.argv[1]);"
+        "from backend.services.local_vector_index import LocalVectorIndex;"
+        "index = LocalVectorIndex(sys.argv[2], dim=4); p = int(sys.argv[3]);"
+        "[index.upsert([f'p{p}-{i}'], [[p + 1, i + 1, 0, 1]], [{'p': p}]) for i in range(40)]"
+    )
+    root = str(Path(__file__).resolve().parents[1])
+    procs = [subprocess.Popen([sys.executable, "-c", script, root, str(tmp_path), str(p)]) for p in (0, 1)]
+    assert all(proc.wait(timeout=60) == 0 for proc in procs)
+
+    index = LocalVectorIndex(tmp_path, dim=4)
+    assert len(index) == 80
+    for p in (0, 1):
+        for i in (0, 17, 39):
+            assert index.search([p + 1, i + 1, 0, 1], k=1, where={"p": p})[0][0] == f"p{p}-{i}"
+
+    # Ein bereits geöffneter Index sieht Appends und Kompaktierung eines anderen Prozesses
+    subprocess.run([sys.executable, "-c", script, root, str(tmp_path), "2"], check=True, timeout=60)
+    assert len(index) == 120
+    assert index.search([3, 40, 0, 1], k=1)[0][0] == "p2-39"
+    LocalVectorIndex(tmp_path, dim=4).compact()
+    assert len(index) == 120 and index.search([1, 1, 0, 1], k=1, where={"p": 0})[0][0] == "p0-0"
@@ -0,0 +1,87 @@
+"""
+Tests für die asynchrone Datei-Log-Pipeline.
+"""
+import logging
+
+from backend.utils.log_pipeline import BatchedFileWriter, LogPipeline, log_route, _parse_sampling
+
+
+def _make_pipeline(tmp_path, **kwargs):
+    writer = BatchedFileWriter(tmp_path / "debug.log", console=False,
+                               max_bytes=kwargs.pop("max_bytes", 0),
+                               backup_count=kwargs.pop("backup_count", 2))
+    return LogPipeline(writer, **kwargs), writer
+
+
+def test_log_lines_written_after_flush(tmp_path):
+    """Test: Zeilen landen (in Reihenfolge) in der Datei."""
+    pipeline, writer = _make_pipeline(tmp_path)
+    for i in range(100):
+        pipeline.log((f"zeile {i}",))
+    writer.flush()
+    lines = (tmp_path / "debug.log").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 100
+    assert lines[0].endswith("zeile 0")
+    assert lines[-1].endswith("zeile 99")
+    writer.stop()
+
+
+def test_level_gating_skips_formatting(tmp_path):
+    """Test: Deaktivierte Debug-Meldungen werden nicht formatiert."""
+    pipeline, writer = _make_pipeline(tmp_path, level=logging.INFO)
+
+    class Expensive:
+        def __str__(self):
+            raise AssertionError("darf nicht formatiert werden")
+
+    assert not pipeline.is_enabled(logging.DEBUG)
+    pipeline.log(("debug", Expensive()), level=logging.DEBUG)
+    writer.flush()
+    assert writer.written == 0
+    writer.stop()
+
+
+def test_route_sampling(tmp_path):
+    """Test: Sampling pro Route (längster Präfix), Warnungen immer."""
+    pipeline, writer = _make_pipeline(tmp_path, sampling=_parse_sampling("/api/workflow=0,/api/workflow/status=1"))
+    with log_route("/api/workflow/upload"):
+        pipeline.log(("weg",))
+        pipeline.log(("warnung",), level=logging.WARNING)
+    pipeline.log(("status",), route="/api/workflow/status")
+    writer.flush()
+    content = (tmp_path / "debug.log").read_text(encoding="utf-8")
+    assert "weg" not in content
+    assert "warnung" in content
+    assert "status" in content
+    assert pipeline.sampled_out == 1
+    writer.stop()
+
+
+def test_size_rotation(tmp_path):
+    """Test: Größenbasierte Rotation mit begrenzter Anzahl Backups."""
+    pipeline, writer = _make_pipeline(tmp_path, max_bytes=200, backup_count=2)
+    for i in range(20):
+        pipeline.log(("x" * 100,))
+        writer.flush()
+    writer.stop()
+    assert (tmp_path / "debug.log.1").exists()
+    assert (tmp_path / "debug.log.2").exists()
+    assert not (tmp_path / "debug.log.3").exists()
+
+
+def test_percent_style_args_are_formatted_lazily(tmp_path):
+    """Test: %-Argumente werden erst nach dem Gating eingesetzt, Level-Namen werden akzeptiert."""
+    pipeline, writer = _make_pipeline(tmp_path, level=logging.INFO)
+
+    class Expensive:
+        def __str__(self):
+            raise AssertionError("darf nicht formatiert werden")
+
+    pipeline.log(("Tour %s: %.1f Min", Expensive()), level="DEBUG")
+    pipeline.log(("Tour %s: %.1f Min", "W-07", 42.25))
+    pipeline.log(("100% fertig",))
+    pipeline.log(("Tour %d", "kein-int"), level="warning")
+    writer.flush()
+    lines = (tmp_path / "debug.log").read_text(encoding="utf-8").splitlines()
+    assert [line.split("] ", 1)[1] for line in lines] == ["Tour W-07: 42.2 Min", "100% fertig", "Tour %d kein-int"]
+    writer.stop()
@@ -0,0 +1,84 @@
+"""
+Tests für die reine ASGI-Request-Pipeline (IDs, Rate-Limit, Security-Header, Zähler, Streaming).
+"""
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from backend.middlewares import error_tally, rate_limit
+from backend.middlewares.pipeline import RequestPipelineMiddleware
+from backend.services import request_tracing, success_stats
+from backend.services.request_tracing import RequestTracer
+from backend.services.success_stats import SuccessStatsAggregator
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(request_tracing, "_tracer", RequestTracer(None))
+    monkeypatch.setattr(success_stats, "_aggregator", SuccessStatsAggregator())
+    monkeypatch.setitem(rate_limit.LOGIN_RATE_LIMIT, "max_attempts", 2)
+    rate_limit._rate_limit_store.clear()
+    error_tally.reset_metrics()
+
+    app = FastAPI()
+    app.add_middleware(RequestPipelineMiddleware)
+
+    @app.get("/api/tour/{tour_id}")
+    async def tour(tour_id: str):
+        return {"tour_id": tour_id}
+
+    @app.post("/api/auth/login")
+    async def login():
+        raise HTTPException(401, detail="falsch")
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("kaputt")
+
+    @app.get("/stream")
+    async def stream():
+        async def body():
+            for i in range(3):
+                yield f"{i}\n"
+        return StreamingResponse(body(), media_type="application/x-ndjson")
+
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def test_ids_security_headers_and_success_stats(client):
+    """Test: Request-ID wird übernommen, Security-Header gesetzt, 2xx pro Template gezählt."""
+    response = client.get("/api/tour/T1", headers={"X-Request-ID": "abc123"})
+    assert response.status_code == 200
+    assert response.headers["X-Request-ID"] == "abc123"
+    assert response.headers["X-Frame-Options"] == "DENY"
+    assert "Content-Security-Policy" in response.headers
+
+    client.get("/api/tour/T2")
+    pending = success_stats.get_success_aggregator()._pending
+    assert [(endpoint, b.calls) for (endpoint, _), b in pending.items()] == [("/api/tour/{tour_id}", 2)]
+    assert request_tracing.get_tracer().snapshot()["/api/tour/{tour_id}"]["request"]["count"] == 2
+
+
+def test_login_rate_limit_and_error_tally(client):
+    """Test: Nach max_attempts Fehlversuchen 429 ohne Handler; 4xx/5xx werden gezählt."""
+    first = client.post("/api/auth/login")
+    assert first.status_code == 401
+    assert first.headers["X-RateLimit-Remaining"] == "1"
+    client.post("/api/auth/login")
+    blocked = client.post("/api/auth/login")
+    assert blocked.status_code == 429
+    assert blocked.headers["X-Frame-Options"] == "DENY"
+
+    crashed = client.get("/boom")
+    assert crashed.status_code == 500
+    assert crashed.json()["error"] == "internal_server_error"
+    assert error_tally.get_metrics() == {"http_4xx": 3, "http_5xx": 1}
+
+
+def test_streaming_response_passes_through(client):
+    """Test: Streaming-Antworten werden unverändert durchgereicht (mit Headern)."""
+    with client.stream("GET", "/stream") as response:
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert "X-Request-ID" in response.headers
+        assert list(response.iter_lines()) == ["0", "1", "2"]
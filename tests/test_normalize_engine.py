@@ -0,0 +1,32 @@
+"""
+Tests für die vorkompilierte Normalisierungs-Pipeline (Memo, Batch, Single-Pass-Fixes).
+"""
+from common.normalize import (
+    _normalize_text, clear_normalize_cache, normalize_address, normalize_many,
+)
+from common.text_cleaner import MultiReplacer, _fix_question_marks
+
+
+def test_multi_replacer_leftmost_longest():
+    """Test: Längster Schlüssel gewinnt, Ersetzungen werden nicht erneut gescannt."""
+    replacer = MultiReplacer({"ab": "X", "abc": "Y", "c": "ab"})
+    assert replacer.replace("abcab c") == "YX ab"
+
+
+def test_question_mark_fixes_single_pass():
+    """Test: Spezifische ??-Fixes werden nicht mehr von kürzeren verdeckt."""
+    assert _fix_question_marks("Fr??belstra??e 5") == "Fröbelstraße 5"
+    assert _fix_question_marks("Cosch??tzer Stra??e 2") == "Coschützer Straße 2"
+    assert _fix_question_marks("Stolpener Strasse 1") == "Stolpener Strasse 1"  # ohne ?? unverändert
+
+
+def test_memo_and_batch():
+    """Test: Memo liefert identische Ergebnisse, normalize_many erhält die Reihenfolge."""
+    clear_normalize_cache()
+    raw = "Hauptstraße 5 | Halle 3, 01809 Heidenau"
+    first = normalize_address(raw)
+    assert normalize_address(raw) == first
+    assert _normalize_text.cache_info().hits >= 1
+
+    batch = normalize_many([raw, None, "", "A;;B", raw])
+    assert batch == [first, "", "", "A, B", first]
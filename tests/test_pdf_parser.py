@@ -0,0 +1,104 @@
+"""Tests für die parallele Seiten-Extraktion und den Seitentext-Cache des PDF-Parsers"""
+
+import pytest
+
+pytest.importorskip("pdfplumber")
+pytest.importorskip("reportlab")
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from backend.parsers import pdf_parser
+
+
+def _tour_plan(path, pages=4, per_page=12):
+    """Touren laufen über Seitengrenzen; BAR-Kopf vor dem Tour-Kopf derselben Tour."""
+    c = canvas.Canvas(str(path), pagesize=A4)
+    n = 0
+    for p in range(pages):
+        y = 800
+        if p % 2 == 0:
+            for line in (f"W-{7 + p:02d}.00 Uhr BAR", f"{4000 + n} Bar Kunde {n} - Reisstraße {n}, 01257 Dresden",
+                         f"W-{7 + p:02d}.00 Uhr Tour"):
+                c.drawString(50, y, line)
+                y -= 14
+            n += 1
+        for _ in range(per_page):
+            c.drawString(50, y, f"{5000 + n} Kunde {n} GmbH - Fröbelstraße {n}, 01159 Dresden")
+            n += 1
+            y -= 14
+        c.showPage()
+    c.save()
+    return path
+
+
+@pytest.fixture(autouse=True)
+def _isolated(monkeypatch, capsys):
+    monkeypatch.setattr(pdf_parser, "get_city_from_postal_code", lambda plz: "Dresden")
+    pdf_parser.clear_pdf_cache()
+    yield
+    pdf_parser.clear_pdf_cache()
+
+
+def test_parallel_extraction_merges_pages_in_order(tmp_path, monkeypatch):
+    path = _tour_plan(tmp_path / "plan.pdf")
+
+    monkeypatch.setattr(pdf_parser, "PDF_EXTRACT_WORKERS", 1)
+    serial = pdf_parser.parse_pdf_tours(path)
+
+    pdf_parser.clear_pdf_cache()
+    monkeypatch.setattr(pdf_parser, "PDF_EXTRACT_WORKERS", 3)
+    monkeypatch.setattr(pdf_parser, "PDF_PARALLEL_MIN_PAGES", 2)
+    parallel = pdf_parser.parse_pdf_tours(path)
+
+    assert parallel == serial
+    assert [(t["tour"], len(t["kunden"]), t.get("payment")) for t in parallel] == [
+        ("W-07.00", 25, "bar"), ("W-09.00", 25, "bar"),
+    ]
+    # BAR gilt nur für die Kunden vor dem zweiten Kopf derselben Tour
+    assert [k.get("payment") for k in parallel[0]["kunden"][:2]] == ["bar", None]
+
+
+def test_preview_reuses_page_text_by_file_hash(tmp_path, monkeypatch):
+    path = _tour_plan(tmp_path / "plan.pdf", pages=2)
+    calls = []
+    extract = pdf_parser.extract_page_texts
+    monkeypatch.setattr(pdf_parser, "extract_page_texts", lambda p: calls.append(p) or extract(p))
+
+    first = pdf_parser.preview_summary(path)
+    copy = tmp_path / "kopie.pdf"
+    copy.write_bytes(path.read_bytes())
+    assert pdf_parser.preview_summary(copy) == first
+    assert len(calls) == 1
+    assert first["customers_found"] == 25
+
+    # Geänderter Inhalt → neuer Hash → neue Extraktion
+    _tour_plan(copy, pages=1)
+    assert pdf_parser.preview_summary(copy)["customers_found"] == 13
+    assert len(calls) == 2
+
+
+def test_broken_pool_is_discarded_after_serial_fallback(tmp_path, monkeypatch):
+    """Test: Nach BrokenProcessPool wird seriell extrahiert und der Pool neu angelegt."""
+    from concurrent.futures.process import BrokenProcessPool
+
+    path = _tour_plan(tmp_path / "plan.pdf")
+    monkeypatch.setattr(pdf_parser, "PDF_EXTRACT_WORKERS", 2)
+    monkeypatch.setattr(pdf_parser, "PDF_PARALLEL_MIN_PAGES", 2)
+
+    class BrokenPool:
+        shut_down = False
+
+        def submit(self, *args):
+            raise BrokenProcessPool("worker died")
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            self.shut_down = True
+
+    broken = BrokenPool()
+    monkeypatch.setattr(pdf_parser, "_pool", broken)
+
+    texts = pdf_parser.extract_page_texts(path)
+
+    assert len(texts) == 4 and "Kunde" in texts[0]
+    assert broken.shut_down and pdf_parser._pool is None
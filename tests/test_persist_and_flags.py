@@ -133,3 +133,22 @@ def test_upsert_ex_functionality(tmp_path, monkeypatch):
     assert entry['source'] == 'geocoder'
     assert entry['precision'] == 'full'
     assert entry['region_ok'] == 1
+
+def test_persist_region_ok_matches_region_check(tmp_path, monkeypatch):
+    """Test: region_ok beim Geocoding folgt denselben Landes-Umrissen wie die geo_cache-Prüfung."""
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path/'t.db'}")
+    import db.core as core
+    reload(core)
+    import db.schema as schema
+    reload(schema)
+    schema.ensure_schema()
+
+    import repositories.geo_repo as repo
+    reload(repo)
+    from services.geocode_persist import write_result
+
+    potsdam = write_result('14467 Potsdam', [{"lat": "52.3906", "lon": "13.0645",
+                                              "address": {"state": "Brandenburg"}}])
+    hof = write_result('95028 Hof', [{"lat": "50.3130", "lon": "11.9128", "address": {"state": "Bayern"}}])
+    assert potsdam['region_ok'] == 1  # Brandenburg gehört zum Geschäftsgebiet
+    assert hof['region_ok'] == 0
@@ -0,0 +1,67 @@
+"""
+Tests für die Progress-Events (begrenzter Kanal, Abo als Stream, Verfall abgeschlossener Sessions).
+"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from backend.services.progress_events import ProgressHub, encode_event
+
+
+def test_progress_is_coalesced_and_partials_are_kept():
+    """Test: Nur der letzte Fortschritt wird gehalten, Teilergebnisse bleiben in Reihenfolge."""
+    hub = ProgressHub(max_events=10)
+    session = hub.open("session-0001", kind="test", processed=0, total=3)
+    for i in range(1, 4):
+        session.update(processed=i)
+        session.partial("tour", {"tour_id": f"T{i}"})
+    session.incr("errors")
+
+    events = session.events_since(0)
+    assert [e["event"] for e in events] == ["partial", "partial", "partial", "progress"]
+    assert events[-1]["data"] == {"processed": 3, "total": 3, "errors": 1}
+    assert [e["seq"] for e in events] == sorted(e["seq"] for e in events)
+    assert session.events_since(events[-1]["seq"]) == []
+
+
+def test_subscribe_streams_until_done():
+    """Test: Abonnent bekommt Events aus dem Hintergrund-Task und endet mit 'done'."""
+    hub = ProgressHub()
+    session = hub.open("session-0002", processed=0)
+
+    async def producer():
+        for i in range(3):
+            await asyncio.sleep(0)
+            session.partial("tour", i)
+        session.finish("completed", processed=3)
+
+    async def consume():
+        task = asyncio.ensure_future(producer())
+        received = [e async for e in session.subscribe(keepalive_s=1)]
+        await task
+        return received
+
+    received = asyncio.run(consume())
+    assert received[-1]["event"] == "done"
+    assert received[-1]["data"] == {"processed": 3, "status": "completed"}
+    assert [e["data"]["item"] for e in received if e["event"] == "partial"] == [0, 1, 2]
+    assert encode_event(received[-1], "sse").startswith(f"id: {received[-1]['seq']}\nevent: done\n")
+
+
+def test_finished_sessions_expire_and_ids_are_validated():
+    """Test: Abgeschlossene Sessions verfallen nach TTL; ungültige Client-IDs werden abgelehnt."""
+    hub = ProgressHub(ttl_s=10, idle_ttl_s=100, max_sessions=2)
+    done = hub.open("session-done")
+    done.finish()
+    running = hub.open("session-running")
+    assert hub.expire(now=done.finished_at + 11) == 1
+    assert hub.get("session-done") is None
+    assert hub.get("session-running") is running
+
+    hub.open("session-a")
+    hub.open("session-b")  # max_sessions: die älteste Session fällt heraus
+    assert len(hub) == 2 and hub.get("session-running") is None
+
+    with pytest.raises(HTTPException):
+        hub.open("../../etc")
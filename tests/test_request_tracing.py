@@ -0,0 +1,84 @@
+"""
+Tests für Request-Tracing (Spans, Histogramme, Prometheus-Export, Server-Timing).
+"""
+import sqlite3
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.services import request_tracing
+from backend.services.request_tracing import RequestTracer, traced
+
+
+def test_histogram_quantiles():
+    """Test: p50/p95 liegen im richtigen Bucket."""
+    tracer = RequestTracer()
+    for _ in range(90):
+        tracer.record("solve", 20.0)
+    for _ in range(10):
+        tracer.record("solve", 800.0)
+    stats = tracer.snapshot()[request_tracing.BACKGROUND_ROUTE]["solve"]
+    assert stats["count"] == 100
+    assert 10 < stats["p50_ms"] <= 25
+    assert 500 < stats["p95_ms"] <= 800
+    assert stats["max_ms"] == 800.0
+
+
+def test_spans_aggregated_per_route_and_flushed(tmp_path):
+    """Test: Spans landen unter dem Route-Template und werden gebündelt gespeichert."""
+    tracer = RequestTracer(tmp_path / "traces.db")
+    token = tracer.start_trace("abc", "/api/tour/T1")
+    with tracer.span("matrix", n=3):
+        pass
+    tracer.record("solve", 12.5)
+    tracer.finish_trace(token, "/api/tour/{tour_id}", status=200)
+
+    snapshot = tracer.snapshot()
+    assert set(snapshot["/api/tour/{tour_id}"]) == {"matrix", "solve"}
+    assert tracer.pending == 2
+
+    assert tracer.flush() == 2
+    assert tracer.pending == 0
+    with sqlite3.connect(tmp_path / "traces.db") as conn:
+        rows = conn.execute("SELECT trace_id, route, stage, status FROM trace_spans ORDER BY stage").fetchall()
+    assert rows == [("abc", "/api/tour/{tour_id}", "matrix", 200), ("abc", "/api/tour/{tour_id}", "solve", 200)]
+
+    text = tracer.render_prometheus()
+    assert 'famo_stage_duration_ms_bucket{route="/api/tour/{tour_id}",stage="solve",le="25"} 1' in text
+    assert 'famo_stage_duration_ms_count{route="/api/tour/{tour_id}",stage="matrix"} 1' in text
+
+
+def test_middleware_sets_server_timing(monkeypatch):
+    """Test: TraceIDMiddleware sammelt Spans des Handlers und setzt Server-Timing auf Wunsch."""
+    from backend.middlewares.trace_id import TraceIDMiddleware
+
+    tracer = RequestTracer(None)
+    monkeypatch.setattr(request_tracing, "_tracer", tracer)
+
+    @traced("geocode")
+    async def fake_geocode():
+        return 1
+
+    app = FastAPI()
+    app.add_middleware(TraceIDMiddleware)
+
+    @app.get("/api/tour/{tour_id}")
+    async def handler(tour_id: str):
+        await fake_geocode()
+        await fake_geocode()
+        return {"tour_id": tour_id}
+
+    client = TestClient(app)
+    plain = client.get("/api/tour/T1")
+    assert "Server-Timing" not in plain.headers
+
+    response = client.get("/api/tour/T2", headers={"X-Server-Timing": "1"})
+    assert response.status_code == 200
+    header = response.headers["Server-Timing"]
+    assert header.startswith('geocode;dur=')
+    assert 'desc="2x"' in header
+    assert "total;dur=" in header
+
+    stats = tracer.snapshot()["/api/tour/{tour_id}"]
+    assert stats["geocode"]["count"] == 4
+    assert stats["request"]["count"] == 2
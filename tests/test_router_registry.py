@@ -0,0 +1,66 @@
+"""
+Tests für das Router-Manifest (Profile, Lazy Loading, Import-Report).
+"""
+import sys
+import types
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from backend.core.router_registry import RouterSpec, register_routers, resolve_profile
+
+
+def _fake_module(name: str, path: str, calls: list) -> None:
+    """Registriert ein Fake-Router-Modul in sys.modules (importierbar per Name)."""
+    module = types.ModuleType(name)
+    router = APIRouter()
+
+    @router.get(path)
+    async def endpoint():
+        return {"module": name}
+
+    module.router = router
+    calls.append(name)
+    sys.modules[name] = module
+
+
+def test_resolve_profile():
+    """Test: Bekannte Profile und Tag-Listen (core immer dabei)."""
+    assert resolve_profile("routing-only") == {"core", "routing"}
+    assert resolve_profile("stats") == {"stats", "core"}
+    assert "ki" in resolve_profile("unbekannt,quatsch")  # Fallback auf "full"
+
+
+def test_profile_filters_routers(monkeypatch):
+    """Test: Nur Router mit passendem Tag werden registriert."""
+    calls = []
+    _fake_module("_fake_core_router", "/core", calls)
+    _fake_module("_fake_ki_router", "/api/ki-fake", calls)
+    manifest = [RouterSpec("_fake_core_router", "core"), RouterSpec("_fake_ki_router", "ki")]
+
+    app = FastAPI()
+    report = register_routers(app, profile="routing-only", lazy=False, manifest=manifest)
+    client = TestClient(app)
+    assert client.get("/core").status_code == 200
+    assert client.get("/api/ki-fake").status_code == 404
+    assert [e["module"] for e in report.entries] == ["_fake_core_router"]
+    assert app.state.router_import_report is report
+
+
+def test_lazy_router_loaded_on_first_request(monkeypatch):
+    """Test: Lazy-Router wird erst beim ersten Treffer importiert und eingesetzt."""
+    calls = []
+    manifest = [RouterSpec("_fake_lazy_router", "ki", lazy_prefixes=("/api/lazy",))]
+    app = FastAPI()
+    register_routers(app, profile="full", lazy=True, manifest=manifest)
+    assert "_fake_lazy_router" not in calls
+
+    _fake_module("_fake_lazy_router", "/api/lazy/ping", calls)
+    client = TestClient(app)
+    r = client.get("/api/lazy/ping")
+    assert r.status_code == 200
+    assert r.json() == {"module": "_fake_lazy_router"}
+    # Platzhalter ist ersetzt, zweiter Request geht direkt auf die echte Route
+    assert client.get("/api/lazy/ping").status_code == 200
+    assert any(e["lazy"] for e in app.state.router_import_report.entries)
+    assert client.get("/api/lazy/missing").status_code == 404
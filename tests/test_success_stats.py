@@ -0,0 +1,72 @@
+"""
+Tests für die In-Memory-Aggregation der Erfolgs-Statistiken (gebündelter Flush).
+"""
+import pytest
+from sqlalchemy import create_engine, text
+
+from backend.services import error_learning_service
+from backend.services.success_stats import SuccessStatsAggregator, should_record
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'stats.db'}", future=True)
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE success_stats (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                endpoint TEXT NOT NULL,
+                time_bucket TEXT NOT NULL,
+                total_calls INTEGER DEFAULT 0,
+                success_calls INTEGER DEFAULT 0,
+                error_calls INTEGER DEFAULT 0,
+                avg_latency_ms REAL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(endpoint, time_bucket)
+            )
+        """))
+    monkeypatch.setattr(error_learning_service, "ENGINE", engine)
+    return engine
+
+
+def _rows(engine):
+    with engine.connect() as conn:
+        return conn.execute(text(
+            "SELECT endpoint, total_calls, success_calls, avg_latency_ms FROM success_stats ORDER BY endpoint"
+        )).fetchall()
+
+
+def test_flush_aggregates_per_template_in_one_batch(engine):
+    """Test: Viele Requests -> eine Zeile pro Template; Flush addiert zu bestehenden Werten."""
+    agg = SuccessStatsAggregator()
+    for ms in (10, 20, 30):
+        agg.record("/api/tour/{tour_id}", ms, day="2025-01-01")
+    agg.record("/api/workflow/status", 5, day="2025-01-01")
+
+    assert agg.flush() == 2
+    assert agg.pending() == 0
+    assert agg.flush() == 0
+    assert _rows(engine) == [("/api/tour/{tour_id}", 3, 3, 20.0), ("/api/workflow/status", 1, 1, 5.0)]
+
+    agg.record("/api/tour/{tour_id}", 60, day="2025-01-01")
+    agg.flush()
+    assert _rows(engine)[0] == ("/api/tour/{tour_id}", 4, 4, 30.0)
+
+
+def test_failed_flush_requeues_and_static_paths_are_skipped(monkeypatch):
+    """Test: Schreibfehler verliert keine Zähler; statische Pfade werden nicht erfasst."""
+    agg = SuccessStatsAggregator()
+    agg.record("/api/x", 10, day="2025-01-01")
+
+    def broken(rows):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(error_learning_service, "log_success_batch", broken)
+    assert agg.flush() == 0
+    assert agg.pending() == 1
+
+    assert not should_record("/static/js/app.js")
+    assert not should_record("/health/db")
+    assert not should_record("/favicon.ico")
+    assert should_record("/api/tour/123")
@@ -0,0 +1,56 @@
+"""Tests für den In-Memory-Synonym-Index und die gebündelten Treffer-Zähler"""
+
+import sqlite3
+from pathlib import Path
+
+from backend.services.synonyms import SynonymStore, Synonym
+
+
+def _hit_rows(db: Path) -> list:
+    conn = sqlite3.connect(str(db))
+    try:
+        return conn.execute(
+            "SELECT alias_norm, COUNT(*) FROM synonym_hits GROUP BY alias_norm ORDER BY alias_norm"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def test_resolve_many_counts_hits_in_memory_until_flush(tmp_path: Path):
+    db = tmp_path / 'syn.sqlite3'
+    store = SynonymStore(db)
+    store.upsert(Synonym(alias='Roswitha', street='Hauptstr 1', postal_code='01067', city='Dresden'))
+    store.upsert(Synonym(alias='KdNr:4711', customer_id='C4711', lat=51.05, lon=13.74))
+
+    resolved = store.resolve_many(['Roswitha', 'KdNr:4711', 'Unbekannt', 'roswitha', 'Roswitha'])
+
+    assert resolved['Roswitha'].street == 'Hauptstr 1'
+    assert resolved['roswitha'].street == 'Hauptstr 1'
+    assert resolved['KdNr:4711'].customer_id == 'C4711'
+    assert resolved['Unbekannt'] is None
+    assert store.resolve('KdNr:4711').lat == 51.05
+
+    # Lesepfad schreibt nichts
+    assert _hit_rows(db) == []
+    assert store.flush_hits() == 5
+    assert _hit_rows(db) == [('kdnr:4711', 2), ('roswitha', 3)]
+    assert store.flush_hits() == 0
+
+
+def test_index_is_shared_and_invalidated_on_upsert_and_delete(tmp_path: Path):
+    db = tmp_path / 'syn.sqlite3'
+    reader = SynonymStore(db)
+    writer = SynonymStore(db)
+
+    assert reader.resolve('Büttner') is None
+
+    writer.upsert(Synonym(alias='Büttner', street='Steigerstraße 1', postal_code='01159', city='Dresden'))
+    assert reader.resolve('Büttner').street == 'Steigerstraße 1'
+
+    # Geänderte Kopie verändert den Index nicht
+    reader.resolve('Büttner').street = 'Fröbelstraße 20'
+    assert reader.resolve('Büttner').street == 'Steigerstraße 1'
+
+    assert writer.delete('Büttner') is True
+    assert reader.resolve('Büttner') is None
+    reader.flush_hits()
@@ -0,0 +1,88 @@
+"""
+Tests für die begrenzte Telemetrie (Zähler, Histogramme, Zeitfenster-Ringpuffer).
+"""
+import pytest
+
+from backend.services.osrm_metrics import OSRMMetrics
+from backend.services.telemetry import Histogram, LabeledCounter, MetricsRegistry, WindowedRing
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_histogram_quantiles_with_fixed_memory():
+    """Test: Quantile aus festen Buckets; Speicher wächst nicht mit den Samples."""
+    hist = Histogram(buckets=(10, 20, 50, 100))
+    for i in range(10_000):
+        hist.observe(float(i % 100))
+    assert hist.count == 10_000
+    assert len(hist.counts) == 5
+    assert 90 <= hist.quantile(0.95) <= 100
+    assert hist.quantile(0.05) <= 10
+    assert hist.as_dict()["buckets"]["le_10"] == 1100
+    hist.reset()
+    assert hist.quantile(0.5) == 0.0
+
+
+def test_windowed_ring_expires_old_slots():
+    """Test: Werte außerhalb des Fensters fallen heraus, ohne dass Samples gespeichert werden."""
+    clock = FakeClock()
+    ring = WindowedRing(window_s=60, slots=6, clock=clock)
+    ring.observe(5.0)
+    ring.observe(15.0)
+    clock.now += 30
+    ring.observe(100.0)
+
+    summary = ring.summary()
+    assert summary["count"] == 3
+    assert summary["min"] == 5.0 and summary["max"] == 100.0
+    assert summary["avg"] == 40.0
+
+    clock.now += 40  # erste Scheibe liegt jetzt außerhalb des Fensters
+    assert ring.summary()["count"] == 1
+    clock.now += 600  # Slot-Wiederverwendung nach mehreren Umläufen
+    ring.observe(1.0)
+    assert ring.summary() == {"window_s": 60.0, "count": 1, "rate_per_s": 0.0167,
+                              "avg": 1.0, "min": 1.0, "max": 1.0}
+
+
+def test_registry_snapshot_and_type_conflicts():
+    """Test: Get-or-create pro Name, begrenzte Labels, Export als Dict."""
+    reg = MetricsRegistry()
+    reg.counter("a.calls").inc(3)
+    assert reg.counter("a.calls").value == 3
+    labels = reg.labeled("a.sector", max_labels=2)
+    for label in ("N", "O", "S", "W"):
+        labels.inc(label)
+    assert isinstance(labels, LabeledCounter)
+    assert labels.as_dict() == {"N": 1, "O": 1, "other": 2}
+
+    with pytest.raises(TypeError):
+        reg.histogram("a.calls")
+
+    assert reg.snapshot("a.") == {"a.calls": 3, "a.sector": {"N": 1, "O": 1, "other": 2}}
+    reg.reset()
+    assert reg.snapshot()["a.calls"] == 0
+
+
+def test_osrm_metrics_feed_registry():
+    """Test: OSRM-Latenzen landen im Registry-Histogramm; reset setzt sie zurück."""
+    reg = MetricsRegistry()
+    metrics = OSRMMetrics(max_samples=10, registry=reg)
+    for i in range(50):
+        metrics.record_request(latency_ms=100.0 + i, success=True)
+
+    stats = metrics.get_stats()
+    assert len(metrics.latency_history) == 10
+    assert reg.histogram("osrm.latency_ms").count == 50
+    assert stats["avg_latency_ms"] == 124.5
+    assert 100 <= stats["p95_latency_ms"] <= 149
+    assert stats["latency_5m"]["count"] == 50
+
+    metrics.reset()
+    assert reg.snapshot("osrm.")["osrm.latency_ms"]["count"] == 0
@@ -0,0 +1,72 @@
+"""
+Tests für den Timebox-Evaluator (eine Dauer-Matrix pro Tour).
+"""
+from backend.services.timebox_evaluator import (
+    SERVICE_TIME_PER_STOP, TimeboxEvaluator, _fallback_minutes,
+)
+
+
+class FakeOSRMClient:
+    """Liefert eine Matrix mit 10 Minuten pro Fahrt und zählt die Requests."""
+
+    available = True
+
+    def __init__(self):
+        self.table_calls = 0
+        self.route_calls = 0
+
+    def get_distance_matrix(self, coords):
+        self.table_calls += 1
+        n = len(coords)
+        return {(i, j): {"km": 5.0, "minutes": 0.0 if i == j else 10.0}
+                for i in range(n) for j in range(n)}
+
+    def get_route(self, *args, **kwargs):
+        self.route_calls += 1
+        raise AssertionError("Timebox darf keine Geometrie anfragen")
+
+
+def _stops(n):
+    return [{"lat": 51.0 + i * 0.01, "lon": 13.7 + i * 0.01, "name": f"Stop {i}"} for i in range(n)]
+
+
+def test_times_from_single_matrix():
+    """Test: Zeit ohne Rückfahrt und Rückfahrt kommen aus der Matrix."""
+    client = FakeOSRMClient()
+    stops = _stops(3)
+    evaluator = TimeboxEvaluator(stops, client=client)
+
+    assert evaluator.source == "osrm"
+    assert evaluator.time_without_return(stops) == 3 * 10.0 + 3 * SERVICE_TIME_PER_STOP
+    # Teilmengen/Umsortierungen ohne neuen Request
+    assert evaluator.time_without_return([stops[2], stops[0]]) == 2 * 10.0 + 2 * SERVICE_TIME_PER_STOP
+    assert evaluator.back_to_depot_minutes(stops[-1]) == 10.0
+    assert client.table_calls == 1
+
+
+def test_fallback_without_client():
+    """Test: Ohne OSRM wird Haversine × 1.3 verwendet."""
+    stops = _stops(2)
+    evaluator = TimeboxEvaluator(stops, use_osrm=False)
+    expected = (_fallback_minutes(evaluator.depot, (51.0, 13.7))
+                + _fallback_minutes((51.0, 13.7), (51.01, 13.71))
+                + 2 * SERVICE_TIME_PER_STOP)
+    assert evaluator.source == "haversine"
+    assert abs(evaluator.time_without_return(stops) - expected) < 1e-9
+
+
+def test_enforce_timebox_splits_with_one_table_call(monkeypatch):
+    """Test: Splitten einer 90-Stopp-Tour kostet genau einen Table-Request."""
+    from backend.routes import workflow_api
+
+    client = FakeOSRMClient()
+    monkeypatch.setattr(workflow_api, "get_osrm_client", lambda: client)
+
+    stops = _stops(90)
+    tours = workflow_api.enforce_timebox("W-07.00 Uhr Tour", stops, max_depth=3)
+
+    assert len(tours) > 1
+    assert sum(t["stop_count"] for t in tours) == 90
+    assert all(t["estimated_time_minutes"] <= workflow_api.TIME_BUDGET_WITHOUT_RETURN for t in tours)
+    assert client.table_calls == 1
+    assert client.route_calls == 0
@@ -0,0 +1,65 @@
+"""Tests für den Parse-Cache der Tourenpläne (SHA-256 der Roh-Bytes, LRU auf der Festplatte)"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from backend.parsers import tour_plan_cache
+from backend.parsers import tour_plan_parser as tp
+from backend.parsers.tour_plan_cache import TourPlanCache
+from backend.services.synonyms import Synonym, SynonymStore
+
+TOURPLAN = sorted((Path(__file__).resolve().parents[1] / "tourplaene").glob("Tourenplan *.csv"))[0]
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = TourPlanCache(tmp_path / "parse_cache", max_entries=2)
+    monkeypatch.setattr(tour_plan_cache, "_cache", cache)
+    monkeypatch.setattr(tp, "_synonym_db_path", lambda: tmp_path / "traffic.db")
+    return cache
+
+
+def test_identical_bytes_skip_parsing_and_give_same_result(cache, tmp_path, monkeypatch):
+    expected = tp.tour_plan_to_dict(tp.parse_tour_plan(TOURPLAN))
+    assert tp.parse_tour_plan_to_dict(TOURPLAN) == expected
+    assert cache.stats()["entries"] == 1
+
+    def no_parsing(path):
+        raise AssertionError("Cache-Treffer darf nicht parsen")
+
+    monkeypatch.setattr(tp, "parse_tour_plan", no_parsing)
+    copy = tmp_path / "Upload Kopie.csv"
+    copy.write_bytes(TOURPLAN.read_bytes())
+    result = tp.parse_tour_plan_to_dict(copy)
+    assert result["metadata"]["source_file"] == "Upload Kopie.csv"
+    assert {k: v for k, v in result.items() if k != "metadata"} == {k: v for k, v in expected.items() if k != "metadata"}
+
+    # Upload-Pfad: Lookup direkt über die Bytes, ohne Datei
+    plan = tp.cached_tour_plan(TOURPLAN.read_bytes(), "upload.csv", staging=False)
+    assert plan is not None and tp.tour_plan_to_dict(plan)["tours"] == expected["tours"]
+    assert tp.cached_tour_plan(TOURPLAN.read_bytes(), "upload.csv", staging=True) is None
+
+
+def test_synonym_change_parser_version_and_lru_eviction(cache, tmp_path, monkeypatch):
+    content = TOURPLAN.read_bytes()
+    tp.parse_tour_plan_cached(TOURPLAN)
+    assert tp.cached_tour_plan(content, "a.csv", staging=False) is not None
+
+    # Neues Synonym ändert den Schlüssel (Synonyme fließen ins Parse-Ergebnis ein)
+    SynonymStore(tmp_path / "traffic.db").upsert(Synonym(alias="Irgendwer", street="Hauptstraße 1"))
+    assert tp.cached_tour_plan(content, "a.csv", staging=False) is None
+    tp.parse_tour_plan_cached(TOURPLAN)
+    assert tp.cached_tour_plan(content, "a.csv", staging=False) is not None
+
+    monkeypatch.setattr(tp, "PARSER_VERSION", "test")
+    assert tp.cached_tour_plan(content, "a.csv", staging=False) is None
+
+    # max_entries=2: der am längsten nicht genutzte Eintrag wird verdrängt
+    paths = sorted((e.path for e in cache.entries()), key=os.path.getmtime)
+    os.utime(paths[0], (1, 1))
+    os.utime(paths[1], (2, 2))
+    tp.parse_tour_plan_cached(TOURPLAN)
+    remaining = {e.path for e in cache.entries()}
+    assert len(remaining) == 2 and paths[0] not in remaining and paths[1] in remaining
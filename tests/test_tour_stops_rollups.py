@@ -0,0 +1,102 @@
+"""
+Tests für die normalisierte tour_stops-Tabelle und die inkrementellen Tour-Rollups.
+"""
+import json
+import sqlite3
+
+import pytest
+
+from backend.db import dao, models
+from backend.db.tour_stops import stops_count_expr
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = tmp_path / "traffic.db"
+    monkeypatch.setattr(dao, "get_database_path", lambda: path)
+    monkeypatch.setattr(models, "get_database_path", lambda: path)
+    return path
+
+
+def _rollup(path, table="tour_rollup_daily"):
+    with sqlite3.connect(path) as conn:
+        return conn.execute(
+            f"SELECT tour_type, sector, tours, stops, distanz_km FROM {table} WHERE tours != 0 ORDER BY 1, 2"
+        ).fetchall()
+
+
+def test_backfill_normalizes_legacy_rows(db_path):
+    """Test: init_db zieht alte touren-Zeilen (JSON und Komma-Liste) nach tour_stops und in die Rollups."""
+    with sqlite3.connect(db_path) as conn:
+        for ddl in models.DDL_STATEMENTS:
+            conn.execute(ddl)
+        conn.execute("INSERT INTO touren (tour_id, datum, kunden_ids, distanz_km) VALUES ('W-07', '2025-01-10', ?, 40)",
+                     (json.dumps([1, 2, 3]),))
+        conn.execute("INSERT INTO touren (tour_id, datum, kunden_ids, distanz_km) VALUES ('PIR-1', '2025-01-10', '4,5', 10)")
+
+    models.init_db()
+    models.init_db()  # idempotent
+
+    with sqlite3.connect(db_path) as conn:
+        stops = conn.execute("SELECT tour_id, position, kunde_id FROM tour_stops ORDER BY tour_id, position").fetchall()
+        counts = conn.execute("SELECT tour_id, stops_count, tour_type FROM touren ORDER BY tour_id").fetchall()
+    assert stops == [("PIR-1", 1, 4), ("PIR-1", 2, 5), ("W-07", 1, 1), ("W-07", 2, 2), ("W-07", 3, 3)]
+    assert counts == [("PIR-1", 2, "PIR"), ("W-07", 3, "W")]
+    assert _rollup(db_path) == [("PIR", "", 1, 2, 10.0), ("W", "W", 1, 3, 40.0)]
+
+
+def test_write_path_maintains_rollups(db_path):
+    """Test: insert/update/delete über die DAO halten Tages- und Monats-Rollups konsistent."""
+    models.init_db()
+
+    dao.insert_tour("W-07.00 Uhr Tour", "2025-01-10", [1, 2, 3], dauer_min=60, distanz_km=42.0)
+    dao.insert_tour("W-09.00 Uhr Tour", "2025-01-11", [4], distanz_km=8.0)
+    assert _rollup(db_path, "tour_rollup_monthly") == [("W", "W", 2, 4, 50.0)]
+
+    assert dao.update_tour_route_data("W-07.00 Uhr Tour", "2025-01-10", distanz_km=45.0, gesamtzeit_min=90)
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute(
+            "SELECT distanz_km, zeit_min FROM tour_rollup_daily WHERE datum = '2025-01-10'"
+        ).fetchone() == (45.0, 90.0)
+
+    with sqlite3.connect(db_path) as conn:
+        assert dao.delete_tours_by_prefix(conn, "W-07", "2025-01-10") == 1
+        conn.commit()
+        assert conn.execute("SELECT COUNT(*) FROM tour_stops").fetchone()[0] == 1
+    assert _rollup(db_path, "tour_rollup_monthly") == [("W", "W", 1, 1, 8.0)]
+
+
+def test_stops_count_expr_matches_legacy_parsing():
+    """Test: SQL-Stopp-Zählung entspricht der bisherigen JSON-/Komma-Auswertung."""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE touren (kunden_ids TEXT, stops_count INTEGER)")
+    conn.executemany("INSERT INTO touren VALUES (?, ?)", [
+        ('["5329", "40620"]', None), ("1,2,3", None), ("", None), (None, None), ('{"a": 1}', None), ("[1]", 7),
+    ])
+    expr = stops_count_expr({"kunden_ids", "stops_count"})
+    assert [r[0] for r in conn.execute(f"SELECT {expr} FROM touren")] == [2, 3, 0, 0, 0, 7]
+
+
+def test_stats_aggregator_reads_rollups_plus_pending_rows(db_path):
+    """Test: Tages-/Monats-KPIs kommen aus den Rollups, noch nicht normalisierte Zeilen zählen mit."""
+    from datetime import datetime
+    from sqlalchemy import create_engine
+    from backend.services import stats_aggregator
+
+    models.init_db()
+    today = datetime.now().strftime("%Y-%m-%d")
+    dao.insert_tour("W-07.00 Uhr Tour", today, [1, 2, 3], dauer_min=60, distanz_km=40.0)
+    with sqlite3.connect(db_path) as conn:
+        # An der DAO vorbei (stops_count IS NULL) – steht noch nicht in den Rollups
+        conn.execute("INSERT INTO touren (tour_id, datum, kunden_ids, distanz_km) VALUES ('PIR-1', ?, '4,5', 10)",
+                     (today,))
+    engine = create_engine(f"sqlite:///{db_path}")
+
+    day = stats_aggregator.get_daily_stats(days=2, engine=engine)[0]
+    month = stats_aggregator.get_monthly_stats(months=1, engine=engine)[0]
+
+    for stats in (day, month):
+        assert (stats["tours"], stats["stops"], stats["km"], stats["total_time_min"]) == (2, 5, 50.0, 60.0)
+        expected = stats_aggregator.calculate_tour_cost(50.0, 60.0, 5)["tour_cost_total"]
+        assert stats["total_cost"] == expected
+    engine.dispose()
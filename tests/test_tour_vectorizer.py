@@ -0,0 +1,160 @@
+"""
+Tests für die persistente Vektorisierungs-Queue und Batch-Embeddings.
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+
+from db.core import ENGINE
+from backend.services import tour_embedder, tour_vectorizer
+
+
+@pytest.fixture
+def queue_db():
+    with ENGINE.begin() as conn:
+        conn.exec_driver_sql("""
+            CREATE TABLE IF NOT EXISTS touren (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tour_id TEXT NOT NULL,
+                datum TEXT NOT NULL,
+                kunden_ids TEXT,
+                dauer_min INTEGER,
+                distanz_km REAL,
+                fahrer TEXT
+            )
+        """)
+        conn.exec_driver_sql("DELETE FROM touren")
+    tour_vectorizer._ensure_queue_schema()
+    with ENGINE.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM vectorization_queue")
+    yield
+    with ENGINE.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM vectorization_queue")
+        conn.exec_driver_sql("DELETE FROM touren")
+
+
+def _insert_tour(tour_id, datum, kunden_ids):
+    with ENGINE.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO touren (tour_id, datum, kunden_ids, dauer_min, distanz_km) VALUES (:t, :d, :k, 60, 42.0)"
+        ), {"t": tour_id, "d": datum, "k": json.dumps(kunden_ids)})
+
+
+def test_queue_dedup_on_tour_and_date(queue_db):
+    """Test: Doppeltes Einreihen erzeugt nur einen Eintrag."""
+    tour_vectorizer.queue_tour_for_vectorization("W-07", "2025-01-10", delay_minutes=0)
+    tour_vectorizer.queue_tour_for_vectorization("W-07", "2025-01-10", delay_minutes=0)
+    assert tour_vectorizer.get_queue_stats() == {"pending": 1}
+
+
+def test_process_queue_batches_all_due_tours(queue_db, monkeypatch):
+    """Test: Alle fälligen Touren gehen in EINEM Batch an den Embedder."""
+    calls = []
+
+    def fake_embed(metadata_list):
+        calls.append(metadata_list)
+        return {(m["tour_id"], m["datum"]): True for m in metadata_list}
+
+    monkeypatch.setattr(tour_vectorizer, "embed_and_store_tours", fake_embed)
+    _insert_tour("W-07", "2025-01-10", [1, 2, 3])
+    _insert_tour("PIR-1", "2025-01-10", [4])
+    for tour_id in ("W-07", "PIR-1", "FEHLT"):
+        tour_vectorizer.queue_tour_for_vectorization(tour_id, "2025-01-10", delay_minutes=0)
+    tour_vectorizer.queue_tour_for_vectorization("T-9", "2025-01-10", delay_minutes=60)
+
+    processed = asyncio.run(tour_vectorizer.process_vectorization_queue())
+
+    assert processed == 3
+    assert len(calls) == 1
+    by_id = {m["tour_id"]: m for m in calls[0]}
+    assert by_id["W-07"]["stops_count"] == 3
+    assert by_id["W-07"]["total_time_min"] == 60
+    assert by_id["PIR-1"]["tour_type"] == "PIR"
+    assert tour_vectorizer.get_queue_stats() == {"done": 3, "pending": 1}
+
+
+def test_failed_embedding_is_rescheduled(queue_db, monkeypatch):
+    """Test: Fehlgeschlagene Touren bleiben pending mit erhöhtem attempts-Zähler."""
+    monkeypatch.setattr(tour_vectorizer, "embed_and_store_tours",
+                        lambda ms: {(m["tour_id"], m["datum"]): False for m in ms})
+    _insert_tour("W-07", "2025-01-10", [1])
+    tour_vectorizer.queue_tour_for_vectorization("W-07", "2025-01-10", delay_minutes=0)
+
+    asyncio.run(tour_vectorizer.process_vectorization_queue())
+
+    with ENGINE.begin() as conn:
+        status, attempts = conn.execute(text(
+            "SELECT status, attempts FROM vectorization_queue WHERE tour_id = 'W-07'"
+        )).one()
+    assert (status, attempts) == ("pending", 1)
+
+
+def test_create_tour_embeddings_uses_batched_requests(monkeypatch):
+    """Test: Ein OpenAI-Request pro Batch, Reihenfolge über index."""
+    requests = []
+
+    class FakeEmbeddings:
+        def create(self, model, input):
+            requests.append(list(input))
+            data = [SimpleNamespace(index=i, embedding=[float(i)]) for i in range(len(input))]
+            return SimpleNamespace(data=list(reversed(data)))
+
+    monkeypatch.setattr(tour_embedder, "get_openai_client", lambda: SimpleNamespace(embeddings=FakeEmbeddings()))
+    monkeypatch.setattr(tour_embedder, "EMBEDDING_BATCH_SIZE", 2)
+    metadata = [{"tour_id": f"T{i}", "datum": "2025-01-10"} for i in range(5)]
+
+    embeddings = tour_embedder.create_tour_embeddings(metadata)
+
+    assert [len(r) for r in requests] == [2, 2, 1]
+    assert embeddings == [[0.0], [1.0], [0.0], [1.0], [0.0]]
+
+
+def test_claimed_rows_are_skipped_until_claim_expires(queue_db, monkeypatch):
+    """Test: Von einem anderen Worker beanspruchte Einträge werden nicht doppelt verarbeitet."""
+    calls = []
+    monkeypatch.setattr(tour_vectorizer, "embed_and_store_tours",
+                        lambda ms: calls.append(ms) or {(m["tour_id"], m["datum"]): True for m in ms})
+    _insert_tour("W-07", "2025-01-10", [1])
+    tour_vectorizer.queue_tour_for_vectorization("W-07", "2025-01-10", delay_minutes=0)
+    with ENGINE.begin() as conn:
+        conn.execute(text(
+            "UPDATE vectorization_queue SET claimed_by = 'anderer-worker', claimed_at = :now"
+        ), {"now": tour_vectorizer._ts(tour_vectorizer.datetime.now())})
+
+    assert asyncio.run(tour_vectorizer.process_vectorization_queue()) == 0
+    assert calls == [] and tour_vectorizer.get_queue_stats() == {"pending": 1}
+
+    with ENGINE.begin() as conn:
+        conn.execute(text("UPDATE vectorization_queue SET claimed_at = '2000-01-01 00:00:00'"))
+
+    assert asyncio.run(tour_vectorizer.process_vectorization_queue()) == 1
+    with ENGINE.begin() as conn:
+        status, claimed_by = conn.execute(text(
+            "SELECT status, claimed_by FROM vectorization_queue WHERE tour_id = 'W-07'"
+        )).one()
+    assert (status, claimed_by) == ("done", None)
+
+
+def test_embed_and_store_groups_upserts_by_dimension(monkeypatch):
+    """Test: Fallback-Embeddings werden getrennt von Modell-Embeddings geschrieben."""
+    from backend.services import vector_db
+
+    upserts = []
+
+    def fake_add(items):
+        dims = {len(item["embedding"]) for item in items}
+        upserts.append(sorted(item["tour_id"] for item in items))
+        return len(dims) == 1 and dims != {10}
+
+    monkeypatch.setattr(tour_embedder, "create_tour_embeddings",
+                        lambda ms: [[0.1] * 1536, [0.2] * 10, [0.3] * 1536])
+    monkeypatch.setattr(vector_db, "add_tour_embeddings", fake_add)
+    metadata = [{"tour_id": t, "datum": "2025-01-10"} for t in ("A", "B", "C")]
+
+    results = tour_embedder.embed_and_store_tours(metadata)
+
+    assert sorted(upserts) == [["A", "C"], ["B"]]
+    assert results == {("A", "2025-01-10"): True, ("B", "2025-01-10"): False, ("C", "2025-01-10"): True}
@@ -0,0 +1,109 @@
+"""Tests für die cache-first Varianten-Prüfung (StreetNameValidator)"""
+
+import threading
+import time
+from pathlib import Path
+
+from backend.services import variant_resolver
+from backend.services.address_validator import StreetNameValidator
+from backend.services.synonyms import Synonym, SynonymStore
+from backend.services.variant_resolver import VariantResolver
+from repositories.geo_batch_repo import AddressFacts
+
+
+class _Geocoder:
+    """Zählt Aufrufe und die maximale Parallelität."""
+
+    def __init__(self, hits):
+        self.hits = hits
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, address):
+        with self.lock:
+            self.calls.append(address)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.02)
+        with self.lock:
+            self.active -= 1
+        return {"lat": 51.0, "lon": 13.7} if address in self.hits else None
+
+
+def _offline_sources(monkeypatch, db: Path):
+    geo = {"lat": 51.05, "lon": 13.74, "source": "cache", "src": "cache", "precision": None, "region_ok": 1}
+
+    def fake_resolve_batch(keys):
+        facts = {}
+        for key in keys:
+            f = AddressFacts(key=key)
+            if key.startswith("cachestraße"):
+                f.geo = geo
+            elif key.startswith("aliasweg"):
+                f.alias_of, f.canonical_geo = "aliasweg kanonisch", geo
+            elif key.startswith("failgasse"):
+                f.fail = {"reason": "no_result", "until": "2099-01-01"}
+            facts[key] = f
+        return facts
+
+    monkeypatch.setattr("repositories.geo_batch_repo.resolve_batch", fake_resolve_batch)
+    monkeypatch.setattr("backend.db.dao.geocache_get_many",
+                        lambda addrs: {a: (51.0, 13.0, "geoapify") for a in addrs if a.startswith("Altweg")})
+    monkeypatch.setattr("common.normalize.normalize_address", lambda a: a.lower())
+    SynonymStore(db).upsert(Synonym(alias="Lager Nord", lat=51.2, lon=13.9))
+
+
+def test_offline_sources_answer_first_and_live_results_are_cached(tmp_path, monkeypatch):
+    db = tmp_path / "traffic.db"
+    _offline_sources(monkeypatch, db)
+    geocoder = _Geocoder(hits={"Neustraße 1, 01067 Dresden"})
+    resolver = VariantResolver(db_path=db, geocoder=geocoder, concurrency=3, rate_per_sec=1000)
+
+    addresses = [
+        "Cachestraße 1, 01067 Dresden", "Aliasweg 2, 01067 Dresden", "Failgasse 3, 01067 Dresden",
+        "Altweg 4, 01067 Dresden", "Lager Nord", "Neustraße 1, 01067 Dresden",
+    ] + [f"Unbekannt {i}, 01067 Dresden" for i in range(8)]
+
+    checks = resolver.check_many(addresses + addresses[:3])
+    assert {a: checks[a].source for a in addresses[:6]} == {
+        "Cachestraße 1, 01067 Dresden": "geo_cache",
+        "Aliasweg 2, 01067 Dresden": "alias",
+        "Failgasse 3, 01067 Dresden": "fail_cache",
+        "Altweg 4, 01067 Dresden": "geocache",
+        "Lager Nord": "synonym",
+        "Neustraße 1, 01067 Dresden": "live",
+    }
+    assert [a for a in addresses if checks[a].resolves] == addresses[:2] + addresses[3:6]
+    assert sorted(geocoder.calls) == sorted(addresses[5:])
+    assert 1 < geocoder.peak <= 3
+
+    # Zweiter Lauf: Live-Ergebnisse kommen aus dem Prüf-Cache
+    again = resolver.check_many(addresses)
+    assert len(geocoder.calls) == len(addresses[5:])
+    assert again["Neustraße 1, 01067 Dresden"].source == "check_cache"
+    assert again["Neustraße 1, 01067 Dresden"].resolves is True
+    assert again["Unbekannt 0, 01067 Dresden"].resolves is False
+
+    # Negative Ergebnisse laufen ab und werden erneut geprüft
+    monkeypatch.setattr(variant_resolver, "NEGATIVE_TTL_H", 0)
+    resolver.check_many(addresses, live_limit=2)
+    assert len(geocoder.calls) == len(addresses[5:]) + 2
+
+
+def test_street_variants_offline_mode_never_geocodes_live(tmp_path, monkeypatch):
+    db = tmp_path / "traffic.db"
+    _offline_sources(monkeypatch, db)
+    geocoder = _Geocoder(hits=set())
+    validator = StreetNameValidator(resolver=VariantResolver(db_path=db, geocoder=geocoder))
+
+    variants = validator.analyze_street_name_variants([
+        "Cachestraße 1, 01067 Dresden", "Cachestr. 1, 01067 Dresden", "ohne Hausnummer",
+    ], live=False)
+
+    assert geocoder.calls == []
+    assert {k: [(v.variant, v.success_rate) for v in vs] for k, vs in variants.items()} == {
+        "Cachestraße| 01067 Dresden": [("Cachestraße", 1.0)],
+        "Cachestr.| 01067 Dresden": [("Cachestr.", 0.0)],
+    }